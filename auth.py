@@ -17,6 +17,7 @@ import os
 import uuid
 import time
 import logging
+import threading
 from typing import Dict, Optional, Set, Callable
 from functools import wraps
 from datetime import datetime, timedelta
@@ -39,6 +40,8 @@ try:
 except ImportError:
     WEBSOCKETS_AVAILABLE = False
 
+from r2d2_token_cache import TokenValidationCache, hash_token
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -55,6 +58,10 @@ class TokenStore:
     """
     In-memory token storage with metadata tracking
     Production upgrade path: Replace with Redis or database backend
+
+    Validation goes through a TokenValidationCache: a hashed, immutable
+    snapshot read without locks, with usage counted per thread and merged
+    into metadata periodically. The lock only guards writers.
     """
 
     def __init__(self):
@@ -67,8 +74,12 @@ class TokenStore:
         # Token metadata tracking
         self._token_metadata: Dict[str, Dict] = {}
 
-        # Lock for thread safety (future enhancement)
-        # self._lock = threading.Lock()
+        # Lock for thread safety (writers and metadata merges)
+        self._lock = threading.Lock()
+
+        # Lock-free validation snapshot
+        self._digest_to_token: Dict[bytes, str] = {}
+        self._cache = TokenValidationCache(on_flush=self._apply_usage)
 
     def add_token(self, token: str, metadata: Optional[Dict] = None) -> None:
         """
@@ -87,7 +98,10 @@ class TokenStore:
         metadata.setdefault('usage_count', 0)
         metadata.setdefault('scope', 'full_access')  # Future: role-based access
 
-        self._tokens[token] = metadata
+        with self._lock:
+            self._tokens[token] = metadata
+            self._digest_to_token[hash_token(token)] = token
+        self._cache.add(token)
         logger.info(f"Token added: {token[:8]}... (scope: {metadata.get('scope', 'unknown')})")
 
     def validate_token(self, token: str) -> bool:
@@ -100,21 +114,21 @@ class TokenStore:
         Returns:
             True if token is valid, False otherwise
         """
-        # Check if token is revoked
-        if token in self._revoked_tokens:
-            logger.warning(f"Revoked token attempted: {token[:8]}...")
-            return False
-
-        # Check if token exists
-        if token not in self._tokens:
-            logger.warning(f"Invalid token attempted: {token[:8]}...")
-            return False
-
-        # Update usage metadata
-        self._tokens[token]['last_used'] = datetime.now().isoformat()
-        self._tokens[token]['usage_count'] += 1
-
-        return True
+        return self._cache.validate(token)
+
+    def _apply_usage(self, digest: bytes, uses: int, last_used: float) -> None:
+        """Merge flushed per-thread usage counters into token metadata"""
+        with self._lock:
+            token = self._digest_to_token.get(digest)
+            metadata = self._tokens.get(token) if token else None
+            if metadata is None:
+                return
+            metadata['usage_count'] += uses
+            metadata['last_used'] = datetime.fromtimestamp(last_used).isoformat()
+
+    def flush_usage(self) -> None:
+        """Merge pending per-thread usage counters into token metadata"""
+        self._cache.flush()
 
     def revoke_token(self, token: str) -> bool:
         """
@@ -127,20 +141,24 @@ class TokenStore:
             True if token was revoked, False if not found
         """
         if token in self._tokens:
-            self._revoked_tokens.add(token)
+            self._cache.revoke(token)
+            with self._lock:
+                self._revoked_tokens.add(token)
             logger.info(f"Token revoked: {token[:8]}...")
             return True
         return False
 
     def get_token_metadata(self, token: str) -> Optional[Dict]:
         """Get metadata for a token"""
+        self.flush_usage()
         return self._tokens.get(token)
 
     def list_active_tokens(self) -> Dict[str, Dict]:
         """List all active (non-revoked) tokens with metadata"""
+        self.flush_usage()
         return {
             token: metadata
-            for token, metadata in self._tokens.items()
+            for token, metadata in list(self._tokens.items())
             if token not in self._revoked_tokens
         }
 
@@ -174,6 +192,7 @@ class AuthManager:
             enable_env_token: Load API_KEY from environment variable
         """
         self.token_store = TokenStore()
+        self.validation_count = 0
         self.security_events: list = []
         self.max_security_events = 1000  # Keep last 1000 events
 
@@ -226,17 +245,22 @@ class AuthManager:
 
         Returns:
             True if valid, False otherwise
+
+        Successful validations are only counted; failures are recorded as
+        security events so the audit trail is not dominated by polling.
         """
         is_valid = self.token_store.validate_token(token)
-
-        self._log_security_event(
-            'token_validation',
-            {
-                'token_prefix': token[:8] if token else 'none',
-                'valid': is_valid,
-                'timestamp': datetime.now().isoformat()
-            }
-        )
+        self.validation_count += 1
+
+        if not is_valid:
+            self._log_security_event(
+                'token_validation',
+                {
+                    'token_prefix': token[:8] if token else 'none',
+                    'valid': False,
+                    'timestamp': datetime.now().isoformat()
+                }
+            )
 
         return is_valid
 
@@ -307,6 +331,8 @@ class AuthManager:
             'active_tokens': len(active_tokens),
             'revoked_tokens': len(self.token_store._revoked_tokens),
             'total_security_events': len(self.security_events),
+            'total_validations': self.validation_count,
+            'validation_failures': self.token_store._cache.failures.get_counts(),
             'token_usage': {
                 token[:8]: metadata.get('usage_count', 0)
                 for token, metadata in active_tokens.items()
@@ -14,6 +14,7 @@ Features:
 - Real-time hardware monitoring and status reporting
 - Professional servo configuration import/export
 - Safety system integration with hardware validation
+- Script memory size per variant (for onboard script budgeting)
 """
 
 import serial
@@ -42,6 +43,14 @@ class MaestroVariant(Enum):
     STANDARD_24 = "Standard 24-Channel"
     UNKNOWN = "Unknown Variant"
 
+# Script memory by variant (the 6-channel board is the Micro Maestro)
+SCRIPT_MEMORY_BYTES = {
+    MaestroVariant.STANDARD_6: 1024,
+    MaestroVariant.MINI_12: 8192,
+    MaestroVariant.MINI_18: 8192,
+    MaestroVariant.MINI_24: 8192,
+}
+
 @dataclass
 class MaestroHardwareInfo:
     """Comprehensive Maestro hardware information"""
@@ -56,6 +65,11 @@ class MaestroHardwareInfo:
     capabilities: List[str] = field(default_factory=list)
     detected_at: float = field(default_factory=time.time)
 
+    @property
+    def script_memory_bytes(self) -> int:
+        """Script memory of the board (smallest known size when the variant is unknown)"""
+        return SCRIPT_MEMORY_BYTES.get(self.variant, min(SCRIPT_MEMORY_BYTES.values()))
+
 class MaestroDetectionStatus(Enum):
     """Hardware detection status"""
     SCANNING = "scanning"
@@ -544,7 +558,8 @@ class MaestroHardwareDetector:
                     "firmware": device.firmware_version,
                     "capabilities": device.capabilities,
                     "product_id": f"0x{device.product_id:02X}",
-                    "serial_number": device.serial_number
+                    "serial_number": device.serial_number,
+                    "script_memory_bytes": device.script_memory_bytes
                 }
                 for device in self.detected_devices
             ],
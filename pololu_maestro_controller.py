@@ -25,7 +25,7 @@ import serial
 import time
 import logging
 import threading
-from typing import Dict, List, Tuple, Optional, Union
+from typing import Callable, Dict, List, Tuple, Optional, Union
 from dataclasses import dataclass, field
 from enum import Enum
 import json
@@ -37,12 +37,17 @@ logger = logging.getLogger(__name__)
 class MaestroCommand(Enum):
     """Pololu Maestro Protocol Commands"""
     SET_TARGET = 0x84           # Set target position
+    SET_MULTIPLE_TARGETS = 0x9F # Set targets of consecutive channels (Mini Maestro)
     SET_SPEED = 0x87            # Set speed limit
     SET_ACCELERATION = 0x89     # Set acceleration limit
     GET_POSITION = 0x90         # Get current position
     GET_MOVING_STATE = 0x93     # Check if servos are moving
     GET_ERRORS = 0xA1           # Get error status
     GO_HOME = 0xA2              # Move all servos to home
+    STOP_SCRIPT = 0xA4          # Stop the onboard script
+    RESTART_SCRIPT_AT_SUBROUTINE = 0xA7                 # Run an onboard subroutine
+    RESTART_SCRIPT_AT_SUBROUTINE_WITH_PARAMETER = 0xA8  # ... with a parameter on the stack
+    GET_SCRIPT_STATUS = 0xAE    # 0 if the script is running
 
 class ServoChannel(Enum):
     """R2-D2 Servo Channel Assignments for 12-Channel Maestro"""
@@ -122,6 +127,10 @@ class PololuMaestroController:
         self.is_running = True
         self._lock = threading.Lock()
 
+        # Event subscribers (safety kernel, monitors)
+        self.position_listeners: List[Callable] = []  # listener(fields, timestamp)
+        self.command_listeners: List[Callable] = []   # listener(channel, position)
+
         # Initialize servo configurations
         self._initialize_servo_configs()
 
@@ -205,6 +214,8 @@ class PololuMaestroController:
                                MaestroCommand.GET_ERRORS.value]:
                     response = self.serial_connection.read(2)
                     return response
+                if args[0] == MaestroCommand.GET_SCRIPT_STATUS.value:
+                    return self.serial_connection.read(1)
 
         except Exception as e:
             logger.error(f"Command send failed: {e}")
@@ -226,6 +237,9 @@ class PololuMaestroController:
         """Main monitoring loop for servo status"""
         while self.is_running:
             try:
+                timestamp = time.time()
+                positions: Dict[int, int] = {}
+
                 if not self.simulation_mode and not self.emergency_stop_active:
                     # Update servo positions
                     for channel in range(12):
@@ -234,6 +248,13 @@ class PololuMaestroController:
                             with self._lock:
                                 self.servo_status[channel].position = position
                                 self.servo_status[channel].last_update = time.time()
+                            positions[channel] = position
+                elif self.simulation_mode:
+                    with self._lock:
+                        positions = {ch: s.position for ch, s in self.servo_status.items()}
+
+                if positions and self.position_listeners:
+                    self._publish_positions(positions, timestamp)
 
                 time.sleep(0.1)  # 10Hz monitoring rate
 
@@ -241,6 +262,25 @@ class PololuMaestroController:
                 logger.error(f"Monitoring loop error: {e}")
                 time.sleep(1.0)
 
+    def add_position_listener(self, listener: Callable):
+        """Receive each position snapshot as listener({'position': {...}, 'target_position': {...}}, timestamp)"""
+        self.position_listeners.append(listener)
+
+    def add_command_listener(self, listener: Callable):
+        """Receive every position command sent as listener(channel, position)"""
+        self.command_listeners.append(listener)
+
+    def _publish_positions(self, positions: Dict[int, int], timestamp: float):
+        """Push a position snapshot to subscribers"""
+        with self._lock:
+            targets = {ch: self.servo_status[ch].target for ch in positions}
+        snapshot = {'position': positions, 'target_position': targets}
+        for listener in self.position_listeners:
+            try:
+                listener(snapshot, timestamp)
+            except Exception as e:
+                logger.error(f"Position listener error: {e}")
+
     def _get_servo_position(self, channel: int) -> Optional[int]:
         """Get current servo position"""
         if channel < 0 or channel > 11:
@@ -267,15 +307,87 @@ class PololuMaestroController:
             logger.warning("Cannot move servos - emergency stop active")
             return False
 
+        target = self._prepare_target(channel, position, validate)
+        if target is None:
+            return False
+
+        # Send position command
+        success = self._send_position_command(channel, target)
+        if success:
+            self._record_target(channel, target)
+
+        return success
+
+    def set_servo_positions(self, targets: Dict[int, int], validate: bool = True) -> Dict[int, bool]:
+        """
+        Set several servo positions in one serial write
+
+        Runs of consecutive channels are sent as one "Set Multiple Targets"
+        command, so a whole control tick costs a single write and every
+        channel in it starts moving on the same servo period.
+
+        Args:
+            targets: Position in quarter-microseconds per channel
+            validate: Apply safety validation
+
+        Returns:
+            Per-channel result (False for rejected channels)
+        """
+        results = {channel: False for channel in targets}
+        if self.emergency_stop_active:
+            logger.warning("Cannot move servos - emergency stop active")
+            return results
+
+        prepared = {}
+        for channel in sorted(targets):
+            target = self._prepare_target(channel, targets[channel], validate)
+            if target is not None:
+                prepared[channel] = target
+        if not prepared:
+            return results
+
+        command = []
+        for run in self._contiguous_runs(sorted(prepared)):
+            if len(run) == 1:
+                command += [MaestroCommand.SET_TARGET.value, run[0]]
+            else:
+                command += [MaestroCommand.SET_MULTIPLE_TARGETS.value, len(run), run[0]]
+            for channel in run:
+                command += [prepared[channel] & 0x7F, (prepared[channel] >> 7) & 0x7F]
+
+        try:
+            self._send_command(*command)
+        except Exception as e:
+            logger.error(f"Failed to send multiple targets: {e}")
+            return results
+
+        for channel, target in prepared.items():
+            self._record_target(channel, target)
+            results[channel] = True
+        return results
+
+    @staticmethod
+    def _contiguous_runs(channels: List[int]) -> List[List[int]]:
+        """Split sorted channels into runs of consecutive channel numbers"""
+        runs = []
+        for channel in channels:
+            if runs and runs[-1][-1] == channel - 1:
+                runs[-1].append(channel)
+            else:
+                runs.append([channel])
+        return runs
+
+    def _prepare_target(self, channel: int, position: int, validate: bool) -> Optional[int]:
+        """Validate and reverse a target; None if the channel cannot move"""
         if channel not in self.servo_configs:
             logger.error(f"Invalid servo channel: {channel}")
-            return False
+            return None
 
         config = self.servo_configs[channel]
 
         if not config.enabled:
             logger.warning(f"Servo {channel} ({config.name}) is disabled")
-            return False
+            return None
 
         # Apply safety validation
         if validate:
@@ -286,19 +398,24 @@ class PololuMaestroController:
             center = (config.min_position + config.max_position) // 2
             position = center + (center - position)
 
-        # Send position command
-        success = self._send_position_command(channel, position)
+        return position
 
-        if success:
-            with self._lock:
-                self.servo_status[channel].target = position
+    def _record_target(self, channel: int, position: int):
+        """Track a sent target and notify command listeners"""
+        config = self.servo_configs[channel]
+        with self._lock:
+            self.servo_status[channel].target = position
 
-            if self.simulation_mode:
-                logger.info(f"[SIM] Servo {channel} ({config.name}): {position/4:.1f}µs")
-            else:
-                logger.debug(f"Servo {channel} ({config.name}): {position/4:.1f}µs")
+        for listener in self.command_listeners:
+            try:
+                listener(channel, position)
+            except Exception as e:
+                logger.error(f"Command listener error: {e}")
 
-        return success
+        if self.simulation_mode:
+            logger.info(f"[SIM] Servo {channel} ({config.name}): {position/4:.1f}µs")
+        else:
+            logger.debug(f"Servo {channel} ({config.name}): {position/4:.1f}µs")
 
     def _send_position_command(self, channel: int, position: int) -> bool:
         """Send position command to specific servo"""
@@ -367,6 +484,14 @@ class PololuMaestroController:
         quarters = config.microseconds_to_quarters(microseconds)
         return self.set_servo_position(channel, quarters)
 
+    def move_servos_microseconds(self, targets: Dict[int, float]) -> Dict[int, bool]:
+        """Move several servos to positions in microseconds with one serial write"""
+        quarters = {channel: self.servo_configs[channel].microseconds_to_quarters(microseconds)
+                    for channel, microseconds in targets.items() if channel in self.servo_configs}
+        results = {channel: False for channel in targets}
+        results.update(self.set_servo_positions(quarters))
+        return results
+
     def move_servo_angle(self, channel: int, angle: float, angle_range: Tuple[float, float] = (0, 180)) -> bool:
         """
         Move servo to angle position
@@ -443,6 +568,9 @@ class PololuMaestroController:
         # Send stop command to all servos
         if not self.simulation_mode:
             try:
+                # An onboard script would keep moving servos
+                self._send_command(MaestroCommand.STOP_SCRIPT.value)
+
                 # Set all targets to current positions to stop movement
                 for channel in range(12):
                     current_pos = self._get_servo_position(channel)
@@ -458,6 +586,37 @@ class PololuMaestroController:
         self.emergency_stop_active = False
         logger.info("✅ Emergency stop cleared - Resuming normal operation")
 
+    def restart_script_at_subroutine(self, subroutine: int, parameter: Optional[int] = None) -> bool:
+        """
+        Run a subroutine of the onboard script (2 bytes, 4 with a parameter)
+
+        Args:
+            subroutine: Subroutine number (0-127)
+            parameter: Optional 14-bit value pushed on the script stack
+        """
+        if self.emergency_stop_active:
+            logger.warning("Emergency stop active - script not started")
+            return False
+
+        if parameter is None:
+            self._send_command(MaestroCommand.RESTART_SCRIPT_AT_SUBROUTINE.value, subroutine & 0x7F)
+        else:
+            self._send_command(MaestroCommand.RESTART_SCRIPT_AT_SUBROUTINE_WITH_PARAMETER.value,
+                               subroutine & 0x7F, parameter & 0x7F, (parameter >> 7) & 0x7F)
+        return True
+
+    def stop_script(self):
+        """Stop the onboard script"""
+        self._send_command(MaestroCommand.STOP_SCRIPT.value)
+
+    def is_script_running(self) -> bool:
+        """Whether the onboard script is running"""
+        if self.simulation_mode:
+            return False
+
+        response = self._send_command(MaestroCommand.GET_SCRIPT_STATUS.value)
+        return len(response) == 1 and response[0] == 0
+
     def get_error_status(self) -> int:
         """Get error status from Maestro controller"""
         if self.simulation_mode:
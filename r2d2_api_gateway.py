@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+R2D2 API Gateway
+================
+
+One ASGI process serving the servo, WCB and vision control APIs.
+
+The control surface grew as separate servers: Flask apps for the servo
+REST APIs and the dashboard integration, the FastAPI WCB dashboard API,
+and standalone `websockets` servers, each on its own port with its own
+thread and event loop (and often its own hardware driver). The gateway
+mounts them on a single event loop instead:
+
+- Flask apps are mounted under a path prefix through a WSGI adapter
+  (requests run on the ASGI server's worker threads)
+- FastAPI/Starlette apps are mounted as-is, their lifespans run with the
+  gateway's
+- WebSocket handlers written for the `websockets` library are served as
+  ASGI WebSocket routes; GatewayWebSocket gives them the connection API
+  they already use (send, recv, async iteration, close, remote_address)
+
+Everything shares one ServoBackendCore (one Maestro driver), the process
+metrics registry (/metrics, /api/metrics) and the token store of
+r2d2_auth_module, which guards the WebSocket routes, the Flask control
+mounts, the metrics endpoints and /gateway/status.
+
+Routes built by create_gateway():
+    /servo/...          Servo REST API (servo_rest_api)
+    /dashboard/...      Servo dashboard integration REST API
+    /ws/servo           Servo WebSocket (state snapshots and deltas)
+    /ws/dashboard       Servo dashboard integration WebSocket
+    /ws/vision[/...]    Vision stream and /ws/vision/detections (when a vision system is given)
+    /gateway/status     Mounts, WebSocket clients, threads
+    /api/wcb/...        WCB dashboard API (mounted at the root)
+
+Features:
+- Flask (WSGI) and FastAPI (ASGI) apps under one server
+- `websockets`-style handlers on ASGI WebSocket routes, sub-paths preserved
+- Combined startup/shutdown of mounted apps, services and background tasks
+- Token check on WebSocket connect (Authorization header or ?token=)
+- Bearer token check on every HTTP request to the Flask mounts, the
+  metrics endpoints and /gateway/status (the WCB mount checks its own)
+- Connection metrics per WebSocket route
+
+Usage:
+    gateway = create_gateway(simulation_mode=True)
+    gateway.run(host='0.0.0.0', port=8000)
+
+    # Or assemble by hand
+    gateway = APIGateway()
+    gateway.mount_wsgi('/servo', rest_api.app)
+    gateway.add_websocket('/ws/servo', handler.handle_client)
+    gateway.on_startup(lambda: core.start_services(serve_websocket=False))
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+import warnings
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Request, WebSocket
+from fastapi.responses import JSONResponse
+from starlette.routing import Mount
+from starlette.websockets import WebSocketDisconnect
+
+from r2d2_auth_module import auth_manager, validate_api_token, validate_websocket_token
+from r2d2_metrics import MetricsRegistry, add_fastapi_metrics_routes, get_registry
+
+# Prefer a2wsgi, Starlette's WSGI adapter is deprecated but still ships
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        from starlette.middleware.wsgi import WSGIMiddleware
+
+try:
+    from websockets.exceptions import ConnectionClosed
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    ConnectionClosed = ConnectionError
+    WEBSOCKETS_AVAILABLE = False
+
+try:
+    import uvicorn
+    UVICORN_AVAILABLE = True
+except ImportError:
+    UVICORN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GATEWAY_PORT = 8000
+POLICY_VIOLATION = 1008     # WebSocket close code for rejected credentials
+
+
+def _connection_closed() -> Exception:
+    """The exception `websockets` raises on a closed connection (handlers already catch it)"""
+    if WEBSOCKETS_AVAILABLE:
+        return ConnectionClosed(None, None)
+    return ConnectionError("WebSocket connection closed")
+
+
+# ==========================================
+# WEBSOCKET ADAPTER
+# ==========================================
+
+class GatewayWebSocket:
+    """
+    `websockets`-style connection over an ASGI WebSocket
+
+    Supports the parts of the websockets connection API the R2D2 handlers
+    use: send(), recv(), `async for message in websocket`, close(),
+    remote_address, request_headers and path.
+    """
+
+    def __init__(self, websocket: WebSocket, path: str = '/'):
+        self._websocket = websocket
+        client = websocket.client
+        self.remote_address = (client.host, client.port) if client else ('unknown', 0)
+        self.request_headers = websocket.headers
+        self.path = path                # Relative to the route, as the handler's own server saw it
+        self.closed = False
+        self.messages_received = 0
+        self.messages_sent = 0
+
+    async def recv(self):
+        if self.closed:
+            raise _connection_closed()
+        message = await self._websocket.receive()
+        if message['type'] == 'websocket.disconnect':
+            self.closed = True
+            raise _connection_closed()
+        self.messages_received += 1
+        text = message.get('text')
+        return text if text is not None else message.get('bytes')
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.recv()
+        except (ConnectionClosed, WebSocketDisconnect):
+            raise StopAsyncIteration
+
+    async def send(self, message):
+        if self.closed:
+            raise _connection_closed()
+        try:
+            if isinstance(message, (bytes, bytearray)):
+                await self._websocket.send_bytes(bytes(message))
+            else:
+                await self._websocket.send_text(message)
+            self.messages_sent += 1
+        except (WebSocketDisconnect, RuntimeError, OSError) as e:
+            self.closed = True
+            raise _connection_closed() from e
+
+    async def close(self, code: int = 1000, reason: str = ''):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._websocket.close(code=code, reason=reason)
+        except (RuntimeError, OSError):
+            pass            # Client already gone
+
+
+# ==========================================
+# HTTP AUTHENTICATION
+# ==========================================
+
+class TokenGuard:
+    """
+    ASGI wrapper rejecting HTTP requests without a valid API token
+
+    Every request except CORS preflights needs `Authorization: Bearer <token>`;
+    anything else gets a 401 before the wrapped app sees it. WebSocket and
+    lifespan messages pass through (WebSocket routes check their own token).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] != 'OPTIONS' and not _http_authorized(scope):
+            logger.warning(f"Unauthorized {scope['method']} {scope.get('root_path', '')}{scope['path']} "
+                           f"from {scope.get('client')}")
+            response = JSONResponse({'error': 'Unauthorized'}, status_code=401,
+                                    headers={'WWW-Authenticate': 'Bearer'})
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def _http_authorized(scope) -> bool:
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            return validate_api_token(value.decode('latin-1'))
+    return False
+
+
+async def verify_request_token(request: Request):
+    """FastAPI dependency: 401 unless the request carries a valid bearer token"""
+    if not validate_api_token(request.headers.get('Authorization')):
+        raise HTTPException(status_code=401, detail="Invalid or missing authentication token",
+                            headers={'WWW-Authenticate': 'Bearer'})
+
+
+# ==========================================
+# GATEWAY
+# ==========================================
+
+class APIGateway:
+    """Single ASGI application hosting the R2D2 control APIs"""
+
+    def __init__(self, title: str = "R2D2 Control Gateway", require_websocket_auth: bool = True,
+                 registry: Optional[MetricsRegistry] = None, require_http_auth: bool = True):
+        """
+        Args:
+            title: OpenAPI title of the gateway app
+            require_websocket_auth: Reject WebSocket connects without a valid API token
+            registry: Metrics registry exposed at /metrics (default: the process registry)
+            require_http_auth: Reject HTTP requests to the Flask mounts, the metrics
+                               endpoints and /gateway/status without a valid API token
+        """
+        self.require_websocket_auth = require_websocket_auth
+        self.require_http_auth = require_http_auth
+        self.registry = registry or get_registry()
+        self.mounts: Dict[str, str] = {}                # path -> 'wsgi' | 'asgi'
+        self.websocket_routes: Dict[str, int] = {}      # path -> open connections
+        self.services: Dict[str, Any] = {}              # Shared backends, by name
+        self._lifespan_apps: List[Any] = []
+        self._startup: List[Callable[[], Any]] = []
+        self._shutdown: List[Callable[[], Any]] = []
+        self._background: List[Callable[[], Awaitable]] = []
+        self._tasks: List[asyncio.Task] = []
+        self.started_at: Optional[float] = None
+
+        self._ws_clients = self.registry.gauge(
+            'gateway_websocket_clients', 'Open WebSocket connections through the API gateway', ['route'])
+        self._ws_connects = self.registry.counter(
+            'gateway_websocket_connects_total', 'WebSocket connection attempts through the API gateway',
+            ['route', 'result'])
+
+        self.app = FastAPI(title=title, lifespan=self._lifespan)
+        guarded = [Depends(verify_request_token)] if require_http_auth else []
+        add_fastapi_metrics_routes(self.app, self.registry, dependencies=guarded)
+        self.app.add_api_route('/gateway/status', self.get_status, methods=['GET'], tags=["System"],
+                               dependencies=guarded)
+
+    # ------------------------------------------
+    # Mounting
+    # ------------------------------------------
+
+    def mount_wsgi(self, path: str, wsgi_app):
+        """Mount a Flask (WSGI) app under a path prefix ('' for the root), behind the token check"""
+        app = WSGIMiddleware(wsgi_app)
+        self.app.mount(path, TokenGuard(app) if self.require_http_auth else app)
+        self.mounts[path or '/'] = 'wsgi'
+        self._keep_root_mounts_last()
+
+    def mount_asgi(self, path: str, asgi_app):
+        """Mount a FastAPI/Starlette app under a path prefix ('' for the root); its lifespan runs with the gateway"""
+        self.app.mount(path, asgi_app)
+        self.mounts[path or '/'] = 'asgi'
+        router = getattr(asgi_app, 'router', None)
+        if router is not None and getattr(router, 'lifespan_context', None) is not None:
+            self._lifespan_apps.append(asgi_app)
+        self._keep_root_mounts_last()
+
+    def add_websocket(self, path: str, handler: Callable[..., Awaitable]):
+        """
+        Serve a `websockets`-style handler at path
+
+        The handler receives a GatewayWebSocket (and the sub-path below the
+        route if it takes a second argument), so /ws/vision/detections
+        reaches a handler mounted at /ws/vision as '/detections'.
+
+        Args:
+            path: Route prefix (e.g. '/ws/servo')
+            handler: handler(websocket) or handler(websocket, path)
+        """
+        takes_path = len(inspect.signature(handler).parameters) >= 2
+        clients = self._ws_clients.labels(path)
+        accepted = self._ws_connects.labels(path, 'accepted')
+        rejected = self._ws_connects.labels(path, 'rejected')
+        self.websocket_routes[path] = 0
+
+        async def endpoint(websocket: WebSocket, subpath: str = ''):
+            if self.require_websocket_auth and not self._authorized(websocket):
+                logger.warning(f"Unauthorized WebSocket connection to {path} from {websocket.client}")
+                rejected.inc()
+                await websocket.close(code=POLICY_VIOLATION)
+                return
+
+            await websocket.accept()
+            accepted.inc()
+            connection = GatewayWebSocket(websocket, subpath or '/')
+            self.websocket_routes[path] += 1
+            clients.inc()
+            try:
+                if takes_path:
+                    await handler(connection, connection.path)
+                else:
+                    await handler(connection)
+            except Exception as e:
+                logger.error(f"WebSocket handler error on {path}: {e}")
+            finally:
+                self.websocket_routes[path] -= 1
+                clients.dec()
+                await connection.close()
+
+        self.app.add_api_websocket_route(path.rstrip('/') + '{subpath:path}', endpoint)
+        self._keep_root_mounts_last()
+
+    def _keep_root_mounts_last(self):
+        # A root mount matches every path, so it has to stay behind the other routes
+        self.app.router.routes.sort(key=lambda route: isinstance(route, Mount) and route.path == '')
+
+    @staticmethod
+    def _authorized(websocket: WebSocket) -> bool:
+        # Browsers cannot set headers on WebSocket requests, so ?token= is accepted too
+        if validate_websocket_token(websocket.headers):
+            return True
+        return auth_manager.validate_token(websocket.query_params.get('token'))
+
+    # ------------------------------------------
+    # Lifecycle
+    # ------------------------------------------
+
+    def on_startup(self, hook: Callable[[], Any]):
+        """Run a (sync or async) callable after the mounted apps have started"""
+        self._startup.append(hook)
+
+    def on_shutdown(self, hook: Callable[[], Any]):
+        """Run a (sync or async) callable at shutdown, in reverse registration order"""
+        self._shutdown.append(hook)
+
+    def add_background(self, coroutine_factory: Callable[[], Awaitable]):
+        """Run a coroutine as a task on the gateway loop, cancelled at shutdown"""
+        self._background.append(coroutine_factory)
+
+    @staticmethod
+    async def _call(hook: Callable[[], Any]):
+        result = hook()
+        if inspect.isawaitable(result):
+            await result
+
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        async with AsyncExitStack() as stack:
+            for sub_app in self._lifespan_apps:
+                await stack.enter_async_context(sub_app.router.lifespan_context(sub_app))
+            for hook in self._startup:
+                await self._call(hook)
+            self._tasks = [asyncio.create_task(factory()) for factory in self._background]
+            self.started_at = time.time()
+            logger.info(f"API gateway started: {len(self.mounts)} mounts, "
+                        f"{len(self.websocket_routes)} WebSocket routes")
+
+            try:
+                yield
+            finally:
+                for task in self._tasks:
+                    task.cancel()
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+                self._tasks = []
+                for hook in reversed(self._shutdown):
+                    try:
+                        await self._call(hook)
+                    except Exception as e:
+                        logger.error(f"API gateway shutdown hook failed: {e}")
+                self.started_at = None
+                logger.info("API gateway stopped")
+
+    def run(self, host: str = '0.0.0.0', port: int = DEFAULT_GATEWAY_PORT):
+        """Serve the gateway with uvicorn"""
+        if not UVICORN_AVAILABLE:
+            raise RuntimeError("uvicorn is required to run the API gateway (pip install uvicorn)")
+        logger.info(f"Starting R2D2 API gateway on {host}:{port}")
+        uvicorn.run(self.app, host=host, port=port)
+
+    async def get_status(self) -> Dict[str, Any]:
+        return {
+            'running': self.started_at is not None,
+            'uptime_seconds': time.time() - self.started_at if self.started_at else 0.0,
+            'mounts': dict(self.mounts),
+            'websocket_clients': dict(self.websocket_routes),
+            'background_tasks': sum(1 for task in self._tasks if not task.done()),
+            'threads': threading.active_count(),
+            'websocket_auth': self.require_websocket_auth,
+            'http_auth': self.require_http_auth
+        }
+
+
+# ==========================================
+# R2D2 COMPOSITION
+# ==========================================
+
+def create_gateway(simulation_mode: bool = True, include_dashboard: bool = True, include_wcb: bool = True,
+                   vision=None, require_websocket_auth: bool = True,
+                   require_http_auth: bool = True) -> APIGateway:
+    """
+    Gateway with the R2D2 control APIs sharing one servo backend
+
+    Args:
+        simulation_mode: Run the servo backend without hardware
+        include_dashboard: Host the servo dashboard integration (REST and WebSocket)
+        include_wcb: Mount the WCB dashboard API at the root
+        vision: Optional OrinNanoProductionVision; its threads start with the
+                gateway and its WebSocket is served at /ws/vision
+        require_websocket_auth: Reject WebSocket connects without a valid API token
+        require_http_auth: Reject REST requests to /servo, /dashboard, the metrics
+                           endpoints and /gateway/status without a valid API token
+    """
+    from servo_backend_core import ServoBackendCore
+    from servo_rest_api import ServoRESTAPI
+
+    gateway = APIGateway(require_websocket_auth=require_websocket_auth, require_http_auth=require_http_auth)
+
+    # One servo backend (one Maestro driver) behind the REST API and the servo WebSocket
+    core = ServoBackendCore(simulation_mode=simulation_mode)
+    gateway.services['servo_core'] = core
+    gateway.mount_wsgi('/servo', ServoRESTAPI(core).app)
+    gateway.add_websocket('/ws/servo', core.websocket_handler.handle_client)
+    gateway.on_startup(lambda: core.start_services(serve_websocket=False))
+    gateway.on_shutdown(core.stop_services)
+
+    if include_dashboard:
+        from maestro_enhanced_controller import EnhancedMaestroController
+        from servo_dashboard_integration import ServoDashboardIntegration
+
+        integration = ServoDashboardIntegration(auto_detect_hardware=not simulation_mode,
+                                                simulation_mode=simulation_mode)
+        shared = core.controller if isinstance(core.controller, EnhancedMaestroController) else None
+        gateway.services['dashboard'] = integration
+        gateway.mount_wsgi('/dashboard', integration.flask_app)
+        gateway.add_websocket('/ws/dashboard', integration.handle_client)
+        gateway.on_startup(lambda: integration.attach(shared))
+        gateway.on_shutdown(integration.shutdown)
+
+    if vision is not None:
+        gateway.services['vision'] = vision
+        gateway.add_websocket('/ws/vision', vision.handle_client)
+        gateway.on_startup(lambda: asyncio.to_thread(vision.start, False))
+        gateway.on_shutdown(lambda: asyncio.to_thread(vision.stop))
+
+    if include_wcb:
+        import wcb_dashboard_api
+        gateway.mount_asgi('', wcb_dashboard_api.app)
+
+    return gateway
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="R2D2 API Gateway")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=DEFAULT_GATEWAY_PORT)
+    parser.add_argument('--hardware', action='store_true', help="Use the Maestro hardware (default: simulation)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    create_gateway(simulation_mode=not args.hardware).run(host=args.host, port=args.port)
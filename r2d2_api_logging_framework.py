@@ -36,6 +36,8 @@ from collections import defaultdict, deque
 # Import our logging framework
 sys.path.append('/home/rolo/r2ai')
 from r2d2_logging_framework import R2D2LoggerFactory
+from r2d2_rate_limiter import RateLimiter, RateLimit
+from r2d2_metrics import MetricsRegistry, get_registry
 
 @dataclass
 class APIRequest:
@@ -80,8 +82,20 @@ class APILoggingMiddleware:
     Comprehensive API logging middleware for Flask and other frameworks
     """
 
-    def __init__(self, service_name: str = "api_server", enable_security_monitoring: bool = True):
-        """Initialize the API logging middleware"""
+    def __init__(self, service_name: str = "api_server", enable_security_monitoring: bool = True,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 registry: Optional[MetricsRegistry] = None):
+        """
+        Initialize the API logging middleware
+
+        Args:
+            service_name: Service name for log files
+            enable_security_monitoring: Enable security event detection
+            rate_limiter: Limiter used for abuse detection (defaults to 100
+                requests per minute per client, monitoring only)
+            registry: Metrics registry for endpoint metrics (defaults to the
+                process registry)
+        """
         self.service_name = service_name
         self.enable_security_monitoring = enable_security_monitoring
 
@@ -101,20 +115,16 @@ class APILoggingMiddleware:
         self.request_history = deque(maxlen=1000)  # Recent requests
         self.security_events = deque(maxlen=500)   # Security events
 
-        # Performance metrics
-        self.endpoint_metrics = defaultdict(lambda: {
-            "total_requests": 0,
-            "total_time": 0.0,
-            "error_count": 0,
-            "success_count": 0,
-            "min_time": float('inf'),
-            "max_time": 0.0,
-            "status_codes": defaultdict(int)
-        })
+        # Performance metrics (labeled by service so several middlewares can
+        # share one registry)
+        registry = registry or get_registry()
+        self.request_counter = registry.counter(
+            'api_requests_total', 'API requests completed', ('service', 'endpoint', 'status'))
+        self.request_duration = registry.histogram(
+            'api_request_duration_seconds', 'API request processing time', ('service', 'endpoint'))
 
-        # Rate limiting tracking
-        self.client_requests = defaultdict(lambda: deque(maxlen=100))  # IP -> timestamps
-        self.rate_limit_violations = defaultdict(int)  # IP -> violation count
+        # Rate limiting tracking (O(1) sliding windows, bounded client state)
+        self.rate_limiter = rate_limiter or RateLimiter(default_limit=RateLimit(100, 60.0))
 
         # Thread safety
         self.lock = threading.Lock()
@@ -168,7 +178,6 @@ class APILoggingMiddleware:
 
             # Track client requests for rate limiting
             if self.enable_security_monitoring:
-                self.client_requests[remote_addr].append(timestamp)
                 self._check_rate_limiting(remote_addr, endpoint)
 
         # Log request start
@@ -264,37 +273,33 @@ class APILoggingMiddleware:
 
     def _update_endpoint_metrics(self, endpoint: str, response: APIResponse):
         """Update performance metrics for an endpoint"""
-        metrics = self.endpoint_metrics[endpoint]
+        self.request_counter.labels(self.service_name, endpoint, response.status_code).inc()
+        self.request_duration.labels(self.service_name, endpoint).observe(response.processing_time)
 
-        metrics["total_requests"] += 1
-        metrics["total_time"] += response.processing_time
-        metrics["status_codes"][response.status_code] += 1
+    def _collect_endpoint_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Gather this service's endpoint metrics from the registry"""
+        endpoints: Dict[str, Dict[str, Any]] = {}
+        for (service, endpoint), child in self.request_duration.children():
+            if service == self.service_name and child.count:
+                endpoints[endpoint] = {"timing": child, "status_codes": {}}
 
-        if response.status_code >= 400:
-            metrics["error_count"] += 1
-        else:
-            metrics["success_count"] += 1
-
-        metrics["min_time"] = min(metrics["min_time"], response.processing_time)
-        metrics["max_time"] = max(metrics["max_time"], response.processing_time)
+        for (service, endpoint, status), child in self.request_counter.children():
+            if service == self.service_name and endpoint in endpoints:
+                endpoints[endpoint]["status_codes"][int(status)] = int(child.get())
+        return endpoints
 
     def _check_rate_limiting(self, remote_addr: str, endpoint: str):
         """Check for rate limiting violations"""
-        current_time = time.time()
-        client_requests = self.client_requests[remote_addr]
+        decision = self.rate_limiter.hit(remote_addr, endpoint)
 
-        # Count requests in last minute
-        recent_requests = [t for t in client_requests if current_time - t < 60]
-
-        # Rate limiting thresholds
-        if len(recent_requests) > 100:  # More than 100 requests per minute
-            self.rate_limit_violations[remote_addr] += 1
+        if not decision.allowed:
             self._log_security_event(
                 "rate_limit_violation",
                 "critical",
                 remote_addr,
                 endpoint,
-                f"Rate limit exceeded: {len(recent_requests)} requests in last minute"
+                f"Rate limit exceeded: more than {decision.limit} requests in window "
+                f"(rule: {decision.rule})"
             )
 
     def _check_security_events(self, request: APIRequest, response: APIResponse):
@@ -535,25 +540,30 @@ class APILoggingMiddleware:
                 "total_security_events": len(self.security_events),
                 "recent_security_events": len([e for e in self.security_events
                                              if current_time - e.timestamp < 3600]),  # Last hour
-                "rate_limit_violations": dict(self.rate_limit_violations)
+                "rate_limit_violations": self.rate_limiter.get_violations(),
+                "rate_limiter": self.rate_limiter.get_stats()
             }
         }
 
         # Add endpoint performance data
-        for endpoint, metrics in self.endpoint_metrics.items():
-            if metrics["total_requests"] > 0:
-                avg_time = metrics["total_time"] / metrics["total_requests"]
-                success_rate = (metrics["success_count"] / metrics["total_requests"]) * 100
-
-                summary["endpoint_performance"][endpoint] = {
-                    "total_requests": metrics["total_requests"],
-                    "success_rate_percent": round(success_rate, 2),
-                    "average_response_time_seconds": round(avg_time, 4),
-                    "min_response_time_seconds": round(metrics["min_time"], 4),
-                    "max_response_time_seconds": round(metrics["max_time"], 4),
-                    "error_count": metrics["error_count"],
-                    "status_codes": dict(metrics["status_codes"])
-                }
+        for endpoint, metrics in self._collect_endpoint_metrics().items():
+            timing = metrics["timing"]
+            status_codes = metrics["status_codes"]
+            total_requests = sum(status_codes.values())
+            error_count = sum(count for code, count in status_codes.items() if code >= 400)
+            success_rate = ((total_requests - error_count) / total_requests * 100
+                            if total_requests else 0.0)
+
+            summary["endpoint_performance"][endpoint] = {
+                "total_requests": total_requests,
+                "success_rate_percent": round(success_rate, 2),
+                "average_response_time_seconds": round(timing.mean(), 4),
+                "p95_response_time_seconds": round(timing.percentile(95), 4),
+                "min_response_time_seconds": round(timing.min, 4),
+                "max_response_time_seconds": round(timing.max, 4),
+                "error_count": error_count,
+                "status_codes": status_codes
+            }
 
         return summary
 
@@ -20,6 +20,9 @@ Key Features:
 - Audio-servo synchronization for authentic character expression
 - Queue management for complex audio sequences
 - Real-time audio feedback integration
+- Sounds decoded once at startup (sound bank), no disk I/O at playback
+- Sample-accurate cues on the shared software mixer (no delay threads)
+- Offline sound feature index: durations, loudness normalization gains and onsets
 
 Author: Expert Python Coder
 Target: NVIDIA Orin Nano R2D2 Systems
@@ -33,7 +36,6 @@ import logging
 import threading
 import queue
 import random
-import os
 import sys
 from typing import Dict, List, Optional, Any, Tuple, Callable
 from dataclasses import dataclass, field
@@ -45,6 +47,10 @@ from pathlib import Path
 # Import system components
 sys.path.append('/home/rolo/r2ai')
 from r2d2_canonical_sound_enhancer import R2D2CanonicalSoundEnhancer, R2D2EmotionalContext, R2D2MemorySystem
+from r2d2_event_bus import EventBus, AudioRequested, EmergencyStop
+from r2d2_sound_bank import SoundBank, SoundSample
+from r2d2_audio_mixer import Cue, get_mixer
+from r2d2_sound_index import SoundFeatureIndex
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -123,6 +129,7 @@ class AudioPlaybackSession:
     expected_duration: Optional[float] = None
     actual_duration: Optional[float] = None
     volume_level: float = 1.0
+    cue: Optional[Cue] = None
 
     # Performance tracking
     latency_ms: float = 0.0
@@ -177,16 +184,29 @@ class R2D2AudioIntelligence:
             'audio_fade_duration': 0.1,
             'latency_target_ms': 50.0,
             'personality_adaptation_rate': 0.1,
-            'context_memory_duration': 300.0  # 5 minutes
+            'context_memory_duration': 300.0,  # 5 minutes
+            'loudness_normalization': True  # Apply the index's per-sound gains
         }
 
         # System control
         self.running = False
         self.audio_thread: Optional[threading.Thread] = None
+        self.event_bus: Optional[EventBus] = None
 
         # Initialize pygame mixer for audio playback
         self._initialize_audio_system()
 
+        # Software mixer shared with the performance system (one clock for audio and motion)
+        self.mixer = get_mixer()
+
+        # Offline features (saved ones now, new or changed clips analyzed in the
+        # background), then the decoded library; canonical sounds stay resident
+        self.sound_index = SoundFeatureIndex.open(sound_directory, background=True)
+        self.sound_bank = SoundBank(sound_directory, sample_rate=self.mixer.sample_rate,
+                                    channels=self.mixer.channels,
+                                    pinned=self.sound_enhancer.canonical_mappings)
+        self.sound_bank.scan()
+
         logger.info("R2D2 Audio Intelligence System initialized")
         self._log_system_status()
 
@@ -405,23 +425,58 @@ class R2D2AudioIntelligence:
         )
         self.audio_thread.start()
 
+        if self.event_bus is not None:
+            asyncio.create_task(self._consume_event_bus())
+
         logger.info("Audio Intelligence System running")
 
+    def attach_event_bus(self, bus: EventBus):
+        """Take audio requests from co-located services over the bus"""
+        self.event_bus = bus
+        logger.info(f"Audio intelligence attached to event bus '{bus.name}'")
+
+    async def _consume_event_bus(self):
+        requests = self.event_bus.subscribe(AudioRequested)
+        emergency = self.event_bus.subscribe(EmergencyStop)
+        try:
+            await asyncio.gather(requests.run(self._on_audio_requested),
+                                 emergency.run(lambda event: self.stop_current_audio()))
+        finally:
+            requests.close()
+            emergency.close()
+
+    def _on_audio_requested(self, event: AudioRequested):
+        try:
+            audio_context = R2D2EmotionalContext(event.audio_context)
+        except ValueError:
+            logger.warning(f"Invalid audio context on bus: {event.audio_context}")
+            return
+        self.request_audio_playback(
+            audio_context=audio_context,
+            behavioral_state=event.behavioral_state,
+            priority=event.priority,
+            sync_mode=AudioSyncMode.DELAYED if event.delay_seconds > 0 else AudioSyncMode.IMMEDIATE,
+            delay_seconds=event.delay_seconds,
+            created_time=event.trigger_time
+        )
+
     def _audio_processing_loop(self):
         """Main audio processing loop"""
         logger.info("Audio processing loop started")
 
         while self.running:
             try:
-                # Process audio queue
-                if not self.audio_queue.empty():
-                    priority, timestamp, request = self.audio_queue.get_nowait()
+                # Process audio queue (wakes on a new request, monitors at least at 20Hz)
+                try:
+                    priority, timestamp, request = self.audio_queue.get(timeout=0.05)
 
                     # Check if request is still valid
                     if request.expiry_time is None or time.time() < request.expiry_time:
                         self._process_audio_request(request)
                     else:
                         logger.debug(f"Audio request expired: {request.request_id}")
+                except queue.Empty:
+                    pass
 
                 # Monitor active playback sessions
                 self._monitor_playback_sessions()
@@ -429,10 +484,6 @@ class R2D2AudioIntelligence:
                 # Clean up completed sessions
                 self._cleanup_completed_sessions()
 
-                time.sleep(0.05)  # 20Hz processing
-
-            except queue.Empty:
-                time.sleep(0.1)
             except Exception as e:
                 logger.error(f"Error in audio processing loop: {e}")
                 time.sleep(1.0)
@@ -622,83 +673,87 @@ class R2D2AudioIntelligence:
             sound_file = session.sound_file
             request = session.request
 
-            # Construct full path to sound file
-            sound_path = os.path.join(self.sound_directory, sound_file)
+            # Decoded sample from the sound bank (no disk access for resident sounds)
+            sample = self.sound_bank.get(sound_file)
 
-            if not os.path.exists(sound_path):
-                logger.error(f"Sound file not found: {sound_path}")
+            if sample is None:
+                logger.error(f"Sound not available: {sound_file}")
                 return False
 
+            session.expected_duration = sample.duration
+
             # Handle different sync modes
             if request.sync_mode == AudioSyncMode.IMMEDIATE:
-                return self._play_audio_immediate(session, sound_path)
+                return self._play_audio_immediate(session, sample)
             elif request.sync_mode == AudioSyncMode.DELAYED:
-                return self._play_audio_delayed(session, sound_path)
+                return self._play_audio_delayed(session, sample)
             elif request.sync_mode == AudioSyncMode.SERVO_SYNC:
-                return self._play_audio_servo_sync(session, sound_path)
+                return self._play_audio_servo_sync(session, sample)
             else:
-                return self._play_audio_immediate(session, sound_path)
+                return self._play_audio_immediate(session, sample)
 
         except Exception as e:
             logger.error(f"Error executing audio playback: {e}")
             return False
 
-    def _play_audio_immediate(self, session: AudioPlaybackSession, sound_path: str) -> bool:
-        """Play audio immediately"""
+    def _play_audio_immediate(self, session: AudioPlaybackSession, sample: SoundSample,
+                              at: Optional[float] = None) -> bool:
+        """Play audio immediately (or at a mixer clock time)"""
         try:
-            # Load and play sound using pygame
-            sound = pygame.mixer.Sound(sound_path)
-
-            # Apply volume
-            sound.set_volume(session.request.volume * self.config['default_volume'])
-
-            # Play sound
-            channel = sound.play()
-            if channel:
-                session.state = AudioPlaybackState.PLAYING
-
-                # Estimate duration (pygame doesn't provide direct duration)
-                # This is a rough estimate - in production you might use a library like mutagen
-                session.expected_duration = 2.0  # Default 2 seconds for R2D2 sounds
+            # Cue the decoded PCM on the mixer; the session starts with its first rendered sample
+            gain = session.request.volume * self.config['default_volume']
+            if self.config['loudness_normalization']:
+                gain *= self.sound_index.gain(sample.name)
+            session.cue = self.mixer.schedule(
+                sample, at=at,
+                gain=gain,
+                on_start=lambda cue, mixer_time: self._on_cue_started(session),
+                on_end=lambda cue: self._on_cue_finished(session)
+            )
+            session.state = AudioPlaybackState.PLAYING if at is None else AudioPlaybackState.QUEUED
+            session.expected_duration = sample.duration
 
-                logger.debug(f"Audio playing: {os.path.basename(sound_path)}")
-                return True
-            else:
-                logger.error(f"Failed to get audio channel for: {sound_path}")
-                return False
+            logger.debug(f"Audio cued: {sample.name} ({sample.duration:.2f}s)")
+            return True
 
-        except pygame.error as e:
-            logger.error(f"Pygame audio error: {e}")
+        except ValueError as e:
+            logger.error(f"Audio format error: {e}")
             return False
         except Exception as e:
             logger.error(f"Error playing audio immediately: {e}")
             return False
 
-    def _play_audio_delayed(self, session: AudioPlaybackSession, sound_path: str) -> bool:
-        """Play audio with specified delay"""
-        try:
-            # Schedule delayed playback
-            def delayed_playback():
-                time.sleep(session.request.delay_seconds)
-                self._play_audio_immediate(session, sound_path)
+    def _on_cue_started(self, session: AudioPlaybackSession):
+        """Mixer callback: the first sample of the session's sound was rendered"""
+        session.state = AudioPlaybackState.PLAYING
+        session.start_time = time.time()
+        request = session.request
+        if self.event_bus is not None and request.sync_mode != AudioSyncMode.DELAYED:
+            self.event_bus.record_action(session.sound_file, request.created_time, 'audio', source='audio')
 
-            delay_thread = threading.Thread(target=delayed_playback, daemon=True)
-            delay_thread.start()
+    def _on_cue_finished(self, session: AudioPlaybackSession):
+        """Mixer callback: the session's sound has been fully rendered"""
+        session.actual_duration = time.time() - session.start_time
 
-            session.state = AudioPlaybackState.QUEUED
-            return True
+    def _play_audio_delayed(self, session: AudioPlaybackSession, sample: SoundSample) -> bool:
+        """Play audio with specified delay"""
+        try:
+            # Cue at an exact sample of the mixer clock instead of sleeping in a thread
+            at = self.mixer.clock.time() + session.request.delay_seconds
+            return self._play_audio_immediate(session, sample, at=at)
 
         except Exception as e:
             logger.error(f"Error scheduling delayed audio: {e}")
             return False
 
-    def _play_audio_servo_sync(self, session: AudioPlaybackSession, sound_path: str) -> bool:
+    def _play_audio_servo_sync(self, session: AudioPlaybackSession, sample: SoundSample) -> bool:
         """Play audio synchronized with servo movement"""
         try:
-            # For servo sync, we queue the audio and let the behavioral system trigger it
-            # This would integrate with the servo choreographer
+            # For servo sync, we queue the audio and let the behavioral system trigger it;
+            # the real duration lets the choreographer fit the movement to the sound
             session.state = AudioPlaybackState.QUEUED
-            logger.debug(f"Audio queued for servo sync: {os.path.basename(sound_path)}")
+            session.expected_duration = sample.duration
+            logger.debug(f"Audio queued for servo sync: {sample.name} ({sample.duration:.2f}s)")
             return True
 
         except Exception as e:
@@ -858,10 +913,23 @@ class R2D2AudioIntelligence:
         except Exception as e:
             logger.error(f"Error adapting personality mode: {e}")
 
+    def get_sound_duration(self, sound_file: str) -> Optional[float]:
+        """Real duration of a sound in seconds (for servo choreography timing)"""
+        duration = self.sound_index.duration(sound_file)
+        return duration if duration is not None else self.sound_bank.duration(sound_file)
+
+    def get_sound_onsets(self, sound_file: str) -> List[float]:
+        """Onset times of a sound in seconds (to land servo moves on its chirps)"""
+        return self.sound_index.onsets(sound_file)
+
     def stop_current_audio(self) -> bool:
         """Stop currently playing audio"""
         try:
-            pygame.mixer.stop()
+            for session in list(self.active_sessions.values()):
+                if session.cue is not None:
+                    self.mixer.cancel(session.cue)
+                if session.state in (AudioPlaybackState.PLAYING, AudioPlaybackState.QUEUED):
+                    session.state = AudioPlaybackState.IDLE
 
             if self.current_session:
                 self.current_session.state = AudioPlaybackState.IDLE
@@ -904,8 +972,11 @@ class R2D2AudioIntelligence:
             'performance_metrics': dict(self.performance_metrics),
             'sound_library': {
                 'total_sounds': len(self.sound_enhancer.canonical_mappings) if self.sound_enhancer else 0,
-                'contexts_available': len(self.sound_enhancer.emotional_context_groups) if self.sound_enhancer else 0
-            }
+                'contexts_available': len(self.sound_enhancer.emotional_context_groups) if self.sound_enhancer else 0,
+                'sound_bank': self.sound_bank.get_status() if hasattr(self, 'sound_bank') else None,
+                'sound_index': self.sound_index.get_status() if hasattr(self, 'sound_index') else None
+            },
+            'mixer': self.mixer.get_status() if hasattr(self, 'mixer') else None
         }
 
     def _log_system_status(self):
@@ -927,12 +998,9 @@ class R2D2AudioIntelligence:
 
         self.running = False
 
-        # Stop all audio
+        # Stop all audio (the shared mixer keeps running for other services)
         self.stop_current_audio()
 
-        # Clean up pygame
-        pygame.mixer.quit()
-
         logger.info("Audio Intelligence System stopped")
 
 
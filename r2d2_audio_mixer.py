@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+"""
+R2D2 Audio Mixer
+================
+
+Software mixer with a sample clock shared by audio and motion.
+
+Sounds were played fire-and-forget on pygame.mixer channels, delayed
+sounds waited in a sleeping thread, and performances started each sound
+and servo move from a loop polling time.time(). How far audio and motion
+drifted apart depended on thread wakeups. Here every sound is a cue on
+one mixer: the mixer sums the active voices into fixed-size blocks
+(NumPy, float32), and a cue starts at an exact sample of the output
+stream. The number of frames rendered is the clock (MixerClock). Motion
+threads wait on the same clock (wait_until), so a servo move planned for
+t=1.25s and a sound cued at t=1.25s are tied to the same rendered sample
+rather than to two independent sleeps.
+
+Each cue has its own gain. A cue marked `duck` lowers every other voice
+to `duck_gain` while it plays, ramped over one block so there is no click.
+
+Backends (where rendered blocks go):
+- SoundDeviceBackend: low-latency callback output through sounddevice
+- PygameBackend: streams blocks through one pygame mixer channel
+- NullBackend: headless, paced in real time or free-running
+- WavFileBackend: headless, writes the output to a WAV file
+
+Features:
+- NumPy mixing of any number of voices into block buffers
+- Sample-accurate cue scheduling on the mixer clock
+- Per-cue gain, ducking, start and end callbacks (off the render thread)
+- Cue timelines for audio and motion events on one clock
+- Null and WAV backends for headless testing
+
+Usage:
+    mixer = get_mixer()                       # Process-wide mixer, started
+    cue = mixer.play(sound_bank.get("R2D2_happy-1.mp3"), gain=0.8)
+    mixer.schedule(sample, at=mixer.clock.time() + 0.5, duck=True)
+
+    timeline = CueTimeline()
+    timeline.add_audio(0.0, sample)
+    timeline.add_action(0.25, lambda: servo.move(...))
+    timeline.start(mixer)
+"""
+
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+import wave
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+try:
+    import sounddevice
+    SOUNDDEVICE_AVAILABLE = True
+except (ImportError, OSError):
+    SOUNDDEVICE_AVAILABLE = False
+
+try:
+    import pygame
+    PYGAME_AVAILABLE = True
+except ImportError:
+    PYGAME_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_RATE = 22050
+DEFAULT_CHANNELS = 2
+DEFAULT_BLOCK_SIZE = 256            # Frames (11.6 ms at 22050 Hz)
+DEFAULT_DUCK_GAIN = 0.35
+
+
+# ==========================================
+# CLOCK
+# ==========================================
+
+class MixerClock:
+    """Output-sample clock: seconds of audio rendered since the mixer started"""
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.frames = 0
+        self._wall = time.time()                 # Wall time of the last advance
+        self._condition = threading.Condition()
+        self._stopped = False
+
+    def time(self) -> float:
+        return self.frames / float(self.sample_rate)
+
+    def frame_at(self, seconds: float) -> int:
+        return int(round(seconds * self.sample_rate))
+
+    def from_wall(self, wall_time: float) -> float:
+        """Mixer time corresponding to a wall-clock (time.time()) instant"""
+        return self.time() + (wall_time - self._wall)
+
+    def advance(self, frames: int):
+        with self._condition:
+            self.frames += frames
+            self._wall = time.time()
+            self._condition.notify_all()
+
+    def wait_until(self, seconds: float, timeout: Optional[float] = None) -> bool:
+        """Block until the clock reaches `seconds`; False on timeout or stop"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._stopped or self.time() >= seconds, timeout)
+            return not self._stopped and self.time() >= seconds
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+
+# ==========================================
+# CUES
+# ==========================================
+
+@dataclass
+class Cue:
+    """One scheduled sound on the mixer"""
+    cue_id: int
+    name: str
+    pcm: np.ndarray                              # int16 frames x channels
+    start_frame: int
+    gain: float = 1.0
+    duck: bool = False
+    on_start: Optional[Callable[['Cue', float], Any]] = None
+    on_end: Optional[Callable[['Cue'], Any]] = None
+    position: int = 0
+    started_at: Optional[float] = None           # Mixer time of the first rendered sample
+    ended_at: Optional[float] = None             # Mixer time just after the last rendered sample
+    finished: bool = False
+    cancelled: bool = False
+
+    def __lt__(self, other: 'Cue') -> bool:
+        return (self.start_frame, self.cue_id) < (other.start_frame, other.cue_id)
+
+    @property
+    def active(self) -> bool:
+        return self.started_at is not None and not self.finished
+
+
+# ==========================================
+# MIXER
+# ==========================================
+
+class SoftwareMixer:
+    """Mixes cued voices into fixed-size int16 blocks and keeps the clock"""
+
+    def __init__(self, sample_rate: int = DEFAULT_SAMPLE_RATE, channels: int = DEFAULT_CHANNELS,
+                 block_size: int = DEFAULT_BLOCK_SIZE, backend: Optional['NullBackend'] = None,
+                 duck_gain: float = DEFAULT_DUCK_GAIN, master_gain: float = 1.0):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_size = block_size
+        self.duck_gain = duck_gain
+        self.master_gain = master_gain
+        self.backend = backend
+        self.clock = MixerClock(sample_rate)
+
+        self._pending: List[Cue] = []            # Heap by start frame
+        self._active: List[Cue] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._duck_level = 1.0
+        self._lead = np.zeros((block_size, channels), dtype=np.float32)
+        self._bed = np.zeros((block_size, channels), dtype=np.float32)
+        self._ramp = np.arange(block_size, dtype=np.float32) / block_size
+        self.running = False
+
+        # Cue callbacks run on their own thread, never on the render (audio device) thread
+        self._callbacks: queue.Queue = queue.Queue()
+        self._callback_thread: Optional[threading.Thread] = None
+        self._callback_lock = threading.Lock()
+
+        self.stats = {'blocks': 0, 'cues': 0, 'late_cues': 0, 'cancelled': 0, 'clipped_blocks': 0}
+
+    # Scheduling
+
+    def schedule(self, sample, at: Optional[float] = None, gain: float = 1.0, duck: bool = False,
+                 name: str = '', on_start: Optional[Callable[[Cue, float], Any]] = None,
+                 on_end: Optional[Callable[[Cue], Any]] = None) -> Cue:
+        """
+        Cue a sound
+
+        Args:
+            sample: SoundSample (or int16 frames x channels array) in the mixer's format
+            at: Mixer time to start at (seconds); None starts with the next block
+            gain: Voice gain
+            duck: Lower the other voices while this one plays
+            on_start, on_end: Called on the mixer's callback thread after the
+                              block that starts / ends the cue is rendered
+
+        Returns:
+            The cue (pass to cancel())
+        """
+        pcm = getattr(sample, 'pcm', sample)
+        rate = getattr(sample, 'sample_rate', self.sample_rate)
+        if rate != self.sample_rate or pcm.ndim != 2 or pcm.shape[1] != self.channels:
+            raise ValueError(f"Sound format {rate} Hz x {pcm.shape[1:] or 1} does not match the mixer "
+                             f"({self.sample_rate} Hz x {self.channels})")
+        start_frame = self.clock.frames if at is None else self.clock.frame_at(at)
+        cue = Cue(next(self._ids), name or getattr(sample, 'name', ''), pcm, start_frame,
+                  gain=gain, duck=duck, on_start=on_start, on_end=on_end)
+        if on_start is not None or on_end is not None:
+            self._start_callback_thread()
+        with self._lock:
+            heapq.heappush(self._pending, cue)
+        self.stats['cues'] += 1
+        return cue
+
+    def play(self, sample, gain: float = 1.0, **kwargs) -> Cue:
+        """Cue a sound to start with the next block"""
+        return self.schedule(sample, at=None, gain=gain, **kwargs)
+
+    def cancel(self, cue: Cue):
+        with self._lock:
+            if not cue.finished:
+                cue.cancelled = True
+                cue.finished = True
+                self.stats['cancelled'] += 1
+
+    def stop_all(self):
+        """Cancel every pending and playing cue"""
+        with self._lock:
+            for cue in self._pending + self._active:
+                if not cue.finished:
+                    cue.cancelled = True
+                    cue.finished = True
+                    self.stats['cancelled'] += 1
+            self._pending = []
+            self._active = []
+
+    def is_playing(self, cue: Optional[Cue] = None) -> bool:
+        if cue is not None:
+            return not cue.finished
+        with self._lock:
+            return bool(self._active or self._pending)
+
+    # Rendering
+
+    def render_block(self) -> np.ndarray:
+        """Mix the next block, advance the clock and return int16 frames x channels"""
+        n = self.block_size
+        block_start = self.clock.frames
+        block_end = block_start + n
+        started, ended = [], []
+
+        with self._lock:
+            while self._pending and self._pending[0].start_frame < block_end:
+                cue = heapq.heappop(self._pending)
+                if not cue.cancelled:
+                    self._active.append(cue)
+
+            lead, bed = self._lead, self._bed
+            lead.fill(0.0)
+            bed.fill(0.0)
+            ducking = False
+            still_active = []
+            for cue in self._active:
+                if cue.cancelled:
+                    continue
+                offset = cue.start_frame - block_start
+                if cue.started_at is None:
+                    if offset < 0:
+                        self.stats['late_cues'] += 1
+                        offset = 0
+                    cue.started_at = (block_start + offset) / float(self.sample_rate)
+                    started.append(cue)
+                offset = max(offset, 0)
+                count = min(n - offset, len(cue.pcm) - cue.position)
+                target = lead if cue.duck else bed
+                target[offset:offset + count] += cue.pcm[cue.position:cue.position + count] * (cue.gain / 32768.0)
+                cue.position += count
+                ducking = ducking or cue.duck
+                if cue.position >= len(cue.pcm):
+                    cue.finished = True
+                    cue.ended_at = (block_start + offset + count) / float(self.sample_rate)
+                    ended.append(cue)
+                else:
+                    still_active.append(cue)
+            self._active = still_active
+
+        # Duck the bed under lead voices, ramped across the block
+        level = self.duck_gain if ducking else 1.0
+        if level != self._duck_level or level != 1.0:
+            ramp = self._duck_level + (level - self._duck_level) * self._ramp
+            bed *= ramp[:, None]
+            self._duck_level = level
+        mixed = bed + lead
+        if self.master_gain != 1.0:
+            mixed *= self.master_gain
+        mixed *= 32768.0                          # Unity gain reproduces the input samples
+        if mixed.max(initial=0.0) > 32767.0 or mixed.min(initial=0.0) < -32768.0:
+            self.stats['clipped_blocks'] += 1
+            np.clip(mixed, -32768.0, 32767.0, out=mixed)
+        block = mixed.astype(np.int16)
+
+        self.stats['blocks'] += 1
+        self.clock.advance(n)
+
+        for cue in started:
+            if cue.on_start is not None:
+                self._callbacks.put((cue.on_start, (cue, cue.started_at)))
+        for cue in ended:
+            if cue.on_end is not None:
+                self._callbacks.put((cue.on_end, (cue,)))
+        return block
+
+    # Callbacks
+
+    def _start_callback_thread(self):
+        with self._callback_lock:
+            if self._callback_thread is None or not self._callback_thread.is_alive():
+                self._callback_thread = threading.Thread(target=self._run_callbacks, daemon=True,
+                                                         name="AudioMixerCallbacks")
+                self._callback_thread.start()
+
+    def _run_callbacks(self):
+        while True:
+            item = self._callbacks.get()
+            try:
+                if item is None:
+                    return
+                callback, args = item
+                try:
+                    callback(*args)
+                except Exception as e:
+                    logger.error(f"Mixer cue callback error: {e}")
+            finally:
+                self._callbacks.task_done()
+
+    def wait_callbacks(self):
+        """Block until the callbacks of every block rendered so far have run"""
+        with self._callback_lock:
+            running = self._callback_thread is not None and self._callback_thread.is_alive()
+        if running:
+            self._callbacks.join()
+
+    # Lifecycle
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        if self.backend is None:
+            self.backend = default_backend()
+        self.backend.start(self)
+        logger.info(f"Audio mixer started: {self.sample_rate} Hz x {self.channels}, "
+                    f"{self.block_size}-frame blocks, {type(self.backend).__name__}")
+
+    def stop(self):
+        self.running = False
+        if self.backend is not None:
+            self.backend.stop()
+        self.stop_all()
+        self.clock.stop()
+        with self._callback_lock:
+            thread, self._callback_thread = self._callback_thread, None
+        if thread is not None:
+            self._callbacks.put(None)            # Runs the callbacks already queued, then exits
+            thread.join(timeout=1.0)
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            active, pending = len(self._active), len(self._pending)
+        return {
+            'running': self.running,
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'clock_seconds': self.clock.time(),
+            'block_ms': self.block_size * 1000.0 / self.sample_rate,
+            'active_voices': active,
+            'pending_cues': pending,
+            **self.stats
+        }
+
+
+# ==========================================
+# CUE TIMELINE
+# ==========================================
+
+@dataclass(order=True)
+class TimelineEvent:
+    offset: float
+    order: int
+    sample: Any = field(default=None, compare=False)
+    action: Optional[Callable[[], Any]] = field(default=None, compare=False)
+    gain: float = field(default=1.0, compare=False)
+    duck: bool = field(default=False, compare=False)
+
+
+class CueTimeline:
+    """
+    Audio cues and motion/lighting actions at offsets on the mixer clock
+
+    start() schedules every audio cue on the mixer at once (sample-accurate)
+    and runs the actions from a dispatcher thread that waits on the mixer
+    clock, so both follow the same rendered samples.
+    """
+
+    def __init__(self):
+        self.events: List[TimelineEvent] = []
+        self._order = itertools.count()
+        self._cues: List[Cue] = []
+        self._thread: Optional[threading.Thread] = None
+        self.cancelled = False
+        self.start_time: Optional[float] = None
+
+    def add_audio(self, offset: float, sample, gain: float = 1.0, duck: bool = False):
+        self.events.append(TimelineEvent(offset, next(self._order), sample=sample, gain=gain, duck=duck))
+
+    def add_action(self, offset: float, action: Callable[[], Any]):
+        self.events.append(TimelineEvent(offset, next(self._order), action=action))
+
+    @property
+    def duration(self) -> float:
+        ends = [e.offset + (len(e.sample.pcm) / e.sample.sample_rate if e.sample is not None else 0.0)
+                for e in self.events]
+        return max(ends, default=0.0)
+
+    def start(self, mixer: SoftwareMixer, lead_time: Optional[float] = None) -> float:
+        """
+        Start the timeline on a mixer
+
+        Args:
+            lead_time: Seconds between now and offset 0 (default: two blocks,
+                so the first cue is not late)
+
+        Returns:
+            The mixer time of offset 0
+        """
+        if lead_time is None:
+            lead_time = 2.0 * mixer.block_size / mixer.sample_rate
+        self.start_time = mixer.clock.time() + lead_time
+        events = sorted(self.events)
+        for event in events:
+            if event.sample is not None:
+                self._cues.append(mixer.schedule(event.sample, at=self.start_time + event.offset,
+                                                 gain=event.gain, duck=event.duck))
+        actions = [e for e in events if e.action is not None]
+        self._thread = threading.Thread(target=self._dispatch, args=(mixer.clock, actions),
+                                        daemon=True, name="CueTimeline")
+        self._thread.start()
+        return self.start_time
+
+    def _dispatch(self, clock: MixerClock, actions: List[TimelineEvent]):
+        for event in actions:
+            while not clock.wait_until(self.start_time + event.offset, timeout=0.5):
+                if self.cancelled or clock.stopped:
+                    return
+            if self.cancelled:
+                return
+            try:
+                event.action()
+            except Exception as e:
+                logger.error(f"Timeline action at {event.offset:.3f}s failed: {e}")
+
+    def wait(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def cancel(self, mixer: SoftwareMixer):
+        self.cancelled = True
+        for cue in self._cues:
+            mixer.cancel(cue)
+
+
+# ==========================================
+# BACKENDS
+# ==========================================
+
+class NullBackend:
+    """Headless output: renders blocks on a thread, paced in real time or free-running"""
+
+    def __init__(self, realtime: bool = True):
+        self.realtime = realtime
+        self.mixer: Optional[SoftwareMixer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self, mixer: SoftwareMixer):
+        self.mixer = mixer
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="AudioMixer")
+        self._thread.start()
+
+    def _run(self):
+        block_seconds = self.mixer.block_size / float(self.mixer.sample_rate)
+        deadline = time.perf_counter()
+        while self._running:
+            self.output(self.mixer.render_block())
+            if self.realtime:
+                deadline += block_seconds
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -0.25:
+                    deadline = time.perf_counter()         # Fell behind; don't burst
+
+    def output(self, block: np.ndarray):
+        pass
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+
+class WavFileBackend(NullBackend):
+    """Headless output written to a WAV file"""
+
+    def __init__(self, path: str, realtime: bool = False):
+        super().__init__(realtime)
+        self.path = path
+        self._wav: Optional[wave.Wave_write] = None
+
+    def start(self, mixer: SoftwareMixer):
+        self._wav = wave.open(self.path, 'wb')
+        self._wav.setnchannels(mixer.channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(mixer.sample_rate)
+        super().start(mixer)
+
+    def output(self, block: np.ndarray):
+        self._wav.writeframes(block.astype('<i2').tobytes())
+
+    def stop(self):
+        super().stop()
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class PygameBackend(NullBackend):
+    """Streams blocks through one pygame mixer channel (queued one block ahead)"""
+
+    def __init__(self):
+        if not PYGAME_AVAILABLE:
+            raise RuntimeError("pygame is not available")
+        super().__init__(realtime=False)
+
+    def _run(self):
+        channel = pygame.mixer.Channel(0)
+        poll = self.mixer.block_size / float(self.mixer.sample_rate) / 4.0
+        while self._running:
+            try:
+                if not channel.get_busy():
+                    channel.play(pygame.mixer.Sound(buffer=self.mixer.render_block()))
+                elif channel.get_queue() is None:
+                    channel.queue(pygame.mixer.Sound(buffer=self.mixer.render_block()))
+                else:
+                    time.sleep(poll)
+            except pygame.error as e:
+                logger.error(f"Pygame output error: {e}")
+                time.sleep(0.1)
+
+
+class SoundDeviceBackend:
+    """Low-latency callback output: the device pulls each block from the mixer"""
+
+    def __init__(self, device=None, latency: Union[str, float] = 'low'):
+        if not SOUNDDEVICE_AVAILABLE:
+            raise RuntimeError("sounddevice is not available")
+        self.device = device
+        self.latency = latency
+        self.stream = None
+
+    def start(self, mixer: SoftwareMixer):
+        def callback(outdata, frames, time_info, status):
+            if status:
+                logger.debug(f"Audio output status: {status}")
+            outdata[:] = mixer.render_block()
+
+        self.stream = sounddevice.OutputStream(
+            samplerate=mixer.sample_rate, blocksize=mixer.block_size, channels=mixer.channels,
+            dtype='int16', latency=self.latency, device=self.device, callback=callback)
+        self.stream.start()
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+
+def default_backend():
+    """Best available output: sounddevice, then pygame, then headless"""
+    if SOUNDDEVICE_AVAILABLE:
+        try:
+            sounddevice.query_devices(kind='output')
+            return SoundDeviceBackend()
+        except Exception as e:
+            logger.warning(f"No sounddevice output: {e}")
+    if PYGAME_AVAILABLE and pygame.mixer.get_init() is not None:
+        return PygameBackend()
+    logger.warning("No audio output available - mixing headless")
+    return NullBackend(realtime=True)
+
+
+# ==========================================
+# DEFAULT MIXER
+# ==========================================
+
+_default_mixer: Optional[SoftwareMixer] = None
+_default_mixer_lock = threading.Lock()
+
+
+def get_mixer() -> SoftwareMixer:
+    """The process-wide mixer (started on first use, in the pygame mixer's format if initialized)"""
+    global _default_mixer
+    with _default_mixer_lock:
+        if _default_mixer is None:
+            sample_rate, channels = DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS
+            if PYGAME_AVAILABLE and pygame.mixer.get_init() is not None:
+                sample_rate, _, channels = pygame.mixer.get_init()
+            _default_mixer = SoftwareMixer(sample_rate, channels)
+            _default_mixer.start()
+        return _default_mixer
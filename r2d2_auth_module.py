@@ -7,11 +7,14 @@ Production-ready security implementation with UUID bearer tokens
 import uuid
 import logging
 import os
+import threading
 from functools import wraps
 from typing import Dict, Optional, Callable, Set
 from datetime import datetime, timedelta
 import json
 
+from r2d2_token_cache import TokenValidationCache, hash_token
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,6 +30,12 @@ class AuthManager:
         self.valid_tokens: Dict[str, dict] = {}
         self.revoked_tokens: Set[str] = set()
         self.primary_token: Optional[str] = None
+
+        # Hot-path validation (hashed snapshot + per-thread usage counters)
+        self._digest_to_token: Dict[bytes, str] = {}
+        self._metadata_lock = threading.Lock()
+        self._cache = TokenValidationCache(on_flush=self._apply_usage)
+
         self.load_or_create_initial_tokens()
 
     def load_or_create_initial_tokens(self):
@@ -37,28 +46,28 @@ class AuthManager:
         if existing_token:
             # Use existing token from environment (most important!)
             self.primary_token = existing_token
-            self.valid_tokens[existing_token] = {
+            self._register_token(existing_token, {
                 'created': datetime.now(),
                 'active': True,
                 'source': 'environment',
                 'description': 'Persistent token from R2D2_AUTH_TOKEN',
                 'last_used': None,
                 'use_count': 0
-            }
+            })
             logger.info(f"✅ Using existing R2D2_AUTH_TOKEN from environment: {existing_token[:8]}...")
             print(f"✅ Using existing R2D2_AUTH_TOKEN: {existing_token[:8]}...")
         else:
             # Generate NEW token and store in environment
             self.primary_token = str(uuid.uuid4())
             os.environ['R2D2_AUTH_TOKEN'] = self.primary_token
-            self.valid_tokens[self.primary_token] = {
+            self._register_token(self.primary_token, {
                 'created': datetime.now(),
                 'active': True,
                 'source': 'generated',
                 'description': 'Generated persistent token',
                 'last_used': None,
                 'use_count': 0
-            }
+            })
             logger.info(f"✅ Generated new R2D2_AUTH_TOKEN: {self.primary_token}")
             print(f"✅ Generated new R2D2_AUTH_TOKEN: {self.primary_token}")
             logger.info("="*70)
@@ -70,6 +79,25 @@ class AuthManager:
             logger.warning("SAVE THIS TOKEN - Required for all API/WebSocket requests")
             logger.info("="*70)
 
+    def _register_token(self, token: str, info: dict) -> None:
+        """Store token metadata and publish the token to the validation cache"""
+        with self._metadata_lock:
+            self.valid_tokens[token] = info
+            self._digest_to_token[hash_token(token)] = token
+        self._cache.add(token)
+
+    def _apply_usage(self, digest: bytes, uses: int, last_used: float) -> None:
+        """Merge flushed per-thread usage counters into token metadata"""
+        with self._metadata_lock:
+            token = self._digest_to_token.get(digest)
+            info = self.valid_tokens.get(token) if token else None
+            if info is None:
+                return
+            info['use_count'] += uses
+            last = datetime.fromtimestamp(last_used)
+            if info['last_used'] is None or last > info['last_used']:
+                info['last_used'] = last
+
     def get_primary_token(self) -> str:
         """
         Get the primary token that should be used by all clients
@@ -90,14 +118,14 @@ class AuthManager:
             str: New UUID-based token
         """
         token = str(uuid.uuid4())
-        self.valid_tokens[token] = {
+        self._register_token(token, {
             'created': datetime.now(),
             'active': True,
             'source': 'generated',
             'description': description,
             'last_used': None,
             'use_count': 0
-        }
+        })
         logger.info(f"New token generated: {token[:8]}... ({description})")
         return token
 
@@ -110,32 +138,16 @@ class AuthManager:
 
         Returns:
             bool: True if valid, False otherwise
-        """
-        if not token:
-            logger.warning("Token validation failed: No token provided")
-            return False
 
-        # Check if token is revoked
-        if token in self.revoked_tokens:
-            logger.warning(f"Token validation failed: Token revoked ({token[:8]}...)")
-            return False
-
-        # Check if token exists and is active
-        if token not in self.valid_tokens:
-            logger.warning(f"Token validation failed: Invalid token ({token[:8]}...)")
-            return False
-
-        if not self.valid_tokens[token]['active']:
-            logger.warning(f"Token validation failed: Token inactive ({token[:8]}...)")
-            return False
-
-        # Update usage statistics
-        self.valid_tokens[token]['last_used'] = datetime.now()
-        self.valid_tokens[token]['use_count'] += 1
+        Lock-free: checks the hashed token snapshot in constant time, counts
+        usage per thread (merged into metadata by flush_usage) and logs
+        failures in sampled form.
+        """
+        return self._cache.validate(token)
 
-        # Log validation success (debug level to avoid spam)
-        logger.debug(f"Token validated: {token[:8]}... (uses: {self.valid_tokens[token]['use_count']})")
-        return True
+    def flush_usage(self) -> None:
+        """Merge pending per-thread usage counters into token metadata"""
+        self._cache.flush()
 
     def revoke_token(self, token: str) -> bool:
         """
@@ -148,8 +160,10 @@ class AuthManager:
             bool: True if revoked, False if not found
         """
         if token in self.valid_tokens:
-            self.valid_tokens[token]['active'] = False
-            self.revoked_tokens.add(token)
+            self._cache.revoke(token)
+            with self._metadata_lock:
+                self.valid_tokens[token]['active'] = False
+                self.revoked_tokens.add(token)
             logger.info(f"Token revoked: {token[:8]}...")
             return True
 
@@ -167,6 +181,7 @@ class AuthManager:
             dict: Token information or None if not found
         """
         if token in self.valid_tokens:
+            self.flush_usage()
             info = self.valid_tokens[token].copy()
             # Convert datetime to ISO format
             info['created'] = info['created'].isoformat()
@@ -182,8 +197,9 @@ class AuthManager:
         Returns:
             list: List of active token information (partial tokens for security)
         """
+        self.flush_usage()
         active_tokens = []
-        for token, info in self.valid_tokens.items():
+        for token, info in list(self.valid_tokens.items()):
             if info['active']:
                 active_tokens.append({
                     'token_prefix': token[:8] + '...',
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+R2D2 Behavior Index
+===================
+
+Precomputed trigger index for the behavior libraries.
+
+Selecting a behavior used to scan the whole library and evaluate the
+personality trait weights of every candidate on each trigger. The index
+is built once per library: for every trigger it keeps the candidates
+sorted by priority together with two small (candidates x traits)
+matrices, the minimum trait values a behavior requires (-inf where it has
+no requirement) and the score bonus per required trait. The personality
+is folded into one trait vector, computed once and reused until the
+profile changes, so a trigger costs one comparison, one matrix-vector
+product and a noisy argmax over its own candidates.
+
+Scoring matches the original selection: priority, plus twice the weight of
+each required trait, plus uniform noise in [-1, 1], highest score wins;
+behaviors whose trait requirements are not met are excluded.
+
+Features:
+- Trigger -> candidate arrays built at library load
+- Personality trait vector cached until invalidate() is called
+- Per-trigger eligibility and base scores cached per personality
+- Automatic rebuild when behaviors are added or removed
+
+Usage:
+    index = BehaviorIndex(library.behaviors, list(PersonalityTrait))
+    behavior = index.select(trigger, personality)
+    index.invalidate()        # after the personality profile changes
+"""
+
+import logging
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TRAIT_BONUS = 2.0       # Score per unit of a required trait's weight
+SCORE_NOISE = 1.0       # Uniform noise half-width in the score
+
+
+class BehaviorIndex:
+    """Trigger-indexed candidate matrices with a cached personality vector"""
+
+    def __init__(self, behaviors: Mapping[str, Any], traits: Sequence[Any]):
+        """
+        Args:
+            behaviors: Library behaviors (priority, environmental_triggers,
+                required_traits) by name
+            traits: Personality traits in matrix column order
+        """
+        self.behaviors = behaviors
+        self.traits = list(traits)
+        self._columns = {trait: i for i, trait in enumerate(self.traits)}
+
+        # trigger -> (behaviors, priority (n,), minimum (n x T), bonus (n x T))
+        self._by_trigger: Dict[Any, Tuple[List[Any], np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._size = -1
+
+        # Personality-dependent caches
+        self._personality = None
+        self._weights: Optional[np.ndarray] = None
+        self._scores: Dict[Any, Tuple[np.ndarray, np.ndarray]] = {}
+
+        self.rebuild()
+
+    def rebuild(self):
+        """Rebuild the trigger index from the library"""
+        grouped: Dict[Any, List[Any]] = {}
+        for behavior in self.behaviors.values():
+            for trigger in dict.fromkeys(behavior.environmental_triggers):
+                grouped.setdefault(trigger, []).append(behavior)
+
+        index = {}
+        for trigger, candidates in grouped.items():
+            candidates.sort(key=lambda b: b.priority, reverse=True)
+            minimum = np.full((len(candidates), len(self.traits)), -np.inf)
+            bonus = np.zeros((len(candidates), len(self.traits)))
+            for row, behavior in enumerate(candidates):
+                for trait, min_value in behavior.required_traits.items():
+                    column = self._columns.get(trait)
+                    if column is None:
+                        continue
+                    minimum[row, column] = min_value
+                    bonus[row, column] = TRAIT_BONUS
+            priority = np.array([b.priority for b in candidates], dtype=float)
+            index[trigger] = (candidates, priority, minimum, bonus)
+
+        self._by_trigger = index
+        self._size = len(self.behaviors)
+        self._scores = {}
+        logger.debug(f"Behavior index built: {self._size} behaviors, {len(index)} triggers")
+
+    def invalidate(self):
+        """Drop the cached personality vector (call after the profile changes)"""
+        self._weights = None
+        self._scores = {}
+
+    def candidates(self, trigger) -> List[Any]:
+        """Behaviors listening to a trigger, highest priority first"""
+        self._check_size()
+        entry = self._by_trigger.get(trigger)
+        return list(entry[0]) if entry else []
+
+    def scores(self, trigger, personality) -> Tuple[np.ndarray, np.ndarray]:
+        """(eligible candidate rows, their scores before noise) for a trigger"""
+        self._check_size()
+        weights = self._trait_vector(personality)
+        cached = self._scores.get(trigger)
+        if cached is None:
+            entry = self._by_trigger.get(trigger)
+            if entry is None:
+                cached = (np.empty(0, dtype=np.intp), np.empty(0))
+            else:
+                _, priority, minimum, bonus = entry
+                eligible = np.flatnonzero((weights >= minimum).all(axis=1))
+                cached = (eligible, priority[eligible] + bonus[eligible] @ weights)
+            self._scores[trigger] = cached
+        return cached
+
+    def select(self, trigger, personality) -> Optional[Any]:
+        """Best behavior for a trigger under the personality (with score noise)"""
+        eligible, scores = self.scores(trigger, personality)
+        if not len(eligible):
+            return None
+        noisy = scores + np.random.uniform(-SCORE_NOISE, SCORE_NOISE, len(scores))
+        return self._by_trigger[trigger][0][eligible[int(np.argmax(noisy))]]
+
+    def _trait_vector(self, personality) -> np.ndarray:
+        if self._weights is None or personality is not self._personality:
+            self._personality = personality
+            self._weights = np.array([personality.get_trait_weight(t) for t in self.traits])
+            self._scores = {}
+        return self._weights
+
+    def _check_size(self):
+        if len(self.behaviors) != self._size:
+            self.rebuild()
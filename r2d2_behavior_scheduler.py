@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+R2D2 Behavior Scheduler
+=======================
+
+Priority scheduler for the behavioral intelligence engines.
+
+Triggered behaviors go into a binary heap ordered by priority plus age:
+every pending entry gains `aging_rate` priority per second of waiting, and
+because all entries age at the same rate the order is fixed at insertion
+(key = priority - aging_rate * enqueue time), so the heap never needs to
+be re-sorted. Cooldowns and duplicates are plain dict lookups. The
+scheduler sleeps on an event instead of polling: a submitted behavior is
+started as soon as nothing is running, and a higher-priority behavior asks
+an interruptible running one to yield. The engine decides where yielding
+is safe (the motion choreographers stop at keyframe boundaries), so a
+reaction such as a Sith costume waits at most one keyframe segment behind
+an idle behavior.
+
+The time from the trigger (the vision frame that caused it) to the first
+servo command of the behavior is recorded per trigger in the metrics
+registry as behavior_trigger_to_motion_seconds.
+
+Features:
+- Priority heap with aging (no starvation of low-priority behaviors)
+- O(1) cooldown and pending-duplicate checks
+- Preemption of interruptible behaviors at engine-defined safe points
+- Expiry of entries that waited too long
+- Trigger-to-first-motion and queue-wait latency histograms
+
+Usage:
+    scheduler = BehaviorScheduler(engine._execute_behavior, engine._preempt_behavior)
+    asyncio.create_task(scheduler.run())
+
+    scheduler.submit(behavior, trigger, trigger_time=frame_timestamp)
+    ...
+    scheduler.record_first_motion(entry)      # from the behavior's first servo move
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from r2d2_metrics import MetricsRegistry, get_registry
+
+logger = logging.getLogger(__name__)
+
+# Seconds; reaction targets are tens of milliseconds, idle waits run to seconds
+REACTION_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25,
+                            0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class ScheduledBehavior:
+    """A behavior waiting for, or holding, the character"""
+    behavior: Any                    # BehaviorSequence (name, priority, duration, ...)
+    trigger: Any
+    priority: float
+    trigger_time: float              # When the triggering input was observed
+    enqueued_at: float
+    sequence_id: str = ''            # Motion sequence id while running
+    started_at: Optional[float] = None
+    first_motion_at: Optional[float] = None
+    cancelled: bool = False          # Superseded or cleared while pending
+    preempt_requested: bool = False
+    preempted_by: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self.behavior.name
+
+    @property
+    def reaction_latency(self) -> Optional[float]:
+        """Seconds from trigger to the first servo command"""
+        if self.first_motion_at is None:
+            return None
+        return self.first_motion_at - self.trigger_time
+
+
+class BehaviorScheduler:
+    """Priority heap scheduler with cooldowns, de-duplication and preemption"""
+
+    def __init__(self, execute: Callable[[ScheduledBehavior], Awaitable[Any]],
+                 preempt: Optional[Callable[[ScheduledBehavior], Any]] = None,
+                 max_age: float = 30.0, aging_rate: float = 0.1,
+                 allow_preemption: bool = True,
+                 registry: Optional[MetricsRegistry] = None, name: str = 'behavior'):
+        """
+        Args:
+            execute: Coroutine function running one behavior to completion
+            preempt: Asks a running behavior to yield at its next safe point
+            max_age: Seconds a pending behavior stays valid
+            aging_rate: Priority gained per second of waiting
+            allow_preemption: Whether higher priorities interrupt running behaviors
+        """
+        self.execute = execute
+        self.preempt = preempt
+        self.max_age = max_age
+        self.aging_rate = aging_rate
+        self.allow_preemption = allow_preemption
+        self.name = name
+
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._pending: Dict[str, ScheduledBehavior] = {}       # name -> live heap entry
+        self._cooldown_until: Dict[str, float] = {}            # name -> earliest next start
+        self.current: Optional[ScheduledBehavior] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.running = False
+
+        self.reaction_latencies = deque(maxlen=256)            # Recent, for status
+        self.on_first_motion: Optional[Callable[[ScheduledBehavior], Any]] = None
+        self.stats = {'submitted': 0, 'started': 0, 'completed': 0, 'preempted': 0,
+                      'deduplicated': 0, 'cooling_down': 0, 'expired': 0}
+
+        registry = registry or get_registry()
+        self._reaction = registry.histogram(
+            'behavior_trigger_to_motion_seconds', 'Trigger to first servo command of a behavior',
+            ('scheduler', 'trigger'), buckets=REACTION_LATENCY_BUCKETS)
+        self._queue_wait = registry.histogram(
+            'behavior_queue_wait_seconds', 'Trigger to behavior start',
+            ('scheduler',), buckets=REACTION_LATENCY_BUCKETS).labels(name)
+        self._preemptions = registry.counter(
+            'behavior_preemptions_total', 'Running behaviors preempted', ('scheduler',)).labels(name)
+        registry.gauge('behavior_queue_depth', 'Pending behaviors', ('scheduler',)) \
+            .labels(name).set_function(lambda: len(self._pending))
+
+    # Submission
+
+    def submit(self, behavior, trigger, trigger_time: Optional[float] = None,
+               priority: Optional[float] = None) -> Optional[ScheduledBehavior]:
+        """
+        Queue a behavior (call from the event loop thread)
+
+        Returns:
+            The pending entry, or None when cooling down, already running, or
+            already pending with at least this priority
+        """
+        now = time.time()
+        name = behavior.name
+        priority = behavior.priority if priority is None else priority
+        self.stats['submitted'] += 1
+
+        if self._cooldown_until.get(name, 0.0) > now:
+            self.stats['cooling_down'] += 1
+            return None
+        if self.current is not None and self.current.name == name and not self.current.preempt_requested:
+            self.stats['deduplicated'] += 1
+            return None
+        existing = self._pending.get(name)
+        if existing is not None:
+            if existing.priority >= priority:
+                self.stats['deduplicated'] += 1
+                return None
+            existing.cancelled = True      # Lazy deletion: skipped when popped
+
+        entry = ScheduledBehavior(behavior, trigger, priority,
+                                  trigger_time if trigger_time is not None else now, now)
+        heapq.heappush(self._heap, (self.aging_rate * now - priority, next(self._sequence), entry))
+        self._pending[name] = entry
+        logger.info(f"Queued behavior: {name} (priority: {priority})")
+
+        self._maybe_preempt(entry)
+        if self._wake is not None:
+            self._wake.set()
+        return entry
+
+    def is_cooling_down(self, name: str) -> bool:
+        return self._cooldown_until.get(name, 0.0) > time.time()
+
+    def record_first_motion(self, entry: ScheduledBehavior):
+        """Mark the first servo command of a running behavior"""
+        if entry.first_motion_at is not None:
+            return
+        entry.first_motion_at = time.time()
+        trigger = getattr(entry.trigger, 'value', str(entry.trigger))
+        self._reaction.labels(self.name, trigger).observe(entry.reaction_latency)
+        self.reaction_latencies.append(entry.reaction_latency)
+        if self.on_first_motion is not None:
+            try:
+                self.on_first_motion(entry)
+            except Exception as e:
+                logger.error(f"First-motion listener failed for {entry.name}: {e}")
+
+    def clear(self, preempt_running: bool = True):
+        """Drop every pending behavior (emergency stop)"""
+        for entry in self._pending.values():
+            entry.cancelled = True
+        self._pending.clear()
+        self._heap.clear()
+        if preempt_running and self.current is not None:
+            self._request_preemption(self.current, 'clear')
+
+    # Scheduling loop
+
+    async def run(self):
+        """Start behaviors as they become runnable until stop() is called"""
+        self.running = True
+        self._wake = asyncio.Event()
+        logger.info(f"Behavior scheduler '{self.name}' started")
+        try:
+            while self.running:
+                self._wake.clear()
+                if self.current is None:
+                    entry = self._pop()
+                    if entry is not None:
+                        self._start(entry)
+                        continue
+                await self._wake.wait()
+        finally:
+            if self._task is not None and not self._task.done():
+                self._task.cancel()
+
+    def stop(self):
+        self.running = False
+        if self._wake is not None:
+            self._wake.set()
+
+    def _pop(self) -> Optional[ScheduledBehavior]:
+        """Highest-ranked live entry that is still fresh and off cooldown"""
+        now = time.time()
+        while self._heap:
+            _, _, entry = heapq.heappop(self._heap)
+            if entry.cancelled:
+                continue
+            self._pending.pop(entry.name, None)
+            if now - entry.enqueued_at > self.max_age:
+                self.stats['expired'] += 1
+                continue
+            if self._cooldown_until.get(entry.name, 0.0) > now:
+                self.stats['cooling_down'] += 1
+                continue
+            return entry
+        return None
+
+    def _start(self, entry: ScheduledBehavior):
+        entry.started_at = time.time()
+        self.current = entry
+        self._cooldown_until[entry.name] = entry.started_at + getattr(entry.behavior, 'cooldown_seconds', 0.0)
+        self.stats['started'] += 1
+        self._queue_wait.observe(entry.started_at - entry.trigger_time)
+        self._task = asyncio.create_task(self._run_entry(entry))
+
+    async def _run_entry(self, entry: ScheduledBehavior):
+        try:
+            await self.execute(entry)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Behavior {entry.name} failed: {e}")
+        finally:
+            self.stats['preempted' if entry.preempt_requested else 'completed'] += 1
+            if self.current is entry:
+                self.current = None
+            if self._wake is not None:
+                self._wake.set()
+
+    # Preemption
+
+    def _maybe_preempt(self, entry: ScheduledBehavior):
+        current = self.current
+        if (self.allow_preemption and current is not None and not current.preempt_requested and
+                getattr(current.behavior, 'interruptible', True) and entry.priority > current.priority):
+            self._request_preemption(current, entry.name)
+
+    def _request_preemption(self, current: ScheduledBehavior, reason: str):
+        current.preempt_requested = True
+        current.preempted_by = reason
+        self._preemptions.inc()
+        logger.info(f"Preempting behavior {current.name} for {reason}")
+        if self.preempt is not None:
+            try:
+                self.preempt(current)
+            except Exception as e:
+                logger.error(f"Preemption of {current.name} failed: {e}")
+
+    # Status
+
+    @property
+    def queue_size(self) -> int:
+        return len(self._pending)
+
+    def get_status(self) -> Dict[str, Any]:
+        latencies = np.array(self.reaction_latencies) * 1000.0
+        return {
+            'running': self.current.name if self.current else None,
+            'queue_size': self.queue_size,
+            'pending': [entry.name for _, _, entry in sorted(self._heap) if not entry.cancelled],
+            **self.stats,
+            'queue_wait_p50_ms': self._queue_wait.percentile(50) * 1000.0,
+            'reaction_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'reaction_p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None
+        }
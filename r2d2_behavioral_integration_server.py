@@ -11,6 +11,10 @@ Master integration server that coordinates all R2D2 behavioral systems:
 - Vision System Integration
 - Dashboard WebSocket Architecture
 
+The subsystems run in this process and exchange triggers, requests and
+emergency stops over an in-process event bus (no loopback WebSockets);
+a WebSocket bridge carries bus events to services on other machines.
+
 This server provides:
 - Unified WebSocket API for all behavioral controls
 - Real-time system coordination and synchronization
@@ -33,7 +37,6 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any, Set
 from dataclasses import dataclass, asdict
 from enum import Enum
-import queue
 import sys
 import os
 from pathlib import Path
@@ -42,7 +45,7 @@ from pathlib import Path
 sys.path.append('/home/rolo/r2ai')
 
 # Core behavioral systems
-from r2d2_behavioral_intelligence import R2D2BehaviorEngine
+from r2d2_behavioral_intelligence import R2D2BehavioralIntelligenceEngine
 from r2d2_enhanced_choreographer import R2D2EnhancedChoreographer
 from r2d2_environmental_awareness import R2D2EnvironmentalAwareness
 from r2d2_audio_intelligence import R2D2AudioIntelligence
@@ -50,6 +53,11 @@ from r2d2_audio_intelligence import R2D2AudioIntelligence
 # Servo and sound systems
 from maestro_enhanced_controller import EnhancedMaestroController
 from r2d2_canonical_sound_enhancer import R2D2CanonicalSoundEnhancer, R2D2EmotionalContext
+from r2d2_event_bus import (
+    EventBus, WebSocketBridge, BehaviorRequested, AudioRequested, ActionStarted, EmergencyStop
+)
+from r2d2_state_store import StateStore, StatePublisher
+from r2d2_startup_orchestrator import StartupOrchestrator, StartupError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -112,16 +120,22 @@ class R2D2BehavioralIntegrationServer:
         self.connected_clients: Set[websockets.WebSocketServerProtocol] = set()
 
         # System instances
-        self.behavioral_intelligence: Optional[R2D2BehaviorEngine] = None
+        self.behavioral_intelligence: Optional[R2D2BehavioralIntelligenceEngine] = None
         self.environmental_awareness: Optional[R2D2EnvironmentalAwareness] = None
         self.audio_intelligence: Optional[R2D2AudioIntelligence] = None
         self.servo_controller: Optional[EnhancedMaestroController] = None
         self.servo_choreographer: Optional[R2D2EnhancedChoreographer] = None
 
-        # System coordination
+        # System coordination (event bus shared by all in-process subsystems)
         self.system_status = SystemStatus.INITIALIZING
-        self.integration_queue = queue.Queue()
+        self.event_bus = EventBus('integration')
+        self.bus_bridge: Optional[WebSocketBridge] = None
         self.health_reports: List[SystemHealthReport] = []
+        self.startup_report: Optional[Dict[str, Any]] = None    # Per-component startup timeline
+
+        # Versioned status topics, clients receive a snapshot and then changed fields
+        self.state_store = StateStore('integration')
+        self.state_publisher = StatePublisher(self.state_store, rate_hz=2.0)
 
         # Performance monitoring
         self.performance_metrics = {
@@ -143,7 +157,8 @@ class R2D2BehavioralIntegrationServer:
             'behavior_coordination_enabled': True,
             'audio_servo_sync_enabled': True,
             'environmental_adaptation_enabled': True,
-            'performance_monitoring_enabled': True
+            'performance_monitoring_enabled': True,
+            'event_bus_bridge_port': None  # Bus events for services on other machines, e.g. 8770 (None: off)
         }
 
         # System control
@@ -172,49 +187,61 @@ class R2D2BehavioralIntegrationServer:
             raise
 
     async def _initialize_all_systems(self):
-        """Initialize all R2D2 behavioral systems"""
+        """Initialize all R2D2 behavioral systems, independent ones concurrently"""
         logger.info("Initializing all R2D2 behavioral systems...")
 
-        initialization_tasks = []
+        # Serial probing, sound bank loading and the behavior library do not wait for each other
+        startup = StartupOrchestrator('behavioral_integration')
+        startup.add('servo_controller', self._init_servo_controller)
+        startup.add('servo_choreographer', self._init_servo_choreographer, depends_on=['servo_controller'])
+        startup.add('audio_intelligence', self._init_audio_intelligence)
+        startup.add('audio_processing', self._start_audio_intelligence, depends_on=['audio_intelligence'])
+        startup.add('environmental_awareness', self._init_environmental_awareness)
+        startup.add('behavioral_intelligence', self._init_behavioral_intelligence)
 
         try:
-            # Initialize servo controller first (hardware dependency)
-            logger.info("🦾 Initializing Enhanced Maestro Controller...")
-            self.servo_controller = EnhancedMaestroController(auto_detect=True)
+            await startup.run()
+        except StartupError as e:
+            logger.error(f"Failed to initialize systems: {e}")
+            self.system_status = SystemStatus.ERROR
+            raise
+        finally:
+            self.startup_report = startup.get_status()
 
-            # Initialize servo choreographer
-            if self.servo_controller:
-                logger.info("🎭 Initializing Enhanced Choreographer...")
-                self.servo_choreographer = R2D2EnhancedChoreographer(self.servo_controller)
-
-            # Initialize audio intelligence
-            logger.info("🔊 Initializing Audio Intelligence...")
-            self.audio_intelligence = R2D2AudioIntelligence()
-            await self.audio_intelligence.start_audio_intelligence()
-
-            # Initialize environmental awareness (connects to vision)
-            logger.info("🌍 Initializing Environmental Awareness...")
-            self.environmental_awareness = R2D2EnvironmentalAwareness()
-            initialization_tasks.append(
-                self.environmental_awareness.start_environmental_processing()
-            )
+        # Environmental processing and behavioral intelligence run in the background
+        asyncio.create_task(self.environmental_awareness.start_environmental_processing())
+        asyncio.create_task(self.behavioral_intelligence.start_async())
 
-            # Initialize behavioral intelligence (master coordinator)
-            logger.info("🧠 Initializing Behavioral Intelligence...")
-            self.behavioral_intelligence = R2D2BehaviorEngine()
+        self.system_status = SystemStatus.READY
+        logger.info(f"✅ All R2D2 behavioral systems initialized in {startup.wall_ms:.0f}ms")
 
-            # Start environmental awareness in background
-            if initialization_tasks:
-                for task in initialization_tasks:
-                    asyncio.create_task(task)
+    def _init_servo_controller(self):
+        logger.info("🦾 Initializing Enhanced Maestro Controller...")
+        self.servo_controller = EnhancedMaestroController(auto_detect=True)
 
-            self.system_status = SystemStatus.READY
-            logger.info("✅ All R2D2 behavioral systems initialized successfully")
+    def _init_servo_choreographer(self):
+        logger.info("🎭 Initializing Enhanced Choreographer...")
+        self.servo_choreographer = R2D2EnhancedChoreographer(self.servo_controller)
 
-        except Exception as e:
-            logger.error(f"Failed to initialize systems: {e}")
-            self.system_status = SystemStatus.ERROR
-            raise
+    def _init_audio_intelligence(self):
+        logger.info("🔊 Initializing Audio Intelligence...")
+        self.audio_intelligence = R2D2AudioIntelligence()
+        self.audio_intelligence.attach_event_bus(self.event_bus)
+
+    async def _start_audio_intelligence(self):
+        await self.audio_intelligence.start_audio_intelligence()
+
+    def _init_environmental_awareness(self):
+        # Connects to vision, publishes frames and triggers
+        logger.info("🌍 Initializing Environmental Awareness...")
+        self.environmental_awareness = R2D2EnvironmentalAwareness()
+        self.environmental_awareness.attach_event_bus(self.event_bus)
+
+    def _init_behavioral_intelligence(self):
+        # Master coordinator, fed by the bus
+        logger.info("🧠 Initializing Behavioral Intelligence...")
+        self.behavioral_intelligence = R2D2BehavioralIntelligenceEngine()
+        self.behavioral_intelligence.attach_event_bus(self.event_bus)
 
     def _start_coordination_services(self):
         """Start background coordination and monitoring services"""
@@ -222,13 +249,18 @@ class R2D2BehavioralIntegrationServer:
 
         self.running = True
 
-        # Integration event processor
-        integration_thread = threading.Thread(
-            target=self._integration_processing_loop,
-            daemon=True,
-            name="IntegrationProcessor"
-        )
-        integration_thread.start()
+        # Integration event processor (wakes on bus events)
+        asyncio.create_task(self._integration_processing_loop())
+
+        # Status delta publication to dashboard clients
+        asyncio.create_task(self.state_publisher.run())
+
+        # Bridge for bus events to and from other machines
+        if self.config['event_bus_bridge_port']:
+            self.bus_bridge = self.event_bus.add_transport(WebSocketBridge(
+                topics=[BehaviorRequested, AudioRequested, ActionStarted, EmergencyStop],
+                name='integration'))
+            asyncio.create_task(self.bus_bridge.serve('localhost', self.config['event_bus_bridge_port']))
 
         # System health monitor
         health_thread = threading.Thread(
@@ -269,8 +301,9 @@ class R2D2BehavioralIntegrationServer:
         logger.info(f"Client connected from {client_address}")
 
         try:
-            # Send initial status
-            await self._send_system_status(websocket)
+            # Send a snapshot of the status topics, deltas follow
+            self._update_state()
+            await self.state_publisher.connect(websocket)
 
             # Handle messages
             async for message in websocket:
@@ -282,6 +315,7 @@ class R2D2BehavioralIntegrationServer:
             logger.error(f"Error handling client {client_address}: {e}")
         finally:
             self.connected_clients.discard(websocket)
+            self.state_publisher.disconnect(websocket)
 
     async def _process_websocket_message(self, websocket, message):
         """Process incoming WebSocket messages"""
@@ -301,6 +335,8 @@ class R2D2BehavioralIntegrationServer:
                 await self._send_system_status(websocket)
             elif command_type == 'get_health_report':
                 await self._send_health_report(websocket)
+            elif command_type == 'subscribe':
+                await self.state_publisher.handle_subscribe(websocket, data)
             elif command_type == 'set_personality_mode':
                 await self._handle_set_personality_mode(websocket, data)
             elif command_type == 'environmental_update':
@@ -324,16 +360,11 @@ class R2D2BehavioralIntegrationServer:
                 await self._send_error(websocket, "Missing behavior_name")
                 return
 
-            # Create integration event
-            event = {
-                'type': IntegrationEvent.BEHAVIOR_TRIGGERED,
-                'behavior_name': behavior_name,
-                'parameters': parameters,
-                'client_id': id(websocket),
-                'timestamp': time.time()
-            }
-
-            self.integration_queue.put(event)
+            self.event_bus.publish(BehaviorRequested(
+                source=f"dashboard:{id(websocket)}",
+                behavior_name=behavior_name,
+                parameters=parameters
+            ))
 
             await websocket.send(json.dumps({
                 'type': 'behavior_queued',
@@ -431,18 +462,14 @@ class R2D2BehavioralIntegrationServer:
 
             logger.warning("🛑 EMERGENCY STOP ACTIVATED")
 
-            # Stop all active systems
+            # Stop all active systems (behavior engine and audio stop on the bus event)
             if self.servo_choreographer:
                 self.servo_choreographer.stop_current_choreography()
 
-            if self.audio_intelligence:
-                self.audio_intelligence.stop_current_audio()
-
-            if self.behavioral_intelligence:
-                # Stop active behaviors
-                pass
+            self.event_bus.publish(EmergencyStop(source='dashboard', reason='emergency_stop command'))
 
             self.performance_metrics['emergency_stops'] += 1
+            self._update_state()
 
             # Notify all clients
             await self._broadcast_message({
@@ -511,46 +538,30 @@ class R2D2BehavioralIntegrationServer:
             logger.error(f"Error handling environmental update: {e}")
             await self._send_error(websocket, str(e))
 
-    def _integration_processing_loop(self):
+    async def _integration_processing_loop(self):
         """Main integration event processing loop"""
         logger.info("Integration processing loop started")
 
-        while self.running:
-            try:
-                if not self.integration_queue.empty():
-                    event = self.integration_queue.get_nowait()
-                    self._process_integration_event(event)
-
-                time.sleep(0.05)  # 20Hz processing
-
-            except queue.Empty:
-                time.sleep(0.1)
-            except Exception as e:
-                logger.error(f"Error in integration processing loop: {e}")
-                time.sleep(1.0)
+        requests = self.event_bus.subscribe(BehaviorRequested)
+        try:
+            await requests.run(self._process_integration_event)
+        finally:
+            requests.close()
 
-    def _process_integration_event(self, event):
+    def _process_integration_event(self, event: BehaviorRequested):
         """Process an integration event between systems"""
         try:
-            event_type = event['type']
-
-            if event_type == IntegrationEvent.BEHAVIOR_TRIGGERED:
-                self._coordinate_behavior_execution(event)
-            elif event_type == IntegrationEvent.ENVIRONMENTAL_CHANGE:
-                self._coordinate_environmental_response(event)
-            elif event_type == IntegrationEvent.AUDIO_REQUESTED:
-                self._coordinate_audio_response(event)
-
+            self._coordinate_behavior_execution(event)
             self.performance_metrics['integration_events_processed'] += 1
 
         except Exception as e:
             logger.error(f"Error processing integration event: {e}")
 
-    def _coordinate_behavior_execution(self, event):
+    def _coordinate_behavior_execution(self, event: BehaviorRequested):
         """Coordinate execution of a behavior across all systems"""
         try:
-            behavior_name = event['behavior_name']
-            parameters = event.get('parameters', {})
+            behavior_name = event.behavior_name
+            parameters = event.parameters
 
             logger.info(f"🎭 Coordinating behavior execution: {behavior_name}")
 
@@ -562,24 +573,29 @@ class R2D2BehavioralIntegrationServer:
                 # Trigger synchronized audio if defined
                 if choreography.audio_sync_points:
                     for time_ms, audio_cue in choreography.audio_sync_points:
-                        if self.audio_intelligence:
-                            # Schedule audio with delay
-                            self.audio_intelligence.request_audio_playback(
-                                audio_context=R2D2EmotionalContext(audio_cue),
-                                delay_seconds=time_ms / 1000.0,
-                                behavioral_state=behavior_name,
-                                priority=5
-                            )
+                        # Schedule audio with delay
+                        self.event_bus.publish(AudioRequested(
+                            trigger_time=event.trigger_time,
+                            source='integration',
+                            audio_context=audio_cue,
+                            delay_seconds=time_ms / 1000.0,
+                            behavioral_state=behavior_name,
+                            priority=5
+                        ))
 
                 # Execute choreography
                 asyncio.create_task(
                     self.servo_choreographer.execute_choreography(behavior_name)
                 )
+                self.event_bus.record_action(behavior_name, event.trigger_time, 'choreography',
+                                             source='integration')
 
             # Check for behavioral intelligence behaviors
-            elif self.behavioral_intelligence and behavior_name in self.behavioral_intelligence.behavior_library:
+            elif (self.behavioral_intelligence and
+                  behavior_name in self.behavioral_intelligence.behavior_library.behaviors):
                 # Execute through behavioral intelligence engine
-                success = self.behavioral_intelligence.execute_manual_behavior(behavior_name, parameters)
+                success = self.behavioral_intelligence.execute_manual_behavior(
+                    behavior_name, parameters, trigger_time=event.trigger_time)
                 if not success:
                     logger.warning(f"Failed to execute behavior: {behavior_name}")
 
@@ -591,22 +607,6 @@ class R2D2BehavioralIntegrationServer:
         except Exception as e:
             logger.error(f"Error coordinating behavior execution: {e}")
 
-    def _coordinate_environmental_response(self, event):
-        """Coordinate response to environmental changes"""
-        try:
-            # This would coordinate responses between environmental awareness and behavioral systems
-            pass
-        except Exception as e:
-            logger.error(f"Error coordinating environmental response: {e}")
-
-    def _coordinate_audio_response(self, event):
-        """Coordinate audio response execution"""
-        try:
-            # This would coordinate audio responses with servo movements
-            pass
-        except Exception as e:
-            logger.error(f"Error coordinating audio response: {e}")
-
     def _health_monitoring_loop(self):
         """System health monitoring loop"""
         logger.info("Health monitoring loop started")
@@ -623,6 +623,7 @@ class R2D2BehavioralIntegrationServer:
 
                 # Check for system issues
                 self._check_system_health(health_report)
+                self._update_state(health_report)
 
                 time.sleep(self.config['health_check_interval_seconds'])
 
@@ -638,7 +639,7 @@ class R2D2BehavioralIntegrationServer:
             # Collect status from all systems
             behavioral_status = {}
             if self.behavioral_intelligence:
-                behavioral_status = self.behavioral_intelligence.get_comprehensive_status()
+                behavioral_status = self.behavioral_intelligence.get_system_status()
 
             environmental_status = {}
             if self.environmental_awareness:
@@ -812,25 +813,46 @@ class R2D2BehavioralIntegrationServer:
             logger.error(f"Error sending error message: {e}")
 
     async def _broadcast_message(self, message: Dict[str, Any]):
-        """Broadcast message to all connected clients"""
+        """Broadcast an event message to all connected clients (serialized once, sent concurrently)"""
         if not self.connected_clients:
             return
 
         message_json = json.dumps(message)
-        disconnected_clients = set()
-
-        for client in self.connected_clients:
-            try:
-                await client.send(message_json)
-            except websockets.exceptions.ConnectionClosed:
-                disconnected_clients.add(client)
-            except Exception as e:
-                logger.error(f"Error broadcasting to client: {e}")
-                disconnected_clients.add(client)
+        clients = list(self.connected_clients)
+        results = await asyncio.gather(*[client.send(message_json) for client in clients],
+                                       return_exceptions=True)
 
         # Clean up disconnected clients
-        for client in disconnected_clients:
-            self.connected_clients.discard(client)
+        for client, result in zip(clients, results):
+            if isinstance(result, Exception):
+                if not isinstance(result, websockets.exceptions.ConnectionClosed):
+                    logger.error(f"Error broadcasting to client: {result}")
+                self.connected_clients.discard(client)
+                self.state_publisher.disconnect(client)
+
+    def _update_state(self, health_report: Optional[SystemHealthReport] = None):
+        """Write server status, and subsystem status from a health report, into the state store"""
+        store = self.state_store
+        store.update('system', {
+            'overall_status': self.system_status.value,
+            'emergency_stop_active': self.emergency_stop_active,
+            'connected_clients': len(self.connected_clients),
+            'subsystems': {
+                'behavioral_intelligence': self.behavioral_intelligence is not None,
+                'environmental_awareness': self.environmental_awareness is not None,
+                'audio_intelligence': self.audio_intelligence is not None,
+                'servo_choreographer': self.servo_choreographer is not None,
+                'servo_controller': self.servo_controller is not None
+            }
+        }, replace=True)
+        store.update('performance', dict(self.performance_metrics), replace=True)
+
+        if health_report is not None:
+            store.update('behavior', health_report.behavioral_intelligence, replace=True)
+            store.update('environment', health_report.environmental_awareness, replace=True)
+            store.update('audio', health_report.audio_intelligence, replace=True)
+            store.update('choreography', health_report.servo_choreographer, replace=True)
+            store.update('servos', health_report.servo_controller, replace=True)
 
     def get_comprehensive_status(self) -> Dict[str, Any]:
         """Get comprehensive status of the entire integration server"""
@@ -853,7 +875,10 @@ class R2D2BehavioralIntegrationServer:
                 'servo_controller': self.servo_controller is not None
             },
             'performance_metrics': dict(self.performance_metrics),
+            'event_bus': self.event_bus.get_status(),
+            'state_publication': self.state_publisher.get_status(),
             'health_reports_count': len(self.health_reports),
+            'startup': self.startup_report,
             'configuration': dict(self.config)
         }
 
@@ -863,6 +888,7 @@ class R2D2BehavioralIntegrationServer:
 
         self.running = False
         self.system_status = SystemStatus.ERROR
+        self.state_publisher.stop()
 
         # Stop all subsystems
         if self.audio_intelligence:
@@ -872,7 +898,9 @@ class R2D2BehavioralIntegrationServer:
             await self.environmental_awareness.stop_environmental_processing()
 
         if self.behavioral_intelligence:
-            self.behavioral_intelligence.shutdown()
+            await self.behavioral_intelligence.stop_async()
+
+        self.event_bus.close()
 
         if self.servo_controller:
             self.servo_controller.shutdown()
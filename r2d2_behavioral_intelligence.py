@@ -41,7 +41,6 @@ import json
 import logging
 import math
 import numpy as np
-import random
 import threading
 import time
 import websockets
@@ -55,6 +54,11 @@ import queue
 import sys
 import os
 
+from r2d2_behavior_index import BehaviorIndex
+from r2d2_detection_channel import MESSAGE_TYPE, DetectionDeltaDecoder, detection_channel_uri
+from r2d2_event_bus import EventBus, VisionFrame, EnvironmentUpdate, EmergencyStop
+from r2d2_behavior_scheduler import BehaviorScheduler, ScheduledBehavior
+
 # Import existing system components
 sys.path.append('/home/rolo/r2ai')
 try:
@@ -269,6 +273,7 @@ class MotionChoreographer:
     def __init__(self, servo_controller):
         self.servo_controller = servo_controller
         self.active_sequences: Dict[str, Dict] = {}
+        self.yield_requests: set = set()   # Sequences to stop at their next keyframe
         self.motion_curves = {
             "linear": lambda t: t,
             "smooth": lambda t: t * t * (3 - 2 * t),
@@ -295,7 +300,8 @@ class MotionChoreographer:
         """Excited motion curve with overshoot"""
         return 1 - math.pow(2, -10 * t) * math.cos((t * 10 - 0.75) * (2 * math.pi) / 3)
 
-    async def execute_choreography(self, keyframes: List[ServoMotionKeyframe], sequence_id: str = None) -> bool:
+    async def execute_choreography(self, keyframes: List[ServoMotionKeyframe], sequence_id: str = None,
+                                   on_first_motion: Optional[Callable[[], None]] = None) -> bool:
         """Execute sophisticated motion choreography"""
         try:
             if not keyframes:
@@ -303,7 +309,7 @@ class MotionChoreographer:
 
             sequence_id = sequence_id or f"choreography_{int(time.time())}"
             motion_plan = self._plan_motion_trajectories(keyframes)
-            return await self._execute_motion_plan(motion_plan, sequence_id)
+            return await self._execute_motion_plan(motion_plan, sequence_id, on_first_motion)
 
         except Exception as e:
             logger.error(f"Motion choreography error: {e}")
@@ -318,6 +324,8 @@ class MotionChoreographer:
             next_frame = keyframes[i + 1]
 
             trajectory = self._calculate_trajectory(current_frame, next_frame)
+            if trajectory:
+                trajectory[-1]['keyframe'] = True   # Safe point to hand over
             motion_plan.extend(trajectory)
 
         return motion_plan
@@ -359,7 +367,8 @@ class MotionChoreographer:
 
         return trajectory
 
-    async def _execute_motion_plan(self, motion_plan: List[Dict], sequence_id: str) -> bool:
+    async def _execute_motion_plan(self, motion_plan: List[Dict], sequence_id: str,
+                                   on_first_motion: Optional[Callable[[], None]] = None) -> bool:
         """Execute motion plan with precise timing"""
         try:
             if not motion_plan:
@@ -368,7 +377,7 @@ class MotionChoreographer:
             self.active_sequences[sequence_id] = {'start_time': time.time(), 'plan': motion_plan}
             start_time = time.time()
 
-            for motion_point in motion_plan:
+            for step, motion_point in enumerate(motion_plan):
                 target_time = start_time + motion_point['timestamp']
                 current_time = time.time()
                 wait_time = target_time - current_time
@@ -380,9 +389,18 @@ class MotionChoreographer:
                     return False
 
                 await self._execute_simultaneous_moves(motion_point['positions'])
+                if step == 0 and on_first_motion:
+                    on_first_motion()
+
+                # Yield to a higher-priority behavior once a keyframe is reached
+                if motion_point.get('keyframe') and sequence_id in self.yield_requests:
+                    self.yield_requests.discard(sequence_id)
+                    self.active_sequences.pop(sequence_id, None)
+                    return False
 
             if sequence_id in self.active_sequences:
                 del self.active_sequences[sequence_id]
+            self.yield_requests.discard(sequence_id)
 
             return True
 
@@ -409,12 +427,17 @@ class MotionChoreographer:
             logger.error(f"Simultaneous move error: {e}")
             return False
 
+    def request_yield(self, sequence_id: str):
+        """Stop a sequence at its next keyframe (also if it has not started yet)"""
+        self.yield_requests.add(sequence_id)
+
     def stop_sequence(self, sequence_id: str = None):
         """Stop motion sequences"""
         if sequence_id:
             self.active_sequences.pop(sequence_id, None)
         else:
             self.active_sequences.clear()
+            self.yield_requests.clear()
 
 # =============================================
 # COMPREHENSIVE BEHAVIOR LIBRARY
@@ -431,6 +454,9 @@ class ConsolidatedBehaviorLibrary:
         }
         self._create_behavior_library()
 
+        # Trigger -> candidate matrices, so selection does not scan the library
+        self.index = BehaviorIndex(self.behaviors, list(PersonalityTrait))
+
     def _create_behavior_library(self):
         """Create comprehensive behavior library with Disney quality"""
 
@@ -754,41 +780,8 @@ class ConsolidatedBehaviorLibrary:
                 self.behavior_categories['emergency'].append(name)
 
     def get_behavior_by_trigger(self, trigger: EnvironmentalTrigger, personality: PersonalityProfile) -> Optional[BehaviorSequence]:
-        """Select best behavior for trigger and personality"""
-        candidates = []
-
-        for behavior in self.behaviors.values():
-            if trigger in behavior.environmental_triggers:
-                # Check trait requirements
-                trait_match = True
-                for required_trait, min_value in behavior.required_traits.items():
-                    if personality.get_trait_weight(required_trait) < min_value:
-                        trait_match = False
-                        break
-
-                if trait_match:
-                    candidates.append(behavior)
-
-        if not candidates:
-            return None
-
-        # Score and select best behavior
-        scored_candidates = []
-        for behavior in candidates:
-            score = behavior.priority
-
-            # Add personality-based scoring
-            for trait, weight in behavior.required_traits.items():
-                trait_value = personality.get_trait_weight(trait)
-                score += trait_value * 2
-
-            # Add controlled randomness
-            score += random.uniform(-1, 1)
-
-            scored_candidates.append((score, behavior))
-
-        scored_candidates.sort(key=lambda x: x[0], reverse=True)
-        return scored_candidates[0][1]
+        """Select best behavior for trigger and personality (indexed)"""
+        return self.index.select(trigger, personality)
 
 # =============================================
 # MAIN CONSOLIDATED BEHAVIORAL INTELLIGENCE ENGINE
@@ -850,7 +843,11 @@ class R2D2BehavioralIntelligenceEngine:
 
         # Thread management
         self.running = False
-        self.behavior_queue = asyncio.PriorityQueue()
+        self.scheduler = BehaviorScheduler(
+            self._execute_behavior, self._preempt_behavior, max_age=30.0,
+            allow_preemption=self.config['behavior_interruption_allowed'], name='consolidated')
+        self._behavior_yield: Optional[asyncio.Event] = None
+        self.event_bus: Optional[EventBus] = None
 
         # Initialize subsystems
         self._initialize_subsystems()
@@ -889,6 +886,10 @@ class R2D2BehavioralIntelligenceEngine:
             detections = vision_data.get('detections', [])
             character_detections = vision_data.get('character_detections', [])
 
+            # Reaction latency is measured from the frame, when it carries its capture time
+            timestamp = vision_data.get('timestamp')
+            trigger_time = timestamp if isinstance(timestamp, (int, float)) else time.time()
+
             # Update environmental context
             people = [d for d in detections if d.get('class') == 'person']
             self.environmental_context['people_count'] = len(people)
@@ -897,9 +898,9 @@ class R2D2BehavioralIntelligenceEngine:
             # Generate triggers
             triggers = self._generate_environmental_triggers(detections, character_detections)
 
-            # Process triggers
+            # Process triggers (queued directly: the scheduler wakes without a poll)
             for trigger in triggers:
-                asyncio.create_task(self._process_environmental_trigger(trigger))
+                self._process_environmental_trigger(trigger, trigger_time)
 
         except Exception as e:
             logger.error(f"Vision data processing error: {e}")
@@ -933,7 +934,8 @@ class R2D2BehavioralIntelligenceEngine:
 
         return triggers
 
-    async def _process_environmental_trigger(self, trigger: EnvironmentalTrigger):
+    def _process_environmental_trigger(self, trigger: EnvironmentalTrigger,
+                                       trigger_time: Optional[float] = None):
         """Process environmental trigger and initiate behavior"""
         try:
             self.metrics['environmental_triggers'] += 1
@@ -941,37 +943,24 @@ class R2D2BehavioralIntelligenceEngine:
             behavior = self.behavior_library.get_behavior_by_trigger(trigger, self.personality)
 
             if behavior and self._can_execute_behavior(behavior):
-                await self._queue_behavior(behavior, trigger)
+                self._queue_behavior(behavior, trigger, trigger_time)
 
         except Exception as e:
             logger.error(f"Environmental trigger processing error: {e}")
 
     def _can_execute_behavior(self, behavior: BehaviorSequence) -> bool:
         """Determine if behavior can be executed"""
-        # Check interruption rules
-        if self.active_behavior and not self.config['behavior_interruption_allowed']:
-            return False
-
-        if self.active_behavior and behavior.priority <= self.active_behavior.priority:
-            return False
-
-        # Check cooldown
-        for hist_behavior, timestamp in self.behavior_history:
-            if hist_behavior == behavior.name:
-                if (time.time() - timestamp) < behavior.cooldown_seconds:
-                    return False
-                break
+        # Check cooldown (ordering against the running behavior is the scheduler's job)
+        return not self.scheduler.is_cooling_down(behavior.name)
 
-        return True
-
-    async def _queue_behavior(self, behavior: BehaviorSequence, trigger: EnvironmentalTrigger):
+    def _queue_behavior(self, behavior: BehaviorSequence, trigger: EnvironmentalTrigger,
+                        trigger_time: Optional[float] = None) -> Optional[ScheduledBehavior]:
         """Queue behavior for execution"""
         try:
-            priority_score = -behavior.priority
-            await self.behavior_queue.put((priority_score, time.time(), behavior, trigger))
-            logger.info(f"Queued behavior: {behavior.name} (priority: {behavior.priority})")
+            return self.scheduler.submit(behavior, trigger, trigger_time)
         except Exception as e:
             logger.error(f"Behavior queuing error: {e}")
+            return None
 
     # ==========================================
     # BEHAVIOR EXECUTION SYSTEM
@@ -981,41 +970,50 @@ class R2D2BehavioralIntelligenceEngine:
         """Main behavior execution loop"""
         logger.info("Starting consolidated behavior execution loop")
 
-        while self.running:
-            try:
-                # Check idle timeout
-                if (self.current_state == R2D2BehavioralState.IDLE and
-                    time.time() - self.state_start_time > self.config['idle_timeout_seconds']):
-                    await self._process_environmental_trigger(EnvironmentalTrigger.IDLE_TIMEOUT)
-
-                # Process behavior queue
-                if not self.behavior_queue.empty():
-                    try:
-                        priority_score, queue_time, behavior, trigger = await asyncio.wait_for(
-                            self.behavior_queue.get(), timeout=0.1
-                        )
-
-                        if time.time() - queue_time < 30.0:
-                            await self._execute_behavior(behavior, trigger)
-
-                    except asyncio.TimeoutError:
-                        pass
-
-                # Monitor active behavior
-                if (self.active_behavior and self.behavior_start_time and
-                    time.time() - self.behavior_start_time > self.active_behavior.duration):
-                    await self._complete_behavior()
+        # Behaviors are started by the scheduler as soon as they are queued;
+        # this loop only generates idle triggers
+        scheduler_task = asyncio.create_task(self.scheduler.run())
+        try:
+            while self.running:
+                try:
+                    # Check idle timeout
+                    if (self.current_state == R2D2BehavioralState.IDLE and
+                        time.time() - self.state_start_time > self.config['idle_timeout_seconds']):
+                        self._process_environmental_trigger(EnvironmentalTrigger.IDLE_TIMEOUT)
 
-                await asyncio.sleep(0.05)  # 20Hz loop
+                    await asyncio.sleep(1.0)
 
-            except Exception as e:
-                logger.error(f"Behavior execution loop error: {e}")
-                await asyncio.sleep(1.0)
+                except Exception as e:
+                    logger.error(f"Behavior execution loop error: {e}")
+                    await asyncio.sleep(1.0)
+        finally:
+            self.scheduler.stop()
+            await asyncio.gather(scheduler_task, return_exceptions=True)
+
+    def _preempt_behavior(self, entry: ScheduledBehavior):
+        """Ask the running behavior to yield: motion stops at its next keyframe"""
+        if self.motion_choreographer and entry.sequence_id:
+            self.motion_choreographer.request_yield(entry.sequence_id)
+        if self._behavior_yield is not None:
+            self._behavior_yield.set()
+
+    async def _wait_unless_preempted(self, entry: Optional[ScheduledBehavior], seconds: float):
+        """Sleep, returning early when the running behavior is asked to yield"""
+        if entry is None or self._behavior_yield is None:
+            await asyncio.sleep(seconds)
+            return
+        try:
+            await asyncio.wait_for(self._behavior_yield.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
 
-    async def _execute_behavior(self, behavior: BehaviorSequence, trigger: EnvironmentalTrigger):
-        """Execute complete behavioral sequence"""
+    async def _execute_behavior(self, entry: ScheduledBehavior):
+        """Execute complete behavioral sequence (started by the scheduler)"""
+        behavior = entry.behavior
         try:
             logger.info(f"🎭 Executing behavior: {behavior.name}")
+            entry.sequence_id = f"{behavior.name}_{int(time.time())}"
+            self._behavior_yield = asyncio.Event()
 
             # Update state
             self.previous_state = self.current_state
@@ -1032,52 +1030,75 @@ class R2D2BehavioralIntelligenceEngine:
             self.behavior_history.appendleft((behavior.name, time.time()))
 
             # Execute coordinated performance
-            await self._execute_coordinated_performance(behavior)
+            await self._execute_coordinated_performance(behavior, entry)
+
+            # Hold the character for the rest of the behavior (nothing moving: yield at once)
+            remaining = behavior.duration - (time.time() - entry.started_at)
+            if remaining > 0 and not entry.preempt_requested:
+                await self._wait_unless_preempted(entry, remaining)
 
         except Exception as e:
             logger.error(f"Behavior execution error: {e}")
-            await self._complete_behavior()
+        finally:
+            # An emergency stop clears the active behavior and keeps its own state
+            if self.active_behavior is behavior:
+                await self._complete_behavior()
 
-    async def _execute_coordinated_performance(self, behavior: BehaviorSequence):
+    async def _execute_coordinated_performance(self, behavior: BehaviorSequence,
+                                               entry: Optional[ScheduledBehavior] = None):
         """Execute coordinated multi-system performance"""
         try:
-            tasks = []
+            motion_tasks = []
+            audio_task = None
+            sequence_id = entry.sequence_id if entry else f"{behavior.name}_{int(time.time())}"
+            on_first_motion = (lambda: self.scheduler.record_first_motion(entry)) if entry else None
 
             # Motion choreography
             if behavior.servo_keyframes and self.motion_choreographer:
                 motion_task = asyncio.create_task(
                     self.motion_choreographer.execute_choreography(
-                        behavior.servo_keyframes, f"{behavior.name}_{int(time.time())}"
+                        behavior.servo_keyframes, sequence_id, on_first_motion
                     )
                 )
-                tasks.append(motion_task)
+                motion_tasks.append(motion_task)
 
             # Legacy servo positions and sequences
             if behavior.servo_positions or behavior.sequence_timing:
-                legacy_task = asyncio.create_task(self._execute_legacy_actions(behavior))
-                tasks.append(legacy_task)
+                legacy_task = asyncio.create_task(self._execute_legacy_actions(behavior, entry))
+                motion_tasks.append(legacy_task)
 
             # Audio sequence
             if behavior.audio_cues or behavior.audio_contexts:
                 audio_task = asyncio.create_task(self._execute_audio_sequence(behavior))
-                tasks.append(audio_task)
 
-            # Wait for completion
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
+            # Wait for completion; audio stops when the motion yields
+            if motion_tasks:
+                await asyncio.gather(*motion_tasks, return_exceptions=True)
+            if audio_task is not None:
+                if not motion_tasks and entry is not None:
+                    # Nothing moving: any moment is a safe point to yield
+                    yield_wait = asyncio.ensure_future(self._behavior_yield.wait())
+                    await asyncio.wait({audio_task, yield_wait}, return_when=asyncio.FIRST_COMPLETED)
+                    yield_wait.cancel()
+                if entry is not None and entry.preempt_requested:
+                    audio_task.cancel()
+                await asyncio.gather(audio_task, return_exceptions=True)
 
         except Exception as e:
             logger.error(f"Coordinated performance error: {e}")
 
-    async def _execute_legacy_actions(self, behavior: BehaviorSequence):
+    async def _execute_legacy_actions(self, behavior: BehaviorSequence,
+                                      entry: Optional[ScheduledBehavior] = None):
         """Execute legacy servo positions and timed sequences"""
         try:
             # Immediate servo positions
             if behavior.servo_positions and self.servo_controller:
                 for channel, position in behavior.servo_positions.items():
                     self.servo_controller.set_servo_position(channel, position)
+                if entry is not None:
+                    self.scheduler.record_first_motion(entry)
 
-            # Timed sequence execution
+            # Timed sequence execution (each action is a safe point to yield)
             if behavior.sequence_timing:
                 start_time = time.time()
 
@@ -1086,12 +1107,14 @@ class R2D2BehavioralIntelligenceEngine:
                     wait_time = timing - elapsed
 
                     if wait_time > 0:
-                        await asyncio.sleep(wait_time)
+                        await self._wait_unless_preempted(entry, wait_time)
 
-                    if self.active_behavior != behavior:
+                    if self.active_behavior != behavior or (entry is not None and entry.preempt_requested):
                         return
 
                     await self._execute_action(action_type, params)
+                    if action_type == "servo" and entry is not None:
+                        self.scheduler.record_first_motion(entry)
 
         except Exception as e:
             logger.error(f"Legacy action execution error: {e}")
@@ -1195,7 +1218,8 @@ class R2D2BehavioralIntelligenceEngine:
     # MANUAL CONTROL AND STATUS
     # ==========================================
 
-    def execute_manual_behavior(self, behavior_name: str, params: Dict[str, Any] = None) -> bool:
+    def execute_manual_behavior(self, behavior_name: str, params: Dict[str, Any] = None,
+                                trigger_time: Optional[float] = None) -> bool:
         """Execute behavior manually from dashboard"""
         try:
             if behavior_name not in self.behavior_library.behaviors:
@@ -1205,7 +1229,7 @@ class R2D2BehavioralIntelligenceEngine:
             behavior = self.behavior_library.behaviors[behavior_name]
             trigger = EnvironmentalTrigger.MANUAL_COMMAND
 
-            asyncio.create_task(self._queue_behavior(behavior, trigger))
+            self._queue_behavior(behavior, trigger, trigger_time)
             logger.info(f"Manual behavior queued: {behavior_name}")
             return True
 
@@ -1223,7 +1247,8 @@ class R2D2BehavioralIntelligenceEngine:
                 'state_duration': time.time() - self.state_start_time,
                 'behavior_duration': (time.time() - self.behavior_start_time) if self.behavior_start_time else 0,
                 'behaviors_available': len(self.behavior_library.behaviors),
-                'queue_size': self.behavior_queue.qsize()
+                'queue_size': self.scheduler.queue_size,
+                'scheduler': self.scheduler.get_status()
             },
             'personality_state': {
                 'energy_level': self.personality.energy_level,
@@ -1246,13 +1271,51 @@ class R2D2BehavioralIntelligenceEngine:
             }
         }
 
+    # ==========================================
+    # EVENT BUS INTEGRATION
+    # ==========================================
+
+    def attach_event_bus(self, bus: EventBus):
+        """Take vision frames and environmental triggers from co-located services over the bus"""
+        self.event_bus = bus
+        self.scheduler.on_first_motion = lambda entry: bus.record_action(
+            entry.name, entry.trigger_time, 'motion', source='behavior')
+        logger.info(f"Behavioral intelligence attached to event bus '{bus.name}'")
+
+    async def _consume_event_bus(self):
+        """Handle bus events (replaces the engine's own vision connection)"""
+        vision = self.event_bus.subscribe(VisionFrame, maxsize=4)
+        environment = self.event_bus.subscribe(EnvironmentUpdate)
+        emergency = self.event_bus.subscribe(EmergencyStop)
+        try:
+            await asyncio.gather(vision.run(self._on_vision_frame),
+                                 environment.run(self._on_environment_update),
+                                 emergency.run(lambda event: self._emergency_stop()))
+        finally:
+            for subscription in (vision, environment, emergency):
+                subscription.close()
+
+    def _on_vision_frame(self, event: VisionFrame):
+        self.process_vision_data({'detections': event.detections,
+                                  'character_detections': event.character_detections,
+                                  'timestamp': event.trigger_time})
+
+    def _on_environment_update(self, event: EnvironmentUpdate):
+        for value in event.trigger_values():
+            try:
+                trigger = EnvironmentalTrigger(value)
+            except ValueError:
+                continue
+            self._process_environmental_trigger(trigger, event.trigger_time)
+
     # ==========================================
     # WEBSOCKET INTEGRATION
     # ==========================================
 
     async def connect_to_vision_system(self):
-        """Connect to vision system WebSocket"""
-        uri = f"ws://localhost:{self.config['vision_websocket_port']}"
+        """Subscribe to the vision system's detections-only channel"""
+        uri = detection_channel_uri(self.config['vision_websocket_port'])
+        decoder = DetectionDeltaDecoder()
 
         while self.running:
             try:
@@ -1260,12 +1323,18 @@ class R2D2BehavioralIntelligenceEngine:
 
                 async with websockets.connect(uri) as websocket:
                     self.vision_client = websocket
-                    logger.info("✅ Connected to vision system")
+                    decoder.reset()
+                    logger.info("✅ Connected to vision system detection channel")
 
                     async for message in websocket:
                         try:
                             data = json.loads(message)
-                            if data.get('type') == 'character_vision_data':
+                            if data.get('type') == MESSAGE_TYPE:
+                                view = decoder.apply(data)
+                                if view is not None:
+                                    self.process_vision_data(view)
+                            elif data.get('type') == 'character_vision_data':
+                                # Vision server without the detection channel
                                 self.process_vision_data(data)
                         except json.JSONDecodeError:
                             logger.warning("Invalid JSON from vision system")
@@ -1358,11 +1427,7 @@ class R2D2BehavioralIntelligenceEngine:
                 self.motion_choreographer.stop_sequence()
 
             # Clear queue
-            while not self.behavior_queue.empty():
-                try:
-                    await asyncio.wait_for(self.behavior_queue.get(), timeout=0.1)
-                except asyncio.TimeoutError:
-                    break
+            self.scheduler.clear()
 
             # Reset state
             self.active_behavior = None
@@ -1386,7 +1451,8 @@ class R2D2BehavioralIntelligenceEngine:
 
         tasks = [
             asyncio.create_task(self._behavior_execution_loop()),
-            asyncio.create_task(self.connect_to_vision_system()),
+            asyncio.create_task(self._consume_event_bus() if self.event_bus
+                                else self.connect_to_vision_system()),
             asyncio.create_task(self.start_dashboard_websocket_server())
         ]
 
@@ -16,6 +16,8 @@ Features:
 - Implements authentic R2-D2 memory wipe behavior
 - Adds stubborn and sarcastic personality characteristics
 - Maintains 9.2+ canon compliance while enhancing functionality
+- O(1) weighted sound selection from precomputed alias tables, without
+  back-to-back repeats (r2d2_sound_selection)
 
 Author: Star Wars Expert Specialist
 Target: R2-D2 Convention Robot System
@@ -32,6 +34,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 import glob
 
+from r2d2_sound_selection import SoundSelector, STUBBORN, SARCASTIC
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -76,6 +80,7 @@ class CanonicalSoundMapping:
     usage_scenarios: List[str]
     stubborn_factor: float = 0.0  # 0.0-1.0, higher = more stubborn response
     sarcasm_factor: float = 0.0   # 0.0-1.0, higher = more sarcastic
+    selection_weight: float = 1.0  # Relative chance of being picked within its context
 
 class R2D2CanonicalSoundEnhancer:
     """
@@ -110,6 +115,9 @@ class R2D2CanonicalSoundEnhancer:
         self._initialize_canonical_mappings()
         self._group_sounds_by_emotional_context()
 
+        # Precomputed selection tables (rebuilt lazily when mappings change)
+        self.selector = SoundSelector(self.canonical_mappings)
+
         logger.info(f"R2-D2 Canonical Sound Enhancer initialized with {len(self.canonical_mappings)} sound mappings")
 
     def _initialize_canonical_mappings(self):
@@ -316,33 +324,8 @@ class R2D2CanonicalSoundEnhancer:
         Returns:
             Filename of appropriate sound file, or None if not found
         """
-        if context not in self.emotional_context_groups:
-            return None
-
-        candidates = []
-        for filename in self.emotional_context_groups[context]:
-            mapping = self.canonical_mappings[filename]
-
-            # Apply personality filter
-            if personality_filter:
-                if not any(trait in mapping.personality_traits for trait in personality_filter):
-                    continue
-
-            # Apply stubborn filter
-            if not allow_stubborn and mapping.stubborn_factor > 0.5:
-                continue
-
-            # Apply sarcasm filter
-            if not allow_sarcastic and mapping.sarcasm_factor > 0.3:
-                continue
-
-            candidates.append(filename)
-
-        if candidates:
-            # Implement R2-D2's characteristic randomness with slight bias toward variety
-            return random.choice(candidates)
-
-        return None
+        # Weighted alias table for this request; recently played clips are penalized
+        return self.selector.select(context, personality_filter, allow_stubborn, allow_sarcastic)
 
     def get_stubborn_response(self, normal_context: R2D2EmotionalContext) -> Optional[str]:
         """
@@ -366,16 +349,11 @@ class R2D2CanonicalSoundEnhancer:
         ]
 
         for context in stubborn_contexts:
-            candidates = []
-            if context in self.emotional_context_groups:
-                for filename in self.emotional_context_groups[context]:
-                    mapping = self.canonical_mappings[filename]
-                    if mapping.stubborn_factor > 0.3:  # Only genuinely stubborn sounds
-                        candidates.append(filename)
-
-            if candidates:
+            # Only genuinely stubborn sounds (stubborn factor above 0.3)
+            sound = self.selector.select_matching(STUBBORN, context)
+            if sound:
                 self.enhancement_metrics['stubborn_responses_triggered'] += 1
-                return random.choice(candidates)
+                return sound
 
         return None
 
@@ -389,17 +367,11 @@ class R2D2CanonicalSoundEnhancer:
         Returns:
             Sarcastic sound response, or None
         """
-        # Look for sounds with sarcasm factor in the given context
-        if context in self.emotional_context_groups:
-            candidates = []
-            for filename in self.emotional_context_groups[context]:
-                mapping = self.canonical_mappings[filename]
-                if mapping.sarcasm_factor > 0.2:  # Sarcastic sounds
-                    candidates.append(filename)
-
-            if candidates:
-                self.enhancement_metrics['sarcastic_responses_delivered'] += 1
-                return random.choice(candidates)
+        # Look for sounds with sarcasm factor in the given context (above 0.2)
+        sound = self.selector.select_matching(SARCASTIC, context)
+        if sound:
+            self.enhancement_metrics['sarcastic_responses_delivered'] += 1
+            return sound
 
         # Fall back to general sarcastic responses
         return self.get_sound_for_context(R2D2EmotionalContext.EXPRESSING_SARCASM)
@@ -412,6 +384,7 @@ class R2D2CanonicalSoundEnhancer:
             'stubborn_sounds_available': sum(1 for m in self.canonical_mappings.values() if m.stubborn_factor > 0.3),
             'sarcastic_sounds_available': sum(1 for m in self.canonical_mappings.values() if m.sarcasm_factor > 0.2),
             'performance_metrics': self.enhancement_metrics,
+            'selection_tables': self.selector.get_status(),
             'context_distribution': {
                 context.value: len(sounds)
                 for context, sounds in self.emotional_context_groups.items()
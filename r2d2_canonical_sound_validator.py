@@ -13,6 +13,7 @@ Features:
 - Audio file integrity checking
 - Canon compliance assessment
 - Performance and accessibility testing
+- Decoded durations from the sound feature index
 
 Author: Star Wars Expert Specialist
 Target: R2-D2 Convention Robot System
@@ -31,6 +32,7 @@ import threading
 
 from r2d2_canonical_sound_enhancer import R2D2CanonicalSoundEnhancer, R2D2EmotionalContext
 from r2d2_personality_enhancer import R2D2PersonalityEnhancer, InteractionContext, GuestRelationship
+from r2d2_sound_index import SoundFeatureIndex
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -88,6 +90,9 @@ class R2D2CanonicalSoundValidator:
         self.sound_enhancer = R2D2CanonicalSoundEnhancer(sound_directory)
         self.personality_enhancer = R2D2PersonalityEnhancer(self.sound_enhancer)
 
+        # Decoded features of every clip (new or changed files analyzed in the background)
+        self.sound_index = SoundFeatureIndex.open(sound_directory, background=True)
+
         # Validation metrics
         self.validation_metrics = {
             'files_scanned': 0,
@@ -111,6 +116,7 @@ class R2D2CanonicalSoundValidator:
 
         # Phase 1: Discover and scan sound files
         self._discover_sound_files()
+        self.sound_index.wait()
 
         # Phase 2: Validate individual sound files
         self._validate_sound_files()
@@ -184,8 +190,11 @@ class R2D2CanonicalSoundValidator:
         # Get file size
         size_bytes = os.path.getsize(sound_file) if exists else 0
 
-        # Estimate duration (rough estimate: MP3 at 128kbps ≈ 16KB/second)
-        duration_seconds = size_bytes / 16000 if size_bytes > 0 else 0.0
+        # Decoded duration from the index; files it could not decode fall back to
+        # a rough estimate (MP3 at 128kbps ≈ 16KB/second)
+        duration_seconds = self.sound_index.duration(filename)
+        if duration_seconds is None:
+            duration_seconds = size_bytes / 16000 if size_bytes > 0 else 0.0
 
         # Get emotional context from enhancer
         emotional_context = self._get_file_emotional_context(filename)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+R2D2 Collision Table
+====================
+
+Compiled constraint table for single-servo and servo-pair collision zones.
+
+A zone is a box over one channel or over a pair of channels (e.g. a
+utility arm extended while the body door in front of it is closed) and is
+violated while every channel in it is inside its bounds. Zones are
+compiled per channel group into bitmaps over quantized positions: a 1-D
+map for a single channel, a 2-D map for a pair, where each cell holds one
+bit per zone of the group that overlaps the cell. Checking a set of
+positions is then one array index per affected group instead of a loop
+over every zone, and a batch of targets or a whole trajectory table
+(ticks x channels) is checked with one fancy index per group.
+
+Cells are marked conservatively (any overlap with the zone) and lookups
+that hit are confirmed against the exact bounds, so quantization only
+affects speed, never the result. Trajectories are checked at their tick
+resolution: a move that passes through a zone between two ticks is not
+seen, so tables should be sampled at the playback tick rate.
+
+Features:
+- Single-channel zones and pairwise interference zones
+- Bitmap lookup with exact confirmation
+- Batched multi-target validation against current positions
+- Whole-trajectory validation before playback
+- Lazy recompilation when zones change
+
+Usage:
+    table = CollisionTable(position_range=(0, 16384), resolution=32)
+    table.add_zone("left_arm_vs_door", {4: (5000, 8000), 10: (4000, 5500)})
+    hits = table.check_targets({4: 7000}, current_positions)
+    hits = table.validate_trajectory(frames)   # frames: ticks x channels
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cells store one bit per zone of their group
+MAX_ZONES_PER_GROUP = 32
+
+
+@dataclass
+class ZoneHit:
+    """A zone occupied by a set of positions"""
+    zone: str
+    severity: str
+    channels: Tuple[int, ...]
+    positions: Tuple[float, ...]
+    tick: int = -1               # Trajectory row, -1 for position checks
+
+
+def forward_fill(frames: np.ndarray, start: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Replace NaN entries of a (ticks x channels) table with the last value
+    of the channel (or `start` before its first value)
+    """
+    frames = np.array(frames, dtype=float, ndmin=2)
+    if start is not None:
+        start = np.asarray(start, dtype=float)[:frames.shape[1]]
+        frames = np.vstack([np.pad(start, (0, frames.shape[1] - len(start)),
+                                   constant_values=np.nan), frames])
+    present = ~np.isnan(frames)
+    rows = np.where(present, np.arange(len(frames))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    filled = frames[rows, np.arange(frames.shape[1])]
+    return filled[1:] if start is not None else filled
+
+
+class CollisionTable:
+    """Per-group quantized bitmaps for single and pairwise collision zones"""
+
+    def __init__(self, position_range: Tuple[float, float] = (0.0, 16384.0),
+                 resolution: float = 32.0):
+        self.low, self.high = float(position_range[0]), float(position_range[1])
+        self.resolution = float(resolution)
+        self.bins = max(1, int(np.ceil((self.high - self.low) / self.resolution)))
+
+        # name -> (bounds {channel: (min, max)}, severity)
+        self.zones: Dict[str, Tuple[Dict[int, Tuple[float, float]], str]] = {}
+
+        # Compiled state (rebuilt lazily after zones change)
+        self._dirty = True
+        self._groups: Dict[Tuple[int, ...], Tuple[np.ndarray, List[str], List[str], np.ndarray, np.ndarray]] = {}
+        self._by_channel: Dict[int, List[Tuple[int, ...]]] = {}
+
+    # Configuration
+
+    def add_zone(self, name: str, bounds: Mapping[int, Tuple[float, float]],
+                 severity: str = 'critical'):
+        """Add (or replace) a zone over one channel or a pair of channels"""
+        if not 1 <= len(bounds) <= 2:
+            raise ValueError(f"Zone '{name}' spans {len(bounds)} channels; "
+                             f"collision zones cover one channel or a pair")
+        self.zones[name] = ({int(c): (float(lo), float(hi)) for c, (lo, hi) in bounds.items()},
+                            severity)
+        self._dirty = True
+
+    def remove_zone(self, name: str):
+        """Remove a zone if present"""
+        if self.zones.pop(name, None) is not None:
+            self._dirty = True
+
+    def clear(self):
+        """Remove all zones"""
+        self.zones.clear()
+        self._dirty = True
+
+    def compile(self):
+        """Build the group bitmaps from the current zones"""
+        zones = dict(self.zones)
+        members: Dict[Tuple[int, ...], List[str]] = {}
+        for name, (bounds, _) in zones.items():
+            members.setdefault(tuple(sorted(bounds)), []).append(name)
+
+        groups = {}
+        by_channel: Dict[int, List[Tuple[int, ...]]] = {}
+        for key, names in members.items():
+            if len(names) > MAX_ZONES_PER_GROUP:
+                raise ValueError(f"More than {MAX_ZONES_PER_GROUP} zones on channels {key}")
+            dtype = np.uint8 if len(names) <= 8 else np.uint16 if len(names) <= 16 else np.uint32
+            bitmap = np.zeros((self.bins,) * len(key), dtype=dtype)
+            severities = [zones[n][1] for n in names]
+            low = np.array([[zones[n][0][c][0] for c in key] for n in names])
+            high = np.array([[zones[n][0][c][1] for c in key] for n in names])
+            for bit in range(len(names)):
+                first = self._quantize(low[bit])
+                last = self._quantize(high[bit])
+                cells = tuple(slice(a, b + 1) for a, b in zip(first, last))
+                bitmap[cells] |= dtype(1 << bit)
+            groups[key] = (bitmap, names, severities, low, high)
+            for channel in key:
+                by_channel.setdefault(channel, []).append(key)
+
+        self._groups = groups
+        self._by_channel = by_channel
+        self._dirty = False
+        logger.debug(f"Collision table compiled: {len(self.zones)} zones in {len(groups)} groups, "
+                     f"{self.memory_bytes / 1024:.0f}KB")
+
+    # Queries
+
+    def zones_for_channels(self, channels: Iterable[int]) -> List[str]:
+        """Names of the zones that include any of the channels"""
+        self._ensure_compiled()
+        names = []
+        for key in self._groups_for(channels):
+            names.extend(self._groups[key][1])
+        return names
+
+    def check_positions(self, positions: np.ndarray,
+                        channels: Optional[Iterable[int]] = None) -> List[ZoneHit]:
+        """
+        Zones occupied by a per-channel position vector (NaN = unknown)
+
+        Args:
+            positions: Position per channel
+            channels: Only check zones including these channels (default: all)
+        """
+        self._ensure_compiled()
+        positions = np.asarray(positions, dtype=float)
+        keys = self._groups.keys() if channels is None else self._groups_for(channels)
+        hits = []
+        for key in keys:
+            if max(key) >= len(positions):
+                continue
+            hits.extend(self._lookup_point(key, [float(positions[c]) for c in key]))
+        return hits
+
+    def check_targets(self, targets: Mapping[int, float], positions: np.ndarray) -> List[ZoneHit]:
+        """Zones occupied once all targets are reached, the other channels holding position"""
+        overlay = np.array(positions, dtype=float)
+        for channel, target in targets.items():
+            if 0 <= channel < len(overlay):
+                overlay[channel] = target
+        return self.check_positions(overlay, targets.keys())
+
+    def validate_trajectory(self, frames: np.ndarray, start: Optional[np.ndarray] = None,
+                            first_only: bool = True) -> List[ZoneHit]:
+        """
+        Zones entered by a trajectory table
+
+        Args:
+            frames: (ticks x channels) positions; NaN holds the previous value
+            start: Positions before the first tick (default: unknown)
+            first_only: Report only the first tick at which each zone is entered
+
+        Returns:
+            Hits ordered by tick
+        """
+        self._ensure_compiled()
+        filled = forward_fill(frames, start)
+        ticks = np.arange(len(filled))
+        hits = []
+        for key in self._groups:
+            if max(key) >= filled.shape[1]:
+                continue
+            hits.extend(self._lookup(key, [filled[:, c] for c in key], ticks, first_only))
+        hits.sort(key=lambda hit: hit.tick)
+        return hits
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the compiled bitmaps"""
+        return sum(group[0].nbytes for group in self._groups.values())
+
+    # Internals
+
+    def _ensure_compiled(self):
+        if self._dirty:
+            self.compile()
+
+    def _groups_for(self, channels: Iterable[int]) -> List[Tuple[int, ...]]:
+        keys = []
+        for channel in channels:
+            for key in self._by_channel.get(int(channel), ()):
+                if key not in keys:
+                    keys.append(key)
+        return keys
+
+    def _quantize(self, values: np.ndarray) -> np.ndarray:
+        """Cell index per value; out-of-range values share the edge cells"""
+        clipped = np.clip(np.nan_to_num(np.asarray(values, dtype=float), nan=self.low),
+                          self.low, self.high)
+        return np.minimum(((clipped - self.low) // self.resolution).astype(np.intp), self.bins - 1)
+
+    def _lookup_point(self, key: Tuple[int, ...], values: List[float]) -> List[ZoneHit]:
+        """Single position vector: scalar cell lookup, exact check only on a hit"""
+        if any(v != v for v in values):   # NaN: position unknown
+            return []
+        bitmap, names, severities, low, high = self._groups[key]
+        cell = tuple(min(int((min(max(v, self.low), self.high) - self.low) // self.resolution),
+                         self.bins - 1) for v in values)
+        mask = int(bitmap[cell])
+        hits = []
+        bit = 0
+        while mask:
+            if mask & 1 and all(low[bit, d] <= v <= high[bit, d] for d, v in enumerate(values)):
+                hits.append(ZoneHit(names[bit], severities[bit], key, tuple(values)))
+            mask >>= 1
+            bit += 1
+        return hits
+
+    def _lookup(self, key: Tuple[int, ...], coords: Sequence[np.ndarray],
+                ticks: Optional[np.ndarray], first_only: bool) -> List[ZoneHit]:
+        bitmap, names, severities, low, high = self._groups[key]
+        masks = bitmap[tuple(self._quantize(c) for c in coords)]
+        known = np.all([~np.isnan(c) for c in coords], axis=0)
+        candidates = np.flatnonzero((masks != 0) & known)
+        if not len(candidates):
+            return []
+
+        hits = []
+        for bit, name in enumerate(names):
+            rows = candidates[(masks[candidates] >> bit) & 1 == 1]
+            if not len(rows):
+                continue
+            inside = np.ones(len(rows), dtype=bool)
+            for dim, values in enumerate(coords):
+                inside &= (values[rows] >= low[bit, dim]) & (values[rows] <= high[bit, dim])
+            rows = rows[inside]
+            if first_only:
+                rows = rows[:1]
+            for row in rows:
+                hits.append(ZoneHit(name, severities[bit], key,
+                                    tuple(float(values[row]) for values in coords),
+                                    int(ticks[row]) if ticks is not None else -1))
+        return hits
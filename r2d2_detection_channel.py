@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+R2D2 Detection Channel
+======================
+
+Detections-only delta channel between the vision system and the behavior
+services.
+
+The dashboard stream (character_vision_data) carries a base64 JPEG of every
+frame, around 50-100 KB of JSON, while the behavioral engines and the
+environmental awareness system only read the detections from it. This
+channel sends the detections alone, as compact tracks, and only what
+changed since the previous message:
+
+    {"type": "vision_detections", "s": 41, "f": 1288, "t": 1718900000.12,
+     "k": 0, "u": [[3, "person", 0.91, 102, 40, 260, 470, "Jedi"]], "r": [2]}
+
+    s  message sequence number (per connection)
+    f  vision frame id
+    t  frame time (epoch seconds)
+    k  1 for a keyframe (the full track set), 0 for a delta
+    u  new or changed tracks: [track_id, class, confidence, x1, y1, x2, y2, character?]
+    r  ids of removed tracks
+
+Tracks are matched frame to frame by class and box overlap. A track counts
+as changed when its box moves by more than a few pixels, its confidence
+moves by more than a few hundredths or its character label changes, so
+detector jitter does not produce messages. Frames with no change are not
+sent at all; a keyframe goes out every `keyframe_interval` frames (and first
+on every connection), which also serves as the heartbeat. The decoder drops
+deltas after a sequence gap until the next keyframe resynchronizes it, and
+rebuilds the detections / character_detections view the existing
+process_vision_data methods consume.
+
+Features:
+- Compact detections-only messages, no image
+- New / changed / removed track deltas with jitter tolerance
+- Periodic keyframes and sequence-gap resynchronization
+- Decoder output compatible with character_vision_data consumers
+
+Usage:
+    # Vision server, one encoder per subscribed connection
+    encoder = DetectionDeltaEncoder()
+    message = encoder.encode(detections, frame_id, frame_time, character_detections)
+    if message is not None:
+        await websocket.send(json.dumps(message))
+
+    # Behavior service
+    decoder = DetectionDeltaDecoder()
+    async with websockets.connect(detection_channel_uri(8767)) as websocket:
+        async for raw in websocket:
+            view = decoder.apply(json.loads(raw))
+            if view is not None:
+                engine.process_vision_data(view)
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DETECTION_CHANNEL_PATH = '/detections'
+MESSAGE_TYPE = 'vision_detections'
+
+DEFAULT_KEYFRAME_INTERVAL = 30      # Frames (about 2.5s at the 12 FPS stream)
+DEFAULT_POSITION_TOLERANCE = 4.0    # Pixels of box movement ignored
+DEFAULT_CONFIDENCE_TOLERANCE = 0.05
+DEFAULT_MATCH_IOU = 0.3             # Minimum overlap to continue a track
+
+
+def detection_channel_uri(port: int, host: str = 'localhost') -> str:
+    """WebSocket URI of the detection channel on a vision server"""
+    return f"ws://{host}:{port}{DETECTION_CHANNEL_PATH}"
+
+
+def request_path(websocket) -> str:
+    """Request path of a server-side connection (legacy and new websockets APIs)"""
+    path = getattr(websocket, 'path', None)
+    if path is None:
+        path = getattr(getattr(websocket, 'request', None), 'path', '')
+    return path or ''
+
+
+def _iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (n x 4) and (m x 4) xyxy boxes"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.where(union > 0, union, 1), 0.0)
+
+
+# ==========================================
+# ENCODER (vision side)
+# ==========================================
+
+class DetectionDeltaEncoder:
+    """Turns per-frame detections into track deltas for one subscriber"""
+
+    def __init__(self, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+                 position_tolerance: float = DEFAULT_POSITION_TOLERANCE,
+                 confidence_tolerance: float = DEFAULT_CONFIDENCE_TOLERANCE,
+                 match_iou: float = DEFAULT_MATCH_IOU):
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.position_tolerance = position_tolerance
+        self.confidence_tolerance = confidence_tolerance
+        self.match_iou = match_iou
+
+        self._tracks: Dict[int, list] = {}        # track_id -> last sent row
+        self._next_track_id = 1
+        self._sequence = 0
+        self._frames_since_keyframe = None        # None until the first keyframe
+
+        self.stats = {'frames': 0, 'keyframes': 0, 'deltas': 0, 'skipped': 0}
+
+    def encode(self, detections: List[Dict[str, Any]], frame_id: int, frame_time: float,
+               character_detections: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Encode one frame
+
+        Args:
+            detections: Detector output (class, confidence, bbox xyxy)
+            frame_id: Vision frame counter
+            frame_time: Frame time in epoch seconds
+            character_detections: Character recognitions; matched to detections by bbox
+
+        Returns:
+            The message to send, or None when nothing changed and no keyframe is due
+        """
+        self.stats['frames'] += 1
+        rows = self._rows(detections, character_detections or [])
+        matched = self._match(rows)
+
+        keyframe = (self._frames_since_keyframe is None or
+                    self._frames_since_keyframe + 1 >= self.keyframe_interval)
+        updates = []
+        current: Dict[int, list] = {}
+        for track_id, row in matched:
+            previous = self._tracks.get(track_id)
+            if previous is not None and not self._changed(previous, row):
+                row = previous                     # Keep the reference the receiver holds
+            else:
+                updates.append([track_id] + row)
+            current[track_id] = row
+        removed = [track_id for track_id in self._tracks if track_id not in current]
+        self._tracks = current
+
+        if keyframe:
+            updates = [[track_id] + row for track_id, row in current.items()]
+            removed = []
+            self._frames_since_keyframe = 0
+            self.stats['keyframes'] += 1
+        elif updates or removed:
+            self._frames_since_keyframe += 1
+            self.stats['deltas'] += 1
+        else:
+            self._frames_since_keyframe += 1
+            self.stats['skipped'] += 1
+            return None
+
+        self._sequence += 1
+        return {'type': MESSAGE_TYPE, 's': self._sequence, 'f': frame_id, 't': frame_time,
+                'k': int(keyframe), 'u': updates, 'r': removed}
+
+    def force_keyframe(self):
+        """Send the full track set with the next frame"""
+        self._frames_since_keyframe = None
+
+    def _rows(self, detections, character_detections) -> List[list]:
+        characters = {tuple(c.get('bbox', ())): c.get('character') or c.get('name')
+                      for c in character_detections}
+        rows = []
+        for detection in detections:
+            bbox = detection.get('bbox', [0, 0, 0, 0])
+            row = [detection.get('class', 'unknown'), round(float(detection.get('confidence', 0.0)), 2)]
+            row += [int(round(v)) for v in bbox[:4]]
+            character = characters.get(tuple(bbox))
+            if character:
+                row.append(character)
+            rows.append(row)
+        return rows
+
+    def _match(self, rows: List[list]) -> List[tuple]:
+        """Assign track ids: greedy best-overlap match within each class"""
+        if not rows:
+            return []
+        previous = list(self._tracks.items())
+        assigned: List[Optional[int]] = [None] * len(rows)
+        if previous:
+            new_boxes = np.array([row[2:6] for row in rows], dtype=float)
+            old_boxes = np.array([row[2:6] for _, row in previous], dtype=float)
+            iou = _iou_matrix(new_boxes, old_boxes)
+            same_class = (np.array([row[0] for row in rows], dtype=object)[:, None] ==
+                          np.array([row[0] for _, row in previous], dtype=object)[None, :])
+            iou = np.where(same_class, iou, 0.0)
+            while True:
+                i, j = np.unravel_index(int(np.argmax(iou)), iou.shape)
+                if iou[i, j] < self.match_iou:
+                    break
+                assigned[i] = previous[j][0]
+                iou[i, :] = 0.0
+                iou[:, j] = 0.0
+
+        matched = []
+        for row, track_id in zip(rows, assigned):
+            if track_id is None:
+                track_id = self._next_track_id
+                self._next_track_id += 1
+            matched.append((track_id, row))
+        return matched
+
+    def _changed(self, previous: list, row: list) -> bool:
+        if abs(previous[1] - row[1]) > self.confidence_tolerance:
+            return True
+        if max(abs(a - b) for a, b in zip(previous[2:6], row[2:6])) > self.position_tolerance:
+            return True
+        return previous[6:] != row[6:]
+
+
+# ==========================================
+# DECODER (behavior side)
+# ==========================================
+
+class DetectionDeltaDecoder:
+    """Applies channel messages and rebuilds the per-frame detection view"""
+
+    def __init__(self):
+        self.tracks: Dict[int, Dict[str, Any]] = {}
+        self._sequence: Optional[int] = None
+        self.synchronized = False
+        self.stats = {'messages': 0, 'keyframes': 0, 'deltas': 0, 'gaps': 0, 'dropped': 0}
+
+    def apply(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply a message
+
+        Returns:
+            A character_vision_data style view (detections, character_detections,
+            timestamp, frame_id, added/changed/removed track ids), or None while
+            waiting for a keyframe after a gap
+        """
+        if message.get('type') != MESSAGE_TYPE:
+            return None
+        self.stats['messages'] += 1
+        sequence = message.get('s')
+        keyframe = bool(message.get('k'))
+
+        if not keyframe and self._sequence is not None and sequence != self._sequence + 1:
+            self.stats['gaps'] += 1
+            self.synchronized = False
+            logger.warning(f"Detection channel gap ({self._sequence} -> {sequence}), waiting for keyframe")
+        self._sequence = sequence
+
+        added, changed = [], []
+        if keyframe:
+            self.stats['keyframes'] += 1
+            previous = self.tracks
+            self.tracks = {}
+            for row in message.get('u', []):
+                track = self._track(row)
+                self.tracks[track['track_id']] = track
+                (changed if track['track_id'] in previous else added).append(track['track_id'])
+            removed = [track_id for track_id in previous if track_id not in self.tracks]
+            self.synchronized = True
+        elif not self.synchronized:
+            self.stats['dropped'] += 1
+            return None
+        else:
+            self.stats['deltas'] += 1
+            for row in message.get('u', []):
+                track = self._track(row)
+                (changed if track['track_id'] in self.tracks else added).append(track['track_id'])
+                self.tracks[track['track_id']] = track
+            removed = [track_id for track_id in message.get('r', [])
+                       if self.tracks.pop(track_id, None) is not None]
+
+        return self.view(message.get('t'), message.get('f'), added, changed, removed)
+
+    def view(self, timestamp=None, frame_id=None, added=(), changed=(), removed=()) -> Dict[str, Any]:
+        """Current track set in the character_vision_data layout"""
+        detections = list(self.tracks.values())
+        return {
+            'type': MESSAGE_TYPE,
+            'frame_id': frame_id,
+            'timestamp': timestamp,
+            'detections': detections,
+            'character_detections': [
+                {'name': d['character'], 'character': d['character'], 'confidence': d['confidence'],
+                 'bbox': d['bbox'], 'track_id': d['track_id']}
+                for d in detections if d.get('character')
+            ],
+            'added': list(added),
+            'changed': list(changed),
+            'removed': list(removed)
+        }
+
+    def reset(self):
+        """Forget all state (new connection)"""
+        self.tracks = {}
+        self._sequence = None
+        self.synchronized = False
+
+    @staticmethod
+    def _track(row: list) -> Dict[str, Any]:
+        track = {'track_id': row[0], 'class': row[1], 'confidence': row[2], 'bbox': list(row[3:7])}
+        if len(row) > 7:
+            track['character'] = row[7]
+        return track
@@ -32,7 +32,6 @@ import json
 import logging
 import math
 import numpy as np
-import random
 import threading
 import time
 import websockets
@@ -46,6 +45,11 @@ import queue
 import sys
 import os
 
+from r2d2_behavior_index import BehaviorIndex
+from r2d2_detection_channel import MESSAGE_TYPE, DetectionDeltaDecoder, detection_channel_uri
+from r2d2_event_bus import EventBus, VisionFrame, EnvironmentUpdate, EmergencyStop
+from r2d2_behavior_scheduler import BehaviorScheduler, ScheduledBehavior
+
 # Import existing system components
 sys.path.append('/home/rolo/r2ai')
 try:
@@ -275,6 +279,9 @@ class DisneyBehaviorLibrary:
         }
         self._create_behavior_library()
 
+        # Trigger -> candidate matrices, so selection does not scan the library
+        self.index = BehaviorIndex(self.behaviors, list(PersonalityTrait))
+
     def _create_behavior_library(self):
         """Create comprehensive library of 50+ Disney-quality behaviors"""
 
@@ -726,42 +733,8 @@ class DisneyBehaviorLibrary:
 
     def get_behavior_by_trigger(self, trigger: EnvironmentalTrigger,
                               personality: PersonalityProfile) -> Optional[BehaviorSequence]:
-        """Select best behavior for given trigger and personality state"""
-        candidates = []
-
-        for behavior in self.behaviors.values():
-            if trigger in behavior.environmental_triggers:
-                # Check trait requirements
-                trait_match = True
-                for required_trait, min_value in behavior.required_traits.items():
-                    if personality.get_trait_weight(required_trait) < min_value:
-                        trait_match = False
-                        break
-
-                if trait_match:
-                    candidates.append(behavior)
-
-        if not candidates:
-            return None
-
-        # Select based on personality fit and some randomness
-        scored_candidates = []
-        for behavior in candidates:
-            score = behavior.priority
-
-            # Add personality-based scoring
-            for trait, weight in behavior.required_traits.items():
-                trait_value = personality.get_trait_weight(trait)
-                score += trait_value * 2  # Bonus for strong trait match
-
-            # Add some controlled randomness
-            score += random.uniform(-1, 1)
-
-            scored_candidates.append((score, behavior))
-
-        # Return highest scoring behavior
-        scored_candidates.sort(key=lambda x: x[0], reverse=True)
-        return scored_candidates[0][1]
+        """Select best behavior for given trigger and personality state (indexed)"""
+        return self.index.select(trigger, personality)
 
 # =============================================
 # ADVANCED MOTION CHOREOGRAPHY SYSTEM
@@ -773,6 +746,7 @@ class MotionChoreographer:
     def __init__(self, servo_controller):
         self.servo_controller = servo_controller
         self.active_sequences: Dict[str, Dict] = {}
+        self.yield_requests: set = set()   # Sequences to stop at their next keyframe
         self.motion_constraints = {
             'max_velocity': 2000,      # μs per second
             'max_acceleration': 5000,  # μs per second^2
@@ -781,7 +755,8 @@ class MotionChoreographer:
         }
 
     async def execute_choreography(self, keyframes: List[ServoMotionKeyframe],
-                                 sequence_id: str = None) -> bool:
+                                 sequence_id: str = None,
+                                 on_first_motion: Optional[Callable[[], None]] = None) -> bool:
         """Execute sophisticated motion choreography with Disney-quality smoothness"""
         try:
             if not keyframes:
@@ -793,7 +768,7 @@ class MotionChoreographer:
             motion_plan = self._plan_motion_trajectories(keyframes)
 
             # Execute with real-time interpolation
-            return await self._execute_motion_plan(motion_plan, sequence_id)
+            return await self._execute_motion_plan(motion_plan, sequence_id, on_first_motion)
 
         except Exception as e:
             logger.error(f"Motion choreography error: {e}")
@@ -814,6 +789,10 @@ class MotionChoreographer:
                 velocity_curve=next_frame.velocity_curve
             )
 
+            # Reaching a keyframe is a safe point to hand over to another behavior
+            if trajectory:
+                trajectory[-1]['keyframe'] = True
+
             motion_plan.extend(trajectory)
 
         return motion_plan
@@ -905,7 +884,8 @@ class MotionChoreographer:
         else:
             return t
 
-    async def _execute_motion_plan(self, motion_plan: List[Dict], sequence_id: str) -> bool:
+    async def _execute_motion_plan(self, motion_plan: List[Dict], sequence_id: str,
+                                   on_first_motion: Optional[Callable[[], None]] = None) -> bool:
         """Execute motion plan with precise timing"""
         try:
             if not motion_plan:
@@ -939,13 +919,23 @@ class MotionChoreographer:
 
                 if not success:
                     logger.warning(f"Motion step failed at {step}")
+                if step == 0 and on_first_motion:
+                    on_first_motion()
 
                 # Update sequence progress
                 self.active_sequences[sequence_id]['current_step'] = step
 
+                # Yield to a higher-priority behavior once a keyframe is reached
+                if motion_point.get('keyframe') and sequence_id in self.yield_requests:
+                    logger.info(f"Motion sequence {sequence_id} yielded at step {step}")
+                    self.yield_requests.discard(sequence_id)
+                    self.active_sequences.pop(sequence_id, None)
+                    return False
+
             # Clean up completed sequence
             if sequence_id in self.active_sequences:
                 del self.active_sequences[sequence_id]
+            self.yield_requests.discard(sequence_id)
 
             return True
 
@@ -974,6 +964,10 @@ class MotionChoreographer:
             logger.error(f"Simultaneous move error: {e}")
             return False
 
+    def request_yield(self, sequence_id: str):
+        """Stop a sequence at its next keyframe (also if it has not started yet)"""
+        self.yield_requests.add(sequence_id)
+
     def stop_sequence(self, sequence_id: str = None):
         """Stop specific sequence or all sequences"""
         if sequence_id:
@@ -983,6 +977,7 @@ class MotionChoreographer:
         else:
             # Stop all sequences
             self.active_sequences.clear()
+            self.yield_requests.clear()
             logger.info("Stopped all motion sequences")
 
 # =============================================
@@ -1049,7 +1044,11 @@ class DisneyBehavioralIntelligenceEngine:
 
         # Thread management
         self.running = False
-        self.behavior_queue = asyncio.PriorityQueue()
+        self.scheduler = BehaviorScheduler(
+            self._execute_behavior, self._preempt_behavior, max_age=30.0,
+            allow_preemption=self.config['behavior_interruption_allowed'], name='disney')
+        self._behavior_yield: Optional[asyncio.Event] = None
+        self.event_bus: Optional[EventBus] = None
 
         # Initialize subsystems
         self._initialize_subsystems()
@@ -1088,6 +1087,10 @@ class DisneyBehavioralIntelligenceEngine:
             detections = vision_data.get('detections', [])
             character_detections = vision_data.get('character_detections', [])
 
+            # Reaction latency is measured from the frame, when it carries its capture time
+            timestamp = vision_data.get('timestamp')
+            trigger_time = timestamp if isinstance(timestamp, (int, float)) else time.time()
+
             # Update environmental context
             people = [d for d in detections if d.get('class') == 'person']
             self.environmental_context['people_count'] = len(people)
@@ -1113,9 +1116,9 @@ class DisneyBehavioralIntelligenceEngine:
             # Generate environmental triggers
             triggers = self._generate_environmental_triggers(detections, character_detections)
 
-            # Process triggers
+            # Process triggers (queued directly: the scheduler wakes without a poll)
             for trigger in triggers:
-                asyncio.create_task(self._process_environmental_trigger(trigger))
+                self._process_environmental_trigger(trigger, trigger_time)
 
         except Exception as e:
             logger.error(f"Vision data processing error: {e}")
@@ -1155,7 +1158,8 @@ class DisneyBehavioralIntelligenceEngine:
 
         return triggers
 
-    async def _process_environmental_trigger(self, trigger: EnvironmentalTrigger):
+    def _process_environmental_trigger(self, trigger: EnvironmentalTrigger,
+                                       trigger_time: Optional[float] = None):
         """Process environmental trigger and potentially initiate behavior"""
         try:
             self.metrics['environmental_triggers'] += 1
@@ -1166,7 +1170,7 @@ class DisneyBehavioralIntelligenceEngine:
             if behavior:
                 # Check if behavior can be executed
                 if self._can_execute_behavior(behavior):
-                    await self._queue_behavior(behavior, trigger)
+                    self._queue_behavior(behavior, trigger, trigger_time)
 
         except Exception as e:
             logger.error(f"Environmental trigger processing error: {e}")
@@ -1174,40 +1178,24 @@ class DisneyBehavioralIntelligenceEngine:
     def _can_execute_behavior(self, behavior: BehaviorSequence) -> bool:
         """Determine if a behavior can be executed given current conditions"""
 
-        # Check if currently executing behavior
-        if self.active_behavior and not self.config['behavior_interruption_allowed']:
-            return False
-
-        # Check if interruption is allowed based on priority
-        if self.active_behavior and behavior.priority <= self.active_behavior.priority:
-            return False
-
         # Check if state is blocked
         if self.current_state in behavior.blocking_states:
             return False
 
-        # Check cooldown
-        last_execution = None
-        for hist_behavior, timestamp in self.behavior_history:
-            if hist_behavior == behavior.name:
-                last_execution = timestamp
-                break
-
-        if last_execution and (time.time() - last_execution) < behavior.cooldown_seconds:
+        # Check cooldown (ordering against the running behavior is the scheduler's job)
+        if self.scheduler.is_cooling_down(behavior.name):
             return False
 
         return True
 
-    async def _queue_behavior(self, behavior: BehaviorSequence, trigger: EnvironmentalTrigger):
+    def _queue_behavior(self, behavior: BehaviorSequence, trigger: EnvironmentalTrigger,
+                        trigger_time: Optional[float] = None) -> Optional[ScheduledBehavior]:
         """Queue behavior for execution with priority handling"""
         try:
-            priority_score = -behavior.priority  # Negative for high priority first
-            await self.behavior_queue.put((priority_score, time.time(), behavior, trigger))
-
-            logger.info(f"Queued behavior: {behavior.name} (priority: {behavior.priority})")
-
+            return self.scheduler.submit(behavior, trigger, trigger_time)
         except Exception as e:
             logger.error(f"Behavior queuing error: {e}")
+            return None
 
     # ==========================================
     # BEHAVIOR EXECUTION SYSTEM
@@ -1217,33 +1205,21 @@ class DisneyBehavioralIntelligenceEngine:
         """Main behavior execution loop"""
         logger.info("Starting Disney behavior execution loop")
 
-        while self.running:
-            try:
-                # Check for idle timeout
-                await self._check_idle_timeout()
-
-                # Process behavior queue
-                if not self.behavior_queue.empty():
-                    try:
-                        priority_score, queue_time, behavior, trigger = await asyncio.wait_for(
-                            self.behavior_queue.get(), timeout=0.1
-                        )
-
-                        # Check if behavior is still valid (not too old)
-                        if time.time() - queue_time < 30.0:
-                            await self._execute_behavior(behavior, trigger)
-
-                    except asyncio.TimeoutError:
-                        pass
-
-                # Monitor active behavior completion
-                await self._monitor_active_behavior()
-
-                await asyncio.sleep(0.05)  # 20Hz loop
+        # Behaviors are started by the scheduler as soon as they are queued;
+        # this loop only generates idle triggers
+        scheduler_task = asyncio.create_task(self.scheduler.run())
+        try:
+            while self.running:
+                try:
+                    await self._check_idle_timeout()
+                    await asyncio.sleep(1.0)
 
-            except Exception as e:
-                logger.error(f"Behavior execution loop error: {e}")
-                await asyncio.sleep(1.0)
+                except Exception as e:
+                    logger.error(f"Behavior execution loop error: {e}")
+                    await asyncio.sleep(1.0)
+        finally:
+            self.scheduler.stop()
+            await asyncio.gather(scheduler_task, return_exceptions=True)
 
     async def _check_idle_timeout(self):
         """Check if system has been idle too long and trigger behavior"""
@@ -1251,19 +1227,22 @@ class DisneyBehavioralIntelligenceEngine:
             time.time() - self.state_start_time > self.config['idle_timeout_seconds']):
 
             # Generate idle timeout trigger
-            await self._process_environmental_trigger(EnvironmentalTrigger.IDLE_TIMEOUT)
-
-    async def _monitor_active_behavior(self):
-        """Monitor and complete active behaviors"""
-        if (self.active_behavior and self.behavior_start_time and
-            time.time() - self.behavior_start_time > self.active_behavior.duration):
-
-            await self._complete_behavior()
-
-    async def _execute_behavior(self, behavior: BehaviorSequence, trigger: EnvironmentalTrigger):
-        """Execute a complete behavioral sequence"""
+            self._process_environmental_trigger(EnvironmentalTrigger.IDLE_TIMEOUT)
+
+    def _preempt_behavior(self, entry: ScheduledBehavior):
+        """Ask the running behavior to yield: motion stops at its next keyframe"""
+        if self.motion_choreographer and entry.sequence_id:
+            self.motion_choreographer.request_yield(entry.sequence_id)
+        if self._behavior_yield is not None:
+            self._behavior_yield.set()
+
+    async def _execute_behavior(self, entry: ScheduledBehavior):
+        """Execute a complete behavioral sequence (started by the scheduler)"""
+        behavior = entry.behavior
         try:
             logger.info(f"🎭 Executing Disney behavior: {behavior.name}")
+            entry.sequence_id = f"{behavior.name}_{int(time.time())}"
+            self._behavior_yield = asyncio.Event()
 
             # Update state
             self.previous_state = self.current_state
@@ -1280,21 +1259,35 @@ class DisneyBehavioralIntelligenceEngine:
             self.behavior_history.appendleft((behavior.name, time.time()))
 
             # Execute coordinated multi-system performance
-            await self._execute_coordinated_performance(behavior)
+            await self._execute_coordinated_performance(behavior, entry)
+
+            # Hold the character for the rest of the behavior (nothing moving: yield at once)
+            remaining = behavior.duration - (time.time() - entry.started_at)
+            if remaining > 0 and not entry.preempt_requested:
+                try:
+                    await asyncio.wait_for(self._behavior_yield.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
 
         except Exception as e:
             logger.error(f"Behavior execution error: {e}")
-            await self._complete_behavior()
+        finally:
+            # An emergency stop clears the active behavior and keeps its own state
+            if self.active_behavior is behavior:
+                await self._complete_behavior()
 
-    async def _execute_coordinated_performance(self, behavior: BehaviorSequence):
+    async def _execute_coordinated_performance(self, behavior: BehaviorSequence,
+                                               entry: Optional[ScheduledBehavior] = None):
         """Execute coordinated multi-system performance"""
         try:
+            sequence_id = entry.sequence_id if entry else f"{behavior.name}_{int(time.time())}"
+            on_first_motion = (lambda: self.scheduler.record_first_motion(entry)) if entry else None
+
             # Start motion choreography
             if behavior.servo_keyframes and self.motion_choreographer:
                 motion_task = asyncio.create_task(
                     self.motion_choreographer.execute_choreography(
-                        behavior.servo_keyframes,
-                        f"{behavior.name}_{int(time.time())}"
+                        behavior.servo_keyframes, sequence_id, on_first_motion
                     )
                 )
             else:
@@ -1306,11 +1299,18 @@ class DisneyBehavioralIntelligenceEngine:
             else:
                 audio_task = None
 
-            # Wait for coordinated completion
-            tasks = [task for task in [motion_task, audio_task] if task is not None]
-
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
+            # Wait for coordinated completion; audio stops when the motion yields
+            if motion_task is not None:
+                await asyncio.gather(motion_task, return_exceptions=True)
+            if audio_task is not None:
+                if motion_task is None and entry is not None:
+                    # No keyframes: any moment is a safe point to yield
+                    yield_wait = asyncio.ensure_future(self._behavior_yield.wait())
+                    await asyncio.wait({audio_task, yield_wait}, return_when=asyncio.FIRST_COMPLETED)
+                    yield_wait.cancel()
+                if entry is not None and entry.preempt_requested:
+                    audio_task.cancel()
+                await asyncio.gather(audio_task, return_exceptions=True)
 
         except Exception as e:
             logger.error(f"Coordinated performance error: {e}")
@@ -1393,6 +1393,9 @@ class DisneyBehavioralIntelligenceEngine:
 
             self.metrics['personality_adaptations'] += 1
 
+            # Trait weights changed: selection scores must be recomputed
+            self.behavior_library.index.invalidate()
+
         except Exception as e:
             logger.error(f"Personality adaptation error: {e}")
 
@@ -1400,7 +1403,8 @@ class DisneyBehavioralIntelligenceEngine:
     # MANUAL CONTROL INTERFACE
     # ==========================================
 
-    def execute_manual_behavior(self, behavior_name: str, params: Dict[str, Any] = None) -> bool:
+    def execute_manual_behavior(self, behavior_name: str, params: Dict[str, Any] = None,
+                                trigger_time: Optional[float] = None) -> bool:
         """Execute behavior manually (from dashboard or API)"""
         try:
             if behavior_name not in self.behavior_library.behaviors:
@@ -1413,7 +1417,7 @@ class DisneyBehavioralIntelligenceEngine:
             trigger = EnvironmentalTrigger.MANUAL_COMMAND
 
             # Queue behavior with high priority
-            asyncio.create_task(self._queue_behavior(behavior, trigger))
+            self._queue_behavior(behavior, trigger, trigger_time)
 
             logger.info(f"Manual behavior queued: {behavior_name}")
             return True
@@ -1458,17 +1462,56 @@ class DisneyBehavioralIntelligenceEngine:
                 **self.metrics,
                 'uptime_seconds': time.time() - self.metrics['uptime_start'],
                 'behaviors_available': len(self.behavior_library.behaviors),
-                'queue_size': self.behavior_queue.qsize()
+                'queue_size': self.scheduler.queue_size,
+                'scheduler': self.scheduler.get_status()
             }
         }
 
+    # ==========================================
+    # EVENT BUS INTEGRATION
+    # ==========================================
+
+    def attach_event_bus(self, bus: EventBus):
+        """Take vision frames and environmental triggers from co-located services over the bus"""
+        self.event_bus = bus
+        self.scheduler.on_first_motion = lambda entry: bus.record_action(
+            entry.name, entry.trigger_time, 'motion', source='behavior')
+        logger.info(f"Behavioral intelligence attached to event bus '{bus.name}'")
+
+    async def _consume_event_bus(self):
+        """Handle bus events (replaces the engine's own vision connection)"""
+        vision = self.event_bus.subscribe(VisionFrame, maxsize=4)
+        environment = self.event_bus.subscribe(EnvironmentUpdate)
+        emergency = self.event_bus.subscribe(EmergencyStop)
+        try:
+            await asyncio.gather(vision.run(self._on_vision_frame),
+                                 environment.run(self._on_environment_update),
+                                 emergency.run(lambda event: self._emergency_stop()))
+        finally:
+            for subscription in (vision, environment, emergency):
+                subscription.close()
+
+    def _on_vision_frame(self, event: VisionFrame):
+        self.process_vision_data({'detections': event.detections,
+                                  'character_detections': event.character_detections,
+                                  'timestamp': event.trigger_time})
+
+    def _on_environment_update(self, event: EnvironmentUpdate):
+        for value in event.trigger_values():
+            try:
+                trigger = EnvironmentalTrigger(value)
+            except ValueError:
+                continue
+            self._process_environmental_trigger(trigger, event.trigger_time)
+
     # ==========================================
     # WEBSOCKET INTEGRATION
     # ==========================================
 
     async def connect_to_vision_system(self):
-        """Connect to vision system WebSocket"""
-        uri = f"ws://localhost:{self.config['vision_websocket_port']}"
+        """Subscribe to the vision system's detections-only channel"""
+        uri = detection_channel_uri(self.config['vision_websocket_port'])
+        decoder = DetectionDeltaDecoder()
 
         while self.running:
             try:
@@ -1476,13 +1519,19 @@ class DisneyBehavioralIntelligenceEngine:
 
                 async with websockets.connect(uri) as websocket:
                     self.vision_client = websocket
-                    logger.info("✅ Connected to vision system")
+                    decoder.reset()
+                    logger.info("✅ Connected to vision system detection channel")
 
                     # Listen for vision data
                     async for message in websocket:
                         try:
                             data = json.loads(message)
-                            if data.get('type') == 'character_vision_data':
+                            if data.get('type') == MESSAGE_TYPE:
+                                view = decoder.apply(data)
+                                if view is not None:
+                                    self.process_vision_data(view)
+                            elif data.get('type') == 'character_vision_data':
+                                # Vision server without the detection channel
                                 self.process_vision_data(data)
                         except json.JSONDecodeError:
                             logger.warning("Invalid JSON from vision system")
@@ -1592,11 +1641,7 @@ class DisneyBehavioralIntelligenceEngine:
                 pass
 
             # Clear behavior queue
-            while not self.behavior_queue.empty():
-                try:
-                    await asyncio.wait_for(self.behavior_queue.get(), timeout=0.1)
-                except asyncio.TimeoutError:
-                    break
+            self.scheduler.clear()
 
             # Reset to safe state
             self.active_behavior = None
@@ -1621,7 +1666,8 @@ class DisneyBehavioralIntelligenceEngine:
         # Start all async tasks
         tasks = [
             asyncio.create_task(self._behavior_execution_loop()),
-            asyncio.create_task(self.connect_to_vision_system()),
+            asyncio.create_task(self._consume_event_bus() if self.event_bus
+                                else self.connect_to_vision_system()),
             asyncio.create_task(self.start_dashboard_websocket_server())
         ]
 
@@ -32,6 +32,9 @@ from pathlib import Path
 from pololu_maestro_controller import PololuMaestroController
 from r2d2_servo_config_manager import R2D2ServoConfigManager, ServoConfiguration
 from r2d2_animatronic_sequences import R2D2AnimatronicSequencer
+from r2d2_safety_kernel import (
+    SafetyKernel, SafetyEvent, PositionLimitRule, StallRule, SEVERITY_CRITICAL, get_safety_kernel
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -88,12 +91,21 @@ class SafetyAlert:
     acknowledged: bool = False
     auto_resolved: bool = False
 
+# Kernel rule -> emergency trigger
+KERNEL_RULE_TRIGGERS = {
+    'emergency_position_limit': EmergencyTrigger.POSITION_ERROR,
+    'emergency_stall': EmergencyTrigger.SERVO_STALL,
+}
+
+KERNEL_OWNER = 'emergency_safety'
+
 class R2D2EmergencySafetySystem:
     """Comprehensive Emergency Safety System for R2D2 Animatronics"""
 
     def __init__(self, controller: PololuMaestroController,
                  config_manager: R2D2ServoConfigManager,
-                 sequencer: Optional[R2D2AnimatronicSequencer] = None):
+                 sequencer: Optional[R2D2AnimatronicSequencer] = None,
+                 kernel: Optional[SafetyKernel] = None):
         self.controller = controller
         self.config_manager = config_manager
         self.sequencer = sequencer
@@ -110,7 +122,6 @@ class R2D2EmergencySafetySystem:
 
         # Monitoring and alerts
         self.safety_alerts: List[SafetyAlert] = []
-        self.monitoring_thread: Optional[threading.Thread] = None
         self.alert_callbacks: List[Callable] = []
         self.emergency_callbacks: List[Callable] = []
 
@@ -126,6 +137,15 @@ class R2D2EmergencySafetySystem:
         # Initialize safety limits
         self._initialize_safety_limits()
 
+        # Safety kernel (shared): rules run on each controller position snapshot
+        self.kernel = kernel or get_safety_kernel()
+        self._configure_kernel_rules()
+        self.kernel.add_stop_handler(self._on_kernel_stop, owner=KERNEL_OWNER)
+        self.kernel.add_event_handler(self._on_kernel_event, owner=KERNEL_OWNER)
+        self._subscribed = False
+        self._communication_interval = 0.1
+        self._last_communication_check = 0.0
+
         # Setup signal handlers for emergency stop
         self._setup_signal_handlers()
 
@@ -184,108 +204,83 @@ class R2D2EmergencySafetySystem:
 
     def start_safety_monitoring(self, monitoring_interval: float = 0.1):
         """
-        Start continuous safety monitoring
+        Start safety monitoring
+
+        Position and stall rules are evaluated by the safety kernel on every
+        controller position snapshot as it arrives; nothing polls.
 
         Args:
-            monitoring_interval: Monitoring interval in seconds (default 0.1s = 10Hz)
+            monitoring_interval: Minimum interval in seconds between controller
+                error-status reads (default 0.1s)
         """
         if self.safety_monitoring_active:
             return
 
         self.safety_monitoring_active = True
         self.monitoring_start_time = time.time()
+        self._communication_interval = monitoring_interval
 
-        def safety_monitoring_loop():
-            logger.info(f"🔍 Safety monitoring started (interval: {monitoring_interval}s)")
-
-            while self.safety_monitoring_active:
-                try:
-                    start_time = time.time()
-
-                    # Perform safety checks
-                    self._check_servo_positions()
-                    self._check_servo_stalls()
-                    self._check_communication()
-                    self._check_system_health()
-
-                    # Maintain monitoring frequency
-                    elapsed = time.time() - start_time
-                    sleep_time = max(0, monitoring_interval - elapsed)
-                    if sleep_time > 0:
-                        time.sleep(sleep_time)
+        if not self._subscribed:
+            self.controller.add_position_listener(self._on_positions)
+            self.controller.add_command_listener(self.kernel.record_command)
+            self._subscribed = True
 
-                except Exception as e:
-                    logger.error(f"Safety monitoring error: {e}")
-                    self._trigger_alert(EmergencyLevel.WARNING, EmergencyTrigger.SYSTEM_ERROR,
-                                      None, f"Monitoring loop error: {e}")
-                    time.sleep(monitoring_interval)
-
-        self.monitoring_thread = threading.Thread(
-            target=safety_monitoring_loop,
-            daemon=True,
-            name="SafetyMonitor"
-        )
-        self.monitoring_thread.start()
+        logger.info(f"🔍 Safety monitoring started (event-driven, error check interval: {monitoring_interval}s)")
 
     def stop_safety_monitoring(self):
         """Stop safety monitoring"""
         self.safety_monitoring_active = False
-        if self.monitoring_thread and self.monitoring_thread.is_alive():
-            self.monitoring_thread.join(timeout=2.0)
         logger.info("⏹️ Safety monitoring stopped")
 
-    def _check_servo_positions(self):
-        """Check servo positions for safety violations"""
-        for channel, config in self.config_manager.get_all_configs().items():
-            if not config.enabled:
-                continue
-
-            # Get current position
-            current_position_us = self.controller.get_servo_position_microseconds(channel)
-            if current_position_us is None:
-                continue
-
-            safety_limit = self.safety_limits.get(channel)
-            if not safety_limit:
-                continue
+    def _configure_kernel_rules(self):
+        """Position limits and stall detection for enabled servos (kernel units: quarter-microseconds)"""
+        configs = {channel: config for channel, config in self.config_manager.get_all_configs().items()
+                   if config.enabled and channel in self.safety_limits}
+
+        self.kernel.add_rule(PositionLimitRule({
+            channel: (self.safety_limits[channel].min_position_us * 4,
+                      self.safety_limits[channel].max_position_us * 4)
+            for channel in configs
+        }, name='emergency_position_limit'), owner=KERNEL_OWNER)
+        self.kernel.add_rule(StallRule(
+            tolerance={channel: limit.position_tolerance_us * 4 for channel, limit in self.safety_limits.items()},
+            stall_time={channel: limit.stall_detection_time_s for channel, limit in self.safety_limits.items()},
+            channels=[channel for channel, config in configs.items() if config.alert_on_stall],
+            name='emergency_stall'
+        ), owner=KERNEL_OWNER)
+
+    def _on_positions(self, fields: Dict, timestamp: float):
+        """Controller position snapshot (quarter-microseconds)"""
+        if not self.safety_monitoring_active:
+            return
 
-            # Check position limits
-            if (current_position_us < safety_limit.min_position_us or
-                current_position_us > safety_limit.max_position_us):
+        try:
+            self.kernel.publish_sample(fields, timestamp)
 
-                self._trigger_alert(
-                    EmergencyLevel.CRITICAL,
-                    EmergencyTrigger.POSITION_ERROR,
-                    channel,
-                    f"Servo {channel} position {current_position_us:.1f}μs outside safe range "
-                    f"[{safety_limit.min_position_us:.1f}, {safety_limit.max_position_us:.1f}]"
-                )
+            if timestamp - self._last_communication_check >= self._communication_interval:
+                self._last_communication_check = timestamp
+                self._check_communication()
 
-                # Immediate emergency stop for critical position violations
-                self.emergency_stop(EmergencyTrigger.POSITION_ERROR,
-                                  f"Critical position violation on channel {channel}")
+        except Exception as e:
+            logger.error(f"Safety monitoring error: {e}")
+            self._trigger_alert(EmergencyLevel.WARNING, EmergencyTrigger.SYSTEM_ERROR,
+                              None, f"Monitoring error: {e}")
 
-    def _check_servo_stalls(self):
-        """Check for servo stall conditions"""
-        for channel, config in self.config_manager.get_all_configs().items():
-            if not config.enabled or not config.alert_on_stall:
-                continue
+    def _on_kernel_stop(self, event: SafetyEvent):
+        """Critical kernel event: alert and emergency stop immediately"""
+        if self.safety_monitoring_active:
+            trigger = KERNEL_RULE_TRIGGERS.get(event.rule, EmergencyTrigger.SYSTEM_ERROR)
+            self._trigger_alert(EmergencyLevel.CRITICAL, trigger, event.channel, event.message)
 
-            # Check if servo is supposed to be moving but position hasn't changed
-            is_moving = self.controller.is_servo_moving(channel)
-            if not is_moving:
-                continue  # Not moving, so can't be stalled
+    def _on_kernel_event(self, event: SafetyEvent):
+        """Remaining kernel events become alerts"""
+        if not self.safety_monitoring_active or event is self.kernel.stop_event:
+            return
 
-            # This is a simplified stall detection - in real implementation,
-            # you would track position changes over time
-            safety_limit = self.safety_limits.get(channel)
-            if safety_limit:
-                self._trigger_alert(
-                    EmergencyLevel.WARNING,
-                    EmergencyTrigger.SERVO_STALL,
-                    channel,
-                    f"Potential stall detected on servo {channel}"
-                )
+        level = EmergencyLevel.CRITICAL if event.severity == SEVERITY_CRITICAL else EmergencyLevel.WARNING
+        trigger = KERNEL_RULE_TRIGGERS.get(event.rule, EmergencyTrigger.SYSTEM_ERROR)
+        self._trigger_alert(level, trigger, event.channel if event.channel >= 0 else None, event.message)
+        self._check_system_health()
 
     def _check_communication(self):
         """Check communication with servo controller"""
@@ -469,6 +464,10 @@ class R2D2EmergencySafetySystem:
             logger.error("Emergency stop reset requires operator confirmation")
             return False
 
+        if not self.kernel.reset(KERNEL_OWNER):
+            logger.error("Emergency stop reset refused - safety kernel still latched by another subsystem")
+            return False
+
         logger.info("🔓 Resetting emergency stop...")
 
         try:
@@ -587,6 +586,7 @@ class R2D2EmergencySafetySystem:
             "emergency_stops": self.emergency_stops,
             "last_emergency": self.last_emergency_time,
             "safety_zones": {ch: zone.value for ch, zone in self.safety_zones.items()},
+            "kernel": self.kernel.get_status(),
             "timestamp": time.time()
         }
 
@@ -46,6 +46,9 @@ import cv2
 # Import system components
 sys.path.append('/home/rolo/r2ai')
 
+from r2d2_detection_channel import MESSAGE_TYPE, DetectionDeltaDecoder, detection_channel_uri
+from r2d2_event_bus import EventBus, EnvironmentUpdate, VisionFrame
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -226,8 +229,16 @@ class R2D2EnvironmentalAwareness:
             'behavioral_client': None
         }
 
+        # In-process event bus (replaces the behavioral WebSocket when attached)
+        self.event_bus: Optional[EventBus] = None
+
         logger.info("R2D2 Environmental Awareness System initialized")
 
+    def attach_event_bus(self, bus: EventBus):
+        """Publish vision frames and triggers on the bus instead of the behavioral WebSocket"""
+        self.event_bus = bus
+        logger.info(f"Environmental awareness publishing on event bus '{bus.name}'")
+
     async def start_environmental_processing(self):
         """Start the environmental awareness processing system"""
         logger.info("🌍 Starting R2D2 Environmental Awareness System")
@@ -252,7 +263,8 @@ class R2D2EnvironmentalAwareness:
         # Start connection tasks
         tasks = [
             asyncio.create_task(self._connect_to_vision_system()),
-            asyncio.create_task(self._connect_to_behavioral_system())
+            asyncio.create_task(self._publish_environment_loop() if self.event_bus
+                                else self._connect_to_behavioral_system())
         ]
 
         try:
@@ -308,8 +320,9 @@ class R2D2EnvironmentalAwareness:
                 time.sleep(10.0)
 
     async def _connect_to_vision_system(self):
-        """Connect to the vision system WebSocket"""
-        uri = f"ws://localhost:{self.vision_websocket_port}"
+        """Subscribe to the vision system's detections-only channel"""
+        uri = detection_channel_uri(self.vision_websocket_port)
+        decoder = DetectionDeltaDecoder()
 
         while self.running:
             try:
@@ -317,13 +330,19 @@ class R2D2EnvironmentalAwareness:
 
                 async with websockets.connect(uri) as websocket:
                     self.connections['vision_client'] = websocket
-                    logger.info("✅ Connected to vision system")
+                    decoder.reset()
+                    logger.info("✅ Connected to vision system detection channel")
 
-                    # Listen for vision data
+                    # Listen for detection deltas (full frames from servers without the channel)
                     async for message in websocket:
                         try:
                             data = json.loads(message)
-                            await self._process_vision_data(data)
+                            if data.get('type') == MESSAGE_TYPE:
+                                view = decoder.apply(data)
+                                if view is not None:
+                                    await self._process_vision_data(view)
+                            elif data.get('type') == 'character_vision_data':
+                                await self._process_vision_data(data)
                         except json.JSONDecodeError:
                             logger.warning("Invalid JSON from vision system")
                         except Exception as e:
@@ -450,6 +469,17 @@ class R2D2EnvironmentalAwareness:
             self.current_reading = reading
             self.reading_history.append(reading)
 
+            # Share the frame with co-located services (by reference, no re-encoding)
+            if self.event_bus is not None:
+                timestamp = vision_data.get('timestamp')
+                self.event_bus.publish(VisionFrame(
+                    trigger_time=timestamp if isinstance(timestamp, (int, float)) else reading.timestamp,
+                    source='environment',
+                    frame_id=vision_data.get('frame_id'),
+                    detections=detections,
+                    character_detections=character_detections
+                ))
+
             # Update person profiles
             self._update_person_tracking(reading)
 
@@ -864,9 +894,18 @@ class R2D2EnvironmentalAwareness:
                     # Similar recent trigger exists, skip this one
                     return
 
-            # Add to queue (priority queue uses negative priority for high-priority-first)
-            priority_score = -trigger.priority
-            self.trigger_queue.put((priority_score, time.time(), trigger))
+            if self.event_bus is not None:
+                # Delivered to the behavior engine immediately instead of with the next 1s update
+                self.event_bus.publish(EnvironmentUpdate(
+                    trigger_time=self.current_reading.timestamp or time.time(),
+                    source='environment',
+                    environmental_data=self._environmental_summary(),
+                    behavioral_triggers=[self._trigger_payload(trigger)]
+                ))
+            else:
+                # Add to queue (priority queue uses negative priority for high-priority-first)
+                priority_score = -trigger.priority
+                self.trigger_queue.put((priority_score, time.time(), trigger))
 
             # Add to active triggers
             self.active_triggers[trigger.trigger_id] = trigger
@@ -877,6 +916,50 @@ class R2D2EnvironmentalAwareness:
         except Exception as e:
             logger.error(f"Error queuing trigger: {e}")
 
+    def _environmental_summary(self) -> Dict[str, Any]:
+        """Current environmental assessment for the behavioral system"""
+        return {
+            'social_context': self.current_social_context.value,
+            'threat_level': self.current_threat_level.value,
+            'people_count': self.current_reading.total_people_count,
+            'children_present': self.current_reading.children_count > 0,
+            'characters_detected': len(self.current_reading.character_detections),
+            'crowd_density': self.current_reading.crowd_density,
+            'closest_distance': self.current_reading.closest_person_distance,
+            'persons': [
+                {
+                    'id': pid,
+                    'confidence': 0.9,
+                    'bbox': [0, 0, 100, 100],  # Placeholder
+                    'face_detected': False,
+                    'distance': self.current_reading.closest_person_distance
+                }
+                for pid in self.person_profiles.keys()
+            ]
+        }
+
+    @staticmethod
+    def _trigger_payload(trigger: BehavioralTriggerEvent) -> Dict[str, Any]:
+        return {
+            'trigger_id': trigger.trigger_id,
+            'trigger_type': trigger.trigger_type,
+            'priority': trigger.priority,
+            'confidence': trigger.confidence,
+            'suggested_behaviors': trigger.suggested_behaviors,
+            'audio_contexts': trigger.audio_context_suggestions,
+            'environmental_context': trigger.environmental_context
+        }
+
+    async def _publish_environment_loop(self):
+        """Publish the environmental assessment on the event bus every second"""
+        while self.running:
+            try:
+                self.event_bus.publish(EnvironmentUpdate(
+                    source='environment', environmental_data=self._environmental_summary()))
+            except Exception as e:
+                logger.error(f"Error publishing environmental update: {e}")
+            await asyncio.sleep(1.0)
+
     async def _send_environmental_update(self, websocket):
         """Send environmental update to behavioral intelligence system"""
         try:
@@ -884,25 +967,7 @@ class R2D2EnvironmentalAwareness:
             environmental_data = {
                 'type': 'environmental_input',
                 'timestamp': time.time(),
-                'environmental_data': {
-                    'social_context': self.current_social_context.value,
-                    'threat_level': self.current_threat_level.value,
-                    'people_count': self.current_reading.total_people_count,
-                    'children_present': self.current_reading.children_count > 0,
-                    'characters_detected': len(self.current_reading.character_detections),
-                    'crowd_density': self.current_reading.crowd_density,
-                    'closest_distance': self.current_reading.closest_person_distance,
-                    'persons': [
-                        {
-                            'id': pid,
-                            'confidence': 0.9,
-                            'bbox': [0, 0, 100, 100],  # Placeholder
-                            'face_detected': False,
-                            'distance': self.current_reading.closest_person_distance
-                        }
-                        for pid in self.person_profiles.keys()
-                    ]
-                }
+                'environmental_data': self._environmental_summary()
             }
 
             # Send pending triggers
@@ -913,15 +978,7 @@ class R2D2EnvironmentalAwareness:
 
                     # Check if trigger is still valid
                     if time.time() < trigger.expiration_time:
-                        triggers_to_send.append({
-                            'trigger_id': trigger.trigger_id,
-                            'trigger_type': trigger.trigger_type,
-                            'priority': trigger.priority,
-                            'confidence': trigger.confidence,
-                            'suggested_behaviors': trigger.suggested_behaviors,
-                            'audio_contexts': trigger.audio_context_suggestions,
-                            'environmental_context': trigger.environmental_context
-                        })
+                        triggers_to_send.append(self._trigger_payload(trigger))
 
                 except queue.Empty:
                     break
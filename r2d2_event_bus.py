@@ -0,0 +1,810 @@
+#!/usr/bin/env python3
+"""
+R2D2 Event Bus
+==============
+
+Typed publish/subscribe bus for the behavior, environment, audio and
+integration services.
+
+Co-located services used to talk over localhost WebSockets: every trigger
+was serialized to JSON, sent through the loopback, parsed, and often
+re-sent to the next service. On the bus an event is a dataclass instance
+handed to each subscriber's queue by reference; nothing is serialized
+unless the event has to leave the process. Transports carry selected
+topics to other buses behind the same publish/subscribe API:
+
+- in-process: the bus itself, zero copies
+- SharedMemoryTransport: a shared-memory ring for processes on the same
+  machine (one JSON encode per event, no sockets)
+- WebSocketBridge: JSON over WebSocket for other machines, dashboards and
+  services that are not on the bus yet
+
+Each subscription has a bounded queue; a slow subscriber loses its oldest
+events (counted) and never blocks the publisher or other subscribers.
+Subscriptions can be consumed from asyncio (await get(), async for) or from
+threads (wait()), and publishing is safe from any thread.
+
+Every event carries the time of the input that caused it (trigger_time).
+When a service acts on an event (first servo command, sound starts) it
+calls record_action(), which records the trigger-to-action latency per
+action kind in trigger_to_action_seconds and publishes an ActionStarted
+event; delivery latency per topic goes to bus_delivery_seconds.
+
+Features:
+- Typed events (dataclasses registered per topic)
+- Bounded per-subscriber queues with drop-oldest overflow
+- Thread-safe publish with asyncio and thread consumers
+- Shared-memory and WebSocket bridge transports
+- Delivery and trigger-to-action latency metrics
+
+Usage:
+    bus = EventBus('r2d2')
+    requests = bus.subscribe(BehaviorRequested)
+    asyncio.create_task(requests.run(handle_request))
+
+    bus.publish(BehaviorRequested(behavior_name='happy_greeting', source='dashboard'))
+    ...
+    bus.record_action('happy_greeting', event.trigger_time, 'motion')
+
+    # Another process on the same machine
+    bus.add_transport(SharedMemoryTransport('r2d2_bus', topics=['behavior.requested']))
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Callable, ClassVar, Dict, Iterable, List, Optional, Set, Type, Union
+
+import numpy as np
+
+from r2d2_metrics import MetricsRegistry, get_registry
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+try:
+    import mmap
+    MMAP_AVAILABLE = True
+except ImportError:
+    MMAP_AVAILABLE = False
+
+try:
+    import websockets
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 64
+WILDCARD = '*'
+
+# Seconds; in-process delivery is microseconds, bridged delivery milliseconds
+BUS_LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                       0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# ==========================================
+# EVENTS
+# ==========================================
+
+EVENT_TYPES: Dict[str, Type['BusEvent']] = {}
+
+
+def register_event(cls):
+    """Class decorator registering an event type under its topic"""
+    existing = EVENT_TYPES.get(cls.topic)
+    if existing is not None and existing is not cls:
+        raise ValueError(f"Topic {cls.topic} already registered to {existing.__name__}")
+    EVENT_TYPES[cls.topic] = cls
+    return cls
+
+
+@dataclass
+class BusEvent:
+    """Base event: every event records when its originating input was observed"""
+    topic: ClassVar[str] = 'event'
+    trigger_time: float = field(default_factory=time.time)
+    source: str = ''
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BusEvent':
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+@register_event
+@dataclass
+class VisionFrame(BusEvent):
+    """Detections of one vision frame (detection channel view)"""
+    topic: ClassVar[str] = 'vision.frame'
+    frame_id: Optional[int] = None
+    detections: List[Dict[str, Any]] = field(default_factory=list)
+    character_detections: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@register_event
+@dataclass
+class EnvironmentUpdate(BusEvent):
+    """Environmental assessment and behavioral triggers"""
+    topic: ClassVar[str] = 'environment.update'
+    environmental_data: Dict[str, Any] = field(default_factory=dict)
+    behavioral_triggers: List[Dict[str, Any]] = field(default_factory=list)
+
+    def trigger_values(self) -> List[str]:
+        """EnvironmentalTrigger values of the behavioral engines for the carried triggers"""
+        values = []
+        for trigger in self.behavioral_triggers:
+            trigger_type = trigger.get('trigger_type')
+            context = trigger.get('environmental_context', {})
+            if trigger_type == 'character_recognition':
+                character = str(context.get('character_type', '')).lower()
+                value = next((v for k, v in CHARACTER_TRIGGER_VALUES if k in character),
+                             'character_recognized')
+            elif trigger_type == 'social_context_change':
+                value = 'crowd_gathering' if context.get('new_context') == 'crowd' else None
+            else:
+                value = ENVIRONMENT_TRIGGER_VALUES.get(trigger_type)
+            if value:
+                values.append(value)
+        return values
+
+
+# Environmental awareness trigger types -> behavioral engine EnvironmentalTrigger values
+ENVIRONMENT_TRIGGER_VALUES = {
+    'person_greeting': 'person_detected',
+    'idle_timeout': 'idle_timeout'
+}
+CHARACTER_TRIGGER_VALUES = (('sith', 'sith_recognized'), ('jedi', 'jedi_recognized'),
+                            ('stormtrooper', 'stormtrooper_recognized'), ('droid', 'droid_recognized'))
+
+
+@register_event
+@dataclass
+class BehaviorRequested(BusEvent):
+    """Request to run a named behavior or choreography"""
+    topic: ClassVar[str] = 'behavior.requested'
+    behavior_name: str = ''
+    parameters: Dict[str, Any] = field(default_factory=dict)
+
+
+@register_event
+@dataclass
+class AudioRequested(BusEvent):
+    """Request to play a sound for an emotional context"""
+    topic: ClassVar[str] = 'audio.requested'
+    audio_context: str = ''
+    behavioral_state: Optional[str] = None
+    priority: int = 1
+    delay_seconds: float = 0.0
+
+
+@register_event
+@dataclass
+class ActionStarted(BusEvent):
+    """A service started acting on a trigger (first motion, sound start)"""
+    topic: ClassVar[str] = 'action.started'
+    name: str = ''
+    kind: str = ''
+    latency: float = 0.0
+
+
+@register_event
+@dataclass
+class EmergencyStop(BusEvent):
+    """Stop every behavior, motion and sound"""
+    topic: ClassVar[str] = 'system.emergency_stop'
+    reason: str = ''
+
+
+def topic_of(topic: Union[str, Type[BusEvent]]) -> str:
+    return topic if isinstance(topic, str) else topic.topic
+
+
+# ==========================================
+# SUBSCRIPTIONS
+# ==========================================
+
+class Subscription:
+    """Bounded queue of events for one subscriber"""
+
+    def __init__(self, bus: 'EventBus', topic: str, maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.bus = bus
+        self.topic = topic
+        self.maxsize = maxsize
+        self._queue = deque(maxlen=maxsize)         # (event, published_at)
+        self._lock = threading.Lock()
+        self._signal = threading.Event()            # Thread consumers
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Event] = None  # asyncio consumer
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+
+    def _put(self, event: BusEvent, published_at: float):
+        with self._lock:
+            if len(self._queue) == self.maxsize:
+                self.dropped += 1
+                self.bus._dropped(event.topic)
+            self._queue.append((event, published_at))
+        self._signal.set()
+        loop = self._loop
+        if loop is not None:
+            if loop is _running_loop():
+                self._ready.set()
+            else:
+                try:
+                    loop.call_soon_threadsafe(self._ready.set)
+                except RuntimeError:
+                    pass                            # Consumer loop closed
+
+    def get_nowait(self) -> Optional[BusEvent]:
+        """Next event, or None when the queue is empty"""
+        with self._lock:
+            if not self._queue:
+                self._signal.clear()
+                return None
+            event, published_at = self._queue.popleft()
+        self.delivered += 1
+        self.bus._delivered(event.topic, published_at)
+        return event
+
+    async def get(self) -> BusEvent:
+        """Wait for the next event (asyncio consumers)"""
+        if self._loop is None:
+            ready = asyncio.Event()
+            with self._lock:
+                # _put() reads _loop without the lock: _ready must exist first
+                self._ready = ready
+                self._loop = asyncio.get_running_loop()
+        while True:
+            event = self.get_nowait()
+            if event is not None:
+                return event
+            if self.closed:
+                raise asyncio.CancelledError()
+            self._ready.clear()
+            if self._queue:
+                continue
+            await self._ready.wait()
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[BusEvent]:
+        """Wait for the next event (thread consumers); None on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.closed:
+            event = self.get_nowait()
+            if event is not None:
+                return event
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            self._signal.wait(remaining)
+        return None
+
+    async def run(self, handler: Callable[[BusEvent], Any]):
+        """Call handler (plain or coroutine function) for each event until closed"""
+        while not self.closed:
+            try:
+                event = await self.get()
+            except asyncio.CancelledError:
+                return
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Event handler for {self.topic} failed: {e}")
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> BusEvent:
+        try:
+            return await self.get()
+        except asyncio.CancelledError:
+            raise StopAsyncIteration
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def close(self):
+        self.closed = True
+        self.bus.unsubscribe(self)
+        self._signal.set()
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:
+                pass
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+# ==========================================
+# BUS
+# ==========================================
+
+class EventBus:
+    """Topic-based pub/sub with per-subscriber queues and pluggable transports"""
+
+    def __init__(self, name: str = 'r2d2', registry: Optional[MetricsRegistry] = None):
+        self.name = name
+        self._subscribers: Dict[str, tuple] = {}     # topic -> tuple (copy on write)
+        self._lock = threading.Lock()
+        self.transports: List['Transport'] = []
+
+        self.action_latencies: Dict[str, deque] = {}  # kind -> recent seconds, for status
+        self.stats = {'published': 0, 'delivered': 0, 'dropped': 0, 'forwarded': 0, 'received': 0}
+
+        registry = registry or get_registry()
+        self._published_total = registry.counter(
+            'bus_events_published_total', 'Events published on the bus', ('bus', 'topic'))
+        self._dropped_total = registry.counter(
+            'bus_events_dropped_total', 'Events dropped from full subscriber queues', ('bus', 'topic'))
+        self._delivery = registry.histogram(
+            'bus_delivery_seconds', 'Publish to subscriber dequeue', ('bus', 'topic'),
+            buckets=BUS_LATENCY_BUCKETS)
+        self._action = registry.histogram(
+            'trigger_to_action_seconds', 'Triggering input to the first action taken on it',
+            ('bus', 'kind'), buckets=BUS_LATENCY_BUCKETS + (2.5, 5.0, 10.0))
+        self._children: Dict[tuple, Any] = {}
+
+    # Subscribe / publish
+
+    def subscribe(self, topic: Union[str, Type[BusEvent]],
+                  maxsize: int = DEFAULT_QUEUE_SIZE) -> Subscription:
+        """Subscribe to a topic (event class or name, '*' for every topic)"""
+        subscription = Subscription(self, topic_of(topic), maxsize)
+        with self._lock:
+            self._subscribers[subscription.topic] = \
+                self._subscribers.get(subscription.topic, ()) + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            remaining = tuple(s for s in self._subscribers.get(subscription.topic, ())
+                              if s is not subscription)
+            if remaining:
+                self._subscribers[subscription.topic] = remaining
+            else:
+                self._subscribers.pop(subscription.topic, None)
+
+    def publish(self, event: BusEvent, origin: Optional['Transport'] = None) -> int:
+        """
+        Deliver an event to local subscribers and forward it to transports
+
+        Args:
+            event: Registered event instance
+            origin: Transport the event arrived on (not forwarded anywhere)
+
+        Returns:
+            Number of local subscribers the event was queued for
+        """
+        topic = event.topic
+        if EVENT_TYPES.get(topic) is not type(event):
+            raise TypeError(f"{type(event).__name__} is not the registered type for topic {topic}")
+
+        published_at = time.time()
+        self.stats['published'] += 1
+        self._child(self._published_total, topic).inc()
+
+        subscribers = self._subscribers.get(topic, ()) + self._subscribers.get(WILDCARD, ())
+        for subscription in subscribers:
+            subscription._put(event, published_at)
+
+        if origin is None:
+            for transport in self.transports:
+                if transport.wants(topic):
+                    try:
+                        transport.send(event, published_at)
+                        self.stats['forwarded'] += 1
+                    except Exception as e:
+                        logger.error(f"Transport {transport.name} failed to send {topic}: {e}")
+        else:
+            self.stats['received'] += 1
+        return len(subscribers)
+
+    # Latency
+
+    def record_action(self, name: str, trigger_time: float, kind: str, source: str = '') -> float:
+        """Record that an action started for a trigger; returns the latency in seconds"""
+        latency = max(0.0, time.time() - trigger_time)
+        self._child(self._action, kind).observe(latency)
+        self.action_latencies.setdefault(kind, deque(maxlen=256)).append(latency)
+        self.publish(ActionStarted(trigger_time=trigger_time, source=source,
+                                   name=name, kind=kind, latency=latency))
+        return latency
+
+    def _delivered(self, topic: str, published_at: float):
+        self.stats['delivered'] += 1
+        self._child(self._delivery, topic).observe(time.time() - published_at)
+
+    def _dropped(self, topic: str):
+        self.stats['dropped'] += 1
+        self._child(self._dropped_total, topic).inc()
+
+    def _child(self, metric, label: str):
+        key = (id(metric), label)
+        child = self._children.get(key)
+        if child is None:
+            child = metric.labels(self.name, label)
+            self._children[key] = child
+        return child
+
+    # Transports
+
+    def add_transport(self, transport: 'Transport') -> 'Transport':
+        transport.attach(self)
+        self.transports.append(transport)
+        return transport
+
+    def close(self):
+        for transport in self.transports:
+            try:
+                transport.stop()
+            except Exception as e:
+                logger.error(f"Error stopping transport {transport.name}: {e}")
+        self.transports = []
+
+    # Status
+
+    def get_status(self) -> Dict[str, Any]:
+        actions = {}
+        for kind, latencies in self.action_latencies.items():
+            values = np.array(latencies) * 1000.0
+            actions[kind] = {'count': len(values),
+                             'p50_ms': float(np.percentile(values, 50)),
+                             'p99_ms': float(np.percentile(values, 99))}
+        return {
+            'name': self.name,
+            **self.stats,
+            'subscribers': {topic: len(subs) for topic, subs in self._subscribers.items()},
+            'transports': [transport.name for transport in self.transports],
+            'trigger_to_action': actions
+        }
+
+
+# ==========================================
+# TRANSPORTS
+# ==========================================
+
+class Transport:
+    """Carries events of selected topics between a bus and other buses"""
+
+    def __init__(self, name: str, topics: Optional[Iterable[Union[str, Type[BusEvent]]]] = None):
+        self.name = name
+        self.topics: Optional[Set[str]] = {topic_of(t) for t in topics} if topics else None
+        self.bus: Optional[EventBus] = None
+        self.stats = {'sent': 0, 'received': 0, 'dropped': 0, 'errors': 0}
+
+    def wants(self, topic: str) -> bool:
+        return self.topics is None or topic in self.topics
+
+    def attach(self, bus: EventBus):
+        self.bus = bus
+
+    def send(self, event: BusEvent, published_at: float):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    @staticmethod
+    def encode(event: BusEvent, published_at: float, origin: str) -> bytes:
+        return json.dumps({'o': origin, 't': event.topic, 'p': published_at, 'e': event.to_dict()},
+                          separators=(',', ':'), default=str).encode('utf-8')
+
+    def deliver(self, data: Union[bytes, str, Dict[str, Any]], origin: str) -> bool:
+        """Publish an encoded event locally (skips events this process sent)"""
+        message = json.loads(data) if isinstance(data, (bytes, str)) else data
+        if message.get('o') == origin:
+            return False
+        event_type = EVENT_TYPES.get(message.get('t'))
+        if event_type is None:
+            self.stats['dropped'] += 1
+            return False
+        self.stats['received'] += 1
+        self.bus.publish(event_type.from_dict(message.get('e', {})), origin=self)
+        return True
+
+
+class SharedMemoryTransport(Transport):
+    """
+    Shared-memory ring between processes on the same machine
+
+    The segment is a file on tmpfs (/dev/shm) mapped into every process;
+    it outlives its creator until stop(unlink=True). Layout: a header
+    (magic, slot count, slot size, write sequence) followed by fixed-size
+    slots of [sequence u64, length u32, crc32 u32, payload]. Writers
+    serialize through a lock on the segment file; each reader thread keeps
+    its own cursor, polls the write sequence, and validates each slot by
+    sequence and checksum, so an overwritten or torn slot is dropped rather
+    than misread. A reader that falls more than a ring behind skips to the
+    oldest slot still present and counts the loss.
+    """
+
+    MAGIC = 0x52324255            # 'R2BU'
+    HEADER = struct.Struct('<IIIIQ')
+    SLOT_HEADER = struct.Struct('<QII')
+    SEGMENT_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+    def __init__(self, name: str = 'r2d2_bus', topics=None, slots: int = 256,
+                 slot_size: int = 8192, poll_interval: float = 0.0005):
+        if not (MMAP_AVAILABLE and FCNTL_AVAILABLE):
+            raise RuntimeError("Shared memory transport needs mmap and fcntl")
+        super().__init__(f"shm:{name}", topics)
+        self.segment_name = name
+        self.path = os.path.join(self.SEGMENT_DIR, name)
+        self.slots = slots
+        self.slot_size = slot_size
+        self.poll_interval = poll_interval
+        self.origin = f"{os.getpid()}:{id(self):x}"
+        self.owner = False
+
+        size = self.HEADER.size + slots * slot_size
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+            self.owner = True
+        except FileExistsError:
+            fd = os.open(self.path, os.O_RDWR)
+        self._fd = fd
+        try:
+            # The creator holds the lock until the header is written
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if self.owner:
+                    os.ftruncate(fd, size)
+                self.buf = mmap.mmap(fd, size)
+                if self.owner:
+                    self.HEADER.pack_into(self.buf, 0, self.MAGIC, slots, slot_size, 0, 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        except (OSError, ValueError):
+            os.close(fd)
+            raise
+        magic, existing_slots, existing_size, _, _ = self.HEADER.unpack_from(self.buf, 0)
+        if (magic, existing_slots, existing_size) != (self.MAGIC, slots, slot_size):
+            self.buf.close()
+            os.close(fd)
+            raise ValueError(f"Shared memory segment {name} has a different layout")
+
+        self._write_lock = threading.Lock()
+        self._cursor = self._write_sequence()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def attach(self, bus: EventBus):
+        super().attach(bus)
+        self._running = True
+        self._thread = threading.Thread(target=self._read_loop, daemon=True,
+                                        name=f"BusReader-{self.segment_name}")
+        self._thread.start()
+
+    def _write_sequence(self) -> int:
+        return self.HEADER.unpack_from(self.buf, 0)[4]
+
+    def send(self, event: BusEvent, published_at: float):
+        payload = self.encode(event, published_at, self.origin)
+        if len(payload) > self.slot_size - self.SLOT_HEADER.size:
+            self.stats['dropped'] += 1
+            logger.warning(f"Event {event.topic} too large for shared memory slot ({len(payload)} bytes)")
+            return
+        with self._write_lock:
+            if self._fd is None:
+                return
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                sequence = self._write_sequence() + 1
+                offset = self.HEADER.size + (sequence % self.slots) * self.slot_size
+                buf = self.buf
+                self.SLOT_HEADER.pack_into(buf, offset, 0, 0, 0)          # Invalidate while writing
+                start = offset + self.SLOT_HEADER.size
+                buf[start:start + len(payload)] = payload
+                self.SLOT_HEADER.pack_into(buf, offset, sequence, len(payload), zlib.crc32(payload))
+                struct.pack_into('<Q', buf, self.HEADER.size - 8, sequence)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.stats['sent'] += 1
+
+    def _read_loop(self):
+        while self._running:
+            try:
+                if not self.poll():
+                    time.sleep(self.poll_interval)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Shared memory bus reader error: {e}")
+                time.sleep(0.1)
+
+    def poll(self) -> int:
+        """Deliver every event written since the last poll; returns the count"""
+        latest = self._write_sequence()
+        if latest <= self._cursor:
+            return 0
+        if latest - self._cursor > self.slots - 1:
+            lost = latest - self._cursor - (self.slots - 1)
+            self.stats['dropped'] += lost
+            self._cursor = latest - (self.slots - 1)
+        delivered = 0
+        buf = self.buf
+        while self._cursor < latest:
+            sequence = self._cursor + 1
+            self._cursor = sequence
+            offset = self.HEADER.size + (sequence % self.slots) * self.slot_size
+            slot_sequence, length, crc = self.SLOT_HEADER.unpack_from(buf, offset)
+            start = offset + self.SLOT_HEADER.size
+            payload = buf[start:start + length]
+            if (slot_sequence != sequence or zlib.crc32(payload) != crc or
+                    self.SLOT_HEADER.unpack_from(buf, offset)[0] != sequence):
+                self.stats['dropped'] += 1               # Overwritten or torn
+                continue
+            if self.deliver(payload, self.origin):
+                delivered += 1
+        return delivered
+
+    def stop(self, unlink: Optional[bool] = None):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        with self._write_lock:
+            if self._fd is None:
+                return
+            self.buf.close()
+            os.close(self._fd)
+            self._fd = None
+        if self.owner if unlink is None else unlink:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def _request_headers(websocket) -> Dict[str, str]:
+    """Request headers of a server-side connection (legacy and new websockets APIs)"""
+    headers = getattr(websocket, 'request_headers', None)
+    if headers is None:
+        headers = getattr(getattr(websocket, 'request', None), 'headers', None)
+    return headers or {}
+
+
+def _connect_headers(headers: Dict[str, str]) -> Dict[str, Any]:
+    """websockets.connect() keyword for extra request headers (renamed in websockets 14)"""
+    if not headers:
+        return {}
+    parameters = inspect.signature(websockets.connect).parameters
+    return {'additional_headers' if 'additional_headers' in parameters else 'extra_headers': headers}
+
+
+class WebSocketBridge(Transport):
+    """
+    JSON-over-WebSocket bridge to buses and clients on other machines
+
+    serve() accepts peers, connect() keeps a connection to one; events of
+    the bridged topics go to every peer through a bounded per-peer queue.
+    Messages are {"o": origin, "t": topic, "p": published_at, "e": {...}}.
+
+    Peers authenticate with an R2D2 bearer token in the Authorization
+    header (connect() sends the primary token unless another is given);
+    serve() closes connections without a valid one.
+    """
+
+    def __init__(self, topics=None, name: str = 'websocket', queue_size: int = 256,
+                 require_auth: bool = True, token: Optional[str] = None):
+        if not WEBSOCKETS_AVAILABLE:
+            raise RuntimeError("websockets is not available")
+        super().__init__(f"ws:{name}", topics)
+        self.origin = f"{os.getpid()}:{id(self):x}"
+        self.queue_size = queue_size
+        self.require_auth = require_auth
+        if token is None and require_auth:
+            from r2d2_auth_module import auth_manager
+            token = auth_manager.get_primary_token()
+        self.token = token
+        self._peers: Dict[Any, deque] = {}
+        self._wake: Dict[Any, asyncio.Event] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.running = False
+
+    def send(self, event: BusEvent, published_at: float):
+        if not self._peers:
+            return
+        message = self.encode(event, published_at, self.origin).decode('utf-8')
+        loop = self._loop
+        if loop is None:
+            return
+        if loop is _running_loop():
+            self._enqueue(message)
+        else:
+            loop.call_soon_threadsafe(self._enqueue, message)
+
+    def _enqueue(self, message: str):
+        for peer, pending in self._peers.items():
+            if len(pending) == self.queue_size:
+                self.stats['dropped'] += 1
+            pending.append(message)
+            self._wake[peer].set()
+        self.stats['sent'] += 1
+
+    async def handle_peer(self, websocket):
+        """Bridge one connection until it closes"""
+        self._loop = asyncio.get_running_loop()
+        self._peers[websocket] = deque(maxlen=self.queue_size)
+        self._wake[websocket] = asyncio.Event()
+        sender = asyncio.create_task(self._send_loop(websocket))
+        try:
+            async for raw in websocket:
+                try:
+                    self.deliver(raw, self.origin)
+                except (ValueError, TypeError) as e:
+                    self.stats['errors'] += 1
+                    logger.warning(f"Invalid bridged event: {e}")
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            self._peers.pop(websocket, None)
+            self._wake.pop(websocket, None)
+
+    async def _send_loop(self, websocket):
+        pending = self._peers[websocket]
+        wake = self._wake[websocket]
+        while True:
+            await wake.wait()
+            wake.clear()
+            while pending:
+                await websocket.send(pending.popleft())
+
+    async def _accept_peer(self, websocket):
+        """Bridge an incoming connection once its token is checked"""
+        if self.require_auth:
+            from r2d2_auth_module import validate_websocket_token
+            if not validate_websocket_token(_request_headers(websocket)):
+                self.stats['errors'] += 1
+                logger.warning(f"Unauthorized event bus bridge connection from {websocket.remote_address}")
+                await websocket.close(code=1008, reason="Unauthorized - Invalid or missing token")
+                return
+        await self.handle_peer(websocket)
+
+    async def serve(self, host: str = 'localhost', port: int = 8770):
+        """Accept bridge peers until stop()"""
+        self.running = True
+        async with websockets.serve(self._accept_peer, host, port):
+            logger.info(f"Event bus bridge listening on ws://{host}:{port}")
+            while self.running:
+                await asyncio.sleep(0.5)
+
+    async def connect(self, uri: str, retry_seconds: float = 5.0):
+        """Keep a bridge connection to a remote peer until stop()"""
+        self.running = True
+        headers = {'Authorization': f'Bearer {self.token}'} if self.token else {}
+        while self.running:
+            try:
+                async with websockets.connect(uri, **_connect_headers(headers)) as websocket:
+                    logger.info(f"✅ Event bus bridge connected to {uri}")
+                    await self.handle_peer(websocket)
+            except (OSError, websockets.exceptions.WebSocketException) as e:
+                logger.warning(f"Event bus bridge to {uri} failed: {e}")
+            if self.running:
+                await asyncio.sleep(retry_seconds)
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+R2D2 Event Bus Trigger-to-Action Latency Benchmark
+==================================================
+
+Measures the time from publishing a behavior request to the consuming
+service acting on it, for each way services can be connected:
+
+- in-process, same loop: asyncio publisher -> bus -> asyncio subscriber
+- in-process, threaded: publisher thread -> bus -> asyncio subscriber
+  (includes the cross-thread wakeup)
+- shared memory: publisher -> SharedMemoryTransport -> subscriber in another process
+- bridge: publisher -> WebSocketBridge -> subscriber in another process
+- loopback JSON: the previous service hop, a JSON message over a localhost
+  WebSocket parsed by a plain handler, client and server on one loop
+  (compare with the same-loop in-process mode)
+
+The consumer reports trigger-to-action latency through bus.record_action(),
+as the behavior engine and audio system do; the ActionStarted event it
+publishes carries the latency back to the benchmark.
+
+Usage:
+    python3 r2d2_event_bus_benchmark.py
+    python3 r2d2_event_bus_benchmark.py --trials 2000 --modes inproc shm
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import threading
+import time
+from typing import List
+
+import numpy as np
+
+from r2d2_metrics import MetricsRegistry
+from r2d2_event_bus import (
+    EventBus, SharedMemoryTransport, WebSocketBridge, BehaviorRequested, ActionStarted
+)
+
+TOPICS = [BehaviorRequested, ActionStarted]
+SHM_NAME = 'r2d2_bus_benchmark'
+BRIDGE_PORT = 8779
+
+
+def _run_loop_in_thread() -> asyncio.AbstractEventLoop:
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True, name="BenchmarkLoop").start()
+    return loop
+
+
+async def _consume(bus: EventBus):
+    """The acting service: record the action for each request"""
+    async for event in bus.subscribe(BehaviorRequested):
+        if event.behavior_name == 'stop':
+            return
+        bus.record_action(event.behavior_name, event.trigger_time, 'benchmark', source='consumer')
+
+
+def _peer(mode: str, address, ready):
+    """Consumer process for the shm and bridge modes"""
+    async def main():
+        bus = EventBus('peer', registry=MetricsRegistry())
+        if mode == 'shm':
+            bus.add_transport(SharedMemoryTransport(address, topics=TOPICS))
+        else:
+            bridge = bus.add_transport(WebSocketBridge(topics=TOPICS, name='peer'))
+            asyncio.create_task(bridge.connect(address, retry_seconds=0.2))
+        ready.set()
+        await _consume(bus)
+        bus.close()
+    asyncio.run(main())
+
+
+def _measure(bus: EventBus, trials: int) -> List[float]:
+    """Publish requests one at a time; collect the consumer-reported latencies"""
+    actions = bus.subscribe(ActionStarted, maxsize=trials + 1)
+    rng = random.Random(1234)
+    latencies = []
+    for i in range(trials):
+        time.sleep(rng.uniform(0.0005, 0.003))
+        bus.publish(BehaviorRequested(behavior_name=f"trial_{i}", source='benchmark'))
+        event = actions.wait(timeout=2.0)
+        if event is None:
+            print(f"  Missed action for trial {i}")
+            continue
+        latencies.append(event.latency)
+    actions.close()
+    return latencies
+
+
+def run_inproc_loop(trials: int) -> List[float]:
+    """Publisher and subscriber on one event loop"""
+    async def main():
+        bus = EventBus('benchmark', registry=MetricsRegistry())
+        actions = bus.subscribe(ActionStarted, maxsize=trials + 1)
+        consumer = asyncio.create_task(_consume(bus))
+        await asyncio.sleep(0)
+        rng = random.Random(1234)
+        latencies = []
+        for i in range(trials):
+            await asyncio.sleep(rng.uniform(0.0005, 0.003))
+            bus.publish(BehaviorRequested(behavior_name=f"trial_{i}", source='benchmark'))
+            latencies.append((await asyncio.wait_for(actions.get(), 2.0)).latency)
+        bus.publish(BehaviorRequested(behavior_name='stop'))
+        await consumer
+        return latencies
+
+    return asyncio.run(main())
+
+
+def run_inproc(trials: int) -> List[float]:
+    bus = EventBus('benchmark', registry=MetricsRegistry())
+    loop = _run_loop_in_thread()
+    consumer = asyncio.run_coroutine_threadsafe(_consume(bus), loop)
+    time.sleep(0.1)
+    try:
+        return _measure(bus, trials)
+    finally:
+        bus.publish(BehaviorRequested(behavior_name='stop'))
+        consumer.result(timeout=5.0)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+def run_shm(trials: int) -> List[float]:
+    bus = EventBus('benchmark', registry=MetricsRegistry())
+    transport = bus.add_transport(SharedMemoryTransport(SHM_NAME, topics=TOPICS))
+    ready = multiprocessing.Event()
+    peer = multiprocessing.Process(target=_peer, args=('shm', SHM_NAME, ready), daemon=True)
+    peer.start()
+    ready.wait(timeout=10.0)
+    time.sleep(0.2)
+    try:
+        return _measure(bus, trials)
+    finally:
+        bus.publish(BehaviorRequested(behavior_name='stop'))
+        peer.join(timeout=5.0)
+        transport.stop(unlink=True)
+
+
+def run_bridge(trials: int) -> List[float]:
+    bus = EventBus('benchmark', registry=MetricsRegistry())
+    bridge = bus.add_transport(WebSocketBridge(topics=TOPICS, name='benchmark'))
+    loop = _run_loop_in_thread()
+    server = asyncio.run_coroutine_threadsafe(bridge.serve('localhost', BRIDGE_PORT), loop)
+    ready = multiprocessing.Event()
+    peer = multiprocessing.Process(target=_peer, args=('bridge', f"ws://localhost:{BRIDGE_PORT}", ready),
+                                   daemon=True)
+    peer.start()
+    ready.wait(timeout=10.0)
+    deadline = time.time() + 10.0
+    while not bridge._peers and time.time() < deadline:
+        time.sleep(0.05)
+    try:
+        return _measure(bus, trials)
+    finally:
+        bus.publish(BehaviorRequested(behavior_name='stop'))
+        peer.join(timeout=5.0)
+        bridge.stop()
+        server.result(timeout=5.0)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+def run_loopback_json(trials: int) -> List[float]:
+    """Previous path: JSON trigger over a localhost WebSocket to a handler"""
+    import websockets
+
+    async def main():
+        latencies = []
+
+        async def handler(websocket):
+            async for raw in websocket:
+                data = json.loads(raw)
+                await websocket.send(json.dumps({'latency': time.time() - data['timestamp']}))
+
+        async with websockets.serve(handler, 'localhost', BRIDGE_PORT + 1):
+            async with websockets.connect(f"ws://localhost:{BRIDGE_PORT + 1}") as websocket:
+                rng = random.Random(1234)
+                for i in range(trials):
+                    await asyncio.sleep(rng.uniform(0.0005, 0.003))
+                    await websocket.send(json.dumps({
+                        'type': 'execute_behavior', 'behavior_name': f"trial_{i}",
+                        'parameters': {}, 'timestamp': time.time()}))
+                    latencies.append(json.loads(await websocket.recv())['latency'])
+        return latencies
+
+    return asyncio.run(main())
+
+
+def report(name: str, latencies: List[float]):
+    """Print latency percentiles in milliseconds"""
+    if not latencies:
+        print(f"{name}: no actions")
+        return
+    ms = np.array(latencies) * 1000.0
+    print(f"{name}: n={len(ms)} p50={np.percentile(ms, 50):.3f}ms "
+          f"p95={np.percentile(ms, 95):.3f}ms p99={np.percentile(ms, 99):.3f}ms max={ms.max():.3f}ms")
+
+
+MODES = {
+    'inproc-loop': ("In-process bus, same loop", run_inproc_loop),
+    'inproc': ("In-process bus, publisher thread", run_inproc),
+    'shm': ("Shared-memory transport", run_shm),
+    'bridge': ("WebSocket bridge", run_bridge),
+    'loopback': ("Loopback JSON WebSocket (previous)", run_loopback_json)
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event bus trigger-to-action latency benchmark")
+    parser.add_argument('--trials', type=int, default=500)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+
+    print("R2D2 Event Bus Trigger-to-Action Latency Benchmark")
+    print("=" * 50)
+    for mode in args.modes:
+        name, run = MODES[mode]
+        report(f"  {name}", run(args.trials))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,12 @@ Disney-Level Animatronic Integration
 This system integrates servo control, audio playback, and lighting effects
 for synchronized R2-D2 performances that match Disney-level quality.
 
+Audio cues and servo/lighting events of a performance run on one cue
+timeline against the software mixer's sample clock (r2d2_audio_mixer), so
+sound and motion start from the same clock rather than from separate
+sleeps. Loudness normalization gains come from the offline sound feature
+index (r2d2_sound_index).
+
 Features:
 - Synchronized servo movement with audio cues
 - Coordinated lighting effects
@@ -26,6 +32,9 @@ from pathlib import Path
 
 # Import our servo control system
 from r2d2_servo_simple import R2D2ServoControllerSimple, R2D2Component, R2D2Choreographer
+from r2d2_audio_mixer import CueTimeline, SoftwareMixer, get_mixer
+from r2d2_sound_bank import SoundBank, SoundSample
+from r2d2_sound_index import SoundFeatureIndex
 
 # Audio system imports
 try:
@@ -83,16 +92,25 @@ class PerformanceSequence:
     priority: int = 1
 
 class R2D2AudioController:
-    """Audio playback controller for R2-D2 sounds"""
+    """Audio playback controller for R2-D2 sounds (decoded once, played on the shared mixer)"""
+
+    SOUND_EXTENSIONS = ('', '.wav', '.mp3', '.ogg')
 
-    def __init__(self, sound_directory: str = "/home/rolo/r2ai/sounds"):
+    def __init__(self, sound_directory: str = "/home/rolo/r2ai/sounds",
+                 mixer: Optional[SoftwareMixer] = None):
         self.sound_directory = Path(sound_directory)
-        self.current_channel = None
+        self.current_cue = None
         self.is_initialized = False
 
         if AUDIO_AVAILABLE:
             self._initialize_audio()
 
+        self.mixer = mixer or get_mixer()
+        self.sound_index = SoundFeatureIndex.open(str(self.sound_directory), background=True)
+        self.sound_bank = SoundBank(str(self.sound_directory), sample_rate=self.mixer.sample_rate,
+                                    channels=self.mixer.channels)
+        self.sound_bank.scan()
+
     def _initialize_audio(self):
         """Initialize pygame audio system"""
         try:
@@ -103,61 +121,58 @@ class R2D2AudioController:
             logger.error(f"Audio initialization failed: {e}")
             self.is_initialized = False
 
-    def play_sound(self, sound_file: str, volume: float = 1.0) -> bool:
+    def resolve(self, sound_file: str) -> Optional[str]:
+        """Sound bank name of a sound file (with or without extension)"""
+        for ext in self.SOUND_EXTENSIONS:
+            if f"{sound_file}{ext}" in self.sound_bank:
+                return f"{sound_file}{ext}"
+        return None
+
+    def sample(self, sound_file: str) -> Optional[SoundSample]:
+        """Decoded sample for a sound file, or None if it is not in the sound directory"""
+        name = self.resolve(sound_file)
+        return self.sound_bank.get(name) if name else None
+
+    def gain(self, sample: SoundSample, volume: float = 1.0) -> float:
+        """Mixer gain of a sample: volume times its loudness normalization gain"""
+        return volume * self.sound_index.gain(sample.name)
+
+    def play_sound(self, sound_file: str, volume: float = 1.0, at: Optional[float] = None) -> bool:
         """
         Play a sound file
 
         Args:
             sound_file: Name of sound file (with or without extension)
             volume: Playback volume (0.0 to 1.0)
+            at: Mixer clock time to start at (None: now)
 
         Returns:
             True if sound played successfully
         """
-        if not self.is_initialized:
-            logger.info(f"[AUDIO SIM] Playing: {sound_file} at volume {volume:.1f}")
-            return True
-
         try:
-            # Try different extensions
-            sound_path = None
-            for ext in ['.wav', '.mp3', '.ogg']:
-                test_path = self.sound_directory / f"{sound_file}{ext}"
-                if test_path.exists():
-                    sound_path = test_path
-                    break
-
-                # Try without adding extension (file might already have it)
-                test_path = self.sound_directory / sound_file
-                if test_path.exists():
-                    sound_path = test_path
-                    break
-
-            if sound_path and sound_path.exists():
-                sound = pygame.mixer.Sound(str(sound_path))
-                sound.set_volume(volume)
-                self.current_channel = sound.play()
-                logger.info(f"Playing: {sound_path.name}")
-                return True
-            else:
+            sample = self.sample(sound_file)
+            if sample is None:
                 logger.warning(f"Sound file not found: {sound_file}")
                 logger.info(f"[AUDIO SIM] Playing: {sound_file}")
                 return True
 
+            self.current_cue = self.mixer.schedule(sample, at=at, gain=self.gain(sample, volume))
+            logger.info(f"Playing: {sample.name}")
+            return True
+
         except Exception as e:
             logger.error(f"Audio playback failed: {e}")
             return False
 
     def stop_current_sound(self):
         """Stop currently playing sound"""
-        if self.current_channel and self.current_channel.get_busy():
-            self.current_channel.stop()
+        if self.current_cue is not None:
+            self.mixer.cancel(self.current_cue)
+            self.current_cue = None
 
     def is_playing(self) -> bool:
         """Check if audio is currently playing"""
-        if not self.is_initialized:
-            return False
-        return self.current_channel and self.current_channel.get_busy()
+        return self.current_cue is not None and not self.current_cue.finished
 
 class R2D2LightingController:
     """Lighting effects controller for R2-D2"""
@@ -224,6 +239,7 @@ class R2D2IntegratedPerformer:
 
         # Performance state
         self.current_performance = None
+        self.current_timeline: Optional[CueTimeline] = None
         self.performance_thread = None
         self.is_performing = False
 
@@ -231,6 +247,12 @@ class R2D2IntegratedPerformer:
         self.performances = {}
         self._create_performance_library()
 
+        # Keep every sound the library uses decoded and resident
+        library_sounds = {self.audio_controller.resolve(event.audio_file)
+                          for performance in self.performances.values()
+                          for event in performance.events if event.audio_file}
+        self.audio_controller.sound_bank.pin(name for name in library_sounds if name)
+
         logger.info("R2-D2 Integrated Performance System initialized")
 
     def _create_performance_library(self):
@@ -457,53 +479,74 @@ class R2D2IntegratedPerformer:
 
         return True
 
+    def _build_timeline(self, performance: PerformanceSequence) -> CueTimeline:
+        """Audio cues and servo/lighting actions of a performance on one timeline"""
+        timeline = CueTimeline()
+        for event in performance.events:
+            if event.audio_file:
+                sample = self.audio_controller.sample(event.audio_file)
+                if sample is not None:
+                    timeline.add_audio(event.timestamp, sample, gain=self.audio_controller.gain(sample))
+                else:
+                    logger.info(f"[AUDIO SIM] {event.audio_file} at {event.timestamp:.1f}s")
+            timeline.add_action(event.timestamp, lambda event=event: self._execute_event(event))
+        return timeline
+
+    def _execute_event(self, event: PerformanceEvent):
+        """Servo and lighting part of an event (audio is already cued on the mixer)"""
+        # Check for emergency stop
+        if self.servo_controller.emergency_stopped or not self.is_performing:
+            if self.servo_controller.emergency_stopped:
+                logger.warning("Performance stopped due to emergency stop")
+            if self.current_timeline is not None:
+                self.current_timeline.cancel(self.audio_controller.mixer)
+            return
+
+        # Execute servo actions
+        if event.servo_actions:
+            self.servo_controller.move_multiple(event.servo_actions, smooth=True)
+
+        # Execute lighting effects
+        for zone, effect in event.lighting_effects.items():
+            self.lighting_controller.set_lighting(zone, effect)
+
+        logger.info(f"Executed event at {event.timestamp:.1f}s")
+
     def _execute_performance(self, performance: PerformanceSequence):
         """Execute a complete performance sequence"""
         self.is_performing = True
-        start_time = time.time()
+        mixer = self.audio_controller.mixer
 
         try:
-            for event in performance.events:
-                # Wait for event time
-                while time.time() - start_time < event.timestamp:
-                    time.sleep(0.01)
-
-                # Check for emergency stop
-                if self.servo_controller.emergency_stopped:
-                    logger.warning("Performance stopped due to emergency stop")
+            timeline = self._build_timeline(performance)
+            self.current_timeline = timeline
+            start_time = timeline.start(mixer)
+            timeline.wait()
+
+            # Wait for performance completion on the mixer clock
+            while self.is_performing and not timeline.cancelled and not mixer.clock.stopped:
+                if mixer.clock.wait_until(start_time + performance.total_duration, timeout=0.1):
                     break
 
-                # Execute servo actions
-                if event.servo_actions:
-                    self.servo_controller.move_multiple(event.servo_actions, smooth=True)
-
-                # Execute audio
-                if event.audio_file:
-                    self.audio_controller.play_sound(event.audio_file)
-
-                # Execute lighting effects
-                for zone, effect in event.lighting_effects.items():
-                    self.lighting_controller.set_lighting(zone, effect)
-
-                logger.info(f"Executed event at {event.timestamp:.1f}s")
-
-            # Wait for performance completion
-            while time.time() - start_time < performance.total_duration:
-                time.sleep(0.1)
-
-            logger.info(f"✅ Performance '{performance.name}' completed successfully")
+            if timeline.cancelled or not self.is_performing:
+                logger.info(f"Performance '{performance.name}' stopped")
+            else:
+                logger.info(f"✅ Performance '{performance.name}' completed successfully")
 
         except Exception as e:
             logger.error(f"Performance execution failed: {e}")
         finally:
             self.is_performing = False
             self.current_performance = None
+            self.current_timeline = None
 
     def stop_performance(self):
         """Stop current performance"""
         if self.is_performing:
             logger.info("Stopping current performance...")
             self.is_performing = False
+            if self.current_timeline is not None:
+                self.current_timeline.cancel(self.audio_controller.mixer)
             self.audio_controller.stop_current_sound()
             self.lighting_controller.clear_all_lighting()
             self.servo_controller.home_all_servos()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+R2D2 Binary Log Reader
+======================
+
+Decodes the compact binary logs written by R2D2BinaryLogHandler
+(logs/{service}.r2log) back into structured JSON entries.
+
+Usage:
+    python3 r2d2_log_reader.py logs/vision_system.r2log
+    python3 r2d2_log_reader.py logs/vision_system.r2log --level WARNING --tail 50
+    python3 r2d2_log_reader.py logs/*.r2log --event-type frame_anomaly --pretty
+"""
+
+import sys
+import json
+import struct
+import logging
+import argparse
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterator, Union
+
+from r2d2_logging_framework import BINARY_LOG_MAGIC
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+_LENGTH = struct.Struct('<I')
+
+
+class BinaryLogError(Exception):
+    """Raised when a binary log file cannot be decoded"""
+    pass
+
+
+def read_binary_log(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the entries of a binary log file
+
+    A truncated final frame (e.g. the writer was killed mid-write) is ignored.
+
+    Args:
+        path: Path to a .r2log file
+
+    Yields:
+        Structured log entries (same shape as the JSON log lines)
+    """
+    with open(path, 'rb') as f:
+        header = f.read(len(BINARY_LOG_MAGIC) + 1)
+        if not header:
+            return
+        if header[:len(BINARY_LOG_MAGIC)] != BINARY_LOG_MAGIC:
+            raise BinaryLogError(f"{path}: not an R2D2 binary log")
+
+        codec = header[-1:]
+        if codec == b'M':
+            if not MSGPACK_AVAILABLE:
+                raise BinaryLogError(f"{path}: msgpack-encoded log but msgpack is not installed")
+            decode = lambda payload: msgpack.unpackb(payload, raw=False)
+        elif codec == b'J':
+            decode = lambda payload: json.loads(payload.decode('utf-8'))
+        else:
+            raise BinaryLogError(f"{path}: unknown codec {codec!r}")
+
+        while True:
+            prefix = f.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                return
+            (length,) = _LENGTH.unpack(prefix)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield decode(payload)
+
+
+def _matches(entry: Dict[str, Any], min_level: int, event_type: str) -> bool:
+    if logging.getLevelName(entry.get('level', 'INFO')) < min_level:
+        return False
+    if event_type and entry.get('extra', {}).get('event_type') != event_type:
+        return False
+    return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='R2D2 Binary Log Reader - decode .r2log files to JSON lines',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('files', nargs='+', help='Binary log files to decode')
+    parser.add_argument('--level', '-l', default='DEBUG',
+                        help='Minimum level to show (default: DEBUG)')
+    parser.add_argument('--event-type', '-e', default='',
+                        help='Only show entries with this extra.event_type')
+    parser.add_argument('--tail', '-n', type=int, default=0,
+                        help='Only show the last N matching entries')
+    parser.add_argument('--pretty', '-p', action='store_true',
+                        help='Pretty-print entries')
+    args = parser.parse_args()
+
+    min_level = logging.getLevelName(args.level.upper())
+    if not isinstance(min_level, int):
+        parser.error(f"unknown level: {args.level}")
+
+    output = deque(maxlen=args.tail) if args.tail > 0 else None
+    indent = 2 if args.pretty else None
+
+    try:
+        for path in args.files:
+            for entry in read_binary_log(path):
+                if not _matches(entry, min_level, args.event_type):
+                    continue
+                line = json.dumps(entry, indent=indent, ensure_ascii=False, default=str)
+                if output is not None:
+                    output.append(line)
+                else:
+                    print(line)
+    except (OSError, BinaryLogError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if output is not None:
+        for line in output:
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,9 @@ Features:
 - Memory-efficient log rotation
 - WebSocket event logging
 - System health monitoring
+- Non-blocking pipeline: records are queued by the calling thread and
+  formatted/written in batches by a background listener
+- Optional compact binary log format (see r2d2_log_reader.py)
 
 Author: Expert Python Coder Agent
 """
@@ -21,35 +24,91 @@ Author: Expert Python Coder Agent
 import os
 import sys
 import json
+import math
 import time
+import atexit
+import struct
 import logging
 import threading
 import traceback
 from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from contextlib import contextmanager
+from collections import defaultdict, deque
 import psutil
 import queue
 
+from r2d2_metrics import Histogram
+
+# Optional msgpack support for the binary log format
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
 # Configure logging directory
 LOG_DIR = Path("/home/rolo/r2ai/logs")
 LOG_DIR.mkdir(exist_ok=True)
 
+# LogRecord attributes that are not user-supplied extras
+_STANDARD_RECORD_FIELDS = frozenset([
+    'name', 'msg', 'args', 'levelname', 'levelno', 'pathname',
+    'filename', 'module', 'exc_info', 'exc_text', 'stack_info',
+    'lineno', 'funcName', 'created', 'msecs', 'relativeCreated',
+    'thread', 'threadName', 'processName', 'process', 'getMessage'
+])
+
+class SystemInfoCache:
+    """
+    Process resource snapshot shared by log records
+    Refreshed at most once per refresh_interval instead of per record
+    """
+
+    def __init__(self, refresh_interval: float = 5.0):
+        self.refresh_interval = refresh_interval
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._expires = 0.0
+        self._process = None
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """Return the cached snapshot, refreshing it if stale"""
+        now = time.monotonic()
+        if now >= self._expires:
+            self._expires = now + self.refresh_interval
+            try:
+                if self._process is None:
+                    self._process = psutil.Process()
+                self._snapshot = {
+                    "memory_mb": round(self._process.memory_info().rss / 1024 / 1024, 2),
+                    "cpu_percent": round(self._process.cpu_percent(), 2),
+                    "thread_count": self._process.num_threads()
+                }
+            except Exception:
+                self._snapshot = None
+        return self._snapshot
+
 class R2D2StructuredFormatter(logging.Formatter):
     """
     Structured JSON formatter for R2D2 logs
     Provides machine-readable logs for other agents
     """
 
-    def __init__(self, service_name: str, include_system_info: bool = True):
+    def __init__(self, service_name: str, include_system_info: bool = True,
+                 system_info_refresh: float = 5.0):
         self.service_name = service_name
         self.include_system_info = include_system_info
+        self.system_info = SystemInfoCache(system_info_refresh)
         super().__init__()
 
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as structured JSON"""
+        return json.dumps(self.build_entry(record), ensure_ascii=False, default=str)
+
+    def build_entry(self, record: logging.LogRecord) -> Dict[str, Any]:
+        """Build the structured log entry for a record"""
 
         # Base log structure
         log_entry = {
@@ -74,28 +133,251 @@ class R2D2StructuredFormatter(logging.Formatter):
         # Add extra fields from log record
         extra_fields = {}
         for key, value in record.__dict__.items():
-            if key not in ['name', 'msg', 'args', 'levelname', 'levelno', 'pathname',
-                          'filename', 'module', 'exc_info', 'exc_text', 'stack_info',
-                          'lineno', 'funcName', 'created', 'msecs', 'relativeCreated',
-                          'thread', 'threadName', 'processName', 'process', 'getMessage']:
+            if key not in _STANDARD_RECORD_FIELDS:
                 extra_fields[key] = value
 
         if extra_fields:
             log_entry["extra"] = extra_fields
 
-        # Add system information if enabled
+        # Add (cached) system information if enabled
         if self.include_system_info and record.levelno >= logging.WARNING:
+            system_info = self.system_info.get()
+            if system_info is not None:
+                log_entry["system"] = system_info
+
+        return log_entry
+
+class BatchedRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler that writes a batch of records with one write/flush
+    Used behind R2D2LogPipeline so disk I/O happens off the caller's thread
+    """
+
+    def format_batch(self, records: List[logging.LogRecord]) -> str:
+        """Format records accepted by this handler's level and filters"""
+        lines = [self.format(r) for r in records
+                 if r.levelno >= self.level and self.filter(r)]
+        if not lines:
+            return ""
+        return self.terminator.join(lines) + self.terminator
+
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        """Write a batch of records, rolling over first if it would overflow"""
+        try:
+            data = self.format_batch(records)
+            if not data:
+                return
+            self.acquire()
             try:
-                process = psutil.Process()
-                log_entry["system"] = {
-                    "memory_mb": round(process.memory_info().rss / 1024 / 1024, 2),
-                    "cpu_percent": round(process.cpu_percent(), 2),
-                    "thread_count": process.num_threads()
-                }
-            except:
-                pass
+                if self.stream is None:
+                    self.stream = self._open()
+                if self.maxBytes > 0 and self.stream.tell() + len(data) >= self.maxBytes \
+                        and self.stream.tell() > 0:
+                    self.doRollover()
+                    if self.stream is None:         # doRollover() leaves it closed with delay=True
+                        self.stream = self._open()
+                self._write(data)
+                self.stream.flush()
+            finally:
+                self.release()
+        except Exception:
+            self.handleError(records[-1])
+
+    def _write(self, data) -> None:
+        self.stream.write(data)
+
+BINARY_LOG_MAGIC = b"R2LOG1"
+
+class R2D2BinaryLogHandler(BatchedRotatingFileHandler):
+    """
+    Compact binary log writer
+
+    File layout: BINARY_LOG_MAGIC + codec byte (b'M' msgpack, b'J' compact
+    JSON when msgpack is not installed), then frames of a little-endian
+    uint32 length followed by the encoded structured entry.
+    Decode with r2d2_log_reader.py.
+    """
+
+    def __init__(self, filename, service_name: str, maxBytes: int = 0, backupCount: int = 0):
+        self.codec = b'M' if MSGPACK_AVAILABLE else b'J'
+        super().__init__(filename, mode='ab', maxBytes=maxBytes, backupCount=backupCount,
+                         delay=True)
+        self.setFormatter(R2D2StructuredFormatter(service_name))
+
+    def _open(self):
+        # RotatingFileHandler forces text mode when maxBytes is set
+        return open(self.baseFilename, 'ab')
+
+    def _encode(self, entry: Dict[str, Any]) -> bytes:
+        if self.codec == b'M':
+            return msgpack.packb(entry, default=str, use_bin_type=True)
+        return json.dumps(entry, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+
+    def format_batch(self, records: List[logging.LogRecord]) -> bytes:
+        frames = []
+        for record in records:
+            if record.levelno < self.level or not self.filter(record):
+                continue
+            payload = self._encode(self.formatter.build_entry(record))
+            frames.append(struct.pack('<I', len(payload)))
+            frames.append(payload)
+        return b"".join(frames)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.emit_batch([record])
+
+    def _write(self, data: bytes) -> None:
+        if self.stream.tell() == 0:
+            self.stream.write(BINARY_LOG_MAGIC + self.codec)
+        self.stream.write(data)
+
+class R2D2QueueHandler(QueueHandler):
+    """
+    Non-blocking queue handler with a drop-and-count overflow policy
+    The calling thread only snapshots the message and enqueues the record
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Resolve the message now; structured formatting happens on the listener"""
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class R2D2BatchingQueueListener(QueueListener):
+    """
+    Queue listener that drains records in batches and hands each batch to
+    batch-capable handlers in one call (one write + flush per file)
+    """
+
+    def __init__(self, log_queue: queue.Queue, *handlers, batch_size: int = 256,
+                 queue_handler: Optional[R2D2QueueHandler] = None):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+        self.queue_handler = queue_handler
+        self._reported_drops = 0
+        self._idle = threading.Event()
+
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        for handler in self.handlers:
+            if hasattr(handler, 'emit_batch'):
+                handler.emit_batch(records)
+            else:
+                for record in records:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+
+    def _report_drops(self) -> None:
+        if self.queue_handler is None:
+            return
+        dropped = self.queue_handler.dropped
+        if dropped > self._reported_drops:
+            record = logging.LogRecord(
+                "r2d2.logging", logging.WARNING, __file__, 0,
+                f"Log queue full: dropped {dropped - self._reported_drops} records "
+                f"({dropped} total)", None, None)
+            record.event_type = "log_records_dropped"
+            record.dropped_total = dropped
+            self._reported_drops = dropped
+            self.handle_batch([record])
+
+    def _monitor(self):
+        q = self.queue
+        has_task_done = hasattr(q, 'task_done')
+        while True:
+            self._idle.set()
+            record = q.get()
+            self._idle.clear()
+            batch = []
+            stop = False
+            while True:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    batch.append(record)
+                if has_task_done:
+                    q.task_done()
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = q.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self.handle_batch(batch)
+            self._report_drops()
+            if stop:
+                break
+
+    def enqueue_sentinel(self):
+        # The queue may be full; wait for room rather than failing shutdown
+        self.queue.put(self._sentinel, timeout=5.0)
+
+class R2D2LogPipeline:
+    """
+    Bounded QueueHandler -> batching QueueListener pipeline for one service
+    """
 
-        return json.dumps(log_entry, ensure_ascii=False)
+    def __init__(self, handlers: List[logging.Handler], queue_size: int = 10000,
+                 batch_size: int = 256):
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.queue_handler = R2D2QueueHandler(self.queue)
+        self.handlers = handlers
+        self.listener = R2D2BatchingQueueListener(
+            self.queue, *handlers, batch_size=batch_size, queue_handler=self.queue_handler)
+        self.listener.start()
+
+    @property
+    def dropped(self) -> int:
+        """Records dropped because the queue was full"""
+        return self.queue_handler.dropped
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until queued records have been written (for shutdown and tests)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.queue.unfinished_tasks == 0 and self.listener._idle.is_set():
+                return True
+            time.sleep(0.005)
+        return False
+
+    def stop(self) -> None:
+        """Drain the queue, stop the listener and close handlers"""
+        if self.listener._thread is not None:
+            self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Pipeline statistics"""
+        return {
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "dropped": self.dropped
+        }
+
+_pipelines: Dict[str, R2D2LogPipeline] = {}
+_pipelines_lock = threading.Lock()
+
+@atexit.register
+def _stop_all_pipelines():
+    with _pipelines_lock:
+        for pipeline in _pipelines.values():
+            try:
+                pipeline.stop()
+            except Exception:
+                pass
+        _pipelines.clear()
 
 class PerformanceLogger:
     """
@@ -300,66 +582,208 @@ class WebSocketEventLogger:
             "total_errors": self.message_stats["errors"]
         })
 
+class LatencyHistogram(Histogram):
+    """
+    HDR-style log-linear latency histogram
+
+    A metrics Histogram whose bucket bounds are powers of two from `lowest`
+    up to `highest`, each power split into `sub_buckets` linear steps. This
+    bounds the relative error of a percentile to about 1/sub_buckets with
+    fixed memory. It is not registered; callers keep their own instances.
+    """
+
+    def __init__(self, lowest: float = 1e-6, highest: float = 100.0, sub_buckets: int = 32,
+                 name: str = 'latency_seconds', documentation: str = ''):
+        powers = max(1, int(math.ceil(math.log2(highest / lowest))))
+        bounds = [lowest * (2.0 ** power) * (1.0 + sub / sub_buckets)
+                  for power in range(powers) for sub in range(1, sub_buckets + 1)]
+        super().__init__(name, documentation, buckets=bounds)
+
+    def reset(self) -> None:
+        """Clear all recorded values"""
+        with self._lock:
+            self._default = self._children[()] = self._new_child()
+
+    def record(self, value: float) -> None:
+        """Record one value (seconds)"""
+        self._default.observe(value)
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, min/max and p50/p95/p99 in seconds"""
+        child = self._default
+        _, total, count, minimum, maximum = child.get()
+        return {
+            "count": count,
+            "mean": round(total / count, 6) if count else 0.0,
+            "min": round(minimum, 6) if count else 0.0,
+            "max": round(maximum, 6),
+            "p50": round(child.percentile(50), 6),
+            "p95": round(child.percentile(95), 6),
+            "p99": round(child.percentile(99), 6)
+        }
+
 class VisionSystemLogger:
     """
     Vision system specific logging
+
+    Per-frame timings go into in-memory histograms instead of the log.
+    An aggregated summary record is emitted every `summary_interval`
+    seconds; individual frames are only logged for the first frame and for
+    anomalies (processing time over `latency_threshold`, detection errors).
     """
 
-    def __init__(self, logger: logging.Logger):
+    def __init__(self, logger: logging.Logger, latency_threshold: float = 0.1,
+                 summary_interval: float = 10.0):
         self.logger = logger
+        self.latency_threshold = latency_threshold
+        self.summary_interval = summary_interval
         self.frame_stats = {
             "processed": 0,
             "failed": 0,
-            "detections": 0
+            "detections": 0,
+            "anomalies": 0,
+            "suppressed_records": 0
         }
-        self.detection_history = []
+        self.detection_history = deque(maxlen=100)
+
+        # Cumulative and per-interval processing time histograms
+        self.processing_histogram = LatencyHistogram()
+        self.interval_histogram = LatencyHistogram()
+        self.interval_detections = 0
+        self.interval_anomalies = 0
+        self.class_counts: Dict[str, int] = defaultdict(int)
+        self._interval_start = time.time()
+        self._detection_results_logged = False
+        self._lock = threading.Lock()
+
+    def _detection_error(self, detections: List[Dict]) -> Optional[str]:
+        """Return a description if any detection is malformed or reports an error"""
+        for detection in detections:
+            if not isinstance(detection, dict):
+                return "malformed_detection"
+            if detection.get("error"):
+                return str(detection["error"])
+            confidence = detection.get("confidence", 0)
+            if not isinstance(confidence, (int, float)) or not 0.0 <= confidence <= 1.0:
+                return f"invalid_confidence: {confidence!r}"
+        return None
 
     def log_frame_processing(self, frame_id: str, processing_time: float,
                            frame_size: tuple, detections: List[Dict]):
-        """Log frame processing events"""
-        self.frame_stats["processed"] += 1
+        """Record frame processing; log the frame only if it is an anomaly"""
         detection_count = len(detections)
-        self.frame_stats["detections"] += detection_count
+        now = time.time()
+
+        with self._lock:
+            self.frame_stats["processed"] += 1
+            self.frame_stats["detections"] += detection_count
+            self.processing_histogram.record(processing_time)
+            self.interval_histogram.record(processing_time)
+            self.interval_detections += detection_count
+
+            # Keep detection history for analysis
+            self.detection_history.append({
+                "timestamp": now,
+                "detection_count": detection_count,
+                "processing_time": processing_time
+            })
 
-        # Keep detection history for analysis
-        self.detection_history.append({
-            "timestamp": time.time(),
-            "detection_count": detection_count,
-            "processing_time": processing_time
-        })
+            first_frame = self.frame_stats["processed"] == 1
+            reason = None
+            if processing_time > self.latency_threshold:
+                reason = "latency_threshold"
+            else:
+                error = self._detection_error(detections)
+                if error:
+                    reason = f"detection_error: {error}"
+
+            if reason:
+                self.frame_stats["anomalies"] += 1
+                self.interval_anomalies += 1
+            elif not first_frame:
+                self.frame_stats["suppressed_records"] += 1
+
+            emit_summary = now - self._interval_start >= self.summary_interval
+
+        if reason or first_frame:
+            level = logging.WARNING if reason else logging.DEBUG
+            self.logger.log(level, f"Frame processed: {frame_id}" +
+                            (f" (anomaly: {reason})" if reason else ""), extra={
+                "event_type": "frame_processed",
+                "frame_id": frame_id,
+                "processing_time_seconds": round(processing_time, 4),
+                "frame_width": frame_size[0],
+                "frame_height": frame_size[1],
+                "detection_count": detection_count,
+                "detections": detections,
+                "anomaly": reason,
+                "total_frames": self.frame_stats["processed"],
+                "total_detections": self.frame_stats["detections"]
+            })
 
-        # Keep only last 100 entries
-        if len(self.detection_history) > 100:
-            self.detection_history.pop(0)
+        if emit_summary:
+            self.emit_summary(now)
+
+    def emit_summary(self, now: Optional[float] = None):
+        """Log an aggregated summary of the current interval and start a new one"""
+        now = now or time.time()
+        with self._lock:
+            elapsed = max(now - self._interval_start, 1e-6)
+            timings = self.interval_histogram.summary()
+            summary = {
+                "event_type": "frame_processing_summary",
+                "interval_seconds": round(elapsed, 2),
+                "frames": timings["count"],
+                "fps": round(timings["count"] / elapsed, 2),
+                "processing_time_seconds": timings,
+                "detections": self.interval_detections,
+                "anomalies": self.interval_anomalies,
+                "detections_by_class": dict(self.class_counts),
+                "total_frames": self.frame_stats["processed"]
+            }
+            self.interval_histogram.reset()
+            self.interval_detections = 0
+            self.interval_anomalies = 0
+            self.class_counts.clear()
+            self._interval_start = now
 
-        self.logger.debug(f"Frame processed: {frame_id}", extra={
-            "event_type": "frame_processed",
-            "frame_id": frame_id,
-            "processing_time_seconds": round(processing_time, 4),
-            "frame_width": frame_size[0],
-            "frame_height": frame_size[1],
-            "detection_count": detection_count,
-            "detections": detections,
-            "total_frames": self.frame_stats["processed"],
-            "total_detections": self.frame_stats["detections"]
-        })
+        if summary["frames"]:
+            self.logger.info(f"Frame processing summary: {summary['frames']} frames, "
+                             f"p95 {timings['p95'] * 1000:.1f}ms", extra=summary)
 
     def log_detection_results(self, frame_id: str, detections: List[Dict], confidence_threshold: float):
-        """Log detailed detection results"""
-        high_confidence_detections = [d for d in detections if d.get("confidence", 0) > confidence_threshold]
-
-        self.logger.info(f"Detections found: {len(detections)}", extra={
+        """Aggregate detection results; log them only for the first call or errors"""
+        error = self._detection_error(detections)
+
+        with self._lock:
+            for detection in detections:
+                if isinstance(detection, dict):
+                    self.class_counts[detection.get("class", "unknown")] += 1
+            first = not self._detection_results_logged
+            self._detection_results_logged = True
+            if not first and not error:
+                self.frame_stats["suppressed_records"] += 1
+                return
+
+        high_confidence_detections = [d for d in detections
+                                      if isinstance(d, dict) and d.get("confidence", 0) > confidence_threshold]
+
+        self.logger.log(logging.WARNING if error else logging.INFO,
+                        f"Detections found: {len(detections)}", extra={
             "event_type": "detection_results",
             "frame_id": frame_id,
             "total_detections": len(detections),
             "high_confidence_detections": len(high_confidence_detections),
             "confidence_threshold": confidence_threshold,
-            "detections": detections
+            "detections": detections,
+            "detection_error": error
         })
 
     def log_frame_error(self, frame_id: str, error_type: str, error_message: str):
         """Log frame processing errors"""
-        self.frame_stats["failed"] += 1
+        with self._lock:
+            self.frame_stats["failed"] += 1
+            self.interval_anomalies += 1
 
         self.logger.error(f"Frame processing error: {error_type}", extra={
             "event_type": "frame_error",
@@ -370,24 +794,30 @@ class VisionSystemLogger:
         })
 
     def get_performance_summary(self) -> Dict[str, Any]:
-        """Get vision system performance summary"""
-        if not self.detection_history:
-            return {"error": "No detection history available"}
+        """Get vision system performance summary (served from the histograms)"""
+        with self._lock:
+            if self.processing_histogram.count == 0:
+                return {"error": "No detection history available"}
 
-        recent_detections = self.detection_history[-10:]  # Last 10 frames
-        avg_processing_time = sum(d["processing_time"] for d in recent_detections) / len(recent_detections)
-        avg_detections = sum(d["detection_count"] for d in recent_detections) / len(recent_detections)
+            timings = self.processing_histogram.summary()
+            processed = self.frame_stats["processed"]
+            failed = self.frame_stats["failed"]
 
-        return {
-            "total_frames_processed": self.frame_stats["processed"],
-            "total_frames_failed": self.frame_stats["failed"],
-            "total_detections": self.frame_stats["detections"],
-            "success_rate": round(self.frame_stats["processed"] /
-                                (self.frame_stats["processed"] + self.frame_stats["failed"]) * 100, 2)
-                               if (self.frame_stats["processed"] + self.frame_stats["failed"]) > 0 else 0,
-            "avg_processing_time_seconds": round(avg_processing_time, 4),
-            "avg_detections_per_frame": round(avg_detections, 2)
-        }
+            return {
+                "total_frames_processed": processed,
+                "total_frames_failed": failed,
+                "total_detections": self.frame_stats["detections"],
+                "success_rate": round(processed / (processed + failed) * 100, 2)
+                                if (processed + failed) > 0 else 0,
+                "avg_processing_time_seconds": round(timings["mean"], 4),
+                "p50_processing_time_seconds": round(timings["p50"], 4),
+                "p95_processing_time_seconds": round(timings["p95"], 4),
+                "p99_processing_time_seconds": round(timings["p99"], 4),
+                "max_processing_time_seconds": round(timings["max"], 4),
+                "avg_detections_per_frame": round(self.frame_stats["detections"] / processed, 2),
+                "anomalies": self.frame_stats["anomalies"],
+                "suppressed_log_records": self.frame_stats["suppressed_records"]
+            }
 
 class R2D2LoggerFactory:
     """
@@ -398,20 +828,37 @@ class R2D2LoggerFactory:
     def create_service_logger(service_name: str, log_level: str = "INFO",
                             enable_performance_monitoring: bool = True,
                             enable_websocket_logging: bool = False,
-                            enable_vision_logging: bool = False) -> Dict[str, Any]:
+                            enable_vision_logging: bool = False,
+                            async_logging: bool = True,
+                            binary_format: bool = False,
+                            queue_size: int = 10000) -> Dict[str, Any]:
         """
         Create a comprehensive logger setup for R2D2 services
 
+        Args:
+            async_logging: Route records through a bounded queue to a background
+                listener so callers never block on formatting or disk I/O.
+                Records are dropped (and counted) if the queue is full.
+            binary_format: Also write a compact binary log ({service}.r2log)
+            queue_size: Capacity of the async log queue
+
         Returns:
-            Dict containing logger, performance_logger, websocket_logger, vision_logger
+            Dict containing logger, performance_logger, websocket_logger,
+            vision_logger and (when async) log_pipeline
         """
 
         # Create base logger
         logger = logging.getLogger(f"r2d2.{service_name}")
         logger.setLevel(getattr(logging, log_level.upper()))
 
-        # Clear existing handlers
+        # Clear existing handlers (and stop a previous pipeline for this service)
         logger.handlers.clear()
+        with _pipelines_lock:
+            previous = _pipelines.pop(service_name, None)
+        if previous is not None:
+            previous.stop()
+
+        handlers: List[logging.Handler] = []
 
         # Console handler for immediate feedback
         console_handler = logging.StreamHandler(sys.stdout)
@@ -420,11 +867,11 @@ class R2D2LoggerFactory:
         )
         console_handler.setFormatter(console_formatter)
         console_handler.setLevel(logging.INFO)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
 
         # Structured JSON file handler
         log_file = LOG_DIR / f"{service_name}.log"
-        file_handler = RotatingFileHandler(
+        file_handler = BatchedRotatingFileHandler(
             log_file,
             maxBytes=50*1024*1024,  # 50MB
             backupCount=5,
@@ -432,11 +879,11 @@ class R2D2LoggerFactory:
         )
         file_handler.setFormatter(R2D2StructuredFormatter(service_name))
         file_handler.setLevel(getattr(logging, log_level.upper()))
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
 
         # Error-specific handler
         error_log_file = LOG_DIR / f"{service_name}_errors.log"
-        error_handler = RotatingFileHandler(
+        error_handler = BatchedRotatingFileHandler(
             error_log_file,
             maxBytes=10*1024*1024,  # 10MB
             backupCount=3,
@@ -444,11 +891,33 @@ class R2D2LoggerFactory:
         )
         error_handler.setFormatter(R2D2StructuredFormatter(service_name))
         error_handler.setLevel(logging.ERROR)
-        logger.addHandler(error_handler)
+        handlers.append(error_handler)
+
+        # Compact binary log (decode with r2d2_log_reader.py)
+        if binary_format:
+            binary_handler = R2D2BinaryLogHandler(
+                LOG_DIR / f"{service_name}.r2log",
+                service_name,
+                maxBytes=50*1024*1024,
+                backupCount=5
+            )
+            binary_handler.setLevel(getattr(logging, log_level.upper()))
+            handlers.append(binary_handler)
 
-        # Initialize specialized loggers
         components = {"logger": logger}
 
+        # Non-blocking pipeline: callers only enqueue, a listener thread writes
+        if async_logging:
+            pipeline = R2D2LogPipeline(handlers, queue_size=queue_size)
+            with _pipelines_lock:
+                _pipelines[service_name] = pipeline
+            logger.addHandler(pipeline.queue_handler)
+            components["log_pipeline"] = pipeline
+        else:
+            for handler in handlers:
+                logger.addHandler(handler)
+
+        # Initialize specialized loggers
         if enable_performance_monitoring:
             components["performance_logger"] = PerformanceLogger(logger)
 
@@ -463,7 +932,9 @@ class R2D2LoggerFactory:
             "service": service_name,
             "log_level": log_level,
             "components": list(components.keys()),
-            "log_file": str(log_file)
+            "log_file": str(log_file),
+            "async_logging": async_logging,
+            "binary_format": binary_format
         })
 
         return components
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+R2D2 Maestro Script Deployment
+==============================
+
+Onboard playback of compiled animations on the Pololu Maestro.
+
+ScriptCompiler turns animation sequences into timed servo operations,
+but playback still streamed every interpolated frame from Python: one
+serial command per channel per frame, timed by a Python thread. This
+module packs a library of sequences into one script image, one
+subroutine per sequence, uploads it to the Maestro's script memory, and
+starts a sequence with the serial "Restart Script at Subroutine" command.
+A show trigger costs 2 bytes on the serial line, and the Maestro's own
+script timer replaces the Python scheduler.
+
+The image is Maestro script language source, compiled into native
+bytecode by Pololu's own compiler (UscCmd --program), so the board never
+runs bytes encoded by this repo. Image layout:
+- top-level code that only QUITs, so a plain script restart (or the
+  board starting its script after the upload) does nothing
+- one "sub" per sequence, ending in QUIT (or jumping back to its start
+  when it loops), plus the sequence's helper subroutines
+Subroutine numbers follow the order of the "sub" declarations, the
+numbering the Maestro's compiler uses.
+
+Sequences are added in priority order while they fit the script memory
+budget; the ones that do not fit are listed in the image and keep
+streaming from the host. Sizes are an upper-bound estimate (3 bytes per
+literal, 1 per command, 3 per call or jump).
+
+After an upload the script is left stopped. Every trigger first asks the
+deployment's validator (ScriptEngine checks servo limits and preflight
+against the live positions), and refuses the sequence when it fails. The
+image and its subroutine numbers are saved in a JSON manifest, so a
+restarted host without USB access can trigger an already uploaded image.
+
+Features:
+- Script image packing with subroutine numbering and memory budget
+- Upload through Pololu's UscCmd, script left stopped
+- Validated 2-byte serial triggers, stop and script status
+- JSON manifest of the deployed image
+
+Usage:
+    builder = ScriptImageBuilder(budget_bytes=SCRIPT_MEMORY_BYTES[0x008A])
+    builder.add("dome_scan", "sub dome_scan\\n  6000 0 servo\\n  500 delay\\n  quit\\n", 8.0)
+    image = builder.build()
+
+    deployment = MaestroScriptDeployment(controller, uploader=MaestroScriptUploader())
+    deployment.deploy(image)
+    deployment.trigger("dome_scan")
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Script memory by USB product id (Micro Maestro 6, Mini Maestro 12/18/24)
+SCRIPT_MEMORY_BYTES = {0x0089: 1024, 0x008A: 8192, 0x008B: 8192, 0x008C: 8192}
+DEFAULT_SCRIPT_MEMORY = 8192
+MAX_SUBROUTINES = 128
+
+# Size estimate of compiled script source
+LITERAL_BYTES = 3            # Literal opcode and a 16-bit value
+COMMAND_BYTES = 1
+JUMP_BYTES = 3               # goto / subroutine call: opcode and a 16-bit address
+COMMAND_WORDS = {'servo', 'speed', 'acceleration', 'delay', 'quit', 'return'}
+
+USCCMD_ENV = 'R2D2_USCCMD'
+DEFAULT_USCCMD = os.environ.get(USCCMD_ENV) or "UscCmd"
+USCCMD_TIMEOUT = 30.0
+
+DEFAULT_HEADER = "# R2D2 onboard sequences (started with Restart Script at Subroutine)\nquit\n"
+DEFAULT_MANIFEST = "maestro_script_image.json"
+
+
+def script_identifier(name: str) -> str:
+    """Maestro script identifier for a sequence name"""
+    identifier = re.sub(r'\W', '_', name).lower()
+    return identifier if identifier and not identifier[0].isdigit() else f"seq_{identifier}"
+
+
+def subroutine_names(source: str) -> List[str]:
+    """Names of the "sub" declarations in script source, in order"""
+    return [match.group(1).lower() for match in re.finditer(r'^\s*sub\s+(\w+)', source, re.MULTILINE)]
+
+
+def estimate_size(source: str) -> int:
+    """Upper bound of the compiled size of script source in bytes"""
+    size = 0
+    for line in source.splitlines():
+        words = line.split('#', 1)[0].split()
+        i = 0
+        while i < len(words):
+            word = words[i].lower()
+            if word in ('sub', 'goto'):
+                size += JUMP_BYTES if word == 'goto' else 0
+                i += 2                              # Skip the subroutine / label name
+                continue
+            if word.endswith(':'):                  # Label
+                pass
+            elif re.fullmatch(r'-?\d+', word):
+                size += LITERAL_BYTES
+            elif word in COMMAND_WORDS:
+                size += COMMAND_BYTES
+            else:
+                size += JUMP_BYTES                  # Subroutine call
+            i += 1
+    return size
+
+
+@dataclass
+class ScriptImage:
+    """Script memory contents as Maestro script source"""
+    source: str
+    subroutines: Dict[str, int] = field(default_factory=dict)      # name -> subroutine number
+    durations: Dict[str, float] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)               # Did not fit, stream from the host
+    budget_bytes: int = DEFAULT_SCRIPT_MEMORY
+    size: int = 0                                                  # Estimated compiled bytes
+
+    @property
+    def checksum(self) -> int:
+        """CRC32 of the source"""
+        return zlib.crc32(self.source.encode())
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['checksum'] = self.checksum
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ScriptImage':
+        data = dict(data)
+        data.pop('checksum', None)
+        return cls(**data)
+
+
+class ScriptImageBuilder:
+    """Packs sequence subroutines into one script image"""
+
+    def __init__(self, budget_bytes: int = DEFAULT_SCRIPT_MEMORY, header: str = DEFAULT_HEADER):
+        """
+        Args:
+            budget_bytes: Script memory of the target Maestro
+            header: Top-level code (run by a plain script restart), must not move servos
+        """
+        self.budget_bytes = budget_bytes
+        self.image = ScriptImage(source=header, budget_bytes=budget_bytes, size=estimate_size(header))
+        self._names: List[str] = subroutine_names(header)
+
+    def add(self, name: str, source: str, duration: float = 0.0) -> bool:
+        """
+        Add a sequence if it fits
+
+        Args:
+            name: Sequence name (the trigger key)
+            source: Script source of the sequence; its first "sub" is the entry point
+            duration: Sequence duration in seconds
+        """
+        image = self.image
+        if name in image.subroutines:
+            raise ValueError(f"Duplicate sequence in script image: {name}")
+        names = subroutine_names(source)
+        if not names or not source.lstrip().lower().startswith('sub '):
+            raise ValueError(f"Sequence '{name}' source must start with a subroutine declaration")
+        duplicates = set(names) & set(self._names)
+        if duplicates or len(set(names)) != len(names):
+            raise ValueError(f"Sequence '{name}' redeclares subroutines: {sorted(duplicates) or names}")
+
+        size = estimate_size(source)
+        if len(self._names) + len(names) > MAX_SUBROUTINES or image.size + size > self.budget_bytes:
+            image.skipped.append(name)
+            logger.warning(f"Sequence '{name}' (~{size} bytes) does not fit the script image "
+                           f"({image.size}/{self.budget_bytes} bytes used), it will stream from the host")
+            return False
+
+        image.subroutines[name] = len(self._names)
+        self._names.extend(names)
+        image.source += source if source.endswith('\n') else source + '\n'
+        image.size += size
+        image.durations[name] = duration
+        return True
+
+    def skip(self, name: str, reason: str):
+        """Leave a sequence out of the image (it streams from the host)"""
+        self.image.skipped.append(name)
+        logger.warning(f"Sequence '{name}' {reason}, it will stream from the host")
+
+    def build(self) -> ScriptImage:
+        logger.info(f"Script image: {len(self.image.subroutines)} sequences, "
+                    f"~{self.image.size}/{self.budget_bytes} bytes, {len(self.image.skipped)} skipped")
+        return self.image
+
+
+# ==========================================
+# UPLOAD
+# ==========================================
+
+class MaestroScriptUploader:
+    """Compiles and loads a script image with Pololu's UscCmd"""
+
+    def __init__(self, command: str = DEFAULT_USCCMD, device: Optional[str] = None,
+                 script_memory_bytes: int = DEFAULT_SCRIPT_MEMORY):
+        """
+        Args:
+            command: UscCmd executable (R2D2_USCCMD overrides the default)
+            device: Maestro serial number, when several are connected
+            script_memory_bytes: Script memory of the target Maestro
+        """
+        path = shutil.which(command)
+        if path is None:
+            raise RuntimeError(f"{command} not found - cannot upload Maestro scripts")
+        self.command = path
+        self.device = device
+        self.script_memory_bytes = script_memory_bytes
+
+    def _run(self, *args: str):
+        command = [self.command, *args] + (['--device', self.device] if self.device else [])
+        result = subprocess.run(command, capture_output=True, text=True, timeout=USCCMD_TIMEOUT)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} failed: {(result.stderr or result.stdout).strip()}")
+
+    def upload(self, image: ScriptImage):
+        """Compile and write the image, then leave the script stopped"""
+        if image.size > self.script_memory_bytes:
+            raise ValueError(f"Script image of ~{image.size} bytes exceeds {self.script_memory_bytes} bytes")
+
+        fd, path = tempfile.mkstemp(prefix="r2d2_maestro_", suffix=".txt")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(image.source)
+            self._run('--program', path)
+        finally:
+            os.unlink(path)
+        # The board may start the new script at address 0, which only quits; stop it anyway
+        self._run('--stop')
+        logger.info(f"Uploaded script image: ~{image.size} bytes, {len(image.subroutines)} sequences")
+
+
+# ==========================================
+# DEPLOYMENT
+# ==========================================
+
+class MaestroScriptDeployment:
+    """Deployed script image and its serial triggers"""
+
+    def __init__(self, controller, uploader: Optional[MaestroScriptUploader] = None,
+                 manifest_path: Optional[str] = DEFAULT_MANIFEST,
+                 validator: Optional[Callable[[str], bool]] = None):
+        """
+        Args:
+            controller: PololuMaestroController (serial triggers)
+            uploader: Script uploader (None: only trigger an image uploaded earlier)
+            manifest_path: JSON manifest of the deployed image (None: not persisted)
+            validator: Called with a sequence name before each trigger; False refuses it
+        """
+        self.controller = controller
+        self.uploader = uploader
+        self.manifest_path = manifest_path
+        self.validator = validator
+        self.image: Optional[ScriptImage] = self._load_manifest()
+        self.current: Optional[str] = None
+        self.stats = {'uploads': 0, 'triggers': 0, 'trigger_bytes': 0, 'rejected': 0, 'stops': 0}
+
+    def _load_manifest(self) -> Optional[ScriptImage]:
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return None
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return ScriptImage.from_dict(json.load(f))
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable script manifest {self.manifest_path}: {e}")
+            return None
+
+    def _save_manifest(self):
+        if not self.manifest_path:
+            return
+        try:
+            with open(self.manifest_path, 'w') as f:
+                json.dump(self.image.to_dict(), f, indent=2)
+        except OSError as e:
+            logger.warning(f"Could not save script manifest {self.manifest_path}: {e}")
+
+    def deploy(self, image: ScriptImage, force: bool = False) -> bool:
+        """Upload an image (without an uploader, reuse the manifest's); True if it can be triggered"""
+        if self.uploader is None:
+            if not force and self.image is not None and self.image.checksum == image.checksum:
+                logger.warning("No Maestro uploader - trusting the manifest that the board holds the image")
+                self.image = image
+                return True
+            logger.warning("No Maestro uploader - sequences keep streaming from the host")
+            return False
+
+        try:
+            self.uploader.upload(image)
+        except Exception as e:
+            logger.error(f"Script upload failed: {e}")
+            return False
+
+        self.image = image
+        self.stats['uploads'] += 1
+        self._save_manifest()
+        return True
+
+    def __contains__(self, name: str) -> bool:
+        return self.image is not None and name in self.image.subroutines
+
+    def trigger(self, name: str, parameter: Optional[int] = None) -> bool:
+        """Start a deployed sequence on the board (False if it is not in the image or fails validation)"""
+        if name not in self:
+            return False
+        if self.validator is not None and not self.validator(name):
+            logger.warning(f"Onboard sequence '{name}' failed validation - not triggered")
+            self.stats['rejected'] += 1
+            return False
+        if not self.controller.restart_script_at_subroutine(self.image.subroutines[name], parameter):
+            return False
+        self.current = name
+        self.stats['triggers'] += 1
+        self.stats['trigger_bytes'] += 2 if parameter is None else 4
+        return True
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Sleep through a deployed sequence's duration, then check the board once; True if it finished"""
+        duration = self.image.durations.get(name, 0.0) if self.image else 0.0
+        time.sleep(duration if timeout is None else min(duration, timeout))
+        return not self.controller.is_script_running()
+
+    def stop(self):
+        """Stop the onboard script"""
+        self.controller.stop_script()
+        self.current = None
+        self.stats['stops'] += 1
+
+    def get_status(self) -> Dict[str, Any]:
+        image = self.image
+        return {
+            'deployed': image is not None,
+            'sequences': sorted(image.subroutines) if image else [],
+            'streamed': list(image.skipped) if image else [],
+            'image_bytes': image.size if image else 0,
+            'budget_bytes': image.budget_bytes if image else 0,
+            'current': self.current,
+            **self.stats
+        }
@@ -9,6 +9,11 @@ This module provides comprehensive script management capabilities including:
 - Complex multi-servo choreography
 - Real-time script modification and blending
 - Professional animation timeline management
+- Bytecode optimization (redundant targets, speed-limited ramps, merged
+  delays, subroutines) and script memory budgeting
+- Onboard playback (opt-in): sequences emitted as Maestro script source,
+  packed into the Maestro's script memory and started with 2-byte serial
+  triggers after servo limit and preflight checks (r2d2_maestro_script_deploy)
 
 Author: Imagineer Specialist
 Version: 1.0.0
@@ -26,13 +31,24 @@ from dataclasses import dataclass, field, asdict
 from enum import Enum
 from pathlib import Path
 import numpy as np
-from scipy.interpolate import interp1d, CubicSpline
 import queue
 
+from r2d2_maestro_script_deploy import (MaestroScriptDeployment, MaestroScriptUploader, ScriptImage,
+                                        ScriptImageBuilder, DEFAULT_SCRIPT_MEMORY, script_identifier)
+from r2d2_sequence_preflight import SequencePreflight, PreflightLimits, definition_from_commands
+from r2d2_safety_kernel import SEVERITY_CRITICAL
+
 logger = logging.getLogger(__name__)
 
 class MaestroScriptCommand(Enum):
-    """Maestro Script Commands"""
+    """
+    Opcodes of ScriptCompiler's bytecode
+
+    This is the compiler's own encoding (7-bit literals), used for sizing
+    and optimization; it is not the Maestro's native bytecode. Onboard
+    images are emitted as Maestro script source (ScriptCompiler.to_source)
+    and compiled by Pololu's tools.
+    """
     # Stack and flow control
     LITERAL = 0x30
     RETURN = 0x50
@@ -115,35 +131,53 @@ class MaestroScript:
     parameters: Dict[str, int] = field(default_factory=dict)
     estimated_duration: float = 0.0
     safety_checks: bool = True
+    unoptimized_size: int = 0
 
 class ScriptCompiler:
     """Compiles high-level animation descriptions into Maestro bytecode"""
 
-    def __init__(self):
+    def __init__(self, optimize: bool = True):
         self.subroutine_counter = 0
         self.label_counter = 0
         self.current_script = bytearray()
-
-    def compile_animation_sequence(self, sequence: AnimationSequence) -> MaestroScript:
-        """Compile animation sequence to Maestro script"""
+        self.base_address = 0
+        self.optimizer: Optional[ScriptOptimizer] = ScriptOptimizer() if optimize else None
+
+    def compile_animation_sequence(self, sequence: AnimationSequence, base_address: int = 0) -> MaestroScript:
+        """
+        Compile animation sequence to Maestro script
+
+        Args:
+            sequence: Animation sequence to compile
+            base_address: Script memory address the bytecode will be loaded at
+                (jumps are absolute; non-zero when packed into a script image)
+        """
         logger.info(f"🔧 Compiling animation sequence: {sequence.name}")
 
         self.current_script = bytearray()
         self.subroutine_counter = 0
+        self.base_address = base_address
 
         try:
             # Generate main script
             self._compile_sequence_main(sequence)
 
+            # Optimize the frame-by-frame stream
+            bytecode = bytes(self.current_script)
+            if self.optimizer is not None:
+                bytecode = self.optimizer.optimize(bytecode, base_address)
+
             # Create script object
             script = MaestroScript(
                 name=sequence.name,
                 description=sequence.description,
-                bytecode=bytes(self.current_script),
-                estimated_duration=sequence.duration
+                bytecode=bytecode,
+                estimated_duration=sequence.duration,
+                unoptimized_size=len(self.current_script)
             )
 
-            logger.info(f"✅ Compiled script: {len(script.bytecode)} bytes")
+            logger.info(f"✅ Compiled script: {len(script.bytecode)} bytes "
+                        f"({script.unoptimized_size} before optimization)")
             return script
 
         except Exception as e:
@@ -348,8 +382,10 @@ class ScriptCompiler:
 
     def _add_jump_to_start(self):
         """Add jump to start for looping"""
+        # 14-bit address like positions, so the size does not depend on base_address
         self.current_script.extend([
-            MaestroScriptCommand.LITERAL.value, 0,  # Jump to address 0
+            MaestroScriptCommand.LITERAL.value, self.base_address & 0x7F,
+            MaestroScriptCommand.LITERAL.value, (self.base_address >> 7) & 0x7F,
             MaestroScriptCommand.JUMP.value
         ])
 
@@ -357,6 +393,382 @@ class ScriptCompiler:
         """Add quit command to end script"""
         self.current_script.append(MaestroScriptCommand.QUIT.value)
 
+    # Maestro script source
+
+    def compile_operations(self, sequence: AnimationSequence) -> Tuple[List[tuple], List[List[tuple]]]:
+        """Timed operations of a sequence (main script ending in QUIT or a loop jump, subroutines)"""
+        self.current_script = bytearray()
+        self.base_address = 0
+        self._compile_sequence_main(sequence)
+        bytecode = bytes(self.current_script)
+        if self.optimizer is not None:
+            optimized = self.optimizer.optimize_ops(bytecode)
+            if optimized is not None:
+                return optimized
+        return ScriptOptimizer().decode(bytecode), []
+
+    def to_source(self, name: str, main: List[tuple], subroutines: List[List[tuple]],
+                  target: Optional[Callable[[int, int], int]] = None) -> str:
+        """
+        Maestro script language source of compiled operations
+
+        Args:
+            name: Sequence name (the entry subroutine is named after it)
+            main: Main operations, ending in QUIT or a loop jump
+            subroutines: Helper subroutines called from main
+            target: Maps (channel, position) to the value written on the board
+        """
+        label = script_identifier(name)
+        target = target or (lambda channel, position: position)
+        lines = [f"sub {label}"]
+        if any(op[0] == 'jump' for op in main):
+            lines.append(f"{label}_start:")
+        lines.extend(self._source_line(op, label, target) for op in main)
+        for index, sub in enumerate(subroutines):
+            lines.append(f"sub {label}_part{index}")
+            lines.extend(self._source_line(op, label, target) for op in sub)
+        return "\n".join(lines) + "\n"
+
+    def _source_line(self, op: tuple, label: str, target: Callable[[int, int], int]) -> str:
+        kind = op[0]
+        if kind == 'servo':
+            return f"  {target(op[1], op[2])} {op[1]} servo"
+        if kind in ('speed', 'acceleration'):
+            return f"  {op[2]} {op[1]} {kind}"
+        if kind == 'delay':
+            return f"  {op[1]} delay"
+        if kind == 'jump':
+            return f"  goto {label}_start"
+        if kind == 'call':
+            return f"  {label}_part{op[1]}"
+        return f"  {kind}"                     # quit / return
+
+@dataclass
+class ScriptSizeReport:
+    """Compiled script sizes against a Maestro's script memory"""
+    budget_bytes: int
+    scripts: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # name -> (unoptimized, optimized)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(optimized for _, optimized in self.scripts.values())
+
+    @property
+    def unoptimized_bytes(self) -> int:
+        return sum(unoptimized for unoptimized, _ in self.scripts.values())
+
+    @property
+    def fits(self) -> bool:
+        return self.total_bytes <= self.budget_bytes
+
+    def summary(self) -> Dict:
+        return {
+            "budget_bytes": self.budget_bytes,
+            "total_bytes": self.total_bytes,
+            "unoptimized_bytes": self.unoptimized_bytes,
+            "headroom_bytes": self.budget_bytes - self.total_bytes,
+            "fits": self.fits,
+            "scripts": {name: {"unoptimized": u, "optimized": o} for name, (u, o) in self.scripts.items()}
+        }
+
+class ScriptOptimizer:
+    """
+    Optimization pass over ScriptCompiler bytecode
+
+    The frame-by-frame stream is decoded into timed operations, then:
+    - targets equal to the channel's current target (or overridden in the
+      same frame) are removed
+    - runs of targets on a straight line in time are replaced by one
+      speed-limited target (speed in 0.25us per 10ms), restoring the
+      unlimited speed when the ramp ends; channels whose speed or
+      acceleration the script sets are left alone
+    - consecutive delays are merged
+    - repeated operation windows are moved into subroutines (CALL/RETURN)
+      when that saves bytes
+
+    Streams with operations it does not recognize are returned unchanged.
+    """
+
+    OP_BYTES = {'servo': 7, 'speed': 7, 'acceleration': 7, 'delay': 5, 'jump': 5, 'call': 5,
+                'quit': 1, 'return': 1}
+    MAX_DELAY_MS = 0x3FFF
+    CHANNEL_COMMANDS = {
+        MaestroScriptCommand.SERVO.value: 'servo',
+        MaestroScriptCommand.SPEED.value: 'speed',
+        MaestroScriptCommand.ACCELERATION.value: 'acceleration',
+    }
+
+    def __init__(self, position_tolerance: int = 2, timing_tolerance_ms: int = 20,
+                 min_ramp_targets: int = 4, max_subroutine_ops: int = 32, max_subroutines: int = 16):
+        """
+        Args:
+            position_tolerance: Largest deviation (0.25us units) of a ramp's targets from its line
+            timing_tolerance_ms: Largest arrival error of a ramp from speed rounding
+            min_ramp_targets: Fewest targets a ramp replaces
+            max_subroutine_ops: Longest repeated window considered for a subroutine
+            max_subroutines: Subroutines per script
+        """
+        self.position_tolerance = position_tolerance
+        self.timing_tolerance_ms = timing_tolerance_ms
+        self.min_ramp_targets = min_ramp_targets
+        self.max_subroutine_ops = max_subroutine_ops
+        self.max_subroutines = max_subroutines
+        self.last_report: Dict[str, int] = {}
+
+    # Decoding and encoding
+
+    def decode(self, bytecode: bytes) -> Optional[List[tuple]]:
+        """Operations of a bytecode stream, or None if it has unknown constructs"""
+        ops, literals, i = [], [], 0
+        while i < len(bytecode):
+            opcode = bytecode[i]
+            if opcode == MaestroScriptCommand.LITERAL.value and i + 1 < len(bytecode):
+                literals.append(bytecode[i + 1])
+                i += 2
+                continue
+            i += 1
+            if opcode in self.CHANNEL_COMMANDS and len(literals) == 3:
+                ops.append((self.CHANNEL_COMMANDS[opcode], literals[0], literals[1] | (literals[2] << 7)))
+            elif opcode == MaestroScriptCommand.DELAY.value and len(literals) == 2:
+                ops.append(('delay', literals[0] | (literals[1] << 7)))
+            elif opcode == MaestroScriptCommand.JUMP.value and len(literals) == 2:
+                ops.append(('jump', literals[0] | (literals[1] << 7)))
+            elif opcode == MaestroScriptCommand.QUIT.value and not literals:
+                ops.append(('quit',))
+            else:
+                return None
+            literals = []
+        return None if literals else ops
+
+    def _encode_op(self, op: tuple, addresses: Dict[int, int]) -> bytes:
+        literal = MaestroScriptCommand.LITERAL.value
+        kind = op[0]
+        if kind in ('servo', 'speed', 'acceleration'):
+            opcode = {'servo': MaestroScriptCommand.SERVO, 'speed': MaestroScriptCommand.SPEED,
+                      'acceleration': MaestroScriptCommand.ACCELERATION}[kind].value
+            return bytes([literal, op[1], literal, op[2] & 0x7F, literal, (op[2] >> 7) & 0x7F, opcode])
+        if kind in ('delay', 'jump', 'call'):
+            value = addresses[op[1]] if kind == 'call' else op[1]
+            opcode = {'delay': MaestroScriptCommand.DELAY, 'jump': MaestroScriptCommand.JUMP,
+                      'call': MaestroScriptCommand.CALL}[kind].value
+            return bytes([literal, value & 0x7F, literal, (value >> 7) & 0x7F, opcode])
+        return bytes([MaestroScriptCommand.QUIT.value if kind == 'quit' else MaestroScriptCommand.RETURN.value])
+
+    def _size(self, ops: List[tuple]) -> int:
+        return sum(self.OP_BYTES[op[0]] for op in ops)
+
+    # Optimization
+
+    def optimize(self, bytecode: bytes, base_address: int = 0) -> bytes:
+        """Optimized bytecode for a script loaded at base_address"""
+        optimized_ops = self.optimize_ops(bytecode, base_address)
+        if optimized_ops is None:
+            return bytecode
+        main, subroutines = optimized_ops
+
+        # Subroutines follow the main script and its tail; CALL needs their absolute addresses
+        address = base_address + self._size(main)
+        addresses = {}
+        for index, sub in enumerate(subroutines):
+            addresses[index] = address
+            address += self._size(sub)
+        optimized = b''.join(self._encode_op(op, addresses)
+                             for op in main + [op for sub in subroutines for op in sub])
+
+        if len(optimized) >= len(bytecode):
+            return bytecode
+        self.last_report.update(optimized_bytes=len(optimized), subroutines=len(subroutines),
+                                merged_delays=sum(1 for op in self.decode(bytecode) if op[0] == 'delay') -
+                                sum(1 for op in main + [o for sub in subroutines for o in sub] if op[0] == 'delay'))
+        return optimized
+
+    def optimize_ops(self, bytecode: bytes,
+                     base_address: int = 0) -> Optional[Tuple[List[tuple], List[List[tuple]]]]:
+        """Optimized operations (main script with its tail, subroutines), or None if not recognized"""
+        self.last_report = {'unoptimized_bytes': len(bytecode), 'optimized_bytes': len(bytecode),
+                            'removed_targets': 0, 'ramps': 0, 'merged_delays': 0, 'subroutines': 0}
+        ops = self.decode(bytecode)
+        if ops is None:
+            logger.debug("Script has unrecognized operations - not optimized")
+            return None
+
+        # Body, then a tail of a loop jump to the start and/or QUIT
+        split = next((i for i, op in enumerate(ops) if op[0] in ('jump', 'quit')), len(ops))
+        body, tail = ops[:split], ops[split:]
+        if any(op[0] not in ('jump', 'quit') for op in tail) or \
+                any(op[0] == 'jump' and op[1] != base_address for op in tail):
+            logger.debug("Script has jumps inside its body - not optimized")
+            return None
+
+        events, total_ms = self._timeline(body)
+        events = self._remove_redundant_targets(events)
+        events = self._replace_ramps(events)
+        main = self._emit(events, total_ms)
+        main, subroutines = self._extract_subroutines(main)
+        return main + tail, subroutines
+
+    @staticmethod
+    def expand(main: List[tuple], subroutines: List[List[tuple]]) -> List[tuple]:
+        """Operations of main with subroutine calls inlined"""
+        ops = []
+        for op in main:
+            if op[0] == 'call':
+                ops.extend(o for o in subroutines[op[1]] if o[0] != 'return')
+            else:
+                ops.append(op)
+        return ops
+
+    def _timeline(self, body: List[tuple]) -> Tuple[List[list], int]:
+        """[time_ms, order, op] for every non-delay operation, and the body duration"""
+        events, now = [], 0
+        for order, op in enumerate(body):
+            if op[0] == 'delay':
+                now += op[1]
+            else:
+                events.append([now, order, op])
+        return events, now
+
+    def _remove_redundant_targets(self, events: List[list]) -> List[list]:
+        # A target overridden later in the same frame never takes effect
+        last_in_frame = {}
+        for index, (now, _, op) in enumerate(events):
+            if op[0] == 'servo':
+                last_in_frame[(now, op[1])] = index
+
+        kept, targets = [], {}
+        for index, event in enumerate(events):
+            now, _, op = event
+            if op[0] == 'servo':
+                if last_in_frame[(now, op[1])] != index or targets.get(op[1]) == op[2]:
+                    self.last_report['removed_targets'] += 1
+                    continue
+                targets[op[1]] = op[2]
+            kept.append(event)
+        return kept
+
+    def _replace_ramps(self, events: List[list]) -> List[list]:
+        limited = {op[1] for _, _, op in events if op[0] in ('speed', 'acceleration')}
+        targets: Dict[int, List[list]] = {}
+        for event in events:
+            op = event[2]
+            if op[0] == 'servo' and op[1] not in limited:
+                targets.setdefault(op[1], []).append(event)
+
+        replaced = set()
+        added = []
+        for channel, points in targets.items():
+            i, chain_end = 0, None
+            while i < len(points) - 1:
+                end = self._longest_ramp(points, i)
+                if end is None:
+                    i += 1
+                    continue
+                (t0, order0, op0), (t1, order1, op1) = points[i], points[end]
+                speed = round(abs(op1[2] - op0[2]) * 10.0 / (t1 - t0))
+                # The first ramp of a chain keeps its start target: set at unlimited
+                # speed, it moves the servo there before the speed limit applies
+                added.append([t0, order0 + 0.25, ('speed', channel, speed)])
+                added.append([t0, order0 + 0.5, ('servo', channel, op1[2])])
+                chained = end < len(points) - 1 and self._longest_ramp(points, end) is not None
+                if not chained:
+                    added.append([t1, order1, ('speed', channel, 0)])
+                replaced.update(id(points[k]) for k in range(i if i == chain_end else i + 1, end + 1))
+                self.last_report['ramps'] += 1
+                i = chain_end = end
+
+        kept = [event for event in events if id(event) not in replaced]
+        return sorted(kept + added, key=lambda event: (event[0], event[1]))
+
+    def _longest_ramp(self, points: List[list], start: int) -> Optional[int]:
+        """Last index of the longest straight run of targets starting at start"""
+        best, end = None, start + self.min_ramp_targets - 1
+        t0, p0 = points[start][0], points[start][2][2]
+        while end < len(points):
+            t1, p1 = points[end][0], points[end][2][2]
+            distance, duration = abs(p1 - p0), t1 - t0
+            if duration <= 0 or distance <= self.position_tolerance:
+                break
+            if any(abs(p0 + (p1 - p0) * (points[k][0] - t0) / duration - points[k][2][2]) > self.position_tolerance
+                   for k in range(start + 1, end)):
+                break
+            speed = round(distance * 10.0 / duration)
+            if speed < 1 or abs(distance * 10.0 / speed - duration) > self.timing_tolerance_ms:
+                break
+            best = end
+            end += 1
+        return best
+
+    def _emit(self, events: List[list], total_ms: int) -> List[tuple]:
+        """Operations with merged delays between event times"""
+        ops, now = [], 0
+        for time_ms, _, op in events:
+            ops.extend(self._delays(time_ms - now))
+            ops.append(op)
+            now = time_ms
+        ops.extend(self._delays(total_ms - now))
+        return ops
+
+    def _delays(self, milliseconds: int) -> List[tuple]:
+        delays = []
+        while milliseconds > 0:
+            delays.append(('delay', min(milliseconds, self.MAX_DELAY_MS)))
+            milliseconds -= delays[-1][1]
+        return delays
+
+    def _extract_subroutines(self, main: List[tuple]) -> Tuple[List[tuple], List[List[tuple]]]:
+        """Move the most profitable repeated windows into subroutines"""
+        subroutines: List[List[tuple]] = []
+        while len(subroutines) < self.max_subroutines:
+            best = None
+            for width in range(2, min(self.max_subroutine_ops, len(main) // 2) + 1):
+                starts: Dict[tuple, List[int]] = {}
+                for i in range(len(main) - width + 1):
+                    window = tuple(main[i:i + width])
+                    if any(op[0] == 'call' for op in window):
+                        continue
+                    positions = starts.setdefault(window, [])
+                    if not positions or i >= positions[-1] + width:     # Non-overlapping
+                        positions.append(i)
+                for window, positions in starts.items():
+                    count = len(positions)
+                    if count < 2:
+                        continue
+                    size = self._size(list(window))
+                    saving = count * size - (count * self.OP_BYTES['call'] + size + self.OP_BYTES['return'])
+                    if saving > 0 and (best is None or saving > best[0]):
+                        best = (saving, window, positions)
+            if best is None:
+                break
+
+            _, window, positions = best
+            index = len(subroutines)
+            subroutines.append(list(window) + [('return',)])
+            for i in reversed(positions):
+                main[i:i + len(window)] = [('call', index)]
+        return main, subroutines
+
+    # Size budget
+
+    def size_report(self, scripts: Dict[str, 'MaestroScript'], hardware_info=None,
+                    budget_bytes: Optional[int] = None) -> ScriptSizeReport:
+        """
+        Script sizes against the Maestro's script memory
+
+        Args:
+            scripts: Compiled scripts by name
+            hardware_info: MaestroHardwareInfo of the target board
+            budget_bytes: Script memory when no hardware info is given
+        """
+        if hardware_info is not None:
+            budget_bytes = hardware_info.script_memory_bytes
+        report = ScriptSizeReport(budget_bytes=budget_bytes or 8192)
+        for name, script in scripts.items():
+            report.scripts[name] = (script.unoptimized_size or len(script.bytecode), len(script.bytecode))
+        log = logger.info if report.fits else logger.warning
+        log(f"Script size: {report.total_bytes}/{report.budget_bytes} bytes "
+            f"({report.unoptimized_bytes} before optimization)")
+        return report
+
 class MotionPlanner:
     """Advanced motion planning and trajectory generation"""
 
@@ -440,8 +852,17 @@ class MotionPlanner:
 class ScriptEngine:
     """Advanced script execution and management engine"""
 
-    def __init__(self, maestro_controller):
+    def __init__(self, maestro_controller, onboard_playback: bool = False,
+                 preflight_limits: Optional[PreflightLimits] = None):
+        """
+        Args:
+            maestro_controller: PololuMaestroController
+            onboard_playback: Allow deploy_onboard() to upload and trigger onboard sequences
+            preflight_limits: Limits onboard sequences are checked against (default: the controller's servo ranges)
+        """
         self.controller = maestro_controller
+        self.onboard_playback = onboard_playback
+        self.preflight_limits = preflight_limits
         self.compiler = ScriptCompiler()
         self.motion_planner = MotionPlanner()
 
@@ -460,6 +881,10 @@ class ScriptEngine:
         self.blend_sequences: List[str] = []
         self.blend_weights: List[float] = []
 
+        # Onboard script image (None: every sequence streams from the host)
+        self.deployment: Optional[MaestroScriptDeployment] = None
+        self.onboard_definitions: Dict[str, Dict] = {}     # name -> preflight definition
+
         logger.info("🎬 Script Engine initialized")
 
         # Initialize default sequences
@@ -628,6 +1053,13 @@ class ScriptEngine:
         logger.info(f"🎬 Executing script: {script_name}")
 
         try:
+            # Deployed sequences run on the Maestro's own script timer
+            if self.deployment is not None and self.deployment.trigger(script_name):
+                if not sequence.loop:
+                    self.deployment.wait(script_name)
+                logger.info(f"✅ Onboard script started: {script_name}")
+                return
+
             # Execute the sequence using real-time interpolation
             self._execute_sequence_realtime(sequence)
 
@@ -636,6 +1068,149 @@ class ScriptEngine:
         except Exception as e:
             logger.error(f"Script execution failed: {e}")
 
+    def get_size_report(self, hardware_info=None, budget_bytes: Optional[int] = None) -> ScriptSizeReport:
+        """
+        Optimized script sizes of all sequences against the board's script memory
+
+        Args:
+            hardware_info: MaestroHardwareInfo of the target board
+            budget_bytes: Script memory when no hardware info is given
+        """
+        for name in self.animation_sequences:
+            if name not in self.loaded_scripts:
+                self.compile_sequence(name)
+        optimizer = self.compiler.optimizer or ScriptOptimizer()
+        return optimizer.size_report(self.loaded_scripts, hardware_info, budget_bytes)
+
+    def deploy_onboard(self, sequence_names: Optional[List[str]] = None,
+                       uploader: Optional[MaestroScriptUploader] = None,
+                       budget_bytes: Optional[int] = None, force: bool = False,
+                       hardware_info=None) -> Optional[ScriptImage]:
+        """
+        Pack sequences into one script image and upload it to the Maestro
+
+        Only sequences whose targets are within the servo limits and that
+        pass preflight are packed; the rest keep streaming from the host.
+        Disabled unless the engine was created with onboard_playback=True.
+
+        Args:
+            sequence_names: Sequences in priority order (default: all)
+            uploader: Script uploader (None: reuse an image deployed earlier)
+            budget_bytes: Script memory (default: the board's, from hardware_info or the uploader)
+            force: Do not reuse an earlier image without an uploader
+            hardware_info: MaestroHardwareInfo of the target board
+
+        Returns:
+            The image if its sequences can be triggered onboard, else None
+        """
+        if not self.onboard_playback:
+            logger.warning("Onboard playback is disabled - sequences keep streaming from the host")
+            return None
+
+        if budget_bytes is None:
+            if hardware_info is not None:
+                budget_bytes = hardware_info.script_memory_bytes
+            else:
+                budget_bytes = uploader.script_memory_bytes if uploader else DEFAULT_SCRIPT_MEMORY
+
+        builder = ScriptImageBuilder(budget_bytes)
+        definitions = {}
+        for name in sequence_names or list(self.animation_sequences):
+            sequence = self.animation_sequences[name]
+            main, subroutines = self.compiler.compile_operations(sequence)
+            ops = ScriptOptimizer.expand(main, subroutines)
+            definition = self._preflight_definition(ops)
+            if not self._check_targets(name, ops) or not self._preflight(name, definition):
+                builder.skip(name, "failed servo limit or preflight checks")
+                continue
+            if builder.add(name, self.compiler.to_source(name, main, subroutines, self._board_target),
+                           sequence.duration):
+                definitions[name] = definition
+        image = builder.build()
+
+        deployment = self.deployment or MaestroScriptDeployment(self.controller, uploader)
+        deployment.uploader = uploader or deployment.uploader
+        deployment.validator = self._validate_trigger
+        if not deployment.deploy(image, force=force):
+            return None
+        self.onboard_definitions = definitions
+        self.deployment = deployment
+        logger.info(f"✅ Onboard sequences: {sorted(image.subroutines)}")
+        return image
+
+    def _board_target(self, channel: int, position: int) -> int:
+        """Target written on the board (reversed like PololuMaestroController does)"""
+        config = self.controller.servo_configs[channel]
+        if config.reverse:
+            center = (config.min_position + config.max_position) // 2
+            return center + (center - position)
+        return position
+
+    def _check_targets(self, name: str, ops: List[tuple]) -> bool:
+        """Every channel configured and enabled, every target within its servo's limits"""
+        configs = self.controller.servo_configs
+        for op in ops:
+            if op[0] not in ('servo', 'speed', 'acceleration'):
+                continue
+            config = configs.get(op[1])
+            if config is None or not config.enabled:
+                logger.warning(f"Sequence '{name}' commands unconfigured or disabled servo {op[1]}")
+                return False
+            if op[0] == 'servo' and not config.min_position <= op[2] <= config.max_position:
+                logger.warning(f"Sequence '{name}' target {op[2]} is outside the limits of servo {op[1]} "
+                               f"({config.min_position}-{config.max_position})")
+                return False
+        return True
+
+    def _preflight_definition(self, ops: List[tuple]) -> Dict:
+        """Preflight definition of onboard operations (one pass of a loop)"""
+        commands, now, speeds, targets = [], 0, {}, {}
+        for op in ops:
+            kind = op[0]
+            if kind in ('jump', 'quit'):
+                break
+            if kind == 'delay':
+                now += op[1]
+            elif kind == 'speed':
+                speeds[op[1]] = op[2]
+            elif kind == 'servo':
+                channel, position = op[1], op[2]
+                speed, previous = speeds.get(channel, 0), targets.get(channel)
+                # Speed in 0.25us per 10ms; unlimited moves are checked as instant commands
+                duration = abs(position - previous) / speed / 100.0 if speed and previous is not None else 0.0
+                commands.append({'channel': channel, 'command_type': 'position', 'value': position / 4.0,
+                                 'duration': duration, 'motion_type': 'linear', 'delay': now / 1000.0})
+                targets[channel] = position
+        return definition_from_commands(commands)
+
+    def _preflight(self, name: str, definition: Dict, initial_positions: Optional[Dict[int, float]] = None) -> bool:
+        """Preflight a definition (from initial_positions when given)"""
+        limits = self.preflight_limits
+        if limits is None:
+            enabled = {c: config for c, config in self.controller.servo_configs.items() if config.enabled}
+            limits = PreflightLimits(
+                position_limits={c: (float(config.min_position), float(config.max_position))
+                                 for c, config in enabled.items()},
+                channels=sorted(enabled))
+        artifact = SequencePreflight(limits, cache_dir=None,
+                                     initial_positions=initial_positions).compile(name, definition, 'onboard')
+        if not artifact.ok:
+            message = next(v['message'] for v in artifact.violations if v['severity'] == SEVERITY_CRITICAL)
+            logger.warning(f"Sequence '{name}' failed preflight: {message}")
+        return artifact.ok
+
+    def _validate_trigger(self, name: str) -> bool:
+        """Trigger check of an onboard sequence: preflight from the live servo positions"""
+        definition = self.onboard_definitions.get(name)
+        if definition is None:
+            return False
+        positions = {}
+        for channel in self.controller.servo_configs:
+            microseconds = self.controller.get_servo_position_microseconds(channel)
+            if microseconds:
+                positions[channel] = microseconds * 4.0
+        return self._preflight(name, definition, positions)
+
     def _execute_sequence_realtime(self, sequence: AnimationSequence):
         """Execute sequence with real-time interpolation"""
         start_time = time.time()
@@ -748,7 +1323,8 @@ class ScriptEngine:
             "fps": sequence.fps,
             "loop": sequence.loop,
             "tracks": len(sequence.tracks),
-            "compiled": sequence_name in self.loaded_scripts
+            "compiled": sequence_name in self.loaded_scripts,
+            "onboard": self.deployment is not None and sequence_name in self.deployment
         }
 
     def list_sequences(self) -> List[str]:
@@ -766,6 +1342,10 @@ class ScriptEngine:
             except queue.Empty:
                 break
 
+        # Stop an onboard sequence
+        if self.deployment is not None:
+            self.deployment.stop()
+
         # Emergency stop controller
         if self.controller:
             self.controller.emergency_stop()
@@ -0,0 +1,656 @@
+#!/usr/bin/env python3
+"""
+R2D2 Metrics Registry
+=====================
+
+Central registry for the performance counters of the R2D2 subsystems
+(vision, servo backend, diagnostics, servo monitoring, WCB, REST APIs).
+
+Every metric child owns a small lock and a handful of numbers, so updating
+one from a capture or control loop is a dict-free attribute access plus an
+uncontended lock. Readers (the /metrics endpoint, dashboard snapshots)
+take each lock briefly and never copy subsystem state wholesale.
+
+Features:
+- Thread-safe Counter, Gauge and fixed-bucket Histogram metrics
+- Optional labels with cached children (resolve once, update in hot loops)
+- Callback gauges for values owned elsewhere (queue sizes, uptime)
+- Prometheus text exposition format (/metrics)
+- Compact JSON snapshot for dashboards (with bucket-estimated percentiles)
+- Flask and FastAPI endpoint helpers
+- VisionPerformanceStats binding for the vision systems' performance_stats
+
+Usage:
+    from r2d2_metrics import get_registry
+
+    registry = get_registry()
+    frames = registry.counter('vision_frames_total', 'Frames captured')
+    latency = registry.histogram('vision_inference_seconds', 'Inference time')
+
+    frames.inc()
+    latency.observe(0.018)
+
+    install_flask_metrics_endpoint(app)   # Flask: /metrics
+    add_fastapi_metrics_routes(app)       # FastAPI: /metrics
+"""
+
+import bisect
+import math
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers sub-millisecond serial writes up to multi-second requests
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# ============================================================================
+# METRIC CHILDREN (one per label combination)
+# ============================================================================
+
+class _CounterChild:
+    """Monotonically increasing value"""
+
+    __slots__ = ('_lock', '_value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._value += amount
+
+    def get(self) -> float:
+        return self._value
+
+
+class _GaugeChild:
+    """Value that can go up and down, or be read from a callback"""
+
+    __slots__ = ('_lock', '_value', '_function')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the gauge from a callback at exposition time"""
+        self._function = function
+
+    def get(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception as e:
+                logger.debug(f"Gauge callback failed: {e}")
+                return math.nan
+        return self._value
+
+
+class _HistogramChild:
+    """Fixed-bucket distribution with running sum and count"""
+
+    __slots__ = ('_lock', '_bounds', '_counts', '_sum', '_count', '_min', '_max')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._min = math.inf
+        self._max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            if value < self._min:
+                self._min = value
+            if value > self._max:
+                self._max = value
+
+    def time(self) -> '_Timer':
+        """Context manager observing the elapsed wall time in seconds"""
+        return _Timer(self)
+
+    def get(self) -> Tuple[List[int], float, int, float, float]:
+        """Return (bucket counts, sum, count, min, max) as one consistent read"""
+        with self._lock:
+            return list(self._counts), self._sum, self._count, self._min, self._max
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def min(self) -> float:
+        return self._min if self._count else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    def mean(self) -> float:
+        with self._lock:
+            return self._sum / self._count if self._count else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        """Estimate a percentile (0-100) by interpolating within its bucket"""
+        counts, _, count, _, maximum = self.get()
+        return _bucket_percentile(self._bounds, counts, count, maximum, percentile)
+
+
+class _Timer:
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+def _bucket_percentile(bounds: Tuple[float, ...], counts: List[int], count: int,
+                       maximum: float, percentile: float) -> float:
+    if count == 0:
+        return 0.0
+    rank = percentile / 100.0 * count
+    cumulative = 0
+    for index, bucket_count in enumerate(counts):
+        if bucket_count == 0:
+            continue
+        if cumulative + bucket_count >= rank:
+            lower = bounds[index - 1] if index > 0 else 0.0
+            upper = bounds[index] if index < len(bounds) else maximum
+            upper = min(upper, maximum)
+            fraction = (rank - cumulative) / bucket_count
+            return lower + (upper - lower) * max(0.0, min(1.0, fraction))
+        cumulative += bucket_count
+    return maximum
+
+
+# ============================================================================
+# METRIC FAMILIES
+# ============================================================================
+
+class _Metric:
+    """Named metric family; unlabeled metrics proxy to a single child"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        self._default = None if self.labelnames else self._new_child()
+        if self._default is not None:
+            self._children[()] = self._default
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        """
+        Get (or create) the child for a label combination
+
+        Resolve children once outside hot loops and keep the reference;
+        the lookup itself is a dict get on a tuple.
+        """
+        if kwargs:
+            if values:
+                raise ValueError("Pass label values positionally or by name, not both")
+            try:
+                values = tuple(str(kwargs[name]) for name in self.labelnames)
+            except KeyError as e:
+                raise ValueError(f"{self.name}: missing label {e}")
+        else:
+            values = tuple(str(v) for v in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {values}")
+
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def remove(self, *values) -> None:
+        """Drop the child for a label combination"""
+        with self._lock:
+            self._children.pop(tuple(str(v) for v in values), None)
+
+    def children(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def _unlabeled(self):
+        if self._default is None:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels()")
+        return self._default
+
+    def _label_text(self, values: Tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{name}="{_escape_label(value)}"'
+                 for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter(_Metric):
+    """Monotonic counter (events, commands, bytes)"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabeled().inc(amount)
+
+    def get(self) -> float:
+        return self._unlabeled().get()
+
+
+class Gauge(_Metric):
+    """Current value (FPS, temperature, queue depth)"""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._unlabeled().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabeled().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabeled().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._unlabeled().set_function(function)
+
+    def get(self) -> float:
+        return self._unlabeled().get()
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram (latencies, sizes)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        bounds = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        if not bounds:
+            raise ValueError(f"{name}: at least one finite bucket is required")
+        self.buckets = bounds
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabeled().observe(value)
+
+    def time(self) -> _Timer:
+        return self._unlabeled().time()
+
+    def percentile(self, percentile: float) -> float:
+        return self._unlabeled().percentile(percentile)
+
+    @property
+    def count(self) -> int:
+        return self._unlabeled().count
+
+    @property
+    def sum(self) -> float:
+        return self._unlabeled().sum
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+class MetricsRegistry:
+    """
+    Collection of named metrics with text exposition and JSON snapshots
+
+    Metric constructors are get-or-create: a subsystem that is instantiated
+    twice against the same registry shares its metrics. Pass a private
+    MetricsRegistry() where per-instance isolation matters (tests).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str,
+                       labelnames: Sequence[str], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+                return metric
+        if type(metric) is not cls or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} already registered as {metric.kind} "
+                             f"with labels {metric.labelnames}")
+        return metric
+
+    def counter(self, name: str, documentation: str = '',
+                labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str = '',
+              labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge"""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str = '',
+                  labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        """Get or create a fixed-bucket histogram"""
+        return self._get_or_create(Histogram, name, documentation, labelnames,
+                                   buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Look up a registered metric by name"""
+        return self._metrics.get(name)
+
+    def unregister(self, name: str) -> None:
+        """Remove a metric from the registry"""
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def _sorted_metrics(self, prefix: str = '') -> List[_Metric]:
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)
+                    if name.startswith(prefix)]
+
+    def render_text(self, prefix: str = '') -> str:
+        """
+        Render metrics in the Prometheus text exposition format (0.0.4)
+
+        Args:
+            prefix: Only include metrics whose name starts with this prefix
+
+        Returns:
+            Exposition text
+        """
+        lines: List[str] = []
+        for metric in self._sorted_metrics(prefix):
+            if metric.documentation:
+                doc = metric.documentation.replace('\\', '\\\\').replace('\n', '\\n')
+                lines.append(f"# HELP {metric.name} {doc}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+            for values, child in metric.children():
+                if metric.kind == 'histogram':
+                    counts, total, count, _, _ = child.get()
+                    cumulative = 0
+                    for bound, bucket_count in zip(metric.buckets + (math.inf,), counts):
+                        cumulative += bucket_count
+                        le = f'le="{_format_value(bound)}"'
+                        lines.append(f"{metric.name}_bucket"
+                                     f"{metric._label_text(values, le)} {cumulative}")
+                    labels = metric._label_text(values)
+                    lines.append(f"{metric.name}_sum{labels} {_format_value(total)}")
+                    lines.append(f"{metric.name}_count{labels} {count}")
+                else:
+                    lines.append(f"{metric.name}{metric._label_text(values)} "
+                                 f"{_format_value(child.get())}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self, prefix: str = '', percentiles: Sequence[float] = (50, 95, 99)) -> Dict:
+        """
+        Compact JSON-serializable view for dashboards
+
+        Unlabeled metrics map to a number; labeled metrics map label values
+        (joined with '|') to numbers. Histograms report count, sum, mean,
+        min, max and bucket-estimated percentiles instead of raw buckets.
+
+        Args:
+            prefix: Only include metrics whose name starts with this prefix
+            percentiles: Percentiles reported for histograms
+
+        Returns:
+            {"timestamp": ..., "metrics": {name: value}}
+        """
+        metrics: Dict[str, Union[float, Dict]] = {}
+        for metric in self._sorted_metrics(prefix):
+            entries = {}
+            for values, child in metric.children():
+                if metric.kind == 'histogram':
+                    counts, total, count, minimum, maximum = child.get()
+                    value = {
+                        'count': count,
+                        'sum': round(total, 6),
+                        'mean': round(total / count, 6) if count else 0.0,
+                        'min': round(minimum, 6) if count else 0.0,
+                        'max': round(maximum, 6)
+                    }
+                    for p in percentiles:
+                        value[f'p{_format_value(float(p))}'] = round(_bucket_percentile(
+                            metric.buckets, counts, count, maximum, p), 6)
+                else:
+                    value = child.get()
+                entries['|'.join(values)] = value
+            metrics[metric.name] = entries.get('') if not metric.labelnames else entries
+        return {'timestamp': time.time(), 'metrics': metrics}
+
+
+_default_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Process-wide default registry"""
+    return _default_registry
+
+
+# ============================================================================
+# VISION PERFORMANCE STATS
+# ============================================================================
+
+class VisionPerformanceStats:
+    """
+    Registry-backed replacement for the vision systems' performance_stats dict
+
+    Capture, detection and metrics threads update registry metrics labeled
+    with the vision system name; snapshot() rebuilds the legacy dict shape
+    sent to dashboards in each detection message.
+    """
+
+    # performance_stats key -> (metric name, help)
+    GAUGES = {
+        'fps': ('vision_capture_fps', 'Camera capture frame rate'),
+        'inference_fps': ('vision_inference_fps', 'Detection inference rate'),
+        'gpu_utilization': ('vision_gpu_utilization_percent', 'GPU utilization'),
+        'gpu_memory_mb': ('vision_gpu_memory_megabytes', 'GPU memory in use'),
+        'temperature_c': ('vision_temperature_celsius', 'GPU/SoC temperature'),
+        'cpu_utilization': ('vision_cpu_utilization_percent', 'CPU utilization'),
+        'system_memory_mb': ('vision_system_memory_megabytes', 'System memory in use')
+    }
+
+    def __init__(self, system: str, registry: Optional[MetricsRegistry] = None,
+                 confidence_threshold: float = 0.5, extended: bool = False):
+        """
+        Args:
+            system: Vision system name (metric label)
+            registry: Metrics registry (defaults to the process registry)
+            confidence_threshold: Detection confidence threshold (reported in snapshots)
+            extended: Include GPU/CPU/memory gauges in snapshots
+        """
+        registry = registry or get_registry()
+        self.system = system
+        self.confidence_threshold = confidence_threshold
+        self.extended = extended
+
+        self._gauges = {key: registry.gauge(name, doc, ('system',)).labels(system)
+                        for key, (name, doc) in self.GAUGES.items()}
+        self._capture = registry.histogram(
+            'vision_capture_latency_seconds', 'Camera frame read time', ('system',),
+            buckets=(0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25)).labels(system)
+        self._inference = registry.histogram(
+            'vision_inference_seconds', 'Detection inference time', ('system',),
+            buckets=(0.005, 0.01, 0.02, 0.033, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0)).labels(system)
+        self._detections = registry.counter(
+            'vision_detections_total', 'Objects detected', ('system',)).labels(system)
+        self._last_capture = 0.0
+        self._last_inference = 0.0
+
+    def set(self, key: str, value: float) -> None:
+        """Set one of the GAUGES by its performance_stats key"""
+        self._gauges[key].set(value)
+
+    def get(self, key: str) -> float:
+        """Read a value by its performance_stats key"""
+        return self.snapshot()[key]
+
+    def observe_capture(self, seconds: float) -> None:
+        """Record the time taken to read one frame"""
+        self._last_capture = seconds
+        self._capture.observe(seconds)
+
+    def observe_inference(self, seconds: float) -> float:
+        """Record one inference and return the implied inference FPS"""
+        self._last_inference = seconds
+        self._inference.observe(seconds)
+        fps = 1.0 / seconds if seconds > 0 else 0.0
+        self._gauges['inference_fps'].set(fps)
+        return fps
+
+    def add_detections(self, count: int) -> None:
+        """Count objects detected in one frame"""
+        if count:
+            self._detections.inc(count)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Legacy performance_stats dict (times in milliseconds)"""
+        stats = {
+            'fps': self._gauges['fps'].get(),
+            'detection_time': self._last_inference * 1000,
+            'inference_fps': self._gauges['inference_fps'].get(),
+            'total_detections': int(self._detections.get()),
+            'confidence_threshold': self.confidence_threshold,
+            'gpu_memory_usage': self._gauges['gpu_memory_mb'].get(),
+            'capture_latency': self._last_capture * 1000,
+            'detection_time_p95': self._inference.percentile(95) * 1000
+        }
+        if self.extended:
+            for key in ('gpu_utilization', 'gpu_memory_mb', 'temperature_c',
+                        'cpu_utilization', 'system_memory_mb'):
+                stats[key] = self._gauges[key].get()
+        return stats
+
+
+# ============================================================================
+# FRAMEWORK INTEGRATION
+# ============================================================================
+
+def install_flask_metrics_endpoint(app, registry: Optional[MetricsRegistry] = None,
+                                   path: str = '/metrics',
+                                   snapshot_path: str = '/api/metrics') -> None:
+    """
+    Expose the registry on a Flask app
+
+    Args:
+        app: Flask application instance
+        registry: Registry to expose (defaults to the process registry)
+        path: Prometheus text endpoint
+        snapshot_path: Compact JSON snapshot endpoint (?prefix= filters names)
+    """
+    registry = registry or get_registry()
+
+    @app.route(path, methods=['GET'], endpoint='r2d2_metrics_text')
+    def metrics_text():
+        from flask import Response
+        return Response(registry.render_text(), mimetype='text/plain',
+                        content_type=PROMETHEUS_CONTENT_TYPE)
+
+    @app.route(snapshot_path, methods=['GET'], endpoint='r2d2_metrics_snapshot')
+    def metrics_snapshot():
+        from flask import jsonify, request
+        return jsonify(registry.snapshot(prefix=request.args.get('prefix', '')))
+
+
+def add_fastapi_metrics_routes(app, registry: Optional[MetricsRegistry] = None,
+                               path: str = '/metrics',
+                               snapshot_path: str = '/api/metrics',
+                               dependencies: Optional[Sequence[Any]] = None) -> None:
+    """
+    Expose the registry on a FastAPI app
+
+    Args:
+        app: FastAPI application instance
+        registry: Registry to expose (defaults to the process registry)
+        path: Prometheus text endpoint
+        snapshot_path: Compact JSON snapshot endpoint (?prefix= filters names)
+        dependencies: Route dependencies of both endpoints (e.g. [Depends(verify_auth_token)])
+    """
+    from fastapi.responses import Response
+
+    registry = registry or get_registry()
+
+    dependencies = list(dependencies or [])
+
+    @app.get(path, include_in_schema=False, dependencies=dependencies)
+    async def metrics_text():
+        return Response(registry.render_text(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    @app.get(snapshot_path, tags=["System"], dependencies=dependencies)
+    async def metrics_snapshot(prefix: str = ''):
+        return registry.snapshot(prefix=prefix)
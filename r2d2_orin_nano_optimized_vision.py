@@ -24,6 +24,8 @@ import signal
 import subprocess
 import re
 
+from r2d2_metrics import VisionPerformanceStats
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -76,20 +78,8 @@ class OrinNanoOptimizedVision:
             'sharpness': 140  # Enhanced sharpness for clearer, less grainy image
         }
 
-        self.performance_stats = {
-            'fps': 0,
-            'detection_time': 0,
-            'inference_fps': 0,
-            'total_detections': 0,
-            'confidence_threshold': 0.5,
-            'gpu_memory_usage': 0,
-            'capture_latency': 0,
-            'gpu_utilization': 0,
-            'gpu_memory_mb': 0,
-            'temperature_c': 0,  # FIXED: Changed from temperature_celsius to match dashboard
-            'cpu_utilization': 0,
-            'system_memory_mb': 0
-        }
+        # Performance statistics (thread-safe registry metrics)
+        self.perf_stats = VisionPerformanceStats('orin_nano', confidence_threshold=0.5, extended=True)
 
         # GPU metrics collection thread
         self.metrics_thread = None
@@ -104,6 +94,11 @@ class OrinNanoOptimizedVision:
         # Initialize model
         self._load_optimized_model()
 
+    @property
+    def performance_stats(self) -> Dict[str, Any]:
+        """Current performance statistics (legacy dict shape)"""
+        return self.perf_stats.snapshot()
+
     def _load_optimized_model(self):
         """Load YOLO model optimized for Orin Nano with TensorRT support"""
         try:
@@ -271,13 +266,13 @@ class OrinNanoOptimizedVision:
 
                 # Calculate actual capture latency
                 capture_end_time = time.perf_counter()
-                self.performance_stats['capture_latency'] = (capture_end_time - frame_start_time) * 1000
+                self.perf_stats.observe_capture(capture_end_time - frame_start_time)
 
                 # FPS calculation
                 frame_count += 1
                 if frame_count % 30 == 0:
                     elapsed = time.time() - fps_start_time
-                    self.performance_stats['fps'] = frame_count / elapsed
+                    self.perf_stats.set('fps', frame_count / elapsed)
                     with self.frame_queue_lock:
                         queue_size = len(self.frame_queue)
                     logger.info(f"[CAPTURE] FPS: {self.performance_stats['fps']:.1f}, Total frames queued: {total_frames_queued}, frame_queue size: {queue_size}")
@@ -329,7 +324,7 @@ class OrinNanoOptimizedVision:
                         'frame': annotated_frame,
                         'detections': [],
                         'timestamp': datetime.now().isoformat(),
-                        'stats': self.performance_stats.copy()
+                        'stats': self.perf_stats.snapshot()
                     }
 
                     # Thread-safe atomic queue update with deque
@@ -354,11 +349,10 @@ class OrinNanoOptimizedVision:
                     results = self.model(frame, verbose=False, stream=False, device='cuda:0')
 
                 detection_end = time.perf_counter()
-                self.performance_stats['detection_time'] = (detection_end - detection_start) * 1000
+                detection_time_ms = (detection_end - detection_start) * 1000
 
                 # Calculate actual inference FPS (not capture FPS!)
-                inference_fps = 1000.0 / self.performance_stats['detection_time'] if self.performance_stats['detection_time'] > 0 else 0
-                self.performance_stats['inference_fps'] = inference_fps
+                inference_fps = self.perf_stats.observe_inference(detection_end - detection_start)
 
                 # Process results
                 detections = []
@@ -374,7 +368,7 @@ class OrinNanoOptimizedVision:
                             class_id = int(box.cls[0])
                             class_name = self.model.names[class_id]
 
-                            if confidence >= self.performance_stats['confidence_threshold']:
+                            if confidence >= self.perf_stats.confidence_threshold:
                                 detections.append({
                                     'class': class_name,
                                     'confidence': float(confidence),
@@ -390,7 +384,7 @@ class OrinNanoOptimizedVision:
                     'frame': annotated_frame,
                     'detections': detections,
                     'timestamp': datetime.now().isoformat(),
-                    'stats': self.performance_stats.copy()
+                    'stats': self.perf_stats.snapshot()
                 }
 
                 # Thread-safe atomic queue update with deque
@@ -401,7 +395,7 @@ class OrinNanoOptimizedVision:
 
                 if detections_sent % 10 == 0:
                     logger.info(f"[DETECTION] Sent {detections_sent} frames | Inference: {inference_fps:.1f} FPS | "
-                              f"Det time: {self.performance_stats['detection_time']:.1f}ms | "
+                              f"Det time: {detection_time_ms:.1f}ms | "
                               f"Detections: {len(detections)} | Queue: {queue_size}")
 
                 # Log GPU stats every 30 frames
@@ -415,7 +409,7 @@ class OrinNanoOptimizedVision:
                     except (RuntimeError, ImportError):
                         pass
 
-                self.performance_stats['total_detections'] += len(detections)
+                self.perf_stats.add_detections(len(detections))
 
             except Exception as e:
                 logger.error(f"Detection processing error: {e}")
@@ -440,9 +434,10 @@ class OrinNanoOptimizedVision:
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
 
         # Performance overlay with inference FPS
-        perf_text = f"Capture: {self.performance_stats['fps']:.1f} FPS | " \
-                   f"Inference: {self.performance_stats['inference_fps']:.1f} FPS | " \
-                   f"Det: {self.performance_stats['detection_time']:.1f}ms"
+        stats = self.perf_stats.snapshot()
+        perf_text = f"Capture: {stats['fps']:.1f} FPS | " \
+                   f"Inference: {stats['inference_fps']:.1f} FPS | " \
+                   f"Det: {stats['detection_time']:.1f}ms"
 
         cv2.putText(annotated_frame, perf_text, (10, 30),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
@@ -470,17 +465,17 @@ class OrinNanoOptimizedVision:
                     # GPU utilization from GR3D_FREQ
                     gpu_match = re.search(r'GR3D_FREQ\s+(\d+)%', output)
                     if gpu_match:
-                        self.performance_stats['gpu_utilization'] = int(gpu_match.group(1))
+                        self.perf_stats.set('gpu_utilization', int(gpu_match.group(1)))
 
                     # GPU temperature
                     temp_match = re.search(r'GPU@(\d+(?:\.\d+)?)C', output)
                     if temp_match:
-                        self.performance_stats['temperature_c'] = float(temp_match.group(1))
+                        self.perf_stats.set('temperature_c', float(temp_match.group(1)))
 
                     # System memory
                     mem_match = re.search(r'RAM\s+(\d+)/(\d+)MB', output)
                     if mem_match:
-                        self.performance_stats['system_memory_mb'] = int(mem_match.group(1))
+                        self.perf_stats.set('system_memory_mb', int(mem_match.group(1)))
 
                     # CPU utilization (average)
                     cpu_matches = re.findall(r'CPU\s+\[([\d%@,]+)\]', output)
@@ -488,7 +483,7 @@ class OrinNanoOptimizedVision:
                         cpu_vals = re.findall(r'(\d+)%', cpu_matches[0])
                         if cpu_vals:
                             avg_cpu = sum(int(v) for v in cpu_vals) / len(cpu_vals)
-                            self.performance_stats['cpu_utilization'] = round(avg_cpu, 1)
+                            self.perf_stats.set('cpu_utilization', round(avg_cpu, 1))
 
                     return
             except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.CalledProcessError):
@@ -502,9 +497,9 @@ class OrinNanoOptimizedVision:
                 if result.returncode == 0 and result.stdout and '[N/A]' not in result.stdout:
                     parts = result.stdout.strip().split(',')
                     if len(parts) >= 3:
-                        self.performance_stats['gpu_utilization'] = int(parts[0].strip())
-                        self.performance_stats['gpu_memory_mb'] = float(parts[1].strip())
-                        self.performance_stats['temperature_c'] = float(parts[2].strip())
+                        self.perf_stats.set('gpu_utilization', int(parts[0].strip()))
+                        self.perf_stats.set('gpu_memory_mb', float(parts[1].strip()))
+                        self.perf_stats.set('temperature_c', float(parts[2].strip()))
                     return
             except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.CalledProcessError, ValueError):
                 pass
@@ -513,7 +508,7 @@ class OrinNanoOptimizedVision:
             try:
                 import torch
                 if torch.cuda.is_available():
-                    self.performance_stats['gpu_memory_mb'] = torch.cuda.memory_allocated(0) / 1024**2
+                    self.perf_stats.set('gpu_memory_mb', torch.cuda.memory_allocated(0) / 1024**2)
             except (RuntimeError, ImportError):
                 pass
 
@@ -526,7 +521,7 @@ class OrinNanoOptimizedVision:
                         with open(zone, 'r') as f:
                             temp = int(f.read().strip()) / 1000.0
                             if temp > 20 and temp < 100:  # Sanity check
-                                self.performance_stats['temperature_c'] = temp
+                                self.perf_stats.set('temperature_c', temp)
                                 break
             except (IOError, ValueError):
                 pass
@@ -534,9 +529,9 @@ class OrinNanoOptimizedVision:
             # Method 5: Try psutil for CPU and system memory
             try:
                 import psutil
-                self.performance_stats['cpu_utilization'] = psutil.cpu_percent(interval=0.1)
+                self.perf_stats.set('cpu_utilization', psutil.cpu_percent(interval=0.1))
                 mem = psutil.virtual_memory()
-                self.performance_stats['system_memory_mb'] = mem.used / 1024**2
+                self.perf_stats.set('system_memory_mb', mem.used / 1024**2)
             except ImportError:
                 pass
 
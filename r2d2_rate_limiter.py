@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+R2D2 Rate Limiter
+=================
+
+Sliding-window rate limiting for the R2D2 REST APIs.
+
+Each (client, rule) pair owns a fixed-size ring of per-slot request counts
+covering the rule's window, so recording a request and reading the window
+total are O(1) and memory per client never grows. Client state is kept in
+an LRU map: idle clients expire and the least recently seen are evicted
+once the client cap is reached, so memory stays flat under sustained
+dashboard traffic.
+
+Features:
+- O(1) sliding-window counters (ring buffer of sub-window slots)
+- Configurable per-endpoint limits (exact path or path prefix)
+- LRU eviction and idle expiry of client state
+- Flask before_request hook returning 429
+- ASGI middleware (FastAPI/Starlette) returning 429
+
+Usage:
+    limiter = RateLimiter(default_limit=RateLimit(120, 60.0))
+    limiter.set_endpoint_limit('/api/servo', RateLimit(600, 60.0))
+
+    install_flask_rate_limiter(app, limiter)             # Flask
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)  # FastAPI
+"""
+
+import json
+import math
+import threading
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Maximum number of requests allowed per sliding window"""
+    requests: int
+    window_seconds: float = 60.0
+    slots: int = 12  # Sub-window resolution of the sliding window
+
+
+@dataclass
+class RateLimitDecision:
+    """Result of a rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+    rule: str
+
+
+class SlidingWindowCounter:
+    """
+    Ring buffer of request counts over a sliding window
+
+    The window is split into `slots` equal sub-windows. Advancing the ring
+    clears at most `slots` entries, so each update is O(1) regardless of
+    request rate.
+    """
+
+    __slots__ = ('slot_width', 'counts', 'total', 'head_slot')
+
+    def __init__(self, window_seconds: float, slots: int):
+        self.slot_width = window_seconds / slots
+        self.counts: List[int] = [0] * slots
+        self.total = 0
+        self.head_slot = 0  # Absolute slot number of the newest slot
+
+    def _advance(self, now: float) -> None:
+        slot = int(now / self.slot_width)
+        gap = slot - self.head_slot
+        if gap <= 0:
+            return
+        size = len(self.counts)
+        if gap >= size:
+            self.counts = [0] * size
+            self.total = 0
+        else:
+            for step in range(1, gap + 1):
+                index = (self.head_slot + step) % size
+                self.total -= self.counts[index]
+                self.counts[index] = 0
+        self.head_slot = slot
+
+    def count(self, now: float) -> int:
+        """Requests recorded in the current window"""
+        self._advance(now)
+        return self.total
+
+    def add(self, now: float) -> None:
+        """Record one request"""
+        self._advance(now)
+        self.counts[self.head_slot % len(self.counts)] += 1
+        self.total += 1
+
+    def retry_after(self, now: float) -> float:
+        """Seconds until the oldest non-empty slot leaves the window"""
+        self._advance(now)
+        size = len(self.counts)
+        for age in range(size - 1, -1, -1):
+            if self.counts[(self.head_slot - age) % size]:
+                slot_end = (self.head_slot - age + 1) * self.slot_width
+                return max(0.0, slot_end + (size - 1) * self.slot_width - now)
+        return 0.0
+
+
+class _ClientState:
+    """Per-client counters keyed by rule name plus violation count"""
+
+    __slots__ = ('windows', 'violations', 'last_seen')
+
+    def __init__(self):
+        self.windows: Dict[str, SlidingWindowCounter] = {}
+        self.violations = 0
+        self.last_seen = 0.0
+
+
+class RateLimiter:
+    """
+    Thread-safe sliding-window rate limiter with bounded client state
+    """
+
+    def __init__(self, default_limit: RateLimit = RateLimit(100, 60.0),
+                 endpoint_limits: Optional[Dict[str, RateLimit]] = None,
+                 max_clients: int = 1024, idle_timeout: float = 300.0,
+                 exempt_paths: Tuple[str, ...] = ()):
+        """
+        Initialize the rate limiter
+
+        Args:
+            default_limit: Limit applied when no endpoint rule matches
+            endpoint_limits: Path (exact) or prefix (ending in '/' or '*') -> limit
+            max_clients: Maximum tracked clients before LRU eviction
+            idle_timeout: Seconds of inactivity after which client state is dropped
+            exempt_paths: Path prefixes never rate limited (health checks, etc.)
+        """
+        self.default_limit = default_limit
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.exempt_paths = tuple(exempt_paths)
+
+        self._lock = threading.Lock()
+        self._exact: Dict[str, RateLimit] = {}
+        self._prefixes: List[Tuple[str, RateLimit]] = []
+        for path, limit in (endpoint_limits or {}).items():
+            self.set_endpoint_limit(path, limit)
+
+        self._clients: 'OrderedDict[str, _ClientState]' = OrderedDict()
+        self._next_sweep = 0.0
+
+        self.stats = {
+            'allowed': 0,
+            'rejected': 0,
+            'evicted_clients': 0
+        }
+
+    def set_endpoint_limit(self, path: str, limit: RateLimit) -> None:
+        """Configure the limit for an exact path or a path prefix ('/api/servo/*')"""
+        with self._lock:
+            if path.endswith('*') or path.endswith('/'):
+                prefix = path.rstrip('*')
+                self._prefixes = [(p, l) for p, l in self._prefixes if p != prefix]
+                self._prefixes.append((prefix, limit))
+                # Longest prefix wins
+                self._prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+            else:
+                self._exact[path] = limit
+
+    def _resolve(self, endpoint: str) -> Tuple[str, RateLimit]:
+        limit = self._exact.get(endpoint)
+        if limit is not None:
+            return endpoint, limit
+        for prefix, limit in self._prefixes:
+            if endpoint.startswith(prefix):
+                return prefix, limit
+        return 'default', self.default_limit
+
+    def is_exempt(self, endpoint: str) -> bool:
+        """Check whether an endpoint bypasses rate limiting"""
+        return any(endpoint.startswith(prefix) for prefix in self.exempt_paths)
+
+    def hit(self, client: str, endpoint: str, now: Optional[float] = None) -> RateLimitDecision:
+        """
+        Record a request and decide whether it is within the limit
+
+        Rejected requests are not counted against the window, so a client
+        that backs off regains capacity as the window slides.
+
+        Args:
+            client: Client identifier (usually remote address)
+            endpoint: Request path
+            now: Timestamp override (for tests)
+
+        Returns:
+            RateLimitDecision
+        """
+        if now is None:
+            now = time.monotonic()
+        rule_name, limit = self._resolve(endpoint)
+
+        with self._lock:
+            state = self._clients.get(client)
+            if state is None:
+                self._evict(now)
+                state = self._clients[client] = _ClientState()
+            else:
+                self._clients.move_to_end(client)
+            state.last_seen = now
+
+            window = state.windows.get(rule_name)
+            if window is None:
+                window = state.windows[rule_name] = SlidingWindowCounter(
+                    limit.window_seconds, limit.slots)
+
+            current = window.count(now)
+            if current >= limit.requests:
+                state.violations += 1
+                self.stats['rejected'] += 1
+                return RateLimitDecision(False, limit.requests, 0,
+                                         window.retry_after(now), rule_name)
+
+            window.add(now)
+            self.stats['allowed'] += 1
+            return RateLimitDecision(True, limit.requests, limit.requests - current - 1,
+                                     0.0, rule_name)
+
+    def _evict(self, now: float) -> None:
+        """Drop idle clients and enforce the LRU cap (caller holds the lock)"""
+        if now >= self._next_sweep:
+            self._next_sweep = now + min(self.idle_timeout, 30.0)
+            # OrderedDict is in recency order: stop at the first active client
+            while self._clients:
+                client, state = next(iter(self._clients.items()))
+                if now - state.last_seen < self.idle_timeout:
+                    break
+                self._clients.popitem(last=False)
+                self.stats['evicted_clients'] += 1
+
+        while len(self._clients) >= self.max_clients:
+            self._clients.popitem(last=False)
+            self.stats['evicted_clients'] += 1
+
+    def get_violations(self) -> Dict[str, int]:
+        """Violation counts for currently tracked clients"""
+        with self._lock:
+            return {client: state.violations
+                    for client, state in self._clients.items() if state.violations}
+
+    def get_stats(self) -> Dict:
+        """Limiter statistics"""
+        with self._lock:
+            return {
+                **self.stats,
+                'tracked_clients': len(self._clients),
+                'max_clients': self.max_clients
+            }
+
+
+# ============================================================================
+# FRAMEWORK INTEGRATION
+# ============================================================================
+
+def _rate_limit_headers(decision: RateLimitDecision) -> Dict[str, str]:
+    headers = {
+        'X-RateLimit-Limit': str(decision.limit),
+        'X-RateLimit-Remaining': str(decision.remaining)
+    }
+    if not decision.allowed:
+        headers['Retry-After'] = str(max(1, math.ceil(decision.retry_after)))
+    return headers
+
+
+def install_flask_rate_limiter(app, limiter: RateLimiter) -> None:
+    """
+    Reject over-limit requests to a Flask app with 429 Too Many Requests
+
+    Args:
+        app: Flask application instance
+        limiter: RateLimiter instance
+    """
+    @app.before_request
+    def enforce_rate_limit():
+        from flask import request, jsonify
+
+        if request.method == 'OPTIONS' or limiter.is_exempt(request.path):
+            return None
+
+        decision = limiter.hit(request.remote_addr or 'unknown', request.path)
+        if decision.allowed:
+            return None
+
+        logger.warning(f"Rate limit exceeded: {request.remote_addr} {request.path} "
+                       f"(rule: {decision.rule})")
+        response = jsonify({
+            'success': False,
+            'error': 'Rate limit exceeded',
+            'retry_after': round(decision.retry_after, 1)
+        })
+        response.status_code = 429
+        response.headers.update(_rate_limit_headers(decision))
+        return response
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware rejecting over-limit HTTP requests with 429
+
+    Usage (FastAPI/Starlette):
+        app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    """
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope.get('method') == 'OPTIONS':
+            await self.app(scope, receive, send)
+            return
+
+        path = scope.get('path', '')
+        if self.limiter.is_exempt(path):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get('client')
+        client_id = client[0] if client else 'unknown'
+        decision = self.limiter.hit(client_id, path)
+        if decision.allowed:
+            await self.app(scope, receive, send)
+            return
+
+        logger.warning(f"Rate limit exceeded: {client_id} {path} (rule: {decision.rule})")
+        body = json.dumps({
+            'detail': 'Rate limit exceeded',
+            'retry_after': round(decision.retry_after, 1)
+        }).encode('utf-8')
+        headers = [(b'content-type', b'application/json'),
+                   (b'content-length', str(len(body)).encode('ascii'))]
+        headers.extend((k.lower().encode('ascii'), v.encode('ascii'))
+                       for k, v in _rate_limit_headers(decision).items())
+        await send({'type': 'http.response.start', 'status': 429, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def create_api_rate_limiter() -> RateLimiter:
+    """
+    Rate limiter with the defaults used by the R2D2 REST servers
+
+    Dashboards poll status around 1-2 Hz per endpoint and sliders can send
+    tens of servo commands per second, so the limits only catch runaway or
+    abusive clients. Emergency stop and health checks are never limited.
+    """
+    return RateLimiter(
+        default_limit=RateLimit(600, 60.0),
+        endpoint_limits={
+            '/api/servo/': RateLimit(3000, 60.0),
+            '/api/auth/': RateLimit(30, 60.0),
+            '/api/csrf/': RateLimit(120, 60.0)
+        },
+        exempt_paths=('/api/emergency', '/health')
+    )
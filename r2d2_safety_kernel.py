@@ -0,0 +1,991 @@
+#!/usr/bin/env python3
+"""
+R2D2 Safety Kernel
+==================
+
+Event-driven safety evaluation shared by the servo safety systems.
+
+Instead of a thread per subsystem that sleeps and re-reads controller
+state, producers push data into the kernel: position snapshots from the
+controller's read loop or the servo monitor, and command events from the
+command path. Each sample is evaluated synchronously in the publishing
+thread, and only the rules watching the published fields run, only for
+the channels present in the sample. Rule state (motion timers, zone
+occupancy, running current totals) is updated incrementally, so the cost
+of one evaluation is bounded by rules x channels in that sample.
+
+Detection latency, from the timestamp of a violating sample to the
+emergency-stop handlers being invoked, is therefore one rule pass, not
+up to a polling period. Every stop records its latency in a histogram and
+is checked against a latency budget. A deadline watchdog (not a poller:
+it sleeps until the earliest channel deadline) raises stale-data events
+when a channel stops reporting, so a silent producer fails safe, and
+latches a stop when no sample at all arrives within a heartbeat timeout.
+
+The servo safety subsystems share one process-wide kernel
+(get_safety_kernel()): one rule set, one state, one watchdog thread and
+one emergency-stop latch. Each subsystem registers its rules, handlers
+and watchdog timeouts under an owner name and can detach them again. The
+latch records which owners latched it (the owner of a critical rule, the
+owners that requested a critical stale-data or heartbeat watch, or the
+owner passed to trigger_stop), and stays set until each of them has
+called reset(owner); reset() without an owner clears it entirely.
+Positions published to the kernel are in quarter-microseconds (Maestro
+target units) whichever subsystem publishes them.
+
+Features:
+- Position snapshot and command event subscriptions
+- Incremental rules: position limits, thresholds (thermal, current,
+  voltage, tracking error), velocity, stall, compiled single and pairwise
+  collision zones and running totals
+- Edge-triggered events (raised once per violation, escalated once)
+- Latched emergency stop with bounded, measured detection latency
+- Command pre-checks against the same rules, single or batched
+- Whole-trajectory validation before playback
+- Per-channel stale-data watchdog and heartbeat driven by deadlines
+- Process-wide shared kernel with per-owner rules, handlers and timeouts
+
+Usage:
+    kernel = get_safety_kernel()
+    kernel.watch_stale('servo_backend', 2.0)
+    kernel.add_rule(PositionLimitRule({0: (3968, 8000)}), owner='servo_backend')
+    kernel.add_rule(ThresholdRule('temperature', warning=60.0, critical=70.0), owner='servo_backend')
+    kernel.add_stop_handler(lambda event: controller.emergency_stop(), owner='servo_backend')
+
+    controller.add_position_listener(kernel.publish_sample)
+    controller.add_command_listener(kernel.record_command)
+    event = kernel.publish_command(0, 6000, duration=0.5)   # None if allowed
+    kernel.reset('servo_backend')                           # Clears only this owner's part
+    kernel.detach('servo_backend')                          # On shutdown
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from r2d2_collision_table import CollisionTable, forward_fill
+from r2d2_metrics import MetricsRegistry, get_registry
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_WARNING = 'warning'
+SEVERITY_CRITICAL = 'critical'
+
+# Detection latencies are sub-millisecond when the kernel is healthy
+DETECTION_LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                             0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# (severity, message, value) for a violation; None when the key is clear
+Violation = Optional[Tuple[str, str, Optional[float]]]
+ChannelValues = Union[np.ndarray, Sequence[float], Mapping[int, float]]
+
+
+@dataclass
+class SafetyEvent:
+    """A rule violation raised by the kernel"""
+    rule: str
+    channel: int                 # -1 for system-wide events
+    severity: str                # 'warning' or 'critical'
+    message: str
+    value: Optional[float] = None
+    sample_time: float = 0.0     # Timestamp of the sample (or command) that violated
+    detected_time: float = 0.0   # When the kernel raised the event
+    source: str = 'sample'       # 'sample', 'command', 'watchdog' or 'trajectory'
+    owner: Optional[str] = None  # Owner of the rule; None for kernel-wide events
+
+    @property
+    def latency(self) -> float:
+        """Seconds from the violating sample to detection"""
+        return self.detected_time - self.sample_time
+
+# ============================================================================
+# STATE
+# ============================================================================
+
+class KernelState:
+    """Latest per-channel value of every published field (NaN = never seen)"""
+
+    def __init__(self, channels: int):
+        self.channels = channels
+        self.values: Dict[str, np.ndarray] = {}
+        self.updated_at = np.full(channels, np.nan)        # Last sample time per channel
+        self.position_time = np.full(channels, np.nan)     # Last position sample
+        self.previous_position_time = np.full(channels, np.nan)
+        self.previous_position = np.full(channels, np.nan)
+        self.command_time = np.full(channels, np.nan)      # Last accepted command
+
+    def field(self, name: str) -> np.ndarray:
+        """Array for a field, created on first use"""
+        values = self.values.get(name)
+        if values is None:
+            values = self.values[name] = np.full(self.channels, np.nan)
+        return values
+
+    def value(self, name: str, channel: int) -> float:
+        """Latest value of a field for one channel (NaN if unknown)"""
+        values = self.values.get(name)
+        return float(values[channel]) if values is not None else float('nan')
+
+# ============================================================================
+# RULES
+# ============================================================================
+
+class SafetyRule:
+    """
+    Base class for incrementally evaluated rules
+
+    evaluate() is called with the channels present in a sample that
+    touched one of the rule's fields and returns {key: Violation} for
+    every key it evaluated; None clears a previously raised key.
+    """
+
+    fields: Tuple[str, ...] = ('position',)
+
+    def __init__(self, name: str, severity: str = SEVERITY_CRITICAL):
+        self.name = name
+        self.severity = severity
+        self.owner: Optional[str] = None
+
+    def bind(self, channels: int):
+        """Size per-channel state once the kernel's channel count is known"""
+
+    def evaluate(self, state: KernelState, channels: np.ndarray,
+                 timestamp: float) -> Dict[Hashable, Violation]:
+        raise NotImplementedError
+
+    def check_command(self, state: KernelState, channel: int, target: float,
+                      duration: float) -> Violation:
+        """Veto a command before it is sent (default: allow)"""
+        return None
+
+    def check_targets(self, state: KernelState, targets: Mapping[int, float],
+                      duration: float) -> Violation:
+        """Veto a batch of commands sent together (default: each on its own)"""
+        for channel, target in targets.items():
+            violation = self.check_command(state, channel, target, duration)
+            if violation:
+                return violation
+        return None
+
+    def check_trajectory(self, frames: np.ndarray,
+                         tick_seconds: float) -> List[Tuple[int, int, Violation]]:
+        """Check a forward-filled (ticks x channels) table: [(tick, channel, violation)]"""
+        return []
+
+    def on_command(self, state: KernelState, channel: int, target: float, timestamp: float):
+        """Update rule state for an accepted command"""
+
+
+def _per_channel(values: Union[float, Mapping[int, float], None], channels: int,
+                 default: float) -> np.ndarray:
+    """Expand a scalar or {channel: value} mapping into a per-channel array"""
+    array = np.full(channels, default, dtype=float)
+    if isinstance(values, Mapping):
+        for channel, value in values.items():
+            if 0 <= channel < channels:
+                array[channel] = value
+    elif values is not None:
+        array[:] = values
+    return array
+
+
+class PositionLimitRule(SafetyRule):
+    """Position must stay inside [min, max] per channel"""
+
+    def __init__(self, limits: Mapping[int, Tuple[float, float]], name: str = 'position_limit',
+                 severity: str = SEVERITY_CRITICAL, field: str = 'position'):
+        super().__init__(name, severity)
+        self.limits = dict(limits)
+        self.fields = (field,)
+        self.low = self.high = None
+
+    def bind(self, channels: int):
+        self.low = _per_channel({c: lo for c, (lo, hi) in self.limits.items()}, channels, -np.inf)
+        self.high = _per_channel({c: hi for c, (lo, hi) in self.limits.items()}, channels, np.inf)
+
+    def _violation(self, channel: int, position: float) -> Violation:
+        low, high = self.low[channel], self.high[channel]
+        if position < low or position > high:
+            return (self.severity,
+                    f"Servo {channel} position {position:.0f} outside safe range [{low:.0f}, {high:.0f}]",
+                    position)
+        return None
+
+    def evaluate(self, state, channels, timestamp):
+        positions = state.field(self.fields[0])
+        return {int(c): self._violation(int(c), positions[c]) for c in channels
+                if not np.isnan(positions[c])}
+
+    def check_command(self, state, channel, target, duration):
+        return self._violation(channel, target)
+
+    def check_trajectory(self, frames, tick_seconds):
+        count = min(frames.shape[1], len(self.low))
+        with np.errstate(invalid='ignore'):
+            outside = (frames[:, :count] < self.low[:count]) | (frames[:, :count] > self.high[:count])
+        return [(int(np.argmax(outside[:, c])), int(c),
+                 self._violation(int(c), frames[np.argmax(outside[:, c]), c]))
+                for c in np.flatnonzero(outside.any(axis=0))]
+
+
+class ThresholdRule(SafetyRule):
+    """Warning/critical thresholds on any per-channel field"""
+
+    def __init__(self, field: str, warning: Optional[float] = None,
+                 critical: Optional[float] = None, below: bool = False,
+                 name: Optional[str] = None, unit: str = ''):
+        super().__init__(name or field, SEVERITY_CRITICAL)
+        self.fields = (field,)
+        self.warning = warning
+        self.critical = critical
+        self.below = below
+        self.unit = unit
+
+    def _exceeds(self, value: float, limit: Optional[float]) -> bool:
+        if limit is None:
+            return False
+        return value < limit if self.below else value > limit
+
+    def evaluate(self, state, channels, timestamp):
+        values = state.field(self.fields[0])
+        label = self.fields[0].replace('_', ' ')
+        results = {}
+        for c in channels:
+            value = values[c]
+            if np.isnan(value):
+                continue
+            if self._exceeds(value, self.critical):
+                results[int(c)] = (SEVERITY_CRITICAL,
+                                   f"Servo {c} critical {label}: {value:.2f}{self.unit}", float(value))
+            elif self._exceeds(value, self.warning):
+                results[int(c)] = (SEVERITY_WARNING,
+                                   f"Servo {c} {label} out of range: {value:.2f}{self.unit}", float(value))
+            else:
+                results[int(c)] = None
+        return results
+
+
+class SumThresholdRule(SafetyRule):
+    """Threshold on the sum of a field over all channels, kept as a running total"""
+
+    def __init__(self, field: str, critical: float, warning: Optional[float] = None,
+                 name: Optional[str] = None, unit: str = ''):
+        super().__init__(name or f"total_{field}", SEVERITY_CRITICAL)
+        self.fields = (field,)
+        self.critical = critical
+        self.warning = warning
+        self.unit = unit
+        self.total = 0.0
+        self.contribution = None
+
+    def bind(self, channels: int):
+        self.contribution = np.zeros(channels)
+
+    def evaluate(self, state, channels, timestamp):
+        new = np.nan_to_num(state.field(self.fields[0])[channels])
+        self.total += float(np.sum(new - self.contribution[channels]))
+        self.contribution[channels] = new
+
+        label = self.fields[0].replace('_', ' ')
+        if self.total > self.critical:
+            return {'total': (SEVERITY_CRITICAL,
+                              f"Total {label} limit exceeded: {self.total:.2f}{self.unit}", self.total)}
+        if self.warning is not None and self.total > self.warning:
+            return {'total': (SEVERITY_WARNING,
+                              f"Total {label} high: {self.total:.2f}{self.unit}", self.total)}
+        return {'total': None}
+
+
+class VelocityRule(SafetyRule):
+    """Speed between consecutive position samples, and commanded speed"""
+
+    def __init__(self, max_velocity: Union[float, Mapping[int, float]], name: str = 'velocity',
+                 severity: str = SEVERITY_WARNING, min_command_duration: float = 0.1):
+        super().__init__(name, severity)
+        self.max_velocity = max_velocity
+        self.min_command_duration = min_command_duration
+        self.limit = None
+
+    def bind(self, channels: int):
+        self.limit = _per_channel(self.max_velocity, channels, np.inf)
+
+    def evaluate(self, state, channels, timestamp):
+        dt = state.position_time[channels] - state.previous_position_time[channels]
+        moved = np.abs(state.field('position')[channels] - state.previous_position[channels])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            velocity = np.where(dt > 0, moved / dt, np.nan)
+
+        results = {}
+        for c, v in zip(channels, velocity):
+            if np.isnan(v):
+                continue
+            if v > self.limit[c]:
+                results[int(c)] = (self.severity,
+                                   f"Servo {c} velocity {v:.1f} exceeds limit {self.limit[c]:.0f}", float(v))
+            else:
+                results[int(c)] = None
+        return results
+
+    def check_command(self, state, channel, target, duration):
+        position = state.value('position', channel)
+        if np.isnan(position):
+            return None
+        velocity = abs(target - position) / max(duration, self.min_command_duration)
+        if velocity > self.limit[channel]:
+            return (self.severity,
+                    f"Commanded velocity {velocity:.1f} exceeds limit {self.limit[channel]:.0f}", velocity)
+        return None
+
+    def check_trajectory(self, frames, tick_seconds):
+        count = min(frames.shape[1], len(self.limit))
+        velocity = np.abs(np.diff(frames[:, :count], axis=0)) / tick_seconds
+        with np.errstate(invalid='ignore'):
+            fast = velocity > self.limit[:count]
+        results = []
+        for c in np.flatnonzero(fast.any(axis=0)):
+            tick = int(np.argmax(fast[:, c]))
+            v = float(velocity[tick, c])
+            results.append((tick + 1, int(c), (self.severity,
+                            f"Servo {c} velocity {v:.1f} exceeds limit {self.limit[c]:.0f}", v)))
+        return results
+
+
+class StallRule(SafetyRule):
+    """Channel away from its target that has not moved for stall_time seconds"""
+
+    fields = ('position', 'target_position')
+
+    def __init__(self, tolerance: Union[float, Mapping[int, float]],
+                 stall_time: Union[float, Mapping[int, float]],
+                 channels: Optional[Sequence[int]] = None,
+                 name: str = 'stall', severity: str = SEVERITY_WARNING):
+        super().__init__(name, severity)
+        self.tolerance_config = tolerance
+        self.stall_time_config = stall_time
+        self.watched = None if channels is None else set(channels)
+
+    def bind(self, channels: int):
+        self.tolerance = _per_channel(self.tolerance_config, channels, 0.0)
+        self.stall_time = _per_channel(self.stall_time_config, channels, np.inf)
+        self.enabled = np.ones(channels, dtype=bool)
+        if self.watched is not None:
+            self.enabled[:] = False
+            self.enabled[[c for c in self.watched if 0 <= c < channels]] = True
+        self.motion_position = np.full(channels, np.nan)
+        self.motion_time = np.full(channels, np.nan)
+
+    def evaluate(self, state, channels, timestamp):
+        channels = channels[self.enabled[channels]]
+        positions = state.field('position')[channels]
+        targets = state.field('target_position')[channels]
+
+        # Restart the motion timer wherever the servo moved (or is new)
+        moved = ~(np.abs(positions - self.motion_position[channels]) <= self.tolerance[channels])
+        self.motion_position[channels[moved]] = positions[moved]
+        self.motion_time[channels[moved]] = timestamp
+
+        with np.errstate(invalid='ignore'):
+            away = np.abs(targets - positions) > self.tolerance[channels]
+            stalled = away & (timestamp - self.motion_time[channels] > self.stall_time[channels])
+
+        return {
+            int(c): (self.severity, f"Servo {c} stalled {abs(t - p):.0f} from target", float(p))
+            if s else None
+            for c, p, t, s in zip(channels, positions, targets, stalled)
+        }
+
+    def on_command(self, state, channel, target, timestamp):
+        # A new move gets a full stall window
+        self.motion_time[channel] = timestamp
+
+
+class CollisionZoneRule(SafetyRule):
+    """
+    Named zones over one channel or a pair of channels
+
+    A zone is violated while every channel in it is inside its bounds.
+    Zones are compiled into a CollisionTable, so a sample, a batch of
+    targets or a whole trajectory is checked with bitmap lookups for the
+    channel groups it touches instead of a loop over every zone.
+    """
+
+    def __init__(self, zones: Sequence[Tuple[str, Mapping[int, Tuple[float, float]], str]] = (),
+                 name: str = 'collision_zone',
+                 position_range: Tuple[float, float] = (0.0, 16384.0), resolution: float = 32.0):
+        super().__init__(name, SEVERITY_CRITICAL)
+        self.table = CollisionTable(position_range, resolution)
+        for zone in zones:
+            self.add_zone(*zone)
+
+    def add_zone(self, zone_name: str, bounds: Mapping[int, Tuple[float, float]],
+                 severity: str = SEVERITY_CRITICAL):
+        """Add a zone: {channel: (min, max)} that must not be occupied all at once"""
+        self.table.add_zone(zone_name, bounds, severity)
+
+    def remove_zone(self, zone_name: str):
+        """Remove a zone"""
+        self.table.remove_zone(zone_name)
+
+    def evaluate(self, state, channels, timestamp):
+        results: Dict[Hashable, Violation] = {zone: None for zone in self.table.zones_for_channels(channels)}
+        for hit in self.table.check_positions(state.field('position'), channels):
+            servos = ', '.join(str(c) for c in hit.channels)
+            results[hit.zone] = (hit.severity, f"Collision zone '{hit.zone}' entered (servos {servos})", None)
+        return results
+
+    def check_command(self, state, channel, target, duration):
+        return self.check_targets(state, {channel: target}, duration)
+
+    def check_targets(self, state, targets, duration):
+        hits = self.table.check_targets(targets, state.field('position'))
+        if not hits:
+            return None
+        hit = min(hits, key=lambda h: h.severity != SEVERITY_CRITICAL)
+        if len(targets) == 1:
+            channel, target = next(iter(targets.items()))
+            return (hit.severity, f"Servo {channel} target {target:.0f} enters collision zone '{hit.zone}'",
+                    target)
+        servos = ', '.join(str(c) for c in hit.channels)
+        return (hit.severity, f"Batched command enters collision zone '{hit.zone}' (servos {servos})", None)
+
+    def check_trajectory(self, frames, tick_seconds):
+        return [(hit.tick, hit.channels[0],
+                 (hit.severity, f"Collision zone '{hit.zone}' entered at tick {hit.tick} "
+                                f"(servos {', '.join(str(c) for c in hit.channels)})", None))
+                for hit in self.table.validate_trajectory(frames)]
+
+# ============================================================================
+# KERNEL
+# ============================================================================
+
+class SafetyKernel:
+    """Evaluates safety rules on published samples and latches emergency stops"""
+
+    def __init__(self, channels: int = 24, rules: Sequence[SafetyRule] = (),
+                 stale_timeout: Optional[float] = None,
+                 stale_severity: str = SEVERITY_CRITICAL,
+                 latency_budget: float = 0.005,
+                 registry: Optional[MetricsRegistry] = None,
+                 name: str = 'safety'):
+        self.name = name
+        self.channels = channels
+        self.state = KernelState(channels)
+        self.stale_timeout: Optional[float] = None
+        self.stale_severity = stale_severity
+        self.heartbeat_timeout: Optional[float] = None
+        self.latency_budget = latency_budget
+
+        self._rules: List[SafetyRule] = []
+        self._rules_by_field: Dict[str, List[SafetyRule]] = {}
+        self._active: Dict[Tuple[str, Hashable], str] = {}
+        self._stale = np.zeros(channels, dtype=bool)
+        self._stale_requests: Dict[str, Tuple[float, str]] = {}
+        self._heartbeat_requests: Dict[str, float] = {}
+        self._last_sample_time: Optional[float] = None
+        self._heartbeat_lost = False
+        self._stop_handlers: List[Tuple[Callable[[SafetyEvent], Any], Optional[str]]] = []
+        self._event_handlers: List[Tuple[Callable[[SafetyEvent], Any], Optional[str]]] = []
+        self._lock = threading.RLock()
+
+        self.stopped = False
+        self.stop_event: Optional[SafetyEvent] = None
+        self.latched_by: Set[Optional[str]] = set()    # Owners that must reset (None: only a full reset)
+        self.samples_processed = 0
+
+        registry = registry or get_registry()
+        self._detection_latency = registry.histogram(
+            'safety_detection_latency_seconds', 'Violating sample to emergency stop',
+            ('kernel',), buckets=DETECTION_LATENCY_BUCKETS).labels(name)
+        self._evaluation_time = registry.histogram(
+            'safety_evaluation_seconds', 'Rule evaluation time per sample',
+            ('kernel',), buckets=DETECTION_LATENCY_BUCKETS).labels(name)
+        self._events_total = registry.counter(
+            'safety_events_total', 'Safety events raised', ('kernel', 'rule', 'severity'))
+        self._budget_exceeded = registry.counter(
+            'safety_latency_budget_exceeded_total', 'Stops slower than the latency budget',
+            ('kernel',)).labels(name)
+
+        for rule in rules:
+            self.add_rule(rule)
+
+        # Deadline watchdog for channels (and producers) that stop reporting;
+        # started by the first watch_stale() / watch_heartbeat() request
+        self._running = True
+        self._wake = threading.Event()
+        self._watchdog_thread: Optional[threading.Thread] = None
+        if stale_timeout:
+            self.watch_stale(name, stale_timeout, stale_severity)
+
+    # Configuration
+
+    def add_rule(self, rule: SafetyRule, owner: Optional[str] = None) -> SafetyRule:
+        """Register a rule; it runs on samples that publish one of its fields"""
+        with self._lock:
+            rule.owner = owner
+            rule.bind(self.channels)
+            self._rules.append(rule)
+            for field_name in rule.fields:
+                self._rules_by_field.setdefault(field_name, []).append(rule)
+        return rule
+
+    def remove_rule(self, rule: SafetyRule):
+        """Unregister a rule and clear its raised violations"""
+        with self._lock:
+            if rule in self._rules:
+                self._rules.remove(rule)
+            for rules in self._rules_by_field.values():
+                if rule in rules:
+                    rules.remove(rule)
+            for key in [key for key in self._active if key[0] == rule.name]:
+                del self._active[key]
+
+    def add_stop_handler(self, handler: Callable[[SafetyEvent], Any], owner: Optional[str] = None):
+        """Call handler(event) when a critical event latches the emergency stop (any owner's)"""
+        self._stop_handlers.append((handler, owner))
+
+    def add_event_handler(self, handler: Callable[[SafetyEvent], Any], owner: Optional[str] = None):
+        """
+        Call handler(event) for raised events (after stop handlers)
+
+        With an owner, the handler only sees events of that owner's rules
+        and kernel-wide events (stale data, heartbeat, manual stops).
+        """
+        self._event_handlers.append((handler, owner))
+
+    def watch_stale(self, owner: str, timeout: Optional[float], severity: str = SEVERITY_CRITICAL):
+        """
+        Request stale-data events for channels silent longer than timeout
+
+        The shortest timeout and the most severe severity requested by any
+        owner apply. A timeout of None withdraws the owner's request.
+        """
+        with self._lock:
+            if timeout:
+                self._stale_requests[owner] = (timeout, severity)
+            else:
+                self._stale_requests.pop(owner, None)
+            requests = self._stale_requests.values()
+            self.stale_timeout = min(t for t, _ in requests) if requests else None
+            if requests:
+                self.stale_severity = (SEVERITY_CRITICAL if any(s == SEVERITY_CRITICAL for _, s in requests)
+                                       else SEVERITY_WARNING)
+        self._start_watchdog()
+
+    def watch_heartbeat(self, owner: str, timeout: Optional[float]):
+        """
+        Latch a critical 'heartbeat' stop when no sample at all arrives for
+        timeout seconds (counted from the first sample). The shortest
+        requested timeout applies; None withdraws the owner's request.
+        """
+        with self._lock:
+            if timeout:
+                self._heartbeat_requests[owner] = timeout
+            else:
+                self._heartbeat_requests.pop(owner, None)
+            self.heartbeat_timeout = min(self._heartbeat_requests.values(), default=None)
+        self._start_watchdog()
+
+    def detach(self, owner: str):
+        """Remove an owner's rules, handlers and watchdog requests"""
+        with self._lock:
+            for rule in [rule for rule in self._rules if rule.owner == owner]:
+                self.remove_rule(rule)
+            self._stop_handlers = [(h, o) for h, o in self._stop_handlers if o != owner]
+            self._event_handlers = [(h, o) for h, o in self._event_handlers if o != owner]
+        self.watch_stale(owner, None)
+        self.watch_heartbeat(owner, None)
+
+    def _start_watchdog(self):
+        self._wake.set()
+        if self._watchdog_thread is None and (self.stale_timeout or self.heartbeat_timeout):
+            self._watchdog_thread = threading.Thread(
+                target=self._watchdog_loop, daemon=True, name=f"SafetyWatchdog-{self.name}")
+            self._watchdog_thread.start()
+
+    # Producers
+
+    def publish_sample(self, fields: Mapping[str, ChannelValues],
+                       timestamp: Optional[float] = None) -> List[SafetyEvent]:
+        """
+        Evaluate one snapshot
+
+        Args:
+            fields: {field: per-channel values} as arrays (NaN = no reading)
+                or {channel: value} mappings, e.g. {'position': {0: 6000}}
+            timestamp: When the sample was taken (default: now)
+
+        Returns:
+            Events raised by this sample
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        start = time.perf_counter()
+
+        with self._lock:
+            state = self.state
+            updated = np.zeros(self.channels, dtype=bool)
+            rules: List[SafetyRule] = []
+
+            for field_name, values in fields.items():
+                array = self._as_array(values)
+                present = ~np.isnan(array)
+                if not present.any():
+                    continue
+                current = state.field(field_name)
+                if field_name == 'position':
+                    state.previous_position[present] = current[present]
+                    state.previous_position_time[present] = state.position_time[present]
+                    state.position_time[present] = timestamp
+                current[present] = array[present]
+                updated |= present
+                for rule in self._rules_by_field.get(field_name, ()):
+                    if rule not in rules:
+                        rules.append(rule)
+
+            channels = np.flatnonzero(updated)
+            if not len(channels):
+                return []
+            if self._last_sample_time is None or self._heartbeat_lost:
+                # First sample or producer back: the watchdog needs a new deadline
+                self._active.pop(('heartbeat', -1), None)
+                self._heartbeat_lost = False
+                self._wake.set()
+            self._last_sample_time = timestamp
+            if np.isnan(state.updated_at[channels]).any() or self._stale[channels].any():
+                # New or recovered channel: the watchdog needs a new deadline
+                for channel in channels[self._stale[channels]]:
+                    self._active.pop(('stale_data', int(channel)), None)
+                self._stale[channels] = False
+                self._wake.set()
+            state.updated_at[channels] = timestamp
+            self.samples_processed += 1
+
+            events: List[SafetyEvent] = []
+
+            for rule in rules:
+                try:
+                    results = rule.evaluate(state, channels, timestamp)
+                except Exception as e:
+                    logger.error(f"Safety rule {rule.name} failed: {e}")
+                    results = {-1: (SEVERITY_CRITICAL, f"Safety rule {rule.name} failed: {e}", None)}
+                events.extend(self._transition(rule.name, results, timestamp, 'sample', rule.owner))
+
+        self._evaluation_time.observe(time.perf_counter() - start)
+        if events:
+            self._dispatch(events)
+        return events
+
+    def publish_command(self, channel: int, target: float, duration: float = 0.0,
+                        timestamp: Optional[float] = None) -> Optional[SafetyEvent]:
+        """
+        Check and record a servo command
+
+        Returns:
+            None if the command is allowed, else the event explaining the veto
+        """
+        return self.publish_commands({channel: target}, duration, timestamp)
+
+    def publish_commands(self, targets: Mapping[int, float], duration: float = 0.0,
+                         timestamp: Optional[float] = None) -> Optional[SafetyEvent]:
+        """
+        Check and record commands sent together (e.g. one multi-servo move)
+
+        The batch is checked jointly: collision zones see every target at
+        once, so two moves that are safe alone but collide together are
+        rejected. Either all targets are recorded or none.
+
+        Returns:
+            None if the batch is allowed, else the event explaining the veto
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        violation: Violation = None
+        rule_name = ''
+        owner = None
+
+        with self._lock:
+            if self.stopped:
+                rule_name = 'emergency_stop'
+                violation = (SEVERITY_CRITICAL, "Command rejected: emergency stop active", None)
+            else:
+                for rule in self._rules:
+                    violation = rule.check_targets(self.state, targets, duration)
+                    if violation:
+                        rule_name = rule.name
+                        owner = rule.owner
+                        break
+
+            if violation is None:
+                for channel, target in targets.items():
+                    self.record_command(channel, target, timestamp)
+                return None
+
+        severity, message, value = violation
+        channel = next(iter(targets)) if len(targets) == 1 else -1
+        event = SafetyEvent(rule_name, channel, severity, message, value,
+                            timestamp, time.time(), 'command', owner)
+        self._notify(event)
+        return event
+
+    def validate_trajectory(self, frames: np.ndarray, tick_seconds: float,
+                            start: Optional[np.ndarray] = None) -> List[SafetyEvent]:
+        """
+        Check a whole trajectory table before playback
+
+        Args:
+            frames: (ticks x channels) positions; NaN holds the previous value
+            tick_seconds: Time between rows
+            start: Positions before the first row (default: the latest published)
+
+        Returns:
+            Violations ordered by tick (sample_time is the offset into the
+            trajectory); nothing is raised or latched
+        """
+        with self._lock:
+            if start is None:
+                start = self.state.field('position').copy()
+            rules = list(self._rules)
+        filled = forward_fill(frames, start)
+
+        now = time.time()
+        events = []
+        for rule in rules:
+            for tick, channel, violation in rule.check_trajectory(filled, tick_seconds):
+                severity, message, value = violation
+                events.append(SafetyEvent(rule.name, channel, severity, message, value,
+                                          tick * tick_seconds, now, 'trajectory', rule.owner))
+        events.sort(key=lambda event: event.sample_time)
+        return events
+
+    def record_command(self, channel: int, target: float, timestamp: Optional[float] = None):
+        """Record a command that was already sent (new target, stall window restarts)"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self.state.field('target_position')[channel] = target
+            self.state.command_time[channel] = timestamp
+            for rule in self._rules:
+                rule.on_command(self.state, channel, target, timestamp)
+
+    # Emergency stop
+
+    def trigger_stop(self, reason: str, channel: int = -1, owner: Optional[str] = None) -> SafetyEvent:
+        """Latch the emergency stop from outside the rule set (manual stop, faults) on behalf of owner"""
+        now = time.time()
+        event = SafetyEvent('manual', channel, SEVERITY_CRITICAL, reason, None, now, now, 'manual')
+        self._dispatch([event], owner)
+        return event
+
+    def reset(self, owner: Optional[str] = None) -> bool:
+        """
+        Clear an owner's part of the latch; True if the kernel is no longer stopped
+
+        The stop stays latched while another owner that latched it has not
+        reset. Without an owner the whole latch is cleared. Violations still
+        present will be raised again.
+        """
+        with self._lock:
+            if owner is None:
+                self.latched_by.clear()
+            else:
+                self.latched_by.discard(owner)
+                owned = {rule.name for rule in self._rules if rule.owner == owner}
+                for key in [key for key in self._active if key[0] in owned]:
+                    del self._active[key]
+            if self.stopped and self.latched_by:
+                logger.warning(f"Safety kernel '{self.name}' stop still latched by "
+                               f"{sorted(o or 'kernel' for o in self.latched_by)}")
+                return False
+            self.stopped = False
+            self.stop_event = None
+            self._active.clear()
+            self._stale[:] = False
+            self._heartbeat_lost = False
+        self._wake.set()
+        return True
+
+    def shutdown(self):
+        """Stop the watchdog"""
+        self._running = False
+        self._wake.set()
+        if self._watchdog_thread and self._watchdog_thread.is_alive():
+            self._watchdog_thread.join(timeout=1.0)
+
+    # Status
+
+    def is_active(self, rule_name: str, key: Hashable) -> Optional[str]:
+        """Severity of a currently raised violation, or None"""
+        with self._lock:
+            return self._active.get((rule_name, key))
+
+    def active_violations(self) -> Dict[str, str]:
+        """Currently raised violations as {'rule:key': severity}"""
+        with self._lock:
+            return {f"{rule}:{key}": severity for (rule, key), severity in self._active.items()}
+
+    def get_status(self) -> Dict:
+        """Kernel status for APIs and dashboards"""
+        with self._lock:
+            stop_event = self.stop_event
+            return {
+                "name": self.name,
+                "stopped": self.stopped,
+                "stop_reason": stop_event.message if stop_event else None,
+                "latched_by": sorted(o or 'kernel' for o in self.latched_by),
+                "rules": [rule.name for rule in self._rules],
+                "owners": sorted({rule.owner for rule in self._rules if rule.owner}),
+                "stale_timeout": self.stale_timeout,
+                "heartbeat_timeout": self.heartbeat_timeout,
+                "active_violations": {f"{rule}:{key}": severity
+                                      for (rule, key), severity in self._active.items()},
+                "samples_processed": self.samples_processed,
+                "latency_budget_ms": self.latency_budget * 1000.0,
+                "detection_latency_p99_ms": self._detection_latency.percentile(99) * 1000.0,
+                "detection_latency_max_ms": (self._detection_latency.max * 1000.0
+                                             if self._detection_latency.count else 0.0),
+                "evaluation_p99_ms": self._evaluation_time.percentile(99) * 1000.0
+            }
+
+    # Internals
+
+    def _as_array(self, values: ChannelValues) -> np.ndarray:
+        if isinstance(values, Mapping):
+            array = np.full(self.channels, np.nan)
+            for channel, value in values.items():
+                if 0 <= channel < self.channels and value is not None:
+                    array[channel] = value
+            return array
+        array = np.asarray(values, dtype=float)
+        if len(array) < self.channels:
+            array = np.concatenate([array, np.full(self.channels - len(array), np.nan)])
+        return array[:self.channels]
+
+    def _transition(self, rule_name: str, results: Dict[Hashable, Violation],
+                    sample_time: float, source: str, owner: Optional[str] = None) -> List[SafetyEvent]:
+        """Raise events for new or escalated violations; clear resolved ones"""
+        events = []
+        now = time.time()
+        for key, violation in results.items():
+            active_key = (rule_name, key)
+            if violation is None:
+                self._active.pop(active_key, None)
+                continue
+            severity, message, value = violation
+            previous = self._active.get(active_key)
+            if previous == severity or previous == SEVERITY_CRITICAL:
+                continue
+            self._active[active_key] = severity
+            channel = key if isinstance(key, (int, np.integer)) else -1
+            events.append(SafetyEvent(rule_name, int(channel), severity, message, value,
+                                      sample_time, now, source, owner))
+        return events
+
+    def _latch_owners(self, event: SafetyEvent) -> Set[Optional[str]]:
+        """Owners that must reset a stop latched by event"""
+        if event.owner is not None:
+            return {event.owner}
+        if event.rule == 'stale_data':
+            owners = {o for o, (_, severity) in self._stale_requests.items() if severity == SEVERITY_CRITICAL}
+        elif event.rule == 'heartbeat':
+            owners = set(self._heartbeat_requests)
+        else:
+            owners = set()
+        return owners or {None}
+
+    def _dispatch(self, events: List[SafetyEvent], owner: Optional[str] = None):
+        """Stop first (bounded latency), then notify"""
+        critical = next((e for e in events if e.severity == SEVERITY_CRITICAL), None)
+        if critical is not None:
+            with self._lock:
+                for event in events:
+                    if event.severity == SEVERITY_CRITICAL:
+                        self.latched_by |= {owner} if owner is not None else self._latch_owners(event)
+                first = not self.stopped
+                if first:
+                    self.stopped = True
+                    self.stop_event = critical
+            if first:
+                latency = time.time() - critical.sample_time
+                self._detection_latency.observe(latency)
+                if latency > self.latency_budget:
+                    self._budget_exceeded.inc()
+                    logger.warning(f"Safety detection latency {latency * 1000:.2f}ms "
+                                   f"exceeded budget {self.latency_budget * 1000:.2f}ms")
+                logger.critical(f"🚨 Safety kernel '{self.name}' stop: {critical.message}")
+                for handler, _ in list(self._stop_handlers):
+                    try:
+                        handler(critical)
+                    except Exception as e:
+                        logger.error(f"Emergency stop handler failed: {e}")
+
+        for event in events:
+            self._notify(event)
+
+    def _notify(self, event: SafetyEvent):
+        self._events_total.labels(self.name, event.rule, event.severity).inc()
+        for handler, owner in list(self._event_handlers):
+            if owner is not None and event.owner not in (None, owner):
+                continue
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error(f"Safety event handler failed: {e}")
+
+    def _watchdog_loop(self):
+        """Sleep until the earliest channel or heartbeat deadline; raise stale-data events"""
+        while self._running:
+            with self._lock:
+                deadlines = []
+                tracked = ~np.isnan(self.state.updated_at) & ~self._stale
+                if self.stale_timeout and tracked.any():
+                    deadlines.append(float(np.min(self.state.updated_at[tracked])) + self.stale_timeout)
+                if self.heartbeat_timeout and self._last_sample_time is not None and not self._heartbeat_lost:
+                    deadlines.append(self._last_sample_time + self.heartbeat_timeout)
+
+            timeout = max(0.0, min(deadlines) - time.time()) if deadlines else None
+            if self._wake.wait(timeout):
+                self._wake.clear()
+                continue
+
+            now = time.time()
+            events = []
+            with self._lock:
+                if self.stale_timeout:
+                    age = now - self.state.updated_at
+                    with np.errstate(invalid='ignore'):
+                        stale = ~self._stale & (age > self.stale_timeout)
+                    self._stale |= stale
+                    for c in np.flatnonzero(stale):
+                        violation = (self.stale_severity,
+                                     f"No updates from servo {c} for {age[c]:.1f}s", float(age[c]))
+                        events.extend(self._transition(
+                            'stale_data', {int(c): violation},
+                            float(self.state.updated_at[c]) + self.stale_timeout, 'watchdog'))
+
+                if (self.heartbeat_timeout and self._last_sample_time is not None and
+                        not self._heartbeat_lost and now - self._last_sample_time > self.heartbeat_timeout):
+                    self._heartbeat_lost = True
+                    age = now - self._last_sample_time
+                    events.extend(self._transition(
+                        'heartbeat', {-1: (SEVERITY_CRITICAL, f"No safety samples for {age:.1f}s", age)},
+                        self._last_sample_time + self.heartbeat_timeout, 'watchdog'))
+            if events:
+                self._dispatch(events)
+
+
+# ============================================================================
+# SHARED KERNEL
+# ============================================================================
+
+_shared_kernel: Optional[SafetyKernel] = None
+_shared_kernel_lock = threading.Lock()
+
+
+def get_safety_kernel() -> SafetyKernel:
+    """Process-wide kernel shared by the servo safety subsystems (created on first use)"""
+    global _shared_kernel
+    with _shared_kernel_lock:
+        if _shared_kernel is None:
+            _shared_kernel = SafetyKernel(channels=24, name='shared')
+        return _shared_kernel
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+R2D2 Safety Kernel Detection Latency Benchmark
+==============================================
+
+Measures the time from a violating position sample to the emergency-stop
+handler under load: several producers publish full snapshots at a high
+rate while CPU-burning threads compete for the interpreter, and an
+injector publishes one out-of-range sample at a time and waits for the
+stop. Detection runs in the publishing thread, so GIL-holding load
+(--load python) adds up to one switch interval per hand-off; vision-style
+NumPy load releases the GIL. The same injection is then run against a 10 Hz polling loop (the
+model the safety kernel replaced) for comparison.
+
+Usage:
+    python3 r2d2_safety_latency_benchmark.py
+    python3 r2d2_safety_latency_benchmark.py --channels 24 --producers 4 \\
+        --rate 200 --load-threads 2 --trials 200 --budget-ms 5
+    python3 r2d2_safety_latency_benchmark.py --load python --switch-interval 0.0005
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from r2d2_metrics import MetricsRegistry
+from r2d2_safety_kernel import (
+    SafetyKernel, PositionLimitRule, ThresholdRule, SumThresholdRule,
+    VelocityRule, StallRule, CollisionZoneRule
+)
+
+POSITION_RANGE = (4000.0, 8000.0)   # Quarter-microseconds
+VIOLATION_POSITION = 9000.0
+
+
+def build_kernel(channels: int, budget_ms: float) -> SafetyKernel:
+    """Kernel with the rule set the safety systems install"""
+    kernel = SafetyKernel(channels=channels, latency_budget=budget_ms / 1000.0,
+                          registry=MetricsRegistry(), name='benchmark')
+    kernel.add_rule(PositionLimitRule({c: POSITION_RANGE for c in range(channels)}))
+    kernel.add_rule(ThresholdRule('temperature', warning=60.0, critical=70.0))
+    kernel.add_rule(ThresholdRule('current', warning=1.5, critical=2.0))
+    kernel.add_rule(SumThresholdRule('current', critical=1000.0))
+    kernel.add_rule(VelocityRule(1e9))
+    kernel.add_rule(StallRule(tolerance=50.0, stall_time=60.0))
+    kernel.add_rule(CollisionZoneRule([
+        (f"zone_{c}", {c: (0.0, 100.0), (c + 1) % channels: (0.0, 100.0)}, 'critical')
+        for c in range(0, channels, 2)
+    ]))
+    return kernel
+
+
+def normal_sample(channels: int, rng: random.Random) -> Dict[str, np.ndarray]:
+    """In-range snapshot for every channel"""
+    return {
+        'position': np.array([rng.uniform(5000.0, 7000.0) for _ in range(channels)]),
+        'temperature': np.full(channels, 35.0),
+        'current': np.full(channels, 0.3)
+    }
+
+
+def cpu_burner(stop: threading.Event, kind: str = 'numpy'):
+    """Busy work: 'numpy' releases the GIL (vision-style load), 'python' holds it"""
+    if kind == 'numpy':
+        matrix = np.random.default_rng(0).random((200, 200))
+        while not stop.is_set():
+            matrix = np.tanh(matrix @ matrix)
+        return
+    value = 0
+    while not stop.is_set():
+        for i in range(10000):
+            value += i * i
+        value = 0
+
+
+def producer(publish: Callable, channels: int, rate: float, stop: threading.Event, seed: int):
+    """Publish normal snapshots at a fixed rate"""
+    rng = random.Random(seed)
+    interval = 1.0 / rate
+    while not stop.is_set():
+        start = time.time()
+        publish(normal_sample(channels, rng), start)
+        time.sleep(max(0.0, interval - (time.time() - start)))
+
+
+def run_kernel(args) -> List[float]:
+    """Detection latencies (seconds) for the event-driven kernel"""
+    kernel = build_kernel(args.channels, args.budget_ms)
+    stopped = threading.Event()
+    latencies: List[float] = []
+    kernel.add_stop_handler(lambda event: (latencies.append(time.time() - event.sample_time),
+                                           stopped.set()))
+
+    stop = threading.Event()
+    threads = [threading.Thread(target=cpu_burner, args=(stop, args.load), daemon=True)
+               for _ in range(args.load_threads)]
+    threads += [threading.Thread(target=producer,
+                                 args=(kernel.publish_sample, args.channels, args.rate, stop, i),
+                                 daemon=True)
+                for i in range(args.producers)]
+    for thread in threads:
+        thread.start()
+
+    rng = random.Random(1234)
+    try:
+        for _ in range(args.trials):
+            time.sleep(rng.uniform(0.002, 0.02))
+            channel = rng.randrange(args.channels)
+            stopped.clear()
+            kernel.publish_sample({'position': {channel: VIOLATION_POSITION}}, time.time())
+            if not stopped.wait(timeout=1.0):
+                print(f"  Missed stop on channel {channel}")
+            kernel.reset()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=1.0)
+
+    status = kernel.get_status()
+    print(f"  Samples evaluated: {status['samples_processed']}, "
+          f"evaluation p99: {status['evaluation_p99_ms']:.3f}ms")
+    return latencies
+
+
+def run_polling(args, interval: float = 0.1) -> List[float]:
+    """Detection latencies (seconds) for a sleep-and-re-read poller"""
+    positions = np.full(args.channels, 6000.0)
+    sample_times = np.zeros(args.channels)
+    low, high = POSITION_RANGE
+    detected = threading.Event()
+    latencies: List[float] = []
+    stop = threading.Event()
+
+    def poller():
+        while not stop.is_set():
+            bad = np.flatnonzero((positions < low) | (positions > high))
+            if len(bad) and not detected.is_set():
+                latencies.append(time.time() - sample_times[bad[0]])
+                detected.set()
+            time.sleep(interval)
+
+    threads = [threading.Thread(target=cpu_burner, args=(stop, args.load), daemon=True)
+               for _ in range(args.load_threads)]
+    threads.append(threading.Thread(target=poller, daemon=True))
+    for thread in threads:
+        thread.start()
+
+    rng = random.Random(1234)
+    try:
+        for _ in range(args.polling_trials):
+            time.sleep(rng.uniform(0.002, 0.02))
+            channel = rng.randrange(args.channels)
+            detected.clear()
+            sample_times[channel] = time.time()
+            positions[channel] = VIOLATION_POSITION
+            detected.wait(timeout=2.0)
+            positions[channel] = 6000.0
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=1.0)
+    return latencies
+
+
+def report(name: str, latencies: List[float], budget_ms: float):
+    """Print latency percentiles in milliseconds"""
+    if not latencies:
+        print(f"{name}: no detections")
+        return
+    ms = np.array(latencies) * 1000.0
+    over = int(np.sum(ms > budget_ms))
+    print(f"{name}: n={len(ms)} p50={np.percentile(ms, 50):.3f}ms "
+          f"p95={np.percentile(ms, 95):.3f}ms p99={np.percentile(ms, 99):.3f}ms "
+          f"max={ms.max():.3f}ms over budget ({budget_ms}ms): {over}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Safety kernel detection latency benchmark")
+    parser.add_argument('--channels', type=int, default=24)
+    parser.add_argument('--producers', type=int, default=4, help="Snapshot publishing threads")
+    parser.add_argument('--rate', type=float, default=200.0, help="Snapshots/s per producer")
+    parser.add_argument('--load-threads', type=int, default=2, help="CPU-burning threads")
+    parser.add_argument('--load', choices=('numpy', 'python'), default='numpy',
+                        help="Load kind: numpy releases the GIL, python holds it")
+    parser.add_argument('--switch-interval', type=float, default=None,
+                        help="sys.setswitchinterval() in seconds (GIL hand-off)")
+    parser.add_argument('--trials', type=int, default=200, help="Injected violations")
+    parser.add_argument('--polling-trials', type=int, default=30)
+    parser.add_argument('--budget-ms', type=float, default=5.0)
+    parser.add_argument('--skip-polling', action='store_true')
+    args = parser.parse_args()
+    if args.switch_interval is not None:
+        sys.setswitchinterval(args.switch_interval)
+
+    print("R2D2 Safety Kernel Detection Latency Benchmark")
+    print("=" * 50)
+    print(f"{args.channels} channels, {args.producers} producers x {args.rate:.0f} Hz, "
+          f"{args.load_threads} {args.load} load threads, "
+          f"switch interval {sys.getswitchinterval() * 1000:.1f}ms")
+    print()
+
+    print("Event-driven kernel:")
+    report("  kernel", run_kernel(args), args.budget_ms)
+
+    if not args.skip_polling:
+        print("10 Hz polling loop:")
+        report("  polling", run_polling(args), args.budget_ms)
+
+
+if __name__ == "__main__":
+    main()
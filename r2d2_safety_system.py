@@ -5,7 +5,7 @@ Professional Safety Management for Animatronic Systems
 
 This module provides comprehensive safety systems including:
 - Multi-level emergency stop protocols
-- Collision detection and avoidance
+- Collision detection and avoidance (including joint multi-servo interference)
 - Thermal protection and monitoring
 - Electrical safety and fault detection
 - User safety protocols
@@ -19,7 +19,6 @@ Date: 2024-09-22
 
 import time
 import logging
-import threading
 import json
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Callable, Set
@@ -31,6 +30,11 @@ import signal
 import psutil
 import GPUtil
 
+from r2d2_safety_kernel import (
+    SafetyKernel, SafetyEvent, ThresholdRule, SumThresholdRule, PositionLimitRule,
+    CollisionZoneRule, SEVERITY_WARNING, SEVERITY_CRITICAL, get_safety_kernel
+)
+
 logger = logging.getLogger(__name__)
 
 class SafetyLevel(Enum):
@@ -120,6 +124,17 @@ class CollisionZone:
     description: str
     severity: SafetyLevel = SafetyLevel.WARNING
 
+@dataclass
+class InterferenceZone:
+    """Joint positions of two servos that must not be occupied at once"""
+    name: str
+    channel_a: int
+    range_a: Tuple[int, int]
+    channel_b: int
+    range_b: Tuple[int, int]
+    description: str
+    severity: SafetyLevel = SafetyLevel.CRITICAL
+
 @dataclass
 class SafetyProfile:
     """Complete safety configuration profile"""
@@ -127,13 +142,32 @@ class SafetyProfile:
     description: str
     limits: SafetyLimits
     collision_zones: List[CollisionZone] = field(default_factory=list)
+    interference_zones: List[InterferenceZone] = field(default_factory=list)
     enabled_protocols: Set[str] = field(default_factory=set)
     emergency_actions: Dict[str, List[str]] = field(default_factory=dict)
 
+# Kernel rule -> (emergency type, alert level for non-critical events)
+KERNEL_RULE_ALERTS = {
+    'temperature': (EmergencyType.OVERHEATING, SafetyLevel.WARNING),
+    'position_error': (EmergencyType.SERVO_FAILURE, SafetyLevel.WARNING),
+    'movement_range': (EmergencyType.MECHANICAL_FAILURE, SafetyLevel.CRITICAL),
+    'collision_zone': (EmergencyType.COLLISION_DETECTED, SafetyLevel.WARNING),
+    'speed': (EmergencyType.MECHANICAL_FAILURE, SafetyLevel.WARNING),
+    'current': (EmergencyType.POWER_FAULT, SafetyLevel.WARNING),
+    'total_current': (EmergencyType.POWER_FAULT, SafetyLevel.WARNING),
+    'low_voltage': (EmergencyType.POWER_FAULT, SafetyLevel.WARNING),
+    'high_voltage': (EmergencyType.POWER_FAULT, SafetyLevel.WARNING),
+    'stale_data': (EmergencyType.COMMUNICATION_LOSS, SafetyLevel.CRITICAL),
+    'heartbeat': (EmergencyType.SYSTEM_FAULT, SafetyLevel.CRITICAL),
+}
+
+KERNEL_OWNER = 'safety_system'
+
 class SafetySystem:
     """Comprehensive safety management system"""
 
-    def __init__(self, servo_system, monitoring_system, config_path: str = "/home/rolo/r2ai/configs/safety_config.json"):
+    def __init__(self, servo_system, monitoring_system, config_path: str = "/home/rolo/r2ai/configs/safety_config.json",
+                 kernel: Optional[SafetyKernel] = None):
         """Initialize safety system"""
         self.servo_system = servo_system
         self.monitoring_system = monitoring_system
@@ -150,20 +184,20 @@ class SafetySystem:
         self.safety_profile = self._create_default_safety_profile()
         self.safety_limits = self.safety_profile.limits
 
-        # Monitoring and control
+        # Monitoring and control: rules run in the (shared) safety kernel on
+        # each monitoring sample; its watchdog covers stale channels and a
+        # silent monitor (no polling threads)
         self.safety_active = True
-        self.monitoring_thread: Optional[threading.Thread] = None
-        self.watchdog_thread: Optional[threading.Thread] = None
+        self.kernel = kernel or get_safety_kernel()
         self.emergency_callbacks: List[Callable] = []
 
         # System monitoring
-        self.last_heartbeat = time.time()
         self.communication_ok = True
         self.system_health_ok = True
+        self._last_system_check = 0.0
 
         # Performance tracking
         self.servo_operation_time: Dict[int, float] = {}
-        self.last_position_check: Dict[int, Tuple[float, int]] = {}
 
         logger.info("🛡️ Safety system initialized")
 
@@ -205,6 +239,16 @@ class SafetySystem:
             CollisionZone("periscope_extend", 2, 7500, 8000, "Periscope extension limit", SafetyLevel.CRITICAL),
         ]
 
+        # Multi-servo interference (checked jointly for batched moves and trajectories)
+        interference_zones = [
+            InterferenceZone("utility_arm_left_door", 4, (5000, 8000), 10, (4000, 5500),
+                             "Left utility arm extended into closed body door"),
+            InterferenceZone("utility_arm_right_door", 5, (5000, 8000), 11, (4000, 5500),
+                             "Right utility arm extended into closed body door"),
+            InterferenceZone("periscope_dome_panel", 2, (6000, 7500), 9, (4000, 4500),
+                             "Periscope raised under closed back dome panel", SafetyLevel.WARNING),
+        ]
+
         # Emergency action protocols
         emergency_actions = {
             "servo_overheating": ["emergency_stop", "log_incident", "notify_maintenance"],
@@ -229,117 +273,103 @@ class SafetySystem:
             description="Default safety profile for R2D2 animatronics",
             limits=limits,
             collision_zones=collision_zones,
+            interference_zones=interference_zones,
             enabled_protocols=enabled_protocols,
             emergency_actions=emergency_actions
         )
 
     def _start_safety_monitoring(self):
-        """Start safety monitoring threads"""
-        # Main safety monitoring thread
-        self.monitoring_thread = threading.Thread(
-            target=self._safety_monitoring_loop,
-            daemon=True,
-            name="SafetyMonitor"
-        )
-        self.monitoring_thread.start()
-
-        # Watchdog thread
-        self.watchdog_thread = threading.Thread(
-            target=self._watchdog_loop,
-            daemon=True,
-            name="SafetyWatchdog"
-        )
-        self.watchdog_thread.start()
+        """Configure the safety kernel and subscribe it to monitoring samples"""
+        limits = self.safety_limits
+        protocols = self.safety_profile.enabled_protocols
+
+        def add_rule(rule):
+            return self.kernel.add_rule(rule, owner=KERNEL_OWNER)
+
+        if "thermal_protection" in protocols:
+            add_rule(ThresholdRule(
+                'temperature', warning=limits.max_servo_temperature,
+                critical=limits.critical_temperature, unit='°C'))
+
+        if "position_validation" in protocols:
+            add_rule(ThresholdRule(
+                'position_error', warning=limits.max_position_error,
+                critical=limits.critical_position_error))
+            add_rule(PositionLimitRule(
+                {int(channel): tuple(bounds) for channel, bounds in limits.max_movement_range.items()},
+                name='movement_range', severity=SEVERITY_WARNING))
+
+        if "collision_detection" in protocols:
+            zones = add_rule(CollisionZoneRule([
+                (zone.name, {zone.servo_channel: (zone.min_position, zone.max_position)},
+                 SEVERITY_CRITICAL if zone.severity == SafetyLevel.CRITICAL else SEVERITY_WARNING)
+                for zone in self.safety_profile.collision_zones
+            ]))
+            for zone in self.safety_profile.interference_zones:
+                zones.add_zone(zone.name, {zone.channel_a: zone.range_a, zone.channel_b: zone.range_b},
+                               SEVERITY_CRITICAL if zone.severity == SafetyLevel.CRITICAL else SEVERITY_WARNING)
+
+        if "speed_limiting" in protocols:
+            add_rule(ThresholdRule('speed', warning=limits.max_servo_speed))
+
+        if "electrical_monitoring" in protocols:
+            add_rule(ThresholdRule(
+                'current', warning=limits.max_servo_current,
+                critical=limits.critical_current, unit='A'))
+            add_rule(SumThresholdRule(
+                'current', critical=limits.total_current_limit, unit='A'))
+            add_rule(ThresholdRule(
+                'voltage', warning=limits.min_voltage, critical=limits.critical_low_voltage,
+                below=True, name='low_voltage', unit='V'))
+            add_rule(ThresholdRule(
+                'voltage', warning=limits.max_voltage, name='high_voltage', unit='V'))
+
+        self.kernel.add_stop_handler(self._on_kernel_stop, owner=KERNEL_OWNER)
+        self.kernel.add_event_handler(self._on_kernel_event, owner=KERNEL_OWNER)
+
+        if self.monitoring_system and hasattr(self.monitoring_system, 'add_sample_listener'):
+            self.monitoring_system.add_sample_listener(self._on_sample)
+            # No monitoring samples at all for watchdog_timeout: system fault
+            self.kernel.watch_heartbeat(KERNEL_OWNER, limits.watchdog_timeout)
+            if "communication_watchdog" in protocols:
+                # Raised as a CRITICAL alert below
+                self.kernel.watch_stale(KERNEL_OWNER, limits.max_communication_timeout, SEVERITY_WARNING)
 
         logger.info("✅ Safety monitoring started")
 
-    def _safety_monitoring_loop(self):
-        """Main safety monitoring loop"""
-        check_interval = 0.1  # 10Hz safety checks
-
-        while self.safety_active:
-            try:
-                start_time = time.time()
-
-                # Update heartbeat
-                self.last_heartbeat = time.time()
-
-                # Perform safety checks
-                if "thermal_protection" in self.safety_profile.enabled_protocols:
-                    self._check_thermal_safety()
-
-                if "position_validation" in self.safety_profile.enabled_protocols:
-                    self._check_position_safety()
-
-                if "collision_detection" in self.safety_profile.enabled_protocols:
-                    self._check_collision_zones()
-
-                if "speed_limiting" in self.safety_profile.enabled_protocols:
-                    self._check_speed_limits()
-
-                if "electrical_monitoring" in self.safety_profile.enabled_protocols:
-                    self._check_electrical_safety()
-
-                if "communication_watchdog" in self.safety_profile.enabled_protocols:
-                    self._check_communication_health()
-
-                # Update overall safety state
-                self._update_safety_state()
-
-                # Clean up old alerts
-                self._cleanup_old_alerts()
-
-                # Sleep until next check
-                elapsed = time.time() - start_time
-                sleep_time = max(0, check_interval - elapsed)
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-
-            except Exception as e:
-                logger.error(f"Safety monitoring error: {e}")
-                self._trigger_emergency(EmergencyType.SYSTEM_FAULT, f"Safety monitoring error: {e}")
-                time.sleep(1.0)
-
-    def _watchdog_loop(self):
-        """Safety watchdog loop"""
-        while self.safety_active:
-            try:
-                current_time = time.time()
-
-                # Check if main safety thread is responsive
-                if current_time - self.last_heartbeat > self.safety_limits.watchdog_timeout:
-                    logger.critical("🚨 Safety watchdog timeout - triggering emergency stop")
-                    self._trigger_emergency(EmergencyType.SYSTEM_FAULT, "Safety watchdog timeout")
-
-                time.sleep(1.0)  # 1Hz watchdog checks
-
-            except Exception as e:
-                logger.critical(f"Watchdog error: {e}")
-                time.sleep(1.0)
-
-    def _check_thermal_safety(self):
-        """Check thermal safety conditions"""
-        if not self.monitoring_system:
+    def _on_sample(self, fields: Dict, timestamp: float):
+        """Monitoring sample: evaluate the safety rules on it"""
+        if not self.safety_active:
             return
 
-        metrics = self.monitoring_system.get_current_metrics()
-
-        for channel, metric in metrics.items():
-            # Check servo temperature
-            if metric.temperature > self.safety_limits.critical_temperature:
-                self._trigger_emergency(
-                    EmergencyType.OVERHEATING,
-                    f"Servo {channel} critical temperature: {metric.temperature:.1f}°C"
-                )
-            elif metric.temperature > self.safety_limits.max_servo_temperature:
-                self._create_safety_alert(
-                    EmergencyType.OVERHEATING,
-                    SafetyLevel.WARNING,
-                    f"Servo {channel} high temperature: {metric.temperature:.1f}°C",
-                    [f"servo_{channel}"]
-                )
-
-        # Check system temperature
+        self.kernel.publish_sample(fields, timestamp)
+
+        # System temperature is not per servo; check it at most once a second
+        if ("thermal_protection" in self.safety_profile.enabled_protocols and
+                timestamp - self._last_system_check >= 1.0):
+            self._last_system_check = timestamp
+            self._check_system_temperature()
+
+    def _on_kernel_stop(self, event: SafetyEvent):
+        """Critical kernel event: run the emergency protocols"""
+        emergency_type, _ = KERNEL_RULE_ALERTS.get(event.rule, (EmergencyType.SYSTEM_FAULT, None))
+        self._trigger_emergency(emergency_type, event.message)
+
+    def _on_kernel_event(self, event: SafetyEvent):
+        """Kernel warnings and rejected commands become safety alerts"""
+        if event.severity != SEVERITY_CRITICAL or event.source == 'command':
+            emergency_type, level = KERNEL_RULE_ALERTS.get(
+                event.rule, (EmergencyType.SYSTEM_FAULT, SafetyLevel.WARNING))
+            affected = [f"servo_{event.channel}"] if event.channel >= 0 else ["system"]
+            if event.rule == 'stale_data':
+                self.communication_ok = False
+            self._create_safety_alert(emergency_type, level, event.message, affected)
+
+        self._update_safety_state()
+        self._cleanup_old_alerts()
+
+    def _check_system_temperature(self):
+        """Check system (CPU/GPU) temperature"""
         try:
             cpu_temp = self._get_cpu_temperature()
             if cpu_temp and cpu_temp > self.safety_limits.max_ambient_temperature:
@@ -352,147 +382,6 @@ class SafetySystem:
         except Exception as e:
             logger.debug(f"Could not check system temperature: {e}")
 
-    def _check_position_safety(self):
-        """Check servo position safety"""
-        if not self.monitoring_system:
-            return
-
-        metrics = self.monitoring_system.get_current_metrics()
-
-        for channel, metric in metrics.items():
-            # Check position error
-            if metric.position_error > self.safety_limits.critical_position_error:
-                self._trigger_emergency(
-                    EmergencyType.SERVO_FAILURE,
-                    f"Servo {channel} critical position error: {metric.position_error}"
-                )
-            elif metric.position_error > self.safety_limits.max_position_error:
-                self._create_safety_alert(
-                    EmergencyType.SERVO_FAILURE,
-                    SafetyLevel.WARNING,
-                    f"Servo {channel} position error: {metric.position_error}",
-                    [f"servo_{channel}"]
-                )
-
-            # Check position within safe range
-            if channel in self.safety_limits.max_movement_range:
-                min_pos, max_pos = self.safety_limits.max_movement_range[channel]
-                if metric.position < min_pos or metric.position > max_pos:
-                    self._create_safety_alert(
-                        EmergencyType.MECHANICAL_FAILURE,
-                        SafetyLevel.CRITICAL,
-                        f"Servo {channel} position out of safe range: {metric.position}",
-                        [f"servo_{channel}"]
-                    )
-
-    def _check_collision_zones(self):
-        """Check for collision zone violations"""
-        if not self.monitoring_system:
-            return
-
-        metrics = self.monitoring_system.get_current_metrics()
-
-        for zone in self.safety_profile.collision_zones:
-            if zone.servo_channel in metrics:
-                metric = metrics[zone.servo_channel]
-
-                if zone.min_position <= metric.position <= zone.max_position:
-                    if zone.severity == SafetyLevel.CRITICAL:
-                        self._trigger_emergency(
-                            EmergencyType.COLLISION_DETECTED,
-                            f"Critical collision zone violation: {zone.name}"
-                        )
-                    else:
-                        self._create_safety_alert(
-                            EmergencyType.COLLISION_DETECTED,
-                            zone.severity,
-                            f"Collision zone warning: {zone.name}",
-                            [f"servo_{zone.servo_channel}"]
-                        )
-
-    def _check_speed_limits(self):
-        """Check servo speed limits"""
-        if not self.monitoring_system:
-            return
-
-        metrics = self.monitoring_system.get_current_metrics()
-
-        for channel, metric in metrics.items():
-            if metric.speed > self.safety_limits.max_servo_speed:
-                self._create_safety_alert(
-                    EmergencyType.MECHANICAL_FAILURE,
-                    SafetyLevel.WARNING,
-                    f"Servo {channel} speed limit exceeded: {metric.speed:.1f}",
-                    [f"servo_{channel}"]
-                )
-
-    def _check_electrical_safety(self):
-        """Check electrical safety conditions"""
-        if not self.monitoring_system:
-            return
-
-        metrics = self.monitoring_system.get_current_metrics()
-        total_current = sum(metric.current for metric in metrics.values())
-
-        # Check total current
-        if total_current > self.safety_limits.total_current_limit:
-            self._trigger_emergency(
-                EmergencyType.POWER_FAULT,
-                f"Total current limit exceeded: {total_current:.2f}A"
-            )
-
-        # Check individual servo currents and voltages
-        for channel, metric in metrics.items():
-            if metric.current > self.safety_limits.critical_current:
-                self._trigger_emergency(
-                    EmergencyType.POWER_FAULT,
-                    f"Servo {channel} critical current: {metric.current:.2f}A"
-                )
-            elif metric.current > self.safety_limits.max_servo_current:
-                self._create_safety_alert(
-                    EmergencyType.POWER_FAULT,
-                    SafetyLevel.WARNING,
-                    f"Servo {channel} high current: {metric.current:.2f}A",
-                    [f"servo_{channel}"]
-                )
-
-            # Check voltage
-            if metric.voltage < self.safety_limits.critical_low_voltage:
-                self._trigger_emergency(
-                    EmergencyType.POWER_FAULT,
-                    f"Critical low voltage: {metric.voltage:.2f}V"
-                )
-            elif metric.voltage < self.safety_limits.min_voltage or metric.voltage > self.safety_limits.max_voltage:
-                self._create_safety_alert(
-                    EmergencyType.POWER_FAULT,
-                    SafetyLevel.WARNING,
-                    f"Voltage out of range: {metric.voltage:.2f}V",
-                    ["power_supply"]
-                )
-
-    def _check_communication_health(self):
-        """Check communication system health"""
-        # This would check actual communication with servo controller
-        # For now, simulate based on system responsiveness
-        if self.servo_system and hasattr(self.servo_system, 'active_controller'):
-            controller = self.servo_system.active_controller
-            if controller and not controller.simulation_mode:
-                # In real implementation, would test actual communication
-                self.communication_ok = True
-            else:
-                # In simulation mode, assume communication is OK
-                self.communication_ok = True
-        else:
-            self.communication_ok = False
-
-        if not self.communication_ok:
-            self._create_safety_alert(
-                EmergencyType.COMMUNICATION_LOSS,
-                SafetyLevel.CRITICAL,
-                "Communication with servo controller lost",
-                ["communication"]
-            )
-
     def _get_cpu_temperature(self) -> Optional[float]:
         """Get CPU temperature for system thermal monitoring"""
         try:
@@ -760,6 +649,10 @@ class SafetySystem:
             logger.error("Cannot reset emergency - critical alerts still active")
             return False
 
+        if not self.kernel.reset(KERNEL_OWNER):
+            logger.error("Cannot reset emergency - safety kernel still latched by another subsystem")
+            return False
+
         logger.info("🔄 Resetting emergency state...")
         self.emergency_active = False
         self.current_state = SafetyState.SAFE
@@ -774,6 +667,19 @@ class SafetySystem:
         logger.info("✅ Emergency state reset complete")
         return True
 
+    def validate_targets(self, targets: Dict[int, int], duration: float = 0.0) -> bool:
+        """
+        Check a multi-servo move as a whole before sending it
+
+        Limits and collision zones see every target at once; a rejected
+        move raises a safety alert and nothing is recorded.
+        """
+        return self.kernel.publish_commands(targets, duration) is None
+
+    def validate_trajectory(self, frames, tick_seconds: float) -> List[SafetyEvent]:
+        """Check a (ticks x channels) trajectory table before playback"""
+        return self.kernel.validate_trajectory(frames, tick_seconds)
+
     def get_safety_status(self) -> Dict:
         """Get current safety status"""
         return {
@@ -784,7 +690,8 @@ class SafetySystem:
             "communication_ok": self.communication_ok,
             "system_health_ok": self.system_health_ok,
             "safety_profile": self.safety_profile.name,
-            "enabled_protocols": list(self.safety_profile.enabled_protocols)
+            "enabled_protocols": list(self.safety_profile.enabled_protocols),
+            "kernel": self.kernel.get_status()
         }
 
     def get_active_alerts(self) -> List[SafetyAlert]:
@@ -824,13 +731,7 @@ class SafetySystem:
         logger.info("🔄 Shutting down safety system...")
 
         self.safety_active = False
-
-        # Wait for threads to finish
-        if self.monitoring_thread and self.monitoring_thread.is_alive():
-            self.monitoring_thread.join(timeout=2.0)
-
-        if self.watchdog_thread and self.watchdog_thread.is_alive():
-            self.watchdog_thread.join(timeout=2.0)
+        self.kernel.detach(KERNEL_OWNER)
 
         # Save final safety log
         self.save_safety_configuration()
@@ -851,35 +752,35 @@ def demo_safety_system():
             logger.info("[MOCK] Operations resumed")
 
     class MockMonitoringSystem:
-        def get_current_metrics(self):
-            # Return mock metrics with some alerts
-            return {
-                0: type('MockMetric', (), {
-                    'temperature': 75.0,  # High temperature
-                    'position_error': 250,  # High position error
-                    'speed': 1500.0,
-                    'current': 0.8,
-                    'voltage': 6.0,
-                    'position': 6000
-                })(),
-                1: type('MockMetric', (), {
-                    'temperature': 40.0,
-                    'position_error': 20,
-                    'speed': 500.0,
-                    'current': 0.3,
-                    'voltage': 6.0,
-                    'position': 5000
-                })()
+        def __init__(self):
+            self.listeners = []
+
+        def add_sample_listener(self, listener):
+            self.listeners.append(listener)
+
+        def publish(self):
+            # Push mock samples for servos 0 and 1 (servo 0 raises alerts)
+            fields = {
+                'temperature': [75.0, 40.0],  # High temperature
+                'position_error': [250, 20],  # High position error
+                'speed': [1500.0, 500.0],
+                'current': [0.8, 0.3],
+                'voltage': [6.0, 6.0],
+                'position': [6000, 5000]
             }
+            for listener in self.listeners:
+                listener(fields, time.time())
 
     servo_system = MockServoSystem()
     monitoring_system = MockMonitoringSystem()
     safety_system = SafetySystem(servo_system, monitoring_system)
 
     try:
-        # Let safety system run and detect issues
+        # Publish samples; each one is evaluated as it arrives
         logger.info("Running safety checks...")
-        time.sleep(3)
+        for _ in range(10):
+            monitoring_system.publish()
+            time.sleep(0.1)
 
         # Display safety status
         status = safety_system.get_safety_status()
@@ -0,0 +1,709 @@
+#!/usr/bin/env python3
+"""
+R2D2 Sequence Preflight Compiler
+================================
+
+Offline validation of servo sequences before they are played.
+
+Every sequence source in the tree is normalized into a definition, sampled
+over its whole trajectory at tick resolution into a (ticks x channels)
+table, and checked in vectorized form: position limits, velocity and
+zones through the same safety kernel rules used at run time, plus
+acceleration from the second difference of the table. The result is a
+compiled artifact holding the sampled trajectory and its violations,
+keyed by a SHA-256 digest of the definition, the limits and the tick
+rate, signed with HMAC-SHA256 and cached on disk.
+
+At show time a player computes the definition digest and looks it up:
+a signed artifact without critical violations means the sequence was
+already validated as a whole, so no per-command validation is needed.
+Editing a sequence or changing the limits changes the digest, and the
+sequence is compiled again on first use.
+
+Sources:
+- servo_sequences/*.json (SequenceEngine in r2d2_servo_backend)
+- R2D2SequenceLibrary (r2d2_servo_sequences)
+- R2D2EnhancedChoreographer._create_choreography_library
+- EnhancedMaestroController._create_default_r2d2_sequences
+- ServoSequence objects handed to ServoBackendCore at run time
+
+Timing model (positions in quarter-microseconds):
+- Command sequences: SMOOTH moves ease in/out over their duration, all
+  other moves ramp linearly over max(duration, MIN_MOVE_SECONDS), the
+  same minimum the run-time velocity check assumes
+- Maestro step sequences: steps run one after another with their
+  declared easing over the step duration, then hold
+- Choreographies: steps start at delay_before_ms from the current
+  position, with the choreographer's easing, overshoot, personality
+  rate and clamping
+Loops are compiled as one pass. Where a channel starts is only known at
+show time, so the first move of each channel is checked at its target
+(limits, zones), not for speed, unless initial positions are given; zones
+shared with servos outside the sequence are not checked either. Players
+check both against the live positions before playing an artifact
+(ServoSafetySystem.validate_playback).
+
+Artifacts are cached in ~/.cache/r2ai/preflight, or in the directory
+named by R2D2_PREFLIGHT_CACHE.
+
+Features:
+- One vectorized pass per sequence (limits, velocity, acceleration, zones)
+- Signed, content-addressed artifacts cached on disk
+- Hash-only lookup at run time
+- Command-line report over every sequence source
+
+Usage:
+    python3 r2d2_sequence_preflight.py --sequence-dir servo_sequences
+
+    preflight = SequencePreflight()
+    artifact = preflight.lookup(definition)     # None -> validate per command
+"""
+
+import argparse
+import glob
+import hashlib
+import hmac
+import json
+import logging
+import math
+import os
+import secrets
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from r2d2_metrics import MetricsRegistry
+from r2d2_safety_kernel import (
+    SafetyKernel, PositionLimitRule, VelocityRule, CollisionZoneRule,
+    SEVERITY_WARNING, SEVERITY_CRITICAL
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when sampling or checks change: old artifacts stop matching
+PREFLIGHT_VERSION = 1
+
+TICK_SECONDS = 0.02           # 50 Hz, the rate sequences are played at
+MIN_MOVE_SECONDS = 0.1        # Shortest move assumed for an instant command
+DEFAULT_POSITION_RANGE = (3968.0, 8000.0)   # 992-2000 μs
+CACHE_DIR_ENV = 'R2D2_PREFLIGHT_CACHE'
+DEFAULT_CACHE_DIR = os.environ.get(CACHE_DIR_ENV) or os.path.expanduser("~/.cache/r2ai/preflight")
+KEY_ENV = 'R2D2_PREFLIGHT_KEY'
+
+# ============================================================================
+# EASING
+# ============================================================================
+
+def _ease_in_out(t: np.ndarray) -> np.ndarray:
+    return np.where(t < 0.5, 2 * t * t, 1 - 2 * (1 - t) * (1 - t))
+
+
+def _bounce(t: np.ndarray) -> np.ndarray:
+    # Same breakpoints as R2D2EnhancedChoreographer._calculate_easing
+    return np.select(
+        [t < 0.36, t < 0.73, t < 0.9],
+        [7.5625 * t * t,
+         7.5625 * (t - 0.545) ** 2 + 0.75,
+         7.5625 * (t - 0.82) ** 2 + 0.9375],
+        7.5625 * (t - 0.955) ** 2 + 0.984375)
+
+
+def _elastic(t: np.ndarray) -> np.ndarray:
+    p = 0.3
+    value = -(2.0 ** (10 * (t - 1))) * np.sin((t - 1 - p / 4) * (2 * np.pi) / p)
+    return np.where((t == 0) | (t == 1), t, value)
+
+
+# Vectorized counterparts of the run-time easing functions; names the
+# players do not implement fall back to linear, as they do at run time
+EASING_FUNCTIONS = {
+    'linear': lambda t: t,
+    'ease_in': lambda t: t * t,
+    'ease_out': lambda t: 1 - (1 - t) * (1 - t),
+    'ease_in_out': _ease_in_out,
+    'smooth': _ease_in_out,
+    'bounce': _bounce,
+    'elastic': _elastic,
+    'back': lambda t: t * t * (2.70158 * t - 1.70158),
+    'circ': lambda t: 1 - np.sqrt(1 - t * t),
+    'sine': lambda t: 1 - np.cos(t * np.pi / 2),
+    'r2d2_organic': lambda t: t + 0.1 * np.sin(t * np.pi * 4) * (1 - t),
+    'r2d2_mechanical': lambda t: t * t * (3 - 2 * t),
+    'r2d2_emotional': lambda t: t + 0.15 * np.sin(t * np.pi * 2) * (1 - t) * t,
+}
+
+
+def ease(name: str, t: np.ndarray) -> np.ndarray:
+    """Apply a named easing to progress values in [0, 1]"""
+    return EASING_FUNCTIONS.get(name, EASING_FUNCTIONS['linear'])(np.clip(t, 0.0, 1.0))
+
+# ============================================================================
+# DEFINITIONS
+# ============================================================================
+
+def _value(item: Any) -> Any:
+    """Enum members as their value"""
+    return getattr(item, 'value', item)
+
+
+def definition_from_commands(commands: List[Any], timing: str = 'absolute') -> Dict:
+    """
+    Definition of a command sequence (ServoCommand objects or their dicts)
+
+    Args:
+        commands: Commands with channel, command_type, value (μs), duration,
+            motion_type and delay
+        timing: 'absolute' when delay is from the sequence start
+            (SequenceEngine), 'cumulative' when each delay follows the
+            previous command (ServoBackendCore)
+    """
+    rows = []
+    for command in commands:
+        get = command.get if isinstance(command, Mapping) else lambda k, d=None: getattr(command, k, d)
+        rows.append([int(get('channel')), str(_value(get('command_type'))), float(get('value')),
+                     float(get('duration', 0.0) or 0.0), str(_value(get('motion_type', 'linear'))),
+                     float(get('delay', 0.0) or 0.0)])
+    return {'kind': 'commands', 'timing': timing, 'commands': rows}
+
+
+def definition_from_steps(sequence: Any) -> Dict:
+    """Definition of a Maestro ServoSequence (ServoSequenceStep list)"""
+    return {
+        'kind': 'steps',
+        'steps': [[int(s.channel), float(s.position), float(s.duration_ms), str(s.easing_type),
+                   float(s.hold_time_ms)] for s in sequence.steps]
+    }
+
+
+def definition_from_choreography(choreography: Any) -> Dict:
+    """Definition of a ChoreographySequence"""
+    return {
+        'kind': 'choreography',
+        'total_duration_ms': float(choreography.total_duration_ms),
+        'emotional_intensity': float(choreography.emotional_intensity),
+        'steps': [[int(s.channel), float(s.end_position), float(s.duration_ms),
+                   str(_value(s.easing_function)), float(s.delay_before_ms),
+                   float(s.hold_at_end_ms), float(s.overshoot_factor),
+                   float(s.personality_modifier)] for s in choreography.steps]
+    }
+
+
+def definition_digest(definition: Dict) -> str:
+    """SHA-256 of the canonical JSON form of a definition"""
+    canonical = json.dumps(definition, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+# ============================================================================
+# SAMPLING
+# ============================================================================
+
+@dataclass
+class MotionSegment:
+    """One move of one channel"""
+    channel: int
+    start_time: float                    # Seconds from sequence start
+    duration: float
+    end: float
+    easing: str = 'linear'
+    start: Optional[float] = None        # None: wherever the channel is
+    overshoot: float = 0.0
+    rate: float = 1.0                    # Progress multiplier (personality)
+    clamp: Optional[Tuple[float, float]] = None
+
+    @property
+    def end_time(self) -> float:
+        return self.start_time + self.duration / max(self.rate, 1e-9)
+
+
+def segments_from_definition(definition: Dict) -> Tuple[List[MotionSegment], Optional[float], List[Dict]]:
+    """
+    Motion segments of a definition
+
+    Returns:
+        (segments, fixed duration in seconds or None, settings commands)
+    """
+    kind = definition['kind']
+    segments: List[MotionSegment] = []
+    settings: List[Dict] = []
+
+    if kind == 'commands':
+        clock = 0.0
+        for channel, command_type, value, duration, motion_type, delay in definition['commands']:
+            clock = clock + delay if definition.get('timing') == 'cumulative' else delay
+            if command_type != 'position':
+                settings.append({'channel': channel, 'type': command_type, 'value': value,
+                                 'time': clock})
+                continue
+            if motion_type == 'smooth' and duration > 0:
+                segments.append(MotionSegment(channel, clock, duration, value * 4, 'ease_in_out'))
+            else:
+                segments.append(MotionSegment(channel, clock, max(duration, MIN_MOVE_SECONDS), value * 4))
+        return segments, None, settings
+
+    if kind == 'steps':
+        clock = 0.0
+        for channel, position, duration_ms, easing, hold_ms in definition['steps']:
+            duration = max(duration_ms / 1000.0, TICK_SECONDS)
+            segments.append(MotionSegment(channel, clock, duration, position, easing))
+            clock += duration_ms / 1000.0 + hold_ms / 1000.0
+        return segments, clock, settings
+
+    if kind == 'choreography':
+        intensity = definition['emotional_intensity']
+        for (channel, end, duration_ms, easing, delay_ms, hold_ms,
+             overshoot, modifier) in definition['steps']:
+            segments.append(MotionSegment(
+                channel, delay_ms / 1000.0, max(duration_ms / 1000.0, TICK_SECONDS), end, easing,
+                overshoot=overshoot * intensity, rate=modifier, clamp=(1000.0, 8000.0)))
+        return segments, definition['total_duration_ms'] / 1000.0, settings
+
+    raise ValueError(f"Unknown sequence definition kind: {kind}")
+
+
+def sample_segments(segments: List[MotionSegment], channels: int, initial: np.ndarray,
+                    tick: float = TICK_SECONDS, duration: Optional[float] = None) -> np.ndarray:
+    """
+    Sample segments into a (ticks x channels) table (NaN before a channel's first move)
+
+    A segment runs until the next segment of its channel starts; a segment
+    without a start position begins wherever the channel is at that time.
+    """
+    if duration is None:
+        duration = max((s.end_time for s in segments), default=0.0)
+    ticks = int(math.ceil(duration / tick)) + 1
+    frames = np.full((ticks, channels), np.nan)
+
+    by_channel: Dict[int, List[MotionSegment]] = {}
+    for segment in sorted(segments, key=lambda s: s.start_time):
+        by_channel.setdefault(segment.channel, []).append(segment)
+
+    for channel, channel_segments in by_channel.items():
+        if not 0 <= channel < channels:
+            continue
+        current = float(initial[channel])
+        for i, segment in enumerate(channel_segments):
+            first = int(math.ceil(segment.start_time / tick - 1e-9))
+            last = (int(math.ceil(channel_segments[i + 1].start_time / tick - 1e-9))
+                    if i + 1 < len(channel_segments) else ticks)
+            first, last = min(first, ticks), min(max(last, first), ticks)
+            index = np.arange(first, last + 1)
+
+            progress = np.clip((index * tick - segment.start_time) / segment.duration * segment.rate,
+                               0.0, 1.0)
+            start = current if segment.start is None else segment.start
+            if math.isnan(start):
+                start = segment.end      # Unknown start: the approach is not modeled
+            positions = start + (segment.end - start) * ease(segment.easing, progress)
+            if segment.overshoot > 0:
+                window = (progress > 0.3) & (progress < 0.8)
+                positions += np.where(window, (segment.end - start) * segment.overshoot *
+                                      np.sin((progress - 0.3) * np.pi / 0.5), 0.0)
+            if segment.clamp is not None:
+                positions = np.clip(positions, *segment.clamp)
+
+            frames[first:last, channel] = positions[:-1]
+            current = float(positions[-1])
+    return frames
+
+# ============================================================================
+# LIMITS AND ARTIFACTS
+# ============================================================================
+
+@dataclass
+class PreflightLimits:
+    """Limits a sequence is compiled against (quarter-microseconds)"""
+    position_limits: Dict[int, Tuple[float, float]] = field(default_factory=dict)
+    default_range: Tuple[float, float] = DEFAULT_POSITION_RANGE
+    max_velocity: Union[float, Dict[int, float]] = 40000.0   # Per second
+    max_acceleration: float = 2000000.0    # Per second²
+    velocity_severity: str = SEVERITY_WARNING
+    acceleration_severity: str = SEVERITY_WARNING
+    channels: Optional[List[int]] = None   # Channels that may be commanded (None: any)
+    zones: List[Tuple[str, Dict[int, Tuple[float, float]], str]] = field(default_factory=list)
+    setting_limits: Dict[str, Dict[int, float]] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        """Canonical form (part of every artifact digest)"""
+        return {
+            'position_limits': {str(c): list(r) for c, r in sorted(self.position_limits.items())},
+            'default_range': list(self.default_range),
+            'max_velocity': ({str(c): v for c, v in sorted(self.max_velocity.items())}
+                             if isinstance(self.max_velocity, Mapping) else self.max_velocity),
+            'max_acceleration': self.max_acceleration,
+            'velocity_severity': self.velocity_severity,
+            'acceleration_severity': self.acceleration_severity,
+            'channels': sorted(self.channels) if self.channels is not None else None,
+            'zones': [[name, {str(c): [_finite(lo), _finite(hi)] for c, (lo, hi) in sorted(bounds.items())},
+                       severity] for name, bounds, severity in self.zones],
+            'setting_limits': {kind: {str(c): v for c, v in sorted(limits.items())}
+                               for kind, limits in sorted(self.setting_limits.items())}
+        }
+
+    @classmethod
+    def from_servo_safety(cls, safety_system) -> 'PreflightLimits':
+        """Limits matching ServoSafetySystem.validate_command (its μs values x4)"""
+        from servo_base_classes import SafetyLevel
+        position_limits = {}
+        for channel, config in safety_system.servo_configs.items():
+            if not config.enabled:
+                continue
+            limits = config.limits
+            if config.safety_level == SafetyLevel.PRODUCTION:
+                low, high = max(limits.min_position, limits.safe_min), min(limits.max_position, limits.safe_max)
+            else:
+                low, high = limits.min_position, limits.max_position
+            position_limits[channel] = (low * 4.0, high * 4.0)
+
+        zones = [(name, {c: (lo * 4.0, hi * 4.0) for c, (lo, hi) in bounds.items()}, severity)
+                 for name, (bounds, severity) in safety_system.zone_bounds().items()]
+        return cls(
+            position_limits=position_limits,
+            max_velocity={c: safety_system.velocity_limits.get(c, safety_system.max_velocity) * 4.0
+                          for c in position_limits},
+            velocity_severity=SEVERITY_CRITICAL,   # validate_command rejects fast moves
+            channels=sorted(position_limits),
+            zones=zones,
+            setting_limits={
+                'speed': {c: float(safety_system.servo_configs[c].limits.max_speed) for c in position_limits},
+                'acceleration': {c: float(safety_system.servo_configs[c].limits.max_acceleration)
+                                 for c in position_limits}
+            }
+        )
+
+
+def _finite(value: float) -> Any:
+    """JSON-safe bound (infinite bounds as strings)"""
+    return value if math.isfinite(value) else ('inf' if value > 0 else '-inf')
+
+
+@dataclass
+class CompiledSequence:
+    """Signed preflight artifact for one sequence"""
+    name: str
+    source: str
+    digest: str
+    tick_seconds: float
+    channels: List[int]
+    frames: np.ndarray                   # (ticks x len(channels)) quarter-microseconds
+    violations: List[Dict] = field(default_factory=list)
+    compiled_at: float = field(default_factory=time.time)
+    signature: str = ''
+
+    @property
+    def ok(self) -> bool:
+        """No critical violations: safe to play without per-command checks"""
+        return not any(v['severity'] == SEVERITY_CRITICAL for v in self.violations)
+
+    @property
+    def duration(self) -> float:
+        return (len(self.frames) - 1) * self.tick_seconds
+
+    def payload(self) -> bytes:
+        """Bytes covered by the signature"""
+        meta = json.dumps({'name': self.name, 'source': self.source, 'digest': self.digest,
+                           'tick_seconds': self.tick_seconds, 'channels': self.channels,
+                           'violations': self.violations, 'compiled_at': self.compiled_at},
+                          sort_keys=True, separators=(',', ':'))
+        frames = np.ascontiguousarray(self.frames, dtype=np.float32)
+        return meta.encode() + hashlib.sha256(frames.tobytes()).digest()
+
+# ============================================================================
+# COMPILER
+# ============================================================================
+
+class SequencePreflight:
+    """Compiles sequences into signed, cached artifacts and looks them up by digest"""
+
+    def __init__(self, limits: Optional[PreflightLimits] = None, tick_seconds: float = TICK_SECONDS,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR, key: Optional[bytes] = None,
+                 channels: int = 24, initial_positions: Optional[Mapping[int, float]] = None):
+        self.limits = limits or PreflightLimits()
+        self.tick_seconds = tick_seconds
+        self.channel_count = channels
+        self.initial = np.full(channels, np.nan)    # Unknown unless given
+        for channel, position in (initial_positions or {}).items():
+            if 0 <= channel < channels:
+                self.initial[channel] = position
+
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Preflight cache unavailable ({e}); artifacts kept in memory")
+                self.cache_dir = None
+        self._key = key or self._load_key()
+        self.artifacts: Dict[str, CompiledSequence] = {}   # digest -> artifact
+        self._kernel = self._build_kernel()
+
+        if self.cache_dir:
+            self.load_cache()
+
+    # Keys and cache
+
+    def _load_key(self) -> bytes:
+        """Signing key from R2D2_PREFLIGHT_KEY, else a key file next to the cache"""
+        env_key = os.environ.get(KEY_ENV)
+        if env_key:
+            return env_key.encode()
+        if not self.cache_dir:
+            return secrets.token_bytes(32)   # Process-local artifacts only
+        key_file = self.cache_dir / "preflight.key"
+        if key_file.exists():
+            return key_file.read_bytes()
+        key = secrets.token_bytes(32)
+        key_file.write_bytes(key)
+        os.chmod(key_file, 0o600)
+        return key
+
+    def sign(self, artifact: CompiledSequence) -> str:
+        return hmac.new(self._key, artifact.payload(), hashlib.sha256).hexdigest()
+
+    def verify_signature(self, artifact: CompiledSequence) -> bool:
+        return hmac.compare_digest(artifact.signature, self.sign(artifact))
+
+    def load_cache(self) -> int:
+        """Load and verify every cached artifact; returns how many were accepted"""
+        loaded = 0
+        for path in self.cache_dir.glob("*.npz"):
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    meta = json.loads(str(data['meta']))
+                    artifact = CompiledSequence(frames=data['frames'], **meta)
+                if self.verify_signature(artifact):
+                    self.artifacts[artifact.digest] = artifact
+                    loaded += 1
+                else:
+                    logger.warning(f"Preflight artifact {path.name} has an invalid signature; ignored")
+            except Exception as e:
+                logger.warning(f"Failed to load preflight artifact {path.name}: {e}")
+        return loaded
+
+    def _store(self, artifact: CompiledSequence):
+        if not self.cache_dir:
+            return
+        meta = {'name': artifact.name, 'source': artifact.source, 'digest': artifact.digest,
+                'tick_seconds': artifact.tick_seconds, 'channels': artifact.channels,
+                'violations': artifact.violations, 'compiled_at': artifact.compiled_at,
+                'signature': artifact.signature}
+        path = self.cache_dir / f"{artifact.digest[:16]}.npz"
+        tmp = path.with_suffix('.tmp.npz')
+        try:
+            np.savez(tmp, frames=artifact.frames, meta=np.array(json.dumps(meta)))
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.error(f"Failed to cache preflight artifact {artifact.name}: {e}")
+
+    # Compilation
+
+    def digest(self, definition: Dict) -> str:
+        """Artifact key: definition, limits, tick rate and compiler version"""
+        return definition_digest({
+            'version': PREFLIGHT_VERSION,
+            'tick_seconds': self.tick_seconds,
+            'initial': [None if math.isnan(v) else v for v in self.initial.tolist()],
+            'limits': self.limits.to_dict(),
+            'definition': definition
+        })
+
+    def lookup(self, definition: Dict) -> Optional[CompiledSequence]:
+        """Run-time check: the validated artifact for a definition, or None"""
+        artifact = self.artifacts.get(self.digest(definition))
+        return artifact if artifact is not None and artifact.ok else None
+
+    def compile(self, name: str, definition: Dict, source: str = '') -> CompiledSequence:
+        """Compile (or fetch from cache) the artifact for a definition"""
+        digest = self.digest(definition)
+        cached = self.artifacts.get(digest)
+        if cached is not None:
+            return cached
+
+        segments, duration, settings = segments_from_definition(definition)
+        frames = sample_segments(segments, self.channel_count, self.initial,
+                                 self.tick_seconds, duration)
+        violations = self._check(frames, segments, settings)
+
+        used = sorted({s.channel for s in segments if 0 <= s.channel < self.channel_count})
+        filled = self._fill(frames)
+        artifact = CompiledSequence(
+            name=name, source=source, digest=digest, tick_seconds=self.tick_seconds,
+            channels=used, frames=filled[:, used].astype(np.float32), violations=violations)
+        artifact.signature = self.sign(artifact)
+
+        self.artifacts[digest] = artifact
+        self._store(artifact)
+        level = logging.INFO if artifact.ok else logging.WARNING
+        logger.log(level, f"Preflight {name}: {len(frames)} ticks, {len(used)} channels, "
+                          f"{len(violations)} violations")
+        for violation in violations:
+            if violation['severity'] == SEVERITY_CRITICAL:
+                logger.warning(f"Preflight {name} at {violation['time']:.2f}s: {violation['message']}")
+        return artifact
+
+    def compile_all(self, sequence_dir: Optional[str] = None,
+                    include_builtin: bool = True) -> List[CompiledSequence]:
+        """Compile every sequence from the known sources"""
+        return [self.compile(name, definition, source)
+                for name, source, definition in collect_sequences(sequence_dir, include_builtin)]
+
+    # Checks
+
+    def _build_kernel(self) -> SafetyKernel:
+        """Kernel holding the run-time rules for the trajectory checks (no watchdog)"""
+        limits = self.limits
+        kernel = SafetyKernel(channels=self.channel_count, registry=MetricsRegistry(), name='preflight')
+        ranges = {c: limits.default_range for c in range(self.channel_count)}
+        ranges.update(limits.position_limits)
+        kernel.add_rule(PositionLimitRule(ranges))
+        kernel.add_rule(VelocityRule(limits.max_velocity, severity=limits.velocity_severity))
+        if limits.zones:
+            kernel.add_rule(CollisionZoneRule(limits.zones))
+        return kernel
+
+    def _fill(self, frames: np.ndarray) -> np.ndarray:
+        from r2d2_collision_table import forward_fill
+        return forward_fill(frames, self.initial)
+
+    def _check(self, frames: np.ndarray, segments: List[MotionSegment],
+               settings: List[Dict]) -> List[Dict]:
+        limits = self.limits
+        violations = []
+
+        # Channels that may not be commanded at all
+        if limits.channels is not None:
+            allowed = set(limits.channels)
+            for channel in sorted({s.channel for s in segments} | {s['channel'] for s in settings}):
+                if channel not in allowed:
+                    violations.append({'rule': 'unknown_channel', 'channel': channel,
+                                       'severity': SEVERITY_CRITICAL, 'time': 0.0,
+                                       'message': f"Sequence commands unconfigured or disabled servo {channel}"})
+
+        # Limits, velocity and zones: the kernel rules, over the whole table
+        for event in self._kernel.validate_trajectory(frames, self.tick_seconds, start=self.initial):
+            violations.append({'rule': event.rule, 'channel': event.channel, 'severity': event.severity,
+                               'time': round(event.sample_time, 6), 'message': event.message})
+
+        # Acceleration from the second difference
+        filled = self._fill(frames)
+        if len(filled) > 2 and limits.max_acceleration:
+            acceleration = np.abs(np.diff(filled, n=2, axis=0)) / self.tick_seconds ** 2
+            with np.errstate(invalid='ignore'):
+                excessive = acceleration > limits.max_acceleration
+            for channel in np.flatnonzero(excessive.any(axis=0)):
+                tick = int(np.argmax(excessive[:, channel]))
+                violations.append({
+                    'rule': 'acceleration', 'channel': int(channel),
+                    'severity': limits.acceleration_severity, 'time': round((tick + 1) * self.tick_seconds, 6),
+                    'message': f"Servo {channel} acceleration {acceleration[tick, channel]:.0f} exceeds "
+                               f"limit {limits.max_acceleration:.0f}"})
+
+        # Speed / acceleration settings
+        for setting in settings:
+            limit = limits.setting_limits.get(setting['type'], {}).get(setting['channel'])
+            if limit is not None and setting['value'] > limit:
+                violations.append({
+                    'rule': f"{setting['type']}_limit", 'channel': setting['channel'],
+                    'severity': SEVERITY_CRITICAL, 'time': setting['time'],
+                    'message': f"{setting['type'].capitalize()} {setting['value']:g} exceeds limit {limit:g}"})
+
+        violations.sort(key=lambda v: v['time'])
+        return violations
+
+# ============================================================================
+# SOURCES
+# ============================================================================
+
+def collect_sequences(sequence_dir: Optional[str] = None,
+                      include_builtin: bool = True) -> Iterator[Tuple[str, str, Dict]]:
+    """Yield (name, source, definition) for every sequence that can be loaded"""
+    if sequence_dir:
+        for path in sorted(glob.glob(os.path.join(sequence_dir, "*.json"))):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                yield data.get('name', Path(path).stem), path, definition_from_commands(data['commands'])
+            except Exception as e:
+                logger.error(f"Cannot load sequence {path}: {e}")
+
+    if not include_builtin:
+        return
+
+    try:
+        from r2d2_servo_sequences import R2D2SequenceLibrary
+        for name, sequence in R2D2SequenceLibrary.get_all_sequences().items():
+            yield name, 'R2D2SequenceLibrary', definition_from_steps(sequence)
+    except Exception as e:
+        logger.error(f"Cannot load R2D2SequenceLibrary: {e}")
+
+    try:
+        from r2d2_enhanced_choreographer import R2D2EnhancedChoreographer
+
+        class OfflineController:
+            """Enough of a controller for the choreographer to build its library"""
+            def get_servo_count(self) -> int:
+                return 12
+
+        choreographer = R2D2EnhancedChoreographer(OfflineController())
+        for name, choreography in choreographer.choreography_library.items():
+            yield name, 'R2D2EnhancedChoreographer', definition_from_choreography(choreography)
+    except Exception as e:
+        logger.error(f"Cannot load choreography library: {e}")
+
+    try:
+        from maestro_enhanced_controller import EnhancedMaestroController
+
+        class SequenceRecorder:
+            """Runs the controller's default-sequence builder without hardware"""
+            create_sequence = EnhancedMaestroController.create_sequence
+            add_sequence_step = EnhancedMaestroController.add_sequence_step
+            build = EnhancedMaestroController._create_default_r2d2_sequences
+
+            def __init__(self):
+                self.saved_sequences = {}
+                # The default configuration creates servos 0-5 before the sequences
+                self.dynamic_configs = dict.fromkeys(range(6))
+
+        recorder = SequenceRecorder()
+        recorder.build()
+        for name, sequence in recorder.saved_sequences.items():
+            yield name, 'EnhancedMaestroController', definition_from_steps(sequence)
+    except Exception as e:
+        logger.error(f"Cannot load Maestro default sequences: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and validate every R2D2 servo sequence")
+    parser.add_argument('--sequence-dir', default='servo_sequences')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--tick', type=float, default=TICK_SECONDS)
+    parser.add_argument('--no-builtin', action='store_true', help="Only the JSON sequence files")
+    parser.add_argument('-v', '--verbose', action='store_true', help="List every violation")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    preflight = SequencePreflight(tick_seconds=args.tick, cache_dir=args.cache_dir)
+
+    start = time.perf_counter()
+    artifacts = preflight.compile_all(args.sequence_dir, not args.no_builtin)
+    elapsed = time.perf_counter() - start
+
+    print("R2D2 Sequence Preflight")
+    print("=" * 50)
+    for artifact in artifacts:
+        status = "OK  " if artifact.ok else "FAIL"
+        print(f"{status} {artifact.name:<32} {artifact.duration:6.2f}s {len(artifact.channels):2d} ch "
+              f"{len(artifact.violations):3d} issues  [{artifact.source}]")
+        if args.verbose or not artifact.ok:
+            for violation in artifact.violations:
+                print(f"       {violation['time']:6.2f}s {violation['severity']:<8} {violation['message']}")
+    failed = sum(not a.ok for a in artifacts)
+    print(f"\n{len(artifacts)} sequences, {failed} failed, compiled in {elapsed * 1000:.0f}ms")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -33,6 +33,9 @@ from r2d2_servo_config_manager import R2D2ServoConfigManager
 from r2d2_animatronic_sequences import R2D2AnimatronicSequencer, R2D2Emotion
 from r2d2_emergency_safety_system import R2D2EmergencySafetySystem
 from maestro_script_engine import MaestroScriptEngine
+from r2d2_rate_limiter import create_api_rate_limiter, install_flask_rate_limiter
+from r2d2_metrics import install_flask_metrics_endpoint
+from r2d2_status_snapshots import StatusSnapshotService, flask_snapshot_response
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -43,6 +46,13 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'r2d2-servo-control-secret'
 CORS(app)
 
+# Reject runaway clients with 429 before they reach the servo backend
+rate_limiter = create_api_rate_limiter()
+install_flask_rate_limiter(app, rate_limiter)
+
+# Prometheus text (/metrics) and dashboard snapshot (/api/metrics)
+install_flask_metrics_endpoint(app)
+
 # Initialize SocketIO
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
 
@@ -74,6 +84,13 @@ class R2D2ServoAPIBackend:
         self.status_broadcast_active = False
         self.status_thread: Optional[threading.Thread] = None
 
+        # System status is rebuilt at most once a second and shared by REST polls and broadcasts.
+        # Timestamps, uptimes and the poll counters change on every build, so they stay out of the ETag
+        self.status_snapshots = StatusSnapshotService(max_age=1.0)
+        self.status_snapshots.register('status', lambda: {"success": True, "data": self.get_system_status()},
+                                       volatile=("timestamp", "uptime", "monitoring_uptime",
+                                                 "api_calls", "calls_per_minute"))
+
         # Initialize system
         self._initialize_system()
 
@@ -132,8 +149,7 @@ class R2D2ServoAPIBackend:
             while self.status_broadcast_active:
                 try:
                     if self.connected_clients:
-                        status = self.get_system_status()
-                        socketio.emit('system_status', status)
+                        socketio.emit('system_status', self.get_cached_system_status())
 
                     time.sleep(1.0)  # 1Hz status updates
 
@@ -144,6 +160,10 @@ class R2D2ServoAPIBackend:
         self.status_thread = threading.Thread(target=status_broadcast_loop, daemon=True)
         self.status_thread.start()
 
+    def get_cached_system_status(self) -> Dict:
+        """System status from the snapshot service (rebuilt at most once per second)"""
+        return self.status_snapshots.get('status').payload["data"]
+
     def get_system_status(self) -> Dict:
         """Get comprehensive system status"""
         if not self.system_initialized:
@@ -196,8 +216,7 @@ def get_status():
     """Get system status"""
     backend.api_calls += 1
     try:
-        status = backend.get_system_status()
-        return jsonify({"success": True, "data": status})
+        return flask_snapshot_response(backend.status_snapshots, 'status')
     except Exception as e:
         logger.error(f"Status endpoint error: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -416,6 +435,7 @@ def emergency_stop():
         reason = data.get('reason', 'API emergency stop request')
 
         backend.safety_system.emergency_stop('MANUAL', reason)
+        backend.status_snapshots.invalidate()
 
         # Broadcast emergency alert to all clients
         socketio.emit('emergency_stop', {
@@ -445,6 +465,7 @@ def emergency_reset():
             return jsonify({"success": False, "error": "Operator confirmation required"}), 400
 
         success = backend.safety_system.reset_emergency_stop(operator_confirmation=True)
+        backend.status_snapshots.invalidate()
 
         if success:
             # Broadcast reset to all clients
@@ -571,8 +592,7 @@ def handle_connect():
     logger.info(f"Client connected: {request.sid}")
 
     # Send initial status
-    status = backend.get_system_status()
-    emit('system_status', status)
+    emit('system_status', backend.get_cached_system_status())
 
 @socketio.on('disconnect')
 def handle_disconnect():
@@ -589,8 +609,7 @@ def handle_heartbeat():
 @socketio.on('request_status')
 def handle_status_request():
     """Handle status request"""
-    status = backend.get_system_status()
-    emit('system_status', status)
+    emit('system_status', backend.get_cached_system_status())
 
 # === ERROR HANDLERS ===
 
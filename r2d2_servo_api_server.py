@@ -36,6 +36,8 @@ from r2d2_servo_backend import (
     SystemHealthStatus,
     ConnectionStatus
 )
+from r2d2_rate_limiter import RateLimitMiddleware, create_api_rate_limiter
+from r2d2_metrics import add_fastapi_metrics_routes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -84,6 +86,13 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Rate limiting (added before CORS so 429 responses still carry CORS headers)
+rate_limiter = create_api_rate_limiter()
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
+# Prometheus text (/metrics) and dashboard snapshot (/api/metrics)
+add_fastapi_metrics_routes(app)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
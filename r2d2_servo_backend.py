@@ -31,6 +31,7 @@ import logging
 import threading
 import time
 import math
+import itertools
 import serial
 import serial.tools.list_ports
 from datetime import datetime, timedelta
@@ -57,6 +58,13 @@ from maestro_enhanced_controller import (
     HardwareDetectionStatus,
     SequenceStatus
 )
+from r2d2_metrics import MetricsRegistry, get_registry
+from r2d2_safety_kernel import (
+    SafetyKernel, SafetyEvent, PositionLimitRule, SEVERITY_CRITICAL, get_safety_kernel
+)
+from servo_command_coalescer import ServoCommandCoalescer, send_ack_when_flushed
+from r2d2_state_store import StateStore, StatePublisher
+from r2d2_startup_orchestrator import StartupOrchestrator
 
 # Configure logging
 logging.basicConfig(
@@ -687,24 +695,40 @@ class SequenceEngine:
                 # Convert to serializable format
                 data = asdict(sequence)
                 data['commands'] = [asdict(cmd) for cmd in sequence.commands]
-                json.dump(data, f, indent=2)
+                json.dump(data, f, indent=2, default=lambda value: getattr(value, 'value', str(value)))
         except Exception as e:
             logger.error(f"Failed to save sequence: {e}")
 
+_diagnostics_ids = itertools.count(1)
+
 class DiagnosticsEngine:
     """Advanced system diagnostics and performance monitoring"""
 
-    def __init__(self):
+    def __init__(self, registry: Optional[MetricsRegistry] = None, name: Optional[str] = None):
         self.diagnostic_history: List[DiagnosticData] = []
-        self.performance_metrics = PerformanceMetrics(
-            command_latency_ms=0.0,
-            position_accuracy=100.0,
-            movement_smoothness=100.0,
-            sequence_timing_precision=100.0,
-            hardware_response_time=0.0,
-            total_commands_processed=0,
-            success_rate=100.0
-        )
+        self.name = name or f"diagnostics{next(_diagnostics_ids)}"
+
+        # Command performance lives in the shared metrics registry, one
+        # labeled child per engine so instances don't count each other's commands
+        registry = registry or get_registry()
+        commands = registry.counter(
+            'servo_commands_total', 'Servo commands processed', ('instance', 'result'))
+        self._commands_succeeded = commands.labels(self.name, 'success')
+        self._commands_failed = commands.labels(self.name, 'failure')
+        self._command_latency = registry.histogram(
+            'servo_command_latency_seconds', 'Servo command latency', ('instance',)).labels(self.name)
+        self._last_command_latency = registry.gauge(
+            'servo_last_command_latency_seconds', 'Latency of the most recent servo command',
+            ('instance',)).labels(self.name)
+        self._success_rate = registry.gauge(
+            'servo_command_success_rate_percent', 'Smoothed servo command success rate',
+            ('instance',)).labels(self.name)
+        self._success_rate.set(100.0)
+        self._cpu_usage = registry.gauge('system_cpu_usage_percent', 'CPU usage')
+        self._memory_usage = registry.gauge('system_memory_usage_percent', 'Memory usage')
+        self._temperature = registry.gauge('system_temperature_celsius', 'CPU temperature')
+        self._metrics_lock = threading.Lock()
+
         self.monitoring_active = False
         self.max_history_size = 1000
         self.alert_thresholds = {
@@ -753,6 +777,10 @@ class DiagnosticsEngine:
             memory_usage = 0.0
             temperature = 0.0
 
+        self._cpu_usage.set(cpu_usage)
+        self._memory_usage.set(memory_usage)
+        self._temperature.set(temperature)
+
         return DiagnosticData(
             timestamp=time.time(),
             cpu_usage=cpu_usage,
@@ -762,7 +790,7 @@ class DiagnosticsEngine:
             active_servos=0,  # Would be updated by backend
             sequence_count=0,  # Would be updated by backend
             error_count=0,    # Would be updated by backend
-            last_command_latency=self.performance_metrics.command_latency_ms
+            last_command_latency=self._last_command_latency.get() * 1000
         )
 
     def _get_cpu_temperature(self) -> float:
@@ -835,19 +863,34 @@ class DiagnosticsEngine:
         else:
             return SystemHealthStatus.EXCELLENT
 
+    @property
+    def performance_metrics(self) -> PerformanceMetrics:
+        """Current performance metrics read from the metrics registry"""
+        return PerformanceMetrics(
+            command_latency_ms=self._last_command_latency.get() * 1000,
+            position_accuracy=100.0,
+            movement_smoothness=100.0,
+            sequence_timing_precision=100.0,
+            hardware_response_time=self._command_latency.percentile(50) * 1000,
+            total_commands_processed=int(self._commands_succeeded.get() +
+                                         self._commands_failed.get()),
+            success_rate=self._success_rate.get()
+        )
+
     def update_performance_metrics(self, command_latency: float, success: bool):
         """Update performance metrics with new data"""
-        self.performance_metrics.total_commands_processed += 1
-        self.performance_metrics.command_latency_ms = command_latency
+        (self._commands_succeeded if success else self._commands_failed).inc()
+        self._command_latency.observe(command_latency / 1000.0)
+        self._last_command_latency.set(command_latency / 1000.0)
 
         # Update success rate (rolling average)
-        if self.performance_metrics.total_commands_processed == 1:
-            self.performance_metrics.success_rate = 100.0 if success else 0.0
-        else:
-            current_rate = self.performance_metrics.success_rate
-            alpha = 0.1  # Smoothing factor
-            new_rate = (alpha * (100.0 if success else 0.0)) + ((1 - alpha) * current_rate)
-            self.performance_metrics.success_rate = new_rate
+        with self._metrics_lock:
+            sample = 100.0 if success else 0.0
+            if self._commands_succeeded.get() + self._commands_failed.get() == 1:
+                self._success_rate.set(sample)
+            else:
+                alpha = 0.1  # Smoothing factor
+                self._success_rate.set(alpha * sample + (1 - alpha) * self._success_rate.get())
 
     def get_performance_report(self) -> Dict[str, Any]:
         """Get comprehensive performance report"""
@@ -875,10 +918,13 @@ class DiagnosticsEngine:
             })
         return sequences
 
+# Owner of the SafetyMonitor's rules, handlers and timeouts in the shared safety kernel
+SAFETY_KERNEL_OWNER = 'servo_backend'
+
 class SafetyMonitor:
     """Advanced real-time safety monitoring and enforcement with violation tracking"""
 
-    def __init__(self, controller):
+    def __init__(self, controller, kernel: Optional[SafetyKernel] = None):
         self.controller = controller
         self.monitoring = False
         self.safety_limits = {}
@@ -894,10 +940,26 @@ class SafetyMonitor:
         self.position_deviation_threshold = 500  # Quarter-microseconds
         self.movement_timeout = 10.0  # Maximum time for movement completion
 
+        # Position limits and communication timeouts are evaluated by the
+        # (shared) safety kernel on every controller position snapshot
+        self.kernel = kernel or get_safety_kernel()
+        self.kernel.watch_stale(SAFETY_KERNEL_OWNER, self.connection_timeout)
+        self.kernel.add_stop_handler(self._on_kernel_stop, owner=SAFETY_KERNEL_OWNER)
+        self.kernel.add_event_handler(self._on_kernel_event, owner=SAFETY_KERNEL_OWNER)
+        self._subscribed = False
+
     def start_monitoring(self):
-        """Start safety monitoring"""
+        """Start safety monitoring (evaluated on each position snapshot)"""
         self.monitoring = True
-        threading.Thread(target=self._monitoring_loop, daemon=True).start()
+        if not self._subscribed:
+            self.kernel.add_rule(PositionLimitRule({
+                channel: (config.min_position, config.max_position)
+                for channel, config in self.controller.servo_configs.items()
+            }), owner=SAFETY_KERNEL_OWNER)
+            if hasattr(self.controller, 'add_position_listener'):
+                self.controller.add_position_listener(self._on_positions)
+                self.controller.add_command_listener(self.kernel.record_command)
+            self._subscribed = True
         logger.info("Safety monitoring started")
 
     def stop_monitoring(self):
@@ -905,43 +967,42 @@ class SafetyMonitor:
         self.monitoring = False
         logger.info("Safety monitoring stopped")
 
-    def _monitoring_loop(self):
-        """Main safety monitoring loop"""
-        while self.monitoring:
-            try:
-                self._check_servo_limits()
-                self._check_hardware_errors()
-                self._check_communication()
-                time.sleep(0.1)  # 10Hz monitoring
-            except Exception as e:
-                logger.error(f"Safety monitoring error: {e}")
-                time.sleep(1.0)
-
-    def _check_servo_limits(self):
-        """Check servo position limits"""
-        for channel, config in self.controller.servo_configs.items():
-            status = self.controller.servo_status[channel]
-
-            if (status.position < config.min_position or
-                status.position > config.max_position):
-                self._handle_safety_violation(
-                    f"Servo {channel} position out of bounds: {status.position}"
-                )
+    def _on_positions(self, fields: Dict, timestamp: float):
+        """Controller position snapshot: evaluate rules, then hardware errors"""
+        if not self.monitoring or not self.safety_enabled:
+            return
+        self.last_health_check = timestamp
+        self.kernel.publish_sample(fields, timestamp)
+        self._check_hardware_errors()
+
+    def _on_kernel_stop(self, event: SafetyEvent):
+        """Critical kernel event: stop before any bookkeeping"""
+        if self.monitoring:
+            self._trigger_emergency_stop(f"Critical safety violation: {event.message}")
+
+    def _on_kernel_event(self, event: SafetyEvent):
+        """Record kernel events as violations (escalation rules apply)"""
+        if not self.monitoring:
+            return
+        self._handle_safety_violation(
+            violation_type=event.rule,
+            channel=event.channel,
+            severity=event.severity,
+            description=event.message,
+            action_taken="emergency_stop" if event.severity == SEVERITY_CRITICAL else "monitoring"
+        )
 
     def _check_hardware_errors(self):
         """Check hardware error status"""
         if not self.controller.simulation_mode:
             error_status = self.controller.get_error_status()
             if error_status != 0:
-                self._handle_safety_violation(f"Hardware error: {error_status}")
-
-    def _check_communication(self):
-        """Check communication health"""
-        current_time = time.time()
-        for channel, status in self.controller.servo_status.items():
-            if current_time - status.last_update > 5.0:  # 5 second timeout
                 self._handle_safety_violation(
-                    f"Communication timeout for servo {channel}"
+                    violation_type="hardware_error",
+                    channel=-1,
+                    severity="critical",
+                    description=f"Hardware error: {error_status}",
+                    action_taken="emergency_stop"
                 )
 
     def _handle_safety_violation(self, violation_type: str, channel: int, severity: str, description: str, action_taken: str = "monitoring"):
@@ -1059,6 +1120,9 @@ class SafetyMonitor:
     def clear_emergency_stop(self):
         """Clear emergency stop condition"""
         if self.emergency_stop_active:
+            if not self.kernel.reset(SAFETY_KERNEL_OWNER):
+                logger.warning("Emergency stop not cleared - safety kernel still latched by another subsystem")
+                return
             self.emergency_stop_active = False
 
             # Clear violation counts for non-critical violations
@@ -1093,6 +1157,7 @@ class SafetyMonitor:
             "recent_violations": recent_violations,
             "last_health_check": self.last_health_check,
             "health_check_interval": self.health_check_interval,
+            "kernel": self.kernel.get_status(),
             "safety_thresholds": {
                 "position_deviation": self.position_deviation_threshold,
                 "movement_timeout": self.movement_timeout,
@@ -1111,6 +1176,7 @@ class SafetyMonitor:
 
         if 'connection_timeout' in parameters:
             self.connection_timeout = parameters['connection_timeout']
+            self.kernel.watch_stale(SAFETY_KERNEL_OWNER, self.connection_timeout)
 
         if 'max_violations' in parameters:
             self.max_violations = parameters['max_violations']
@@ -1132,6 +1198,14 @@ class WebSocketHandler:
         self.clients = set()
         self.server = None
 
+        # Position commands are coalesced per channel and written once per control tick
+        self.coalescer = ServoCommandCoalescer(
+            lambda targets: self.servo_backend.controller.move_servos_microseconds(targets))
+
+        # Versioned status (controller, servos, sequences, safety), clients receive changed fields
+        self.state_store = StateStore('servo_backend')
+        self.state_publisher = StatePublisher(self.state_store)
+
     async def start_server(self, host="localhost", port=8767):
         """Start WebSocket server"""
         self.server = await websockets.serve(
@@ -1147,8 +1221,9 @@ class WebSocketHandler:
         logger.info(f"Servo WebSocket client connected: {websocket.remote_address}")
 
         try:
-            # Send initial status
-            await self.send_status_update(websocket)
+            # Send a snapshot of all topics, deltas follow from the status loop
+            self.servo_backend.update_state()
+            await self.state_publisher.connect(websocket)
 
             async for message in websocket:
                 await self.handle_message(websocket, message)
@@ -1159,6 +1234,7 @@ class WebSocketHandler:
             logger.error(f"WebSocket error: {e}")
         finally:
             self.clients.discard(websocket)
+            self.state_publisher.disconnect(websocket)
 
     async def handle_message(self, websocket, message):
         """Handle incoming WebSocket message"""
@@ -1174,7 +1250,10 @@ class WebSocketHandler:
                 await self.handle_config_command(websocket, data)
             elif msg_type == "status_request":
                 await self.send_status_update(websocket)
+            elif msg_type == "subscribe":
+                await self.state_publisher.handle_subscribe(websocket, data)
             elif msg_type == "emergency_stop":
+                self.coalescer.clear()
                 self.servo_backend.emergency_stop()
             else:
                 logger.warning(f"Unknown message type: {msg_type}")
@@ -1190,21 +1269,25 @@ class WebSocketHandler:
             command = data["command"]
             value = data["value"]
 
-            success = False
+            response = {
+                "type": "servo_response",
+                "channel": channel,
+                "command": command
+            }
             if command == "position":
-                success = self.servo_backend.controller.move_servo_microseconds(channel, value)
-            elif command == "speed":
+                # Queue for the next control tick, ack once it is written
+                send_ack_when_flushed(self.coalescer.submit(channel, value), websocket, response)
+                return
+
+            success = False
+            if command == "speed":
                 success = self.servo_backend.controller.set_servo_speed(channel, int(value))
             elif command == "home":
+                self.coalescer.discard(channel)     # An older queued target must not override home
                 config = self.servo_backend.controller.servo_configs[channel]
                 success = self.servo_backend.controller.set_servo_position(channel, config.home_position)
 
-            response = {
-                "type": "servo_response",
-                "channel": channel,
-                "command": command,
-                "success": success
-            }
+            response["success"] = success
             await websocket.send(json.dumps(response))
 
         except Exception as e:
@@ -1341,18 +1424,24 @@ class ServoControlBackend:
     def __init__(self, maestro_port=None, simulation_mode=False, auto_detect=True):
         """Initialize enhanced servo control backend"""
 
-        # Initialize enhanced controller with auto-detection
+        # Controller auto-detection, configuration loading and diagnostics start concurrently.
+        # The board scan probes the same serial ports as the controller, so it waits for it.
+        startup = StartupOrchestrator('servo_backend')
+        startup.add('controller', lambda: EnhancedMaestroController(auto_detect=auto_detect))
+        startup.add('config_manager', ConfigurationManager)
+        startup.add('diagnostics_engine', DiagnosticsEngine)
         if auto_detect:
-            self.controller = EnhancedMaestroController(auto_detect=True)
-        else:
-            # Use enhanced controller even without auto-detection
-            self.controller = EnhancedMaestroController(auto_detect=False)
+            startup.add('board_scan', lambda: startup.results['config_manager'].detect_maestro_boards(),
+                        depends_on=['controller', 'config_manager'], optional=True)
+        components = startup.run_sync()
+        self.startup_report = startup.get_status()
 
         # Initialize all subsystems
-        self.config_manager = ConfigurationManager()
+        self.controller = components['controller']
+        self.config_manager = components['config_manager']
+        self.diagnostics_engine = components['diagnostics_engine']
         self.sequence_engine = SequenceEngine(self.controller)
         self.safety_monitor = SafetyMonitor(self.controller)
-        self.diagnostics_engine = DiagnosticsEngine()
         self.websocket_handler = WebSocketHandler(self)
 
         # Service state
@@ -1371,16 +1460,18 @@ class ServoControlBackend:
         # Setup callbacks
         self.safety_monitor.add_emergency_callback(self._safety_violation_callback)
 
-        # Detect and configure boards
+        # Configure detected boards
         if auto_detect:
-            self._initialize_detected_hardware()
+            if 'board_scan' in components:
+                self._initialize_detected_hardware(components['board_scan'])
+            else:
+                self.connection_status = ConnectionStatus.FAILED   # Scan error is in the startup report
 
         logger.info("R2D2 Enhanced Servo Control Backend initialized")
 
-    def _initialize_detected_hardware(self):
+    def _initialize_detected_hardware(self, detected_boards: List[MaestroHardwareInfo]):
         """Initialize configuration based on detected hardware"""
         try:
-            detected_boards = self.config_manager.detect_maestro_boards()
 
             if detected_boards:
                 # Use the first detected board
@@ -1536,11 +1627,20 @@ class ServoControlBackend:
 
         logger.info("All servo backend services started")
 
+    def update_state(self):
+        """Write the current status topics into the WebSocket state store"""
+        store = self.websocket_handler.state_store
+        store.update('controller', self.get_controller_status(), replace=True)
+        store.update('servos', self.get_servo_status(), replace=True)
+        store.update('sequences', {'available': self.sequence_engine.list_sequences()}, replace=True)
+        store.update('safety', self.safety_monitor.get_safety_status(), replace=True)
+
     async def _status_broadcast_loop(self):
-        """Periodic status broadcast to clients"""
+        """Periodic publication of changed status fields to subscribed clients"""
         while self.running:
             try:
-                await self.websocket_handler.send_status_update()
+                self.update_state()
+                await self.websocket_handler.state_publisher.publish()
                 await asyncio.sleep(2.0)  # 0.5Hz status updates
             except Exception as e:
                 logger.error(f"Status broadcast error: {e}")
@@ -1590,6 +1690,7 @@ class ServoControlBackend:
             "connection_status": self.connection_status.value,
             "health_status": self.health_status.value,
             "uptime": time.time() - self.start_time,
+            "startup_ms": self.startup_report['wall_ms'],
             "auto_reconnect_enabled": self.auto_reconnect_enabled,
             "reconnect_attempts": self.reconnect_attempts,
             "max_reconnect_attempts": self.max_reconnect_attempts,
@@ -1682,6 +1783,7 @@ class ServoControlBackend:
             # Stop all monitoring and services
             self.diagnostics_engine.stop_monitoring()
             self.safety_monitor.stop_monitoring()
+            self.safety_monitor.kernel.detach(SAFETY_KERNEL_OWNER)
             self.sequence_engine.stop_all_sequences()
 
             # Save current state
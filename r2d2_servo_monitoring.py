@@ -4,12 +4,12 @@ R2D2 Real-Time Servo Monitoring and Feedback System
 Professional Servo Performance Tracking and Diagnostics
 
 This module provides comprehensive real-time monitoring of servo systems including:
-- Real-time position and performance tracking
+- Real-time position and performance tracking (vectorized over all channels)
 - Advanced diagnostic capabilities
 - Predictive maintenance analysis
 - Performance optimization recommendations
 - Safety monitoring and alerts
-- Historical performance data analysis
+- Historical performance data analysis (multi-resolution time-series store)
 
 Author: Imagineer Specialist
 Version: 1.0.0
@@ -20,7 +20,6 @@ import time
 import logging
 import threading
 import json
-import statistics
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Callable
 from dataclasses import dataclass, field, asdict
@@ -29,11 +28,24 @@ from pathlib import Path
 import queue
 import sqlite3
 import matplotlib.pyplot as plt
-from collections import deque
 import warnings
 
+from r2d2_metrics import MetricsRegistry, get_registry
+from r2d2_timeseries_store import TimeSeriesStore
+
 logger = logging.getLogger(__name__)
 
+# Telemetry fields persisted per channel (ServoMetrics at the monitoring rate,
+# health scores at the analysis rate)
+TELEMETRY_METRIC_FIELDS = (
+    'position', 'target_position', 'position_error', 'speed', 'load',
+    'temperature', 'voltage', 'current', 'movement_smoothness',
+    'response_time', 'accuracy'
+)
+TELEMETRY_HEALTH_FIELDS = (
+    'position_accuracy', 'response_consistency', 'estimated_wear', 'maintenance_score'
+)
+
 class ServoHealthStatus(Enum):
     """Servo health status levels"""
     EXCELLENT = "excellent"
@@ -103,35 +115,144 @@ class PerformanceBaseline:
     baseline_established: float
     samples_count: int
 
+# Ring buffer layout: sample timestamp followed by the ServoMetrics fields
+HISTORY_FIELDS = ('timestamp',) + TELEMETRY_METRIC_FIELDS
+
+# Per-channel health state held in ServoMonitor._health (columns)
+HEALTH_FIELDS = (
+    'position_accuracy', 'response_consistency', 'movement_smoothness',
+    'estimated_wear', 'maintenance_score', 'operating_hours', 'cycle_count'
+)
+
+# Health status by code, best first (last code is UNKNOWN)
+HEALTH_STATUS_ORDER = (
+    ServoHealthStatus.EXCELLENT,
+    ServoHealthStatus.GOOD,
+    ServoHealthStatus.FAIR,
+    ServoHealthStatus.POOR,
+    ServoHealthStatus.CRITICAL,
+    ServoHealthStatus.UNKNOWN
+)
+
+class ServoHistoryBuffer:
+    """
+    Preallocated (channels x samples x fields) ring buffer
+
+    A monitoring tick writes the sample of every channel with one slice
+    assignment; analysis reads chronological windows for all channels at
+    once. Channels without a reading are stored as NaN.
+    """
+
+    def __init__(self, channels: int, capacity: int, fields: Tuple[str, ...] = HISTORY_FIELDS):
+        self.channels = channels
+        self.capacity = capacity
+        self.fields = fields
+        self.field_index = {name: i for i, name in enumerate(fields)}
+        self.data = np.full((channels, capacity, len(fields)), np.nan)
+        self.head = 0    # Next slot to write
+        self.count = 0   # Valid samples (<= capacity)
+        self.total = 0   # Samples ever written
+        self._lock = threading.Lock()
+
+    def append(self, sample: np.ndarray):
+        """Write one (channels x fields) sample"""
+        with self._lock:
+            self.data[:, self.head, :] = sample
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+            self.total += 1
+
+    def window(self, samples: int, name: Optional[str] = None) -> np.ndarray:
+        """Last `samples` samples, oldest first: (channels x n) for a field, else (channels x n x fields)"""
+        with self._lock:
+            n = min(samples, self.count)
+            index = (self.head - n + np.arange(n)) % self.capacity
+            if name is None:
+                return self.data[:, index, :]
+            return self.data[:, index, self.field_index[name]]
+
+    def latest(self) -> np.ndarray:
+        """Most recent (channels x fields) sample (all NaN when empty)"""
+        with self._lock:
+            if not self.count:
+                return np.full((self.channels, len(self.fields)), np.nan)
+            return self.data[:, (self.head - 1) % self.capacity, :].copy()
+
+_H = {name: i for i, name in enumerate(HISTORY_FIELDS)}
+_HEALTH = {name: i for i, name in enumerate(HEALTH_FIELDS)}
+
 class ServoMonitor:
     """Real-time servo monitoring and analysis system"""
 
-    def __init__(self, maestro_controller, database_path: str = "/home/rolo/r2ai/logs/servo_monitoring.db"):
+    def __init__(self, maestro_controller, database_path: str = "/home/rolo/r2ai/logs/servo_monitoring.db",
+                 registry: Optional[MetricsRegistry] = None,
+                 telemetry_path: Optional[str] = None, telemetry_budget_mb: float = 256.0,
+                 channels: int = 12, monitoring_frequency: float = 20.0):
         """Initialize servo monitoring system"""
         self.controller = maestro_controller
         self.database_path = Path(database_path)
         self.database_path.parent.mkdir(parents=True, exist_ok=True)
+        self.channel_count = channels
+
+        # Metrics and health history (alerts stay in SQLite)
+        self.telemetry = TimeSeriesStore(
+            telemetry_path or self.database_path.parent / "servo_telemetry",
+            TELEMETRY_METRIC_FIELDS + TELEMETRY_HEALTH_FIELDS,
+            channels=channels,
+            disk_budget_mb=telemetry_budget_mb
+        )
 
         # Monitoring state
         self.monitoring_active = True
         self.monitoring_thread: Optional[threading.Thread] = None
         self.analysis_thread: Optional[threading.Thread] = None
-
-        # Data storage
-        self.current_metrics: Dict[int, ServoMetrics] = {}
-        self.servo_health: Dict[int, ServoHealth] = {}
-        self.performance_baselines: Dict[int, PerformanceBaseline] = {}
         self.active_alerts: List[SystemAlert] = []
 
-        # Historical data (in-memory ring buffers)
-        self.history_size = 1000
-        self.position_history: Dict[int, deque] = {}
-        self.performance_history: Dict[int, deque] = {}
-
         # Configuration
-        self.monitoring_frequency = 20.0  # Hz
+        self.monitoring_frequency = monitoring_frequency  # Hz
         self.analysis_frequency = 1.0  # Hz
 
+        # Historical data: one ring buffer for all channels
+        self.history_seconds = 20.0
+        self.history_size = int(self.history_seconds * self.monitoring_frequency)
+        self.history = ServoHistoryBuffer(channels, self.history_size)
+        self._rng = np.random.default_rng()
+
+        # Health and baselines as (channels x fields) arrays
+        now = time.time()
+        self._health = np.zeros((channels, len(HEALTH_FIELDS)))
+        self._health[:, _HEALTH['maintenance_score']] = 1.0
+        self._health_status = np.full(channels, len(HEALTH_STATUS_ORDER) - 1)
+        self._last_calibration = np.full(channels, now)
+        # Columns: accuracy, response_time (ms), smoothness
+        self._baseline = np.tile([0.98, 50.0, 0.9], (channels, 1))
+        self._baseline_samples = np.zeros(channels, dtype=np.int64)
+        self._baseline_established = np.full(channels, now)
+        self._baseline_drift = np.zeros((channels, 3))
+        self._analyzed_total = 0
+
+        # Registry metrics (per-channel children are resolved once in
+        # _initialize_servo_monitoring and updated at the analysis rate)
+        registry = registry or get_registry()
+        self._position_error = registry.gauge(
+            'servo_position_error', 'Position error in quarter-microseconds', ('channel',))
+        self._accuracy = registry.gauge(
+            'servo_accuracy_ratio', 'Position accuracy (0-1)', ('channel',))
+        self._response_time = registry.gauge(
+            'servo_response_time_seconds', 'Estimated servo response time', ('channel',))
+        self._temperature = registry.gauge(
+            'servo_temperature_celsius', 'Estimated servo temperature', ('channel',))
+        self._load = registry.gauge(
+            'servo_load_ratio', 'Estimated servo load (0-1)', ('channel',))
+        self._alerts = registry.counter(
+            'servo_alerts_total', 'Servo monitoring alerts raised', ('level',))
+        self._cycle_time = registry.histogram(
+            'servo_monitor_cycle_seconds', 'Time to collect metrics for all servos')
+        self._channel_gauges: Dict[int, Tuple] = {}
+
+        # Subscribers to every collected sample (e.g. the safety kernel)
+        self._sample_listeners: List[Callable] = []
+
         # Thresholds and limits
         self.thresholds = {
             "position_error_warning": 50,  # quarter-microseconds
@@ -225,38 +346,12 @@ class ServoMonitor:
             logger.error(f"Database initialization failed: {e}")
 
     def _initialize_servo_monitoring(self):
-        """Initialize monitoring for all detected servos"""
-        if not self.controller:
-            return
-
-        for channel in range(12):  # Standard 12-channel Maestro
-            # Initialize data structures
-            self.position_history[channel] = deque(maxlen=self.history_size)
-            self.performance_history[channel] = deque(maxlen=self.history_size)
-
-            # Initialize health tracking
-            self.servo_health[channel] = ServoHealth(
-                channel=channel,
-                overall_status=ServoHealthStatus.UNKNOWN,
-                position_accuracy=0.0,
-                response_consistency=0.0,
-                movement_smoothness=0.0,
-                estimated_wear=0.0,
-                maintenance_score=1.0,
-                last_calibration=time.time(),
-                operating_hours=0.0,
-                cycle_count=0
-            )
-
-            # Initialize baseline
-            self.performance_baselines[channel] = PerformanceBaseline(
-                channel=channel,
-                baseline_accuracy=0.98,
-                baseline_response_time=50.0,
-                baseline_smoothness=0.9,
-                baseline_established=time.time(),
-                samples_count=0
-            )
+        """Initialize monitoring for all servo channels"""
+        for channel in range(self.channel_count):
+            self._channel_gauges[channel] = tuple(
+                gauge.labels(channel) for gauge in (
+                    self._position_error, self._accuracy, self._response_time,
+                    self._temperature, self._load))
 
     def _start_monitoring(self):
         """Start monitoring threads"""
@@ -286,12 +381,14 @@ class ServoMonitor:
             try:
                 start_time = time.time()
 
-                # Collect metrics for all servos
-                for channel in range(12):
-                    metrics = self._collect_servo_metrics(channel)
-                    if metrics:
-                        self.current_metrics[channel] = metrics
-                        self.position_history[channel].append((metrics.timestamp, metrics.position))
+                # Collect metrics for all servos in one vectorized pass
+                sample = self._collect_samples(start_time)
+                self.history.append(sample)
+                if self._sample_listeners:
+                    self._publish_sample(start_time, sample)
+                self._record_telemetry(sample)
+
+                self._cycle_time.observe(time.time() - start_time)
 
                 # Sleep until next collection
                 elapsed = time.time() - start_time
@@ -303,6 +400,40 @@ class ServoMonitor:
                 logger.error(f"Monitoring loop error: {e}")
                 time.sleep(1.0)
 
+    def add_sample_listener(self, listener: Callable):
+        """Receive each sample as listener({field: per-channel array}, timestamp)"""
+        self._sample_listeners.append(listener)
+
+    def _publish_sample(self, timestamp: float, sample: np.ndarray):
+        """Push one sample to subscribers as per-field channel arrays"""
+        fields = {name: sample[:, _H[name]] for name in TELEMETRY_METRIC_FIELDS}
+        for listener in self._sample_listeners:
+            try:
+                listener(fields, timestamp)
+            except Exception as e:
+                logger.error(f"Sample listener error: {e}")
+
+    def _record_telemetry(self, sample: np.ndarray):
+        """Append one (channels x fields) sample to the telemetry store"""
+        values = np.full((len(self.telemetry.fields), self.channel_count), np.nan)
+        values[:len(TELEMETRY_METRIC_FIELDS)] = sample[:, 1:].T
+        # Stamped by the store like the analysis thread's health rows, so the
+        # two writers never hand the store out-of-order timestamps
+        self.telemetry.append(None, values)
+
+    def _publish_metrics(self, latest: np.ndarray):
+        """Publish the latest sample of every channel to the registry"""
+        for channel, gauges in self._channel_gauges.items():
+            row = latest[channel]
+            if np.isnan(row[_H['timestamp']]):
+                continue
+            position_error, accuracy, response_time, temperature, load = gauges
+            position_error.set(row[_H['position_error']])
+            accuracy.set(row[_H['accuracy']])
+            response_time.set(row[_H['response_time']] / 1000.0)
+            temperature.set(row[_H['temperature']])
+            load.set(row[_H['load']])
+
     def _analysis_loop(self):
         """Analysis loop - lower frequency comprehensive analysis"""
         interval = 1.0 / self.analysis_frequency
@@ -327,319 +458,242 @@ class ServoMonitor:
                 logger.error(f"Analysis loop error: {e}")
                 time.sleep(5.0)
 
-    def _collect_servo_metrics(self, channel: int) -> Optional[ServoMetrics]:
-        """Collect real-time metrics for a servo"""
+    def _collect_samples(self, timestamp: float) -> np.ndarray:
+        """Collect one (channels x fields) sample for all servos"""
         if not self.controller or self.controller.simulation_mode:
             # Generate simulated metrics for demo
-            return self._generate_simulated_metrics(channel)
-
-        try:
-            timestamp = time.time()
-
-            # Get current position
-            current_position = self.controller._get_servo_position(channel)
-            if current_position is None:
-                return None
-
-            # Get target position from controller status
-            status = self.controller.servo_status.get(channel)
-            target_position = status.target if status else current_position
-
-            # Calculate derived metrics
-            position_error = abs(current_position - target_position)
-
-            # Estimate speed from position history
-            speed = self._calculate_servo_speed(channel, timestamp, current_position)
-
-            # Estimate other metrics (in real system, these would come from sensors)
-            load_estimate = self._estimate_servo_load(channel, position_error, speed)
-            temperature_estimate = self._estimate_temperature(channel, load_estimate)
-            voltage = 6.0  # Nominal 6V supply
-            current_estimate = self._estimate_current(channel, load_estimate, speed)
+            return self._generate_simulated_samples(timestamp)
 
-            # Calculate performance metrics
-            movement_smoothness = self._calculate_smoothness(channel)
-            response_time = self._calculate_response_time(channel)
-            accuracy = self._calculate_accuracy(channel, position_error)
+        positions = np.full(self.channel_count, np.nan)
+        targets = np.full(self.channel_count, np.nan)
 
-            return ServoMetrics(
-                channel=channel,
-                timestamp=timestamp,
-                position=current_position,
-                target_position=target_position,
-                position_error=position_error,
-                speed=speed,
-                load=load_estimate,
-                temperature=temperature_estimate,
-                voltage=voltage,
-                current=current_estimate,
-                movement_smoothness=movement_smoothness,
-                response_time=response_time,
-                accuracy=accuracy
-            )
-
-        except Exception as e:
-            logger.debug(f"Failed to collect metrics for servo {channel}: {e}")
-            return None
+        # Serial reads are inherently per channel; everything derived is vectorized
+        for channel in range(self.channel_count):
+            try:
+                current_position = self.controller._get_servo_position(channel)
+                if current_position is None:
+                    continue
+                status = self.controller.servo_status.get(channel)
+                positions[channel] = current_position
+                targets[channel] = status.target if status else current_position
+            except Exception as e:
+                logger.debug(f"Failed to collect metrics for servo {channel}: {e}")
+
+        position_error = np.abs(positions - targets)
+        speed = self._calculate_servo_speed()
+
+        # Estimate other metrics (in real system, these would come from sensors)
+        load = (np.minimum(1.0, position_error / 200.0) + np.minimum(1.0, speed / 1000.0)) / 2.0
+        temperature = 25.0 + load * 20.0  # Up to 20°C over ambient under full load
+        current = 0.05 + load * 0.8 + np.minimum(0.2, speed / 1000.0 * 0.2)
+
+        return self._assemble_sample(
+            timestamp, positions, targets, position_error, speed, load, temperature,
+            current,
+            smoothness=self._calculate_smoothness(),
+            response_time=self._calculate_response_time(),
+            accuracy=self._calculate_accuracy(position_error)
+        )
 
-    def _generate_simulated_metrics(self, channel: int) -> ServoMetrics:
+    def _generate_simulated_samples(self, timestamp: float) -> np.ndarray:
         """Generate simulated metrics for demonstration"""
-        timestamp = time.time()
+        channels = np.arange(self.channel_count)
 
         # Simulate realistic servo behavior
         base_position = 6000  # Home position
-        position_variation = int(200 * np.sin(timestamp * 0.5 + channel))
-        current_position = base_position + position_variation
-        target_position = base_position + int(150 * np.sin(timestamp * 0.3 + channel))
-
-        position_error = abs(current_position - target_position)
-        speed = abs(position_variation * 2)  # Rough speed estimate
-        load_estimate = min(1.0, position_error / 100.0)
-        temperature_estimate = 25.0 + load_estimate * 15.0  # 25-40°C range
-        current_estimate = 0.1 + load_estimate * 0.4  # 0.1-0.5A range
-
-        return ServoMetrics(
-            channel=channel,
-            timestamp=timestamp,
-            position=current_position,
-            target_position=target_position,
-            position_error=position_error,
-            speed=speed,
-            load=load_estimate,
-            temperature=temperature_estimate,
-            voltage=6.0,
-            current=current_estimate,
-            movement_smoothness=0.9 - np.random.random() * 0.2,
-            response_time=30 + np.random.random() * 20,
-            accuracy=0.95 + np.random.random() * 0.04
+        position_variation = (200 * np.sin(timestamp * 0.5 + channels)).astype(int)
+        positions = (base_position + position_variation).astype(float)
+        targets = (base_position + (150 * np.sin(timestamp * 0.3 + channels)).astype(int)).astype(float)
+
+        position_error = np.abs(positions - targets)
+        load = np.minimum(1.0, position_error / 100.0)
+        n = self.channel_count
+
+        return self._assemble_sample(
+            timestamp, positions, targets, position_error,
+            speed=np.abs(position_variation * 2.0),
+            load=load,
+            temperature=25.0 + load * 15.0,  # 25-40°C range
+            current=0.1 + load * 0.4,  # 0.1-0.5A range
+            smoothness=0.9 - self._rng.random(n) * 0.2,
+            response_time=30 + self._rng.random(n) * 20,
+            accuracy=0.95 + self._rng.random(n) * 0.04
         )
 
-    def _calculate_servo_speed(self, channel: int, timestamp: float, position: int) -> float:
-        """Calculate servo speed from position history"""
-        history = self.position_history.get(channel, deque())
-
-        if len(history) < 2:
-            return 0.0
-
-        # Get recent positions for speed calculation
-        recent_points = list(history)[-5:]  # Last 5 points
-
-        if len(recent_points) < 2:
-            return 0.0
-
-        # Calculate average speed over recent interval
-        time_diff = recent_points[-1][0] - recent_points[0][0]
-        position_diff = abs(recent_points[-1][1] - recent_points[0][1])
-
-        if time_diff > 0:
-            return position_diff / time_diff
-        return 0.0
-
-    def _estimate_servo_load(self, channel: int, position_error: int, speed: float) -> float:
-        """Estimate servo load based on error and speed"""
-        # Simple load estimation algorithm
-        error_load = min(1.0, position_error / 200.0)
-        speed_load = min(1.0, speed / 1000.0)
-        return (error_load + speed_load) / 2.0
-
-    def _estimate_temperature(self, channel: int, load: float) -> float:
-        """Estimate servo temperature based on load"""
-        ambient_temp = 25.0  # °C
-        load_heating = load * 20.0  # Up to 20°C increase under full load
-        return ambient_temp + load_heating
-
-    def _estimate_current(self, channel: int, load: float, speed: float) -> float:
-        """Estimate current draw based on load and speed"""
-        idle_current = 0.05  # 50mA idle
-        load_current = load * 0.8  # Up to 800mA under load
-        speed_current = min(0.2, speed / 1000.0 * 0.2)  # Speed component
-        return idle_current + load_current + speed_current
-
-    def _calculate_smoothness(self, channel: int) -> float:
-        """Calculate movement smoothness from position history"""
-        history = self.position_history.get(channel, deque())
-
-        if len(history) < 10:
-            return 1.0
-
-        # Calculate position derivatives to assess smoothness
-        positions = [point[1] for point in list(history)[-20:]]
-
-        if len(positions) < 3:
-            return 1.0
-
-        # Calculate second derivative (acceleration) variation
-        first_derivatives = np.diff(positions)
-        second_derivatives = np.diff(first_derivatives)
-
-        if len(second_derivatives) == 0:
-            return 1.0
-
-        # Smoothness is inverse of acceleration variance
-        acceleration_variance = np.var(second_derivatives)
+    def _assemble_sample(self, timestamp, positions, targets, position_error, speed, load,
+                         temperature, current, smoothness, response_time, accuracy) -> np.ndarray:
+        """Stack per-channel vectors into a (channels x fields) sample"""
+        sample = np.empty((self.channel_count, len(HISTORY_FIELDS)))
+        sample[:, _H['timestamp']] = timestamp
+        sample[:, _H['position']] = positions
+        sample[:, _H['target_position']] = targets
+        sample[:, _H['position_error']] = position_error
+        sample[:, _H['speed']] = speed
+        sample[:, _H['load']] = load
+        sample[:, _H['temperature']] = temperature
+        sample[:, _H['voltage']] = 6.0  # Nominal 6V supply
+        sample[:, _H['current']] = current
+        sample[:, _H['movement_smoothness']] = smoothness
+        sample[:, _H['response_time']] = response_time
+        sample[:, _H['accuracy']] = accuracy
+
+        # Channels without a reading are missing entirely
+        sample[np.isnan(positions)] = np.nan
+        return sample
+
+    def _calculate_servo_speed(self) -> np.ndarray:
+        """Calculate servo speeds from the last 5 samples of every channel"""
+        recent = self.history.window(5)
+        if recent.shape[1] < 2:
+            return np.zeros(self.channel_count)
+
+        time_diff = recent[:, -1, _H['timestamp']] - recent[:, 0, _H['timestamp']]
+        position_diff = np.abs(recent[:, -1, _H['position']] - recent[:, 0, _H['position']])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            speed = np.where(time_diff > 0, position_diff / time_diff, 0.0)
+        return np.nan_to_num(speed)
+
+    def _calculate_smoothness(self) -> np.ndarray:
+        """Calculate movement smoothness from the last 20 positions of every channel"""
+        positions = self.history.window(20, 'position')
+        if positions.shape[1] < 10:
+            return np.ones(self.channel_count)
+
+        # Smoothness is inverse of acceleration (second derivative) variance
+        second_derivatives = np.diff(positions, n=2, axis=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            acceleration_variance = np.nanvar(second_derivatives, axis=1)
         smoothness = 1.0 / (1.0 + acceleration_variance / 100.0)
+        return np.clip(np.nan_to_num(smoothness, nan=1.0), 0.0, 1.0)
 
-        return max(0.0, min(1.0, smoothness))
-
-    def _calculate_response_time(self, channel: int) -> float:
+    def _calculate_response_time(self) -> np.ndarray:
         """Calculate average response time for servo movements"""
         # This would track time between command and reaching target
         # For now, return a baseline with some variation
         baseline = 50.0  # milliseconds
-        variation = np.random.normal(0, 10)
-        return max(10.0, baseline + variation)
+        variation = self._rng.normal(0, 10, self.channel_count)
+        return np.maximum(10.0, baseline + variation)
 
-    def _calculate_accuracy(self, channel: int, position_error: int) -> float:
-        """Calculate position accuracy percentage"""
+    def _calculate_accuracy(self, position_error: np.ndarray) -> np.ndarray:
+        """Calculate position accuracy (0-1) from position errors"""
         max_error = 200  # quarter-microseconds
-        accuracy = 1.0 - (min(position_error, max_error) / max_error)
-        return max(0.0, min(1.0, accuracy))
+        accuracy = 1.0 - (np.minimum(position_error, max_error) / max_error)
+        return np.clip(accuracy, 0.0, 1.0)
 
     def _analyze_servo_performance(self):
-        """Analyze servo performance and update metrics"""
-        for channel, metrics in self.current_metrics.items():
-            # Store performance data
-            performance_data = {
-                "timestamp": metrics.timestamp,
-                "accuracy": metrics.accuracy,
-                "response_time": metrics.response_time,
-                "smoothness": metrics.movement_smoothness,
-                "load": metrics.load,
-                "temperature": metrics.temperature
-            }
-
-            self.performance_history[channel].append(performance_data)
-
-            # Update performance baselines if enough data
-            self._update_performance_baseline(channel)
-
-    def _update_performance_baseline(self, channel: int):
-        """Update performance baseline with recent data"""
-        history = self.performance_history.get(channel, deque())
-
-        if len(history) < 50:  # Need sufficient data
+        """Update baselines and baseline drift for all channels in one pass"""
+        window = self.history.window(self.history_size)
+        if window.shape[1] == 0:
             return
 
-        baseline = self.performance_baselines[channel]
-        recent_data = list(history)[-50:]  # Last 50 samples
+        # Columns match self._baseline: accuracy, response time, smoothness
+        series = window[:, :, [_H['accuracy'], _H['response_time'], _H['movement_smoothness']]]
+        samples = np.sum(~np.isnan(series[:, :, 0]), axis=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            means = np.nanmean(series, axis=1)
 
-        # Calculate running averages
-        accuracies = [d["accuracy"] for d in recent_data]
-        response_times = [d["response_time"] for d in recent_data]
-        smoothness_values = [d["smoothness"] for d in recent_data]
+        new_samples = min(self.history.total - self._analyzed_total, window.shape[1])
 
-        # Update baseline with exponential moving average
+        # Count direction reversals since the last analysis as movement cycles
+        if new_samples >= 3:
+            moves = np.sign(np.diff(window[:, -new_samples:, _H['position']], axis=1))
+            reversals = np.sum(moves[:, 1:] * moves[:, :-1] < 0, axis=1)
+            self._health[:, _HEALTH['cycle_count']] += reversals
+        self._analyzed_total = self.history.total
+
+        # Update baseline with exponential moving average once enough data exists
+        ready = samples >= 50
         alpha = 0.1  # Smoothing factor
-        baseline.baseline_accuracy = alpha * statistics.mean(accuracies) + (1 - alpha) * baseline.baseline_accuracy
-        baseline.baseline_response_time = alpha * statistics.mean(response_times) + (1 - alpha) * baseline.baseline_response_time
-        baseline.baseline_smoothness = alpha * statistics.mean(smoothness_values) + (1 - alpha) * baseline.baseline_smoothness
-        baseline.samples_count += len(recent_data)
+        self._baseline[ready] = alpha * means[ready] + (1 - alpha) * self._baseline[ready]
+        self._baseline_samples[ready] += new_samples
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self._baseline_drift = np.nan_to_num((means - self._baseline) / self._baseline)
 
     def _update_servo_health(self):
-        """Update servo health assessments"""
-        for channel, metrics in self.current_metrics.items():
-            health = self.servo_health[channel]
-            baseline = self.performance_baselines[channel]
-
-            # Calculate health scores
-            accuracy_score = metrics.accuracy / baseline.baseline_accuracy
-            response_score = baseline.baseline_response_time / max(1.0, metrics.response_time)
-            smoothness_score = metrics.movement_smoothness / baseline.baseline_smoothness
-
-            # Update health metrics
-            health.position_accuracy = accuracy_score
-            health.response_consistency = response_score
-            health.movement_smoothness = smoothness_score
-
-            # Estimate wear based on usage and performance degradation
-            performance_degradation = 1.0 - (accuracy_score + response_score + smoothness_score) / 3.0
-            health.estimated_wear = min(1.0, health.estimated_wear + performance_degradation * 0.001)
-
-            # Calculate overall maintenance score
-            health.maintenance_score = (accuracy_score + response_score + smoothness_score) / 3.0
-
-            # Update operating time
-            health.operating_hours += 1.0 / self.analysis_frequency / 3600.0  # Convert to hours
-
-            # Determine overall health status
-            if health.maintenance_score > 0.95:
-                health.overall_status = ServoHealthStatus.EXCELLENT
-            elif health.maintenance_score > 0.9:
-                health.overall_status = ServoHealthStatus.GOOD
-            elif health.maintenance_score > 0.8:
-                health.overall_status = ServoHealthStatus.FAIR
-            elif health.maintenance_score > 0.7:
-                health.overall_status = ServoHealthStatus.POOR
-            else:
-                health.overall_status = ServoHealthStatus.CRITICAL
+        """Update servo health assessments for all channels in one pass"""
+        latest = self.history.latest()
+        valid = ~np.isnan(latest[:, _H['timestamp']])
+        if not valid.any():
+            return
 
-    def _check_alerts(self):
-        """Check for alert conditions and generate alerts"""
-        current_time = time.time()
+        # Calculate health scores
+        accuracy_score = latest[:, _H['accuracy']] / self._baseline[:, 0]
+        response_score = self._baseline[:, 1] / np.maximum(1.0, latest[:, _H['response_time']])
+        smoothness_score = latest[:, _H['movement_smoothness']] / self._baseline[:, 2]
+        maintenance_score = (accuracy_score + response_score + smoothness_score) / 3.0
 
-        for channel, metrics in self.current_metrics.items():
-            # Check position error alerts
-            if metrics.position_error > self.thresholds["position_error_critical"]:
-                self._create_alert(
-                    AlertLevel.CRITICAL,
-                    "position_error",
-                    f"Servo {channel} critical position error: {metrics.position_error} quarter-microseconds",
-                    channel,
-                    metrics.position_error,
-                    self.thresholds["position_error_critical"]
-                )
-            elif metrics.position_error > self.thresholds["position_error_warning"]:
-                self._create_alert(
-                    AlertLevel.WARNING,
-                    "position_error",
-                    f"Servo {channel} position error warning: {metrics.position_error} quarter-microseconds",
-                    channel,
-                    metrics.position_error,
-                    self.thresholds["position_error_warning"]
-                )
+        health = self._health[valid]
+        health[:, _HEALTH['position_accuracy']] = accuracy_score[valid]
+        health[:, _HEALTH['response_consistency']] = response_score[valid]
+        health[:, _HEALTH['movement_smoothness']] = smoothness_score[valid]
 
-            # Check response time alerts
-            if metrics.response_time > self.thresholds["response_time_critical"]:
-                self._create_alert(
-                    AlertLevel.CRITICAL,
-                    "response_time",
-                    f"Servo {channel} critical response time: {metrics.response_time:.1f}ms",
-                    channel,
-                    metrics.response_time,
-                    self.thresholds["response_time_critical"]
-                )
+        # Estimate wear based on usage and performance degradation
+        wear = health[:, _HEALTH['estimated_wear']] + (1.0 - maintenance_score[valid]) * 0.001
+        health[:, _HEALTH['estimated_wear']] = np.clip(wear, 0.0, 1.0)
+        health[:, _HEALTH['maintenance_score']] = maintenance_score[valid]
 
-            # Check accuracy alerts
-            if metrics.accuracy < self.thresholds["accuracy_critical"]:
-                self._create_alert(
-                    AlertLevel.CRITICAL,
-                    "accuracy",
-                    f"Servo {channel} critical accuracy: {metrics.accuracy:.2%}",
-                    channel,
-                    metrics.accuracy,
-                    self.thresholds["accuracy_critical"]
-                )
+        # Update operating time
+        health[:, _HEALTH['operating_hours']] += 1.0 / self.analysis_frequency / 3600.0
+        self._health[valid] = health
 
-            # Check smoothness alerts
-            if metrics.movement_smoothness < self.thresholds["smoothness_critical"]:
-                self._create_alert(
-                    AlertLevel.WARNING,
-                    "smoothness",
-                    f"Servo {channel} poor movement smoothness: {metrics.movement_smoothness:.2f}",
-                    channel,
-                    metrics.movement_smoothness,
-                    self.thresholds["smoothness_critical"]
-                )
+        # Determine overall health status (index into HEALTH_STATUS_ORDER)
+        score = self._health[:, _HEALTH['maintenance_score']]
+        status = np.select([score > 0.95, score > 0.9, score > 0.8, score > 0.7], [0, 1, 2, 3], 4)
+        self._health_status[valid] = status[valid]
+
+        self._publish_metrics(latest)
 
-            # Check temperature alerts
-            if metrics.temperature > 60.0:  # 60°C critical temperature
+    def _check_alerts(self):
+        """Check for alert conditions and generate alerts"""
+        latest = self.history.latest()
+        valid = ~np.isnan(latest[:, _H['timestamp']])
+        position_error = latest[:, _H['position_error']]
+        response_time = latest[:, _H['response_time']]
+        accuracy = latest[:, _H['accuracy']]
+        smoothness = latest[:, _H['movement_smoothness']]
+        temperature = latest[:, _H['temperature']]
+
+        with np.errstate(invalid='ignore'):
+            error_critical = position_error > self.thresholds["position_error_critical"]
+            checks = [
+                (AlertLevel.CRITICAL, "position_error", error_critical, position_error,
+                 self.thresholds["position_error_critical"],
+                 "Servo {channel} critical position error: {value:.0f} quarter-microseconds"),
+                (AlertLevel.WARNING, "position_error",
+                 ~error_critical & (position_error > self.thresholds["position_error_warning"]),
+                 position_error, self.thresholds["position_error_warning"],
+                 "Servo {channel} position error warning: {value:.0f} quarter-microseconds"),
+                (AlertLevel.CRITICAL, "response_time",
+                 response_time > self.thresholds["response_time_critical"], response_time,
+                 self.thresholds["response_time_critical"],
+                 "Servo {channel} critical response time: {value:.1f}ms"),
+                (AlertLevel.CRITICAL, "accuracy",
+                 accuracy < self.thresholds["accuracy_critical"], accuracy,
+                 self.thresholds["accuracy_critical"],
+                 "Servo {channel} critical accuracy: {value:.2%}"),
+                (AlertLevel.WARNING, "smoothness",
+                 smoothness < self.thresholds["smoothness_critical"], smoothness,
+                 self.thresholds["smoothness_critical"],
+                 "Servo {channel} poor movement smoothness: {value:.2f}"),
+                (AlertLevel.CRITICAL, "temperature",
+                 temperature > 60.0, temperature, 60.0,  # 60°C critical temperature
+                 "Servo {channel} overheating: {value:.1f}°C")
+            ]
+
+        # Only violating channels reach the (scalar) alert path
+        for level, category, mask, values, threshold, message in checks:
+            for channel in np.flatnonzero(mask & valid):
+                value = float(values[channel])
                 self._create_alert(
-                    AlertLevel.CRITICAL,
-                    "temperature",
-                    f"Servo {channel} overheating: {metrics.temperature:.1f}°C",
-                    channel,
-                    metrics.temperature,
-                    60.0
+                    level,
+                    category,
+                    message.format(channel=channel, value=value),
+                    int(channel),
+                    value,
+                    threshold
                 )
 
         # Clean up old alerts
@@ -668,6 +722,7 @@ class ServoMonitor:
         )
 
         self.active_alerts.append(alert)
+        self._alerts.labels(level.value).inc()
 
         # Log the alert
         log_level = {
@@ -690,57 +745,39 @@ class ServoMonitor:
         ]
 
     def _store_historical_data(self):
-        """Store data to database periodically"""
+        """Record health scores, persist telemetry chunks and store new alerts"""
+        try:
+            health_values = np.full((len(self.telemetry.fields), self.channel_count), np.nan)
+            offset = len(TELEMETRY_METRIC_FIELDS)
+            for i, name in enumerate(TELEMETRY_HEALTH_FIELDS):
+                health_values[offset + i] = self._health[:, _HEALTH[name]]
+            self.telemetry.append(None, health_values)
+
+            # Writes sealed chunks and applies retention; cheap when idle
+            self.telemetry.maintain()
+        except Exception as e:
+            logger.error(f"Failed to store telemetry: {e}")
+
+        new_alerts = [alert for alert in self.active_alerts if not hasattr(alert, '_stored')]
+        if not new_alerts:
+            return
+
         try:
             conn = sqlite3.connect(self.database_path)
             cursor = conn.cursor()
 
-            # Store metrics
-            for channel, metrics in self.current_metrics.items():
+            for alert in new_alerts:
                 cursor.execute('''
-                    INSERT INTO servo_metrics (
-                        channel, timestamp, position, target_position, position_error,
-                        speed, load_estimate, temperature_estimate, voltage,
-                        current_estimate, movement_smoothness, response_time, accuracy
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    INSERT INTO system_alerts (
+                        timestamp, level, category, message, servo_channel,
+                        metric_value, threshold, auto_resolved
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
-                    metrics.channel, metrics.timestamp, metrics.position,
-                    metrics.target_position, metrics.position_error, metrics.speed,
-                    metrics.load, metrics.temperature, metrics.voltage,
-                    metrics.current, metrics.movement_smoothness,
-                    metrics.response_time, metrics.accuracy
+                    alert.timestamp, alert.level.value, alert.category,
+                    alert.message, alert.servo_channel, alert.metric_value,
+                    alert.threshold, int(alert.auto_resolved)
                 ))
-
-            # Store health data
-            for channel, health in self.servo_health.items():
-                cursor.execute('''
-                    INSERT INTO servo_health (
-                        channel, timestamp, overall_status, position_accuracy,
-                        response_consistency, movement_smoothness, estimated_wear,
-                        maintenance_score, operating_hours, cycle_count
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    health.channel, time.time(), health.overall_status.value,
-                    health.position_accuracy, health.response_consistency,
-                    health.movement_smoothness, health.estimated_wear,
-                    health.maintenance_score, health.operating_hours,
-                    health.cycle_count
-                ))
-
-            # Store alerts
-            for alert in self.active_alerts:
-                if not hasattr(alert, '_stored'):
-                    cursor.execute('''
-                        INSERT INTO system_alerts (
-                            timestamp, level, category, message, servo_channel,
-                            metric_value, threshold, auto_resolved
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        alert.timestamp, alert.level.value, alert.category,
-                        alert.message, alert.servo_channel, alert.metric_value,
-                        alert.threshold, int(alert.auto_resolved)
-                    ))
-                    alert._stored = True
+                alert._stored = True
 
             conn.commit()
             conn.close()
@@ -748,15 +785,75 @@ class ServoMonitor:
         except Exception as e:
             logger.error(f"Failed to store historical data: {e}")
 
+    # Dataclass views over the arrays (built on demand)
+
+    @property
+    def current_metrics(self) -> Dict[int, ServoMetrics]:
+        """Latest ServoMetrics per channel with data"""
+        latest = self.history.latest()
+        metrics = {}
+        for channel in np.flatnonzero(~np.isnan(latest[:, _H['timestamp']])):
+            row = latest[channel]
+            metrics[int(channel)] = ServoMetrics(
+                channel=int(channel),
+                timestamp=float(row[_H['timestamp']]),
+                position=int(row[_H['position']]),
+                target_position=int(row[_H['target_position']]),
+                position_error=int(row[_H['position_error']]),
+                speed=float(row[_H['speed']]),
+                load=float(row[_H['load']]),
+                temperature=float(row[_H['temperature']]),
+                voltage=float(row[_H['voltage']]),
+                current=float(row[_H['current']]),
+                movement_smoothness=float(row[_H['movement_smoothness']]),
+                response_time=float(row[_H['response_time']]),
+                accuracy=float(row[_H['accuracy']])
+            )
+        return metrics
+
+    @property
+    def servo_health(self) -> Dict[int, ServoHealth]:
+        """Health assessment per channel"""
+        return {
+            channel: ServoHealth(
+                channel=channel,
+                overall_status=HEALTH_STATUS_ORDER[self._health_status[channel]],
+                position_accuracy=float(health[_HEALTH['position_accuracy']]),
+                response_consistency=float(health[_HEALTH['response_consistency']]),
+                movement_smoothness=float(health[_HEALTH['movement_smoothness']]),
+                estimated_wear=float(health[_HEALTH['estimated_wear']]),
+                maintenance_score=float(health[_HEALTH['maintenance_score']]),
+                last_calibration=float(self._last_calibration[channel]),
+                operating_hours=float(health[_HEALTH['operating_hours']]),
+                cycle_count=int(health[_HEALTH['cycle_count']])
+            )
+            for channel, health in enumerate(self._health)
+        }
+
+    @property
+    def performance_baselines(self) -> Dict[int, PerformanceBaseline]:
+        """Performance baseline per channel"""
+        return {
+            channel: PerformanceBaseline(
+                channel=channel,
+                baseline_accuracy=float(baseline[0]),
+                baseline_response_time=float(baseline[1]),
+                baseline_smoothness=float(baseline[2]),
+                baseline_established=float(self._baseline_established[channel]),
+                samples_count=int(self._baseline_samples[channel])
+            )
+            for channel, baseline in enumerate(self._baseline)
+        }
+
     # Public API Methods
 
     def get_current_metrics(self) -> Dict[int, ServoMetrics]:
         """Get current servo metrics"""
-        return self.current_metrics.copy()
+        return self.current_metrics
 
     def get_servo_health(self) -> Dict[int, ServoHealth]:
         """Get servo health assessments"""
-        return self.servo_health.copy()
+        return self.servo_health
 
     def get_active_alerts(self) -> List[SystemAlert]:
         """Get current active alerts"""
@@ -764,16 +861,15 @@ class ServoMonitor:
 
     def get_performance_summary(self) -> Dict:
         """Get overall system performance summary"""
-        if not self.current_metrics:
+        latest = self.history.latest()
+        valid = ~np.isnan(latest[:, _H['timestamp']])
+        if not valid.any():
             return {"status": "no_data"}
 
-        total_servos = len(self.current_metrics)
-        healthy_servos = sum(1 for h in self.servo_health.values()
-                           if h.overall_status in [ServoHealthStatus.EXCELLENT, ServoHealthStatus.GOOD])
-
-        avg_accuracy = statistics.mean(m.accuracy for m in self.current_metrics.values())
-        avg_response_time = statistics.mean(m.response_time for m in self.current_metrics.values())
-        avg_smoothness = statistics.mean(m.movement_smoothness for m in self.current_metrics.values())
+        total_servos = int(valid.sum())
+        healthy_servos = int(np.sum(valid & (self._health_status <= 1)))  # EXCELLENT or GOOD
+        avg_accuracy, avg_response_time, avg_smoothness = np.mean(
+            latest[valid][:, [_H['accuracy'], _H['response_time'], _H['movement_smoothness']]], axis=0)
 
         critical_alerts = len([a for a in self.active_alerts if a.level == AlertLevel.CRITICAL])
         warning_alerts = len([a for a in self.active_alerts if a.level == AlertLevel.WARNING])
@@ -782,14 +878,44 @@ class ServoMonitor:
             "status": "healthy" if healthy_servos == total_servos else "degraded",
             "total_servos": total_servos,
             "healthy_servos": healthy_servos,
-            "average_accuracy": avg_accuracy,
-            "average_response_time": avg_response_time,
-            "average_smoothness": avg_smoothness,
+            "average_accuracy": float(avg_accuracy),
+            "average_response_time": float(avg_response_time),
+            "average_smoothness": float(avg_smoothness),
             "critical_alerts": critical_alerts,
             "warning_alerts": warning_alerts,
             "uptime": time.time() - getattr(self, 'start_time', time.time())
         }
 
+    def get_telemetry(self, start: float, end: Optional[float] = None,
+                      fields: Optional[List[str]] = None,
+                      channels: Optional[List[int]] = None,
+                      max_points: int = 500, stats: Tuple[str, ...] = ('mean',)) -> Dict:
+        """
+        Query servo telemetry history for dashboards
+
+        The resolution (1s, 1m, 1h) is chosen so the result has at most
+        max_points rows; only the requested fields are read from disk.
+
+        Returns:
+            JSON-serializable dict with timestamps and per-field, per-stat
+            rows of channel values (None for missing samples)
+        """
+        end = time.time() if end is None else end
+        result = self.telemetry.query(start, end, fields=fields, channels=channels,
+                                      stats=stats, max_points=max_points)
+
+        def to_list(array):
+            values = np.round(array.astype(np.float64), 4)
+            return np.where(np.isnan(values), None, values).tolist()
+
+        return {
+            "resolution": result["resolution"],
+            "channels": result["channels"],
+            "timestamps": result["timestamps"].tolist(),
+            "data": {name: {stat: to_list(values) for stat, values in by_stat.items()}
+                     for name, by_stat in result["data"].items()}
+        }
+
     def generate_performance_report(self) -> Dict:
         """Generate comprehensive performance report"""
         report = {
@@ -798,7 +924,11 @@ class ServoMonitor:
             "servo_metrics": {ch: asdict(metrics) for ch, metrics in self.current_metrics.items()},
             "servo_health": {ch: asdict(health) for ch, health in self.servo_health.items()},
             "active_alerts": [asdict(alert) for alert in self.active_alerts],
-            "performance_baselines": {ch: asdict(baseline) for ch, baseline in self.performance_baselines.items()}
+            "performance_baselines": {ch: asdict(baseline) for ch, baseline in self.performance_baselines.items()},
+            "baseline_drift": {
+                ch: dict(zip(("accuracy", "response_time", "smoothness"), map(float, drift)))
+                for ch, drift in enumerate(self._baseline_drift)
+            }
         }
         return report
 
@@ -817,6 +947,7 @@ class ServoMonitor:
 
         # Store final data
         self._store_historical_data()
+        self.telemetry.flush(close_buckets=True)
 
         logger.info("✅ Servo monitoring system shutdown complete")
 
@@ -875,4 +1006,4 @@ def demo_servo_monitoring():
         controller.shutdown()
 
 if __name__ == "__main__":
-    demo_servo_monitoring()
\ No newline at end of file
+    demo_servo_monitoring()
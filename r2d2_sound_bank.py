@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+R2D2 Sound Bank
+===============
+
+Decoded-sample cache for the audio intelligence system.
+
+Playback used to construct pygame.mixer.Sound(path) on every reaction, so
+each sound was read and decoded from disk at the moment R2D2 was supposed
+to respond, and session durations were guessed at 2 seconds. The sound
+bank scans the sound directory once at startup, decodes every file to
+16-bit PCM in the mixer's format (sample rate and channel count), and
+records its real duration. Playback then hands an in-memory buffer to the
+mixer with no disk I/O.
+
+Canonical sounds (the ones the canonical sound enhancer maps) are pinned
+and always resident. Any other sound lives in a size-bounded LRU; an
+evicted sound keeps its duration and is decoded again on its next use.
+
+Decoders, tried in order for each file:
+- WAV: the standard library wave module (always available)
+- soundfile (libsndfile), when installed
+- pygame, when the mixer is initialized (MP3 and OGG)
+
+Features:
+- One decode per sound at startup, zero disk I/O at playback
+- Real per-sound durations (for session tracking and servo sync)
+- Pinned canonical sounds plus byte-bounded LRU for the rest
+- Resampling and channel conversion to the mixer format
+
+Usage:
+    bank = SoundBank("/home/rolo/r2ai/My R2/R2", sample_rate=22050, channels=2,
+                     pinned=sound_enhancer.canonical_mappings)
+    bank.scan()
+
+    sample = bank.get("R2D2_happy-1.mp3")
+    sound = pygame.mixer.Sound(buffer=sample.pcm)
+    duration = bank.duration("R2D2_happy-1.mp3")
+"""
+
+import logging
+import os
+import threading
+import time
+import wave
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+try:
+    import soundfile
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+try:
+    import pygame
+    PYGAME_AVAILABLE = True
+except ImportError:
+    PYGAME_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SOUND_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac')
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024      # Unpinned samples (about 6 minutes of 22kHz stereo)
+
+
+@dataclass
+class SoundSample:
+    """A decoded sound: int16 PCM frames x channels in the bank's format"""
+    name: str
+    pcm: np.ndarray
+    sample_rate: int
+    duration: float
+
+    @property
+    def nbytes(self) -> int:
+        return self.pcm.nbytes
+
+
+# ==========================================
+# DECODING
+# ==========================================
+
+def _decode_wav(path: str) -> Optional[tuple]:
+    with wave.open(path, 'rb') as wav:
+        width = wav.getsampwidth()
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    if width == 1:
+        data = (np.frombuffer(raw, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif width == 2:
+        data = np.frombuffer(raw, dtype='<i2')
+    elif width == 4:
+        data = (np.frombuffer(raw, dtype='<i4') >> 16).astype(np.int16)
+    else:
+        return None
+    return data.reshape(-1, channels), rate
+
+
+def _decode_soundfile(path: str) -> Optional[tuple]:
+    data, rate = soundfile.read(path, dtype='int16', always_2d=True)
+    return data, rate
+
+
+def _decode_pygame(path: str) -> Optional[tuple]:
+    init = pygame.mixer.get_init()
+    if init is None:
+        return None
+    rate, size, channels = init
+    raw = pygame.mixer.Sound(path).get_raw()
+    if abs(size) != 16:
+        return None
+    return np.frombuffer(raw, dtype=np.int16).reshape(-1, channels), rate
+
+
+def decode_file(path: str) -> Optional[tuple]:
+    """Decode an audio file to (int16 frames x channels, sample rate), or None"""
+    decoders = []
+    if path.lower().endswith('.wav'):
+        decoders.append(_decode_wav)
+    if SOUNDFILE_AVAILABLE:
+        decoders.append(_decode_soundfile)
+    if PYGAME_AVAILABLE:
+        decoders.append(_decode_pygame)
+
+    for decoder in decoders:
+        try:
+            result = decoder(path)
+            if result is not None:
+                return result
+        except Exception as e:
+            logger.debug(f"{decoder.__name__} could not decode {path}: {e}")
+    return None
+
+
+def convert_pcm(data: np.ndarray, rate: int, sample_rate: int, channels: int) -> np.ndarray:
+    """Convert int16 frames x channels to another rate (linear) and channel count"""
+    if data.shape[1] != channels:
+        if channels == 1:
+            data = data.mean(axis=1, keepdims=True).astype(np.int16)
+        else:
+            data = np.repeat(data[:, :1], channels, axis=1)
+    if rate != sample_rate and len(data):
+        frames = int(round(len(data) * sample_rate / rate))
+        source = np.arange(len(data)) / rate
+        target = np.arange(frames) / sample_rate
+        data = np.stack([np.interp(target, source, data[:, c]) for c in range(channels)], axis=1)
+        data = np.round(data).astype(np.int16)
+    return np.ascontiguousarray(data, dtype=np.int16)
+
+
+# ==========================================
+# SOUND BANK
+# ==========================================
+
+class SoundBank:
+    """Scans, decodes and caches the sound library in the mixer's format"""
+
+    def __init__(self, sound_directory: str, sample_rate: int = 22050, channels: int = 2,
+                 pinned: Optional[Iterable[str]] = None, max_cache_bytes: int = DEFAULT_CACHE_BYTES):
+        self.sound_directory = sound_directory
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.max_cache_bytes = max_cache_bytes
+        self.pinned_names = set(pinned or ())
+
+        self.paths: Dict[str, str] = {}
+        self.durations: Dict[str, float] = {}
+        self._pinned: Dict[str, SoundSample] = {}
+        self._cache: 'OrderedDict[str, SoundSample]' = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+
+        self.stats = {'decoded': 0, 'failed': 0, 'hits': 0, 'misses': 0, 'evictions': 0,
+                      'scan_seconds': 0.0}
+
+    def scan(self) -> int:
+        """Decode every sound in the directory once; returns the number of sounds"""
+        start = time.time()
+        try:
+            names = sorted(f for f in os.listdir(self.sound_directory)
+                           if f.lower().endswith(SOUND_EXTENSIONS))
+        except OSError as e:
+            logger.error(f"Cannot scan sound directory {self.sound_directory}: {e}")
+            return 0
+
+        for name in names:
+            self.paths[name] = os.path.join(self.sound_directory, name)
+            self._load(name)
+
+        self.stats['scan_seconds'] = time.time() - start
+        logger.info(f"Sound bank: {len(self.durations)} sounds decoded in {self.stats['scan_seconds']:.2f}s "
+                    f"({len(self._pinned)} pinned, {self.memory_bytes() / 1e6:.1f} MB)")
+        return len(self.durations)
+
+    def pin(self, names: Iterable[str]):
+        """Keep these sounds resident (loads them if already scanned)"""
+        for name in names:
+            self.pinned_names.add(name)
+            with self._lock:
+                sample = self._cache.pop(name, None)
+                if sample is not None:
+                    self._cache_bytes -= sample.nbytes
+                    self._pinned[name] = sample
+            if name in self.paths and name not in self._pinned:
+                self._load(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.durations
+
+    def get(self, name: str) -> Optional[SoundSample]:
+        """Decoded sample for a sound, decoding it again if it was evicted"""
+        sample = self._pinned.get(name)
+        if sample is not None:
+            self.stats['hits'] += 1
+            return sample
+        with self._lock:
+            sample = self._cache.get(name)
+            if sample is not None:
+                self._cache.move_to_end(name)
+                self.stats['hits'] += 1
+                return sample
+        if name not in self.paths:
+            return None
+        self.stats['misses'] += 1
+        return self._load(name)
+
+    def duration(self, name: str) -> Optional[float]:
+        """Real duration in seconds (known for every scanned sound)"""
+        return self.durations.get(name)
+
+    def memory_bytes(self) -> int:
+        return sum(s.nbytes for s in self._pinned.values()) + self._cache_bytes
+
+    def _load(self, name: str) -> Optional[SoundSample]:
+        decoded = decode_file(self.paths[name])
+        if decoded is None:
+            self.stats['failed'] += 1
+            logger.warning(f"Could not decode sound: {name}")
+            return None
+        data, rate = decoded
+        pcm = convert_pcm(data, rate, self.sample_rate, self.channels)
+        sample = SoundSample(name, pcm, self.sample_rate, len(pcm) / float(self.sample_rate))
+        self.durations[name] = sample.duration
+        self.stats['decoded'] += 1
+
+        if name in self.pinned_names:
+            self._pinned[name] = sample
+        else:
+            self._cache_put(sample)
+        return sample
+
+    def _cache_put(self, sample: SoundSample):
+        with self._lock:
+            previous = self._cache.pop(sample.name, None)
+            if previous is not None:
+                self._cache_bytes -= previous.nbytes
+            self._cache[sample.name] = sample
+            self._cache_bytes += sample.nbytes
+            while self._cache_bytes > self.max_cache_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted.nbytes
+                self.stats['evictions'] += 1
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'sounds': len(self.durations),
+            'pinned': len(self._pinned),
+            'cached': len(self._cache),
+            'memory_mb': self.memory_bytes() / 1e6,
+            'cache_limit_mb': self.max_cache_bytes / 1e6,
+            **self.stats
+        }
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+R2D2 Sound Feature Index
+========================
+
+Offline audio analysis of the sound library.
+
+The sound enhancer classifies clips by their filenames, the validator
+estimates durations from file sizes, and nothing knew how loud a clip is
+or where its chirps start. The indexer decodes every clip in the sound
+directory once and computes, with NumPy FFTs:
+
+- duration (seconds)
+- RMS loudness and peak level (dBFS)
+- spectral centroid (Hz, energy-weighted over STFT frames)
+- onset times (spectral-flux peaks, seconds)
+- a loudness normalization gain towards a common RMS target, limited so
+  the peak stays below full scale
+
+The features are stored in a compact NumPy archive (columns plus a flat
+onset array, no pickles) that loads in a few milliseconds. The archive
+lives in a cache directory (~/.cache/r2ai/sound_index, or the directory
+named by R2D2_SOUND_INDEX_CACHE), one per sound directory, so the asset
+directory is never written to. Files are tracked by size and modification
+time; updating the index re-analyzes only new or changed clips and drops
+deleted ones. Services open the index with background=True: the saved
+features are available at once and the analysis runs on a worker thread,
+off the startup path. Run time code (playback gains, servo sync timing,
+the validator's durations) queries the index; the sound bank still
+decodes every sound at startup.
+
+Features:
+- One-time decode and FFT analysis per clip
+- Precomputed loudness normalization gains
+- Onset times for audio-driven servo sync
+- Incremental updates keyed by file size and mtime
+- Millisecond load from a pickle-free .npz index
+- Background updates, index kept outside the asset directory
+
+Usage:
+    python3 r2d2_sound_index.py "/home/rolo/r2ai/My R2/R2"
+
+    index = SoundFeatureIndex.open("/home/rolo/r2ai/My R2/R2", background=True)
+    index.duration("R2D2_happy-1.mp3"), index.gain("R2D2_happy-1.mp3")
+    index.onsets("R2D2_happy-1.mp3")
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from r2d2_sound_bank import SOUND_EXTENSIONS, decode_file
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+CACHE_DIR_ENV = 'R2D2_SOUND_INDEX_CACHE'
+DEFAULT_CACHE_DIR = os.environ.get(CACHE_DIR_ENV) or os.path.expanduser("~/.cache/r2ai/sound_index")
+
+TARGET_RMS_DB = -20.0          # Normalization target (dBFS RMS)
+PEAK_CEILING_DB = -1.0         # Normalized peaks stay below this
+GAIN_LIMITS = (0.1, 4.0)
+
+FRAME_SIZE = 1024              # STFT window (samples)
+HOP_SIZE = 256
+ONSET_MIN_GAP = 0.05           # Seconds between onsets
+ONSET_THRESHOLD = 1.5          # Flux above median + threshold * MAD
+ONSET_RELATIVE = 0.1           # ... and above this fraction of the strongest onset
+SILENCE_DB = -90.0
+
+
+@dataclass
+class SoundFeatures:
+    """Analysis results for one clip"""
+    name: str
+    duration: float
+    rms_db: float
+    peak_db: float
+    centroid_hz: float
+    gain: float
+    onsets: List[float] = field(default_factory=list)
+    size: int = 0
+    mtime: float = 0.0
+
+
+# ==========================================
+# ANALYSIS
+# ==========================================
+
+def _db(value: float) -> float:
+    return 20.0 * np.log10(value) if value > 0 else SILENCE_DB
+
+
+def normalization_gain(rms_db: float, peak_db: float) -> float:
+    """Linear gain bringing the clip to TARGET_RMS_DB without pushing its peak past the ceiling"""
+    if rms_db <= SILENCE_DB:
+        return 1.0
+    gain_db = min(TARGET_RMS_DB - rms_db, PEAK_CEILING_DB - peak_db)
+    return float(np.clip(10.0 ** (gain_db / 20.0), *GAIN_LIMITS))
+
+
+def analyze_pcm(name: str, pcm: np.ndarray, sample_rate: int) -> SoundFeatures:
+    """Compute the features of int16 (frames x channels) PCM"""
+    mono = pcm.astype(np.float32).mean(axis=1) / 32768.0 if pcm.ndim == 2 else pcm.astype(np.float32) / 32768.0
+    duration = len(mono) / float(sample_rate)
+    rms_db = _db(float(np.sqrt(np.mean(np.square(mono))))) if len(mono) else SILENCE_DB
+    peak_db = _db(float(np.abs(mono).max())) if len(mono) else SILENCE_DB
+
+    centroid = 0.0
+    onsets: List[float] = []
+    if len(mono) >= FRAME_SIZE:
+        frames = np.lib.stride_tricks.sliding_window_view(mono, FRAME_SIZE)[::HOP_SIZE]
+        spectrum = np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE), axis=1))
+        frequencies = np.fft.rfftfreq(FRAME_SIZE, 1.0 / sample_rate)
+
+        # Energy-weighted mean of the per-frame (power spectrum) centroids
+        power = np.square(spectrum)
+        energy = power.sum(axis=1)
+        voiced = energy > 1e-9
+        if voiced.any():
+            per_frame = (power[voiced] @ frequencies) / energy[voiced]
+            centroid = float(np.average(per_frame, weights=energy[voiced]))
+
+        onsets = _onsets(spectrum, np.square(frames).sum(axis=1), sample_rate)
+
+    return SoundFeatures(name=name, duration=duration, rms_db=rms_db, peak_db=peak_db,
+                         centroid_hz=centroid, gain=normalization_gain(rms_db, peak_db), onsets=onsets)
+
+
+def _onsets(spectrum: np.ndarray, energy: np.ndarray, sample_rate: int) -> List[float]:
+    """Spectral-flux onset times: local flux peaks above an adaptive threshold"""
+    flux = np.maximum(np.diff(spectrum, axis=0), 0.0).sum(axis=1)
+    flux = np.concatenate(([spectrum[0].sum()], flux))              # The first frame can be an onset
+    rising = np.concatenate(([True], np.diff(energy) > 0))        # Splatter of a cut-off sound is not an onset
+    flux = np.where(rising, flux, 0.0)
+    median = np.median(flux)
+    threshold = max(median + ONSET_THRESHOLD * np.median(np.abs(flux - median)),
+                    ONSET_RELATIVE * flux.max()) + 1e-6
+
+    padded = np.concatenate(([-np.inf], flux, [-np.inf]))
+    peaks = np.flatnonzero((flux >= padded[:-2]) & (flux > padded[2:]) & (flux > threshold))
+    min_gap = int(ONSET_MIN_GAP * sample_rate / HOP_SIZE)
+    onsets, last = [], -min_gap - 1
+    for frame in peaks:
+        if frame - last > min_gap:
+            onsets.append(round((frame * HOP_SIZE + FRAME_SIZE // 2) / float(sample_rate), 4))  # Window centre
+            last = frame
+    return onsets
+
+
+def analyze_file(path: str) -> Optional[SoundFeatures]:
+    """Decode and analyze one file (None if it cannot be decoded)"""
+    decoded = decode_file(path)
+    if decoded is None:
+        return None
+    data, rate = decoded
+    features = analyze_pcm(os.path.basename(path), data, rate)
+    stat = os.stat(path)
+    features.size, features.mtime = stat.st_size, stat.st_mtime
+    return features
+
+
+# ==========================================
+# INDEX
+# ==========================================
+
+def default_index_path(sound_directory: str) -> str:
+    """Index file for a sound directory in the cache directory"""
+    key = hashlib.sha1(os.path.abspath(sound_directory).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DEFAULT_CACHE_DIR, f"sound_index_{key}.npz")
+
+
+class SoundFeatureIndex:
+    """Features of every clip in a sound directory, persisted as an .npz archive"""
+
+    def __init__(self, sound_directory: str, path: Optional[str] = None):
+        self.sound_directory = sound_directory
+        self.path = path or default_index_path(sound_directory)
+        self.features: Dict[str, SoundFeatures] = {}
+        self.stats = {'analyzed': 0, 'failed': 0, 'removed': 0, 'load_ms': 0.0, 'update_seconds': 0.0}
+        self._updater: Optional[threading.Thread] = None
+
+    @classmethod
+    def open(cls, sound_directory: str, path: Optional[str] = None, update: bool = True,
+             background: bool = False) -> 'SoundFeatureIndex':
+        """
+        Load the index, analyze new or changed clips and save it if anything changed
+
+        Args:
+            update: Analyze new or changed clips (otherwise only load)
+            background: Return after loading; the update runs on a worker thread
+                and its features replace the loaded ones when it finishes
+        """
+        index = cls(sound_directory, path)
+        index.load()
+        if update and background:
+            index.update_in_background()
+        elif update and index.update():
+            index.save()
+        return index
+
+    def update_in_background(self) -> threading.Thread:
+        """Run update() and save() on a worker thread (queries keep answering meanwhile)"""
+        def run():
+            if self.update():
+                self.save()
+
+        self._updater = threading.Thread(target=run, daemon=True, name="SoundIndexUpdate")
+        self._updater.start()
+        return self._updater
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a background update; True once none is running"""
+        if self._updater is not None:
+            self._updater.join(timeout)
+            return not self._updater.is_alive()
+        return True
+
+    # Queries
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.features
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def get(self, name: str) -> Optional[SoundFeatures]:
+        return self.features.get(name)
+
+    def duration(self, name: str) -> Optional[float]:
+        features = self.features.get(name)
+        return features.duration if features else None
+
+    def gain(self, name: str) -> float:
+        """Loudness normalization gain (1.0 for unknown clips)"""
+        features = self.features.get(name)
+        return features.gain if features else 1.0
+
+    def onsets(self, name: str) -> List[float]:
+        features = self.features.get(name)
+        return list(features.onsets) if features else []
+
+    # Maintenance
+
+    def update(self) -> bool:
+        """Analyze new or changed clips and drop deleted ones; True if the index changed"""
+        start = time.time()
+        try:
+            names = sorted(f for f in os.listdir(self.sound_directory) if f.lower().endswith(SOUND_EXTENSIONS))
+        except OSError as e:
+            logger.error(f"Cannot scan sound directory {self.sound_directory}: {e}")
+            return False
+
+        # Built aside and swapped in, so readers on other threads see one state or the other
+        features = dict(self.features)
+        changed = False
+        for name in set(features) - set(names):
+            del features[name]
+            self.stats['removed'] += 1
+            changed = True
+
+        for name in names:
+            path = os.path.join(self.sound_directory, name)
+            stat = os.stat(path)
+            known = features.get(name)
+            if known is not None and known.size == stat.st_size and known.mtime == stat.st_mtime:
+                continue
+            analyzed = analyze_file(path)
+            if analyzed is None:
+                self.stats['failed'] += 1
+                logger.warning(f"Could not analyze sound: {name}")
+                continue
+            features[name] = analyzed
+            self.stats['analyzed'] += 1
+            changed = True
+
+        self.features = features
+        self.stats['update_seconds'] = time.time() - start
+        if changed:
+            logger.info(f"Sound index: {self.stats['analyzed']} clips analyzed, {len(features)} indexed "
+                        f"in {self.stats['update_seconds']:.2f}s")
+        return changed
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """Write the index atomically"""
+        path = path or self.path
+        features = self.features
+        names = sorted(features)
+        rows = [features[name] for name in names]
+        onsets = [np.asarray(f.onsets, dtype=np.float32) for f in rows]
+        temp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    version=np.array(INDEX_VERSION),
+                    names=np.array(names, dtype=str),
+                    duration=np.array([r.duration for r in rows], dtype=np.float32),
+                    rms_db=np.array([r.rms_db for r in rows], dtype=np.float32),
+                    peak_db=np.array([r.peak_db for r in rows], dtype=np.float32),
+                    centroid_hz=np.array([r.centroid_hz for r in rows], dtype=np.float32),
+                    gain=np.array([r.gain for r in rows], dtype=np.float32),
+                    size=np.array([r.size for r in rows], dtype=np.int64),
+                    mtime=np.array([r.mtime for r in rows], dtype=np.float64),
+                    onset_counts=np.array([len(o) for o in onsets], dtype=np.int32),
+                    onsets=np.concatenate(onsets) if onsets else np.zeros(0, dtype=np.float32))
+            os.replace(temp_path, path)
+            return True
+        except OSError as e:
+            logger.warning(f"Could not save sound index {path}: {e}")
+            return False
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """Read the index (False if missing, unreadable or from another version)"""
+        path = path or self.path
+        start = time.perf_counter()
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['version']) != INDEX_VERSION:
+                    logger.info(f"Sound index {path} has an old version, rebuilding")
+                    return False
+                columns = {key: data[key].tolist() for key in
+                           ('names', 'duration', 'rms_db', 'peak_db', 'centroid_hz', 'gain', 'size', 'mtime')}
+                bounds = np.concatenate(([0], np.cumsum(data['onset_counts']))).tolist()
+                onsets = data['onsets'].tolist()
+        except (OSError, KeyError, ValueError) as e:
+            if os.path.exists(path):
+                logger.warning(f"Could not load sound index {path}: {e}")
+            return False
+
+        features = {}
+        for i, name in enumerate(columns['names']):
+            features[name] = SoundFeatures(
+                name=name, duration=columns['duration'][i], rms_db=columns['rms_db'][i],
+                peak_db=columns['peak_db'][i], centroid_hz=columns['centroid_hz'][i],
+                gain=columns['gain'][i], onsets=[round(t, 4) for t in onsets[bounds[i]:bounds[i + 1]]],
+                size=columns['size'][i], mtime=columns['mtime'][i])
+        self.features = features
+        self.stats['load_ms'] = (time.perf_counter() - start) * 1000.0
+        logger.info(f"Sound index loaded: {len(self.features)} clips in {self.stats['load_ms']:.1f}ms")
+        return True
+
+    def get_status(self) -> Dict[str, float]:
+        return {'clips': len(self.features), 'path': self.path,
+                'updating': self._updater is not None and self._updater.is_alive(), **self.stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the R2D2 sound feature index")
+    parser.add_argument('sound_directory', nargs='?', default="/home/rolo/r2ai/My R2/R2")
+    parser.add_argument('--index', default=None, help=f"Index path (default: in {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--rebuild', action='store_true', help="Analyze every clip again")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    index = SoundFeatureIndex(args.sound_directory, args.index)
+    if not args.rebuild:
+        index.load()
+    if index.update() or args.rebuild:
+        index.save()
+
+    print(f"{'clip':40s} {'dur s':>6s} {'rms dB':>7s} {'peak dB':>7s} {'centroid':>8s} {'gain':>5s} onsets")
+    for name in sorted(index.features):
+        f = index.features[name]
+        print(f"{name[:40]:40s} {f.duration:6.2f} {f.rms_db:7.1f} {f.peak_db:7.1f} "
+              f"{f.centroid_hz:8.0f} {f.gain:5.2f} {len(f.onsets)}")
+
+
+if __name__ == "__main__":
+    main()
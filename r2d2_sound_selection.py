@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+R2D2 Sound Selection Tables
+===========================
+
+Precomputed sound selection for the canonical sound enhancer.
+
+get_sound_for_context used to walk every sound of the context on each
+call, check its personality traits and stubborn / sarcasm factors, build
+a candidate list and pick from it. The filtering only depends on the
+request (context, personality filter, stubborn and sarcastic flags), so
+the selector keeps one table per distinct request: a Vose alias table
+over the matching sounds, weighted by each mapping's selection_weight.
+Sampling a table costs one random number and two list lookups, whatever
+the number of candidates, and builds nothing.
+
+The unfiltered tables for every context and flag combination are built
+at load; tables for personality filters are built on first use and kept.
+The tables are rebuilt lazily on the next request when sounds are added
+or removed, or after invalidate() when a mapping is edited in place.
+
+A small ring of recently played sounds keeps R2 from repeating a clip
+back to back: a draw that hits a recent sound is accepted only with
+probability `recent_acceptance`, otherwise it is drawn again (up to
+`max_redraws` times, after which it is accepted so selection stays O(1)).
+
+Features:
+- Weighted alias tables keyed by (context, personality filter, stubborn, sarcastic)
+- O(1) allocation-free sampling
+- Recency-penalty ring against back-to-back repeats
+- Lazy rebuild when the mappings change
+
+Usage:
+    selector = SoundSelector(enhancer.canonical_mappings)
+    filename = selector.select(R2D2EmotionalContext.HAPPY_EXCITED, allow_sarcastic=False)
+    filename = selector.select_matching(STUBBORN, R2D2EmotionalContext.FRUSTRATED_STUBBORN)
+    selector.invalidate()       # after editing a mapping in place
+"""
+
+import logging
+import random
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Filters of the enhancer's selection rules
+STUBBORN_EXCLUDE = 0.5      # allow_stubborn=False drops sounds above this stubborn factor
+SARCASM_EXCLUDE = 0.3       # allow_sarcastic=False drops sounds above this sarcasm factor
+STUBBORN = 'stubborn'       # Genuinely stubborn sounds (stubborn factor above 0.3)
+SARCASTIC = 'sarcastic'     # Sarcastic sounds (sarcasm factor above 0.2)
+
+MATCH_PREDICATES: Dict[str, Callable[[Any], bool]] = {
+    STUBBORN: lambda mapping: mapping.stubborn_factor > 0.3,
+    SARCASTIC: lambda mapping: mapping.sarcasm_factor > 0.2,
+}
+
+DEFAULT_RECENT = 3
+DEFAULT_RECENT_ACCEPTANCE = 0.15
+DEFAULT_MAX_REDRAWS = 4
+
+
+class AliasTable:
+    """Vose alias table: O(1) sampling from a fixed weighted set"""
+
+    __slots__ = ('items', 'prob', 'alias', 'n')
+
+    def __init__(self, items: Sequence[str], weights: Sequence[float]):
+        n = len(items)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("Alias table needs at least one positive weight")
+        self.items = list(items)
+        self.n = n
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in large + small:                  # Leftovers are 1 up to rounding
+            self.prob[i] = 1.0
+
+    def sample(self, draw: float) -> str:
+        """Item for a uniform draw in [0, 1)"""
+        u = draw * self.n
+        i = int(u)
+        return self.items[i] if u - i < self.prob[i] else self.items[self.alias[i]]
+
+    def probabilities(self) -> Dict[str, float]:
+        """Selection probability of each item (for reports and tests)"""
+        result = dict.fromkeys(self.items, 0.0)
+        for i in range(self.n):
+            result[self.items[i]] += self.prob[i] / self.n
+            result[self.items[self.alias[i]]] += (1.0 - self.prob[i]) / self.n
+        return result
+
+
+class RecencyRing:
+    """The last few selected sounds, with O(1) membership"""
+
+    __slots__ = ('slots', 'position', 'counts')
+
+    def __init__(self, size: int = DEFAULT_RECENT):
+        self.slots: List[Optional[str]] = [None] * max(1, size)
+        self.position = 0
+        self.counts: Dict[str, int] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.counts
+
+    def push(self, name: str):
+        old = self.slots[self.position]
+        if old is not None:
+            remaining = self.counts[old] - 1
+            if remaining:
+                self.counts[old] = remaining
+            else:
+                del self.counts[old]
+        self.slots[self.position] = name
+        self.counts[name] = self.counts.get(name, 0) + 1
+        self.position = (self.position + 1) % len(self.slots)
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+        self.position = 0
+        self.counts = {}
+
+
+class SoundSelector:
+    """Alias tables per selection request over the canonical sound mappings"""
+
+    def __init__(self, mappings: Mapping[str, Any], recent: int = DEFAULT_RECENT,
+                 recent_acceptance: float = DEFAULT_RECENT_ACCEPTANCE,
+                 max_redraws: int = DEFAULT_MAX_REDRAWS):
+        """
+        Args:
+            mappings: CanonicalSoundMapping by filename (emotional_context,
+                personality_traits, stubborn_factor, sarcasm_factor, selection_weight)
+            recent: Number of recent selections penalized
+            recent_acceptance: Probability of keeping a draw that hits a recent sound
+            max_redraws: Draws after the first before a recent sound is accepted
+        """
+        self.mappings = mappings
+        self.recent = RecencyRing(recent)
+        self.recent_acceptance = recent_acceptance
+        self.max_redraws = max_redraws
+
+        self._by_context: Dict[Any, List[str]] = {}
+        self._tables: Dict[Hashable, Optional[AliasTable]] = {}
+        self._size = -1
+
+        self.stats = {'selections': 0, 'redraws': 0, 'tables_built': 0, 'rebuilds': 0}
+        self.rebuild()
+
+    # Building
+
+    def rebuild(self):
+        """Regroup the mappings and precompute the unfiltered tables"""
+        self._by_context = {}
+        for filename, mapping in self.mappings.items():
+            self._by_context.setdefault(mapping.emotional_context, []).append(filename)
+        self._tables = {}
+        self._size = len(self.mappings)
+        self.stats['rebuilds'] += 1
+
+        for context in self._by_context:
+            for allow_stubborn in (True, False):
+                for allow_sarcastic in (True, False):
+                    self._table((context, None, allow_stubborn, allow_sarcastic))
+            for kind in MATCH_PREDICATES:
+                self._table((kind, context))
+        logger.debug(f"Sound selection tables built: {self._size} sounds, {len(self._tables)} tables")
+
+    def invalidate(self):
+        """Rebuild on the next request (after a mapping is edited in place)"""
+        self._size = -1
+
+    def _check_size(self):
+        if len(self.mappings) != self._size:
+            self.rebuild()
+
+    def _table(self, key: tuple) -> Optional[AliasTable]:
+        if key in self._tables:
+            return self._tables[key]
+        if key[0] in MATCH_PREDICATES:
+            predicate = MATCH_PREDICATES[key[0]]
+            candidates = [f for f in self._by_context.get(key[1], ()) if predicate(self.mappings[f])]
+        else:
+            candidates = self._filter(*key)
+        weights = [getattr(self.mappings[f], 'selection_weight', 1.0) for f in candidates]
+        table = AliasTable(candidates, weights) if candidates and sum(weights) > 0 else None
+        self._tables[key] = table
+        self.stats['tables_built'] += 1
+        return table
+
+    def _filter(self, context, personality_filter: Optional[frozenset],
+                allow_stubborn: bool, allow_sarcastic: bool) -> List[str]:
+        candidates = []
+        for filename in self._by_context.get(context, ()):
+            mapping = self.mappings[filename]
+            if personality_filter and not personality_filter.intersection(mapping.personality_traits):
+                continue
+            if not allow_stubborn and mapping.stubborn_factor > STUBBORN_EXCLUDE:
+                continue
+            if not allow_sarcastic and mapping.sarcasm_factor > SARCASM_EXCLUDE:
+                continue
+            candidates.append(filename)
+        return candidates
+
+    # Selection
+
+    def select(self, context, personality_filter: Optional[Iterable[str]] = None,
+               allow_stubborn: bool = True, allow_sarcastic: bool = True) -> Optional[str]:
+        """Sound for a context under the enhancer's filters, or None if nothing matches"""
+        self._check_size()
+        traits = frozenset(personality_filter) if personality_filter else None
+        return self._draw(self._table((context, traits, allow_stubborn, allow_sarcastic)))
+
+    def select_matching(self, kind: str, context) -> Optional[str]:
+        """Sound of a context matching a predefined predicate (STUBBORN, SARCASTIC)"""
+        self._check_size()
+        return self._draw(self._table((kind, context)))
+
+    def candidates(self, context, personality_filter: Optional[Iterable[str]] = None,
+                   allow_stubborn: bool = True, allow_sarcastic: bool = True) -> Dict[str, float]:
+        """Selection probabilities of a request (before the recency penalty)"""
+        self._check_size()
+        traits = frozenset(personality_filter) if personality_filter else None
+        table = self._table((context, traits, allow_stubborn, allow_sarcastic))
+        return table.probabilities() if table else {}
+
+    def _draw(self, table: Optional[AliasTable]) -> Optional[str]:
+        if table is None:
+            return None
+        choice = table.sample(random.random())
+        if table.n > 1:
+            redraws = 0
+            while (choice in self.recent and redraws < self.max_redraws and
+                   random.random() >= self.recent_acceptance):
+                choice = table.sample(random.random())
+                redraws += 1
+            self.stats['redraws'] += redraws
+        self.recent.push(choice)
+        self.stats['selections'] += 1
+        return choice
+
+    def get_status(self) -> Dict[str, Any]:
+        return {'sounds': self._size, 'contexts': len(self._by_context),
+                'tables': len(self._tables), **self.stats}
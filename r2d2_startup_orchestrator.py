@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+R2D2 Startup Orchestrator
+=========================
+
+Dependency-graph startup for the R2D2 services.
+
+The services initialized their components one after another: serial
+auto-detection of the Maestro, then the choreographer, the sound bank and
+mixer, environmental awareness and the behavior engine (or the YOLO load
+before opening the camera), although most of these do not depend on each
+other. Time from power-on to the first reaction is the sum of all of
+them. A StartupOrchestrator takes the components with their declared
+dependencies and starts each one as soon as its dependencies are ready:
+blocking initializers run on worker threads, coroutine initializers on
+the event loop. Components that share a device (two serial probes of the
+same ports) are kept apart by declaring a dependency between them.
+
+After the run it logs a per-component timeline (start and end offsets,
+durations), the critical path, and the wall time against the sequential
+sum.
+
+Features:
+- Declared dependencies with unknown-name and cycle checks
+- Concurrent initialization of independent components (threads and coroutines)
+- Failed components skip their dependents, optional components may fail
+- Per-component startup timeline and critical path
+- Synchronous entry point for constructors (run_sync)
+
+Usage:
+    startup = StartupOrchestrator('integration_server')
+    startup.add('servo_controller', lambda: EnhancedMaestroController(auto_detect=True))
+    startup.add('choreographer', init_choreographer, depends_on=['servo_controller'])
+    startup.add('audio', load_sound_bank)
+    results = await startup.run()          # Raises StartupError if a required component failed
+    print(startup.get_status()['critical_path'])
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupError(Exception):
+    """Required components failed to initialize"""
+
+    def __init__(self, name: str, failed: Dict[str, str]):
+        self.failed = failed
+        details = ', '.join(f"{component} ({error})" for component, error in failed.items())
+        super().__init__(f"Startup '{name}' failed: {details}")
+
+
+@dataclass
+class ComponentTiming:
+    """Startup record of one component (offsets from the start of the run)"""
+    name: str
+    depends_on: Tuple[str, ...]
+    optional: bool = False
+    status: str = 'pending'         # pending, running, ready, failed, skipped
+    start_ms: float = 0.0
+    end_ms: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return self.end_ms - self.start_ms if self.status in ('ready', 'failed') else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'depends_on': list(self.depends_on),
+            'status': self.status,
+            'start_ms': round(self.start_ms, 1),
+            'end_ms': round(self.end_ms, 1),
+            'duration_ms': round(self.duration_ms, 1),
+            'error': self.error
+        }
+
+
+@dataclass
+class _Component:
+    init: Callable[[], Any]
+    timing: ComponentTiming
+    dependents: List[str] = field(default_factory=list)
+
+
+class StartupOrchestrator:
+    """Initializes components concurrently in dependency order"""
+
+    def __init__(self, name: str = "startup"):
+        self.name = name
+        self._components: Dict[str, _Component] = {}
+        self.results: Dict[str, Any] = {}
+        self.wall_ms = 0.0
+        self.completed_at: Optional[float] = None
+
+    def add(self, name: str, init: Callable[[], Any], depends_on: Iterable[str] = (), optional: bool = False):
+        """
+        Declare a component
+
+        Args:
+            name: Component name (timeline label, key in results)
+            init: Blocking callable (run on a worker thread) or coroutine function
+                  (run on the event loop); its return value goes to results[name]
+            depends_on: Components that must be ready before init starts
+            optional: A failure is logged but does not fail the startup
+        """
+        if name in self._components:
+            raise ValueError(f"Component '{name}' declared twice")
+        self._components[name] = _Component(init, ComponentTiming(name, tuple(depends_on), optional))
+
+    def _order(self) -> List[str]:
+        """Components in dependency order (Kahn), rejecting unknown names and cycles"""
+        waiting = {}
+        for component in self._components.values():
+            component.dependents.clear()
+        for name, component in self._components.items():
+            for dependency in component.timing.depends_on:
+                if dependency not in self._components:
+                    raise ValueError(f"Component '{name}' depends on unknown component '{dependency}'")
+                self._components[dependency].dependents.append(name)
+            waiting[name] = len(component.timing.depends_on)
+
+        order = [name for name, count in waiting.items() if count == 0]
+        for name in order:
+            for dependent in self._components[name].dependents:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    order.append(dependent)
+        if len(order) != len(self._components):
+            cycle = sorted(name for name in self._components if name not in order)
+            raise ValueError(f"Dependency cycle between components: {', '.join(cycle)}")
+        return order
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Initialize all components
+
+        Returns:
+            Component name -> init return value
+
+        Raises:
+            StartupError: A required component failed or was skipped
+        """
+        order = self._order()
+        start = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        def offset_ms() -> float:
+            return (time.perf_counter() - start) * 1000
+
+        async def initialize(name: str):
+            component = self._components[name]
+            timing = component.timing
+            await asyncio.gather(*(tasks[dependency] for dependency in timing.depends_on))
+            blocked = [d for d in timing.depends_on if self._components[d].timing.status != 'ready']
+            if blocked:
+                timing.status = 'skipped'
+                timing.error = f"dependency not ready: {', '.join(blocked)}"
+                timing.start_ms = timing.end_ms = offset_ms()
+                return
+
+            timing.status = 'running'
+            timing.start_ms = offset_ms()
+            try:
+                if inspect.iscoroutinefunction(component.init):
+                    result = await component.init()
+                else:
+                    result = await asyncio.to_thread(component.init)
+                self.results[name] = result
+                timing.status = 'ready'
+            except Exception as e:
+                timing.status = 'failed'
+                timing.error = str(e)
+                log = logger.warning if timing.optional else logger.error
+                log(f"Startup component '{name}' failed: {e}")
+            finally:
+                timing.end_ms = offset_ms()
+
+        # Every task exists before any of them runs, so dependents can await their dependencies
+        for name in order:
+            tasks[name] = asyncio.create_task(initialize(name))
+        await asyncio.gather(*tasks.values())
+
+        self.wall_ms = offset_ms()
+        self.completed_at = time.time()
+        self.log_timeline()
+
+        failed = {name: component.timing.error for name, component in self._components.items()
+                  if component.timing.status != 'ready' and not component.timing.optional}
+        if failed:
+            raise StartupError(self.name, failed)
+        return self.results
+
+    def run_sync(self) -> Dict[str, Any]:
+        """run() for synchronous callers (constructors), also from inside a running event loop"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.run())
+        # The caller's loop is blocked until we return anyway, so run on a helper thread
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name) as executor:
+            return executor.submit(asyncio.run, self.run()).result()
+
+    # ==========================================
+    # TIMELINE
+    # ==========================================
+
+    def timeline(self) -> List[ComponentTiming]:
+        """Component records ordered by start offset"""
+        return sorted((component.timing for component in self._components.values()),
+                      key=lambda timing: (timing.start_ms, timing.name))
+
+    def critical_path(self) -> List[str]:
+        """Chain of components that determined the total startup time"""
+        timings = {name: component.timing for name, component in self._components.items()}
+        if not timings:
+            return []
+        path = [max(timings.values(), key=lambda timing: timing.end_ms).name]
+        while timings[path[-1]].depends_on:
+            path.append(max(timings[path[-1]].depends_on, key=lambda name: timings[name].end_ms))
+        return list(reversed(path))
+
+    def sequential_ms(self) -> float:
+        """Time the same components take initialized one after another"""
+        return sum(component.timing.duration_ms for component in self._components.values())
+
+    def log_timeline(self):
+        sequential = self.sequential_ms()
+        logger.info(f"Startup timeline '{self.name}': {self.wall_ms:.0f}ms "
+                    f"(sequential {sequential:.0f}ms, critical path: {' -> '.join(self.critical_path())})")
+        for timing in self.timeline():
+            logger.info(f"  {timing.name:<28} {timing.start_ms:8.0f} -> {timing.end_ms:8.0f}ms "
+                        f"{timing.duration_ms:8.0f}ms  {timing.status}"
+                        + (f" ({timing.error})" if timing.error else ""))
+
+    def get_status(self) -> Dict[str, Any]:
+        sequential = self.sequential_ms()
+        return {
+            'name': self.name,
+            'completed_at': self.completed_at,
+            'wall_ms': round(self.wall_ms, 1),
+            'sequential_ms': round(sequential, 1),
+            'parallel_speedup': round(sequential / self.wall_ms, 2) if self.wall_ms else 0.0,
+            'critical_path': self.critical_path(),
+            'components': [timing.to_dict() for timing in self.timeline()]
+        }
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+R2D2 State Store
+================
+
+Versioned state with delta publication for dashboard WebSocket clients.
+
+The status loops used to rebuild full status dicts on a timer and send
+the complete JSON to every client, although most fields had not changed
+since the previous broadcast. Producers now write their fields into a
+StateStore, grouped in topics (servos, safety, vision stats, wcb, ...).
+The store keeps the current state and a pending JSON merge patch
+(RFC 7386) per topic. Once per tick the StatePublisher drains the
+patches, serializes each changed topic's delta once and sends the same
+bytes to every client subscribed to that topic. A client receives a
+snapshot of its topics on connect and applies the deltas on top.
+
+Messages:
+    {"type": "state_snapshot", "version": 41, "topics": {"servos": {...}, ...}}
+    {"type": "state_delta", "topic": "servos", "version": 42, "changes": {"3": {"position_us": 1520.0}}}
+
+A null in "changes" removes the field, so None values are not kept in
+the state. Clients choose their topics with
+{"type": "subscribe", "topics": ["servos", "safety"]} (null: all topics).
+
+Features:
+- Thread-safe updates from producer threads and coroutines
+- Change detection on JSON-normalized values (nested merge patches)
+- One serialization per changed topic per tick, shared by subscribers
+- Snapshot on connect and on subscription changes
+- Publication statistics
+
+Usage:
+    store = StateStore("servo_backend")
+    publisher = StatePublisher(store, rate_hz=10)
+    store.update("servos", backend.get_servo_status(), replace=True)
+    await publisher.connect(websocket, topics=["servos"])
+    await publisher.publish()
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PUBLISH_RATE_HZ = 10.0
+
+
+def _normalize(value: Any) -> Any:
+    """The value as a client sees it (string keys, lists, plain types)"""
+    return json.loads(json.dumps(value, default=str))
+
+
+def merge_patch(old: Dict[str, Any], new: Dict[str, Any], replace: bool = True) -> Dict[str, Any]:
+    """
+    JSON merge patch turning old into new
+
+    Args:
+        old: Current normalized state
+        new: New normalized state
+        replace: Fields missing from new are removed (False: new is a partial update)
+    """
+    patch = {}
+    for key, value in new.items():
+        if value is None:
+            if key in old:
+                patch[key] = None
+        elif key not in old:
+            patch[key] = value
+        elif isinstance(old[key], dict) and isinstance(value, dict):
+            nested = merge_patch(old[key], value)
+            if nested:
+                patch[key] = nested
+        elif old[key] != value:
+            patch[key] = value
+    if replace:
+        for key in old:
+            if key not in new and key not in patch:
+                patch[key] = None
+    return patch
+
+
+def apply_merge_patch(target: Any, patch: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a JSON merge patch in place (what a client does with a delta)"""
+    if not isinstance(target, dict):
+        target = {}
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict):
+            target[key] = apply_merge_patch(target.get(key), value)
+        else:
+            target[key] = value
+    return target
+
+
+def _replacement(old: Any, new: Dict[str, Any]) -> Dict[str, Any]:
+    """Patch turning old (or nothing) into new: new in full, plus removals of old's other fields"""
+    patch = json.loads(json.dumps(new))
+    if isinstance(old, dict):
+        for key, value in old.items():
+            if key not in new:
+                patch[key] = None
+            elif isinstance(value, dict) and isinstance(new[key], dict):
+                patch[key] = _replacement(value, new[key])
+    return patch
+
+
+def _combine_patches(first: Dict[str, Any], second: Dict[str, Any], current: Dict[str, Any],
+                     published: Any):
+    """
+    Fold a later patch into a pending one, keeping removals
+
+    A dict replacing a pending removal or plain value cannot be folded: the
+    client still holds the last published value, and merging the new dict
+    into it would bring back fields removed in between. It is sent whole,
+    with removals of the published value's other fields.
+    """
+    published = published if isinstance(published, dict) else {}
+    for key, value in second.items():
+        pending = first.get(key)
+        if isinstance(value, dict) and isinstance(pending, dict):
+            _combine_patches(pending, value, current[key], published.get(key))
+        elif isinstance(value, dict) and key in first:
+            first[key] = _replacement(published.get(key), current[key])
+        else:
+            first[key] = value
+
+
+class StateStore:
+    """Versioned topic state with pending deltas"""
+
+    def __init__(self, name: str = "state"):
+        self.name = name
+        self.version = 0
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._published: Dict[str, Dict[str, Any]] = {}    # State as of the last drain (what clients hold)
+        self._lock = threading.Lock()
+        self.stats = {'updates': 0, 'unchanged_updates': 0, 'changed_fields': 0}
+
+    def update(self, topic: str, fields: Dict[str, Any], replace: bool = False) -> bool:
+        """
+        Write fields of a topic
+
+        Args:
+            topic: Topic name (e.g. "servos")
+            fields: Field values (nested dicts are diffed recursively)
+            replace: Fields not given are removed (the producer owns the whole topic)
+
+        Returns:
+            True if anything changed
+        """
+        normalized = _normalize(fields)
+        with self._lock:
+            self.stats['updates'] += 1
+            current = self._state.get(topic, {})
+            patch = merge_patch(current, normalized, replace=replace)
+            if not patch:
+                self.stats['unchanged_updates'] += 1
+                return False
+
+            self._state[topic] = apply_merge_patch(current, json.loads(json.dumps(patch)))
+            self.version += 1
+            self._versions[topic] = self.version
+            if topic in self._pending:
+                _combine_patches(self._pending[topic], patch, self._state[topic], self._published.get(topic))
+            else:
+                self._pending[topic] = patch
+            self.stats['changed_fields'] += len(patch)
+            return True
+
+    def remove(self, topic: str, keys: Iterable[str]) -> bool:
+        """Remove fields of a topic"""
+        return self.update(topic, {str(key): None for key in keys})
+
+    def get(self, topic: str) -> Dict[str, Any]:
+        """Copy of a topic's current state"""
+        with self._lock:
+            return json.loads(json.dumps(self._state.get(topic, {})))
+
+    def topics(self) -> List[str]:
+        with self._lock:
+            return sorted(self._state)
+
+    def snapshot(self, topics: Optional[Iterable[str]] = None) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+        """Current version and state of the given topics (None: all)"""
+        with self._lock:
+            names = self._state.keys() if topics is None else [t for t in topics if t in self._state]
+            return self.version, json.loads(json.dumps({name: self._state[name] for name in names}))
+
+    def drain(self) -> Dict[str, Tuple[int, Dict[str, Any]]]:
+        """Take the pending delta of each changed topic: {topic: (version, patch)}"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            for topic, patch in pending.items():
+                self._published[topic] = apply_merge_patch(self._published.get(topic),
+                                                           json.loads(json.dumps(patch)))
+            return {topic: (self._versions[topic], patch) for topic, patch in pending.items()}
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'name': self.name,
+                'version': self.version,
+                'topics': {topic: self._versions[topic] for topic in self._state},
+                'pending_topics': len(self._pending),
+                **self.stats
+            }
+
+
+# ==========================================
+# PUBLICATION
+# ==========================================
+
+class StatePublisher:
+    """Sends snapshots and per-tick topic deltas to subscribed WebSocket clients"""
+
+    def __init__(self, store: StateStore, rate_hz: float = DEFAULT_PUBLISH_RATE_HZ):
+        """
+        Args:
+            store: State to publish
+            rate_hz: Publication tick rate for run()
+        """
+        self.store = store
+        self.period = 1.0 / rate_hz
+        self.subscriptions: Dict[Any, Optional[Set[str]]] = {}     # websocket -> topics (None: all)
+        self.running = False
+        self.stats = {
+            'ticks': 0,
+            'deltas': 0,
+            'snapshots': 0,
+            'messages_sent': 0,
+            'bytes_serialized': 0,
+            'bytes_sent': 0,
+            'send_failures': 0
+        }
+
+    @property
+    def clients(self) -> int:
+        return len(self.subscriptions)
+
+    async def connect(self, websocket, topics: Optional[Iterable[str]] = None):
+        """Subscribe a client and send it a snapshot of its topics"""
+        self.subscriptions[websocket] = None if topics is None else set(topics)
+        await self._send_snapshot(websocket, topics)
+
+    def disconnect(self, websocket):
+        self.subscriptions.pop(websocket, None)
+
+    async def handle_subscribe(self, websocket, data: Dict[str, Any]):
+        """Handle {"type": "subscribe", "topics": [...]} by switching topics and sending a fresh snapshot"""
+        topics = data.get('topics')
+        await self.connect(websocket, None if topics is None else [str(topic) for topic in topics])
+
+    async def _send_snapshot(self, websocket, topics: Optional[Iterable[str]]):
+        version, state = self.store.snapshot(topics)
+        message = json.dumps({'type': 'state_snapshot', 'version': version, 'timestamp': time.time(),
+                              'topics': state})
+        self.stats['snapshots'] += 1
+        self.stats['bytes_serialized'] += len(message)
+        await self._send(websocket, message)
+
+    async def publish(self) -> int:
+        """Send every changed topic's delta to its subscribers; returns the number of deltas"""
+        self.stats['ticks'] += 1
+        deltas = self.store.drain()
+        if not deltas or not self.subscriptions:
+            return 0
+
+        sends = []
+        for topic, (version, patch) in deltas.items():
+            recipients = [ws for ws, topics in self.subscriptions.items() if topics is None or topic in topics]
+            if not recipients:
+                continue
+            # Serialized once, the same bytes go to every subscriber
+            message = json.dumps({'type': 'state_delta', 'topic': topic, 'version': version,
+                                  'timestamp': time.time(), 'changes': patch})
+            self.stats['deltas'] += 1
+            self.stats['bytes_serialized'] += len(message)
+            sends.extend(self._send(ws, message) for ws in recipients)
+
+        if sends:
+            await asyncio.gather(*sends)
+        return len(deltas)
+
+    async def _send(self, websocket, message: str):
+        try:
+            await websocket.send(message)
+            self.stats['messages_sent'] += 1
+            self.stats['bytes_sent'] += len(message)
+        except Exception as e:
+            logger.debug(f"State publication to client failed: {e}")
+            self.stats['send_failures'] += 1
+            self.disconnect(websocket)
+
+    async def run(self):
+        """Publication loop at the configured rate"""
+        self.running = True
+        while self.running:
+            try:
+                await self.publish()
+            except Exception as e:
+                logger.error(f"State publication error: {e}")
+            await asyncio.sleep(self.period)
+
+    def stop(self):
+        self.running = False
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'clients': self.clients,
+            'rate_hz': 1.0 / self.period,
+            'store': self.store.get_status(),
+            **self.stats
+        }
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+R2D2 Status Snapshots
+=====================
+
+Cached, pre-serialized status documents for REST polling.
+
+Dashboard status endpoints recomputed their document on every request:
+walking all servo channels, calling into the safety and hardware
+subsystems, copying dicts under locks and serializing the result. With
+several dashboards polling every second, that work competed with the
+control loops. A StatusSnapshotService rebuilds each registered document
+at most once per max_age (or on invalidate() after a state change, or on
+a fixed cadence from a background thread), keeps it as JSON bytes with an
+ETag, and answers conditional GETs: a poll with a matching If-None-Match
+gets 304 Not Modified and no body.
+
+Documents carry fields that change on every build (timestamps, uptimes,
+live counters). Those are registered as volatile keys: they stay in the
+body but are left out of the ETag, so an unchanged document keeps its
+ETag across rebuilds and polls keep getting 304s.
+
+Features:
+- Named snapshots with per-snapshot maximum age
+- Lazy rebuild on request, single rebuild under concurrent requests
+- Optional fixed-cadence background refresh (requests only build after invalidate())
+- invalidate() for changes that must show up immediately
+- Strong ETags and If-None-Match handling (304 responses)
+- Volatile keys (timestamps, uptimes) left out of the ETag
+- Flask and FastAPI response helpers
+
+Usage:
+    snapshots = StatusSnapshotService(max_age=1.0)
+    snapshots.register('status', lambda: {'success': True, 'data': backend.get_status()},
+                       volatile=('timestamp', 'uptime'))
+
+    @app.route('/api/status')
+    def get_status():
+        return flask_snapshot_response(snapshots, 'status')
+"""
+
+import hashlib
+import itertools
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE = 1.0
+JSON_CONTENT_TYPE = 'application/json'
+
+
+@dataclass
+class StatusSnapshot:
+    """One built status document"""
+    payload: Any            # The document (shared, treat as read-only)
+    body: bytes             # Serialized once per build
+    etag: str
+    built_at: float
+    build_ms: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.built_at
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True if an If-None-Match header names this snapshot"""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag == '*' or tag == self.etag:
+                return True
+        return False
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            'ETag': self.etag,
+            'Cache-Control': 'no-cache',            # Revalidate every poll, 304 when unchanged
+            'X-Snapshot-Age': f"{self.age:.3f}"
+        }
+
+
+class _Entry:
+    def __init__(self, builder: Callable[[], Any], max_age: float, volatile: FrozenSet[str]):
+        self.builder = builder
+        self.max_age = max_age
+        self.volatile = volatile
+        self.snapshot: Optional[StatusSnapshot] = None
+        self.valid = False
+        self.generation = 0                     # Changed by every invalidate()
+        self.lock = threading.Lock()
+
+
+class StatusSnapshotService:
+    """Named status documents rebuilt at a bounded rate and served as bytes"""
+
+    def __init__(self, max_age: float = DEFAULT_MAX_AGE):
+        """
+        Args:
+            max_age: Default seconds a snapshot is served before it is rebuilt
+        """
+        self.max_age = max_age
+        self._entries: Dict[str, _Entry] = {}
+        self._generations = itertools.count(1)
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refresh_stop = threading.Event()
+        self.stats = {
+            'requests': 0,
+            'hits': 0,
+            'builds': 0,
+            'build_errors': 0,
+            'not_modified': 0,
+            'invalidations': 0,
+            'build_ms_total': 0.0
+        }
+
+    def register(self, name: str, builder: Callable[[], Any], max_age: Optional[float] = None,
+                 volatile: Iterable[str] = ()):
+        """
+        Register a status document
+
+        Args:
+            name: Snapshot name
+            builder: Returns the JSON-serializable document
+            max_age: Seconds before a rebuild (default: the service max_age)
+            volatile: Keys left out of the ETag wherever they occur in the
+                      document (timestamps, uptimes, live counters)
+        """
+        self._entries[name] = _Entry(builder, self.max_age if max_age is None else max_age,
+                                     frozenset(volatile))
+
+    def invalidate(self, name: Optional[str] = None):
+        """Mark one snapshot (None: all) stale so the next request rebuilds it"""
+        for entry_name, entry in self._entries.items():
+            if name is None or entry_name == name:
+                entry.generation = next(self._generations)
+                entry.valid = False
+        self.stats['invalidations'] += 1
+
+    def get(self, name: str) -> StatusSnapshot:
+        """Current snapshot, rebuilt first if it is stale (builder errors propagate)"""
+        entry = self._entries[name]
+        self.stats['requests'] += 1
+        snapshot = entry.snapshot
+        if self._fresh(entry, snapshot):
+            self.stats['hits'] += 1
+            return snapshot
+
+        with entry.lock:
+            # Another request may have rebuilt it while we waited
+            snapshot = entry.snapshot
+            if self._fresh(entry, snapshot):
+                self.stats['hits'] += 1
+                return snapshot
+            return self._build(name, entry)
+
+    def refresh(self, name: Optional[str] = None):
+        """Rebuild one snapshot (None: all) now"""
+        for entry_name, entry in list(self._entries.items()):
+            if name is None or entry_name == name:
+                with entry.lock:
+                    try:
+                        self._build(entry_name, entry)
+                    except Exception as e:
+                        logger.error(f"Status snapshot '{entry_name}' refresh failed: {e}")
+
+    def _fresh(self, entry: _Entry, snapshot: Optional[StatusSnapshot]) -> bool:
+        if snapshot is None or not entry.valid:
+            return False
+        # With the background refresh running, age is the refresh thread's business
+        return self._refresh_thread is not None or time.time() - snapshot.built_at < entry.max_age
+
+    def _build(self, name: str, entry: _Entry) -> StatusSnapshot:
+        # An invalidate() during the build means the state changed under the
+        # builder: serve this snapshot, but leave it stale so the next request rebuilds
+        generation = entry.generation
+        start = time.perf_counter()
+        try:
+            payload = entry.builder()
+            body = json.dumps(payload, default=str, separators=(',', ':')).encode('utf-8')
+            tagged = body
+            if entry.volatile:
+                tagged = json.dumps(_without_keys(payload, entry.volatile), default=str,
+                                    separators=(',', ':')).encode('utf-8')
+        except Exception:
+            self.stats['build_errors'] += 1
+            raise
+        build_ms = (time.perf_counter() - start) * 1000
+        etag = '"' + hashlib.blake2b(tagged, digest_size=8).hexdigest() + '"'
+
+        entry.snapshot = StatusSnapshot(payload, body, etag, time.time(), build_ms)
+        entry.valid = entry.generation == generation
+        self.stats['builds'] += 1
+        self.stats['build_ms_total'] += build_ms
+        return entry.snapshot
+
+    def respond(self, name: str, if_none_match: Optional[str] = None) -> Tuple[int, bytes, Dict[str, str]]:
+        """Status code, body and headers for a (conditional) GET"""
+        snapshot = self.get(name)
+        if snapshot.matches(if_none_match):
+            self.stats['not_modified'] += 1
+            return 304, b'', snapshot.headers()
+        return 200, snapshot.body, snapshot.headers()
+
+    # ==========================================
+    # FIXED-CADENCE REFRESH
+    # ==========================================
+
+    def start(self, interval: Optional[float] = None):
+        """Rebuild all snapshots from a background thread every interval seconds"""
+        if self._refresh_thread is not None:
+            return
+        interval = self.max_age if interval is None else interval
+        self._refresh_stop.clear()
+
+        def refresh_loop():
+            while not self._refresh_stop.wait(interval):
+                self.refresh()
+
+        self.refresh()
+        self._refresh_thread = threading.Thread(target=refresh_loop, daemon=True, name="StatusSnapshots")
+        self._refresh_thread.start()
+
+    def stop(self):
+        self._refresh_stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout=2.0)
+            self._refresh_thread = None
+
+    def get_status(self) -> Dict[str, Any]:
+        requests = self.stats['requests']
+        return {
+            'snapshots': {
+                name: {
+                    'max_age': entry.max_age,
+                    'age': entry.snapshot.age if entry.snapshot else None,
+                    'bytes': len(entry.snapshot.body) if entry.snapshot else 0,
+                    'etag': entry.snapshot.etag if entry.snapshot else None
+                }
+                for name, entry in self._entries.items()
+            },
+            'hit_rate': self.stats['hits'] / requests if requests else 0.0,
+            'background_refresh': self._refresh_thread is not None,
+            **self.stats
+        }
+
+
+def _without_keys(value: Any, keys: FrozenSet[str]) -> Any:
+    """Copy of a JSON document without the given keys at any depth"""
+    if isinstance(value, dict):
+        return {k: _without_keys(v, keys) for k, v in value.items() if k not in keys}
+    if isinstance(value, (list, tuple)):
+        return [_without_keys(v, keys) for v in value]
+    return value
+
+
+# ==========================================
+# FRAMEWORK HELPERS
+# ==========================================
+
+def flask_snapshot_response(service: StatusSnapshotService, name: str):
+    """Flask response for a snapshot, honouring If-None-Match"""
+    from flask import Response, request
+
+    status, body, headers = service.respond(name, request.headers.get('If-None-Match'))
+    return Response(body, status=status, headers=headers, mimetype=JSON_CONTENT_TYPE)
+
+
+def fastapi_snapshot_response(service: StatusSnapshotService, name: str, if_none_match: Optional[str] = None):
+    """FastAPI response for a snapshot (pass the If-None-Match header value)"""
+    from fastapi.responses import Response
+
+    status, body, headers = service.respond(name, if_none_match)
+    return Response(body, status_code=status, headers=headers, media_type=JSON_CONTENT_TYPE)
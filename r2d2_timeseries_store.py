@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+"""
+R2D2 Time-Series Store
+======================
+
+Compact on-disk telemetry history for multi-channel servo data.
+
+Samples arrive as a (fields x channels) matrix per tick. They are folded
+into 1 second buckets (mean/min/max/count); every closed bucket is also
+folded into the next coarser tier, giving 1 s -> 1 min -> 1 h rollups
+without ever re-reading raw data.
+
+Each tier appends its rows to a preallocated, time-aligned chunk held in
+NumPy arrays. Full chunks are sealed and written as one .npz file per
+chunk with one array per field and statistic, so range queries load only
+the columns they ask for. Float columns are XOR-delta encoded against the
+previous row before zlib compression: slowly changing telemetry turns into
+mostly-zero words and compresses far better than raw float32.
+
+Features:
+- Columnar, append-only chunks (NumPy arrays per field per time window)
+- XOR-delta float compression and offset-encoded timestamps
+- Automatic downsampling rollups (1 s -> 1 min -> 1 h)
+- Per-tier age retention plus a total disk budget
+- Range queries choosing the tier that fits the requested point count
+- Expensive work (file writes, retention) kept off the append path
+
+Usage:
+    store = TimeSeriesStore('/home/rolo/r2ai/logs/servo_telemetry',
+                            fields=('position', 'temperature'), channels=12)
+    store.append(time.time(), values)        # values: (fields, channels)
+    store.append(None, health)               # Stamped by the store clock (several writers)
+    store.maintain()                         # periodically, off the hot loop
+    result = store.query(start, end, fields=['temperature'], max_points=500)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STATS = ('mean', 'min', 'max')
+FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class RollupTier:
+    """One resolution level of the store"""
+    name: str
+    step_seconds: float
+    chunk_rows: int           # Buckets per chunk (chunk window = rows * step)
+    retention_seconds: float  # Chunks older than this are deleted
+
+
+DEFAULT_TIERS = (
+    RollupTier('1s', 1.0, 900, 3 * 86400),          # 15 min chunks, 3 days
+    RollupTier('1m', 60.0, 720, 90 * 86400),        # 12 h chunks, 90 days
+    RollupTier('1h', 3600.0, 720, 730 * 86400)      # 30 day chunks, 2 years
+)
+
+
+# ============================================================================
+# ENCODING
+# ============================================================================
+
+def _xor_encode(column: np.ndarray) -> np.ndarray:
+    """XOR each float32 row with the previous one (first row kept as-is)"""
+    bits = np.ascontiguousarray(column, dtype=np.float32).view(np.uint32)
+    encoded = bits.copy()
+    encoded[1:] ^= bits[:-1]
+    return encoded
+
+
+def _xor_decode(encoded: np.ndarray) -> np.ndarray:
+    return np.bitwise_xor.accumulate(encoded, axis=0).view(np.float32)
+
+
+# ============================================================================
+# BUCKETS AND CHUNKS
+# ============================================================================
+
+class _Accumulator:
+    """Running sum/count/min/max for the open bucket of one tier"""
+
+    __slots__ = ('sum', 'count', 'min', 'max')
+
+    def __init__(self, shape: Tuple[int, int]):
+        self.sum = np.zeros(shape, dtype=np.float64)
+        self.count = np.zeros(shape, dtype=np.uint32)
+        self.min = np.full(shape, np.inf, dtype=np.float64)
+        self.max = np.full(shape, -np.inf, dtype=np.float64)
+
+    def reset(self) -> None:
+        self.sum.fill(0.0)
+        self.count.fill(0)
+        self.min.fill(np.inf)
+        self.max.fill(-np.inf)
+
+    def add_sample(self, values: np.ndarray) -> None:
+        """Fold in one raw sample (NaN = missing)"""
+        present = ~np.isnan(values)
+        self.sum += np.where(present, values, 0.0)
+        self.count += present
+        np.fmin(self.min, values, out=self.min)
+        np.fmax(self.max, values, out=self.max)
+
+    def add_rollup(self, mean: np.ndarray, count: np.ndarray,
+                   minimum: np.ndarray, maximum: np.ndarray) -> None:
+        """Fold in a closed bucket of a finer tier (count-weighted)"""
+        self.sum += np.where(count > 0, mean, 0.0) * count
+        self.count += count
+        np.fmin(self.min, minimum, out=self.min)
+        np.fmax(self.max, maximum, out=self.max)
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(self.count > 0, self.sum / np.maximum(self.count, 1), np.nan)
+        minimum = np.where(self.count > 0, self.min, np.nan)
+        maximum = np.where(self.count > 0, self.max, np.nan)
+        return mean, self.count.copy(), minimum, maximum
+
+
+class _Chunk:
+    """Preallocated columns for one time-aligned window of a tier"""
+
+    def __init__(self, tier: RollupTier, start_index: int, shape: Tuple[int, int]):
+        rows = tier.chunk_rows
+        self.tier = tier
+        self.start_index = start_index
+        self.size = 0
+        self.offsets = np.zeros(rows, dtype=np.uint32)
+        self.count = np.zeros((rows,) + shape, dtype=np.uint32)
+        self.columns = {stat: np.full((rows,) + shape, np.nan, dtype=np.float32)
+                        for stat in STATS}
+
+    @property
+    def start_time(self) -> float:
+        return self.start_index * self.tier.step_seconds
+
+    @property
+    def end_index(self) -> int:
+        return self.start_index + self.tier.chunk_rows
+
+    def append(self, index: int, mean, count, minimum, maximum) -> None:
+        row = self.size
+        self.offsets[row] = index - self.start_index
+        self.count[row] = count
+        self.columns['mean'][row] = mean
+        self.columns['min'][row] = minimum
+        self.columns['max'][row] = maximum
+        self.size += 1
+
+    def timestamps(self) -> np.ndarray:
+        offsets = self.offsets[:self.size].astype(np.float64)
+        return (self.start_index + offsets) * self.tier.step_seconds
+
+
+class _TierState:
+    __slots__ = ('tier', 'accumulator', 'bucket_index', 'chunk', 'sealed')
+
+    def __init__(self, tier: RollupTier, shape: Tuple[int, int]):
+        self.tier = tier
+        self.accumulator = _Accumulator(shape)
+        self.bucket_index: Optional[int] = None
+        self.chunk: Optional[_Chunk] = None
+        self.sealed: List[_Chunk] = []
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class TimeSeriesStore:
+    """
+    Multi-resolution columnar store for (fields x channels) telemetry
+
+    append() only touches in-memory arrays; maintain() writes sealed chunks
+    and applies retention and should be called from a low-rate thread.
+    """
+
+    def __init__(self, directory: Union[str, Path], fields: Sequence[str],
+                 channels: int = 12, tiers: Sequence[RollupTier] = DEFAULT_TIERS,
+                 disk_budget_mb: float = 256.0, clock: Callable[[], float] = time.time):
+        """
+        Initialize the store
+
+        Args:
+            directory: Root directory (one subdirectory per tier)
+            fields: Field names, in the row order used by append()
+            channels: Number of channels per field
+            tiers: Resolution tiers, finest first; each step must be a
+                multiple of the previous one
+            disk_budget_mb: Total on-disk budget; the oldest chunks of the
+                finest tiers are dropped first when exceeded
+            clock: Time source for append(None, ...), retention and tier selection
+        """
+        self.directory = Path(directory)
+        self.fields = tuple(fields)
+        self.channels = channels
+        self.tiers = tuple(tiers)
+        self.disk_budget_bytes = int(disk_budget_mb * 1024 * 1024)
+        self.clock = clock
+
+        for finer, coarser in zip(self.tiers, self.tiers[1:]):
+            ratio = coarser.step_seconds / finer.step_seconds
+            if ratio < 1 or abs(ratio - round(ratio)) > 1e-9:
+                raise ValueError(f"Tier {coarser.name} step must be a multiple of {finer.name}")
+
+        self._field_index = {name: i for i, name in enumerate(self.fields)}
+        self._shape = (len(self.fields), channels)
+        self._states = [_TierState(tier, self._shape) for tier in self.tiers]
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._sample = np.full(self._shape, np.nan, dtype=np.float64)
+
+        for tier in self.tiers:
+            (self.directory / tier.name).mkdir(parents=True, exist_ok=True)
+
+        self.stats = {
+            'samples': 0,
+            'out_of_order': 0,
+            'chunks_written': 0,
+            'chunks_expired': 0
+        }
+
+    # ------------------------------------------------------------------ writes
+
+    def append(self, timestamp: Optional[float],
+               values: Union[np.ndarray, Mapping[str, Sequence[float]]]) -> None:
+        """
+        Add one sample
+
+        Args:
+            timestamp: Sample time (epoch seconds), or None to stamp the sample
+                with the store clock under the append lock. Threads writing
+                to the same store should pass None: their samples then reach
+                the store in time order instead of being dropped as
+                out-of-order when their own clock readings interleave.
+            values: (fields x channels) array, or field -> per-channel values
+                for a subset of fields (missing fields/channels are NaN)
+        """
+        if not isinstance(values, Mapping):
+            values = np.asarray(values, dtype=np.float64)
+            if values.shape != self._shape:
+                raise ValueError(f"Expected values of shape {self._shape}, got {values.shape}")
+
+        with self._lock:
+            if isinstance(values, Mapping):
+                # Shared scratch buffer, only filled while holding the lock
+                sample = self._sample
+                sample.fill(np.nan)
+                for name, column in values.items():
+                    row = self._field_index.get(name)
+                    if row is not None:
+                        sample[row, :len(column)] = column
+            else:
+                sample = values
+
+            if timestamp is None:
+                timestamp = self.clock()
+            state = self._states[0]
+            index = int(timestamp // state.tier.step_seconds)
+            if state.bucket_index is None:
+                state.bucket_index = index
+            elif index > state.bucket_index:
+                self._close_bucket(0)
+                state.bucket_index = index
+            elif index < state.bucket_index:
+                self.stats['out_of_order'] += 1
+                return
+            state.accumulator.add_sample(sample)
+            self.stats['samples'] += 1
+
+    def _close_bucket(self, level: int) -> None:
+        """Emit the open bucket of a tier and fold it into the next tier"""
+        state = self._states[level]
+        if state.bucket_index is None or not state.accumulator.count.any():
+            return
+        mean, count, minimum, maximum = state.accumulator.result()
+        self._emit(state, state.bucket_index, mean, count, minimum, maximum)
+        state.accumulator.reset()
+
+        if level + 1 < len(self._states):
+            upper = self._states[level + 1]
+            bucket_time = state.bucket_index * state.tier.step_seconds
+            upper_index = int(bucket_time // upper.tier.step_seconds)
+            if upper.bucket_index is None:
+                upper.bucket_index = upper_index
+            elif upper_index > upper.bucket_index:
+                self._close_bucket(level + 1)
+                upper.bucket_index = upper_index
+            upper.accumulator.add_rollup(mean, count, minimum, maximum)
+
+    def _emit(self, state: _TierState, index: int, mean, count, minimum, maximum) -> None:
+        chunk = state.chunk
+        if chunk is None or index >= chunk.end_index:
+            if chunk is not None and chunk.size:
+                state.sealed.append(chunk)
+            rows = state.tier.chunk_rows
+            chunk = state.chunk = _Chunk(state.tier, index - index % rows, self._shape)
+        chunk.append(index, mean, count, minimum, maximum)
+
+    def maintain(self, now: Optional[float] = None) -> None:
+        """Write sealed chunks and apply retention (call at low rate)"""
+        with self._lock:
+            sealed = [chunk for state in self._states for chunk in state.sealed]
+        for chunk in sealed:
+            self._write_chunk(chunk)
+        with self._lock:
+            for state in self._states:
+                state.sealed = [c for c in state.sealed if c not in sealed]
+        self.apply_retention(now)
+
+    def flush(self, close_buckets: bool = False) -> None:
+        """
+        Persist everything held in memory
+
+        Args:
+            close_buckets: Also close partially filled buckets (shutdown)
+        """
+        with self._lock:
+            if close_buckets:
+                for level in range(len(self._states)):
+                    self._close_bucket(level)
+                    self._states[level].bucket_index = None
+            active = [state.chunk for state in self._states
+                      if state.chunk is not None and state.chunk.size]
+        self.maintain()
+        for chunk in active:
+            with self._lock:
+                snapshot = self._copy_chunk(chunk)
+            self._write_chunk(snapshot)
+
+    @staticmethod
+    def _copy_chunk(chunk: _Chunk) -> _Chunk:
+        copy = _Chunk.__new__(_Chunk)
+        copy.tier = chunk.tier
+        copy.start_index = chunk.start_index
+        copy.size = chunk.size
+        copy.offsets = chunk.offsets[:chunk.size].copy()
+        copy.count = chunk.count[:chunk.size].copy()
+        copy.columns = {stat: column[:chunk.size].copy()
+                        for stat, column in chunk.columns.items()}
+        return copy
+
+    # --------------------------------------------------------------------- I/O
+
+    def _chunk_path(self, tier: RollupTier, start_index: int) -> Path:
+        return self.directory / tier.name / f"{int(start_index * tier.step_seconds)}.npz"
+
+    def _write_chunk(self, chunk: _Chunk) -> None:
+        """Write a chunk, merging with rows already on disk for its window"""
+        path = self._chunk_path(chunk.tier, chunk.start_index)
+        size = chunk.size
+        offsets = chunk.offsets[:size]
+        count = chunk.count[:size]
+        columns = {stat: column[:size] for stat, column in chunk.columns.items()}
+
+        with self._io_lock:
+            if path.exists():
+                try:
+                    existing = self._read_file(path, self.fields, STATS, with_count=True)
+                    keep = ~np.isin(existing['offsets'], offsets)
+                    if keep.any():
+                        order_keys = np.concatenate([existing['offsets'][keep], offsets])
+                        order = np.argsort(order_keys, kind='stable')
+                        offsets = order_keys[order]
+                        count = np.concatenate(
+                            [np.stack([existing['count'][f] for f in self.fields], axis=1)[keep],
+                             count])[order]
+                        columns = {
+                            stat: np.concatenate(
+                                [np.stack([existing[stat][f] for f in self.fields], axis=1)[keep],
+                                 columns[stat]])[order]
+                            for stat in STATS
+                        }
+                except Exception as e:
+                    logger.warning(f"Replacing unreadable chunk {path}: {e}")
+
+            arrays = {
+                'meta': np.frombuffer(json.dumps({
+                    'version': FORMAT_VERSION,
+                    'tier': chunk.tier.name,
+                    'step': chunk.tier.step_seconds,
+                    'start_index': chunk.start_index,
+                    'fields': list(self.fields),
+                    'channels': self.channels
+                }).encode('utf-8'), dtype=np.uint8),
+                'offsets': np.diff(offsets.astype(np.int64), prepend=0).astype(np.uint32)
+            }
+            for i, name in enumerate(self.fields):
+                arrays[f"{name}.count"] = count[:, i]
+                for stat in STATS:
+                    arrays[f"{name}.{stat}"] = _xor_encode(columns[stat][:, i])
+
+            tmp = path.with_name(path.stem + '.tmp.npz')
+            np.savez_compressed(tmp, **arrays)
+            os.replace(tmp, path)
+            self.stats['chunks_written'] += 1
+
+    def _read_file(self, path: Path, fields: Sequence[str], stats: Sequence[str],
+                   with_count: bool = False) -> Dict:
+        """Load only the requested columns of a chunk file"""
+        with np.load(path) as data:
+            meta = json.loads(bytes(data['meta']).decode('utf-8'))
+            offsets = np.cumsum(data['offsets'].astype(np.int64))
+            result = {'meta': meta, 'offsets': offsets}
+            for stat in stats:
+                result[stat] = {f: _xor_decode(data[f"{f}.{stat}"]) for f in fields
+                                if f"{f}.{stat}" in data.files}
+            if with_count:
+                result['count'] = {f: data[f"{f}.count"] for f in fields
+                                   if f"{f}.count" in data.files}
+        return result
+
+    def _chunk_files(self, tier: RollupTier) -> List[Tuple[float, Path]]:
+        files = []
+        for path in (self.directory / tier.name).glob('*.npz'):
+            if path.name.endswith('.tmp.npz'):
+                continue
+            try:
+                files.append((float(path.stem), path))
+            except ValueError:
+                continue
+        return sorted(files)
+
+    # ---------------------------------------------------------------- retention
+
+    def apply_retention(self, now: Optional[float] = None) -> int:
+        """
+        Delete chunks past their tier's retention, then enforce the disk budget
+
+        Returns:
+            Number of chunk files deleted
+        """
+        now = self.clock() if now is None else now
+        deleted = 0
+        with self._io_lock:
+            inventory = []
+            for tier in self.tiers:
+                window = tier.chunk_rows * tier.step_seconds
+                for start, path in self._chunk_files(tier):
+                    if start + window < now - tier.retention_seconds:
+                        path.unlink(missing_ok=True)
+                        deleted += 1
+                    else:
+                        inventory.append((tier, start, path, path.stat().st_size))
+
+            total = sum(size for *_, size in inventory)
+            if self.disk_budget_bytes and total > self.disk_budget_bytes:
+                # Finest tiers first, oldest first; never the newest chunk of a tier
+                newest = {tier.name: max(s for t, s, _, _ in inventory if t is tier)
+                          for tier in {t for t, *_ in inventory}}
+                for tier, start, path, size in inventory:
+                    if total <= self.disk_budget_bytes:
+                        break
+                    if start == newest[tier.name]:
+                        continue
+                    path.unlink(missing_ok=True)
+                    total -= size
+                    deleted += 1
+
+        self.stats['chunks_expired'] += deleted
+        return deleted
+
+    # ------------------------------------------------------------------ queries
+
+    def select_tier(self, start: float, end: float, max_points: int = 1000,
+                    now: Optional[float] = None) -> RollupTier:
+        """Finest tier that covers the range and fits within max_points"""
+        now = self.clock() if now is None else now
+        for tier in self.tiers:
+            if (end - start) / tier.step_seconds <= max_points and \
+                    now - start <= tier.retention_seconds:
+                return tier
+        return self.tiers[-1]
+
+    def query(self, start: float, end: float, fields: Optional[Sequence[str]] = None,
+              channels: Optional[Sequence[int]] = None, stats: Sequence[str] = ('mean',),
+              resolution: Optional[str] = None, max_points: int = 1000) -> Dict:
+        """
+        Read a time range
+
+        Args:
+            start: Range start (epoch seconds, inclusive)
+            end: Range end (epoch seconds, exclusive)
+            fields: Fields to read (default: all)
+            channels: Channels to return (default: all)
+            stats: Any of 'mean', 'min', 'max'
+            resolution: Tier name ('1s', '1m', '1h'); chosen from max_points if None
+            max_points: Upper bound on returned rows when choosing the tier
+
+        Returns:
+            {"resolution", "timestamps", "channels", "data": {field: {stat: (rows, channels)}}}
+        """
+        fields = list(fields or self.fields)
+        unknown = [f for f in fields if f not in self._field_index]
+        if unknown:
+            raise KeyError(f"Unknown fields: {unknown}")
+        stats = [s for s in stats if s in STATS]
+        channel_index = list(range(self.channels)) if channels is None else list(channels)
+
+        if resolution is not None:
+            tier = next((t for t in self.tiers if t.name == resolution), None)
+            if tier is None:
+                raise KeyError(f"Unknown resolution: {resolution}")
+        else:
+            tier = self.select_tier(start, end, max_points)
+        window = tier.chunk_rows * tier.step_seconds
+
+        parts: List[Tuple[np.ndarray, Dict[str, Dict[str, np.ndarray]]]] = []
+
+        # Persisted chunks (only the requested columns are decompressed)
+        for chunk_start, path in self._chunk_files(tier):
+            if chunk_start >= end or chunk_start + window <= start:
+                continue
+            try:
+                data = self._read_file(path, fields, stats)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable chunk {path}: {e}")
+                continue
+            start_index = data['meta']['start_index']
+            timestamps = (start_index + data['offsets']) * tier.step_seconds
+            parts.append((timestamps, {stat: data[stat] for stat in stats}))
+
+        # In-memory chunks (sealed but unwritten, and the active one)
+        state = self._states[self.tiers.index(tier)]
+        with self._lock:
+            chunks = list(state.sealed) + ([state.chunk] if state.chunk else [])
+            for chunk in chunks:
+                if not chunk.size or chunk.start_time >= end or chunk.start_time + window <= start:
+                    continue
+                columns = {stat: {f: chunk.columns[stat][:chunk.size, self._field_index[f]].copy()
+                                  for f in fields} for stat in stats}
+                parts.append((chunk.timestamps(), columns))
+
+        return self._assemble(tier, parts, start, end, fields, stats, channel_index)
+
+    def _assemble(self, tier, parts, start, end, fields, stats, channel_index) -> Dict:
+        result = {
+            'resolution': tier.name,
+            'step_seconds': tier.step_seconds,
+            'channels': channel_index,
+            'timestamps': np.empty(0, dtype=np.float64),
+            'data': {f: {s: np.empty((0, len(channel_index)), dtype=np.float32) for s in stats}
+                     for f in fields}
+        }
+        if not parts:
+            return result
+
+        timestamps = np.concatenate([t for t, _ in parts])
+        # Later parts (memory) win over earlier ones (disk) for the same bucket
+        reversed_unique, first = np.unique(timestamps[::-1], return_index=True)
+        select = len(timestamps) - 1 - first
+        in_range = (reversed_unique >= start) & (reversed_unique < end)
+        select = select[in_range]
+
+        result['timestamps'] = timestamps[select]
+        for f in fields:
+            for s in stats:
+                blocks = [columns[s][f] if f in columns[s]
+                          else np.full((len(t), self.channels), np.nan, dtype=np.float32)
+                          for t, columns in parts]
+                result['data'][f][s] = np.concatenate(blocks)[select][:, channel_index]
+        return result
+
+    def get_stats(self) -> Dict:
+        """Store statistics (memory rows, disk usage per tier)"""
+        with self._lock:
+            memory_rows = {state.tier.name: (state.chunk.size if state.chunk else 0) +
+                           sum(c.size for c in state.sealed) for state in self._states}
+        disk = {}
+        for tier in self.tiers:
+            files = self._chunk_files(tier)
+            disk[tier.name] = {
+                'chunks': len(files),
+                'bytes': sum(path.stat().st_size for _, path in files if path.exists())
+            }
+        return {
+            **self.stats,
+            'fields': len(self.fields),
+            'channels': self.channels,
+            'memory_rows': memory_rows,
+            'disk': disk,
+            'disk_budget_bytes': self.disk_budget_bytes
+        }
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+R2D2 Token Validation Cache
+Low-overhead token validation path shared by auth.py and r2d2_auth_module.py
+
+Hot path design:
+- Valid tokens are stored as SHA-256 digests in an immutable snapshot that
+  is swapped atomically whenever a token is added or revoked. Readers never
+  take a lock.
+- The snapshot is keyed by a short digest prefix; the full digest is then
+  verified with hmac.compare_digest (constant time)
+- Usage is counted in per-thread counters and merged into token metadata
+  periodically (or on demand when metadata is read)
+- Validation failures are logged in sampled form so a misconfigured
+  dashboard polling with a stale token cannot flood the log
+"""
+
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bytes of the digest used as the lookup key; the rest is checked in constant time
+DIGEST_PREFIX_BYTES = 8
+
+
+def hash_token(token: str) -> bytes:
+    """Return the SHA-256 digest used as the cache key for a token"""
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+# ============================================================================
+# SAMPLED FAILURE LOGGING
+# ============================================================================
+
+class SampledFailureLogger:
+    """
+    Rate-limited logger for validation failures
+    Logs the first failure of each reason, then at most one line per
+    interval carrying the number of failures suppressed in between
+    """
+
+    def __init__(self, log: logging.Logger, interval: float = 10.0):
+        self.log = log
+        self.interval = interval
+        self._lock = threading.Lock()
+        # reason -> [last_logged_monotonic, suppressed_count, total_count]
+        self._state: Dict[str, List] = {}
+
+    def failure(self, reason: str, token_prefix: str) -> None:
+        """Record a validation failure, logging it only if sampled"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(reason)
+            if state is None:
+                state = self._state[reason] = [now - self.interval, 0, 0]
+            state[2] += 1
+            if now - state[0] < self.interval:
+                state[1] += 1
+                return
+            suppressed = state[1]
+            state[0] = now
+            state[1] = 0
+
+        if suppressed:
+            self.log.warning(f"Token validation failed: {reason} ({token_prefix}...) "
+                             f"[{suppressed} similar failures suppressed]")
+        else:
+            self.log.warning(f"Token validation failed: {reason} ({token_prefix}...)")
+
+    def get_counts(self) -> Dict[str, int]:
+        """Total failures seen per reason (including suppressed ones)"""
+        with self._lock:
+            return {reason: state[2] for reason, state in self._state.items()}
+
+
+# ============================================================================
+# TOKEN VALIDATION CACHE
+# ============================================================================
+
+class _ThreadUsage:
+    """Per-thread usage counters: digest -> (monotonic count, last used epoch)"""
+
+    __slots__ = ('counts', 'last_used')
+
+    def __init__(self):
+        self.counts: Dict[bytes, int] = {}
+        self.last_used: Dict[bytes, float] = {}
+
+
+class TokenValidationCache:
+    """
+    Lock-free token validation with periodic usage accounting
+
+    Writers (add/revoke) serialize on a lock and publish a new read-only
+    prefix -> digest mapping; validate() reads whatever snapshot is current
+    without locking.
+    Each thread counts its own usage in counters that only it writes; the
+    counters are monotonic so flush() merges deltas without losing updates.
+    """
+
+    def __init__(self,
+                 on_flush: Optional[Callable[[bytes, int, float], None]] = None,
+                 flush_interval: float = 5.0,
+                 failure_log_interval: float = 10.0):
+        """
+        Initialize validation cache
+
+        Args:
+            on_flush: Callback(digest, new_uses, last_used_epoch) applied to
+                token metadata during flush
+            flush_interval: Seconds between opportunistic usage flushes
+            failure_log_interval: Seconds between sampled failure log lines
+        """
+        self._snapshot: Mapping[bytes, bytes] = MappingProxyType({})
+        self._revoked: FrozenSet[bytes] = frozenset()
+        self._write_lock = threading.Lock()
+
+        self._on_flush = on_flush
+        self.flush_interval = flush_interval
+        self._next_flush = time.monotonic() + flush_interval
+
+        self._local = threading.local()
+        self._all_usage: List[Tuple[threading.Thread, _ThreadUsage]] = []
+        self._flushed: Dict[Tuple[int, bytes], int] = {}
+        self._flush_lock = threading.Lock()
+
+        self.failures = SampledFailureLogger(logger, failure_log_interval)
+
+    # ------------------------------------------------------------------ writers
+
+    @staticmethod
+    def _publish(digests: Iterable[bytes]) -> Mapping[bytes, bytes]:
+        return MappingProxyType({d[:DIGEST_PREFIX_BYTES]: d for d in digests})
+
+    def add(self, token: str) -> None:
+        """Publish a token as valid (clears any prior revocation)"""
+        digest = hash_token(token)
+        with self._write_lock:
+            self._snapshot = self._publish([*self._snapshot.values(), digest])
+            self._revoked = self._revoked - {digest}
+
+    def revoke(self, token: str) -> None:
+        """Remove a token from the valid snapshot and remember the revocation"""
+        digest = hash_token(token)
+        with self._write_lock:
+            self._snapshot = self._publish(d for d in self._snapshot.values() if d != digest)
+            self._revoked = self._revoked | {digest}
+
+    def replace(self, tokens: Iterable[str], revoked: Iterable[str] = ()) -> None:
+        """Atomically replace the whole snapshot"""
+        gone = frozenset(hash_token(t) for t in revoked)
+        valid = [d for d in (hash_token(t) for t in tokens) if d not in gone]
+        with self._write_lock:
+            self._snapshot = self._publish(valid)
+            self._revoked = gone
+
+    # ------------------------------------------------------------------ readers
+
+    def validate(self, token: Optional[str]) -> bool:
+        """
+        Validate token against the current snapshot
+
+        Args:
+            token: Bearer token (may be None/empty)
+
+        Returns:
+            True if the token is valid
+        """
+        if not token or not token.strip():
+            self.failures.failure('No token provided', 'none')
+            return False
+
+        digest = hash_token(token)
+        stored = self._snapshot.get(digest[:DIGEST_PREFIX_BYTES])
+
+        if stored is None or not hmac.compare_digest(stored, digest):
+            reason = 'Token revoked' if digest in self._revoked else 'Invalid token'
+            self.failures.failure(reason, token[:8])
+            return False
+
+        usage = self._thread_usage()
+        usage.counts[digest] = usage.counts.get(digest, 0) + 1
+        usage.last_used[digest] = time.time()
+
+        if time.monotonic() >= self._next_flush:
+            self.flush()
+
+        return True
+
+    def is_revoked(self, token: str) -> bool:
+        """Check whether a token has been revoked"""
+        return hash_token(token) in self._revoked
+
+    def _thread_usage(self) -> _ThreadUsage:
+        usage = getattr(self._local, 'usage', None)
+        if usage is None:
+            usage = self._local.usage = _ThreadUsage()
+            with self._flush_lock:
+                self._all_usage.append((threading.current_thread(), usage))
+        return usage
+
+    # --------------------------------------------------------------- accounting
+
+    def flush(self) -> int:
+        """
+        Merge per-thread usage counters into token metadata
+
+        Returns:
+            Number of uses merged
+        """
+        if not self._flush_lock.acquire(blocking=False):
+            # Another thread is flushing; it will pick up our counts
+            return 0
+        merged = 0
+        try:
+            self._next_flush = time.monotonic() + self.flush_interval
+            live = []
+            for thread, usage in self._all_usage:
+                alive = thread.is_alive()
+                counts = usage.counts.copy()
+                last_used = usage.last_used.copy()
+                for digest, count in counts.items():
+                    key = (id(usage), digest)
+                    delta = count - self._flushed.get(key, 0)
+                    if delta <= 0:
+                        continue
+                    self._flushed[key] = count
+                    merged += delta
+                    if self._on_flush is not None:
+                        self._on_flush(digest, delta, last_used.get(digest, time.time()))
+                if alive:
+                    live.append((thread, usage))
+                else:
+                    # Thread exited and its counts are merged; forget it
+                    for digest in counts:
+                        self._flushed.pop((id(usage), digest), None)
+            self._all_usage = live
+        finally:
+            self._flush_lock.release()
+        return merged
+
+    def get_stats(self) -> Dict:
+        """Cache statistics for diagnostics"""
+        return {
+            'cached_tokens': len(self._snapshot),
+            'revoked_tokens': len(self._revoked),
+            'tracked_threads': len(self._all_usage),
+            'validation_failures': self.failures.get_counts()
+        }
@@ -30,6 +30,9 @@ import os
 
 # Import authentication module
 from r2d2_auth_module import auth_manager, validate_websocket_token
+from r2d2_metrics import VisionPerformanceStats
+from r2d2_detection_channel import DETECTION_CHANNEL_PATH, DetectionDeltaEncoder, request_path
+from r2d2_startup_orchestrator import StartupOrchestrator, StartupError
 
 # Import torch at module level for performance
 try:
@@ -60,6 +63,8 @@ class VisionSystemConfig:
     WS_SEND_TIMEOUT = 5.0  # seconds
     WS_STREAM_FPS = 12
     MAX_CLIENTS = 3
+    MAX_DETECTION_CLIENTS = 8  # Detections-only subscribers (behavior services)
+    KEYFRAME_INTERVAL = 30  # Detection channel frames between keyframes
 
     # Performance settings
     JPEG_QUALITY = 85  # Optimized (not 98 which wastes bandwidth)
@@ -73,12 +78,13 @@ class OrinNanoProductionVision:
     """Production-ready Orin Nano vision system with all critical fixes"""
 
     def __init__(self, websocket_port: int = VisionSystemConfig.DEFAULT_WS_PORT,
-                 camera_device: int = 0) -> None:
+                 camera_device: int = 0, load_model: bool = True) -> None:
         """Initialize vision system
 
         Args:
             websocket_port: WebSocket server port (1024-65535)
             camera_device: Camera device index (0, 1, 2, etc.)
+            load_model: Load the YOLO model now (False: start() loads it while the camera opens)
         """
         self.websocket_port = websocket_port
         self.camera_device = camera_device
@@ -104,6 +110,11 @@ class OrinNanoProductionVision:
         self.client_lock = threading.Lock()
         self.max_clients = VisionSystemConfig.MAX_CLIENTS
 
+        # Detection channel: latest detections and per-subscriber wake-up events
+        self.latest_detections: Optional[Dict[str, Any]] = None
+        self.detection_clients = set()
+        self._detection_waiters = set()
+
         # Hardware-optimized camera parameters
         self.camera_params = {
             'width': VisionSystemConfig.CAMERA_WIDTH,
@@ -121,16 +132,8 @@ class OrinNanoProductionVision:
             'sharpness': 140
         }
 
-        # Performance statistics
-        self.performance_stats = {
-            'fps': 0.0,
-            'detection_time': 0.0,
-            'inference_fps': 0.0,
-            'total_detections': 0,
-            'confidence_threshold': 0.5,
-            'gpu_memory_usage': 0.0,
-            'capture_latency': 0.0
-        }
+        # Performance statistics (thread-safe registry metrics)
+        self.perf_stats = VisionPerformanceStats('production', confidence_threshold=0.5)
 
         # Frame timing
         self.target_fps = VisionSystemConfig.TARGET_CAPTURE_FPS
@@ -141,7 +144,16 @@ class OrinNanoProductionVision:
         self.fps_alpha = 0.1  # Smoothing factor
 
         # Initialize model
-        self._load_optimized_model()
+        self.using_tensorrt = False
+        self.model_pending = not load_model
+        self.startup_report: Optional[Dict[str, Any]] = None
+        if load_model:
+            self._load_optimized_model()
+
+    @property
+    def performance_stats(self) -> Dict[str, Any]:
+        """Current performance statistics (legacy dict shape)"""
+        return self.perf_stats.snapshot()
 
     def _load_optimized_model(self) -> None:
         """Load YOLO model optimized for Orin Nano with TensorRT support"""
@@ -292,7 +304,7 @@ class OrinNanoProductionVision:
 
                 # Calculate capture latency
                 capture_end_time = time.perf_counter()
-                self.performance_stats['capture_latency'] = (capture_end_time - frame_start_time) * 1000
+                self.perf_stats.observe_capture(capture_end_time - frame_start_time)
 
                 # FPS calculation with smoothing
                 frame_count += 1
@@ -307,7 +319,7 @@ class OrinNanoProductionVision:
                         self.fps_smoothed = (self.fps_alpha * instantaneous_fps +
                                            (1 - self.fps_alpha) * self.fps_smoothed)
 
-                    self.performance_stats['fps'] = self.fps_smoothed
+                    self.perf_stats.set('fps', self.fps_smoothed)
                     logger.info(f"[CAPTURE] FPS: {self.fps_smoothed:.1f} (instantaneous: {instantaneous_fps:.1f})")
 
                     frame_count = 0
@@ -359,17 +371,19 @@ class OrinNanoProductionVision:
                         'frame': annotated_frame,
                         'detections': [],
                         'timestamp': datetime.now().isoformat(),
-                        'stats': self.performance_stats.copy()
+                        'stats': self.perf_stats.snapshot()
                     }
 
                     with self.detection_queue_lock:
                         self.detection_queue.append(detection_data)
                         detections_sent += 1
+                    self._publish_detections([], frames_processed, time.time())
 
                     time.sleep(0.05)  # Rate limit when no model
                     continue
 
                 # GPU detection timing
+                frame_time = time.time()
                 detection_start = time.perf_counter()
 
                 # Force GPU inference
@@ -379,12 +393,10 @@ class OrinNanoProductionVision:
                     results = self.model(frame, verbose=False, stream=False, device='cuda:0')
 
                 detection_end = time.perf_counter()
-                self.performance_stats['detection_time'] = (detection_end - detection_start) * 1000
+                detection_time_ms = (detection_end - detection_start) * 1000
 
                 # Calculate inference FPS
-                inference_fps = (1000.0 / self.performance_stats['detection_time']
-                               if self.performance_stats['detection_time'] > 0 else 0)
-                self.performance_stats['inference_fps'] = inference_fps
+                inference_fps = self.perf_stats.observe_inference(detection_end - detection_start)
 
                 # Process results
                 detections = []
@@ -400,7 +412,7 @@ class OrinNanoProductionVision:
                             class_id = int(box.cls[0])
                             class_name = self.model.names[class_id]
 
-                            if confidence >= self.performance_stats['confidence_threshold']:
+                            if confidence >= self.perf_stats.confidence_threshold:
                                 detections.append({
                                     'class': class_name,
                                     'confidence': float(confidence),
@@ -416,17 +428,18 @@ class OrinNanoProductionVision:
                     'frame': annotated_frame,
                     'detections': detections,
                     'timestamp': datetime.now().isoformat(),
-                    'stats': self.performance_stats.copy()
+                    'stats': self.perf_stats.snapshot()
                 }
 
                 with self.detection_queue_lock:
                     self.detection_queue.append(detection_data)
                     detections_sent += 1
+                self._publish_detections(detections, frames_processed, frame_time)
 
                 if detections_sent % 10 == 0:
                     logger.info(f"[DETECTION] Processed: {detections_sent} | "
                               f"Inference: {inference_fps:.1f} FPS | "
-                              f"Time: {self.performance_stats['detection_time']:.1f}ms | "
+                              f"Time: {detection_time_ms:.1f}ms | "
                               f"Detections: {len(detections)}")
 
                 # Log GPU stats periodically
@@ -438,7 +451,7 @@ class OrinNanoProductionVision:
                     except (RuntimeError, AttributeError):
                         pass
 
-                self.performance_stats['total_detections'] += len(detections)
+                self.perf_stats.add_detections(len(detections))
 
             except (RuntimeError, cv2.error) as e:
                 logger.error(f"Detection processing error: {e}")
@@ -464,9 +477,10 @@ class OrinNanoProductionVision:
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
 
         # Performance overlay
-        perf_text = (f"Capture: {self.performance_stats['fps']:.1f} FPS | "
-                    f"Inference: {self.performance_stats['inference_fps']:.1f} FPS | "
-                    f"Det: {self.performance_stats['detection_time']:.1f}ms")
+        stats = self.perf_stats.snapshot()
+        perf_text = (f"Capture: {stats['fps']:.1f} FPS | "
+                    f"Inference: {stats['inference_fps']:.1f} FPS | "
+                    f"Det: {stats['detection_time']:.1f}ms")
 
         cv2.putText(annotated_frame, perf_text, (10, 30),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
@@ -491,6 +505,10 @@ class OrinNanoProductionVision:
 
         logger.info(f"Client authenticated successfully: {client_addr}")
 
+        if request_path(websocket) == DETECTION_CHANNEL_PATH:
+            await self._stream_detections(websocket)
+            return
+
         # Check client limit
         with self.client_lock:
             if len(self.connected_clients) >= self.max_clients:
@@ -594,6 +612,77 @@ class OrinNanoProductionVision:
                 client_count = len(self.connected_clients)
             logger.info(f"Client disconnected: {client_addr} (remaining clients: {client_count})")
 
+    def _publish_detections(self, detections: List[Dict], frame_id: int, frame_time: float) -> None:
+        """Hand the latest detections to the detection channel (detection thread)"""
+        with self.detection_queue_lock:
+            self.latest_detections = {
+                'detections': detections,
+                'character_detections': self._extract_character_detections(detections),
+                'frame_id': frame_id,
+                'frame_time': frame_time
+            }
+        if self.loop is not None and self._detection_waiters:
+            try:
+                self.loop.call_soon_threadsafe(self._wake_detection_clients)
+            except RuntimeError:
+                pass  # Loop closed during shutdown
+
+    def _wake_detection_clients(self) -> None:
+        for event in self._detection_waiters:
+            event.set()
+
+    async def _stream_detections(self, websocket) -> None:
+        """Detections-only channel: compact track deltas and periodic keyframes, no image"""
+        client_addr = websocket.remote_address
+        with self.client_lock:
+            if len(self.detection_clients) >= VisionSystemConfig.MAX_DETECTION_CLIENTS:
+                logger.warning(f"Detection channel limit reached. Rejecting: {client_addr}")
+                await websocket.close(code=1013, reason="Server busy")
+                return
+            self.detection_clients.add(websocket)
+
+        logger.info(f"Detection channel client connected: {client_addr}")
+        encoder = DetectionDeltaEncoder(keyframe_interval=VisionSystemConfig.KEYFRAME_INTERVAL)
+        ready = asyncio.Event()
+        self._detection_waiters.add(ready)
+        last_frame_id = None
+
+        try:
+            while self.running:
+                try:
+                    await asyncio.wait_for(ready.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    continue
+                ready.clear()
+
+                with self.detection_queue_lock:
+                    latest = self.latest_detections
+                if latest is None or latest['frame_id'] == last_frame_id:
+                    continue
+                last_frame_id = latest['frame_id']
+
+                message = encoder.encode(latest['detections'], latest['frame_id'],
+                                         latest['frame_time'], latest['character_detections'])
+                if message is not None:
+                    await asyncio.wait_for(
+                        websocket.send(json.dumps(message, separators=(',', ':'))),
+                        timeout=VisionSystemConfig.WS_SEND_TIMEOUT
+                    )
+
+        except asyncio.TimeoutError:
+            logger.error(f"Detection channel send timeout for {client_addr}")
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except Exception as e:
+            logger.error(f"Detection channel error for {client_addr}: {e}")
+        finally:
+            self._detection_waiters.discard(ready)
+            with self.client_lock:
+                self.detection_clients.discard(websocket)
+            logger.info(f"Detection channel client disconnected: {client_addr} "
+                        f"(keyframes: {encoder.stats['keyframes']}, deltas: {encoder.stats['deltas']}, "
+                        f"unchanged frames skipped: {encoder.stats['skipped']})")
+
     def _extract_character_detections(self, detections: List[Dict]) -> List[Dict]:
         """Extract character detections from YOLO results"""
         character_detections = []
@@ -641,16 +730,41 @@ class OrinNanoProductionVision:
             self.loop.run_until_complete(self.loop.shutdown_asyncgens())
             self.loop.close()
 
-    def start(self) -> bool:
-        """Start the vision system"""
+    async def handle_client(self, websocket) -> None:
+        """WebSocket entry point when a host server (the API gateway) accepts the connections"""
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        await self._handle_websocket_stable(websocket)
+
+    def start(self, serve_websocket: bool = True) -> bool:
+        """Start the vision system
+
+        Args:
+            serve_websocket: Run the WebSocket server on this thread until stopped
+                             (False: return once the capture and detection threads
+                             run, a host server calls handle_client)
+        """
         logger.info("=" * 70)
         logger.info("Starting Orin Nano Production Vision System")
         logger.info("=" * 70)
 
-        # Initialize camera
-        if not self._initialize_camera_v4l2():
+        # Open the camera (with warm-up) while a deferred model load runs
+        def open_camera() -> None:
+            if not self._initialize_camera_v4l2():
+                raise RuntimeError(f"cannot open camera device {self.camera_device}")
+
+        startup = StartupOrchestrator('vision')
+        startup.add('camera', open_camera)
+        if self.model_pending:
+            startup.add('yolo_model', self._load_optimized_model, optional=True)
+        try:
+            startup.run_sync()
+        except StartupError:
             logger.error("Failed to initialize camera")
             return False
+        finally:
+            self.model_pending = False
+            self.startup_report = startup.get_status()
 
         if self.model is None:
             logger.warning("YOLO model not available, running camera only")
@@ -691,6 +805,9 @@ class OrinNanoProductionVision:
 
         logger.info("✅ All threads verified and running")
 
+        if not serve_websocket:
+            return True
+
         # Start WebSocket server (runs in main thread)
         try:
             self._run_websocket_server()
@@ -713,7 +830,7 @@ class OrinNanoProductionVision:
 
         # Close all WebSocket connections first
         with self.client_lock:
-            clients_to_close = list(self.connected_clients)
+            clients_to_close = list(self.connected_clients) + list(self.detection_clients)
 
         logger.info(f"Closing {len(clients_to_close)} WebSocket connections...")
         for client in clients_to_close:
@@ -727,6 +844,7 @@ class OrinNanoProductionVision:
 
         with self.client_lock:
             self.connected_clients.clear()
+            self.detection_clients.clear()
         logger.info("✅ All WebSocket connections closed")
 
         # Wait for capture thread (FIX #6: proper join with timeout)
@@ -846,7 +964,8 @@ Examples:
     # Create and start system
     vision_system = OrinNanoProductionVision(
         websocket_port=args.port,
-        camera_device=args.camera
+        camera_device=args.camera,
+        load_model=False  # Loaded in parallel with the camera warm-up
     )
 
     try:
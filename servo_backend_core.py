@@ -11,6 +11,9 @@ import asyncio
 import time
 import logging
 from typing import Dict, List, Optional, Any, Callable
+
+import numpy as np
+
 from servo_base_classes import (
     ServoControllerBase,
     ConnectionStatus,
@@ -22,6 +25,9 @@ from servo_base_classes import (
 from servo_websocket_module import ServoWebSocketHandler, StandardServoMessageHandlers
 from servo_safety_module import ServoSafetySystem
 from servo_config_module import ServoConfigurationManager
+from r2d2_sequence_preflight import (
+    SequencePreflight, PreflightLimits, CompiledSequence, definition_from_commands
+)
 
 # Import existing controllers for compatibility
 try:
@@ -81,6 +87,7 @@ class ServoBackendCore:
         # Sequence management
         self.active_sequences: Dict[str, ServoSequence] = {}
         self.sequence_callbacks: List[Callable] = []
+        self.preflight: Optional[SequencePreflight] = None
 
         # Setup safety system
         self.safety_system.initialize_safety_configs(self.config_manager.get_all_configs())
@@ -128,8 +135,8 @@ class ServoBackendCore:
             logger.error(f"Hardware initialization failed: {e}")
             self.connection_status = ConnectionStatus.ERROR
 
-    async def start_services(self, websocket_port=8767):
-        """Start all backend services"""
+    async def start_services(self, websocket_port=8767, serve_websocket=True):
+        """Start all backend services (serve_websocket=False: the API gateway hosts the WebSocket)"""
         logger.info("🚀 Starting R2D2 Servo Backend Services...")
         self.running = True
 
@@ -138,7 +145,7 @@ class ServoBackendCore:
             self.safety_system.start_monitoring()
 
             # Start WebSocket server
-            await self.websocket_handler.start_server()
+            await self.websocket_handler.start_server(listen=serve_websocket)
 
             # Start background tasks
             asyncio.create_task(self._health_monitoring_loop())
@@ -173,17 +180,52 @@ class ServoBackendCore:
         except Exception as e:
             logger.error(f"Error stopping services: {e}")
 
+    def _preflight_sequence(self, sequence: ServoSequence) -> Optional[CompiledSequence]:
+        """The sequence's validated preflight artifact for the current limits, or None"""
+        try:
+            limits = PreflightLimits.from_servo_safety(self.safety_system)
+            if self.preflight is None or self.preflight.limits.to_dict() != limits.to_dict():
+                self.preflight = SequencePreflight(limits)
+
+            definition = definition_from_commands(sequence.commands, timing='cumulative')
+            artifact = self.preflight.lookup(definition)
+            if artifact is None:
+                # First run of this sequence version: compile once, reuse afterwards
+                artifact = self.preflight.compile(sequence.name, definition, 'ServoBackendCore')
+            return artifact if artifact.ok else None
+        except Exception as e:
+            logger.error(f"Sequence preflight error: {e}")
+            return None
+
+    def _validate_playback(self, sequence: ServoSequence, artifact: CompiledSequence) -> bool:
+        """Checks the artifact cannot make: zones and first moves against the live positions"""
+        live = self.safety_system.live_positions()
+        frames = np.full((len(artifact.frames), len(live)), np.nan)
+        frames[:, artifact.channels] = artifact.frames / 4.0    # Quarter-microseconds -> μs
+
+        first_moves = {}
+        for command in sequence.commands:
+            if command.command_type.value == 'position' and command.channel not in first_moves:
+                first_moves[command.channel] = (command.value, command.duration)
+        return self.safety_system.validate_playback(frames, first_moves)
+
     async def execute_sequence(self, sequence: ServoSequence) -> bool:
         """Execute a servo sequence"""
         try:
             self.active_sequences[sequence.id] = sequence
             logger.info(f"Starting sequence: {sequence.name}")
 
-            # Validate all commands in sequence
-            for command in sequence.commands:
-                if not self.safety_system.validate_command(command):
+            # Validate the whole sequence once (by artifact hash), or command by command
+            artifact = self._preflight_sequence(sequence)
+            if artifact is not None:
+                if not self._validate_playback(sequence, artifact):
                     logger.error(f"Sequence {sequence.name} failed safety validation")
                     return False
+            else:
+                for command in sequence.commands:
+                    if not self.safety_system.validate_command(command):
+                        logger.error(f"Sequence {sequence.name} failed safety validation")
+                        return False
 
             # Execute sequence commands
             for command in sequence.commands:
@@ -194,8 +236,13 @@ class ServoBackendCore:
                 if command.delay > 0:
                     await asyncio.sleep(command.delay)
 
+                if self.safety_system.emergency_stop_active:
+                    logger.error(f"Sequence {sequence.name} stopped: emergency stop active")
+                    break
+
                 # Execute command
                 if command.command_type.value == 'position':
+                    self.safety_system.record_command(command.channel, command.value)
                     success = self.controller.move_servo(
                         command.channel,
                         int(command.value),
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+R2D2 Servo Command Coalescer
+============================
+
+Control-plane coalescing for high-rate WebSocket servo control.
+
+The WebSocket handlers used to execute every incoming message straight
+against the controller, so a slider dragged in the dashboard (or a
+joystick client sending at 100+ Hz) produced one serial write per
+message, and the serial line fell behind the clients. Only the latest
+target of each channel matters, so the handlers now write incoming
+targets into a per-channel latest-value slot, and a fixed-rate control
+tick flushes all dirty channels as one batched write. Serial load stays
+bounded by the tick rate and the number of channels, however fast the
+clients send.
+
+Each submission returns a future that resolves when its tick has been
+written. The result carries the tick id, the write result, and whether
+the target was superseded by a newer one for the same channel before the
+tick (a coalesced message is acknowledged with the tick that carried its
+replacement).
+
+Features:
+- Per-channel latest-value slots
+- Fixed-rate control tick (default 50 Hz), idle ticks do no I/O
+- One batched write per tick
+- Acks with tick ids, sent without blocking the client's message loop
+- clear() drops pending targets (emergency stop)
+
+Usage:
+    coalescer = ServoCommandCoalescer(controller.move_servos_microseconds, rate_hz=50)
+    future = coalescer.submit(channel, microseconds)
+    send_ack_when_flushed(future, websocket, {"type": "servo_response", "channel": channel})
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TICK_RATE_HZ = 50.0
+
+
+@dataclass
+class TickResult:
+    """Outcome of one submitted target"""
+    tick: int                   # Control tick that wrote the channel (0: never written)
+    success: bool
+    superseded: bool = False    # A newer target for the channel replaced this one
+
+
+def per_channel_writer(move: Callable[[int, Any], bool]) -> Callable[[Dict[int, Any]], Dict[int, bool]]:
+    """Batch writer for controllers without a multi-target command (one call per dirty channel)"""
+    def write(targets: Dict[int, Any]) -> Dict[int, bool]:
+        return {channel: bool(move(channel, value)) for channel, value in targets.items()}
+    return write
+
+
+class ServoCommandCoalescer:
+    """Latest-value slot per channel, flushed by a fixed-rate control tick"""
+
+    def __init__(self, write_batch: Callable[[Dict[int, Any]], Dict[int, bool]],
+                 rate_hz: float = DEFAULT_TICK_RATE_HZ):
+        """
+        Args:
+            write_batch: Writes {channel: value} in one go, returns per-channel success
+            rate_hz: Control tick rate
+        """
+        self.write_batch = write_batch
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+
+        self._slots: Dict[int, Tuple[Any, List[asyncio.Future]]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.tick = 0
+
+        self.stats = {
+            'submitted': 0,
+            'coalesced': 0,
+            'ticks': 0,
+            'batches': 0,
+            'channels_written': 0,
+            'write_failures': 0,
+            'cleared': 0,
+            'max_batch': 0,
+            'last_flush_ms': 0.0
+        }
+
+    # ==========================================
+    # SUBMISSION
+    # ==========================================
+
+    def submit(self, channel: int, value: Any) -> asyncio.Future:
+        """
+        Store the latest target for a channel (call from the event loop)
+
+        Starts the control tick on first use. Returns a future resolving to
+        the TickResult of the tick that writes the channel.
+        """
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self.start(loop)
+
+        future = loop.create_future()
+        with self._lock:
+            previous = self._slots.get(channel)
+            futures = previous[1] if previous else []
+            futures.append(future)
+            self._slots[channel] = (value, futures)
+            self.stats['submitted'] += 1
+            if previous:
+                self.stats['coalesced'] += 1
+        return future
+
+    def pending(self) -> Dict[int, Any]:
+        """Targets waiting for the next tick"""
+        with self._lock:
+            return {channel: slot[0] for channel, slot in self._slots.items()}
+
+    def discard(self, channel: int) -> bool:
+        """Drop the pending target of one channel (an immediate command replaces it)"""
+        with self._lock:
+            slot = self._slots.pop(channel, None)
+        if slot is None:
+            return False
+        self._resolve_threadsafe([(future, TickResult(0, False, superseded=True)) for future in slot[1]])
+        return True
+
+    def clear(self) -> int:
+        """Drop all pending targets (emergency stop); their futures resolve unsuccessful"""
+        with self._lock:
+            slots, self._slots = self._slots, {}
+        if not slots:
+            return 0
+        self.stats['cleared'] += len(slots)
+        self._resolve_threadsafe([(future, TickResult(0, False))
+                                  for _, futures in slots.values() for future in futures])
+        logger.info(f"Dropped {len(slots)} pending servo targets")
+        return len(slots)
+
+    # ==========================================
+    # CONTROL TICK
+    # ==========================================
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start the control tick on an event loop"""
+        self._loop = loop or asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._tick_loop())
+        logger.info(f"Servo command coalescer running at {self.rate_hz:.0f} Hz")
+
+    async def stop(self):
+        """Flush what is pending and stop the control tick"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+    async def _tick_loop(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += self.period
+            delay = next_tick - loop.time()
+            if delay < 0:
+                # Fell behind (a slow write), skip the missed ticks instead of bursting
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Servo control tick error: {e}")
+
+    def flush(self) -> Optional[int]:
+        """Write all dirty channels as one batch; returns the tick id, or None when idle"""
+        with self._lock:
+            slots, self._slots = self._slots, {}
+        self.stats['ticks'] += 1
+        if not slots:
+            return None
+
+        self.tick += 1
+        tick = self.tick
+        targets = {channel: slot[0] for channel, slot in slots.items()}
+        start = time.perf_counter()
+        try:
+            results = self.write_batch(targets) or {}
+        except Exception as e:
+            logger.error(f"Batched servo write failed: {e}")
+            results = {}
+
+        self.stats['batches'] += 1
+        self.stats['channels_written'] += len(targets)
+        self.stats['max_batch'] = max(self.stats['max_batch'], len(targets))
+        self.stats['last_flush_ms'] = (time.perf_counter() - start) * 1000
+
+        resolved = []
+        for channel, (_, futures) in slots.items():
+            success = bool(results.get(channel, False))
+            if not success:
+                self.stats['write_failures'] += 1
+            for index, future in enumerate(futures):
+                resolved.append((future, TickResult(tick, success, superseded=index < len(futures) - 1)))
+        self._resolve_threadsafe(resolved)
+        return tick
+
+    def _resolve_threadsafe(self, resolved: List[Tuple[asyncio.Future, TickResult]]):
+        def resolve():
+            for future, result in resolved:
+                if not future.done():
+                    future.set_result(result)
+
+        loop = self._loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is None or running is loop:
+            resolve()
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(resolve)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get coalescer status"""
+        submitted = self.stats['submitted']
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'rate_hz': self.rate_hz,
+            'tick': self.tick,
+            'pending_channels': len(self._slots),
+            'coalescing_ratio': self.stats['coalesced'] / submitted if submitted else 0.0,
+            **self.stats
+        }
+
+
+def send_ack_when_flushed(future: asyncio.Future, websocket, response: Dict[str, Any]):
+    """
+    Send a command ack once its tick has been written
+
+    The ack is the given response plus "success", "tick" and "coalesced".
+    It is sent from a callback, so the client's message loop keeps reading
+    while targets wait for the tick.
+    """
+    def on_done(done: asyncio.Future):
+        result = done.result()
+        ack = dict(response, success=result.success, tick=result.tick, coalesced=result.superseded)
+        task = asyncio.ensure_future(websocket.send(json.dumps(ack)))
+        task.add_done_callback(_log_send_error)
+
+    future.add_done_callback(on_done)
+
+
+def _log_send_error(task: asyncio.Future):
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug(f"Servo ack not delivered: {task.exception()}")
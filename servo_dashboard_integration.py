@@ -49,6 +49,7 @@ from r2d2_servo_backend import (
     ConfigurationManager,
     SafetyMonitor
 )
+from servo_command_coalescer import ServoCommandCoalescer, send_ack_when_flushed
 
 # Configure logging
 logging.basicConfig(
@@ -70,9 +71,16 @@ class ServoDashboardIntegration:
         self.enhanced_controller: Optional[EnhancedMaestroController] = None
         self.servo_backend: Optional[ServoControlBackend] = None
         self.flask_app = Flask(__name__)
+
+        # WebSocket position commands are coalesced per channel and written once per control tick
+        self.coalescer = ServoCommandCoalescer(
+            lambda targets: self.enhanced_controller.move_servos_microseconds(targets))
         CORS(self.flask_app)
 
         # Service state
+        self.connected_clients = set()
+        self.owns_controller = True          # False when attached to a shared controller
+        self._monitor_task: Optional[asyncio.Task] = None
         self.start_time = time.time()
         self.last_status_update = 0
         self.connection_status = "initializing"
@@ -185,6 +193,7 @@ class ServoDashboardIntegration:
         def emergency_stop():
             """Emergency stop all servos"""
             try:
+                self.coalescer.clear()
                 self.enhanced_controller.emergency_stop()
 
                 return jsonify({
@@ -402,31 +411,50 @@ class ServoDashboardIntegration:
         asyncio.set_event_loop(loop)
         loop.run_until_complete(websocket_main())
 
-    async def _start_websocket_server(self, port):
-        """Start WebSocket server for real-time communication"""
-        self.connected_clients = set()
+    async def attach(self, controller: Optional[EnhancedMaestroController] = None):
+        """
+        Prepare the service for hosting by another server (the API gateway)
+
+        The host serves flask_app and calls handle_client for WebSocket
+        clients, so no threads or ports are opened here.
+
+        Args:
+            controller: Shared controller (None: initialize one as start_services does)
+        """
+        if controller is not None:
+            self.enhanced_controller = controller
+            self.owns_controller = False
+            self.connection_status = ("simulation"
+                                      if controller.detection_status == HardwareDetectionStatus.SIMULATION
+                                      else "connected")
+        elif self.enhanced_controller is None:
+            await self._initialize_servo_controller()
+        self.running = True
+        self._monitor_task = asyncio.create_task(self._status_monitoring_loop())
 
-        async def handle_client(websocket, path):
-            """Handle WebSocket client connections"""
-            self.connected_clients.add(websocket)
-            logger.info(f"Dashboard client connected: {websocket.remote_address}")
+    async def handle_client(self, websocket, path):
+        """Handle WebSocket client connections"""
+        self.connected_clients.add(websocket)
+        logger.info(f"Dashboard client connected: {websocket.remote_address}")
 
-            try:
-                # Send initial status
-                await self._send_status_update(websocket)
+        try:
+            # Send initial status
+            await self._send_status_update(websocket)
 
-                async for message in websocket:
-                    await self._handle_websocket_message(websocket, message)
+            async for message in websocket:
+                await self._handle_websocket_message(websocket, message)
 
-            except websockets.exceptions.ConnectionClosed:
-                logger.info("Dashboard client disconnected")
-            except Exception as e:
-                logger.error(f"WebSocket error: {e}")
-            finally:
-                self.connected_clients.discard(websocket)
+        except websockets.exceptions.ConnectionClosed:
+            logger.info("Dashboard client disconnected")
+        except Exception as e:
+            logger.error(f"WebSocket error: {e}")
+        finally:
+            self.connected_clients.discard(websocket)
 
+    async def _start_websocket_server(self, port):
+        """Start WebSocket server for real-time communication"""
         # Start server
-        start_server = websockets.serve(handle_client, "localhost", port)
+        start_server = websockets.serve(self.handle_client, "localhost", port)
         await start_server
         logger.info(f"WebSocket server started on port {port}")
 
@@ -443,6 +471,7 @@ class ServoDashboardIntegration:
             elif msg_type == "sequence_command":
                 await self._handle_sequence_websocket_command(websocket, data)
             elif msg_type == "emergency_stop":
+                self.coalescer.clear()
                 self.enhanced_controller.emergency_stop()
                 await self._broadcast_alert("Emergency stop activated", "error")
             else:
@@ -457,17 +486,14 @@ class ServoDashboardIntegration:
             channel = data["channel"]
             position = data["position"]
 
-            success = self.enhanced_controller.move_servo_microseconds(channel, position)
-
-            response = {
+            # Queue for the next control tick, ack once it is written
+            future = self.coalescer.submit(channel, position)
+            send_ack_when_flushed(future, websocket, {
                 "type": "servo_response",
                 "channel": channel,
                 "position": position,
-                "success": success,
                 "timestamp": time.time()
-            }
-
-            await websocket.send(json.dumps(response))
+            })
 
         except Exception as e:
             await self._send_websocket_error(websocket, f"Servo command error: {e}")
@@ -538,7 +564,7 @@ class ServoDashboardIntegration:
                 await websocket.send(message)
             else:
                 # Broadcast to all clients
-                if hasattr(self, 'connected_clients') and self.connected_clients:
+                if self.connected_clients:
                     for client in self.connected_clients.copy():
                         try:
                             await client.send(message)
@@ -562,7 +588,7 @@ class ServoDashboardIntegration:
 
     async def _broadcast_alert(self, message, level="info"):
         """Broadcast alert to all connected clients"""
-        if hasattr(self, 'connected_clients') and self.connected_clients:
+        if self.connected_clients:
             alert_data = {
                 "type": "alert",
                 "message": message,
@@ -594,7 +620,10 @@ class ServoDashboardIntegration:
 
         self.running = False
 
-        if self.enhanced_controller:
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+
+        if self.enhanced_controller and self.owns_controller:
             self.enhanced_controller.shutdown()
 
         logger.info("✅ Servo Dashboard Integration shutdown complete")
@@ -15,9 +15,16 @@ from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 from servo_base_classes import ServoCommand, ServoSequence, ServoCommandType, MotionType
 from servo_backend_core import ServoBackendCore
+from r2d2_rate_limiter import create_api_rate_limiter, install_flask_rate_limiter
+from r2d2_metrics import install_flask_metrics_endpoint
+from r2d2_status_snapshots import StatusSnapshotService, flask_snapshot_response
 
 logger = logging.getLogger(__name__)
 
+# Safety kernel telemetry that changes with every monitoring cycle
+SAFETY_VOLATILE_KEYS = ('samples_processed', 'detection_latency_p99_ms', 'detection_latency_max_ms',
+                        'evaluation_p99_ms')
+
 class ServoRESTAPI:
     """Lightweight REST API for servo control"""
 
@@ -30,9 +37,54 @@ class ServoRESTAPI:
         self.app.config['SECRET_KEY'] = 'r2d2-servo-api'
         CORS(self.app)
 
+        # Reject runaway clients with 429 before they reach the servo backend
+        self.rate_limiter = create_api_rate_limiter()
+        install_flask_rate_limiter(self.app, self.rate_limiter)
+
+        # Prometheus text (/metrics) and dashboard snapshot (/api/metrics)
+        install_flask_metrics_endpoint(self.app)
+
+        # Status documents are rebuilt at most once a second and served as cached bytes with ETags
+        # (timestamps, uptimes and live kernel counters are left out of the ETag)
+        self.snapshots = StatusSnapshotService(max_age=1.0)
+        self.snapshots.register('status', lambda: {'success': True, 'data': self._build_status()},
+                                volatile=('timestamp', 'uptime'))
+        self.snapshots.register('performance', lambda: {'success': True, 'data': self._build_performance_metrics()},
+                                volatile=('uptime',))
+        self.snapshots.register('safety', lambda: {'success': True, 'data': self._build_safety_status()},
+                                volatile=SAFETY_VOLATILE_KEYS)
+
         # Register routes
         self._register_routes()
 
+    def _build_status(self) -> Dict[str, Any]:
+        return {
+            'timestamp': time.time(),
+            'running': self.backend.running,
+            'connection_status': self.backend.connection_status.value,
+            'health_status': self.backend.health_status.value,
+            'uptime': time.time() - self.backend.start_time,
+            'servo_count': len(self.backend.config_manager.get_all_configs()),
+            'active_sequences': len(self.backend.active_sequences),
+            'emergency_stop': self.backend.safety_system.emergency_stop_active
+        }
+
+    def _build_performance_metrics(self) -> Dict[str, Any]:
+        return {
+            'command_latency_ms': self.backend.performance_metrics.command_latency_ms,
+            'success_rate': self.backend.performance_metrics.success_rate,
+            'total_commands_processed': self.backend.performance_metrics.total_commands_processed,
+            'uptime': time.time() - self.backend.start_time,
+            'connection_status': self.backend.connection_status.value,
+            'health_status': self.backend.health_status.value
+        }
+
+    def _build_safety_status(self) -> Dict[str, Any]:
+        return {
+            'status': self.backend.safety_system.get_safety_status(),
+            'recent_violations': self.backend.safety_system.get_violation_history(limit=50)
+        }
+
     def _register_routes(self):
         """Register all API routes"""
 
@@ -40,19 +92,7 @@ class ServoRESTAPI:
         def get_status():
             """Get system status"""
             try:
-                # Note: This is synchronous, but backend method is async
-                # In production, you'd use async Flask or convert this properly
-                status = {
-                    'timestamp': time.time(),
-                    'running': self.backend.running,
-                    'connection_status': self.backend.connection_status.value,
-                    'health_status': self.backend.health_status.value,
-                    'uptime': time.time() - self.backend.start_time,
-                    'servo_count': len(self.backend.config_manager.get_all_configs()),
-                    'active_sequences': len(self.backend.active_sequences),
-                    'emergency_stop': self.backend.safety_system.emergency_stop_active
-                }
-                return jsonify({'success': True, 'data': status})
+                return flask_snapshot_response(self.snapshots, 'status')
             except Exception as e:
                 logger.error(f"Status API error: {e}")
                 return jsonify({'success': False, 'error': str(e)}), 500
@@ -190,6 +230,7 @@ class ServoRESTAPI:
             """Emergency stop all servos"""
             try:
                 success = self.backend.emergency_stop()
+                self.snapshots.invalidate()
                 return jsonify({
                     'success': success,
                     'timestamp': time.time(),
@@ -235,6 +276,7 @@ class ServoRESTAPI:
             try:
                 data = request.get_json()
                 success = self.backend.config_manager.update_servo_config(channel, **data)
+                self.snapshots.invalidate('status')
 
                 return jsonify({
                     'success': success,
@@ -250,16 +292,7 @@ class ServoRESTAPI:
         def get_safety_status():
             """Get safety system status"""
             try:
-                status = self.backend.safety_system.get_safety_status()
-                violations = self.backend.safety_system.get_violation_history(limit=50)
-
-                return jsonify({
-                    'success': True,
-                    'data': {
-                        'status': status,
-                        'recent_violations': violations
-                    }
-                })
+                return flask_snapshot_response(self.snapshots, 'safety')
 
             except Exception as e:
                 logger.error(f"Safety status API error: {e}")
@@ -270,6 +303,7 @@ class ServoRESTAPI:
             """Reset emergency stop"""
             try:
                 self.backend.safety_system.reset_emergency_stop()
+                self.snapshots.invalidate()
                 return jsonify({
                     'success': True,
                     'message': 'Emergency stop reset',
@@ -284,16 +318,7 @@ class ServoRESTAPI:
         def get_performance_metrics():
             """Get performance metrics"""
             try:
-                metrics = {
-                    'command_latency_ms': self.backend.performance_metrics.command_latency_ms,
-                    'success_rate': self.backend.performance_metrics.success_rate,
-                    'total_commands_processed': self.backend.performance_metrics.total_commands_processed,
-                    'uptime': time.time() - self.backend.start_time,
-                    'connection_status': self.backend.connection_status.value,
-                    'health_status': self.backend.health_status.value
-                }
-
-                return jsonify({'success': True, 'data': metrics})
+                return flask_snapshot_response(self.snapshots, 'performance')
 
             except Exception as e:
                 logger.error(f"Performance metrics API error: {e}")
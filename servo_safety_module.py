@@ -7,10 +7,11 @@ This module provides comprehensive safety monitoring, validation, and
 emergency response capabilities shared across all servo components.
 """
 
+import math
 import time
 import logging
-import threading
-from typing import Dict, List, Set, Optional, Callable, Any
+import numpy as np
+from typing import Dict, List, Set, Optional, Callable, Any, Tuple
 from servo_base_classes import (
     SafetySystemBase,
     ServoCommand,
@@ -19,63 +20,119 @@ from servo_base_classes import (
     SafetyLevel,
     ServoCommandType,
     ServoLimits,
-    validate_servo_position,
     apply_safety_constraints
 )
+from r2d2_collision_table import CollisionTable
+from r2d2_safety_kernel import (
+    SafetyKernel, SafetyEvent, PositionLimitRule, VelocityRule,
+    SEVERITY_CRITICAL, SEVERITY_WARNING, get_safety_kernel
+)
 
 logger = logging.getLogger(__name__)
 
+# Kernel rule names -> violation types recorded by ServoSafetySystem
+KERNEL_VIOLATION_TYPES = {
+    'stale_data': 'stale_position_data',
+}
+
+KERNEL_OWNER = 'servo_safety'
+
+# This module works in μs; the shared safety kernel in quarter-microseconds
+KERNEL_UNITS_PER_US = 4
+
 class ServoSafetySystem(SafetySystemBase):
     """Comprehensive safety system for servo operations"""
 
-    def __init__(self):
+    def __init__(self, kernel: Optional[SafetyKernel] = None):
         super().__init__()
         self.servo_configs: Dict[int, ServoConfiguration] = {}
-        self.position_history: Dict[int, List[Tuple[float, int]]] = {}
         self.velocity_limits: Dict[int, float] = {}
         self.emergency_stop_active = False
         self.safety_zones: Dict[str, Dict[str, Any]] = {}
-        self.monitoring_thread = None
-        self._stop_monitoring = False
+        self.interference_zones: Dict[str, Dict[str, Any]] = {}
+
+        # Zones compiled into per-channel / per-pair bitmaps (μs); each
+        # entry maps back to the zone it came from
+        self.zone_table = CollisionTable(position_range=(0, 4096), resolution=8)
+        self._zone_names: Dict[str, str] = {}
 
         # Safety thresholds
         self.max_velocity = 500  # μs per second
         self.max_acceleration = 1000  # μs per second²
         self.position_tolerance = 50  # μs
-        self.safety_check_interval = 0.1  # seconds
+        self.stale_timeout = 5.0  # seconds without position updates
+
+        # Positions reported through monitor_servo() are evaluated by the
+        # (shared) safety kernel as they arrive; its watchdog flags stale channels
+        self.kernel = kernel or get_safety_kernel()
+        self.kernel.watch_stale(KERNEL_OWNER, self.stale_timeout, SEVERITY_WARNING)
+        self.kernel.add_stop_handler(self._on_kernel_stop, owner=KERNEL_OWNER)
+        self.kernel.add_event_handler(self._on_kernel_event, owner=KERNEL_OWNER)
+        self._kernel_rules = []
 
     def initialize_safety_configs(self, servo_configs: Dict[int, ServoConfiguration]):
         """Initialize safety configurations for all servos"""
         self.servo_configs = servo_configs.copy()
 
-        # Initialize position history for each servo
         for channel in self.servo_configs:
-            self.position_history[channel] = []
             self.velocity_limits[channel] = self.max_velocity
 
+        # (Re)build the kernel rules for the configured channels
+        for rule in self._kernel_rules:
+            self.kernel.remove_rule(rule)
+        self._kernel_rules = [
+            self.kernel.add_rule(PositionLimitRule(
+                {channel: (config.limits.min_position * KERNEL_UNITS_PER_US,
+                           config.limits.max_position * KERNEL_UNITS_PER_US)
+                 for channel, config in self.servo_configs.items()},
+                name='position_limit_exceeded'), owner=KERNEL_OWNER),
+            self.kernel.add_rule(VelocityRule(
+                {channel: limit * KERNEL_UNITS_PER_US for channel, limit in self.velocity_limits.items()},
+                name='velocity_limit_exceeded'), owner=KERNEL_OWNER)
+        ]
+
         logger.info(f"Safety system initialized for {len(self.servo_configs)} servos")
 
     def start_monitoring(self):
-        """Start continuous safety monitoring"""
-        if self.monitoring_thread and self.monitoring_thread.is_alive():
-            return
-
-        self._stop_monitoring = False
+        """Start safety monitoring (evaluated on every monitor_servo() call)"""
         self._monitoring = True
-        self.monitoring_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
-        self.monitoring_thread.start()
         logger.info("Safety monitoring started")
 
     def stop_monitoring(self):
         """Stop safety monitoring"""
-        self._stop_monitoring = True
         self._monitoring = False
-        if self.monitoring_thread:
-            self.monitoring_thread.join(timeout=1)
         logger.info("Safety monitoring stopped")
 
     def validate_command(self, command: ServoCommand) -> bool:
         """Validate servo command against safety rules"""
+        return self.validate_batch([command])
+
+    def validate_batch(self, commands: List[ServoCommand]) -> bool:
+        """
+        Validate commands that are sent together
+
+        Each command is checked on its own, then the safety and interference
+        zones are checked once with every position target applied, so a
+        multi-servo move is judged by where all servos end up.
+        """
+        targets: Dict[int, int] = {}
+        for command in commands:
+            if not self._validate_single(command):
+                return False
+            if command.command_type == ServoCommandType.POSITION:
+                targets[command.channel] = int(command.value)
+
+        if targets:
+            if not self._validate_safety_zones(targets):
+                return False
+            # New targets: restart the kernel's per-channel motion state
+            for channel, position in targets.items():
+                self.record_command(channel, position)
+
+        return True
+
+    def _validate_single(self, command: ServoCommand) -> bool:
+        """Checks that depend on one command only"""
         try:
             channel = command.channel
 
@@ -134,10 +191,6 @@ class ServoSafetySystem(SafetySystemBase):
                 if not self._validate_velocity(channel, safe_position, command.duration):
                     return False
 
-                # Check safety zones
-                if not self._validate_safety_zones(channel, safe_position):
-                    return False
-
             # Validate speed commands
             elif command.command_type == ServoCommandType.SPEED:
                 if not self._validate_speed(channel, command.value):
@@ -167,54 +220,30 @@ class ServoSafetySystem(SafetySystemBase):
             if channel not in self.servo_configs:
                 return False
 
-            config = self.servo_configs[channel]
-            current_time = time.time()
-
-            # Record position in history
-            if channel not in self.position_history:
-                self.position_history[channel] = []
-
-            self.position_history[channel].append((current_time, position))
-
-            # Keep only recent history (last 5 seconds)
-            cutoff_time = current_time - 5.0
-            self.position_history[channel] = [
-                (t, p) for t, p in self.position_history[channel] if t >= cutoff_time
-            ]
-
-            # Check position limits
-            if not validate_servo_position(position, config.limits):
-                self._record_violation(
-                    "position_limit_exceeded",
-                    channel,
-                    "critical",
-                    f"Position {position} exceeds limits",
-                    "emergency_stop_triggered"
-                )
-                self.trigger_emergency_stop()
-                return False
-
-            # Check velocity
-            if len(self.position_history[channel]) >= 2:
-                recent_positions = self.position_history[channel][-2:]
-                dt = recent_positions[1][0] - recent_positions[0][0]
-                if dt > 0:
-                    velocity = abs(recent_positions[1][1] - recent_positions[0][1]) / dt
-                    if velocity > self.velocity_limits.get(channel, self.max_velocity):
-                        self._record_violation(
-                            "velocity_limit_exceeded",
-                            channel,
-                            "warning",
-                            f"Velocity {velocity:.1f} exceeds limit",
-                            "monitoring"
-                        )
-
-            return True
+            # Limits and velocity are evaluated by the kernel on arrival
+            self.kernel.publish_sample({'position': {channel: position * KERNEL_UNITS_PER_US}})
+            return self.kernel.is_active('position_limit_exceeded', channel) is None
 
         except Exception as e:
             logger.error(f"Servo monitoring error: {e}")
             return False
 
+    def _on_kernel_stop(self, event: SafetyEvent):
+        """Critical kernel event: stop before recording it"""
+        self.trigger_emergency_stop()
+
+    def _on_kernel_event(self, event: SafetyEvent):
+        """Record kernel events as violations"""
+        if event.source == 'watchdog' and not self._monitoring:
+            return
+        self._record_violation(
+            KERNEL_VIOLATION_TYPES.get(event.rule, event.rule),
+            event.channel,
+            event.severity,
+            event.message,
+            "emergency_stop_triggered" if event.severity == SEVERITY_CRITICAL else "monitoring"
+        )
+
     def trigger_emergency_stop(self):
         """Trigger emergency stop protocol"""
         self.emergency_stop_active = True
@@ -229,6 +258,9 @@ class ServoSafetySystem(SafetySystemBase):
 
     def reset_emergency_stop(self):
         """Reset emergency stop (requires manual intervention)"""
+        if not self.kernel.reset(KERNEL_OWNER):
+            logger.warning("Emergency stop not reset - safety kernel still latched by another subsystem")
+            return
         self.emergency_stop_active = False
         logger.info("Emergency stop reset")
 
@@ -241,14 +273,52 @@ class ServoSafetySystem(SafetySystemBase):
             'max_position': max_position,
             'active': True
         }
+        self._compile_zones()
         logger.info(f"Safety zone '{name}' added for channels {channels}")
 
     def remove_safety_zone(self, name: str):
         """Remove a safety zone"""
         if name in self.safety_zones:
             del self.safety_zones[name]
+            self._compile_zones()
             logger.info(f"Safety zone '{name}' removed")
 
+    def add_interference_zone(self, name: str, channel_a: int, range_a: Tuple[int, int],
+                              channel_b: int, range_b: Tuple[int, int]):
+        """Forbid two servos from being inside their ranges at the same time"""
+        self.interference_zones[name] = {
+            'channels': [channel_a, channel_b],
+            'ranges': [tuple(range_a), tuple(range_b)],
+            'active': True
+        }
+        self._compile_zones()
+        logger.info(f"Interference zone '{name}' added for channels {channel_a} and {channel_b}")
+
+    def remove_interference_zone(self, name: str):
+        """Remove an interference zone"""
+        if self.interference_zones.pop(name, None) is not None:
+            self._compile_zones()
+            logger.info(f"Interference zone '{name}' removed")
+
+    def _compile_zones(self):
+        """Rebuild the zone table: allowed ranges become forbidden intervals on either side"""
+        self.zone_table.clear()
+        self._zone_names = {}
+        for name, zone in self.safety_zones.items():
+            if not zone.get('active', True):
+                continue
+            below = math.nextafter(zone['min_position'], -math.inf)
+            above = math.nextafter(zone['max_position'], math.inf)
+            for channel in zone['channels']:
+                for side, bounds in (('below', (-math.inf, below)), ('above', (above, math.inf))):
+                    key = f"{name}/{channel}/{side}"
+                    self.zone_table.add_zone(key, {channel: bounds})
+                    self._zone_names[key] = name
+        for name, zone in self.interference_zones.items():
+            if zone.get('active', True):
+                self.zone_table.add_zone(name, dict(zip(zone['channels'], zone['ranges'])))
+                self._zone_names[name] = name
+
     def set_safety_level(self, level: SafetyLevel):
         """Set global safety level"""
         self.safety_level = level
@@ -284,9 +354,11 @@ class ServoSafetySystem(SafetySystemBase):
                 if time.time() - v.timestamp < 300  # Last 5 minutes
             ]),
             'safety_zones': len(self.safety_zones),
+            'interference_zones': len(self.interference_zones),
             'monitored_servos': len(self.servo_configs),
             'velocity_limit': self.max_velocity,
-            'acceleration_limit': self.max_acceleration
+            'acceleration_limit': self.max_acceleration,
+            'kernel': self.kernel.get_status()
         }
 
     def get_violation_history(self, limit: int = 100) -> List[Dict[str, Any]]:
@@ -310,13 +382,23 @@ class ServoSafetySystem(SafetySystemBase):
             for v in recent_violations
         ]
 
+    def record_command(self, channel: int, position: float):
+        """Record a position command (μs) sent to a servo in the safety kernel"""
+        self.kernel.record_command(channel, position * KERNEL_UNITS_PER_US)
+
+    def zone_bounds(self) -> Dict[str, Tuple[Dict[int, Tuple[float, float]], str]]:
+        """Compiled zones in μs: {zone: ({channel: (min, max)}, severity)}"""
+        return dict(self.zone_table.zones)
+
+    def live_positions(self) -> np.ndarray:
+        """Latest reported position per channel in μs (NaN = never reported)"""
+        return self.kernel.state.field('position') / KERNEL_UNITS_PER_US
+
     def _validate_velocity(self, channel: int, target_position: int, duration: float) -> bool:
         """Validate movement velocity"""
-        if not self.position_history.get(channel):
-            return True  # No history to compare
-
-        last_entry = self.position_history[channel][-1]
-        last_position = last_entry[1]
+        last_position = self.kernel.state.value('position', channel) / KERNEL_UNITS_PER_US
+        if math.isnan(last_position):
+            return True  # No position reported yet
 
         if duration <= 0:
             duration = 0.1  # Minimum duration for velocity calculation
@@ -364,25 +446,70 @@ class ServoSafetySystem(SafetySystemBase):
             return False
         return True
 
-    def _validate_safety_zones(self, channel: int, position: int) -> bool:
-        """Validate position against safety zones"""
-        for zone_name, zone in self.safety_zones.items():
-            if not zone.get('active', True):
-                continue
+    def _validate_safety_zones(self, targets: Dict[int, int]) -> bool:
+        """Validate position targets against safety and interference zones"""
+        hits = self.zone_table.check_targets(targets, self.live_positions())
+        if not hits:
+            return True
+        self._reject_zone_hit(hits[0])
+        return False
+
+    def _reject_zone_hit(self, hit):
+        """Record the violation for a zone a command would enter"""
+        zone_name = self._zone_names.get(hit.zone, hit.zone)
+        if zone_name in self.interference_zones:
+            channels = ', '.join(str(c) for c in hit.channels)
+            description = f"Positions {hit.positions} of servos {channels} enter interference zone '{zone_name}'"
+        else:
+            description = f"Position {hit.positions[0]:.0f} violates safety zone '{zone_name}'"
+        self._record_violation(
+            "safety_zone_violation",
+            hit.channels[0] if len(hit.channels) == 1 else -1,
+            "critical",
+            description,
+            "command_rejected"
+        )
 
-            if channel in zone['channels']:
-                if not (zone['min_position'] <= position <= zone['max_position']):
-                    self._record_violation(
-                        "safety_zone_violation",
-                        channel,
-                        "critical",
-                        f"Position {position} violates safety zone '{zone_name}'",
-                        "command_rejected"
-                    )
-                    return False
+    def validate_playback(self, frames, first_moves: Dict[int, Tuple[float, float]]) -> bool:
+        """
+        Checks of a preflighted trajectory that depend on the live positions
+
+        A preflight artifact is compiled without knowing where the servos
+        are, so before it is played the zones are checked over the whole
+        (ticks x channels) table in μs with every other servo at its live
+        position, and the first move of each channel {channel: (target,
+        duration)} for velocity from its live position.
+        """
+        for channel, (target, duration) in first_moves.items():
+            if not self._validate_velocity(channel, target, duration):
+                return False
 
+        hits = self.zone_table.validate_trajectory(np.asarray(frames, dtype=float), self.live_positions())
+        if hits:
+            self._reject_zone_hit(hits[0])
+            return False
         return True
 
+    def validate_trajectory(self, frames, tick_seconds: float) -> List[SafetyEvent]:
+        """
+        Check a (ticks x channels) trajectory table before playback
+
+        Limits and velocity come from the kernel rules; safety and
+        interference zones from the zone table. Nothing is recorded.
+        """
+        events = self.kernel.validate_trajectory(np.asarray(frames, dtype=float) * KERNEL_UNITS_PER_US,
+                                                 tick_seconds)
+        start = self.live_positions()
+        now = time.time()
+        for hit in self.zone_table.validate_trajectory(frames, start):
+            zone_name = self._zone_names.get(hit.zone, hit.zone)
+            events.append(SafetyEvent(
+                'safety_zone_violation', hit.channels[0], SEVERITY_CRITICAL,
+                f"Safety zone '{zone_name}' entered at tick {hit.tick}", None,
+                hit.tick * tick_seconds, now, 'trajectory'))
+        events.sort(key=lambda event: event.sample_time)
+        return events
+
     def _record_violation(self, violation_type: str, channel: int, severity: str,
                          description: str, action_taken: str):
         """Record a safety violation"""
@@ -396,38 +523,9 @@ class ServoSafetySystem(SafetySystemBase):
         )
 
         self._trigger_safety_violation(violation)
+        self._cleanup_old_violations()
         logger.warning(f"Safety violation: {description}")
 
-    def _monitoring_loop(self):
-        """Background monitoring loop"""
-        while not self._stop_monitoring:
-            try:
-                # Perform periodic safety checks
-                self._check_system_health()
-                self._cleanup_old_violations()
-
-                time.sleep(self.safety_check_interval)
-
-            except Exception as e:
-                logger.error(f"Safety monitoring loop error: {e}")
-                time.sleep(1)
-
-    def _check_system_health(self):
-        """Perform system health checks"""
-        current_time = time.time()
-
-        # Check for stale position data
-        for channel, history in self.position_history.items():
-            if history and current_time - history[-1][0] > 5.0:
-                # Position data is stale
-                self._record_violation(
-                    "stale_position_data",
-                    channel,
-                    "warning",
-                    f"No position updates for {current_time - history[-1][0]:.1f} seconds",
-                    "monitoring"
-                )
-
     def _cleanup_old_violations(self):
         """Clean up old violation records"""
         cutoff_time = time.time() - 3600  # Keep 1 hour of history
@@ -21,6 +21,8 @@ from servo_base_classes import (
     ConnectionStatus,
     SystemHealthStatus
 )
+from servo_command_coalescer import ServoCommandCoalescer, per_channel_writer, send_ack_when_flushed
+from r2d2_state_store import StateStore, StatePublisher
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +37,11 @@ class ServoWebSocketHandler(WebSocketHandlerBase):
         self.last_status_broadcast = 0
         self.broadcast_interval = 0.1  # 10 Hz status updates
 
+        # Status callbacks feed a versioned store, clients receive changed fields per topic
+        self.state_store = StateStore('servo_websocket')
+        self.state_publisher = StatePublisher(self.state_store, rate_hz=1.0 / self.broadcast_interval)
+        self.message_handlers['subscribe'] = self.state_publisher.handle_subscribe
+
     def register_message_handler(self, message_type: str, handler: Callable):
         """Register handler for specific message types"""
         self.message_handlers[message_type] = handler
@@ -43,18 +50,25 @@ class ServoWebSocketHandler(WebSocketHandlerBase):
         """Add callback for status updates"""
         self.status_callbacks.append(callback)
 
-    async def start_server(self):
-        """Start the WebSocket server"""
+    async def start_server(self, listen: bool = True):
+        """
+        Start the WebSocket server
+
+        Args:
+            listen: Bind the handler's own port (False: clients arrive through
+                    a host server such as the API gateway calling handle_client)
+        """
         try:
-            self.server = await websockets.serve(
-                self.handle_client,
-                "localhost",
-                self.port,
-                ping_interval=30,
-                ping_timeout=10
-            )
+            if listen:
+                self.server = await websockets.serve(
+                    self.handle_client,
+                    "localhost",
+                    self.port,
+                    ping_interval=30,
+                    ping_timeout=10
+                )
+                logger.info(f"Servo WebSocket server started on port {self.port}")
             self._running = True
-            logger.info(f"Servo WebSocket server started on port {self.port}")
 
             # Start status broadcast task
             asyncio.create_task(self._status_broadcast_loop())
@@ -102,6 +116,7 @@ class ServoWebSocketHandler(WebSocketHandlerBase):
             # Cleanup
             self.clients.discard(websocket)
             self.client_info.pop(websocket, None)
+            self.state_publisher.disconnect(websocket)
 
     async def handle_message(self, websocket, message):
         """Handle incoming WebSocket message"""
@@ -184,28 +199,31 @@ class ServoWebSocketHandler(WebSocketHandlerBase):
             logger.error(f"Failed to send response: {e}")
 
     async def _send_initial_status(self, websocket):
-        """Send initial status to newly connected client"""
+        """Send a state snapshot (all topics) to a newly connected client"""
         try:
-            # Gather status from callbacks
-            status_data = await self._gather_status_data()
-
-            initial_message = {
-                'type': 'initial_status',
-                'timestamp': time.time(),
-                'data': status_data
-            }
-            await websocket.send(json.dumps(initial_message))
+            self._update_state(await self._gather_status_data())
+            await self.state_publisher.connect(websocket)
         except Exception as e:
             logger.error(f"Failed to send initial status: {e}")
 
+    def _update_state(self, status_data: Dict[str, Any]):
+        """Write gathered status into the state store, one topic per top-level section"""
+        server = {}
+        for key, value in status_data.items():
+            if isinstance(value, dict):
+                self.state_store.update(key, value, replace=True)
+            elif key != 'server_time':      # Changes every tick, clients use the delta timestamp
+                server[key] = value
+        self.state_store.update('server', server, replace=True)
+
     async def _status_broadcast_loop(self):
-        """Background task for regular status broadcasts"""
+        """Background task publishing changed status fields to subscribed clients"""
         while self._running:
             try:
                 current_time = time.time()
                 if current_time - self.last_status_broadcast >= self.broadcast_interval:
-                    status_data = await self._gather_status_data()
-                    await self.broadcast_status(status_data)
+                    self._update_state(await self._gather_status_data())
+                    await self.state_publisher.publish()
                     self.last_status_broadcast = current_time
 
                 await asyncio.sleep(0.05)  # 20 Hz loop
@@ -236,6 +254,7 @@ class ServoWebSocketHandler(WebSocketHandlerBase):
         """Get statistics about connected clients"""
         return {
             'total_clients': len(self.clients),
+            'state_publication': self.state_publisher.get_status(),
             'client_details': [
                 {
                     'id': info['id'],
@@ -256,6 +275,10 @@ class StandardServoMessageHandlers:
         self.sequence_engine = sequence_engine
         self.config_manager = config_manager
 
+        # Position commands are coalesced per channel and written once per control tick
+        self.coalescer = ServoCommandCoalescer(per_channel_writer(
+            lambda channel, target: self.servo_controller.move_servo(channel, *target)))
+
     async def handle_servo_command(self, websocket, data):
         """Handle servo movement commands"""
         try:
@@ -286,14 +309,12 @@ class StandardServoMessageHandlers:
                 }))
                 return
 
-            # Execute command
-            success = self.servo_controller.move_servo(channel, position, duration)
-
-            await websocket.send(json.dumps({
+            # Queue for the next control tick, ack once it is written
+            future = self.coalescer.submit(channel, (position, duration))
+            send_ack_when_flushed(future, websocket, {
                 'type': 'command_response',
-                'success': success,
                 'command_id': command.id
-            }))
+            })
 
         except Exception as e:
             logger.error(f"Servo command error: {e}")
@@ -395,6 +416,7 @@ class StandardServoMessageHandlers:
     async def handle_emergency_stop(self, websocket, data):
         """Handle emergency stop commands"""
         try:
+            self.coalescer.clear()
             success = self.servo_controller.emergency_stop()
             await websocket.send(json.dumps({
                 'type': 'emergency_response',
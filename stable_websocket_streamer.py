@@ -12,6 +12,7 @@ import cv2
 import time
 import logging
 from flicker_free_webcam import FlickerFreeWebcam
+from r2d2_state_store import StateStore, StatePublisher
 import signal
 import sys
 
@@ -48,6 +49,10 @@ class StableWebSocketStreamer:
             'total_data_sent': 0
         }
 
+        # Stats are published as "vision_stats" deltas to subscribed clients
+        self.state_store = StateStore('video_streamer')
+        self.state_publisher = StatePublisher(self.state_store)
+
     async def handle_client_connection(self, websocket, path):
         """Handle individual client connections with anti-flicker protection"""
         client_addr = websocket.remote_address
@@ -71,6 +76,9 @@ class StableWebSocketStreamer:
                 'stream_fps': self.target_fps
             }))
 
+            self._update_stats_state()
+            await self.state_publisher.connect(websocket)
+
             # Start frame streaming for this client
             await self._stream_frames_to_client(websocket)
 
@@ -80,6 +88,7 @@ class StableWebSocketStreamer:
             logger.error(f"Client error: {e}")
         finally:
             self.connected_clients.discard(websocket)
+            self.state_publisher.disconnect(websocket)
             self.stream_stats['clients_connected'] = len(self.connected_clients)
             logger.info(f"Client {client_addr} cleaned up. Active clients: {len(self.connected_clients)}")
 
@@ -156,32 +165,19 @@ class StableWebSocketStreamer:
                 logger.error(f"Streaming error: {e}")
                 break
 
+    def _update_stats_state(self):
+        """Write webcam and stream statistics into the state store"""
+        self.state_store.update('vision_stats', {
+            'webcam': self.webcam.get_stats(),
+            'stream': self.stream_stats.copy()
+        }, replace=True)
+
     async def _periodic_stats_broadcast(self):
-        """Broadcast system statistics periodically"""
+        """Publish changed statistics periodically"""
         while self.running:
             try:
-                if self.connected_clients:
-                    stats_message = {
-                        'type': 'system_stats',
-                        'webcam_stats': self.webcam.get_stats(),
-                        'stream_stats': self.stream_stats.copy(),
-                        'timestamp': time.time()
-                    }
-
-                    # Send to all clients
-                    disconnected_clients = []
-                    for client in self.connected_clients.copy():
-                        try:
-                            await client.send(json.dumps(stats_message))
-                        except websockets.exceptions.ConnectionClosed:
-                            disconnected_clients.append(client)
-                        except Exception as e:
-                            logger.error(f"Stats broadcast error: {e}")
-                            disconnected_clients.append(client)
-
-                    # Clean up disconnected clients
-                    for client in disconnected_clients:
-                        self.connected_clients.discard(client)
+                self._update_stats_state()
+                await self.state_publisher.publish()
 
                 await asyncio.sleep(5)  # Broadcast stats every 5 seconds
 
@@ -351,6 +347,7 @@ def create_test_client():
         let ws = null;
         let frameCount = 0;
         let startTime = Date.now();
+        let state = {{}};      // Topics from state_snapshot, kept current by state_delta merge patches
 
         function connect() {{
             if (ws) ws.close();
@@ -393,8 +390,13 @@ def create_test_client():
                     updateStreamStats(data);
                     frameCount++;
                     break;
-                case 'system_stats':
-                    updateSystemStats(data);
+                case 'state_snapshot':
+                    state = data.topics || {{}};
+                    updateSystemStats();
+                    break;
+                case 'state_delta':
+                    state[data.topic] = applyMergePatch(state[data.topic], data.changes);
+                    updateSystemStats();
                     break;
                 case 'connection_status':
                     console.log('Connection status:', data.message);
@@ -417,9 +419,27 @@ def create_test_client():
             }}
         }}
 
-        function updateSystemStats(data) {{
-            // Handle periodic system stats updates
-            updateStreamStats(data);
+        function applyMergePatch(target, patch) {{
+            // JSON merge patch (RFC 7386): null removes a field, objects merge, anything else replaces
+            if (target === null || typeof target !== 'object' || Array.isArray(target)) target = {{}};
+            for (const [key, value] of Object.entries(patch)) {{
+                if (value === null) {{
+                    delete target[key];
+                }} else if (typeof value === 'object' && !Array.isArray(value)) {{
+                    target[key] = applyMergePatch(target[key], value);
+                }} else {{
+                    target[key] = value;
+                }}
+            }}
+            return target;
+        }}
+
+        function updateSystemStats() {{
+            // Periodic stats arrive in the vision_stats topic
+            const stats = state.vision_stats;
+            if (stats) {{
+                updateStreamStats({{stream_stats: stats.stream, webcam_stats: stats.webcam}});
+            }}
         }}
 
         function formatBytes(bytes) {{
@@ -9,6 +9,7 @@ import unittest
 import asyncio
 import sys
 import os
+import threading
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -20,6 +21,7 @@ from r2d2_auth_module import (
     validate_api_token,
     get_current_token
 )
+from r2d2_token_cache import TokenValidationCache
 
 
 class TestAuthenticationTokenManagement(unittest.TestCase):
@@ -325,6 +327,59 @@ class TestSecurityProperties(unittest.TestCase):
             self.assertFalse(auth_manager.validate_token(token.lower()))
 
 
+class TestTokenValidationCache(unittest.TestCase):
+    """Test suite for the lock-free token validation cache"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.flushed = {}
+        self.cache = TokenValidationCache(on_flush=self._on_flush, flush_interval=3600)
+
+    def _on_flush(self, digest, uses, last_used):
+        self.flushed[digest] = self.flushed.get(digest, 0) + uses
+
+    def test_add_and_revoke_swap_snapshot(self):
+        """Test add/revoke publish new snapshots"""
+        self.cache.add("token-a")
+        self.cache.add("token-b")
+        self.assertTrue(self.cache.validate("token-a"))
+
+        self.cache.revoke("token-a")
+        self.assertFalse(self.cache.validate("token-a"))
+        self.assertTrue(self.cache.is_revoked("token-a"))
+        self.assertTrue(self.cache.validate("token-b"))
+
+    def test_per_thread_usage_flush(self):
+        """Test usage counted in several threads is merged without loss"""
+        self.cache.add("token-a")
+
+        def worker():
+            for _ in range(500):
+                self.cache.validate("token-a")
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.cache.flush(), 2000)
+        self.assertEqual(sum(self.flushed.values()), 2000)
+
+        # Second flush has nothing new and dead threads are forgotten
+        self.assertEqual(self.cache.flush(), 0)
+        self.assertEqual(self.cache.get_stats()['tracked_threads'], 0)
+
+    def test_failures_sampled(self):
+        """Test repeated failures are counted but logged once per interval"""
+        with self.assertLogs('r2d2_token_cache', level='WARNING') as logs:
+            for _ in range(50):
+                self.cache.validate("not-a-token")
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertEqual(self.cache.failures.get_counts()['Invalid token'], 50)
+
+
 def run_tests():
     """Run all test suites"""
     # Create test suite
@@ -337,6 +392,7 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestTokenUsageTracking))
     suite.addTests(loader.loadTestsFromTestCase(TestHelperFunctions))
     suite.addTests(loader.loadTestsFromTestCase(TestSecurityProperties))
+    suite.addTests(loader.loadTestsFromTestCase(TestTokenValidationCache))
 
     # Run tests with verbose output
     runner = unittest.TextTestRunner(verbosity=2)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+R2D2 API Gateway Test Suite
+Tests websockets-style handlers on ASGI routes, Flask and FastAPI mounts
+with combined lifespans, WebSocket and REST token checks, and the composed
+R2D2 gateway sharing one servo backend
+"""
+
+import asyncio
+import unittest
+import sys
+import os
+from contextlib import asynccontextmanager
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from flask import Flask, jsonify
+from starlette.websockets import WebSocketDisconnect
+
+from r2d2_api_gateway import APIGateway, create_gateway
+from r2d2_auth_module import auth_manager
+from r2d2_metrics import MetricsRegistry
+
+
+class TestAPIGateway(unittest.TestCase):
+    """Test suite for APIGateway"""
+
+    def test_websockets_style_handlers(self):
+        """Test legacy (websocket, path) and new (websocket) handlers see their own sub-paths"""
+        gateway = APIGateway(require_websocket_auth=False, registry=MetricsRegistry(), require_http_auth=False)
+        finished = []
+
+        async def echo(websocket, path):
+            await websocket.send(f"hello {path} from {websocket.remote_address[0]}")
+            async for message in websocket:
+                await websocket.send(message.upper())
+            finished.append(path)
+
+        async def single(websocket):
+            await websocket.send(websocket.path)
+            await websocket.close(code=1001)
+
+        gateway.add_websocket('/ws/echo', echo)
+        gateway.add_websocket('/ws/single', single)
+
+        with TestClient(gateway.app) as client:
+            with client.websocket_connect('/ws/echo') as ws:
+                self.assertEqual(ws.receive_text(), 'hello / from testclient')
+                ws.send_text('beep')
+                self.assertEqual(ws.receive_text(), 'BEEP')
+            with client.websocket_connect('/ws/single/detections') as ws:
+                self.assertEqual(ws.receive_text(), '/detections')
+                with self.assertRaises(WebSocketDisconnect):
+                    ws.receive_text()
+            self.assertEqual(client.get('/gateway/status').json()['websocket_clients'],
+                             {'/ws/echo': 0, '/ws/single': 0})
+        self.assertEqual(finished, ['/'])
+
+    def test_mounts_and_lifespan(self):
+        """Test Flask and FastAPI apps share the gateway, sub-app lifespans and hooks run in order"""
+        events = []
+        flask_app = Flask(__name__)
+        flask_app.add_url_rule('/api/status', 'status', lambda: jsonify({'app': 'flask'}))
+
+        @asynccontextmanager
+        async def lifespan(app):
+            events.append('wcb start')
+            yield
+            events.append('wcb stop')
+
+        fastapi_app = FastAPI(lifespan=lifespan)
+        fastapi_app.get('/api/wcb/stats')(lambda: {'app': 'fastapi'})
+
+        async def background():
+            try:
+                await asyncio.sleep(3600)
+            finally:
+                events.append('task cancelled')
+
+        gateway = APIGateway(require_websocket_auth=False, registry=MetricsRegistry(), require_http_auth=False)
+        gateway.mount_asgi('', fastapi_app)
+        gateway.mount_wsgi('/servo', flask_app)
+        gateway.add_websocket('/ws/late', lambda websocket: websocket.close())   # Added after the root mount
+        gateway.on_startup(lambda: events.append('servo start'))
+        gateway.on_shutdown(lambda: events.append('servo stop'))
+        gateway.add_background(background)
+
+        with TestClient(gateway.app) as client:
+            self.assertEqual(client.get('/servo/api/status').json(), {'app': 'flask'})
+            self.assertEqual(client.get('/api/wcb/stats').json(), {'app': 'fastapi'})
+            self.assertEqual(client.get('/gateway/status').json()['background_tasks'], 1)
+            with client.websocket_connect('/ws/late') as ws:
+                with self.assertRaises(WebSocketDisconnect):
+                    ws.receive_text()
+        self.assertEqual(events, ['wcb start', 'servo start', 'task cancelled', 'servo stop', 'wcb stop'])
+
+    def test_websocket_auth(self):
+        """Test WebSocket connects need a token in the Authorization header or the query string"""
+        registry = MetricsRegistry()
+        gateway = APIGateway(registry=registry)
+
+        async def greet(websocket, path):
+            await websocket.send('ok')
+
+        gateway.add_websocket('/ws/servo', greet)
+        token = auth_manager.get_primary_token()
+
+        with TestClient(gateway.app) as client:
+            with self.assertRaises(WebSocketDisconnect) as rejected:
+                with client.websocket_connect('/ws/servo') as ws:
+                    ws.receive_text()
+            self.assertEqual(rejected.exception.code, 1008)
+            with client.websocket_connect(f'/ws/servo?token={token}') as ws:
+                self.assertEqual(ws.receive_text(), 'ok')
+            with client.websocket_connect('/ws/servo', headers={'Authorization': f'Bearer {token}'}) as ws:
+                self.assertEqual(ws.receive_text(), 'ok')
+            self.assertEqual(client.get('/metrics').status_code, 401)
+            metrics = client.get('/metrics', headers={'Authorization': f'Bearer {token}'}).text
+
+        self.assertIn('gateway_websocket_connects_total{route="/ws/servo",result="accepted"} 2', metrics)
+        self.assertIn('gateway_websocket_connects_total{route="/ws/servo",result="rejected"} 1', metrics)
+
+    def test_r2d2_gateway(self):
+        """Test the composed gateway serves servo REST and WebSocket, dashboard and WCB from one loop"""
+        gateway = create_gateway(simulation_mode=True)
+        token = auth_manager.get_primary_token()
+        headers = {'Authorization': f'Bearer {token}'}
+
+        with TestClient(gateway.app) as client:
+            status = client.get('/servo/api/status', headers=headers).json()
+            self.assertTrue(status['success'])
+            self.assertTrue(status['data']['running'])
+            self.assertEqual(client.get('/dashboard/api/servo/status', headers=headers).status_code, 200)
+            self.assertEqual(client.get('/api/wcb/stats', headers=headers).json()['api_version'], '1.0.0')
+
+            with client.websocket_connect(f'/ws/servo?token={token}') as ws:
+                snapshot = ws.receive_json()
+                self.assertEqual(snapshot['type'], 'state_snapshot')
+                self.assertEqual(snapshot['topics']['server']['websocket_status'], 'running')
+            with client.websocket_connect('/ws/dashboard', headers=headers) as ws:
+                self.assertEqual(ws.receive_json()['type'], 'servo_status')
+
+            gateway_status = client.get('/gateway/status', headers=headers).json()
+            self.assertEqual(gateway_status['mounts'], {'/servo': 'wsgi', '/dashboard': 'wsgi', '/': 'asgi'})
+        self.assertFalse(gateway.services['servo_core'].running)
+
+    def test_rest_auth(self):
+        """Test the control mounts, metrics and gateway status reject requests without a valid token"""
+        gateway = create_gateway(simulation_mode=True, include_wcb=False)
+        headers = {'Authorization': f'Bearer {auth_manager.get_primary_token()}'}
+
+        with TestClient(gateway.app) as client:
+            for method, path in (('POST', '/dashboard/api/servo/0/move'),
+                                 ('POST', '/dashboard/api/servo/emergency_stop/clear'),
+                                 ('POST', '/servo/api/servo/0/move'),
+                                 ('POST', '/servo/api/safety/reset_emergency'),
+                                 ('GET', '/servo/api/status'),
+                                 ('GET', '/metrics'),
+                                 ('GET', '/api/metrics'),
+                                 ('GET', '/gateway/status')):
+                response = client.request(method, path, json={'position': 1500})
+                self.assertEqual(response.status_code, 401, path)
+                response = client.request(method, path, json={'position': 1500},
+                                          headers={'Authorization': 'Bearer not-a-token'})
+                self.assertEqual(response.status_code, 401, path)
+
+            moved = client.post('/dashboard/api/servo/0/move', json={'position': 1500}, headers=headers)
+            self.assertEqual(moved.status_code, 200)
+            self.assertIn('position', moved.json())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+R2D2 Audio Mixer Test Suite
+Tests sample-accurate cue placement, per-voice gain, ducking, cue
+callbacks, the WAV backend and clock-driven cue timelines
+"""
+
+import unittest
+import tempfile
+import threading
+import wave
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_audio_mixer import SoftwareMixer, NullBackend, WavFileBackend, CueTimeline
+
+RATE = 8000
+
+
+def constant(value, frames, channels=2):
+    return np.full((frames, channels), value, dtype=np.int16)
+
+
+class TestAudioMixer(unittest.TestCase):
+    """Test suite for SoftwareMixer"""
+
+    def setUp(self):
+        self.mixer = SoftwareMixer(sample_rate=RATE, channels=2, block_size=64,
+                                   backend=NullBackend(realtime=False), duck_gain=0.25)
+
+    def tearDown(self):
+        self.mixer.stop()
+
+    def render(self, blocks):
+        return np.concatenate([self.mixer.render_block() for _ in range(blocks)])
+
+    def test_sample_accurate_mixing(self):
+        """Test cues start at their exact frame and voices sum with their gains"""
+        self.mixer.schedule(constant(1000, 100), at=0.0, gain=0.5)
+        self.mixer.schedule(constant(2000, 50), at=90 / RATE)
+        out = self.render(3)[:, 0]
+
+        np.testing.assert_allclose(out[:90], 500, atol=1)
+        np.testing.assert_allclose(out[90:100], 2500, atol=1)       # Overlap, across a block edge
+        np.testing.assert_allclose(out[100:140], 2000, atol=1)
+        np.testing.assert_allclose(out[140:], 0)
+        self.assertAlmostEqual(self.mixer.clock.time(), 192 / RATE)
+        self.assertFalse(self.mixer.is_playing())
+
+    def test_ducking(self):
+        """Test a ducking cue lowers other voices with a ramp and releases them after"""
+        self.mixer.schedule(constant(8000, 640))
+        self.mixer.schedule(constant(1000, 128), at=128 / RATE, duck=True)
+        out = self.render(8)[:, 0].astype(float)
+
+        np.testing.assert_allclose(out[:128], 8000, atol=1)
+        self.assertTrue(np.all(np.diff(out[128:192]) <= 1))          # Ramping down, no step
+        np.testing.assert_allclose(out[192:256], 8000 * 0.25 + 1000, atol=1)
+        np.testing.assert_allclose(out[320:], 8000, atol=1)          # Released after one ramp block
+
+    def test_callbacks_cancel_and_late_cues(self):
+        """Test start/end callbacks report mixer time off the render thread, cancelled cues stay silent and late cues start at once"""
+        events = []
+        threads = []
+
+        def started(cue, mixer_time):
+            events.append(('start', mixer_time))
+            threads.append(threading.current_thread())
+
+        self.render(2)
+        self.mixer.schedule(constant(100, 64), at=0.0, on_start=started,
+                            on_end=lambda cue: events.append(('end', cue.ended_at)))
+        cancelled = self.mixer.schedule(constant(5000, 64), at=140 / RATE)
+        self.mixer.cancel(cancelled)
+        out = self.render(2)[:, 0]
+        self.mixer.wait_callbacks()
+
+        self.assertEqual(events, [('start', 128 / RATE), ('end', 192 / RATE)])
+        self.assertIsNot(threads[0], threading.current_thread())   # Not the render thread
+        self.assertEqual(self.mixer.stats['late_cues'], 1)
+        self.assertEqual(out.max(), 100)
+        self.assertTrue(cancelled.cancelled)
+
+    def test_wav_backend_and_timeline(self):
+        """Test a timeline's audio lands at its offset in the WAV output and actions follow the clock"""
+        path = os.path.join(tempfile.mkdtemp(), 'mix.wav')
+        mixer = SoftwareMixer(sample_rate=RATE, channels=2, block_size=64,
+                              backend=WavFileBackend(path, realtime=True))
+        actions = []
+        timeline = CueTimeline()
+        timeline.add_audio(0.1, constant(3000, 80))
+        timeline.add_action(0.1, lambda: actions.append(mixer.clock.time()))
+        mixer.start()
+        try:
+            start = timeline.start(mixer)
+            timeline.wait(timeout=2.0)
+            mixer.clock.wait_until(start + 0.2, timeout=2.0)
+        finally:
+            mixer.stop()
+
+        with wave.open(path, 'rb') as wav:
+            out = np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2').reshape(-1, 2)[:, 0]
+        first = int(np.argmax(out != 0))
+        self.assertEqual(first, round((start + 0.1) * RATE))
+        self.assertEqual(int(np.count_nonzero(out)), 80)
+        self.assertEqual(len(actions), 1)
+        self.assertGreaterEqual(actions[0], start + 0.1)
+        self.assertLess(actions[0] - (start + 0.1), 0.05)
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
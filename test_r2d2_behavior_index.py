@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+R2D2 Behavior Index Test Suite
+Tests indexed trigger lookup, personality scoring, invalidation and
+rebuilds when the library grows
+"""
+
+import unittest
+import sys
+import os
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_behavior_index import BehaviorIndex
+
+
+class Trait(Enum):
+    CURIOSITY = "curiosity"
+    LOYALTY = "loyalty"
+    PRIDE = "pride"
+
+
+@dataclass
+class Behavior:
+    name: str
+    priority: int
+    environmental_triggers: List[str]
+    required_traits: Dict[Trait, float] = field(default_factory=dict)
+
+
+@dataclass
+class Personality:
+    curiosity: float = 0.8
+    loyalty: float = 0.9
+    pride: float = 0.3
+
+    def get_trait_weight(self, trait: Trait) -> float:
+        return getattr(self, trait.value)
+
+
+class TestBehaviorIndex(unittest.TestCase):
+    """Test suite for BehaviorIndex"""
+
+    def setUp(self):
+        self.behaviors = {
+            'greet': Behavior('greet', 5, ['person'], {Trait.LOYALTY: 0.5}),
+            'investigate': Behavior('investigate', 4, ['person', 'movement'], {Trait.CURIOSITY: 0.7}),
+            'show_off': Behavior('show_off', 9, ['person'], {Trait.PRIDE: 0.6}),
+            'scan': Behavior('scan', 3, ['idle']),
+        }
+        self.index = BehaviorIndex(self.behaviors, list(Trait))
+        self.personality = Personality()
+
+    def test_scores_match_library_rules(self):
+        """Test eligibility and scores equal priority plus twice each required trait"""
+        rows, scores = self.index.scores('person', self.personality)
+        candidates = self.index.candidates('person')
+        self.assertEqual([c.name for c in candidates], ['show_off', 'greet', 'investigate'])
+        eligible = {candidates[r].name: s for r, s in zip(rows, scores)}
+        self.assertEqual(set(eligible), {'greet', 'investigate'})       # Pride too low
+        self.assertAlmostEqual(eligible['greet'], 5 + 2 * 0.9)
+        self.assertAlmostEqual(eligible['investigate'], 4 + 2 * 0.8)
+        self.assertIsNone(self.index.select('unknown', self.personality))
+
+        # Noise is at most 1, so a 1.6 point lead always wins
+        np.random.seed(0)
+        picks = {self.index.select('person', self.personality).name for _ in range(50)}
+        self.assertEqual(picks, {'greet', 'investigate'})
+
+    def test_invalidate_after_personality_change(self):
+        """Test the cached trait vector is reused until invalidated"""
+        self.assertNotIn('show_off', [b.name for b in self._eligible('person')])
+        self.personality.pride = 0.95
+        self.assertNotIn('show_off', [b.name for b in self._eligible('person')])   # Cached
+        self.index.invalidate()
+        self.assertIn('show_off', [b.name for b in self._eligible('person')])
+        self.assertEqual(self.index.select('person', self.personality).name, 'show_off')
+
+    def test_rebuild_when_library_grows(self):
+        """Test new behaviors are indexed and large libraries stay per-trigger"""
+        for i in range(300):
+            self.behaviors[f'idle_{i}'] = Behavior(f'idle_{i}', i % 7, ['idle'],
+                                                   {Trait.CURIOSITY: 0.5} if i % 2 else {})
+        self.behaviors['alarm'] = Behavior('alarm', 10, ['sith'])
+        self.assertEqual(self.index.select('sith', self.personality).name, 'alarm')
+        self.assertEqual(len(self.index.candidates('idle')), 301)
+        self.assertEqual(len(self.index.candidates('person')), 3)
+
+    def _eligible(self, trigger):
+        rows, _ = self.index.scores(trigger, self.personality)
+        candidates = self.index.candidates(trigger)
+        return [candidates[r] for r in rows]
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+R2D2 Behavior Scheduler Test Suite
+Tests priority ordering with aging, cooldown and duplicate handling,
+preemption and the trigger-to-motion latency metric
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+import time
+from dataclasses import dataclass
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_behavior_scheduler import BehaviorScheduler
+from r2d2_metrics import MetricsRegistry
+
+
+@dataclass
+class Behavior:
+    name: str
+    priority: int = 5
+    duration: float = 0.0
+    cooldown_seconds: float = 0.0
+    interruptible: bool = True
+
+
+class TestBehaviorScheduler(unittest.TestCase):
+    """Test suite for BehaviorScheduler"""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.started = []
+
+    def make_scheduler(self, execute=None, **kwargs):
+        async def record(entry):
+            self.started.append(entry.name)
+        return BehaviorScheduler(execute or record, registry=self.registry, **kwargs)
+
+    def test_priority_order_with_aging(self):
+        """Test higher priorities run first and long waits catch up"""
+        scheduler = self.make_scheduler(aging_rate=1.0)
+        scheduler.submit(Behavior('idle', 2), 'idle_timeout')
+        scheduler.submit(Behavior('greet', 5), 'person')
+        scheduler.submit(Behavior('alert', 8), 'sith')
+        self.assertEqual([scheduler._pop().name for _ in range(3)], ['alert', 'greet', 'idle'])
+
+        # A priority-2 entry that waited 10s outranks a fresh priority-5 one
+        old = scheduler.submit(Behavior('idle', 2), 'idle_timeout')
+        scheduler._heap[0] = (scheduler._heap[0][0] - 10.0,) + scheduler._heap[0][1:]
+        scheduler.submit(Behavior('greet', 5), 'person')
+        self.assertIs(scheduler._pop(), old)
+
+    def test_cooldown_and_duplicates(self):
+        """Test cooldowns and pending duplicates are rejected in constant time"""
+        scheduler = self.make_scheduler()
+        self.assertIsNotNone(scheduler.submit(Behavior('greet', 5, cooldown_seconds=60.0), 'person'))
+        self.assertIsNone(scheduler.submit(Behavior('greet', 5), 'person'))
+        upgraded = scheduler.submit(Behavior('greet', 7), 'manual')
+        self.assertIsNotNone(upgraded)
+        self.assertEqual(scheduler.queue_size, 1)
+
+        entry = scheduler._pop()
+        self.assertIs(entry, upgraded)
+        self.assertIsNone(scheduler._pop())              # Superseded entry skipped
+        scheduler._cooldown_until[entry.name] = time.time() + 60.0
+        self.assertIsNone(scheduler.submit(Behavior('greet', 9), 'manual'))
+        self.assertEqual(scheduler.stats['cooling_down'], 1)
+
+    def test_preemption_and_reaction_latency(self):
+        """Test a higher priority preempts an interruptible behavior and its latency is recorded"""
+        preempted = []
+
+        async def scenario():
+            async def execute(entry):
+                self.started.append(entry.name)
+                if entry.name == 'idle':
+                    while not entry.preempt_requested:
+                        await asyncio.sleep(0.005)
+                else:
+                    scheduler.record_first_motion(entry)
+
+            scheduler = self.make_scheduler(execute, preempt=lambda entry: preempted.append(entry.name))
+            runner = asyncio.create_task(scheduler.run())
+            scheduler.submit(Behavior('idle', 2), 'idle_timeout')
+            await asyncio.sleep(0.02)
+            self.assertEqual(scheduler.current.name, 'idle')
+
+            scheduler.submit(Behavior('low', 1), 'person')           # Waits, no preemption
+            self.assertEqual(preempted, [])
+            alert = scheduler.submit(Behavior('alert', 8), 'sith', trigger_time=time.time() - 0.01)
+            await asyncio.sleep(0.05)
+            scheduler.stop()
+            await runner
+            return scheduler, alert
+
+        scheduler, alert = asyncio.run(scenario())
+        self.assertEqual(preempted, ['idle'])
+        self.assertEqual(self.started, ['idle', 'alert', 'low'])
+        self.assertGreaterEqual(alert.reaction_latency, 0.01)
+        self.assertEqual(scheduler.stats['preempted'], 1)
+        histogram = self.registry.get('behavior_trigger_to_motion_seconds')
+        self.assertEqual(histogram.labels('behavior', 'sith').count, 1)
+
+    def test_uninterruptible_and_expired(self):
+        """Test uninterruptible behaviors are not preempted and stale entries are dropped"""
+        preempted = []
+        scheduler = self.make_scheduler(preempt=lambda entry: preempted.append(entry.name), max_age=1.0)
+        scheduler.current = scheduler.submit(Behavior('dance', 3, interruptible=False), 'manual')
+        scheduler._pop()
+        scheduler.submit(Behavior('alert', 8), 'sith')
+        self.assertEqual(preempted, [])
+
+        stale = scheduler.submit(Behavior('greet', 5), 'person')
+        stale.enqueued_at -= 5.0
+        self.assertEqual(scheduler._pop().name, 'alert')
+        self.assertIsNone(scheduler._pop())
+        self.assertEqual(scheduler.stats['expired'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+R2D2 Collision Table Test Suite
+Tests compiled single and pairwise zones, batched target checks and
+trajectory validation
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_collision_table import CollisionTable, forward_fill
+from r2d2_metrics import MetricsRegistry
+from r2d2_safety_kernel import SafetyKernel, CollisionZoneRule, PositionLimitRule
+
+
+class TestCollisionTable(unittest.TestCase):
+    """Test suite for CollisionTable"""
+
+    def setUp(self):
+        self.table = CollisionTable(position_range=(0, 16384), resolution=32)
+        self.table.add_zone("arm_door", {4: (5000, 8000), 10: (4000, 5500)})
+        self.table.add_zone("dome_low", {0: (1500, 2000)}, 'warning')
+        self.positions = np.full(12, 6000.0)
+
+    def test_exact_bounds_despite_quantization(self):
+        """Test positions sharing a cell with a zone edge are judged exactly"""
+        self.assertEqual(self.table.check_targets({0: 2000}, self.positions)[0].zone, "dome_low")
+        self.assertEqual(self.table.check_targets({0: 2001}, self.positions), [])
+        self.assertEqual(self.table.check_targets({0: 1499.5}, self.positions), [])
+
+    def test_pair_checked_jointly(self):
+        """Test a pair zone needs both servos inside, with the batch applied together"""
+        # Door closing while the arm is extended
+        hits = self.table.check_targets({10: 4500}, self.positions)
+        self.assertEqual([hit.zone for hit in hits], ["arm_door"])
+
+        # Stowing the arm in the same batch makes it safe
+        self.assertEqual(self.table.check_targets({10: 4500, 4: 3000}, self.positions), [])
+
+        # Unknown positions never occupy a zone
+        unknown = np.full(12, np.nan)
+        self.assertEqual(self.table.check_targets({10: 4500}, unknown), [])
+
+    def test_trajectory_first_entry(self):
+        """Test trajectory validation reports the first tick each zone is entered"""
+        frames = np.full((100, 12), np.nan)
+        frames[0] = 6000
+        frames[40, 10] = 5000
+        frames[60, 4] = 3000
+
+        hits = self.table.validate_trajectory(frames)
+        self.assertEqual([(hit.zone, hit.tick) for hit in hits], [("arm_door", 40)])
+
+        filled = forward_fill(frames)
+        self.assertEqual(filled[59, 10], 5000)
+        self.assertEqual(filled[99, 4], 3000)
+
+    def test_rejects_zones_over_two_channels(self):
+        """Test zones must cover one channel or a pair"""
+        with self.assertRaises(ValueError):
+            self.table.add_zone("too_big", {1: (0, 1), 2: (0, 1), 3: (0, 1)})
+
+
+class TestKernelBatchValidation(unittest.TestCase):
+    """Test suite for batched commands and trajectories in the safety kernel"""
+
+    def setUp(self):
+        self.kernel = SafetyKernel(channels=12, registry=MetricsRegistry(), name='batch')
+        self.kernel.add_rule(CollisionZoneRule([("arm_door", {4: (5000, 8000), 10: (4000, 5500)}, 'critical')]))
+        self.kernel.add_rule(PositionLimitRule({c: (2000, 8000) for c in range(12)}))
+        self.kernel.publish_sample({'position': {4: 3000, 10: 7000}})
+
+    def test_publish_commands_all_or_nothing(self):
+        """Test a colliding batch is vetoed and none of its targets are recorded"""
+        veto = self.kernel.publish_commands({4: 6000, 10: 4500})
+        self.assertIsNotNone(veto)
+        self.assertEqual(veto.rule, 'collision_zone')
+        self.assertTrue(np.isnan(self.kernel.state.value('target_position', 4)))
+
+        self.assertIsNone(self.kernel.publish_commands({4: 6000, 10: 6000}))
+        self.assertEqual(self.kernel.state.value('target_position', 10), 6000)
+
+    def test_validate_trajectory(self):
+        """Test trajectories are checked against limits and zones from the latest positions"""
+        frames = np.full((20, 12), np.nan)
+        frames[5, 4] = 6000
+        frames[10, 10] = 5000
+        frames[15, 0] = 9000
+
+        events = self.kernel.validate_trajectory(frames, tick_seconds=0.02)
+        self.assertEqual([e.rule for e in events], ['collision_zone', 'position_limit'])
+        self.assertAlmostEqual(events[0].sample_time, 10 * 0.02)
+        self.assertFalse(self.kernel.stopped)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
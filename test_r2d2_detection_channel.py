@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+R2D2 Detection Channel Test Suite
+Tests track deltas, jitter suppression, keyframes, gap resynchronization
+and the decoded character_vision_data view
+"""
+
+import unittest
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_detection_channel import DetectionDeltaEncoder, DetectionDeltaDecoder, MESSAGE_TYPE
+
+
+def person(x, confidence=0.9):
+    return {'class': 'person', 'confidence': confidence, 'bbox': [x, 50.0, x + 100.0, 400.0], 'class_id': 0}
+
+
+class TestDetectionChannel(unittest.TestCase):
+    """Test suite for the detection delta channel"""
+
+    def setUp(self):
+        self.encoder = DetectionDeltaEncoder(keyframe_interval=5)
+        self.decoder = DetectionDeltaDecoder()
+
+    def roundtrip(self, detections, frame_id, characters=None):
+        message = self.encoder.encode(detections, frame_id, 1000.0 + frame_id, characters)
+        if message is None:
+            return None, None
+        message = json.loads(json.dumps(message))
+        return message, self.decoder.apply(message)
+
+    def test_keyframe_then_deltas(self):
+        """Test the first message is a keyframe and later ones carry only changes"""
+        message, view = self.roundtrip([person(100)], 1)
+        self.assertEqual(message['type'], MESSAGE_TYPE)
+        self.assertEqual(message['k'], 1)
+        self.assertNotIn('frame', message)
+        self.assertEqual(len(view['detections']), 1)
+        track_id = view['detections'][0]['track_id']
+
+        # Jitter below tolerance is not sent
+        self.assertEqual(self.roundtrip([person(102, 0.92)], 2), (None, None))
+
+        # A second person appears while the first moves
+        message, view = self.roundtrip([person(140), person(400)], 3)
+        self.assertEqual(message['k'], 0)
+        self.assertEqual(len(message['u']), 2)
+        self.assertEqual(view['changed'], [track_id])
+        self.assertEqual(len(view['added']), 1)
+        self.assertEqual(view['timestamp'], 1003.0)
+
+        # The first leaves
+        message, view = self.roundtrip([person(402)], 4)
+        self.assertEqual(message['u'], [])
+        self.assertEqual(view['removed'], [track_id])
+        self.assertEqual([d['bbox'] for d in view['detections']], [[400, 50, 500, 400]])
+
+    def test_periodic_keyframes(self):
+        """Test a keyframe is sent every keyframe_interval frames even without changes"""
+        kinds = []
+        for frame_id in range(1, 12):
+            message = self.encoder.encode([person(100)], frame_id, float(frame_id))
+            kinds.append(None if message is None else message['k'])
+        self.assertEqual(kinds, [1, None, None, None, None, 1, None, None, None, None, 1])
+        self.assertEqual(self.encoder.stats['skipped'], 8)
+
+    def test_gap_waits_for_keyframe(self):
+        """Test deltas after a lost message are dropped until the next keyframe"""
+        self.roundtrip([person(100)], 1)
+        self.encoder.encode([person(200)], 2, 2.0)                # Lost in transit
+        _, view = self.roundtrip([person(300)], 3)
+        self.assertIsNone(view)
+        self.assertEqual(self.decoder.stats['gaps'], 1)
+
+        self.encoder.force_keyframe()
+        message, view = self.roundtrip([person(300), person(10)], 4)
+        self.assertEqual(message['k'], 1)
+        self.assertTrue(self.decoder.synchronized)
+        self.assertEqual(sorted(d['bbox'][0] for d in view['detections']), [10, 300])
+
+    def test_character_view_and_size(self):
+        """Test character labels survive decoding and messages stay small"""
+        detections = [person(100), {'class': 'chair', 'confidence': 0.7,
+                                    'bbox': [300.0, 300.0, 380.0, 420.0], 'class_id': 56}]
+        characters = [{'name': 'Luke', 'character': 'Jedi', 'confidence': 0.9,
+                       'bbox': detections[0]['bbox']}]
+        message, view = self.roundtrip(detections, 1, characters)
+        self.assertEqual(len(view['character_detections']), 1)
+        self.assertEqual(view['character_detections'][0]['character'], 'Jedi')
+        self.assertEqual({d['class'] for d in view['detections']}, {'person', 'chair'})
+        self.assertLess(len(json.dumps(message, separators=(',', ':'))), 200)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
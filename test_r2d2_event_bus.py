@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+R2D2 Event Bus Test Suite
+Tests typed publish/subscribe, bounded queues, thread-to-asyncio delivery,
+trigger-to-action latency, the shared-memory transport and the WebSocket
+bridge token check
+"""
+
+import unittest
+import asyncio
+import socket
+import threading
+import time
+import uuid
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_metrics import MetricsRegistry
+from r2d2_event_bus import (
+    EventBus, SharedMemoryTransport, WebSocketBridge, BusEvent, BehaviorRequested, EnvironmentUpdate,
+    ActionStarted, EmergencyStop
+)
+
+
+class TestEventBus(unittest.TestCase):
+    """Test suite for EventBus"""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.bus = EventBus('test', registry=self.registry)
+
+    def tearDown(self):
+        self.bus.close()
+
+    def test_typed_publish_and_wildcard(self):
+        """Test events reach topic and wildcard subscribers by reference"""
+        requests = self.bus.subscribe(BehaviorRequested)
+        everything = self.bus.subscribe('*')
+        stops = self.bus.subscribe(EmergencyStop)
+
+        event = BehaviorRequested(behavior_name='happy_greeting', source='dashboard')
+        self.assertEqual(self.bus.publish(event), 2)
+        self.assertIs(requests.get_nowait(), event)
+        self.assertIs(everything.get_nowait(), event)
+        self.assertIsNone(stops.get_nowait())
+
+        with self.assertRaises(TypeError):
+            self.bus.publish(BusEvent())
+
+        requests.close()
+        self.assertEqual(self.bus.publish(BehaviorRequested(behavior_name='scan')), 1)
+
+    def test_bounded_queue_drops_oldest(self):
+        """Test a full subscriber loses its oldest events and the loss is counted"""
+        requests = self.bus.subscribe(BehaviorRequested, maxsize=3)
+        for i in range(5):
+            self.bus.publish(BehaviorRequested(behavior_name=f"b{i}"))
+        self.assertEqual([requests.get_nowait().behavior_name for _ in range(3)], ['b2', 'b3', 'b4'])
+        self.assertEqual(requests.dropped, 2)
+        self.assertEqual(self.bus.stats['dropped'], 2)
+        dropped = self.registry.counter('bus_events_dropped_total', '', ('bus', 'topic'))
+        self.assertEqual(dropped.labels('test', 'behavior.requested').get(), 2)
+
+    def test_thread_publisher_to_asyncio_consumer(self):
+        """Test publishing from a thread wakes an asyncio consumer that records the action"""
+        actions = self.bus.subscribe(ActionStarted)
+
+        async def consume():
+            requests = self.bus.subscribe(BehaviorRequested)
+            threading.Thread(target=lambda: (
+                time.sleep(0.05),
+                self.bus.publish(BehaviorRequested(behavior_name='dance', trigger_time=time.time() - 0.01))
+            )).start()
+            event = await asyncio.wait_for(requests.get(), 2.0)
+            return self.bus.record_action(event.behavior_name, event.trigger_time, 'motion')
+
+        latency = asyncio.run(consume())
+        self.assertGreaterEqual(latency, 0.01)
+        action = actions.wait(timeout=1.0)
+        self.assertEqual((action.name, action.kind), ('dance', 'motion'))
+        self.assertAlmostEqual(action.latency, latency)
+        histogram = self.registry.histogram('trigger_to_action_seconds', '', ('bus', 'kind'))
+        self.assertEqual(histogram.labels('test', 'motion').count, 1)
+        self.assertEqual(self.bus.get_status()['trigger_to_action']['motion']['count'], 1)
+
+    def test_shared_memory_transport(self):
+        """Test events cross a shared-memory ring between two buses and are not echoed"""
+        name = f"r2d2_bus_test_{uuid.uuid4().hex[:8]}"
+        other = EventBus('other', registry=self.registry)
+        try:
+            self.bus.add_transport(SharedMemoryTransport(name, topics=[EnvironmentUpdate], slots=8))
+            other.add_transport(SharedMemoryTransport(name, topics=[EnvironmentUpdate], slots=8))
+            received = other.subscribe(EnvironmentUpdate)
+            echoed = self.bus.subscribe(EnvironmentUpdate)
+
+            self.bus.publish(EnvironmentUpdate(behavioral_triggers=[
+                {'trigger_type': 'character_recognition',
+                 'environmental_context': {'character_type': 'Sith Lord'}},
+                {'trigger_type': 'person_greeting', 'environmental_context': {}}
+            ]))
+            self.bus.publish(BehaviorRequested(behavior_name='local_only'))
+
+            event = received.wait(timeout=2.0)
+            self.assertIsNotNone(event)
+            self.assertEqual(event.trigger_values(), ['sith_recognized', 'person_detected'])
+            self.assertIsNotNone(echoed.get_nowait())         # The local delivery
+            time.sleep(0.05)
+            self.assertIsNone(echoed.get_nowait())            # Not delivered back from the ring
+            self.assertEqual(other.stats['received'], 1)
+        finally:
+            other.close()
+            self.bus.close()
+        self.assertFalse(os.path.exists(os.path.join(SharedMemoryTransport.SEGMENT_DIR, name)))
+
+    def test_websocket_bridge_requires_token(self):
+        """Test the bridge closes peers without a valid token and bridges events for authenticated ones"""
+        with socket.socket() as probe:
+            probe.bind(('localhost', 0))
+            port = probe.getsockname()[1]
+        server = self.bus.add_transport(WebSocketBridge(topics=[BehaviorRequested], name='server'))
+        intruder = WebSocketBridge(topics=[BehaviorRequested], name='intruder', token='not-a-token')
+        peer_bus = EventBus('peer', registry=self.registry)
+        peer = peer_bus.add_transport(WebSocketBridge(topics=[BehaviorRequested], name='peer'))
+        received = peer_bus.subscribe(BehaviorRequested)
+
+        async def scenario():
+            serving = asyncio.create_task(server.serve('localhost', port))
+            await asyncio.sleep(0.2)
+            rejected = asyncio.create_task(intruder.connect(f"ws://localhost:{port}", retry_seconds=10.0))
+            await asyncio.sleep(0.2)
+            self.assertEqual(server._peers, {})
+            self.assertEqual(server.stats['errors'], 1)
+
+            connected = asyncio.create_task(peer.connect(f"ws://localhost:{port}", retry_seconds=0.1))
+            for _ in range(50):
+                if server._peers:
+                    break
+                await asyncio.sleep(0.02)
+            self.bus.publish(BehaviorRequested(behavior_name='remote_greeting'))
+            event = await asyncio.wait_for(received.get(), timeout=2.0)
+
+            for bridge, task in ((intruder, rejected), (peer, connected), (server, serving)):
+                bridge.stop()
+                task.cancel()
+            await asyncio.gather(rejected, connected, serving, return_exceptions=True)
+            return event
+
+        try:
+            self.assertEqual(asyncio.run(scenario()).behavior_name, 'remote_greeting')
+        finally:
+            peer_bus.close()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -35,6 +35,8 @@ sys.path.append('/home/rolo/r2ai')
 
 from r2d2_logging_framework import (
     R2D2StructuredFormatter,
+    R2D2LogPipeline,
+    R2D2BinaryLogHandler,
     PerformanceLogger,
     WebSocketEventLogger,
     VisionSystemLogger,
@@ -422,6 +424,41 @@ class TestVisionSystemLogger(unittest.TestCase):
         self.assertGreater(summary["success_rate"], 80)
         self.assertGreater(summary["avg_processing_time_seconds"], 0.03)
 
+    def test_normal_frames_sampled(self):
+        """Test only the first frame and anomalies are logged individually"""
+        for i in range(100):
+            self.vision_logger.log_frame_processing(f"frame_{i:03d}", 0.02, (640, 480), [])
+        self.vision_logger.log_frame_processing("slow_frame", 0.5, (640, 480), [])
+        self.vision_logger.log_frame_processing(
+            "bad_frame", 0.02, (640, 480), [{"class": "person", "confidence": 1.7}])
+
+        frame_ids = [r.frame_id for r in self.log_records
+                     if getattr(r, 'event_type', None) == "frame_processed"]
+        self.assertEqual(frame_ids, ["frame_000", "slow_frame", "bad_frame"])
+        self.assertEqual(self.vision_logger.frame_stats["anomalies"], 2)
+
+    def test_interval_summary(self):
+        """Test aggregated summaries are emitted every summary_interval"""
+        vision_logger = VisionSystemLogger(self.logger, summary_interval=0.0)
+        vision_logger.log_frame_processing("frame_001", 0.03, (640, 480), [])
+
+        summaries = [r for r in self.log_records
+                     if getattr(r, 'event_type', None) == "frame_processing_summary"]
+        self.assertEqual(len(summaries), 1)
+        self.assertEqual(summaries[0].frames, 1)
+        self.assertIn("p95", summaries[0].processing_time_seconds)
+
+    def test_histogram_percentiles(self):
+        """Test percentiles come from the histogram within bucket precision"""
+        for i in range(1, 1001):
+            self.vision_logger.log_frame_processing(f"frame_{i}", i / 10000.0, (640, 480), [])
+
+        summary = self.vision_logger.get_performance_summary()
+        self.assertAlmostEqual(summary["p50_processing_time_seconds"], 0.05, delta=0.002)
+        self.assertAlmostEqual(summary["p95_processing_time_seconds"], 0.095, delta=0.003)
+        self.assertAlmostEqual(summary["p99_processing_time_seconds"], 0.099, delta=0.003)
+        self.assertEqual(summary["max_processing_time_seconds"], 0.1)
+
 class TestR2D2LoggerFactory(unittest.TestCase):
     """Test the logger factory"""
 
@@ -477,6 +514,7 @@ class TestR2D2LoggerFactory(unittest.TestCase):
 
         # Log a test message
         logger.info("Test log message")
+        components["log_pipeline"].flush()
 
         # Check log files exist
         log_file = Path(self.temp_dir) / "file_test_service.log"
@@ -586,6 +624,7 @@ class TestIntegrationScenarios(unittest.TestCase):
 
         ws_logger.log_message("dashboard_client", "sent", "vision_data", 2048, 0.002)
         ws_logger.log_connection("dashboard_client", "127.0.0.1", "disconnected")
+        components["log_pipeline"].flush()
 
         # Verify log files were created and contain expected content
         log_file = Path(self.temp_dir) / "vision_integration_test.log"
@@ -620,6 +659,7 @@ class TestIntegrationScenarios(unittest.TestCase):
         # Wait for all threads
         for thread in threads:
             thread.join()
+        components["log_pipeline"].flush()
 
         # Verify all messages were logged (allow for logger initialization message)
         log_file = Path(self.temp_dir) / "concurrent_test.log"
@@ -628,6 +668,101 @@ class TestIntegrationScenarios(unittest.TestCase):
             # Should have 50 worker messages + 1 initialization message
             self.assertGreaterEqual(len(lines), 50)  # At least 50 messages logged
 
+class TestAsyncLogPipeline(unittest.TestCase):
+    """Test the queue-based non-blocking log pipeline"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _record(self, message):
+        return logging.LogRecord("pipeline_test", logging.INFO, "/test/path.py", 1,
+                                 message, None, None)
+
+    def test_batched_writes(self):
+        """Test records are written by the listener in batches"""
+        from r2d2_logging_framework import BatchedRotatingFileHandler
+        log_file = Path(self.temp_dir) / "batch.log"
+        handler = BatchedRotatingFileHandler(log_file, encoding='utf-8')
+        handler.setFormatter(R2D2StructuredFormatter("batch", include_system_info=False))
+        pipeline = R2D2LogPipeline([handler], queue_size=1000)
+
+        for i in range(200):
+            pipeline.queue_handler.handle(self._record(f"message {i}"))
+        self.assertTrue(pipeline.flush())
+        pipeline.stop()
+
+        lines = log_file.read_text().strip().split('\n')
+        self.assertEqual(len(lines), 200)
+        self.assertEqual(json.loads(lines[-1])["message"], "message 199")
+
+    def test_drop_and_count_when_full(self):
+        """Test a full queue drops records instead of blocking the caller"""
+        blocker = threading.Event()
+
+        class SlowHandler(logging.Handler):
+            def emit(self, record):
+                blocker.wait(5)
+
+        pipeline = R2D2LogPipeline([SlowHandler()], queue_size=10, batch_size=1)
+        start = time.time()
+        for i in range(100):
+            pipeline.queue_handler.handle(self._record(f"message {i}"))
+        elapsed = time.time() - start
+        blocker.set()
+        pipeline.stop()
+
+        self.assertLess(elapsed, 1.0)
+        self.assertGreater(pipeline.dropped, 0)
+
+    def test_binary_log_roundtrip(self):
+        """Test the binary log format can be read back"""
+        from r2d2_log_reader import read_binary_log
+        log_file = Path(self.temp_dir) / "binary.r2log"
+        handler = R2D2BinaryLogHandler(log_file, "binary_test")
+        handler.emit_batch([self._record("first"), self._record("second")])
+        handler.close()
+
+        entries = list(read_binary_log(log_file))
+        self.assertEqual([e["message"] for e in entries], ["first", "second"])
+        self.assertEqual(entries[0]["service"], "binary_test")
+
+    def _rolled_files(self, log_file, count):
+        """Backups oldest first, then the current file"""
+        backups = [Path(f"{log_file}.{i}") for i in range(count, 0, -1)]
+        return [path for path in backups if path.exists()] + [log_file]
+
+    def test_binary_log_rollover(self):
+        """Test no batch is lost when a batch triggers a rollover"""
+        from r2d2_log_reader import read_binary_log
+        log_file = Path(self.temp_dir) / "rolling.r2log"
+        handler = R2D2BinaryLogHandler(log_file, "rollover_test", maxBytes=600, backupCount=10)
+        for i in range(6):
+            handler.emit_batch([self._record(f"batch {i}")])
+        handler.close()
+
+        files = self._rolled_files(log_file, 10)
+        self.assertGreater(len(files), 1)
+        messages = [e["message"] for path in files for e in read_binary_log(path)]
+        self.assertEqual(messages, [f"batch {i}" for i in range(6)])
+
+    def test_text_log_rollover(self):
+        """Test the batched text handler reopens its file after a delayed-open rollover"""
+        from r2d2_logging_framework import BatchedRotatingFileHandler
+        log_file = Path(self.temp_dir) / "rolling.log"
+        handler = BatchedRotatingFileHandler(log_file, maxBytes=400, backupCount=10, delay=True)
+        handler.setFormatter(R2D2StructuredFormatter("rollover", include_system_info=False))
+        for i in range(4):
+            handler.emit_batch([self._record(f"batch {i}")])
+        handler.close()
+
+        files = self._rolled_files(log_file, 10)
+        self.assertGreater(len(files), 1)
+        messages = [json.loads(line)["message"] for path in files for line in path.read_text().splitlines()]
+        self.assertEqual(messages, [f"batch {i}" for i in range(4)])
+
 if __name__ == "__main__":
     # Set up test environment
     print("🧪 Running R2D2 Logging Framework Tests")
@@ -644,7 +779,8 @@ if __name__ == "__main__":
         TestVisionSystemLogger,
         TestR2D2LoggerFactory,
         TestLogAnalyzer,
-        TestIntegrationScenarios
+        TestIntegrationScenarios,
+        TestAsyncLogPipeline
     ]
 
     for test_case in test_cases:
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+R2D2 Maestro Script Deployment Test Suite
+Tests script image packing, the UscCmd upload, validated serial triggers,
+manifest reuse of a deployed image and the engine's onboard checks
+"""
+
+import unittest
+import tempfile
+import shutil
+import stat
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_maestro_script_deploy import (ScriptImageBuilder, MaestroScriptUploader, MaestroScriptDeployment,
+                                        estimate_size)
+from r2d2_maestro_script_engine import ScriptEngine
+from r2d2_sequence_preflight import PreflightLimits
+from r2d2_safety_kernel import SEVERITY_CRITICAL
+from pololu_maestro_controller import PololuMaestroController, MaestroCommand
+
+
+def sequence(name, targets, helpers=0):
+    """Script source of a sequence: one servo target per line, plus empty helper subroutines"""
+    lines = [f"sub {name}"] + [f"  {target} 0 servo" for target in targets] + ["  quit"]
+    for index in range(helpers):
+        lines += [f"sub {name}_part{index}", "  return"]
+    return "\n".join(lines) + "\n"
+
+
+class RecordingController:
+    def __init__(self):
+        self.commands = []
+        self.running = False
+
+    def restart_script_at_subroutine(self, subroutine, parameter=None):
+        self.commands.append(('restart', subroutine, parameter))
+        return True
+
+    def stop_script(self):
+        self.commands.append(('stop',))
+
+    def is_script_running(self):
+        return self.running
+
+
+class TestMaestroScriptDeploy(unittest.TestCase):
+    """Test suite for Maestro script deployment"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.manifest = os.path.join(self.directory, 'image.json')
+        self.log = os.path.join(self.directory, 'usccmd.log')
+        self.program = os.path.join(self.directory, 'program.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def usccmd(self, exit_code=0):
+        """Fake UscCmd that logs its arguments and keeps the program it was given"""
+        path = os.path.join(self.directory, 'UscCmd')
+        with open(path, 'w') as f:
+            f.write(f'#!/bin/sh\necho "$@" >> {self.log}\n'
+                    f'if [ "$1" = "--program" ]; then cat "$2" > {self.program}; fi\nexit {exit_code}\n')
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        return MaestroScriptUploader(command=path, script_memory_bytes=1024)
+
+    def build(self):
+        builder = ScriptImageBuilder(budget_bytes=120)
+        self.assertTrue(builder.add('dome_scan', sequence('dome_scan', [6000] * 4, helpers=2), 8.0))
+        self.assertTrue(builder.add('panel_flutter', sequence('panel_flutter', [4000] * 3), 3.0))
+        self.assertFalse(builder.add('curiosity', sequence('curiosity', [5000] * 10), 10.0))    # Over budget
+        self.assertTrue(builder.add('wave', sequence('wave', [7000]), 1.0))
+        return builder.build()
+
+    def test_image_packing(self):
+        """Test subroutine numbering follows the sub declarations and oversize sequences are skipped"""
+        self.assertEqual(estimate_size("sub a\n  6000 0 servo  # target\n  20 delay\n  goto a_start\n  quit\n"),
+                         7 + 4 + 3 + 1)
+        image = self.build()
+        self.assertEqual(image.subroutines, {'dome_scan': 0, 'panel_flutter': 3, 'wave': 4})
+        self.assertEqual(image.skipped, ['curiosity'])
+        self.assertEqual(image.size, 1 + (4 * 7 + 1 + 2) + (3 * 7 + 1) + (7 + 1))
+        self.assertTrue(image.source.split('\n', 2)[1] == 'quit')      # Plain restart does nothing
+        self.assertNotIn('curiosity', image.source)
+
+        builder = ScriptImageBuilder()
+        builder.add('wave', sequence('wave', [6000]))
+        with self.assertRaises(ValueError):
+            builder.add('wave', sequence('wave', [6000]))
+        with self.assertRaises(ValueError):
+            builder.add('wave2', sequence('wave', [6000]))             # Same subroutine name
+        with self.assertRaises(ValueError):
+            builder.add('loose', "  6000 0 servo\n")
+
+    def test_upload(self):
+        """Test the upload compiles the source with UscCmd and leaves the script stopped"""
+        image = self.build()
+        self.usccmd().upload(image)
+        with open(self.log) as f:
+            calls = [line.split() for line in f.read().splitlines()]
+        self.assertEqual([call[0] for call in calls], ['--program', '--stop'])
+        with open(self.program) as f:
+            self.assertEqual(f.read(), image.source)
+
+        deployment = MaestroScriptDeployment(RecordingController(), self.usccmd(exit_code=1), None)
+        self.assertFalse(deployment.deploy(image))                        # Failed compile or load
+
+    def test_triggers_and_manifest(self):
+        """Test triggers send the subroutine number after validation, and the manifest without an uploader"""
+        controller = RecordingController()
+        allowed = {'panel_flutter', 'wave'}
+        deployment = MaestroScriptDeployment(controller, self.usccmd(), self.manifest,
+                                             validator=lambda name: name in allowed)
+        image = self.build()
+        self.assertTrue(deployment.deploy(image))
+        self.assertTrue(deployment.trigger('panel_flutter'))
+        self.assertTrue(deployment.trigger('wave', parameter=500))
+        self.assertFalse(deployment.trigger('curiosity'))                # Streams from the host
+        self.assertFalse(deployment.trigger('dome_scan'))                # Fails validation
+        deployment.stop()
+        self.assertEqual(controller.commands, [('restart', 3, None), ('restart', 4, 500), ('stop',)])
+        self.assertEqual(deployment.stats['trigger_bytes'], 6)
+        self.assertEqual(deployment.stats['rejected'], 1)
+
+        restarted = MaestroScriptDeployment(controller, uploader=None, manifest_path=self.manifest)
+        self.assertIn('dome_scan', restarted)
+        self.assertTrue(restarted.deploy(self.build()))                  # Same image, no upload possible
+        self.assertEqual(restarted.stats['uploads'], 0)
+        self.assertEqual(restarted.image.durations['dome_scan'], 8.0)
+        self.assertFalse(restarted.deploy(self.build(), force=True))
+
+        # With an uploader the image is always uploaded
+        uploading = MaestroScriptDeployment(controller, self.usccmd(), self.manifest)
+        self.assertTrue(uploading.deploy(self.build()))
+        self.assertEqual(uploading.stats['uploads'], 1)
+
+    def test_engine_onboard_checks(self):
+        """Test onboard playback is opt-in, and targets and preflight are checked before upload and trigger"""
+        controller = PololuMaestroController(simulation_mode=True)
+        engines = []
+        try:
+            engine = ScriptEngine(controller)
+            engines.append(engine)
+            self.assertIsNone(engine.deploy_onboard(uploader=self.usccmd()))    # Disabled by default
+            self.assertFalse(os.path.exists(self.log))
+
+            limits = PreflightLimits(position_limits={1: (4000.0, 8000.0)}, max_velocity=600.0,
+                                     velocity_severity=SEVERITY_CRITICAL, channels=[1])
+            engine = ScriptEngine(controller, onboard_playback=True, preflight_limits=limits)
+            engines.append(engine)
+            for name, end in (('nod', 6400), ('overreach', 9000)):
+                engine.create_custom_sequence(name, name, {
+                    'duration': 2.0, 'fps': 10, 'tracks': [{'channel': 1, 'name': 'Head Tilt', 'keyframes': [
+                        {'time': 0.0, 'position': 6000}, {'time': 2.0, 'position': end,
+                                                          'interpolation': 'linear'}]}]})
+            engine.deployment = MaestroScriptDeployment(controller, manifest_path=None)
+            image = engine.deploy_onboard(['nod', 'overreach'], uploader=self.usccmd())
+            self.assertEqual(list(image.subroutines), ['nod'])
+            self.assertEqual(image.skipped, ['overreach'])                     # Beyond servo 1's limits
+
+            # The ramp starts from the live position
+            live = {1: 1500.0}
+            with mock.patch.object(controller, 'get_servo_position_microseconds',
+                                   side_effect=lambda channel: live.get(channel)), \
+                    mock.patch.object(controller, '_send_command', return_value=b'') as send:
+                self.assertTrue(engine.deployment.trigger('nod'))
+                live[1] = 2000.0                                               # 8000 -> 6380 in 1.9 s
+                self.assertFalse(engine.deployment.trigger('nod'))
+            self.assertEqual([c.args for c in send.call_args_list],
+                             [(MaestroCommand.RESTART_SCRIPT_AT_SUBROUTINE.value, 0)])
+        finally:
+            for engine in engines:
+                engine.shutdown()
+            controller.shutdown()
+
+    def test_controller_script_commands(self):
+        """Test the serial script commands of the Maestro controller"""
+        controller = PololuMaestroController(simulation_mode=True)
+        try:
+            with mock.patch.object(controller, '_send_command', return_value=b'\x00') as send:
+                self.assertTrue(controller.restart_script_at_subroutine(3))
+                self.assertTrue(controller.restart_script_at_subroutine(5, parameter=1000))
+                controller.stop_script()
+                sent = [c.args for c in send.call_args_list]
+            self.assertEqual(sent, [(MaestroCommand.RESTART_SCRIPT_AT_SUBROUTINE.value, 3),
+                                    (MaestroCommand.RESTART_SCRIPT_AT_SUBROUTINE_WITH_PARAMETER.value, 5,
+                                     1000 & 0x7F, 1000 >> 7),
+                                    (MaestroCommand.STOP_SCRIPT.value,)])
+            controller.emergency_stop()
+            self.assertFalse(controller.restart_script_at_subroutine(3))
+        finally:
+            controller.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
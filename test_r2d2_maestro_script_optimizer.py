@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+R2D2 Maestro Script Optimizer Test Suite
+Tests redundant target removal, speed-limited ramps, delay merging,
+subroutine extraction and the script memory budget report
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_maestro_script_engine import (ScriptCompiler, ScriptOptimizer, MaestroScriptCommand, AnimationSequence,
+                                        AnimationTrack, KeyFrame, InterpolationType)
+from maestro_hardware_detector import MaestroHardwareInfo, MaestroVariant
+
+OP = MaestroScriptCommand
+
+
+def run(bytecode, base_address=0):
+    """Interpret ScriptCompiler bytecode; servo positions per millisecond (speed in 0.25us per 10ms)"""
+    stack, calls, targets, speeds, positions, trace = [], [], {}, {}, {}, []
+    pc = 0
+    while pc < len(bytecode):
+        opcode = bytecode[pc]
+        if opcode == OP.LITERAL.value:
+            stack.append(bytecode[pc + 1])
+            pc += 2
+            continue
+        pc += 1
+        if opcode in (OP.SERVO.value, OP.SPEED.value):
+            high, low, channel = stack.pop(), stack.pop(), stack.pop()
+            value = low | (high << 7)
+            if opcode == OP.SPEED.value:
+                speeds[channel] = value
+            else:
+                targets[channel] = value
+                if not speeds.get(channel):
+                    positions[channel] = value
+        elif opcode == OP.DELAY.value:
+            high, low = stack.pop(), stack.pop()
+            for _ in range(low | (high << 7)):
+                for channel, target in targets.items():
+                    step = speeds.get(channel, 0) / 10.0
+                    position = positions[channel]
+                    positions[channel] = min(target, position + step) if target > position else \
+                        max(target, position - step)
+                trace.append(dict(positions))
+        elif opcode == OP.CALL.value:
+            high, low = stack.pop(), stack.pop()
+            calls.append(pc)
+            pc = (low | (high << 7)) - base_address
+        elif opcode == OP.RETURN.value:
+            pc = calls.pop()
+        elif opcode in (OP.QUIT.value, OP.JUMP.value):
+            break
+    return trace
+
+
+def sequence(name, keyframes, duration, fps=50, loop=False):
+    seq = AnimationSequence(name=name, description=name, duration=duration, fps=fps, loop=loop)
+    for channel, frames in keyframes.items():
+        track = AnimationTrack(channel=channel, name=f"ch{channel}")
+        track.keyframes = [KeyFrame(t, channel, p, interpolation=InterpolationType.LINEAR) for t, p in frames]
+        seq.tracks.append(track)
+    return seq
+
+
+class TestScriptOptimizer(unittest.TestCase):
+    """Test suite for ScriptOptimizer"""
+
+    def setUp(self):
+        self.plain = ScriptCompiler(optimize=False)
+        self.compiler = ScriptCompiler()
+
+    def compare(self, seq, base_address=0):
+        before = self.plain.compile_animation_sequence(seq, base_address)
+        after = self.compiler.compile_animation_sequence(seq, base_address)
+        return before, after, run(before.bytecode, base_address), run(after.bytecode, base_address)
+
+    def test_redundant_targets_and_delays(self):
+        """Test a hold compiles to one target per channel and one merged delay"""
+        hold = sequence("hold", {0: [(0.0, 6000), (2.0, 6000)], 1: [(0.0, 5000), (2.0, 5000)]}, 2.0)
+        before, after, expected, actual = self.compare(hold)
+        self.assertEqual(actual, expected)
+        report = self.compiler.optimizer.last_report
+        self.assertEqual(len(after.bytecode), 7 + 7 + 5 + 1)            # Two targets, one delay, QUIT
+        self.assertEqual(report['removed_targets'], 2 * 100)
+        self.assertEqual(after.unoptimized_size, len(before.bytecode))
+
+    def test_linear_ramp_becomes_speed_limited_target(self):
+        """Test a linear move becomes one speed-limited target that follows the streamed path"""
+        ramp = sequence("ramp", {0: [(0.0, 4000), (1.0, 8000)]}, 1.5)
+        before, after, expected, actual = self.compare(ramp)
+        self.assertLess(len(after.bytecode), len(before.bytecode) // 10)
+        self.assertIn(bytes([OP.LITERAL.value, 0, OP.LITERAL.value, 40, OP.LITERAL.value, 0,
+                             OP.SPEED.value]), after.bytecode)             # 4000 units/s = 40 per 10ms
+        frame_step = 4000 / 50
+        for streamed, optimized in zip(expected, actual):
+            self.assertLessEqual(abs(streamed[0] - optimized[0]), frame_step + 2)
+        self.assertEqual(actual[-1], expected[-1])
+        self.assertEqual(len(actual), len(expected))
+
+    def test_repeated_windows_become_subroutines(self):
+        """Test repeated operation windows are called as subroutines at the right absolute address"""
+        optimizer = ScriptOptimizer()
+        compiler = ScriptCompiler(optimize=False)
+        for _ in range(6):
+            for position in (4000, 7000):
+                compiler._add_servo_command(2, position)
+                compiler._add_servo_command(3, 11000 - position)
+                compiler._add_delay(200)
+        compiler._add_quit()
+        bytecode = bytes(compiler.current_script)
+
+        optimized = optimizer.optimize(bytecode, base_address=300)
+        self.assertGreater(optimizer.last_report['subroutines'], 0)
+        self.assertIn(OP.CALL.value, optimized)
+        self.assertIn(OP.RETURN.value, optimized)
+        self.assertLess(len(optimized), len(bytecode))
+        self.assertEqual(run(optimized, 300), run(bytecode, 300))
+
+    def test_loops_unknown_streams_and_budget(self):
+        """Test loop jumps survive, unknown streams are left alone and sizes are reported against the board"""
+        loop = sequence("loop", {0: [(0.0, 6000), (0.5, 7000)]}, 1.0, loop=True)
+        script = self.compiler.compile_animation_sequence(loop, base_address=129)
+        self.assertEqual(script.bytecode[-6:-1], bytes([OP.LITERAL.value, 1, OP.LITERAL.value, 1, OP.JUMP.value]))
+
+        unknown = bytes([OP.LITERAL.value, 1, OP.GET_MS.value, OP.QUIT.value])
+        self.assertEqual(ScriptOptimizer().optimize(unknown), unknown)
+
+        micro = MaestroHardwareInfo(port="/dev/ttyACM0", variant=MaestroVariant.STANDARD_6, channels=6,
+                                    firmware_version="1.04", product_id=0x89, serial_number="0")
+        report = ScriptOptimizer().size_report({'loop': script}, hardware_info=micro)
+        self.assertEqual(report.budget_bytes, 1024)
+        self.assertTrue(report.fits)
+        self.assertEqual(report.summary()['scripts']['loop'],
+                         {'unoptimized': script.unoptimized_size, 'optimized': len(script.bytecode)})
+        self.assertFalse(ScriptOptimizer().size_report({'loop': script}, budget_bytes=10).fits)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+R2D2 Metrics Registry Test Suite
+Tests counters, gauges, fixed-bucket histograms, Prometheus text
+exposition and dashboard snapshots
+"""
+
+import unittest
+import threading
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_metrics import MetricsRegistry, VisionPerformanceStats
+
+
+class TestMetrics(unittest.TestCase):
+    """Test suite for metric types"""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_thread_safe(self):
+        """Test concurrent increments are not lost"""
+        counter = self.registry.counter('test_events_total', 'Events')
+
+        def work():
+            for _ in range(10000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(counter.get(), 80000)
+
+    def test_labels_and_get_or_create(self):
+        """Test labeled children and get-or-create semantics"""
+        counter = self.registry.counter('test_requests_total', 'Requests', ('endpoint',))
+        counter.labels('/a').inc()
+        counter.labels(endpoint='/a').inc(2)
+
+        self.assertIs(self.registry.counter('test_requests_total', 'Requests', ('endpoint',)), counter)
+        self.assertEqual(counter.labels('/a').get(), 3)
+        with self.assertRaises(ValueError):
+            self.registry.gauge('test_requests_total')
+        with self.assertRaises(ValueError):
+            counter.inc()
+
+    def test_gauge_function(self):
+        """Test callback gauges are read at exposition time"""
+        items = [1, 2, 3]
+        gauge = self.registry.gauge('test_queue_size', 'Queue size')
+        gauge.set_function(lambda: len(items))
+        items.append(4)
+        self.assertEqual(gauge.get(), 4)
+
+    def test_histogram_percentiles(self):
+        """Test bucket counts and interpolated percentiles"""
+        histogram = self.registry.histogram('test_latency_seconds', 'Latency',
+                                            buckets=(0.01, 0.02, 0.05, 0.1))
+        for _ in range(90):
+            histogram.observe(0.005)
+        for _ in range(10):
+            histogram.observe(0.08)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertLessEqual(histogram.percentile(50), 0.01)
+        self.assertGreater(histogram.percentile(99), 0.05)
+        self.assertLessEqual(histogram.percentile(99), 0.08)
+
+
+class TestExposition(unittest.TestCase):
+    """Test suite for text exposition and snapshots"""
+
+    def test_prometheus_text(self):
+        """Test the text format for counters and histograms"""
+        registry = MetricsRegistry()
+        registry.counter('api_requests_total', 'Requests', ('status',)).labels(200).inc(3)
+        histogram = registry.histogram('api_duration_seconds', 'Duration', buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+
+        text = registry.render_text()
+        self.assertIn('# TYPE api_requests_total counter', text)
+        self.assertIn('api_requests_total{status="200"} 3', text)
+        self.assertIn('api_duration_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('api_duration_seconds_bucket{le="1"} 2', text)
+        self.assertIn('api_duration_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn('api_duration_seconds_count 2', text)
+
+    def test_snapshot(self):
+        """Test the compact snapshot and prefix filtering"""
+        registry = MetricsRegistry()
+        registry.gauge('wcb_queue_size').set(2)
+        registry.counter('vision_frames_total').inc()
+
+        snapshot = registry.snapshot(prefix='wcb_')
+        self.assertEqual(snapshot['metrics'], {'wcb_queue_size': 2.0})
+
+    def test_vision_stats_legacy_shape(self):
+        """Test VisionPerformanceStats reproduces the performance_stats dict"""
+        stats = VisionPerformanceStats('test', registry=MetricsRegistry())
+        stats.observe_capture(0.004)
+        stats.set('fps', 15.0)
+        self.assertAlmostEqual(stats.observe_inference(0.025), 40.0)
+        stats.add_detections(3)
+
+        snapshot = stats.snapshot()
+        self.assertAlmostEqual(snapshot['detection_time'], 25.0)
+        self.assertAlmostEqual(snapshot['capture_latency'], 4.0)
+        self.assertEqual(snapshot['total_detections'], 3)
+        self.assertEqual(snapshot['fps'], 15.0)
+
+
+class TestSubsystemInstances(unittest.TestCase):
+    """Test suite for subsystems sharing one registry"""
+
+    def test_diagnostics_engines_keep_their_own_counts(self):
+        """Test two DiagnosticsEngines on one registry report only their own commands"""
+        from r2d2_servo_backend import DiagnosticsEngine
+
+        registry = MetricsRegistry()
+        first = DiagnosticsEngine(registry)
+        first.update_performance_metrics(10.0, True)
+        first.update_performance_metrics(10.0, True)
+        second = DiagnosticsEngine(registry)
+        second.update_performance_metrics(20.0, False)
+
+        self.assertEqual(first.performance_metrics.total_commands_processed, 2)
+        self.assertEqual(second.performance_metrics.total_commands_processed, 1)
+        self.assertEqual(first.performance_metrics.success_rate, 100.0)
+        self.assertEqual(second.performance_metrics.success_rate, 0.0)  # First command of this engine
+        self.assertIn(f'servo_commands_total{{instance="{second.name}",result="failure"}} 1',
+                      registry.render_text())
+
+    def test_wcb_controllers_keep_their_own_counts(self):
+        """Test two WCBControllers on one registry have separate stats and queue gauges"""
+        from wcb_controller import WCBController
+
+        registry = MetricsRegistry()
+        first = WCBController(simulation_mode=True, registry=registry, name='body')
+        second = WCBController(simulation_mode=True, registry=registry, name='dome')
+        try:
+            first._commands_sent.inc(3)
+            self.assertEqual(first.stats['commands_sent'], 3)
+            self.assertEqual(second.stats['commands_sent'], 0)
+            queue_size = registry.get('wcb_queue_size')
+            self.assertEqual(sorted(values for values, _ in queue_size.children()), [('body',), ('dome',)])
+        finally:
+            first.shutdown()
+            second.shutdown()
+        self.assertEqual(queue_size.children(), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+R2D2 Rate Limiter Test Suite
+Tests sliding-window counting, per-endpoint rules, client eviction
+and the ASGI 429 middleware
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_rate_limiter import (
+    RateLimit,
+    RateLimiter,
+    RateLimitMiddleware,
+    SlidingWindowCounter
+)
+
+
+class TestSlidingWindowCounter(unittest.TestCase):
+    """Test suite for the ring-buffer window"""
+
+    def test_window_slides(self):
+        """Test requests leave the window after window_seconds"""
+        window = SlidingWindowCounter(10.0, 10)
+        for t in range(10):
+            window.add(100.0 + t)
+
+        self.assertEqual(window.count(109.5), 10)
+        self.assertEqual(window.count(115.5), 4)
+        self.assertEqual(window.count(200.0), 0)
+
+    def test_retry_after(self):
+        """Test retry_after points at the oldest slot expiring"""
+        window = SlidingWindowCounter(10.0, 10)
+        window.add(100.0)
+        self.assertAlmostEqual(window.retry_after(105.0), 5.0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test suite for the rate limiter"""
+
+    def test_limit_enforced_per_client(self):
+        """Test requests over the limit are rejected per client"""
+        limiter = RateLimiter(RateLimit(3, 60.0))
+        results = [limiter.hit("10.0.0.1", "/api/status", now=1000.0).allowed for _ in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+
+        # Other clients are unaffected
+        self.assertTrue(limiter.hit("10.0.0.2", "/api/status", now=1000.0).allowed)
+        self.assertEqual(limiter.get_violations(), {"10.0.0.1": 2})
+
+    def test_endpoint_limits(self):
+        """Test exact and prefix endpoint rules"""
+        limiter = RateLimiter(RateLimit(1, 60.0), endpoint_limits={
+            '/api/servo/': RateLimit(5, 60.0),
+            '/api/status': RateLimit(2, 60.0)
+        })
+
+        self.assertEqual(limiter.hit("c", "/api/servo/3/move", now=0.0).rule, '/api/servo/')
+        self.assertEqual(limiter.hit("c", "/api/status", now=0.0).limit, 2)
+        self.assertEqual(limiter.hit("c", "/other", now=0.0).rule, 'default')
+
+    def test_client_state_bounded(self):
+        """Test LRU eviction keeps client state bounded"""
+        limiter = RateLimiter(RateLimit(10, 60.0), max_clients=50)
+        for i in range(1000):
+            limiter.hit(f"client-{i}", "/api/status", now=float(i))
+
+        self.assertLessEqual(limiter.get_stats()['tracked_clients'], 50)
+
+    def test_idle_clients_expire(self):
+        """Test idle clients are dropped"""
+        limiter = RateLimiter(RateLimit(10, 60.0), idle_timeout=30.0)
+        limiter.hit("old", "/api/status", now=0.0)
+        limiter.hit("new", "/api/status", now=100.0)
+
+        self.assertEqual(limiter.get_stats()['tracked_clients'], 1)
+
+
+class TestRateLimitMiddleware(unittest.TestCase):
+    """Test suite for the ASGI middleware"""
+
+    def _request(self, middleware, path):
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'client': ('127.0.0.1', 5000)}
+        asyncio.run(middleware(scope, receive, send))
+        return sent[0]['status']
+
+    def test_rejects_with_429(self):
+        """Test over-limit requests get 429 and exempt paths pass"""
+        async def app(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        limiter = RateLimiter(RateLimit(1, 60.0), exempt_paths=('/api/emergency',))
+        middleware = RateLimitMiddleware(app, limiter=limiter)
+
+        self.assertEqual(self._request(middleware, '/api/status'), 200)
+        self.assertEqual(self._request(middleware, '/api/status'), 429)
+        self.assertEqual(self._request(middleware, '/api/emergency_stop'), 200)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+R2D2 Safety Kernel Test Suite
+Tests incremental rule evaluation, the latched emergency stop, command
+pre-checks, the stale-data and heartbeat watchdog and shared-kernel owners
+"""
+
+import unittest
+import time
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_metrics import MetricsRegistry
+from r2d2_safety_kernel import (
+    SafetyKernel, PositionLimitRule, ThresholdRule, CollisionZoneRule,
+    SEVERITY_WARNING, SEVERITY_CRITICAL
+)
+
+
+class TestSafetyKernel(unittest.TestCase):
+    """Test suite for SafetyKernel"""
+
+    def setUp(self):
+        self.kernel = SafetyKernel(channels=4, registry=MetricsRegistry(), name='test')
+        self.stops = []
+        self.events = []
+        self.kernel.add_stop_handler(self.stops.append)
+        self.kernel.add_event_handler(self.events.append)
+
+    def tearDown(self):
+        self.kernel.shutdown()
+
+    def test_limit_violation_latches_stop(self):
+        """Test a violating sample stops synchronously and records its latency"""
+        self.kernel.add_rule(PositionLimitRule({0: (4000, 8000)}))
+
+        self.assertEqual(self.kernel.publish_sample({'position': {0: 6000}}), [])
+        events = self.kernel.publish_sample({'position': {0: 9000}})
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(len(self.stops), 1)
+        self.assertTrue(self.kernel.stopped)
+        self.assertGreaterEqual(events[0].latency, 0.0)
+        self.assertEqual(self.kernel._detection_latency.count, 1)
+
+        # Latched until reset; commands are vetoed meanwhile
+        self.assertIsNotNone(self.kernel.publish_command(0, 6000))
+        self.kernel.reset()
+        self.assertFalse(self.kernel.stopped)
+        self.assertIsNone(self.kernel.publish_command(0, 6000))
+
+    def test_events_are_edge_triggered(self):
+        """Test a violation is raised once, escalated once and cleared on recovery"""
+        self.kernel.add_rule(ThresholdRule('temperature', warning=60.0, critical=70.0))
+
+        self.kernel.publish_sample({'temperature': {1: 65.0}})
+        self.kernel.publish_sample({'temperature': {1: 66.0}})
+        self.assertEqual([e.severity for e in self.events], [SEVERITY_WARNING])
+        self.assertEqual(self.stops, [])
+
+        self.kernel.publish_sample({'temperature': {1: 75.0}})
+        self.assertEqual([e.severity for e in self.events], [SEVERITY_WARNING, SEVERITY_CRITICAL])
+        self.assertEqual(len(self.stops), 1)
+
+        self.kernel.reset()
+        self.kernel.publish_sample({'temperature': {1: 40.0}})
+        self.assertIsNone(self.kernel.is_active('temperature', 1))
+
+    def test_collision_zone_vetoes_command(self):
+        """Test commands that would complete an occupied zone are rejected"""
+        self.kernel.add_rule(CollisionZoneRule(
+            [('arms', {0: (5000, 6000), 1: (5000, 6000)}, SEVERITY_CRITICAL)]))
+        self.kernel.publish_sample({'position': {0: 5500, 1: 7000}})
+
+        veto = self.kernel.publish_command(1, 5500)
+        self.assertIsNotNone(veto)
+        self.assertEqual(veto.rule, 'collision_zone')
+        self.assertIsNone(self.kernel.publish_command(1, 6500))
+        self.assertFalse(self.kernel.stopped)
+
+    def test_stale_watchdog(self):
+        """Test a channel that stops reporting raises a stale-data event"""
+        kernel = SafetyKernel(channels=2, stale_timeout=0.1, stale_severity=SEVERITY_WARNING,
+                              registry=MetricsRegistry(), name='stale')
+        try:
+            kernel.publish_sample({'position': {0: 6000}})
+            deadline = time.time() + 2.0
+            while kernel.is_active('stale_data', 0) is None and time.time() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(kernel.is_active('stale_data', 0), SEVERITY_WARNING)
+            self.assertFalse(kernel.stopped)
+
+            kernel.publish_sample({'position': {0: 6000}})
+            self.assertIsNone(kernel.is_active('stale_data', 0))
+        finally:
+            kernel.shutdown()
+
+    def test_heartbeat_latches_stop(self):
+        """Test a producer that goes silent latches a heartbeat stop that clears on the next sample"""
+        self.kernel.watch_heartbeat('monitor', 0.1)
+        self.kernel.publish_sample({'temperature': {0: 30.0}})
+        deadline = time.time() + 2.0
+        while not self.kernel.stopped and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.stops[0].rule, 'heartbeat')
+        self.assertEqual(self.stops[0].source, 'watchdog')
+
+        self.kernel.reset()
+        self.kernel.publish_sample({'temperature': {0: 30.0}})
+        self.assertIsNone(self.kernel.is_active('heartbeat', -1))
+
+    def test_owners_share_one_kernel(self):
+        """Test owners see their own events, share the stop latch and the strictest stale timeout, and detach"""
+        backend_events, monitor_events, monitor_stops = [], [], []
+        self.kernel.add_rule(PositionLimitRule({0: (4000, 8000)}, name='backend_limit'), owner='backend')
+        self.kernel.add_rule(ThresholdRule('temperature', warning=60.0), owner='monitor')
+        self.kernel.add_event_handler(backend_events.append, owner='backend')
+        self.kernel.add_event_handler(monitor_events.append, owner='monitor')
+        self.kernel.add_stop_handler(monitor_stops.append, owner='monitor')
+        self.kernel.watch_stale('backend', 5.0)
+        self.kernel.watch_stale('monitor', 2.0, SEVERITY_WARNING)
+        self.assertEqual((self.kernel.stale_timeout, self.kernel.stale_severity), (2.0, SEVERITY_CRITICAL))
+
+        self.kernel.publish_sample({'temperature': {1: 65.0}})
+        self.kernel.publish_sample({'position': {0: 9000}})
+        self.assertEqual([e.rule for e in backend_events], ['backend_limit'])
+        self.assertEqual([e.rule for e in monitor_events], ['temperature'])
+        self.assertEqual([e.rule for e in monitor_stops], ['backend_limit'])   # One latch for all owners
+
+        self.kernel.detach('backend')
+        self.assertEqual(self.kernel.get_status()['owners'], ['monitor'])
+        self.assertEqual((self.kernel.stale_timeout, self.kernel.stale_severity), (2.0, SEVERITY_WARNING))
+        self.kernel.reset()
+        self.assertIsNone(self.kernel.publish_command(0, 9000))
+
+    def test_only_latching_owners_clear_stop(self):
+        """Test a stop stays latched until every owner that latched it resets"""
+        self.kernel.add_rule(PositionLimitRule({0: (4000, 8000)}, name='backend_limit'), owner='backend')
+        self.kernel.add_rule(ThresholdRule('temperature', critical=70.0), owner='monitor')
+
+        self.kernel.publish_sample({'position': {0: 9000}})
+        self.assertEqual(self.kernel.latched_by, {'backend'})
+        self.assertFalse(self.kernel.reset('monitor'))                  # Another subsystem cannot clear it
+        self.assertTrue(self.kernel.stopped)
+
+        self.kernel.publish_sample({'temperature': {1: 75.0}})           # Second owner latches too
+        self.assertFalse(self.kernel.reset('backend'))
+        self.assertEqual(self.kernel.get_status()['latched_by'], ['monitor'])
+        self.assertIsNotNone(self.kernel.publish_command(0, 6000))
+        self.assertTrue(self.kernel.reset('monitor'))
+        self.assertIsNone(self.kernel.publish_command(0, 6000))
+
+        # A manual stop without an owner needs a full reset
+        self.kernel.trigger_stop("operator")
+        self.assertFalse(self.kernel.reset('backend'))
+        self.assertTrue(self.kernel.reset())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+R2D2 Sequence Preflight Test Suite
+Tests trajectory sampling, vectorized checks, signed artifacts and the
+hash-only run-time lookup
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_metrics import MetricsRegistry
+from r2d2_safety_kernel import SafetyKernel
+from r2d2_sequence_preflight import (
+    SequencePreflight, PreflightLimits, MotionSegment, sample_segments,
+    definition_from_commands
+)
+from servo_base_classes import ServoCommand, ServoCommandType, ServoConfiguration
+from servo_safety_module import ServoSafetySystem
+
+
+def step_definition(steps):
+    """Maestro-style definition: [channel, position, duration_ms, easing, hold_ms]"""
+    return {'kind': 'steps', 'steps': [list(step) for step in steps]}
+
+
+class TestSequencePreflight(unittest.TestCase):
+    """Test suite for SequencePreflight"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.limits = PreflightLimits(
+            position_limits={0: (4000.0, 8000.0), 1: (4000.0, 8000.0)},
+            zones=[("arm_door", {0: (7000.0, 8000.0), 1: (7000.0, 8000.0)}, 'critical')])
+        self.preflight = SequencePreflight(self.limits, cache_dir=self.cache_dir, key=b'test-key',
+                                           channels=4, initial_positions={0: 6000.0, 1: 6000.0})
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_sampling_follows_easing_and_timing(self):
+        """Test segments are sampled at tick resolution with their easing"""
+        segments = [MotionSegment(0, 0.0, 1.0, 8000.0, 'ease_in_out'),
+                    MotionSegment(0, 1.5, 0.5, 4000.0)]
+        frames = sample_segments(segments, 2, np.array([6000.0, np.nan]), tick=0.1)
+        self.assertEqual(frames.shape, (21, 2))
+        self.assertAlmostEqual(frames[5, 0], 7000.0)            # Halfway through the ease
+        self.assertAlmostEqual(frames[2, 0], 6000.0 + 2000.0 * 2 * 0.2 ** 2)
+        self.assertAlmostEqual(frames[12, 0], 8000.0)           # Holding before the next move
+        self.assertAlmostEqual(frames[20, 0], 4000.0)
+        self.assertTrue(np.isnan(frames[:, 1]).all())          # Never commanded
+
+    def test_violations_found_in_one_pass(self):
+        """Test limit, zone and speed violations are reported with their time"""
+        artifact = self.preflight.compile("bad", step_definition([
+            (0, 7500, 500, 'linear', 0),
+            (1, 7500, 500, 'linear', 0),      # Both inside the zone at ~0.8s
+            (1, 9000, 20, 'linear', 0),       # Out of range and far too fast
+        ]))
+        rules = {v['rule'] for v in artifact.violations}
+        self.assertTrue({'position_limit', 'collision_zone', 'velocity', 'acceleration'} <= rules, rules)
+        zone = next(v for v in artifact.violations if v['rule'] == 'collision_zone')
+        self.assertAlmostEqual(zone['time'], 0.84, places=2)
+        self.assertFalse(artifact.ok)
+        self.assertIsNone(self.preflight.lookup(step_definition([(0, 9000, 500, 'linear', 0)])))
+
+        good = self.preflight.compile("good", step_definition([(0, 7500, 500, 'linear', 0)]))
+        self.assertTrue(good.ok)
+        self.assertEqual(good.violations, [])
+
+    def test_lookup_by_hash_and_cache(self):
+        """Test artifacts are found by definition hash, also after a restart"""
+        definition = definition_from_commands([
+            {'channel': 0, 'command_type': 'position', 'value': 1700, 'duration': 1.0,
+             'motion_type': 'smooth', 'delay': 0.0}])
+        self.assertIsNone(self.preflight.lookup(definition))
+        compiled = self.preflight.compile("wave", definition)
+        self.assertIs(self.preflight.lookup(definition), compiled)
+
+        restarted = SequencePreflight(self.limits, cache_dir=self.cache_dir, key=b'test-key',
+                                      channels=4, initial_positions={0: 6000.0, 1: 6000.0})
+        loaded = restarted.lookup(definition)
+        self.assertIsNotNone(loaded)
+        self.assertEqual(loaded.digest, compiled.digest)
+        np.testing.assert_array_equal(loaded.frames, compiled.frames)
+
+        # Editing the sequence or the limits changes the hash
+        definition['commands'][0][2] = 1750
+        self.assertIsNone(restarted.lookup(definition))
+        stricter = SequencePreflight(PreflightLimits(max_velocity=100.0), cache_dir=self.cache_dir,
+                                     key=b'test-key', channels=4)
+        self.assertNotEqual(stricter.digest(definition), restarted.digest(definition))
+
+    def test_tampered_artifacts_rejected(self):
+        """Test artifacts with a bad signature or another key are not loaded"""
+        compiled = self.preflight.compile("wave", step_definition([(0, 7000, 500, 'linear', 0)]))
+        self.assertTrue(self.preflight.verify_signature(compiled))
+        compiled.violations.append({'rule': 'x', 'channel': 0, 'severity': 'warning',
+                                    'time': 0.0, 'message': 'edited'})
+        self.assertFalse(self.preflight.verify_signature(compiled))
+
+        other_key = SequencePreflight(self.limits, cache_dir=self.cache_dir, key=b'other-key',
+                                      channels=4, initial_positions={0: 6000.0, 1: 6000.0})
+        self.assertEqual(other_key.artifacts, {})
+
+    def test_playback_checks_live_positions(self):
+        """Test zones with servos outside the sequence and first-move speed are checked before playback"""
+        safety = ServoSafetySystem(kernel=SafetyKernel(channels=24, registry=MetricsRegistry(), name='test'))
+        safety.initialize_safety_configs({channel: ServoConfiguration(channel) for channel in (0, 1)})
+        safety.add_interference_zone('arm_door', 0, (1600, 1900), 1, (1000, 1300))
+        safety.monitor_servo(1, 1100)
+
+        command = ServoCommand(0, ServoCommandType.POSITION, 1700, 1.0)
+        self.assertFalse(safety.validate_command(command))
+        preflight = SequencePreflight(PreflightLimits.from_servo_safety(safety), cache_dir=self.cache_dir,
+                                      key=b'test-key')
+        artifact = preflight.compile("arm", definition_from_commands([command], timing='cumulative'))
+        self.assertTrue(artifact.ok)      # Servo 1 is not part of the sequence
+
+        frames = np.full((len(artifact.frames), 24), np.nan)
+        frames[:, artifact.channels] = artifact.frames / 4.0
+        self.assertFalse(safety.validate_playback(frames, {0: (1700, 1.0)}))
+
+        safety.monitor_servo(1, 1500)
+        self.assertTrue(safety.validate_playback(frames, {0: (1700, 1.0)}))
+        safety.monitor_servo(0, 1200)
+        self.assertFalse(safety.validate_playback(frames, {0: (1700, 0.1)}))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
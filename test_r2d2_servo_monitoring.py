@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+R2D2 Servo Monitoring Test Suite
+Tests the per-channel ring buffer and the vectorized analytics that
+run over all channels at once
+"""
+
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_metrics import MetricsRegistry
+from r2d2_servo_monitoring import (
+    ServoHistoryBuffer, ServoMonitor, ServoHealthStatus, HISTORY_FIELDS
+)
+
+
+class SimulatedController:
+    """Minimal controller stand-in running in simulation mode"""
+    simulation_mode = True
+
+
+class TestServoHistoryBuffer(unittest.TestCase):
+    """Test suite for the ring buffer"""
+
+    def test_window_wraps_in_order(self):
+        """Test windows are chronological after the buffer wraps"""
+        buffer = ServoHistoryBuffer(channels=2, capacity=4)
+        for t in range(6):
+            sample = np.full((2, len(HISTORY_FIELDS)), float(t))
+            buffer.append(sample)
+
+        self.assertEqual(buffer.count, 4)
+        self.assertEqual(buffer.total, 6)
+        np.testing.assert_array_equal(buffer.window(3, 'timestamp'), [[3, 4, 5], [3, 4, 5]])
+        np.testing.assert_array_equal(buffer.window(10, 'position')[0], [2, 3, 4, 5])
+        self.assertEqual(buffer.latest()[1, 0], 5.0)
+
+
+class TestVectorizedAnalytics(unittest.TestCase):
+    """Test suite for all-channel analytics on a 24-channel monitor"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.monitor = ServoMonitor(
+            SimulatedController(),
+            database_path=os.path.join(self.directory, 'monitoring.db'),
+            registry=MetricsRegistry(),
+            channels=24
+        )
+        # Drive the analytics by hand
+        self.monitor.monitoring_active = False
+        self.monitor.monitoring_thread.join(timeout=2.0)
+        self.monitor.analysis_thread.join(timeout=2.0)
+        self.monitor.history = ServoHistoryBuffer(24, self.monitor.history_size)
+        self.monitor._analyzed_total = 0
+        self.monitor.active_alerts.clear()
+
+    def tearDown(self):
+        self.monitor.telemetry.flush(close_buckets=True)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _feed(self, positions: np.ndarray, interval: float = 0.02):
+        """Append one sample per column of positions (channels x samples)"""
+        start = 1000.0
+        for i in range(positions.shape[1]):
+            sample = self.monitor._assemble_sample(
+                start + i * interval, positions[:, i], positions[:, i],
+                np.zeros(24), np.zeros(24), np.zeros(24), np.full(24, 25.0),
+                np.zeros(24), np.ones(24), np.full(24, 50.0), np.ones(24))
+            self.monitor.history.append(sample)
+
+    def test_speed_and_smoothness(self):
+        """Test speed and smoothness for steady and jerky channels"""
+        steps = np.arange(20, dtype=float)
+        positions = np.tile(6000 + steps * 10, (24, 1))
+        positions[5] = 6000 + np.where(steps % 2, 200.0, -200.0)  # Jerky channel
+        self._feed(positions)
+
+        speed = self.monitor._calculate_servo_speed()
+        smoothness = self.monitor._calculate_smoothness()
+
+        self.assertEqual(speed.shape, (24,))
+        self.assertAlmostEqual(speed[0], 500.0, places=3)  # 10 units per 20 ms
+        self.assertAlmostEqual(smoothness[0], 1.0)
+        self.assertLess(smoothness[5], 0.01)
+
+    def test_health_and_alerts(self):
+        """Test health, cycle counting and alerts for all channels"""
+        steps = np.arange(60, dtype=float)
+        positions = np.tile(6000 + 100 * np.sin(steps / 3.0), (24, 1))
+        self._feed(positions)
+
+        # Push channel 7 over the temperature limit
+        latest = self.monitor.history.latest()
+        latest[7, HISTORY_FIELDS.index('temperature')] = 70.0
+        self.monitor.history.append(latest)
+
+        self.monitor._analyze_servo_performance()
+        self.monitor._update_servo_health()
+        self.monitor._check_alerts()
+
+        health = self.monitor.get_servo_health()
+        self.assertEqual(len(health), 24)
+        self.assertGreater(health[0].cycle_count, 0)
+        self.assertEqual(health[0].overall_status, ServoHealthStatus.EXCELLENT)
+        self.assertEqual(self.monitor.performance_baselines[0].samples_count, 61)
+
+        alerts = self.monitor.get_active_alerts()
+        self.assertEqual([(a.category, a.servo_channel) for a in alerts], [('temperature', 7)])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
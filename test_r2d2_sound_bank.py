@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+R2D2 Sound Bank Test Suite
+Tests decoding to the mixer format, real durations, pinned sounds and
+LRU eviction of the rest
+"""
+
+import unittest
+import tempfile
+import shutil
+import wave
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_sound_bank import SoundBank, convert_pcm
+
+
+def write_wav(path, seconds, rate=44100, channels=1):
+    frames = int(seconds * rate)
+    tone = (np.sin(np.arange(frames) * 2 * np.pi * 440 / rate) * 8000).astype('<i2')
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.repeat(tone[:, None], channels, axis=1).tobytes())
+
+
+class TestSoundBank(unittest.TestCase):
+    """Test suite for SoundBank"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        write_wav(os.path.join(self.directory, 'R2D2_happy-1.wav'), 1.5)
+        write_wav(os.path.join(self.directory, 'R2D2_sad-1.wav'), 0.5, rate=22050, channels=2)
+        for i in range(4):
+            write_wav(os.path.join(self.directory, f'extra_{i}.wav'), 1.0, rate=22050)
+        with open(os.path.join(self.directory, 'notes.txt'), 'w') as f:
+            f.write('not a sound')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_scan_decodes_to_mixer_format(self):
+        """Test every sound is decoded once to the mixer format with its real duration"""
+        bank = SoundBank(self.directory, sample_rate=22050, channels=2)
+        self.assertEqual(bank.scan(), 6)
+        self.assertEqual(bank.stats['decoded'], 6)
+
+        sample = bank.get('R2D2_happy-1.wav')
+        self.assertEqual(sample.pcm.shape, (33075, 2))            # 1.5s at 22050 Hz, stereo
+        self.assertEqual(sample.pcm.dtype, np.int16)
+        self.assertTrue(sample.pcm.flags['C_CONTIGUOUS'])
+        self.assertAlmostEqual(bank.duration('R2D2_happy-1.wav'), 1.5, places=3)
+        self.assertAlmostEqual(bank.duration('R2D2_sad-1.wav'), 0.5, places=3)
+        self.assertNotIn('notes.txt', bank)
+        self.assertIsNone(bank.get('missing.wav'))
+
+    def test_pinned_sounds_survive_eviction(self):
+        """Test pinned sounds stay resident while unpinned ones are evicted least recently used first"""
+        one_second = 22050 * 2 * 2
+        bank = SoundBank(self.directory, sample_rate=22050, channels=2,
+                         pinned=['R2D2_happy-1.wav', 'R2D2_sad-1.wav'], max_cache_bytes=2 * one_second)
+        bank.scan()
+        status = bank.get_status()
+        self.assertEqual((status['pinned'], status['cached']), (2, 2))
+        self.assertEqual(bank.stats['evictions'], 2)
+
+        # Evicted sounds keep their durations and decode again on use
+        self.assertAlmostEqual(bank.duration('extra_0.wav'), 1.0, places=3)
+        decoded = bank.stats['decoded']
+        self.assertIsNotNone(bank.get('extra_0.wav'))
+        self.assertEqual(bank.stats['decoded'], decoded + 1)
+        self.assertEqual(bank.stats['misses'], 1)
+
+        # Pinned sounds are never decoded again
+        for _ in range(3):
+            bank.get('R2D2_happy-1.wav')
+        self.assertEqual(bank.stats['decoded'], decoded + 1)
+        self.assertLessEqual(bank.memory_bytes() - bank.get('R2D2_happy-1.wav').nbytes
+                             - bank.get('R2D2_sad-1.wav').nbytes, 2 * one_second)
+
+    def test_convert_pcm(self):
+        """Test channel conversion and resampling preserve the signal"""
+        mono = (np.sin(np.linspace(0, 2 * np.pi, 1000)) * 10000).astype(np.int16)[:, None]
+        stereo = convert_pcm(mono, 44100, 22050, 2)
+        self.assertEqual(stereo.shape, (500, 2))
+        np.testing.assert_array_equal(stereo[:, 0], stereo[:, 1])
+        self.assertLess(np.abs(stereo[:, 0].astype(int) - mono[::2, 0]).max(), 50)
+        self.assertEqual(convert_pcm(stereo, 22050, 22050, 1).shape, (500, 1))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
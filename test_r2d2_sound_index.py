@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+R2D2 Sound Index Test Suite
+Tests feature extraction, normalization gains, index persistence with
+incremental updates, and background updates kept out of the asset directory
+"""
+
+import unittest
+import tempfile
+import shutil
+import time
+import wave
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_sound_index import (
+    SoundFeatureIndex, analyze_pcm, default_index_path, TARGET_RMS_DB, PEAK_CEILING_DB, HOP_SIZE
+)
+
+RATE = 16000
+
+
+def beeps(starts, frequency=1000.0, amplitude=0.3, length=1.0):
+    """Mono float signal with 100ms tone bursts at the given start times"""
+    signal = np.zeros(int(length * RATE))
+    tone = amplitude * np.sin(2 * np.pi * frequency * np.arange(int(0.1 * RATE)) / RATE)
+    for start in starts:
+        offset = int(start * RATE)
+        signal[offset:offset + len(tone)] += tone
+    signal += np.random.default_rng(1).normal(0, 0.002, len(signal))
+    return signal
+
+
+def write_wav(path, signal):
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes((np.clip(signal, -1, 1) * 32767).astype('<i2').tobytes())
+
+
+class TestSoundIndex(unittest.TestCase):
+    """Test suite for SoundFeatureIndex"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.cache, 'sound_index.npz')
+        write_wav(os.path.join(self.directory, 'beeps.wav'), beeps([0.1, 0.4, 0.7]))
+        write_wav(os.path.join(self.directory, 'quiet.wav'), beeps([0.2], frequency=3000.0, amplitude=0.02))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        shutil.rmtree(self.cache)
+
+    def test_features(self):
+        """Test duration, levels, centroid and onsets of synthetic clips"""
+        pcm = (beeps([0.1, 0.4, 0.7]) * 32767).astype(np.int16)[:, None]
+        features = analyze_pcm('beeps', pcm, RATE)
+        self.assertAlmostEqual(features.duration, 1.0)
+        self.assertAlmostEqual(features.peak_db, 20 * np.log10(0.3), delta=0.3)
+        self.assertAlmostEqual(features.centroid_hz, 1000.0, delta=100.0)
+        self.assertEqual(len(features.onsets), 3)
+        for onset, expected in zip(features.onsets, (0.1, 0.4, 0.7)):
+            self.assertLess(abs(onset - expected), 2 * HOP_SIZE / RATE)
+
+        silent = analyze_pcm('silent', np.zeros((RATE, 2), dtype=np.int16), RATE)
+        self.assertEqual((silent.gain, silent.onsets), (1.0, []))
+
+    def test_normalization_gains(self):
+        """Test gains bring clips towards the RMS target without clipping their peaks"""
+        index = SoundFeatureIndex.open(self.directory, self.index_path)
+        loud, quiet = index.get('beeps.wav'), index.get('quiet.wav')
+        self.assertGreater(quiet.gain, 1.0)
+        self.assertGreater(quiet.gain, loud.gain)
+        for features in (loud, quiet):
+            normalized_peak = features.peak_db + 20 * np.log10(features.gain)
+            self.assertLessEqual(normalized_peak, PEAK_CEILING_DB + 0.01)
+            normalized_rms = features.rms_db + 20 * np.log10(features.gain)
+            self.assertLessEqual(normalized_rms, TARGET_RMS_DB + 0.01)
+        self.assertEqual(index.gain('missing.wav'), 1.0)
+
+    def test_persistence_and_incremental_update(self):
+        """Test the saved index reloads identically and only changed clips are analyzed again"""
+        index = SoundFeatureIndex.open(self.directory, self.index_path)
+        self.assertEqual(index.stats['analyzed'], 2)
+        self.assertTrue(os.path.exists(index.path))
+
+        reloaded = SoundFeatureIndex.open(self.directory, self.index_path)
+        self.assertEqual(reloaded.stats['analyzed'], 0)
+        self.assertEqual(reloaded.onsets('beeps.wav'), index.onsets('beeps.wav'))
+        self.assertAlmostEqual(reloaded.duration('quiet.wav'), index.duration('quiet.wav'), places=5)
+        self.assertAlmostEqual(reloaded.gain('quiet.wav'), index.gain('quiet.wav'), places=5)
+
+        os.remove(os.path.join(self.directory, 'quiet.wav'))
+        path = os.path.join(self.directory, 'beeps.wav')
+        write_wav(path, beeps([0.5], length=2.0))
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        updated = SoundFeatureIndex.open(self.directory, self.index_path)
+        self.assertEqual((updated.stats['analyzed'], updated.stats['removed']), (1, 1))
+        self.assertEqual(len(updated), 1)
+        self.assertAlmostEqual(updated.duration('beeps.wav'), 2.0)
+
+    def test_background_update_outside_asset_directory(self):
+        """Test a background open returns the saved features at once and writes only to the cache"""
+        self.assertNotEqual(os.path.dirname(default_index_path(self.directory)), self.directory)
+        assets = sorted(os.listdir(self.directory))
+
+        index = SoundFeatureIndex.open(self.directory, self.index_path, background=True)
+        self.assertTrue(index.wait(timeout=10.0))
+        self.assertEqual(len(index), 2)
+        self.assertFalse(index.get_status()['updating'])
+        self.assertTrue(os.path.exists(self.index_path))
+        self.assertEqual(sorted(os.listdir(self.directory)), assets)
+
+        reopened = SoundFeatureIndex.open(self.directory, self.index_path, background=True)
+        self.assertEqual(len(reopened), 2)                  # Loaded before the update finishes
+        self.assertTrue(reopened.wait(timeout=10.0))
+        self.assertEqual(reopened.stats['analyzed'], 0)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+R2D2 Sound Selection Test Suite
+Tests alias table weights, the enhancer's selection filters, the recency
+penalty and lazy rebuilds when mappings change
+"""
+
+import unittest
+import random
+import sys
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_sound_selection import AliasTable, SoundSelector, STUBBORN, SARCASTIC
+
+
+@dataclass
+class Mapping:
+    emotional_context: str
+    personality_traits: List[str] = field(default_factory=list)
+    stubborn_factor: float = 0.0
+    sarcasm_factor: float = 0.0
+    selection_weight: float = 1.0
+
+
+class TestSoundSelection(unittest.TestCase):
+    """Test suite for SoundSelector"""
+
+    def setUp(self):
+        random.seed(42)
+        self.mappings = {
+            'happy-1.mp3': Mapping('happy', ['joyful', 'excited']),
+            'happy-2.mp3': Mapping('happy', ['joyful'], selection_weight=3.0),
+            'chat-1.mp3': Mapping('chat', ['talkative'], stubborn_factor=0.6, sarcasm_factor=0.1),
+            'chat-2.mp3': Mapping('chat', ['talkative', 'witty'], sarcasm_factor=0.4),
+            'chat-3.mp3': Mapping('chat', ['curious'], stubborn_factor=0.4),
+        }
+        self.selector = SoundSelector(self.mappings, recent=1, recent_acceptance=0.0)
+
+    def test_alias_table_weights(self):
+        """Test alias tables reproduce their weights exactly and when sampled"""
+        table = AliasTable(['a', 'b', 'c', 'd'], [1.0, 2.0, 3.0, 4.0])
+        probabilities = table.probabilities()
+        for item, expected in zip('abcd', (0.1, 0.2, 0.3, 0.4)):
+            self.assertAlmostEqual(probabilities[item], expected)
+        counts = Counter(table.sample(random.random()) for _ in range(20000))
+        for item, expected in zip('abcd', (0.1, 0.2, 0.3, 0.4)):
+            self.assertAlmostEqual(counts[item] / 20000.0, expected, delta=0.015)
+        with self.assertRaises(ValueError):
+            AliasTable([], [])
+
+    def test_filters_match_enhancer_rules(self):
+        """Test candidate sets follow the personality, stubborn and sarcasm filters"""
+        self.assertEqual(set(self.selector.candidates('chat')), {'chat-1.mp3', 'chat-2.mp3', 'chat-3.mp3'})
+        self.assertEqual(set(self.selector.candidates('chat', allow_stubborn=False)),
+                         {'chat-2.mp3', 'chat-3.mp3'})
+        self.assertEqual(set(self.selector.candidates('chat', allow_stubborn=False, allow_sarcastic=False)),
+                         {'chat-3.mp3'})
+        self.assertEqual(set(self.selector.candidates('chat', personality_filter=['witty', 'curious'])),
+                         {'chat-2.mp3', 'chat-3.mp3'})
+        self.assertEqual(self.selector.candidates('happy'), {'happy-1.mp3': 0.25, 'happy-2.mp3': 0.75})
+        self.assertIsNone(self.selector.select('chat', personality_filter=['joyful']))
+        self.assertIsNone(self.selector.select('unknown'))
+
+        self.assertIn(self.selector.select_matching(STUBBORN, 'chat'), {'chat-1.mp3', 'chat-3.mp3'})
+        self.assertEqual(self.selector.select_matching(SARCASTIC, 'chat'), 'chat-2.mp3')
+        self.assertIsNone(self.selector.select_matching(SARCASTIC, 'happy'))
+
+    def test_no_back_to_back_repeats(self):
+        """Test the recency ring prevents immediate repeats without changing single-sound contexts"""
+        picks = [self.selector.select('chat') for _ in range(300)]
+        repeats = sum(1 for a, b in zip(picks, picks[1:]) if a == b)
+        self.assertLess(repeats, 5)             # Only when every redraw hits the recent clip (1/3^5)
+        self.assertEqual(set(picks), {'chat-1.mp3', 'chat-2.mp3', 'chat-3.mp3'})
+        self.assertGreater(self.selector.stats['redraws'], 0)
+
+        single = [self.selector.select('chat', allow_stubborn=False, allow_sarcastic=False) for _ in range(5)]
+        self.assertEqual(set(single), {'chat-3.mp3'})
+
+    def test_lazy_rebuild(self):
+        """Test added sounds are picked up and in-place edits after invalidate()"""
+        tables = self.selector.stats['tables_built']
+        for _ in range(10):
+            self.selector.select('happy')
+        self.assertEqual(self.selector.stats['tables_built'], tables)      # Precomputed
+
+        self.mappings['alert-1.mp3'] = Mapping('alert', ['cautious'])
+        self.assertEqual(self.selector.select('alert'), 'alert-1.mp3')
+        self.assertEqual(self.selector.stats['rebuilds'], 2)
+
+        self.mappings['chat-2.mp3'].sarcasm_factor = 0.0
+        self.assertEqual(self.selector.select_matching(SARCASTIC, 'chat'), 'chat-2.mp3')   # Stale
+        self.selector.invalidate()
+        self.assertIsNone(self.selector.select_matching(SARCASTIC, 'chat'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+R2D2 Startup Orchestrator Test Suite
+Tests concurrent initialization of independent components, dependency
+ordering, failure propagation, graph validation and the startup timeline
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_startup_orchestrator import StartupOrchestrator, StartupError
+
+
+def blocking(seconds, value=None):
+    def init():
+        time.sleep(seconds)
+        return value
+    return init
+
+
+class TestStartupOrchestrator(unittest.TestCase):
+    """Test suite for StartupOrchestrator"""
+
+    def test_independent_components_start_concurrently(self):
+        """Test blocking initializers without dependencies overlap on worker threads"""
+        startup = StartupOrchestrator('robot')
+        startup.add('serial_probe', blocking(0.2, 'maestro'))
+        startup.add('yolo_model', blocking(0.2, 'yolo'))
+        startup.add('sound_bank', blocking(0.2, 'sounds'))
+
+        results = startup.run_sync()
+        self.assertEqual(results, {'serial_probe': 'maestro', 'yolo_model': 'yolo', 'sound_bank': 'sounds'})
+        self.assertLess(startup.wall_ms, 450)
+        status = startup.get_status()
+        self.assertGreater(status['parallel_speedup'], 1.5)
+        self.assertTrue(all(c['status'] == 'ready' and c['duration_ms'] >= 190 for c in status['components']))
+
+    def test_dependencies_and_timeline(self):
+        """Test dependents start after their dependencies and the critical path follows the slowest chain"""
+        startup = StartupOrchestrator('integration')
+        loop_threads = []
+
+        async def start_audio():
+            loop_threads.append(threading.current_thread())
+            await asyncio.sleep(0.05)
+            return 'playing'
+
+        startup.add('choreographer', blocking(0.01), depends_on=['servo_controller'])
+        startup.add('servo_controller', blocking(0.15))
+        startup.add('audio', blocking(0.05))
+        startup.add('audio_processing', start_audio, depends_on=['audio'])
+        startup.add('behavior', blocking(0.01), depends_on=['choreographer', 'audio_processing'])
+
+        results = asyncio.run(startup.run())
+        timings = {t.name: t for t in startup.timeline()}
+        self.assertGreaterEqual(timings['choreographer'].start_ms, timings['servo_controller'].end_ms)
+        self.assertGreaterEqual(timings['behavior'].start_ms, timings['audio_processing'].end_ms)
+        self.assertLess(timings['audio'].end_ms, timings['servo_controller'].end_ms)
+        self.assertEqual(results['audio_processing'], 'playing')
+        self.assertIs(loop_threads[0], threading.main_thread())     # Coroutines run on the loop
+        self.assertEqual(startup.critical_path(), ['servo_controller', 'choreographer', 'behavior'])
+        self.assertEqual(startup.timeline()[0].name, 'servo_controller')
+
+    def test_failures_skip_dependents(self):
+        """Test a failed component skips its dependents while independent ones still start"""
+        def broken_probe():
+            raise OSError("permission denied: /dev/ttyACM0")
+
+        def broken_camera():
+            raise RuntimeError("no camera")
+
+        startup = StartupOrchestrator('backend')
+        startup.add('controller', broken_probe)
+        startup.add('board_scan', blocking(0), depends_on=['controller'])
+        startup.add('config', blocking(0, 'config'))
+        startup.add('camera', broken_camera, optional=True)
+
+        with self.assertRaises(StartupError) as failure:
+            startup.run_sync()
+        self.assertEqual(failure.exception.failed, {
+            'controller': 'permission denied: /dev/ttyACM0',
+            'board_scan': 'dependency not ready: controller'
+        })
+        self.assertEqual(startup.results, {'config': 'config'})
+        statuses = {c['name']: c['status'] for c in startup.get_status()['components']}
+        self.assertEqual(statuses, {'controller': 'failed', 'board_scan': 'skipped', 'config': 'ready',
+                                    'camera': 'failed'})
+
+        optional_only = StartupOrchestrator()
+        optional_only.add('camera', broken_camera, optional=True)
+        self.assertEqual(optional_only.run_sync(), {})
+
+    def test_graph_validation_and_sync_entry(self):
+        """Test unknown dependencies, cycles and duplicates are rejected, and run_sync works inside a loop"""
+        unknown = StartupOrchestrator()
+        unknown.add('choreographer', blocking(0), depends_on=['servo'])
+        with self.assertRaisesRegex(ValueError, "unknown component 'servo'"):
+            unknown.run_sync()
+
+        cycle = StartupOrchestrator()
+        cycle.add('a', blocking(0), depends_on=['b'])
+        cycle.add('b', blocking(0), depends_on=['a'])
+        cycle.add('c', blocking(0))
+        with self.assertRaisesRegex(ValueError, 'cycle between components: a, b'):
+            cycle.run_sync()
+        with self.assertRaises(ValueError):
+            cycle.add('c', blocking(0))
+
+        async def construct_inside_loop():
+            startup = StartupOrchestrator()
+            startup.add('controller', blocking(0.01, 'ok'))
+            return startup.run_sync()
+
+        self.assertEqual(asyncio.run(construct_inside_loop()), {'controller': 'ok'})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
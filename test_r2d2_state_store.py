@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+R2D2 State Store Test Suite
+Tests change detection with merge patches, pending delta folding, topic
+subscriptions with shared serialization, and client state reconstruction
+"""
+
+import asyncio
+import json
+import random
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_state_store import StateStore, StatePublisher, apply_merge_patch
+
+
+class FakeWebSocket:
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+
+    async def send(self, message):
+        if self.fail:
+            raise ConnectionError("closed")
+        self.sent.append(message)
+
+    def messages(self):
+        return [json.loads(m) for m in self.sent]
+
+
+def servos(positions):
+    return {channel: {'name': f'servo_{channel}', 'position_us': position, 'moving': False}
+            for channel, position in positions.items()}
+
+
+class TestStateStore(unittest.TestCase):
+    """Test suite for StateStore and StatePublisher"""
+
+    def test_change_detection(self):
+        """Test unchanged updates are free and changes become nested patches"""
+        store = StateStore()
+        self.assertTrue(store.update('servos', servos({0: 1500.0, 1: 1500.0}), replace=True))
+        store.drain()
+        self.assertFalse(store.update('servos', servos({0: 1500.0, 1: 1500.0}), replace=True))
+        self.assertEqual(store.drain(), {})
+
+        store.update('servos', servos({0: 1520.0, 1: 1500.0}), replace=True)
+        version, patch = store.drain()['servos']
+        self.assertEqual(patch, {'0': {'position_us': 1520.0}})
+        self.assertEqual(version, store.version)
+
+        store.update('servos', servos({1: 1500.0}), replace=True)
+        self.assertEqual(store.drain()['servos'][1], {'0': None})
+
+        store.update('safety', {'emergency_stop_active': False, 'port': None})
+        self.assertFalse(store.update('safety', {'emergency_stop_active': False, 'port': None}))
+        self.assertEqual(store.get('safety'), {'emergency_stop_active': False})
+
+    def test_pending_patches_fold(self):
+        """Test several updates between ticks fold into one delta that reproduces the state"""
+        store = StateStore()
+        store.update('wcb', {'boards': {'1': {'online': True, 'mood': 'idle'}}, 'active': None}, replace=True)
+        _, client = store.snapshot()
+        store.drain()
+
+        store.update('wcb', {'boards': {'1': {'online': True, 'mood': 'happy'}, '2': {'online': True}}}, replace=True)
+        store.update('wcb', {'boards': {'2': {'online': False}}}, replace=True)
+        store.update('wcb', {'active': 'happy'})
+        (version, patch), = store.drain().values()
+        self.assertEqual(apply_merge_patch(client['wcb'], patch), store.get('wcb'))
+        self.assertEqual(store.get('wcb'), {'boards': {'2': {'online': False}}, 'active': 'happy'})
+
+    def test_readded_field_replaces_client_value(self):
+        """Test a field removed and re-added within one tick is sent whole, not merged"""
+        store = StateStore()
+        store.update('wcb', {'boards': {'1': {'online': True, 'mood': 'idle'}}, 'mode': 'auto'})
+        _, client = store.snapshot()
+        store.drain()
+
+        store.remove('wcb', ['boards'])
+        store.update('wcb', {'boards': {'1': {'online': False}}})
+        store.update('wcb', {'mode': {'name': 'manual'}})                   # Plain value becomes a dict
+        store.update('wcb', {'mode': {'name': 'manual', 'speed': 1}})
+        (_, patch), = store.drain().values()
+        self.assertEqual(patch, {'boards': {'1': {'online': False, 'mood': None}},
+                                 'mode': {'name': 'manual', 'speed': 1}})
+        self.assertEqual(apply_merge_patch(client['wcb'], patch), store.get('wcb'))
+
+        # Clients holding the published state and clients that connected mid-tick end up alike
+        _, client = store.snapshot()
+        store.remove('wcb', ['boards'])
+        _, late_client = store.snapshot()
+        store.update('wcb', {'boards': {'2': {'online': True}}})
+        store.update('wcb', {'boards': {'2': {'online': True, 'mood': 'happy'}}})
+        (_, patch), = store.drain().values()
+        self.assertEqual(apply_merge_patch(client['wcb'], patch), store.get('wcb'))
+        self.assertEqual(apply_merge_patch(late_client['wcb'], patch), store.get('wcb'))
+        self.assertEqual(store.get('wcb')['boards'], {'2': {'online': True, 'mood': 'happy'}})
+
+    def test_topic_subscriptions_share_serialization(self):
+        """Test clients get a snapshot of their topics and the same delta bytes per topic"""
+        store = StateStore()
+        publisher = StatePublisher(store)
+        store.update('servos', servos({0: 1500.0}), replace=True)
+        store.update('safety', {'emergency_stop_active': False})
+        dashboard, monitor, broken = FakeWebSocket(), FakeWebSocket(), FakeWebSocket(fail=True)
+
+        async def scenario():
+            await publisher.connect(dashboard)
+            await publisher.connect(monitor, topics=['safety'])
+            await publisher.connect(broken)
+            store.update('servos', servos({0: 1510.0}), replace=True)
+            store.update('safety', {'emergency_stop_active': True})
+            await publisher.publish()
+            await publisher.publish()                   # Nothing changed, nothing sent
+            await publisher.handle_subscribe(monitor, {'topics': ['servos']})
+
+        asyncio.run(scenario())
+        snapshot = dashboard.messages()[0]
+        self.assertEqual(snapshot['type'], 'state_snapshot')
+        self.assertEqual(set(snapshot['topics']), {'servos', 'safety'})
+        self.assertEqual(list(monitor.messages()[0]['topics']), ['safety'])
+
+        deltas = dashboard.messages()[1:]
+        self.assertEqual(sorted(d['topic'] for d in deltas), ['safety', 'servos'])
+        self.assertEqual(len(monitor.sent), 3)          # Snapshot, safety delta, new snapshot
+        safety = [m for m in dashboard.sent if '"topic": "safety"' in m][0]
+        self.assertIs(monitor.sent[1], safety)
+        self.assertEqual(monitor.messages()[2]['topics']['servos']['0']['position_us'], 1510.0)
+        self.assertNotIn(broken, publisher.subscriptions)
+        self.assertEqual(publisher.stats['deltas'], 2)
+
+    def test_client_reconstructs_state(self):
+        """Test snapshot plus deltas reproduce the store after random producer updates"""
+        store = StateStore()
+        publisher = StatePublisher(store)
+        client = FakeWebSocket()
+        rng = random.Random(7)
+
+        async def scenario():
+            await publisher.connect(client)
+            for _ in range(50):
+                for _ in range(rng.randint(0, 4)):
+                    channels = rng.sample(range(6), rng.randint(1, 6))
+                    store.update('servos', servos({c: float(rng.choice([1000, 1500, 2000])) for c in channels}),
+                                 replace=rng.random() < 0.5)
+                await publisher.publish()
+
+        asyncio.run(scenario())
+        state = {}
+        for message in client.messages():
+            if message['type'] == 'state_snapshot':
+                state = message['topics']
+            else:
+                state[message['topic']] = apply_merge_patch(state.get(message['topic']), message['changes'])
+        self.assertEqual(state, {'servos': store.get('servos')})
+        self.assertLessEqual(publisher.stats['deltas'], 50)     # At most one per tick
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
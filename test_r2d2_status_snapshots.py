@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+R2D2 Status Snapshots Test Suite
+Tests bounded rebuilds, invalidation, ETags with conditional GETs and
+volatile keys, and the Flask and FastAPI endpoints served from snapshots
+"""
+
+import threading
+import time
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from r2d2_status_snapshots import StatusSnapshotService, flask_snapshot_response
+
+
+class CountingBuilder:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.value = 1
+        self.delay = delay
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {'success': True, 'data': {'value': self.value}}
+
+
+class TestStatusSnapshots(unittest.TestCase):
+    """Test suite for StatusSnapshotService"""
+
+    def test_rebuild_rate_and_invalidation(self):
+        """Test requests within max_age share one build and invalidate forces the next one"""
+        builder = CountingBuilder()
+        service = StatusSnapshotService(max_age=0.2)
+        service.register('status', builder)
+
+        first = service.get('status')
+        for _ in range(100):
+            self.assertIs(service.get('status'), first)
+        self.assertEqual(builder.calls, 1)
+        self.assertEqual(first.body, b'{"success":true,"data":{"value":1}}')
+
+        service.invalidate('status')
+        rebuilt = service.get('status')
+        self.assertEqual(builder.calls, 2)
+        self.assertEqual(rebuilt.etag, first.etag)              # Same content, same ETag
+
+        builder.value = 2
+        time.sleep(0.25)
+        self.assertNotEqual(service.get('status').etag, first.etag)
+        self.assertEqual(builder.calls, 3)
+        self.assertEqual(service.stats['hits'], 100)
+
+    def test_invalidate_during_build(self):
+        """Test a snapshot built while an invalidate() arrives stays stale and is rebuilt next time"""
+        service = StatusSnapshotService(max_age=60.0)
+        builder = CountingBuilder()
+
+        def changing_builder():
+            document = builder()
+            if builder.calls == 1:
+                builder.value = 2                      # State changes mid-build
+                service.invalidate('status')
+            return document
+
+        service.register('status', changing_builder)
+        self.assertEqual(service.get('status').payload['data']['value'], 1)
+        self.assertEqual(service.get('status').payload['data']['value'], 2)
+        self.assertEqual(builder.calls, 2)
+        service.get('status')
+        self.assertEqual(builder.calls, 2)
+
+    def test_conditional_get(self):
+        """Test a matching If-None-Match gets 304 without a body"""
+        service = StatusSnapshotService()
+        service.register('status', CountingBuilder())
+        status, body, headers = service.respond('status')
+        etag = headers['ETag']
+        self.assertEqual((status, headers['Cache-Control']), (200, 'no-cache'))
+
+        self.assertEqual(service.respond('status', etag)[:2], (304, b''))
+        self.assertEqual(service.respond('status', f'"stale", W/{etag}')[0], 304)
+        self.assertEqual(service.respond('status', '*')[0], 304)
+        self.assertEqual(service.respond('status', '"stale"')[:2], (200, body))
+        self.assertEqual(service.stats['not_modified'], 3)
+
+    def test_volatile_keys_keep_etag(self):
+        """Test timestamps and uptimes stay in the body but out of the ETag"""
+        builder = CountingBuilder()
+        clock = iter(range(100))
+        service = StatusSnapshotService(max_age=60.0)
+        service.register('status', lambda: {**builder(), 'timestamp': next(clock),
+                                            'history': [{'uptime': next(clock), 'event': 'start'}]},
+                         volatile=('timestamp', 'uptime'))
+        first = service.get('status')
+        service.invalidate()
+        second = service.get('status')
+        self.assertNotEqual(first.body, second.body)
+        self.assertEqual(second.payload['timestamp'], 2)
+        self.assertEqual(first.etag, second.etag)
+
+        builder.value = 2
+        service.invalidate()
+        self.assertNotEqual(service.get('status').etag, first.etag)
+
+    def test_servo_rest_api_rebuilds_keep_etag(self):
+        """Test unchanged servo status documents keep their ETag across rebuilds"""
+        from servo_backend_core import ServoBackendCore
+        from servo_rest_api import ServoRESTAPI
+
+        api = ServoRESTAPI(ServoBackendCore(simulation_mode=True))
+        for name in ('status', 'performance', 'safety'):
+            first = api.snapshots.get(name)
+            time.sleep(0.01)
+            api.snapshots.invalidate(name)
+            second = api.snapshots.get(name)
+            self.assertNotEqual(first.built_at, second.built_at)
+            self.assertEqual(first.etag, second.etag, name)
+
+    def test_concurrent_requests_and_background_refresh(self):
+        """Test concurrent requests wait for a single build, and the refresh thread keeps requests from building"""
+        builder = CountingBuilder(delay=0.05)
+        service = StatusSnapshotService(max_age=0.05)
+        service.register('status', builder)
+        threads = [threading.Thread(target=service.get, args=('status',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(builder.calls, 1)
+
+        service.start(interval=0.05)
+        try:
+            time.sleep(0.3)
+            calls = builder.calls
+            self.assertGreater(calls, 2)
+            for _ in range(50):
+                service.get('status')
+            self.assertLessEqual(builder.calls, calls + 1)      # At most the refresh thread's next build
+        finally:
+            service.stop()
+
+    def test_flask_and_fastapi_endpoints(self):
+        """Test the Flask helper and the WCB dashboard API answer revalidations with 304"""
+        app = Flask(__name__)
+        service = StatusSnapshotService()
+        builder = CountingBuilder()
+        service.register('status', builder)
+        app.add_url_rule('/api/status', 'status', lambda: flask_snapshot_response(service, 'status'))
+
+        client = app.test_client()
+        response = client.get('/api/status')
+        self.assertEqual(response.get_json(), {'success': True, 'data': {'value': 1}})
+        revalidated = client.get('/api/status', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual((revalidated.status_code, revalidated.data), (304, b''))
+        self.assertEqual(builder.calls, 1)
+
+        from fastapi.testclient import TestClient
+        import wcb_dashboard_api
+        headers = {'Authorization': f"Bearer {wcb_dashboard_api.auth_manager.get_primary_token()}"}
+        with TestClient(wcb_dashboard_api.app) as wcb:
+            stats = wcb.get('/api/wcb/stats', headers=headers)
+            self.assertEqual(stats.status_code, 200)
+            self.assertEqual(stats.json()['api_version'], '1.0.0')
+
+            # A rebuild with a later uptime still answers the poll with 304
+            wcb_dashboard_api.snapshots.invalidate()
+            with mock.patch.dict(wcb_dashboard_api.manager.stats,
+                                 start_time=wcb_dashboard_api.manager.stats['start_time'] - 60):
+                again = wcb.get('/api/wcb/stats', headers={**headers, 'If-None-Match': stats.headers['etag']})
+            self.assertEqual(again.status_code, 304)
+            self.assertEqual(wcb_dashboard_api.snapshots.get('stats').payload['uptime_seconds'],
+                             stats.json()['uptime_seconds'] + 60)
+            boards = wcb.get('/api/wcb/boards/status', headers=headers).json()
+            self.assertIn('connected', boards['wcb1'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+R2D2 Time-Series Store Test Suite
+Tests bucket rollups, chunk persistence, column-selective queries
+and retention
+"""
+
+import itertools
+import threading
+import unittest
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from r2d2_timeseries_store import TimeSeriesStore, RollupTier
+
+TEST_TIERS = (
+    RollupTier('1s', 1.0, 60, 86400),
+    RollupTier('1m', 60.0, 60, 30 * 86400),
+    RollupTier('1h', 3600.0, 24, 365 * 86400)
+)
+
+
+class TestTimeSeriesStore(unittest.TestCase):
+    """Test suite for the time-series store"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.start = (int(time.time()) // 3600 - 3) * 3600  # Hour aligned, recent
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _store(self):
+        return TimeSeriesStore(self.directory, ('position', 'temperature'),
+                               channels=2, tiers=TEST_TIERS)
+
+    def _fill(self, store, seconds, rate=10):
+        for i in range(seconds * rate):
+            t = self.start + i / rate
+            store.append(t, np.array([[i % 10, 100.0], [20.0 + t - self.start, 30.0]]))
+
+    def test_rollups(self):
+        """Test 1s buckets roll up into 1m with mean/min/max"""
+        store = self._store()
+        self._fill(store, 180)
+
+        seconds = store.query(self.start, self.start + 60, resolution='1s')
+        self.assertEqual(len(seconds['timestamps']), 60)
+        np.testing.assert_allclose(seconds['data']['position']['mean'][:, 0], 4.5)
+
+        minutes = store.query(self.start, self.start + 120, resolution='1m',
+                              stats=('mean', 'min', 'max'))
+        self.assertEqual(len(minutes['timestamps']), 2)
+        temperature = minutes['data']['temperature']
+        self.assertAlmostEqual(float(temperature['min'][0, 0]), 20.0, places=3)
+        self.assertAlmostEqual(float(temperature['max'][0, 0]), 79.9, places=3)
+        self.assertAlmostEqual(float(temperature['mean'][1, 1]), 30.0, places=3)
+
+    def test_persistence_and_column_selection(self):
+        """Test flushed chunks are read back with only the requested columns"""
+        store = self._store()
+        self._fill(store, 150)
+        store.flush(close_buckets=True)
+
+        reopened = self._store()
+        result = reopened.query(self.start, self.start + 150, fields=['temperature'],
+                                channels=[1], resolution='1s')
+        self.assertEqual(len(result['timestamps']), 150)
+        self.assertEqual(list(result['data']), ['temperature'])
+        self.assertEqual(result['data']['temperature']['mean'].shape, (150, 1))
+        np.testing.assert_allclose(result['data']['temperature']['mean'][:, 0], 30.0)
+
+    def test_tier_selection(self):
+        """Test max_points picks the finest tier that fits"""
+        store = self._store()
+        self.assertEqual(store.select_tier(self.start, self.start + 600, 1000).name, '1s')
+        self.assertEqual(store.select_tier(self.start, self.start + 7200, 500).name, '1m')
+        self.assertEqual(store.select_tier(self.start, self.start + 30 * 86400, 1000).name, '1h')
+
+    def test_retention(self):
+        """Test chunks past their tier retention are deleted"""
+        store = self._store()
+        self._fill(store, 180, rate=2)
+        store.flush(close_buckets=True)
+
+        deleted = store.apply_retention(now=self.start + 2 * 86400)
+        self.assertGreater(deleted, 0)
+        self.assertEqual(store.get_stats()['disk']['1s']['chunks'], 0)
+        self.assertGreater(store.get_stats()['disk']['1m']['chunks'], 0)
+
+    def test_concurrent_writers_share_store_clock(self):
+        """Test threads appending field subsets with store timestamps lose no samples"""
+        ticks = itertools.count()
+        store = TimeSeriesStore(self.directory, ('position', 'temperature'), channels=2,
+                                tiers=TEST_TIERS, clock=lambda: self.start + next(ticks) * 0.05)
+
+        def writer(name, value):
+            for _ in range(500):
+                store.append(None, {name: [value, value]})
+
+        threads = [threading.Thread(target=writer, args=('position', 1500.0)),
+                   threading.Thread(target=writer, args=('temperature', 40.0))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.flush(close_buckets=True)
+
+        self.assertEqual(store.stats['samples'], 1000)
+        self.assertEqual(store.stats['out_of_order'], 0)
+        result = store.query(self.start, self.start + 50, resolution='1s')
+        for name, value in (('position', 1500.0), ('temperature', 40.0)):
+            means = result['data'][name]['mean']
+            self.assertEqual(set(means[~np.isnan(means)]), {value})   # No rows mixed between writers
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+R2D2 Servo Command Coalescer Test Suite
+Tests per-channel latest-value slots, fixed-rate batched writes, tick-id
+acks, emergency stop clearing and the Maestro multiple-targets command
+"""
+
+import asyncio
+import json
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from servo_command_coalescer import ServoCommandCoalescer, send_ack_when_flushed
+from pololu_maestro_controller import PololuMaestroController, MaestroCommand
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, targets):
+        self.batches.append(dict(targets))
+        return {channel: True for channel in targets}
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+class TestServoCommandCoalescer(unittest.TestCase):
+    """Test suite for ServoCommandCoalescer"""
+
+    def test_burst_is_one_batch_of_latest_values(self):
+        """Test a burst of messages becomes one write of each channel's latest target"""
+        writer = RecordingWriter()
+
+        async def burst():
+            coalescer = ServoCommandCoalescer(writer, rate_hz=20)
+            futures = [coalescer.submit(i % 2, 1000 + i) for i in range(100)]
+            results = await asyncio.gather(*futures)
+            await coalescer.stop()
+            return coalescer, results
+
+        coalescer, results = asyncio.run(burst())
+        self.assertEqual(writer.batches, [{0: 1098, 1: 1099}])
+        self.assertEqual({r.tick for r in results}, {1})
+        self.assertTrue(all(r.success for r in results))
+        self.assertEqual(sum(r.superseded for r in results), 98)
+        self.assertFalse(results[-1].superseded)
+        self.assertEqual(coalescer.stats['coalesced'], 98)
+
+    def test_fixed_rate_ticks_and_acks(self):
+        """Test serial writes are bounded by the tick rate and acks carry increasing tick ids"""
+        writer = RecordingWriter()
+        websocket = FakeWebSocket()
+
+        async def stream():
+            coalescer = ServoCommandCoalescer(writer, rate_hz=50)
+            for i in range(50):                      # 500 Hz client for 100ms
+                future = coalescer.submit(3, 1500 + i)
+                send_ack_when_flushed(future, websocket, {'type': 'servo_response', 'channel': 3})
+                await asyncio.sleep(0.002)
+            await asyncio.sleep(0.05)
+            await coalescer.stop()
+            await asyncio.sleep(0)
+            return coalescer
+
+        coalescer = asyncio.run(stream())
+        self.assertLessEqual(len(writer.batches), 10)
+        self.assertEqual(writer.batches[-1], {3: 1549})
+        self.assertEqual(len(websocket.sent), 50)
+        ticks = [ack['tick'] for ack in websocket.sent]
+        self.assertEqual(ticks, sorted(ticks))
+        self.assertEqual(ticks[-1], coalescer.tick)
+        self.assertFalse(websocket.sent[-1]['coalesced'])
+        self.assertTrue(all(ack['success'] and ack['channel'] == 3 for ack in websocket.sent))
+
+    def test_clear_drops_pending_targets(self):
+        """Test an emergency stop clear drops queued targets before they are written"""
+        writer = RecordingWriter()
+
+        async def stop_with_pending():
+            coalescer = ServoCommandCoalescer(writer, rate_hz=10)
+            futures = [coalescer.submit(0, 2000), coalescer.submit(1, 2000)]
+            self.assertEqual(coalescer.clear(), 2)
+            results = await asyncio.gather(*futures)
+            await coalescer.stop()
+            return results
+
+        results = asyncio.run(stop_with_pending())
+        self.assertEqual(writer.batches, [])
+        self.assertTrue(all(not r.success and r.tick == 0 for r in results))
+
+    def test_maestro_multiple_targets(self):
+        """Test a batch is sent as one write with Set Multiple Targets for consecutive channels"""
+        controller = PololuMaestroController(simulation_mode=True)
+        try:
+            with mock.patch.object(controller, '_send_command', return_value=b'') as send:
+                results = controller.set_servo_positions({1: 6000, 2: 7000, 5: 5000, 99: 6000})
+            self.assertEqual(results, {1: True, 2: True, 5: True, 99: False})
+            self.assertEqual(send.call_count, 1)
+            self.assertEqual(send.call_args.args, (
+                MaestroCommand.SET_MULTIPLE_TARGETS.value, 2, 1, 6000 & 0x7F, 6000 >> 7, 7000 & 0x7F, 7000 >> 7,
+                MaestroCommand.SET_TARGET.value, 5, 5000 & 0x7F, 5000 >> 7))
+            self.assertEqual(controller.servo_status[2].target, 7000)
+
+            controller.emergency_stop()
+            self.assertEqual(controller.set_servo_positions({1: 6000}), {1: False})
+        finally:
+            controller.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
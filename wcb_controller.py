@@ -22,12 +22,15 @@ import time
 import logging
 import threading
 import queue
+import itertools
 from typing import Dict, List, Optional, Tuple, Callable, Any
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 import json
 from pathlib import Path
 
+from r2d2_metrics import MetricsRegistry, get_registry
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -127,6 +130,9 @@ class WCBStatus:
 # BASE WCB CONTROLLER
 # =============================================
 
+_instance_ids = itertools.count(1)
+
+
 class WCBController:
     """
     Base WCB Controller with Serial Communication
@@ -136,7 +142,8 @@ class WCBController:
     """
 
     def __init__(self, port: str = "/dev/ttyUSB0", baudrate: int = 9600,
-                 auto_detect: bool = True, simulation_mode: bool = False):
+                 auto_detect: bool = True, simulation_mode: bool = False,
+                 registry: Optional[MetricsRegistry] = None, name: Optional[str] = None):
         """
         Initialize WCB Controller
 
@@ -145,7 +152,10 @@ class WCBController:
             baudrate: Serial baudrate (9600 default for WCB)
             auto_detect: Automatically detect WCB network
             simulation_mode: Run without hardware (testing)
+            registry: Metrics registry (defaults to the process registry)
+            name: Value of the 'instance' metric label (unique per controller by default)
         """
+        self.name = name or f"wcb{next(_instance_ids)}"
         self.port = port
         self.baudrate = baudrate
         self.simulation_mode = simulation_mode
@@ -159,13 +169,20 @@ class WCBController:
         self._command_thread: Optional[threading.Thread] = None
         self._lock = threading.Lock()
 
-        # Statistics
-        self.stats = {
-            'commands_sent': 0,
-            'commands_failed': 0,
-            'bytes_sent': 0,
-            'uptime_start': time.time()
-        }
+        # Statistics (thread-safe registry metrics, one labeled child per controller)
+        registry = registry or get_registry()
+        self._registry = registry
+        self._commands_sent = registry.counter(
+            'wcb_commands_sent_total', 'WCB commands sent', ('instance',)).labels(self.name)
+        self._commands_failed = registry.counter(
+            'wcb_commands_failed_total', 'WCB commands failed', ('instance',)).labels(self.name)
+        self._bytes_sent = registry.counter(
+            'wcb_bytes_sent_total', 'Bytes written to the WCB link', ('instance',)).labels(self.name)
+        self._send_latency = registry.histogram(
+            'wcb_send_latency_seconds', 'WCB frame write time', ('instance',)).labels(self.name)
+        registry.gauge('wcb_queue_size', 'Queued WCB commands', ('instance',)) \
+            .labels(self.name).set_function(self.command_queue.qsize)
+        self._uptime_start = time.time()
 
         # Auto-detect and connect
         if auto_detect and not simulation_mode:
@@ -316,11 +333,11 @@ class WCBController:
         """Internal command sending (actual serial transmission)"""
         if not self.status.connected and not self.simulation_mode:
             logger.warning("WCB not connected - command dropped")
-            self.stats['commands_failed'] += 1
+            self._commands_failed.inc()
             return False
 
         try:
-            with self._lock:
+            with self._lock, self._send_latency.time():
                 frame = command.to_frame()
 
                 if self.simulation_mode:
@@ -334,8 +351,8 @@ class WCBController:
                                 f"Port {command.port.value}: {frame.hex()}")
 
                 # Update statistics
-                self.stats['commands_sent'] += 1
-                self.stats['bytes_sent'] += len(frame)
+                self._commands_sent.inc()
+                self._bytes_sent.inc(len(frame))
                 self.status.last_command_time = time.time()
                 self.status.commands_sent += 1
 
@@ -343,7 +360,7 @@ class WCBController:
 
         except Exception as e:
             logger.error(f"WCB send failed: {e}")
-            self.stats['commands_failed'] += 1
+            self._commands_failed.inc()
             self.status.commands_failed += 1
             return False
 
@@ -413,6 +430,16 @@ class WCBController:
 
         logger.info("✅ Emergency stop executed")
 
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Command statistics read from the metrics registry"""
+        return {
+            'commands_sent': int(self._commands_sent.get()),
+            'commands_failed': int(self._commands_failed.get()),
+            'bytes_sent': int(self._bytes_sent.get()),
+            'uptime_start': self._uptime_start
+        }
+
     def get_status(self) -> Dict[str, Any]:
         """Get comprehensive WCB status"""
         return {
@@ -430,7 +457,7 @@ class WCBController:
             'statistics': {
                 **self.stats,
                 'queue_size': self.status.queue_size,
-                'uptime_seconds': time.time() - self.stats['uptime_start']
+                'uptime_seconds': time.time() - self._uptime_start
             }
         }
 
@@ -441,6 +468,11 @@ class WCBController:
         self.stop_command_thread()
         self.disconnect()
 
+        # The queue gauge references this controller; drop it with the controller
+        queue_size = self._registry.get('wcb_queue_size')
+        if queue_size is not None:
+            queue_size.remove(self.name)
+
         logger.info("✅ WCB controller shutdown complete")
 
 # =============================================
@@ -14,11 +14,15 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, status, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, Field, validator
 
 from wcb_hardware_orchestrator import HardwareOrchestrator, R2D2Mood
 from r2d2_auth_module import auth_manager, validate_api_token
 from r2d2_csrf_module import csrf_manager, validate_csrf_token
+from r2d2_rate_limiter import RateLimitMiddleware, create_api_rate_limiter
+from r2d2_metrics import add_fastapi_metrics_routes
+from r2d2_status_snapshots import StatusSnapshotService, fastapi_snapshot_response
 
 # Configure logging
 logging.basicConfig(
@@ -447,6 +451,14 @@ def verify_csrf_token(x_csrf_token: Optional[str] = Header(None)) -> str:
 # Global orchestrator manager
 manager = OrchestratorManager()
 
+# Stats and board status are rebuilt at most once a second and served as cached bytes with ETags
+# (the uptime and board update times stay out of the ETag)
+snapshots = StatusSnapshotService(max_age=1.0)
+snapshots.register('stats', lambda: jsonable_encoder(StatsResponse(**manager.get_stats())),
+                   volatile=('uptime_seconds',))
+snapshots.register('boards', lambda: jsonable_encoder(WCBBoardsStatusResponse(**manager.get_boards_status())),
+                   volatile=('last_update',))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -477,6 +489,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rate limiting (added before CORS so 429 responses still carry CORS headers)
+rate_limiter = create_api_rate_limiter()
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
+# Prometheus text (/metrics) and dashboard snapshot (/api/metrics), token required
+add_fastapi_metrics_routes(app, dependencies=[Depends(verify_auth_token)])
+
 # CORS middleware for dashboard access
 # SECURITY: Restricted to localhost only - UPDATE for production deployment
 app.add_middleware(
@@ -598,7 +617,10 @@ async def execute_mood(
                 detail=f"Invalid mood_id: {request.mood_id}"
             )
 
-    result = await manager.execute_mood(request.mood_id, request.priority)
+    try:
+        result = await manager.execute_mood(request.mood_id, request.priority)
+    finally:
+        snapshots.invalidate()
     return MoodExecuteResponse(**result)
 
 
@@ -617,6 +639,7 @@ async def stop_mood(
     """
     logger.info(f"API Request: Stop current mood (token: {token[:8]}..., csrf: {csrf_token[:16]}...)")
     result = await manager.stop_mood()
+    snapshots.invalidate()
     return MoodStopResponse(**result)
 
 
@@ -647,29 +670,31 @@ async def list_moods(token: str = Depends(verify_auth_token)):
 
 
 @app.get("/api/wcb/stats", response_model=StatsResponse, tags=["Statistics"])
-async def get_stats(token: str = Depends(verify_auth_token)):
+async def get_stats(token: str = Depends(verify_auth_token),
+                    if_none_match: Optional[str] = Header(None)):
     """
     Get API usage statistics (REQUIRES AUTHENTICATION)
 
-    Returns execution counts, timing statistics, and uptime
+    Returns execution counts, timing statistics, and uptime.
+    Served from a cached snapshot; If-None-Match with its ETag returns 304
 
     **Authentication**: Requires Bearer token in Authorization header
     """
-    stats = manager.get_stats()
-    return StatsResponse(**stats)
+    return fastapi_snapshot_response(snapshots, 'stats', if_none_match)
 
 
 @app.get("/api/wcb/boards/status", response_model=WCBBoardsStatusResponse, tags=["Hardware"])
-async def get_boards_status(token: str = Depends(verify_auth_token)):
+async def get_boards_status(token: str = Depends(verify_auth_token),
+                            if_none_match: Optional[str] = Header(None)):
     """
     Get WCB boards connection status (REQUIRES AUTHENTICATION)
 
-    Returns status for WCB1, WCB2, and WCB3 boards
+    Returns status for WCB1, WCB2, and WCB3 boards.
+    Served from a cached snapshot; If-None-Match with its ETag returns 304
 
     **Authentication**: Requires Bearer token in Authorization header
     """
-    boards_status = manager.get_boards_status()
-    return WCBBoardsStatusResponse(**boards_status)
+    return fastapi_snapshot_response(snapshots, 'boards', if_none_match)
 
 
 # ============================================================================